@@ -0,0 +1,1115 @@
+(function(window,undefined){var document=window.document,navigator=window.navigator,location=window.location;var jQuery=(function(){var jQuery=function(selector,context){return new jQuery.fn.init(selector,context,rootjQuery);},_jQuery=window.jQuery,_$=window.$,rootjQuery,quickExpr=/^(?:[^#<]*(<[\w\W]+>)[^>]*$|#([\w\-]*)$)/,rnotwhite=/\S/,trimLeft=/^\s+/,trimRight=/\s+$/,rsingleTag=/^<(\w+)\s*\/?>(?:<\/\1>)?$/,rvalidchars=/^[\],:{}\s]*$/,rvalidescape=/\\(?:["\\\/bfnrt]|u[0-9a-fA-F]{4})/g,rvalidtokens=/"[^"\\\n\r]*"|true|false|null|-?\d+(?:\.\d*)?(?:[eE][+\-]?\d+)?/g,rvalidbraces=/(?:^|:|,)(?:\s*\[)+/g,rwebkit=/(webkit)[ \/]([\w.]+)/,ropera=/(opera)(?:.*version)?[ \/]([\w.]+)/,rmsie=/(msie) ([\w.]+)/,rmozilla=/(mozilla)(?:.*? rv:([\w.]+))?/,rdashAlpha=/-([a-z]|[0-9])/ig,rmsPrefix=/^-ms-/,fcamelCase=function(all,letter){return(letter+"").toUpperCase();},userAgent=navigator.userAgent,browserMatch,readyList,DOMContentLoaded,toString=Object.prototype.toString,hasOwn=Object.prototype.hasOwnProperty,push=Array.prototype.push,slice=Array.prototype.slice,trim=String.prototype.trim,indexOf=Array.prototype.indexOf,class2type={};jQuery.fn=jQuery.prototype={constructor:jQuery,init:function(selector,context,rootjQuery){var match,elem,ret,doc;if(!selector){return this;}
+if(selector.nodeType){this.context=this[0]=selector;this.length=1;return this;}
+if(selector==="body"&&!context&&document.body){this.context=document;this[0]=document.body;this.selector=selector;this.length=1;return this;}
+if(typeof selector==="string"){if(selector.charAt(0)==="<"&&selector.charAt(selector.length-1)===">"&&selector.length>=3){match=[null,selector,null];}else{match=quickExpr.exec(selector);}
+if(match&&(match[1]||!context)){if(match[1]){context=context instanceof jQuery?context[0]:context;doc=(context?context.ownerDocument||context:document);ret=rsingleTag.exec(selector);if(ret){if(jQuery.isPlainObject(context)){selector=[document.createElement(ret[1])];jQuery.fn.attr.call(selector,context,true);}else{selector=[doc.createElement(ret[1])];}}else{ret=jQuery.buildFragment([match[1]],[doc]);selector=(ret.cacheable?jQuery.clone(ret.fragment):ret.fragment).childNodes;}
+return jQuery.merge(this,selector);}else{elem=document.getElementById(match[2]);if(elem&&elem.parentNode){if(elem.id!==match[2]){return rootjQuery.find(selector);}
+this.length=1;this[0]=elem;}
+this.context=document;this.selector=selector;return this;}}else if(!context||context.jquery){return(context||rootjQuery).find(selector);}else{return this.constructor(context).find(selector);}}else if(jQuery.isFunction(selector)){return rootjQuery.ready(selector);}
+if(selector.selector!==undefined){this.selector=selector.selector;this.context=selector.context;}
+return jQuery.makeArray(selector,this);},selector:"",jquery:"1.7.2",length:0,size:function(){return this.length;},toArray:function(){return slice.call(this,0);},get:function(num){return num==null?this.toArray():(num<0?this[this.length+num]:this[num]);},pushStack:function(elems,name,selector){var ret=this.constructor();if(jQuery.isArray(elems)){push.apply(ret,elems);}else{jQuery.merge(ret,elems);}
+ret.prevObject=this;ret.context=this.context;if(name==="find"){ret.selector=this.selector+(this.selector?" ":"")+selector;}else if(name){ret.selector=this.selector+"."+name+"("+selector+")";}
+return ret;},each:function(callback,args){return jQuery.each(this,callback,args);},ready:function(fn){jQuery.bindReady();readyList.add(fn);return this;},eq:function(i){i=+i;return i===-1?this.slice(i):this.slice(i,i+1);},first:function(){return this.eq(0);},last:function(){return this.eq(-1);},slice:function(){return this.pushStack(slice.apply(this,arguments),"slice",slice.call(arguments).join(","));},map:function(callback){return this.pushStack(jQuery.map(this,function(elem,i){return callback.call(elem,i,elem);}));},end:function(){return this.prevObject||this.constructor(null);},push:push,sort:[].sort,splice:[].splice};jQuery.fn.init.prototype=jQuery.fn;jQuery.extend=jQuery.fn.extend=function(){var options,name,src,copy,copyIsArray,clone,target=arguments[0]||{},i=1,length=arguments.length,deep=false;if(typeof target==="boolean"){deep=target;target=arguments[1]||{};i=2;}
+if(typeof target!=="object"&&!jQuery.isFunction(target)){target={};}
+if(length===i){target=this;--i;}
+for(;i<length;i++){if((options=arguments[i])!=null){for(name in options){src=target[name];copy=options[name];if(target===copy){continue;}
+if(deep&&copy&&(jQuery.isPlainObject(copy)||(copyIsArray=jQuery.isArray(copy)))){if(copyIsArray){copyIsArray=false;clone=src&&jQuery.isArray(src)?src:[];}else{clone=src&&jQuery.isPlainObject(src)?src:{};}
+target[name]=jQuery.extend(deep,clone,copy);}else if(copy!==undefined){target[name]=copy;}}}}
+return target;};jQuery.extend({noConflict:function(deep){if(window.$===jQuery){window.$=_$;}
+if(deep&&window.jQuery===jQuery){window.jQuery=_jQuery;}
+return jQuery;},isReady:false,readyWait:1,holdReady:function(hold){if(hold){jQuery.readyWait++;}else{jQuery.ready(true);}},ready:function(wait){if((wait===true&&!--jQuery.readyWait)||(wait!==true&&!jQuery.isReady)){if(!document.body){return setTimeout(jQuery.ready,1);}
+jQuery.isReady=true;if(wait!==true&&--jQuery.readyWait>0){return;}
+readyList.fireWith(document,[jQuery]);if(jQuery.fn.trigger){jQuery(document).trigger("ready").off("ready");}}},bindReady:function(){if(readyList){return;}
+readyList=jQuery.Callbacks("once memory");if(document.readyState==="complete"){return setTimeout(jQuery.ready,1);}
+if(document.addEventListener){document.addEventListener("DOMContentLoaded",DOMContentLoaded,false);window.addEventListener("load",jQuery.ready,false);}else if(document.attachEvent){document.attachEvent("onreadystatechange",DOMContentLoaded);window.attachEvent("onload",jQuery.ready);var toplevel=false;try{toplevel=window.frameElement==null;}catch(e){}
+if(document.documentElement.doScroll&&toplevel){doScrollCheck();}}},isFunction:function(obj){return jQuery.type(obj)==="function";},isArray:Array.isArray||function(obj){return jQuery.type(obj)==="array";},isWindow:function(obj){return obj!=null&&obj==obj.window;},isNumeric:function(obj){return!isNaN(parseFloat(obj))&&isFinite(obj);},type:function(obj){return obj==null?String(obj):class2type[toString.call(obj)]||"object";},isPlainObject:function(obj){if(!obj||jQuery.type(obj)!=="object"||obj.nodeType||jQuery.isWindow(obj)){return false;}
+try{if(obj.constructor&&!hasOwn.call(obj,"constructor")&&!hasOwn.call(obj.constructor.prototype,"isPrototypeOf")){return false;}}catch(e){return false;}
+var key;for(key in obj){}
+return key===undefined||hasOwn.call(obj,key);},isEmptyObject:function(obj){for(var name in obj){return false;}
+return true;},error:function(msg){throw new Error(msg);},parseJSON:function(data){if(typeof data!=="string"||!data){return null;}
+data=jQuery.trim(data);if(window.JSON&&window.JSON.parse){return window.JSON.parse(data);}
+if(rvalidchars.test(data.replace(rvalidescape,"@").replace(rvalidtokens,"]").replace(rvalidbraces,""))){return(new Function("return "+data))();}
+jQuery.error("Invalid JSON: "+data);},parseXML:function(data){if(typeof data!=="string"||!data){return null;}
+var xml,tmp;try{if(window.DOMParser){tmp=new DOMParser();xml=tmp.parseFromString(data,"text/xml");}else{xml=new ActiveXObject("Microsoft.XMLDOM");xml.async="false";xml.loadXML(data);}}catch(e){xml=undefined;}
+if(!xml||!xml.documentElement||xml.getElementsByTagName("parsererror").length){jQuery.error("Invalid XML: "+data);}
+return xml;},noop:function(){},globalEval:function(data){if(data&&rnotwhite.test(data)){(window.execScript||function(data){window["eval"].call(window,data);})(data);}},camelCase:function(string){return string.replace(rmsPrefix,"ms-").replace(rdashAlpha,fcamelCase);},nodeName:function(elem,name){return elem.nodeName&&elem.nodeName.toUpperCase()===name.toUpperCase();},each:function(object,callback,args){var name,i=0,length=object.length,isObj=length===undefined||jQuery.isFunction(object);if(args){if(isObj){for(name in object){if(callback.apply(object[name],args)===false){break;}}}else{for(;i<length;){if(callback.apply(object[i++],args)===false){break;}}}}else{if(isObj){for(name in object){if(callback.call(object[name],name,object[name])===false){break;}}}else{for(;i<length;){if(callback.call(object[i],i,object[i++])===false){break;}}}}
+return object;},trim:trim?function(text){return text==null?"":trim.call(text);}:function(text){return text==null?"":text.toString().replace(trimLeft,"").replace(trimRight,"");},makeArray:function(array,results){var ret=results||[];if(array!=null){var type=jQuery.type(array);if(array.length==null||type==="string"||type==="function"||type==="regexp"||jQuery.isWindow(array)){push.call(ret,array);}else{jQuery.merge(ret,array);}}
+return ret;},inArray:function(elem,array,i){var len;if(array){if(indexOf){return indexOf.call(array,elem,i);}
+len=array.length;i=i?i<0?Math.max(0,len+i):i:0;for(;i<len;i++){if(i in array&&array[i]===elem){return i;}}}
+return-1;},merge:function(first,second){var i=first.length,j=0;if(typeof second.length==="number"){for(var l=second.length;j<l;j++){first[i++]=second[j];}}else{while(second[j]!==undefined){first[i++]=second[j++];}}
+first.length=i;return first;},grep:function(elems,callback,inv){var ret=[],retVal;inv=!!inv;for(var i=0,length=elems.length;i<length;i++){retVal=!!callback(elems[i],i);if(inv!==retVal){ret.push(elems[i]);}}
+return ret;},map:function(elems,callback,arg){var value,key,ret=[],i=0,length=elems.length,isArray=elems instanceof jQuery||length!==undefined&&typeof length==="number"&&((length>0&&elems[0]&&elems[length-1])||length===0||jQuery.isArray(elems));if(isArray){for(;i<length;i++){value=callback(elems[i],i,arg);if(value!=null){ret[ret.length]=value;}}}else{for(key in elems){value=callback(elems[key],key,arg);if(value!=null){ret[ret.length]=value;}}}
+return ret.concat.apply([],ret);},guid:1,proxy:function(fn,context){if(typeof context==="string"){var tmp=fn[context];context=fn;fn=tmp;}
+if(!jQuery.isFunction(fn)){return undefined;}
+var args=slice.call(arguments,2),proxy=function(){return fn.apply(context,args.concat(slice.call(arguments)));};proxy.guid=fn.guid=fn.guid||proxy.guid||jQuery.guid++;return proxy;},access:function(elems,fn,key,value,chainable,emptyGet,pass){var exec,bulk=key==null,i=0,length=elems.length;if(key&&typeof key==="object"){for(i in key){jQuery.access(elems,fn,i,key[i],1,emptyGet,value);}
+chainable=1;}else if(value!==undefined){exec=pass===undefined&&jQuery.isFunction(value);if(bulk){if(exec){exec=fn;fn=function(elem,key,value){return exec.call(jQuery(elem),value);};}else{fn.call(elems,value);fn=null;}}
+if(fn){for(;i<length;i++){fn(elems[i],key,exec?value.call(elems[i],i,fn(elems[i],key)):value,pass);}}
+chainable=1;}
+return chainable?elems:bulk?fn.call(elems):length?fn(elems[0],key):emptyGet;},now:function(){return(new Date()).getTime();},uaMatch:function(ua){ua=ua.toLowerCase();var match=rwebkit.exec(ua)||ropera.exec(ua)||rmsie.exec(ua)||ua.indexOf("compatible")<0&&rmozilla.exec(ua)||[];return{browser:match[1]||"",version:match[2]||"0"};},sub:function(){function jQuerySub(selector,context){return new jQuerySub.fn.init(selector,context);}
+jQuery.extend(true,jQuerySub,this);jQuerySub.superclass=this;jQuerySub.fn=jQuerySub.prototype=this();jQuerySub.fn.constructor=jQuerySub;jQuerySub.sub=this.sub;jQuerySub.fn.init=function init(selector,context){if(context&&context instanceof jQuery&&!(context instanceof jQuerySub)){context=jQuerySub(context);}
+return jQuery.fn.init.call(this,selector,context,rootjQuerySub);};jQuerySub.fn.init.prototype=jQuerySub.fn;var rootjQuerySub=jQuerySub(document);return jQuerySub;},browser:{}});jQuery.each("Boolean Number String Function Array Date RegExp Object".split(" "),function(i,name){class2type["[object "+name+"]"]=name.toLowerCase();});browserMatch=jQuery.uaMatch(userAgent);if(browserMatch.browser){jQuery.browser[browserMatch.browser]=true;jQuery.browser.version=browserMatch.version;}
+if(jQuery.browser.webkit){jQuery.browser.safari=true;}
+if(rnotwhite.test("\xA0")){trimLeft=/^[\s\xA0]+/;trimRight=/[\s\xA0]+$/;}
+rootjQuery=jQuery(document);if(document.addEventListener){DOMContentLoaded=function(){document.removeEventListener("DOMContentLoaded",DOMContentLoaded,false);jQuery.ready();};}else if(document.attachEvent){DOMContentLoaded=function(){if(document.readyState==="complete"){document.detachEvent("onreadystatechange",DOMContentLoaded);jQuery.ready();}};}
+function doScrollCheck(){if(jQuery.isReady){return;}
+try{document.documentElement.doScroll("left");}catch(e){setTimeout(doScrollCheck,1);return;}
+jQuery.ready();}
+return jQuery;})();var flagsCache={};function createFlags(flags){var object=flagsCache[flags]={},i,length;flags=flags.split(/\s+/);for(i=0,length=flags.length;i<length;i++){object[flags[i]]=true;}
+return object;}
+jQuery.Callbacks=function(flags){flags=flags?(flagsCache[flags]||createFlags(flags)):{};var
+list=[],stack=[],memory,fired,firing,firingStart,firingLength,firingIndex,add=function(args){var i,length,elem,type,actual;for(i=0,length=args.length;i<length;i++){elem=args[i];type=jQuery.type(elem);if(type==="array"){add(elem);}else if(type==="function"){if(!flags.unique||!self.has(elem)){list.push(elem);}}}},fire=function(context,args){args=args||[];memory=!flags.memory||[context,args];fired=true;firing=true;firingIndex=firingStart||0;firingStart=0;firingLength=list.length;for(;list&&firingIndex<firingLength;firingIndex++){if(list[firingIndex].apply(context,args)===false&&flags.stopOnFalse){memory=true;break;}}
+firing=false;if(list){if(!flags.once){if(stack&&stack.length){memory=stack.shift();self.fireWith(memory[0],memory[1]);}}else if(memory===true){self.disable();}else{list=[];}}},self={add:function(){if(list){var length=list.length;add(arguments);if(firing){firingLength=list.length;}else if(memory&&memory!==true){firingStart=length;fire(memory[0],memory[1]);}}
+return this;},remove:function(){if(list){var args=arguments,argIndex=0,argLength=args.length;for(;argIndex<argLength;argIndex++){for(var i=0;i<list.length;i++){if(args[argIndex]===list[i]){if(firing){if(i<=firingLength){firingLength--;if(i<=firingIndex){firingIndex--;}}}
+list.splice(i--,1);if(flags.unique){break;}}}}}
+return this;},has:function(fn){if(list){var i=0,length=list.length;for(;i<length;i++){if(fn===list[i]){return true;}}}
+return false;},empty:function(){list=[];return this;},disable:function(){list=stack=memory=undefined;return this;},disabled:function(){return!list;},lock:function(){stack=undefined;if(!memory||memory===true){self.disable();}
+return this;},locked:function(){return!stack;},fireWith:function(context,args){if(stack){if(firing){if(!flags.once){stack.push([context,args]);}}else if(!(flags.once&&memory)){fire(context,args);}}
+return this;},fire:function(){self.fireWith(this,arguments);return this;},fired:function(){return!!fired;}};return self;};var
+sliceDeferred=[].slice;jQuery.extend({Deferred:function(func){var doneList=jQuery.Callbacks("once memory"),failList=jQuery.Callbacks("once memory"),progressList=jQuery.Callbacks("memory"),state="pending",lists={resolve:doneList,reject:failList,notify:progressList},promise={done:doneList.add,fail:failList.add,progress:progressList.add,state:function(){return state;},isResolved:doneList.fired,isRejected:failList.fired,then:function(doneCallbacks,failCallbacks,progressCallbacks){deferred.done(doneCallbacks).fail(failCallbacks).progress(progressCallbacks);return this;},always:function(){deferred.done.apply(deferred,arguments).fail.apply(deferred,arguments);return this;},pipe:function(fnDone,fnFail,fnProgress){return jQuery.Deferred(function(newDefer){jQuery.each({done:[fnDone,"resolve"],fail:[fnFail,"reject"],progress:[fnProgress,"notify"]},function(handler,data){var fn=data[0],action=data[1],returned;if(jQuery.isFunction(fn)){deferred[handler](function(){returned=fn.apply(this,arguments);if(returned&&jQuery.isFunction(returned.promise)){returned.promise().then(newDefer.resolve,newDefer.reject,newDefer.notify);}else{newDefer[action+"With"](this===deferred?newDefer:this,[returned]);}});}else{deferred[handler](newDefer[action]);}});}).promise();},promise:function(obj){if(obj==null){obj=promise;}else{for(var key in promise){obj[key]=promise[key];}}
+return obj;}},deferred=promise.promise({}),key;for(key in lists){deferred[key]=lists[key].fire;deferred[key+"With"]=lists[key].fireWith;}
+deferred.done(function(){state="resolved";},failList.disable,progressList.lock).fail(function(){state="rejected";},doneList.disable,progressList.lock);if(func){func.call(deferred,deferred);}
+return deferred;},when:function(firstParam){var args=sliceDeferred.call(arguments,0),i=0,length=args.length,pValues=new Array(length),count=length,pCount=length,deferred=length<=1&&firstParam&&jQuery.isFunction(firstParam.promise)?firstParam:jQuery.Deferred(),promise=deferred.promise();function resolveFunc(i){return function(value){args[i]=arguments.length>1?sliceDeferred.call(arguments,0):value;if(!(--count)){deferred.resolveWith(deferred,args);}};}
+function progressFunc(i){return function(value){pValues[i]=arguments.length>1?sliceDeferred.call(arguments,0):value;deferred.notifyWith(promise,pValues);};}
+if(length>1){for(;i<length;i++){if(args[i]&&args[i].promise&&jQuery.isFunction(args[i].promise)){args[i].promise().then(resolveFunc(i),deferred.reject,progressFunc(i));}else{--count;}}
+if(!count){deferred.resolveWith(deferred,args);}}else if(deferred!==firstParam){deferred.resolveWith(deferred,length?[firstParam]:[]);}
+return promise;}});jQuery.support=(function(){var support,all,a,select,opt,input,fragment,tds,events,eventName,i,isSupported,div=document.createElement("div"),documentElement=document.documentElement;div.setAttribute("className","t");div.innerHTML="   <link/><table></table><a href='/a' style='top:1px;float:left;opacity:.55;'>a</a><input type='checkbox'/>";all=div.getElementsByTagName("*");a=div.getElementsByTagName("a")[0];if(!all||!all.length||!a){return{};}
+select=document.createElement("select");opt=select.appendChild(document.createElement("option"));input=div.getElementsByTagName("input")[0];support={leadingWhitespace:(div.firstChild.nodeType===3),tbody:!div.getElementsByTagName("tbody").length,htmlSerialize:!!div.getElementsByTagName("link").length,style:/top/.test(a.getAttribute("style")),hrefNormalized:(a.getAttribute("href")==="/a"),opacity:/^0.55/.test(a.style.opacity),cssFloat:!!a.style.cssFloat,checkOn:(input.value==="on"),optSelected:opt.selected,getSetAttribute:div.className!=="t",enctype:!!document.createElement("form").enctype,html5Clone:document.createElement("nav").cloneNode(true).outerHTML!=="<:nav></:nav>",submitBubbles:true,changeBubbles:true,focusinBubbles:false,deleteExpando:true,noCloneEvent:true,inlineBlockNeedsLayout:false,shrinkWrapBlocks:false,reliableMarginRight:true,pixelMargin:true};jQuery.boxModel=support.boxModel=(document.compatMode==="CSS1Compat");input.checked=true;support.noCloneChecked=input.cloneNode(true).checked;select.disabled=true;support.optDisabled=!opt.disabled;try{delete div.test;}catch(e){support.deleteExpando=false;}
+if(!div.addEventListener&&div.attachEvent&&div.fireEvent){div.attachEvent("onclick",function(){support.noCloneEvent=false;});div.cloneNode(true).fireEvent("onclick");}
+input=document.createElement("input");input.value="t";input.setAttribute("type","radio");support.radioValue=input.value==="t";input.setAttribute("checked","checked");input.setAttribute("name","t");div.appendChild(input);fragment=document.createDocumentFragment();fragment.appendChild(div.lastChild);support.checkClone=fragment.cloneNode(true).cloneNode(true).lastChild.checked;support.appendChecked=input.checked;fragment.removeChild(input);fragment.appendChild(div);if(div.attachEvent){for(i in{submit:1,change:1,focusin:1}){eventName="on"+i;isSupported=(eventName in div);if(!isSupported){div.setAttribute(eventName,"return;");isSupported=(typeof div[eventName]==="function");}
+support[i+"Bubbles"]=isSupported;}}
+fragment.removeChild(div);fragment=select=opt=div=input=null;jQuery(function(){var container,outer,inner,table,td,offsetSupport,marginDiv,conMarginTop,style,html,positionTopLeftWidthHeight,paddingMarginBorderVisibility,paddingMarginBorder,body=document.getElementsByTagName("body")[0];if(!body){return;}
+conMarginTop=1;paddingMarginBorder="padding:0;margin:0;border:";positionTopLeftWidthHeight="position:absolute;top:0;left:0;width:1px;height:1px;";paddingMarginBorderVisibility=paddingMarginBorder+"0;visibility:hidden;";style="style='"+positionTopLeftWidthHeight+paddingMarginBorder+"5px solid #000;";html="<div "+style+"display:block;'><div style='"+paddingMarginBorder+"0;display:block;overflow:hidden;'></div></div>"+"<table "+style+"' cellpadding='0' cellspacing='0'>"+"<tr><td></td></tr></table>";container=document.createElement("div");container.style.cssText=paddingMarginBorderVisibility+"width:0;height:0;position:static;top:0;margin-top:"+conMarginTop+"px";body.insertBefore(container,body.firstChild);div=document.createElement("div");container.appendChild(div);div.innerHTML="<table><tr><td style='"+paddingMarginBorder+"0;display:none'></td><td>t</td></tr></table>";tds=div.getElementsByTagName("td");isSupported=(tds[0].offsetHeight===0);tds[0].style.display="";tds[1].style.display="none";support.reliableHiddenOffsets=isSupported&&(tds[0].offsetHeight===0);if(window.getComputedStyle){div.innerHTML="";marginDiv=document.createElement("div");marginDiv.style.width="0";marginDiv.style.marginRight="0";div.style.width="2px";div.appendChild(marginDiv);support.reliableMarginRight=(parseInt((window.getComputedStyle(marginDiv,null)||{marginRight:0}).marginRight,10)||0)===0;}
+if(typeof div.style.zoom!=="undefined"){div.innerHTML="";div.style.width=div.style.padding="1px";div.style.border=0;div.style.overflow="hidden";div.style.display="inline";div.style.zoom=1;support.inlineBlockNeedsLayout=(div.offsetWidth===3);div.style.display="block";div.style.overflow="visible";div.innerHTML="<div style='width:5px;'></div>";support.shrinkWrapBlocks=(div.offsetWidth!==3);}
+div.style.cssText=positionTopLeftWidthHeight+paddingMarginBorderVisibility;div.innerHTML=html;outer=div.firstChild;inner=outer.firstChild;td=outer.nextSibling.firstChild.firstChild;offsetSupport={doesNotAddBorder:(inner.offsetTop!==5),doesAddBorderForTableAndCells:(td.offsetTop===5)};inner.style.position="fixed";inner.style.top="20px";offsetSupport.fixedPosition=(inner.offsetTop===20||inner.offsetTop===15);inner.style.position=inner.style.top="";outer.style.overflow="hidden";outer.style.position="relative";offsetSupport.subtractsBorderForOverflowNotVisible=(inner.offsetTop===-5);offsetSupport.doesNotIncludeMarginInBodyOffset=(body.offsetTop!==conMarginTop);if(window.getComputedStyle){div.style.marginTop="1%";support.pixelMargin=(window.getComputedStyle(div,null)||{marginTop:0}).marginTop!=="1%";}
+if(typeof container.style.zoom!=="undefined"){container.style.zoom=1;}
+body.removeChild(container);marginDiv=div=container=null;jQuery.extend(support,offsetSupport);});return support;})();var rbrace=/^(?:\{.*\}|\[.*\])$/,rmultiDash=/([A-Z])/g;jQuery.extend({cache:{},uuid:0,expando:"jQuery"+(jQuery.fn.jquery+Math.random()).replace(/\D/g,""),noData:{"embed":true,"object":"clsid:D27CDB6E-AE6D-11cf-96B8-444553540000","applet":true},hasData:function(elem){elem=elem.nodeType?jQuery.cache[elem[jQuery.expando]]:elem[jQuery.expando];return!!elem&&!isEmptyDataObject(elem);},data:function(elem,name,data,pvt){if(!jQuery.acceptData(elem)){return;}
+var privateCache,thisCache,ret,internalKey=jQuery.expando,getByName=typeof name==="string",isNode=elem.nodeType,cache=isNode?jQuery.cache:elem,id=isNode?elem[internalKey]:elem[internalKey]&&internalKey,isEvents=name==="events";if((!id||!cache[id]||(!isEvents&&!pvt&&!cache[id].data))&&getByName&&data===undefined){return;}
+if(!id){if(isNode){elem[internalKey]=id=++jQuery.uuid;}else{id=internalKey;}}
+if(!cache[id]){cache[id]={};if(!isNode){cache[id].toJSON=jQuery.noop;}}
+if(typeof name==="object"||typeof name==="function"){if(pvt){cache[id]=jQuery.extend(cache[id],name);}else{cache[id].data=jQuery.extend(cache[id].data,name);}}
+privateCache=thisCache=cache[id];if(!pvt){if(!thisCache.data){thisCache.data={};}
+thisCache=thisCache.data;}
+if(data!==undefined){thisCache[jQuery.camelCase(name)]=data;}
+if(isEvents&&!thisCache[name]){return privateCache.events;}
+if(getByName){ret=thisCache[name];if(ret==null){ret=thisCache[jQuery.camelCase(name)];}}else{ret=thisCache;}
+return ret;},removeData:function(elem,name,pvt){if(!jQuery.acceptData(elem)){return;}
+var thisCache,i,l,internalKey=jQuery.expando,isNode=elem.nodeType,cache=isNode?jQuery.cache:elem,id=isNode?elem[internalKey]:internalKey;if(!cache[id]){return;}
+if(name){thisCache=pvt?cache[id]:cache[id].data;if(thisCache){if(!jQuery.isArray(name)){if(name in thisCache){name=[name];}else{name=jQuery.camelCase(name);if(name in thisCache){name=[name];}else{name=name.split(" ");}}}
+for(i=0,l=name.length;i<l;i++){delete thisCache[name[i]];}
+if(!(pvt?isEmptyDataObject:jQuery.isEmptyObject)(thisCache)){return;}}}
+if(!pvt){delete cache[id].data;if(!isEmptyDataObject(cache[id])){return;}}
+if(jQuery.support.deleteExpando||!cache.setInterval){delete cache[id];}else{cache[id]=null;}
+if(isNode){if(jQuery.support.deleteExpando){delete elem[internalKey];}else if(elem.removeAttribute){elem.removeAttribute(internalKey);}else{elem[internalKey]=null;}}},_data:function(elem,name,data){return jQuery.data(elem,name,data,true);},acceptData:function(elem){if(elem.nodeName){var match=jQuery.noData[elem.nodeName.toLowerCase()];if(match){return!(match===true||elem.getAttribute("classid")!==match);}}
+return true;}});jQuery.fn.extend({data:function(key,value){var parts,part,attr,name,l,elem=this[0],i=0,data=null;if(key===undefined){if(this.length){data=jQuery.data(elem);if(elem.nodeType===1&&!jQuery._data(elem,"parsedAttrs")){attr=elem.attributes;for(l=attr.length;i<l;i++){name=attr[i].name;if(name.indexOf("data-")===0){name=jQuery.camelCase(name.substring(5));dataAttr(elem,name,data[name]);}}
+jQuery._data(elem,"parsedAttrs",true);}}
+return data;}
+if(typeof key==="object"){return this.each(function(){jQuery.data(this,key);});}
+parts=key.split(".",2);parts[1]=parts[1]?"."+parts[1]:"";part=parts[1]+"!";return jQuery.access(this,function(value){if(value===undefined){data=this.triggerHandler("getData"+part,[parts[0]]);if(data===undefined&&elem){data=jQuery.data(elem,key);data=dataAttr(elem,key,data);}
+return data===undefined&&parts[1]?this.data(parts[0]):data;}
+parts[1]=value;this.each(function(){var self=jQuery(this);self.triggerHandler("setData"+part,parts);jQuery.data(this,key,value);self.triggerHandler("changeData"+part,parts);});},null,value,arguments.length>1,null,false);},removeData:function(key){return this.each(function(){jQuery.removeData(this,key);});}});function dataAttr(elem,key,data){if(data===undefined&&elem.nodeType===1){var name="data-"+key.replace(rmultiDash,"-$1").toLowerCase();data=elem.getAttribute(name);if(typeof data==="string"){try{data=data==="true"?true:data==="false"?false:data==="null"?null:jQuery.isNumeric(data)?+data:rbrace.test(data)?jQuery.parseJSON(data):data;}catch(e){}
+jQuery.data(elem,key,data);}else{data=undefined;}}
+return data;}
+function isEmptyDataObject(obj){for(var name in obj){if(name==="data"&&jQuery.isEmptyObject(obj[name])){continue;}
+if(name!=="toJSON"){return false;}}
+return true;}
+function handleQueueMarkDefer(elem,type,src){var deferDataKey=type+"defer",queueDataKey=type+"queue",markDataKey=type+"mark",defer=jQuery._data(elem,deferDataKey);if(defer&&(src==="queue"||!jQuery._data(elem,queueDataKey))&&(src==="mark"||!jQuery._data(elem,markDataKey))){setTimeout(function(){if(!jQuery._data(elem,queueDataKey)&&!jQuery._data(elem,markDataKey)){jQuery.removeData(elem,deferDataKey,true);defer.fire();}},0);}}
+jQuery.extend({_mark:function(elem,type){if(elem){type=(type||"fx")+"mark";jQuery._data(elem,type,(jQuery._data(elem,type)||0)+1);}},_unmark:function(force,elem,type){if(force!==true){type=elem;elem=force;force=false;}
+if(elem){type=type||"fx";var key=type+"mark",count=force?0:((jQuery._data(elem,key)||1)-1);if(count){jQuery._data(elem,key,count);}else{jQuery.removeData(elem,key,true);handleQueueMarkDefer(elem,type,"mark");}}},queue:function(elem,type,data){var q;if(elem){type=(type||"fx")+"queue";q=jQuery._data(elem,type);if(data){if(!q||jQuery.isArray(data)){q=jQuery._data(elem,type,jQuery.makeArray(data));}else{q.push(data);}}
+return q||[];}},dequeue:function(elem,type){type=type||"fx";var queue=jQuery.queue(elem,type),fn=queue.shift(),hooks={};if(fn==="inprogress"){fn=queue.shift();}
+if(fn){if(type==="fx"){queue.unshift("inprogress");}
+jQuery._data(elem,type+".run",hooks);fn.call(elem,function(){jQuery.dequeue(elem,type);},hooks);}
+if(!queue.length){jQuery.removeData(elem,type+"queue "+type+".run",true);handleQueueMarkDefer(elem,type,"queue");}}});jQuery.fn.extend({queue:function(type,data){var setter=2;if(typeof type!=="string"){data=type;type="fx";setter--;}
+if(arguments.length<setter){return jQuery.queue(this[0],type);}
+return data===undefined?this:this.each(function(){var queue=jQuery.queue(this,type,data);if(type==="fx"&&queue[0]!=="inprogress"){jQuery.dequeue(this,type);}});},dequeue:function(type){return this.each(function(){jQuery.dequeue(this,type);});},delay:function(time,type){time=jQuery.fx?jQuery.fx.speeds[time]||time:time;type=type||"fx";return this.queue(type,function(next,hooks){var timeout=setTimeout(next,time);hooks.stop=function(){clearTimeout(timeout);};});},clearQueue:function(type){return this.queue(type||"fx",[]);},promise:function(type,object){if(typeof type!=="string"){object=type;type=undefined;}
+type=type||"fx";var defer=jQuery.Deferred(),elements=this,i=elements.length,count=1,deferDataKey=type+"defer",queueDataKey=type+"queue",markDataKey=type+"mark",tmp;function resolve(){if(!(--count)){defer.resolveWith(elements,[elements]);}}
+while(i--){if((tmp=jQuery.data(elements[i],deferDataKey,undefined,true)||(jQuery.data(elements[i],queueDataKey,undefined,true)||jQuery.data(elements[i],markDataKey,undefined,true))&&jQuery.data(elements[i],deferDataKey,jQuery.Callbacks("once memory"),true))){count++;tmp.add(resolve);}}
+resolve();return defer.promise(object);}});var rclass=/[\n\t\r]/g,rspace=/\s+/,rreturn=/\r/g,rtype=/^(?:button|input)$/i,rfocusable=/^(?:button|input|object|select|textarea)$/i,rclickable=/^a(?:rea)?$/i,rboolean=/^(?:autofocus|autoplay|async|checked|controls|defer|disabled|hidden|loop|multiple|open|readonly|required|scoped|selected)$/i,getSetAttribute=jQuery.support.getSetAttribute,nodeHook,boolHook,fixSpecified;jQuery.fn.extend({attr:function(name,value){return jQuery.access(this,jQuery.attr,name,value,arguments.length>1);},removeAttr:function(name){return this.each(function(){jQuery.removeAttr(this,name);});},prop:function(name,value){return jQuery.access(this,jQuery.prop,name,value,arguments.length>1);},removeProp:function(name){name=jQuery.propFix[name]||name;return this.each(function(){try{this[name]=undefined;delete this[name];}catch(e){}});},addClass:function(value){var classNames,i,l,elem,setClass,c,cl;if(jQuery.isFunction(value)){return this.each(function(j){jQuery(this).addClass(value.call(this,j,this.className));});}
+if(value&&typeof value==="string"){classNames=value.split(rspace);for(i=0,l=this.length;i<l;i++){elem=this[i];if(elem.nodeType===1){if(!elem.className&&classNames.length===1){elem.className=value;}else{setClass=" "+elem.className+" ";for(c=0,cl=classNames.length;c<cl;c++){if(!~setClass.indexOf(" "+classNames[c]+" ")){setClass+=classNames[c]+" ";}}
+elem.className=jQuery.trim(setClass);}}}}
+return this;},removeClass:function(value){var classNames,i,l,elem,className,c,cl;if(jQuery.isFunction(value)){return this.each(function(j){jQuery(this).removeClass(value.call(this,j,this.className));});}
+if((value&&typeof value==="string")||value===undefined){classNames=(value||"").split(rspace);for(i=0,l=this.length;i<l;i++){elem=this[i];if(elem.nodeType===1&&elem.className){if(value){className=(" "+elem.className+" ").replace(rclass," ");for(c=0,cl=classNames.length;c<cl;c++){className=className.replace(" "+classNames[c]+" "," ");}
+elem.className=jQuery.trim(className);}else{elem.className="";}}}}
+return this;},toggleClass:function(value,stateVal){var type=typeof value,isBool=typeof stateVal==="boolean";if(jQuery.isFunction(value)){return this.each(function(i){jQuery(this).toggleClass(value.call(this,i,this.className,stateVal),stateVal);});}
+return this.each(function(){if(type==="string"){var className,i=0,self=jQuery(this),state=stateVal,classNames=value.split(rspace);while((className=classNames[i++])){state=isBool?state:!self.hasClass(className);self[state?"addClass":"removeClass"](className);}}else if(type==="undefined"||type==="boolean"){if(this.className){jQuery._data(this,"__className__",this.className);}
+this.className=this.className||value===false?"":jQuery._data(this,"__className__")||"";}});},hasClass:function(selector){var className=" "+selector+" ",i=0,l=this.length;for(;i<l;i++){if(this[i].nodeType===1&&(" "+this[i].className+" ").replace(rclass," ").indexOf(className)>-1){return true;}}
+return false;},val:function(value){var hooks,ret,isFunction,elem=this[0];if(!arguments.length){if(elem){hooks=jQuery.valHooks[elem.type]||jQuery.valHooks[elem.nodeName.toLowerCase()];if(hooks&&"get"in hooks&&(ret=hooks.get(elem,"value"))!==undefined){return ret;}
+ret=elem.value;return typeof ret==="string"?ret.replace(rreturn,""):ret==null?"":ret;}
+return;}
+isFunction=jQuery.isFunction(value);return this.each(function(i){var self=jQuery(this),val;if(this.nodeType!==1){return;}
+if(isFunction){val=value.call(this,i,self.val());}else{val=value;}
+if(val==null){val="";}else if(typeof val==="number"){val+="";}else if(jQuery.isArray(val)){val=jQuery.map(val,function(value){return value==null?"":value+"";});}
+hooks=jQuery.valHooks[this.type]||jQuery.valHooks[this.nodeName.toLowerCase()];if(!hooks||!("set"in hooks)||hooks.set(this,val,"value")===undefined){this.value=val;}});}});jQuery.extend({valHooks:{option:{get:function(elem){var val=elem.attributes.value;return!val||val.specified?elem.value:elem.text;}},select:{get:function(elem){var value,i,max,option,index=elem.selectedIndex,values=[],options=elem.options,one=elem.type==="select-one";if(index<0){return null;}
+i=one?index:0;max=one?index+1:options.length;for(;i<max;i++){option=options[i];if(option.selected&&(jQuery.support.optDisabled?!option.disabled:option.getAttribute("disabled")===null)&&(!option.parentNode.disabled||!jQuery.nodeName(option.parentNode,"optgroup"))){value=jQuery(option).val();if(one){return value;}
+values.push(value);}}
+if(one&&!values.length&&options.length){return jQuery(options[index]).val();}
+return values;},set:function(elem,value){var values=jQuery.makeArray(value);jQuery(elem).find("option").each(function(){this.selected=jQuery.inArray(jQuery(this).val(),values)>=0;});if(!values.length){elem.selectedIndex=-1;}
+return values;}}},attrFn:{val:true,css:true,html:true,text:true,data:true,width:true,height:true,offset:true},attr:function(elem,name,value,pass){var ret,hooks,notxml,nType=elem.nodeType;if(!elem||nType===3||nType===8||nType===2){return;}
+if(pass&&name in jQuery.attrFn){return jQuery(elem)[name](value);}
+if(typeof elem.getAttribute==="undefined"){return jQuery.prop(elem,name,value);}
+notxml=nType!==1||!jQuery.isXMLDoc(elem);if(notxml){name=name.toLowerCase();hooks=jQuery.attrHooks[name]||(rboolean.test(name)?boolHook:nodeHook);}
+if(value!==undefined){if(value===null){jQuery.removeAttr(elem,name);return;}else if(hooks&&"set"in hooks&&notxml&&(ret=hooks.set(elem,value,name))!==undefined){return ret;}else{elem.setAttribute(name,""+value);return value;}}else if(hooks&&"get"in hooks&&notxml&&(ret=hooks.get(elem,name))!==null){return ret;}else{ret=elem.getAttribute(name);return ret===null?undefined:ret;}},removeAttr:function(elem,value){var propName,attrNames,name,l,isBool,i=0;if(value&&elem.nodeType===1){attrNames=value.toLowerCase().split(rspace);l=attrNames.length;for(;i<l;i++){name=attrNames[i];if(name){propName=jQuery.propFix[name]||name;isBool=rboolean.test(name);if(!isBool){jQuery.attr(elem,name,"");}
+elem.removeAttribute(getSetAttribute?name:propName);if(isBool&&propName in elem){elem[propName]=false;}}}}},attrHooks:{type:{set:function(elem,value){if(rtype.test(elem.nodeName)&&elem.parentNode){jQuery.error("type property can't be changed");}else if(!jQuery.support.radioValue&&value==="radio"&&jQuery.nodeName(elem,"input")){var val=elem.value;elem.setAttribute("type",value);if(val){elem.value=val;}
+return value;}}},value:{get:function(elem,name){if(nodeHook&&jQuery.nodeName(elem,"button")){return nodeHook.get(elem,name);}
+return name in elem?elem.value:null;},set:function(elem,value,name){if(nodeHook&&jQuery.nodeName(elem,"button")){return nodeHook.set(elem,value,name);}
+elem.value=value;}}},propFix:{tabindex:"tabIndex",readonly:"readOnly","for":"htmlFor","class":"className",maxlength:"maxLength",cellspacing:"cellSpacing",cellpadding:"cellPadding",rowspan:"rowSpan",colspan:"colSpan",usemap:"useMap",frameborder:"frameBorder",contenteditable:"contentEditable"},prop:function(elem,name,value){var ret,hooks,notxml,nType=elem.nodeType;if(!elem||nType===3||nType===8||nType===2){return;}
+notxml=nType!==1||!jQuery.isXMLDoc(elem);if(notxml){name=jQuery.propFix[name]||name;hooks=jQuery.propHooks[name];}
+if(value!==undefined){if(hooks&&"set"in hooks&&(ret=hooks.set(elem,value,name))!==undefined){return ret;}else{return(elem[name]=value);}}else{if(hooks&&"get"in hooks&&(ret=hooks.get(elem,name))!==null){return ret;}else{return elem[name];}}},propHooks:{tabIndex:{get:function(elem){var attributeNode=elem.getAttributeNode("tabindex");return attributeNode&&attributeNode.specified?parseInt(attributeNode.value,10):rfocusable.test(elem.nodeName)||rclickable.test(elem.nodeName)&&elem.href?0:undefined;}}}});jQuery.attrHooks.tabindex=jQuery.propHooks.tabIndex;boolHook={get:function(elem,name){var attrNode,property=jQuery.prop(elem,name);return property===true||typeof property!=="boolean"&&(attrNode=elem.getAttributeNode(name))&&attrNode.nodeValue!==false?name.toLowerCase():undefined;},set:function(elem,value,name){var propName;if(value===false){jQuery.removeAttr(elem,name);}else{propName=jQuery.propFix[name]||name;if(propName in elem){elem[propName]=true;}
+elem.setAttribute(name,name.toLowerCase());}
+return name;}};if(!getSetAttribute){fixSpecified={name:true,id:true,coords:true};nodeHook=jQuery.valHooks.button={get:function(elem,name){var ret;ret=elem.getAttributeNode(name);return ret&&(fixSpecified[name]?ret.nodeValue!=="":ret.specified)?ret.nodeValue:undefined;},set:function(elem,value,name){var ret=elem.getAttributeNode(name);if(!ret){ret=document.createAttribute(name);elem.setAttributeNode(ret);}
+return(ret.nodeValue=value+"");}};jQuery.attrHooks.tabindex.set=nodeHook.set;jQuery.each(["width","height"],function(i,name){jQuery.attrHooks[name]=jQuery.extend(jQuery.attrHooks[name],{set:function(elem,value){if(value===""){elem.setAttribute(name,"auto");return value;}}});});jQuery.attrHooks.contenteditable={get:nodeHook.get,set:function(elem,value,name){if(value===""){value="false";}
+nodeHook.set(elem,value,name);}};}
+if(!jQuery.support.hrefNormalized){jQuery.each(["href","src","width","height"],function(i,name){jQuery.attrHooks[name]=jQuery.extend(jQuery.attrHooks[name],{get:function(elem){var ret=elem.getAttribute(name,2);return ret===null?undefined:ret;}});});}
+if(!jQuery.support.style){jQuery.attrHooks.style={get:function(elem){return elem.style.cssText.toLowerCase()||undefined;},set:function(elem,value){return(elem.style.cssText=""+value);}};}
+if(!jQuery.support.optSelected){jQuery.propHooks.selected=jQuery.extend(jQuery.propHooks.selected,{get:function(elem){var parent=elem.parentNode;if(parent){parent.selectedIndex;if(parent.parentNode){parent.parentNode.selectedIndex;}}
+return null;}});}
+if(!jQuery.support.enctype){jQuery.propFix.enctype="encoding";}
+if(!jQuery.support.checkOn){jQuery.each(["radio","checkbox"],function(){jQuery.valHooks[this]={get:function(elem){return elem.getAttribute("value")===null?"on":elem.value;}};});}
+jQuery.each(["radio","checkbox"],function(){jQuery.valHooks[this]=jQuery.extend(jQuery.valHooks[this],{set:function(elem,value){if(jQuery.isArray(value)){return(elem.checked=jQuery.inArray(jQuery(elem).val(),value)>=0);}}});});var rformElems=/^(?:textarea|input|select)$/i,rtypenamespace=/^([^\.]*)?(?:\.(.+))?$/,rhoverHack=/(?:^|\s)hover(\.\S+)?\b/,rkeyEvent=/^key/,rmouseEvent=/^(?:mouse|contextmenu)|click/,rfocusMorph=/^(?:focusinfocus|focusoutblur)$/,rquickIs=/^(\w*)(?:#([\w\-]+))?(?:\.([\w\-]+))?$/,quickParse=function(selector){var quick=rquickIs.exec(selector);if(quick){quick[1]=(quick[1]||"").toLowerCase();quick[3]=quick[3]&&new RegExp("(?:^|\\s)"+quick[3]+"(?:\\s|$)");}
+return quick;},quickIs=function(elem,m){var attrs=elem.attributes||{};return((!m[1]||elem.nodeName.toLowerCase()===m[1])&&(!m[2]||(attrs.id||{}).value===m[2])&&(!m[3]||m[3].test((attrs["class"]||{}).value)));},hoverHack=function(events){return jQuery.event.special.hover?events:events.replace(rhoverHack,"mouseenter$1 mouseleave$1");};jQuery.event={add:function(elem,types,handler,data,selector){var elemData,eventHandle,events,t,tns,type,namespaces,handleObj,handleObjIn,quick,handlers,special;if(elem.nodeType===3||elem.nodeType===8||!types||!handler||!(elemData=jQuery._data(elem))){return;}
+if(handler.handler){handleObjIn=handler;handler=handleObjIn.handler;selector=handleObjIn.selector;}
+if(!handler.guid){handler.guid=jQuery.guid++;}
+events=elemData.events;if(!events){elemData.events=events={};}
+eventHandle=elemData.handle;if(!eventHandle){elemData.handle=eventHandle=function(e){return typeof jQuery!=="undefined"&&(!e||jQuery.event.triggered!==e.type)?jQuery.event.dispatch.apply(eventHandle.elem,arguments):undefined;};eventHandle.elem=elem;}
+types=jQuery.trim(hoverHack(types)).split(" ");for(t=0;t<types.length;t++){tns=rtypenamespace.exec(types[t])||[];type=tns[1];namespaces=(tns[2]||"").split(".").sort();special=jQuery.event.special[type]||{};type=(selector?special.delegateType:special.bindType)||type;special=jQuery.event.special[type]||{};handleObj=jQuery.extend({type:type,origType:tns[1],data:data,handler:handler,guid:handler.guid,selector:selector,quick:selector&&quickParse(selector),namespace:namespaces.join(".")},handleObjIn);handlers=events[type];if(!handlers){handlers=events[type]=[];handlers.delegateCount=0;if(!special.setup||special.setup.call(elem,data,namespaces,eventHandle)===false){if(elem.addEventListener){elem.addEventListener(type,eventHandle,false);}else if(elem.attachEvent){elem.attachEvent("on"+type,eventHandle);}}}
+if(special.add){special.add.call(elem,handleObj);if(!handleObj.handler.guid){handleObj.handler.guid=handler.guid;}}
+if(selector){handlers.splice(handlers.delegateCount++,0,handleObj);}else{handlers.push(handleObj);}
+jQuery.event.global[type]=true;}
+elem=null;},global:{},remove:function(elem,types,handler,selector,mappedTypes){var elemData=jQuery.hasData(elem)&&jQuery._data(elem),t,tns,type,origType,namespaces,origCount,j,events,special,handle,eventType,handleObj;if(!elemData||!(events=elemData.events)){return;}
+types=jQuery.trim(hoverHack(types||"")).split(" ");for(t=0;t<types.length;t++){tns=rtypenamespace.exec(types[t])||[];type=origType=tns[1];namespaces=tns[2];if(!type){for(type in events){jQuery.event.remove(elem,type+types[t],handler,selector,true);}
+continue;}
+special=jQuery.event.special[type]||{};type=(selector?special.delegateType:special.bindType)||type;eventType=events[type]||[];origCount=eventType.length;namespaces=namespaces?new RegExp("(^|\\.)"+namespaces.split(".").sort().join("\\.(?:.*\\.)?")+"(\\.|$)"):null;for(j=0;j<eventType.length;j++){handleObj=eventType[j];if((mappedTypes||origType===handleObj.origType)&&(!handler||handler.guid===handleObj.guid)&&(!namespaces||namespaces.test(handleObj.namespace))&&(!selector||selector===handleObj.selector||selector==="**"&&handleObj.selector)){eventType.splice(j--,1);if(handleObj.selector){eventType.delegateCount--;}
+if(special.remove){special.remove.call(elem,handleObj);}}}
+if(eventType.length===0&&origCount!==eventType.length){if(!special.teardown||special.teardown.call(elem,namespaces)===false){jQuery.removeEvent(elem,type,elemData.handle);}
+delete events[type];}}
+if(jQuery.isEmptyObject(events)){handle=elemData.handle;if(handle){handle.elem=null;}
+jQuery.removeData(elem,["events","handle"],true);}},customEvent:{"getData":true,"setData":true,"changeData":true},trigger:function(event,data,elem,onlyHandlers){if(elem&&(elem.nodeType===3||elem.nodeType===8)){return;}
+var type=event.type||event,namespaces=[],cache,exclusive,i,cur,old,ontype,special,handle,eventPath,bubbleType;if(rfocusMorph.test(type+jQuery.event.triggered)){return;}
+if(type.indexOf("!")>=0){type=type.slice(0,-1);exclusive=true;}
+if(type.indexOf(".")>=0){namespaces=type.split(".");type=namespaces.shift();namespaces.sort();}
+if((!elem||jQuery.event.customEvent[type])&&!jQuery.event.global[type]){return;}
+event=typeof event==="object"?event[jQuery.expando]?event:new jQuery.Event(type,event):new jQuery.Event(type);event.type=type;event.isTrigger=true;event.exclusive=exclusive;event.namespace=namespaces.join(".");event.namespace_re=event.namespace?new RegExp("(^|\\.)"+namespaces.join("\\.(?:.*\\.)?")+"(\\.|$)"):null;ontype=type.indexOf(":")<0?"on"+type:"";if(!elem){cache=jQuery.cache;for(i in cache){if(cache[i].events&&cache[i].events[type]){jQuery.event.trigger(event,data,cache[i].handle.elem,true);}}
+return;}
+event.result=undefined;if(!event.target){event.target=elem;}
+data=data!=null?jQuery.makeArray(data):[];data.unshift(event);special=jQuery.event.special[type]||{};if(special.trigger&&special.trigger.apply(elem,data)===false){return;}
+eventPath=[[elem,special.bindType||type]];if(!onlyHandlers&&!special.noBubble&&!jQuery.isWindow(elem)){bubbleType=special.delegateType||type;cur=rfocusMorph.test(bubbleType+type)?elem:elem.parentNode;old=null;for(;cur;cur=cur.parentNode){eventPath.push([cur,bubbleType]);old=cur;}
+if(old&&old===elem.ownerDocument){eventPath.push([old.defaultView||old.parentWindow||window,bubbleType]);}}
+for(i=0;i<eventPath.length&&!event.isPropagationStopped();i++){cur=eventPath[i][0];event.type=eventPath[i][1];handle=(jQuery._data(cur,"events")||{})[event.type]&&jQuery._data(cur,"handle");if(handle){handle.apply(cur,data);}
+handle=ontype&&cur[ontype];if(handle&&jQuery.acceptData(cur)&&handle.apply(cur,data)===false){event.preventDefault();}}
+event.type=type;if(!onlyHandlers&&!event.isDefaultPrevented()){if((!special._default||special._default.apply(elem.ownerDocument,data)===false)&&!(type==="click"&&jQuery.nodeName(elem,"a"))&&jQuery.acceptData(elem)){if(ontype&&elem[type]&&((type!=="focus"&&type!=="blur")||event.target.offsetWidth!==0)&&!jQuery.isWindow(elem)){old=elem[ontype];if(old){elem[ontype]=null;}
+jQuery.event.triggered=type;elem[type]();jQuery.event.triggered=undefined;if(old){elem[ontype]=old;}}}}
+return event.result;},dispatch:function(event){event=jQuery.event.fix(event||window.event);var handlers=((jQuery._data(this,"events")||{})[event.type]||[]),delegateCount=handlers.delegateCount,args=[].slice.call(arguments,0),run_all=!event.exclusive&&!event.namespace,special=jQuery.event.special[event.type]||{},handlerQueue=[],i,j,cur,jqcur,ret,selMatch,matched,matches,handleObj,sel,related;args[0]=event;event.delegateTarget=this;if(special.preDispatch&&special.preDispatch.call(this,event)===false){return;}
+if(delegateCount&&!(event.button&&event.type==="click")){jqcur=jQuery(this);jqcur.context=this.ownerDocument||this;for(cur=event.target;cur!=this;cur=cur.parentNode||this){if(cur.disabled!==true){selMatch={};matches=[];jqcur[0]=cur;for(i=0;i<delegateCount;i++){handleObj=handlers[i];sel=handleObj.selector;if(selMatch[sel]===undefined){selMatch[sel]=(handleObj.quick?quickIs(cur,handleObj.quick):jqcur.is(sel));}
+if(selMatch[sel]){matches.push(handleObj);}}
+if(matches.length){handlerQueue.push({elem:cur,matches:matches});}}}}
+if(handlers.length>delegateCount){handlerQueue.push({elem:this,matches:handlers.slice(delegateCount)});}
+for(i=0;i<handlerQueue.length&&!event.isPropagationStopped();i++){matched=handlerQueue[i];event.currentTarget=matched.elem;for(j=0;j<matched.matches.length&&!event.isImmediatePropagationStopped();j++){handleObj=matched.matches[j];if(run_all||(!event.namespace&&!handleObj.namespace)||event.namespace_re&&event.namespace_re.test(handleObj.namespace)){event.data=handleObj.data;event.handleObj=handleObj;ret=((jQuery.event.special[handleObj.origType]||{}).handle||handleObj.handler).apply(matched.elem,args);if(ret!==undefined){event.result=ret;if(ret===false){event.preventDefault();event.stopPropagation();}}}}}
+if(special.postDispatch){special.postDispatch.call(this,event);}
+return event.result;},props:"attrChange attrName relatedNode srcElement altKey bubbles cancelable ctrlKey currentTarget eventPhase metaKey relatedTarget shiftKey target timeStamp view which".split(" "),fixHooks:{},keyHooks:{props:"char charCode key keyCode".split(" "),filter:function(event,original){if(event.which==null){event.which=original.charCode!=null?original.charCode:original.keyCode;}
+return event;}},mouseHooks:{props:"button buttons clientX clientY fromElement offsetX offsetY pageX pageY screenX screenY toElement".split(" "),filter:function(event,original){var eventDoc,doc,body,button=original.button,fromElement=original.fromElement;if(event.pageX==null&&original.clientX!=null){eventDoc=event.target.ownerDocument||document;doc=eventDoc.documentElement;body=eventDoc.body;event.pageX=original.clientX+(doc&&doc.scrollLeft||body&&body.scrollLeft||0)-(doc&&doc.clientLeft||body&&body.clientLeft||0);event.pageY=original.clientY+(doc&&doc.scrollTop||body&&body.scrollTop||0)-(doc&&doc.clientTop||body&&body.clientTop||0);}
+if(!event.relatedTarget&&fromElement){event.relatedTarget=fromElement===event.target?original.toElement:fromElement;}
+if(!event.which&&button!==undefined){event.which=(button&1?1:(button&2?3:(button&4?2:0)));}
+return event;}},fix:function(event){if(event[jQuery.expando]){return event;}
+var i,prop,originalEvent=event,fixHook=jQuery.event.fixHooks[event.type]||{},copy=fixHook.props?this.props.concat(fixHook.props):this.props;event=jQuery.Event(originalEvent);for(i=copy.length;i;){prop=copy[--i];event[prop]=originalEvent[prop];}
+if(!event.target){event.target=originalEvent.srcElement||document;}
+if(event.target.nodeType===3){event.target=event.target.parentNode;}
+if(event.metaKey===undefined){event.metaKey=event.ctrlKey;}
+return fixHook.filter?fixHook.filter(event,originalEvent):event;},special:{ready:{setup:jQuery.bindReady},load:{noBubble:true},focus:{delegateType:"focusin"},blur:{delegateType:"focusout"},beforeunload:{setup:function(data,namespaces,eventHandle){if(jQuery.isWindow(this)){this.onbeforeunload=eventHandle;}},teardown:function(namespaces,eventHandle){if(this.onbeforeunload===eventHandle){this.onbeforeunload=null;}}}},simulate:function(type,elem,event,bubble){var e=jQuery.extend(new jQuery.Event(),event,{type:type,isSimulated:true,originalEvent:{}});if(bubble){jQuery.event.trigger(e,null,elem);}else{jQuery.event.dispatch.call(elem,e);}
+if(e.isDefaultPrevented()){event.preventDefault();}}};jQuery.event.handle=jQuery.event.dispatch;jQuery.removeEvent=document.removeEventListener?function(elem,type,handle){if(elem.removeEventListener){elem.removeEventListener(type,handle,false);}}:function(elem,type,handle){if(elem.detachEvent){elem.detachEvent("on"+type,handle);}};jQuery.Event=function(src,props){if(!(this instanceof jQuery.Event)){return new jQuery.Event(src,props);}
+if(src&&src.type){this.originalEvent=src;this.type=src.type;this.isDefaultPrevented=(src.defaultPrevented||src.returnValue===false||src.getPreventDefault&&src.getPreventDefault())?returnTrue:returnFalse;}else{this.type=src;}
+if(props){jQuery.extend(this,props);}
+this.timeStamp=src&&src.timeStamp||jQuery.now();this[jQuery.expando]=true;};function returnFalse(){return false;}
+function returnTrue(){return true;}
+jQuery.Event.prototype={preventDefault:function(){this.isDefaultPrevented=returnTrue;var e=this.originalEvent;if(!e){return;}
+if(e.preventDefault){e.preventDefault();}else{e.returnValue=false;}},stopPropagation:function(){this.isPropagationStopped=returnTrue;var e=this.originalEvent;if(!e){return;}
+if(e.stopPropagation){e.stopPropagation();}
+e.cancelBubble=true;},stopImmediatePropagation:function(){this.isImmediatePropagationStopped=returnTrue;this.stopPropagation();},isDefaultPrevented:returnFalse,isPropagationStopped:returnFalse,isImmediatePropagationStopped:returnFalse};jQuery.each({mouseenter:"mouseover",mouseleave:"mouseout"},function(orig,fix){jQuery.event.special[orig]={delegateType:fix,bindType:fix,handle:function(event){var target=this,related=event.relatedTarget,handleObj=event.handleObj,selector=handleObj.selector,ret;if(!related||(related!==target&&!jQuery.contains(target,related))){event.type=handleObj.origType;ret=handleObj.handler.apply(this,arguments);event.type=fix;}
+return ret;}};});if(!jQuery.support.submitBubbles){jQuery.event.special.submit={setup:function(){if(jQuery.nodeName(this,"form")){return false;}
+jQuery.event.add(this,"click._submit keypress._submit",function(e){var elem=e.target,form=jQuery.nodeName(elem,"input")||jQuery.nodeName(elem,"button")?elem.form:undefined;if(form&&!form._submit_attached){jQuery.event.add(form,"submit._submit",function(event){event._submit_bubble=true;});form._submit_attached=true;}});},postDispatch:function(event){if(event._submit_bubble){delete event._submit_bubble;if(this.parentNode&&!event.isTrigger){jQuery.event.simulate("submit",this.parentNode,event,true);}}},teardown:function(){if(jQuery.nodeName(this,"form")){return false;}
+jQuery.event.remove(this,"._submit");}};}
+if(!jQuery.support.changeBubbles){jQuery.event.special.change={setup:function(){if(rformElems.test(this.nodeName)){if(this.type==="checkbox"||this.type==="radio"){jQuery.event.add(this,"propertychange._change",function(event){if(event.originalEvent.propertyName==="checked"){this._just_changed=true;}});jQuery.event.add(this,"click._change",function(event){if(this._just_changed&&!event.isTrigger){this._just_changed=false;jQuery.event.simulate("change",this,event,true);}});}
+return false;}
+jQuery.event.add(this,"beforeactivate._change",function(e){var elem=e.target;if(rformElems.test(elem.nodeName)&&!elem._change_attached){jQuery.event.add(elem,"change._change",function(event){if(this.parentNode&&!event.isSimulated&&!event.isTrigger){jQuery.event.simulate("change",this.parentNode,event,true);}});elem._change_attached=true;}});},handle:function(event){var elem=event.target;if(this!==elem||event.isSimulated||event.isTrigger||(elem.type!=="radio"&&elem.type!=="checkbox")){return event.handleObj.handler.apply(this,arguments);}},teardown:function(){jQuery.event.remove(this,"._change");return rformElems.test(this.nodeName);}};}
+if(!jQuery.support.focusinBubbles){jQuery.each({focus:"focusin",blur:"focusout"},function(orig,fix){var attaches=0,handler=function(event){jQuery.event.simulate(fix,event.target,jQuery.event.fix(event),true);};jQuery.event.special[fix]={setup:function(){if(attaches++===0){document.addEventListener(orig,handler,true);}},teardown:function(){if(--attaches===0){document.removeEventListener(orig,handler,true);}}};});}
+jQuery.fn.extend({on:function(types,selector,data,fn,one){var origFn,type;if(typeof types==="object"){if(typeof selector!=="string"){data=data||selector;selector=undefined;}
+for(type in types){this.on(type,selector,data,types[type],one);}
+return this;}
+if(data==null&&fn==null){fn=selector;data=selector=undefined;}else if(fn==null){if(typeof selector==="string"){fn=data;data=undefined;}else{fn=data;data=selector;selector=undefined;}}
+if(fn===false){fn=returnFalse;}else if(!fn){return this;}
+if(one===1){origFn=fn;fn=function(event){jQuery().off(event);return origFn.apply(this,arguments);};fn.guid=origFn.guid||(origFn.guid=jQuery.guid++);}
+return this.each(function(){jQuery.event.add(this,types,fn,data,selector);});},one:function(types,selector,data,fn){return this.on(types,selector,data,fn,1);},off:function(types,selector,fn){if(types&&types.preventDefault&&types.handleObj){var handleObj=types.handleObj;jQuery(types.delegateTarget).off(handleObj.namespace?handleObj.origType+"."+handleObj.namespace:handleObj.origType,handleObj.selector,handleObj.handler);return this;}
+if(typeof types==="object"){for(var type in types){this.off(type,selector,types[type]);}
+return this;}
+if(selector===false||typeof selector==="function"){fn=selector;selector=undefined;}
+if(fn===false){fn=returnFalse;}
+return this.each(function(){jQuery.event.remove(this,types,fn,selector);});},bind:function(types,data,fn){return this.on(types,null,data,fn);},unbind:function(types,fn){return this.off(types,null,fn);},live:function(types,data,fn){jQuery(this.context).on(types,this.selector,data,fn);return this;},die:function(types,fn){jQuery(this.context).off(types,this.selector||"**",fn);return this;},delegate:function(selector,types,data,fn){return this.on(types,selector,data,fn);},undelegate:function(selector,types,fn){return arguments.length==1?this.off(selector,"**"):this.off(types,selector,fn);},trigger:function(type,data){return this.each(function(){jQuery.event.trigger(type,data,this);});},triggerHandler:function(type,data){if(this[0]){return jQuery.event.trigger(type,data,this[0],true);}},toggle:function(fn){var args=arguments,guid=fn.guid||jQuery.guid++,i=0,toggler=function(event){var lastToggle=(jQuery._data(this,"lastToggle"+fn.guid)||0)%i;jQuery._data(this,"lastToggle"+fn.guid,lastToggle+1);event.preventDefault();return args[lastToggle].apply(this,arguments)||false;};toggler.guid=guid;while(i<args.length){args[i++].guid=guid;}
+return this.click(toggler);},hover:function(fnOver,fnOut){return this.mouseenter(fnOver).mouseleave(fnOut||fnOver);}});jQuery.each(("blur focus focusin focusout load resize scroll unload click dblclick "+"mousedown mouseup mousemove mouseover mouseout mouseenter mouseleave "+"change select submit keydown keypress keyup error contextmenu").split(" "),function(i,name){jQuery.fn[name]=function(data,fn){if(fn==null){fn=data;data=null;}
+return arguments.length>0?this.on(name,null,data,fn):this.trigger(name);};if(jQuery.attrFn){jQuery.attrFn[name]=true;}
+if(rkeyEvent.test(name)){jQuery.event.fixHooks[name]=jQuery.event.keyHooks;}
+if(rmouseEvent.test(name)){jQuery.event.fixHooks[name]=jQuery.event.mouseHooks;}});(function(){var chunker=/((?:\((?:\([^()]+\)|[^()]+)+\)|\[(?:\[[^\[\]]*\]|['"][^'"]*['"]|[^\[\]'"]+)+\]|\\.|[^ >+~,(\[\\]+)+|[>+~])(\s*,\s*)?((?:.|\r|\n)*)/g,expando="sizcache"+(Math.random()+'').replace('.',''),done=0,toString=Object.prototype.toString,hasDuplicate=false,baseHasDuplicate=true,rBackslash=/\\/g,rReturn=/\r\n/g,rNonWord=/\W/;[0,0].sort(function(){baseHasDuplicate=false;return 0;});var Sizzle=function(selector,context,results,seed){results=results||[];context=context||document;var origContext=context;if(context.nodeType!==1&&context.nodeType!==9){return[];}
+if(!selector||typeof selector!=="string"){return results;}
+var m,set,checkSet,extra,ret,cur,pop,i,prune=true,contextXML=Sizzle.isXML(context),parts=[],soFar=selector;do{chunker.exec("");m=chunker.exec(soFar);if(m){soFar=m[3];parts.push(m[1]);if(m[2]){extra=m[3];break;}}}while(m);if(parts.length>1&&origPOS.exec(selector)){if(parts.length===2&&Expr.relative[parts[0]]){set=posProcess(parts[0]+parts[1],context,seed);}else{set=Expr.relative[parts[0]]?[context]:Sizzle(parts.shift(),context);while(parts.length){selector=parts.shift();if(Expr.relative[selector]){selector+=parts.shift();}
+set=posProcess(selector,set,seed);}}}else{if(!seed&&parts.length>1&&context.nodeType===9&&!contextXML&&Expr.match.ID.test(parts[0])&&!Expr.match.ID.test(parts[parts.length-1])){ret=Sizzle.find(parts.shift(),context,contextXML);context=ret.expr?Sizzle.filter(ret.expr,ret.set)[0]:ret.set[0];}
+if(context){ret=seed?{expr:parts.pop(),set:makeArray(seed)}:Sizzle.find(parts.pop(),parts.length===1&&(parts[0]==="~"||parts[0]==="+")&&context.parentNode?context.parentNode:context,contextXML);set=ret.expr?Sizzle.filter(ret.expr,ret.set):ret.set;if(parts.length>0){checkSet=makeArray(set);}else{prune=false;}
+while(parts.length){cur=parts.pop();pop=cur;if(!Expr.relative[cur]){cur="";}else{pop=parts.pop();}
+if(pop==null){pop=context;}
+Expr.relative[cur](checkSet,pop,contextXML);}}else{checkSet=parts=[];}}
+if(!checkSet){checkSet=set;}
+if(!checkSet){Sizzle.error(cur||selector);}
+if(toString.call(checkSet)==="[object Array]"){if(!prune){results.push.apply(results,checkSet);}else if(context&&context.nodeType===1){for(i=0;checkSet[i]!=null;i++){if(checkSet[i]&&(checkSet[i]===true||checkSet[i].nodeType===1&&Sizzle.contains(context,checkSet[i]))){results.push(set[i]);}}}else{for(i=0;checkSet[i]!=null;i++){if(checkSet[i]&&checkSet[i].nodeType===1){results.push(set[i]);}}}}else{makeArray(checkSet,results);}
+if(extra){Sizzle(extra,origContext,results,seed);Sizzle.uniqueSort(results);}
+return results;};Sizzle.uniqueSort=function(results){if(sortOrder){hasDuplicate=baseHasDuplicate;results.sort(sortOrder);if(hasDuplicate){for(var i=1;i<results.length;i++){if(results[i]===results[i-1]){results.splice(i--,1);}}}}
+return results;};Sizzle.matches=function(expr,set){return Sizzle(expr,null,null,set);};Sizzle.matchesSelector=function(node,expr){return Sizzle(expr,null,null,[node]).length>0;};Sizzle.find=function(expr,context,isXML){var set,i,len,match,type,left;if(!expr){return[];}
+for(i=0,len=Expr.order.length;i<len;i++){type=Expr.order[i];if((match=Expr.leftMatch[type].exec(expr))){left=match[1];match.splice(1,1);if(left.substr(left.length-1)!=="\\"){match[1]=(match[1]||"").replace(rBackslash,"");set=Expr.find[type](match,context,isXML);if(set!=null){expr=expr.replace(Expr.match[type],"");break;}}}}
+if(!set){set=typeof context.getElementsByTagName!=="undefined"?context.getElementsByTagName("*"):[];}
+return{set:set,expr:expr};};Sizzle.filter=function(expr,set,inplace,not){var match,anyFound,type,found,item,filter,left,i,pass,old=expr,result=[],curLoop=set,isXMLFilter=set&&set[0]&&Sizzle.isXML(set[0]);while(expr&&set.length){for(type in Expr.filter){if((match=Expr.leftMatch[type].exec(expr))!=null&&match[2]){filter=Expr.filter[type];left=match[1];anyFound=false;match.splice(1,1);if(left.substr(left.length-1)==="\\"){continue;}
+if(curLoop===result){result=[];}
+if(Expr.preFilter[type]){match=Expr.preFilter[type](match,curLoop,inplace,result,not,isXMLFilter);if(!match){anyFound=found=true;}else if(match===true){continue;}}
+if(match){for(i=0;(item=curLoop[i])!=null;i++){if(item){found=filter(item,match,i,curLoop);pass=not^found;if(inplace&&found!=null){if(pass){anyFound=true;}else{curLoop[i]=false;}}else if(pass){result.push(item);anyFound=true;}}}}
+if(found!==undefined){if(!inplace){curLoop=result;}
+expr=expr.replace(Expr.match[type],"");if(!anyFound){return[];}
+break;}}}
+if(expr===old){if(anyFound==null){Sizzle.error(expr);}else{break;}}
+old=expr;}
+return curLoop;};Sizzle.error=function(msg){throw new Error("Syntax error, unrecognized expression: "+msg);};var getText=Sizzle.getText=function(elem){var i,node,nodeType=elem.nodeType,ret="";if(nodeType){if(nodeType===1||nodeType===9||nodeType===11){if(typeof elem.textContent==='string'){return elem.textContent;}else if(typeof elem.innerText==='string'){return elem.innerText.replace(rReturn,'');}else{for(elem=elem.firstChild;elem;elem=elem.nextSibling){ret+=getText(elem);}}}else if(nodeType===3||nodeType===4){return elem.nodeValue;}}else{for(i=0;(node=elem[i]);i++){if(node.nodeType!==8){ret+=getText(node);}}}
+return ret;};var Expr=Sizzle.selectors={order:["ID","NAME","TAG"],match:{ID:/#((?:[\w\u00c0-\uFFFF\-]|\\.)+)/,CLASS:/\.((?:[\w\u00c0-\uFFFF\-]|\\.)+)/,NAME:/\[name=['"]*((?:[\w\u00c0-\uFFFF\-]|\\.)+)['"]*\]/,ATTR:/\[\s*((?:[\w\u00c0-\uFFFF\-]|\\.)+)\s*(?:(\S?=)\s*(?:(['"])(.*?)\3|(#?(?:[\w\u00c0-\uFFFF\-]|\\.)*)|)|)\s*\]/,TAG:/^((?:[\w\u00c0-\uFFFF\*\-]|\\.)+)/,CHILD:/:(only|nth|last|first)-child(?:\(\s*(even|odd|(?:[+\-]?\d+|(?:[+\-]?\d*)?n\s*(?:[+\-]\s*\d+)?))\s*\))?/,POS:/:(nth|eq|gt|lt|first|last|even|odd)(?:\((\d*)\))?(?=[^\-]|$)/,PSEUDO:/:((?:[\w\u00c0-\uFFFF\-]|\\.)+)(?:\((['"]?)((?:\([^\)]+\)|[^\(\)]*)+)\2\))?/},leftMatch:{},attrMap:{"class":"className","for":"htmlFor"},attrHandle:{href:function(elem){return elem.getAttribute("href");},type:function(elem){return elem.getAttribute("type");}},relative:{"+":function(checkSet,part){var isPartStr=typeof part==="string",isTag=isPartStr&&!rNonWord.test(part),isPartStrNotTag=isPartStr&&!isTag;if(isTag){part=part.toLowerCase();}
+for(var i=0,l=checkSet.length,elem;i<l;i++){if((elem=checkSet[i])){while((elem=elem.previousSibling)&&elem.nodeType!==1){}
+checkSet[i]=isPartStrNotTag||elem&&elem.nodeName.toLowerCase()===part?elem||false:elem===part;}}
+if(isPartStrNotTag){Sizzle.filter(part,checkSet,true);}},">":function(checkSet,part){var elem,isPartStr=typeof part==="string",i=0,l=checkSet.length;if(isPartStr&&!rNonWord.test(part)){part=part.toLowerCase();for(;i<l;i++){elem=checkSet[i];if(elem){var parent=elem.parentNode;checkSet[i]=parent.nodeName.toLowerCase()===part?parent:false;}}}else{for(;i<l;i++){elem=checkSet[i];if(elem){checkSet[i]=isPartStr?elem.parentNode:elem.parentNode===part;}}
+if(isPartStr){Sizzle.filter(part,checkSet,true);}}},"":function(checkSet,part,isXML){var nodeCheck,doneName=done++,checkFn=dirCheck;if(typeof part==="string"&&!rNonWord.test(part)){part=part.toLowerCase();nodeCheck=part;checkFn=dirNodeCheck;}
+checkFn("parentNode",part,doneName,checkSet,nodeCheck,isXML);},"~":function(checkSet,part,isXML){var nodeCheck,doneName=done++,checkFn=dirCheck;if(typeof part==="string"&&!rNonWord.test(part)){part=part.toLowerCase();nodeCheck=part;checkFn=dirNodeCheck;}
+checkFn("previousSibling",part,doneName,checkSet,nodeCheck,isXML);}},find:{ID:function(match,context,isXML){if(typeof context.getElementById!=="undefined"&&!isXML){var m=context.getElementById(match[1]);return m&&m.parentNode?[m]:[];}},NAME:function(match,context){if(typeof context.getElementsByName!=="undefined"){var ret=[],results=context.getElementsByName(match[1]);for(var i=0,l=results.length;i<l;i++){if(results[i].getAttribute("name")===match[1]){ret.push(results[i]);}}
+return ret.length===0?null:ret;}},TAG:function(match,context){if(typeof context.getElementsByTagName!=="undefined"){return context.getElementsByTagName(match[1]);}}},preFilter:{CLASS:function(match,curLoop,inplace,result,not,isXML){match=" "+match[1].replace(rBackslash,"")+" ";if(isXML){return match;}
+for(var i=0,elem;(elem=curLoop[i])!=null;i++){if(elem){if(not^(elem.className&&(" "+elem.className+" ").replace(/[\t\n\r]/g," ").indexOf(match)>=0)){if(!inplace){result.push(elem);}}else if(inplace){curLoop[i]=false;}}}
+return false;},ID:function(match){return match[1].replace(rBackslash,"");},TAG:function(match,curLoop){return match[1].replace(rBackslash,"").toLowerCase();},CHILD:function(match){if(match[1]==="nth"){if(!match[2]){Sizzle.error(match[0]);}
+match[2]=match[2].replace(/^\+|\s*/g,'');var test=/(-?)(\d*)(?:n([+\-]?\d*))?/.exec(match[2]==="even"&&"2n"||match[2]==="odd"&&"2n+1"||!/\D/.test(match[2])&&"0n+"+match[2]||match[2]);match[2]=(test[1]+(test[2]||1))-0;match[3]=test[3]-0;}
+else if(match[2]){Sizzle.error(match[0]);}
+match[0]=done++;return match;},ATTR:function(match,curLoop,inplace,result,not,isXML){var name=match[1]=match[1].replace(rBackslash,"");if(!isXML&&Expr.attrMap[name]){match[1]=Expr.attrMap[name];}
+match[4]=(match[4]||match[5]||"").replace(rBackslash,"");if(match[2]==="~="){match[4]=" "+match[4]+" ";}
+return match;},PSEUDO:function(match,curLoop,inplace,result,not){if(match[1]==="not"){if((chunker.exec(match[3])||"").length>1||/^\w/.test(match[3])){match[3]=Sizzle(match[3],null,null,curLoop);}else{var ret=Sizzle.filter(match[3],curLoop,inplace,true^not);if(!inplace){result.push.apply(result,ret);}
+return false;}}else if(Expr.match.POS.test(match[0])||Expr.match.CHILD.test(match[0])){return true;}
+return match;},POS:function(match){match.unshift(true);return match;}},filters:{enabled:function(elem){return elem.disabled===false&&elem.type!=="hidden";},disabled:function(elem){return elem.disabled===true;},checked:function(elem){return elem.checked===true;},selected:function(elem){if(elem.parentNode){elem.parentNode.selectedIndex;}
+return elem.selected===true;},parent:function(elem){return!!elem.firstChild;},empty:function(elem){return!elem.firstChild;},has:function(elem,i,match){return!!Sizzle(match[3],elem).length;},header:function(elem){return(/h\d/i).test(elem.nodeName);},text:function(elem){var attr=elem.getAttribute("type"),type=elem.type;return elem.nodeName.toLowerCase()==="input"&&"text"===type&&(attr===type||attr===null);},radio:function(elem){return elem.nodeName.toLowerCase()==="input"&&"radio"===elem.type;},checkbox:function(elem){return elem.nodeName.toLowerCase()==="input"&&"checkbox"===elem.type;},file:function(elem){return elem.nodeName.toLowerCase()==="input"&&"file"===elem.type;},password:function(elem){return elem.nodeName.toLowerCase()==="input"&&"password"===elem.type;},submit:function(elem){var name=elem.nodeName.toLowerCase();return(name==="input"||name==="button")&&"submit"===elem.type;},image:function(elem){return elem.nodeName.toLowerCase()==="input"&&"image"===elem.type;},reset:function(elem){var name=elem.nodeName.toLowerCase();return(name==="input"||name==="button")&&"reset"===elem.type;},button:function(elem){var name=elem.nodeName.toLowerCase();return name==="input"&&"button"===elem.type||name==="button";},input:function(elem){return(/input|select|textarea|button/i).test(elem.nodeName);},focus:function(elem){return elem===elem.ownerDocument.activeElement;}},setFilters:{first:function(elem,i){return i===0;},last:function(elem,i,match,array){return i===array.length-1;},even:function(elem,i){return i%2===0;},odd:function(elem,i){return i%2===1;},lt:function(elem,i,match){return i<match[3]-0;},gt:function(elem,i,match){return i>match[3]-0;},nth:function(elem,i,match){return match[3]-0===i;},eq:function(elem,i,match){return match[3]-0===i;}},filter:{PSEUDO:function(elem,match,i,array){var name=match[1],filter=Expr.filters[name];if(filter){return filter(elem,i,match,array);}else if(name==="contains"){return(elem.textContent||elem.innerText||getText([elem])||"").indexOf(match[3])>=0;}else if(name==="not"){var not=match[3];for(var j=0,l=not.length;j<l;j++){if(not[j]===elem){return false;}}
+return true;}else{Sizzle.error(name);}},CHILD:function(elem,match){var first,last,doneName,parent,cache,count,diff,type=match[1],node=elem;switch(type){case"only":case"first":while((node=node.previousSibling)){if(node.nodeType===1){return false;}}
+if(type==="first"){return true;}
+node=elem;case"last":while((node=node.nextSibling)){if(node.nodeType===1){return false;}}
+return true;case"nth":first=match[2];last=match[3];if(first===1&&last===0){return true;}
+doneName=match[0];parent=elem.parentNode;if(parent&&(parent[expando]!==doneName||!elem.nodeIndex)){count=0;for(node=parent.firstChild;node;node=node.nextSibling){if(node.nodeType===1){node.nodeIndex=++count;}}
+parent[expando]=doneName;}
+diff=elem.nodeIndex-last;if(first===0){return diff===0;}else{return(diff%first===0&&diff/first>=0);}}},ID:function(elem,match){return elem.nodeType===1&&elem.getAttribute("id")===match;},TAG:function(elem,match){return(match==="*"&&elem.nodeType===1)||!!elem.nodeName&&elem.nodeName.toLowerCase()===match;},CLASS:function(elem,match){return(" "+(elem.className||elem.getAttribute("class"))+" ").indexOf(match)>-1;},ATTR:function(elem,match){var name=match[1],result=Sizzle.attr?Sizzle.attr(elem,name):Expr.attrHandle[name]?Expr.attrHandle[name](elem):elem[name]!=null?elem[name]:elem.getAttribute(name),value=result+"",type=match[2],check=match[4];return result==null?type==="!=":!type&&Sizzle.attr?result!=null:type==="="?value===check:type==="*="?value.indexOf(check)>=0:type==="~="?(" "+value+" ").indexOf(check)>=0:!check?value&&result!==false:type==="!="?value!==check:type==="^="?value.indexOf(check)===0:type==="$="?value.substr(value.length-check.length)===check:type==="|="?value===check||value.substr(0,check.length+1)===check+"-":false;},POS:function(elem,match,i,array){var name=match[2],filter=Expr.setFilters[name];if(filter){return filter(elem,i,match,array);}}}};var origPOS=Expr.match.POS,fescape=function(all,num){return"\\"+(num-0+1);};for(var type in Expr.match){Expr.match[type]=new RegExp(Expr.match[type].source+(/(?![^\[]*\])(?![^\(]*\))/.source));Expr.leftMatch[type]=new RegExp(/(^(?:.|\r|\n)*?)/.source+Expr.match[type].source.replace(/\\(\d+)/g,fescape));}
+Expr.match.globalPOS=origPOS;var makeArray=function(array,results){array=Array.prototype.slice.call(array,0);if(results){results.push.apply(results,array);return results;}
+return array;};try{Array.prototype.slice.call(document.documentElement.childNodes,0)[0].nodeType;}catch(e){makeArray=function(array,results){var i=0,ret=results||[];if(toString.call(array)==="[object Array]"){Array.prototype.push.apply(ret,array);}else{if(typeof array.length==="number"){for(var l=array.length;i<l;i++){ret.push(array[i]);}}else{for(;array[i];i++){ret.push(array[i]);}}}
+return ret;};}
+var sortOrder,siblingCheck;if(document.documentElement.compareDocumentPosition){sortOrder=function(a,b){if(a===b){hasDuplicate=true;return 0;}
+if(!a.compareDocumentPosition||!b.compareDocumentPosition){return a.compareDocumentPosition?-1:1;}
+return a.compareDocumentPosition(b)&4?-1:1;};}else{sortOrder=function(a,b){if(a===b){hasDuplicate=true;return 0;}else if(a.sourceIndex&&b.sourceIndex){return a.sourceIndex-b.sourceIndex;}
+var al,bl,ap=[],bp=[],aup=a.parentNode,bup=b.parentNode,cur=aup;if(aup===bup){return siblingCheck(a,b);}else if(!aup){return-1;}else if(!bup){return 1;}
+while(cur){ap.unshift(cur);cur=cur.parentNode;}
+cur=bup;while(cur){bp.unshift(cur);cur=cur.parentNode;}
+al=ap.length;bl=bp.length;for(var i=0;i<al&&i<bl;i++){if(ap[i]!==bp[i]){return siblingCheck(ap[i],bp[i]);}}
+return i===al?siblingCheck(a,bp[i],-1):siblingCheck(ap[i],b,1);};siblingCheck=function(a,b,ret){if(a===b){return ret;}
+var cur=a.nextSibling;while(cur){if(cur===b){return-1;}
+cur=cur.nextSibling;}
+return 1;};}
+(function(){var form=document.createElement("div"),id="script"+(new Date()).getTime(),root=document.documentElement;form.innerHTML="<a name='"+id+"'/>";root.insertBefore(form,root.firstChild);if(document.getElementById(id)){Expr.find.ID=function(match,context,isXML){if(typeof context.getElementById!=="undefined"&&!isXML){var m=context.getElementById(match[1]);return m?m.id===match[1]||typeof m.getAttributeNode!=="undefined"&&m.getAttributeNode("id").nodeValue===match[1]?[m]:undefined:[];}};Expr.filter.ID=function(elem,match){var node=typeof elem.getAttributeNode!=="undefined"&&elem.getAttributeNode("id");return elem.nodeType===1&&node&&node.nodeValue===match;};}
+root.removeChild(form);root=form=null;})();(function(){var div=document.createElement("div");div.appendChild(document.createComment(""));if(div.getElementsByTagName("*").length>0){Expr.find.TAG=function(match,context){var results=context.getElementsByTagName(match[1]);if(match[1]==="*"){var tmp=[];for(var i=0;results[i];i++){if(results[i].nodeType===1){tmp.push(results[i]);}}
+results=tmp;}
+return results;};}
+div.innerHTML="<a href='#'></a>";if(div.firstChild&&typeof div.firstChild.getAttribute!=="undefined"&&div.firstChild.getAttribute("href")!=="#"){Expr.attrHandle.href=function(elem){return elem.getAttribute("href",2);};}
+div=null;})();if(document.querySelectorAll){(function(){var oldSizzle=Sizzle,div=document.createElement("div"),id="__sizzle__";div.innerHTML="<p class='TEST'></p>";if(div.querySelectorAll&&div.querySelectorAll(".TEST").length===0){return;}
+Sizzle=function(query,context,extra,seed){context=context||document;if(!seed&&!Sizzle.isXML(context)){var match=/^(\w+$)|^\.([\w\-]+$)|^#([\w\-]+$)/.exec(query);if(match&&(context.nodeType===1||context.nodeType===9)){if(match[1]){return makeArray(context.getElementsByTagName(query),extra);}else if(match[2]&&Expr.find.CLASS&&context.getElementsByClassName){return makeArray(context.getElementsByClassName(match[2]),extra);}}
+if(context.nodeType===9){if(query==="body"&&context.body){return makeArray([context.body],extra);}else if(match&&match[3]){var elem=context.getElementById(match[3]);if(elem&&elem.parentNode){if(elem.id===match[3]){return makeArray([elem],extra);}}else{return makeArray([],extra);}}
+try{return makeArray(context.querySelectorAll(query),extra);}catch(qsaError){}}else if(context.nodeType===1&&context.nodeName.toLowerCase()!=="object"){var oldContext=context,old=context.getAttribute("id"),nid=old||id,hasParent=context.parentNode,relativeHierarchySelector=/^\s*[+~]/.test(query);if(!old){context.setAttribute("id",nid);}else{nid=nid.replace(/'/g,"\\$&");}
+if(relativeHierarchySelector&&hasParent){context=context.parentNode;}
+try{if(!relativeHierarchySelector||hasParent){return makeArray(context.querySelectorAll("[id='"+nid+"'] "+query),extra);}}catch(pseudoError){}finally{if(!old){oldContext.removeAttribute("id");}}}}
+return oldSizzle(query,context,extra,seed);};for(var prop in oldSizzle){Sizzle[prop]=oldSizzle[prop];}
+div=null;})();}
+(function(){var html=document.documentElement,matches=html.matchesSelector||html.mozMatchesSelector||html.webkitMatchesSelector||html.msMatchesSelector;if(matches){var disconnectedMatch=!matches.call(document.createElement("div"),"div"),pseudoWorks=false;try{matches.call(document.documentElement,"[test!='']:sizzle");}catch(pseudoError){pseudoWorks=true;}
+Sizzle.matchesSelector=function(node,expr){expr=expr.replace(/\=\s*([^'"\]]*)\s*\]/g,"='$1']");if(!Sizzle.isXML(node)){try{if(pseudoWorks||!Expr.match.PSEUDO.test(expr)&&!/!=/.test(expr)){var ret=matches.call(node,expr);if(ret||!disconnectedMatch||node.document&&node.document.nodeType!==11){return ret;}}}catch(e){}}
+return Sizzle(expr,null,null,[node]).length>0;};}})();(function(){var div=document.createElement("div");div.innerHTML="<div class='test e'></div><div class='test'></div>";if(!div.getElementsByClassName||div.getElementsByClassName("e").length===0){return;}
+div.lastChild.className="e";if(div.getElementsByClassName("e").length===1){return;}
+Expr.order.splice(1,0,"CLASS");Expr.find.CLASS=function(match,context,isXML){if(typeof context.getElementsByClassName!=="undefined"&&!isXML){return context.getElementsByClassName(match[1]);}};div=null;})();function dirNodeCheck(dir,cur,doneName,checkSet,nodeCheck,isXML){for(var i=0,l=checkSet.length;i<l;i++){var elem=checkSet[i];if(elem){var match=false;elem=elem[dir];while(elem){if(elem[expando]===doneName){match=checkSet[elem.sizset];break;}
+if(elem.nodeType===1&&!isXML){elem[expando]=doneName;elem.sizset=i;}
+if(elem.nodeName.toLowerCase()===cur){match=elem;break;}
+elem=elem[dir];}
+checkSet[i]=match;}}}
+function dirCheck(dir,cur,doneName,checkSet,nodeCheck,isXML){for(var i=0,l=checkSet.length;i<l;i++){var elem=checkSet[i];if(elem){var match=false;elem=elem[dir];while(elem){if(elem[expando]===doneName){match=checkSet[elem.sizset];break;}
+if(elem.nodeType===1){if(!isXML){elem[expando]=doneName;elem.sizset=i;}
+if(typeof cur!=="string"){if(elem===cur){match=true;break;}}else if(Sizzle.filter(cur,[elem]).length>0){match=elem;break;}}
+elem=elem[dir];}
+checkSet[i]=match;}}}
+if(document.documentElement.contains){Sizzle.contains=function(a,b){return a!==b&&(a.contains?a.contains(b):true);};}else if(document.documentElement.compareDocumentPosition){Sizzle.contains=function(a,b){return!!(a.compareDocumentPosition(b)&16);};}else{Sizzle.contains=function(){return false;};}
+Sizzle.isXML=function(elem){var documentElement=(elem?elem.ownerDocument||elem:0).documentElement;return documentElement?documentElement.nodeName!=="HTML":false;};var posProcess=function(selector,context,seed){var match,tmpSet=[],later="",root=context.nodeType?[context]:context;while((match=Expr.match.PSEUDO.exec(selector))){later+=match[0];selector=selector.replace(Expr.match.PSEUDO,"");}
+selector=Expr.relative[selector]?selector+"*":selector;for(var i=0,l=root.length;i<l;i++){Sizzle(selector,root[i],tmpSet,seed);}
+return Sizzle.filter(later,tmpSet);};Sizzle.attr=jQuery.attr;Sizzle.selectors.attrMap={};jQuery.find=Sizzle;jQuery.expr=Sizzle.selectors;jQuery.expr[":"]=jQuery.expr.filters;jQuery.unique=Sizzle.uniqueSort;jQuery.text=Sizzle.getText;jQuery.isXMLDoc=Sizzle.isXML;jQuery.contains=Sizzle.contains;})();var runtil=/Until$/,rparentsprev=/^(?:parents|prevUntil|prevAll)/,rmultiselector=/,/,isSimple=/^.[^:#\[\.,]*$/,slice=Array.prototype.slice,POS=jQuery.expr.match.globalPOS,guaranteedUnique={children:true,contents:true,next:true,prev:true};jQuery.fn.extend({find:function(selector){var self=this,i,l;if(typeof selector!=="string"){return jQuery(selector).filter(function(){for(i=0,l=self.length;i<l;i++){if(jQuery.contains(self[i],this)){return true;}}});}
+var ret=this.pushStack("","find",selector),length,n,r;for(i=0,l=this.length;i<l;i++){length=ret.length;jQuery.find(selector,this[i],ret);if(i>0){for(n=length;n<ret.length;n++){for(r=0;r<length;r++){if(ret[r]===ret[n]){ret.splice(n--,1);break;}}}}}
+return ret;},has:function(target){var targets=jQuery(target);return this.filter(function(){for(var i=0,l=targets.length;i<l;i++){if(jQuery.contains(this,targets[i])){return true;}}});},not:function(selector){return this.pushStack(winnow(this,selector,false),"not",selector);},filter:function(selector){return this.pushStack(winnow(this,selector,true),"filter",selector);},is:function(selector){return!!selector&&(typeof selector==="string"?POS.test(selector)?jQuery(selector,this.context).index(this[0])>=0:jQuery.filter(selector,this).length>0:this.filter(selector).length>0);},closest:function(selectors,context){var ret=[],i,l,cur=this[0];if(jQuery.isArray(selectors)){var level=1;while(cur&&cur.ownerDocument&&cur!==context){for(i=0;i<selectors.length;i++){if(jQuery(cur).is(selectors[i])){ret.push({selector:selectors[i],elem:cur,level:level});}}
+cur=cur.parentNode;level++;}
+return ret;}
+var pos=POS.test(selectors)||typeof selectors!=="string"?jQuery(selectors,context||this.context):0;for(i=0,l=this.length;i<l;i++){cur=this[i];while(cur){if(pos?pos.index(cur)>-1:jQuery.find.matchesSelector(cur,selectors)){ret.push(cur);break;}else{cur=cur.parentNode;if(!cur||!cur.ownerDocument||cur===context||cur.nodeType===11){break;}}}}
+ret=ret.length>1?jQuery.unique(ret):ret;return this.pushStack(ret,"closest",selectors);},index:function(elem){if(!elem){return(this[0]&&this[0].parentNode)?this.prevAll().length:-1;}
+if(typeof elem==="string"){return jQuery.inArray(this[0],jQuery(elem));}
+return jQuery.inArray(elem.jquery?elem[0]:elem,this);},add:function(selector,context){var set=typeof selector==="string"?jQuery(selector,context):jQuery.makeArray(selector&&selector.nodeType?[selector]:selector),all=jQuery.merge(this.get(),set);return this.pushStack(isDisconnected(set[0])||isDisconnected(all[0])?all:jQuery.unique(all));},andSelf:function(){return this.add(this.prevObject);}});function isDisconnected(node){return!node||!node.parentNode||node.parentNode.nodeType===11;}
+jQuery.each({parent:function(elem){var parent=elem.parentNode;return parent&&parent.nodeType!==11?parent:null;},parents:function(elem){return jQuery.dir(elem,"parentNode");},parentsUntil:function(elem,i,until){return jQuery.dir(elem,"parentNode",until);},next:function(elem){return jQuery.nth(elem,2,"nextSibling");},prev:function(elem){return jQuery.nth(elem,2,"previousSibling");},nextAll:function(elem){return jQuery.dir(elem,"nextSibling");},prevAll:function(elem){return jQuery.dir(elem,"previousSibling");},nextUntil:function(elem,i,until){return jQuery.dir(elem,"nextSibling",until);},prevUntil:function(elem,i,until){return jQuery.dir(elem,"previousSibling",until);},siblings:function(elem){return jQuery.sibling((elem.parentNode||{}).firstChild,elem);},children:function(elem){return jQuery.sibling(elem.firstChild);},contents:function(elem){return jQuery.nodeName(elem,"iframe")?elem.contentDocument||elem.contentWindow.document:jQuery.makeArray(elem.childNodes);}},function(name,fn){jQuery.fn[name]=function(until,selector){var ret=jQuery.map(this,fn,until);if(!runtil.test(name)){selector=until;}
+if(selector&&typeof selector==="string"){ret=jQuery.filter(selector,ret);}
+ret=this.length>1&&!guaranteedUnique[name]?jQuery.unique(ret):ret;if((this.length>1||rmultiselector.test(selector))&&rparentsprev.test(name)){ret=ret.reverse();}
+return this.pushStack(ret,name,slice.call(arguments).join(","));};});jQuery.extend({filter:function(expr,elems,not){if(not){expr=":not("+expr+")";}
+return elems.length===1?jQuery.find.matchesSelector(elems[0],expr)?[elems[0]]:[]:jQuery.find.matches(expr,elems);},dir:function(elem,dir,until){var matched=[],cur=elem[dir];while(cur&&cur.nodeType!==9&&(until===undefined||cur.nodeType!==1||!jQuery(cur).is(until))){if(cur.nodeType===1){matched.push(cur);}
+cur=cur[dir];}
+return matched;},nth:function(cur,result,dir,elem){result=result||1;var num=0;for(;cur;cur=cur[dir]){if(cur.nodeType===1&&++num===result){break;}}
+return cur;},sibling:function(n,elem){var r=[];for(;n;n=n.nextSibling){if(n.nodeType===1&&n!==elem){r.push(n);}}
+return r;}});function winnow(elements,qualifier,keep){qualifier=qualifier||0;if(jQuery.isFunction(qualifier)){return jQuery.grep(elements,function(elem,i){var retVal=!!qualifier.call(elem,i,elem);return retVal===keep;});}else if(qualifier.nodeType){return jQuery.grep(elements,function(elem,i){return(elem===qualifier)===keep;});}else if(typeof qualifier==="string"){var filtered=jQuery.grep(elements,function(elem){return elem.nodeType===1;});if(isSimple.test(qualifier)){return jQuery.filter(qualifier,filtered,!keep);}else{qualifier=jQuery.filter(qualifier,filtered);}}
+return jQuery.grep(elements,function(elem,i){return(jQuery.inArray(elem,qualifier)>=0)===keep;});}
+function createSafeFragment(document){var list=nodeNames.split("|"),safeFrag=document.createDocumentFragment();if(safeFrag.createElement){while(list.length){safeFrag.createElement(list.pop());}}
+return safeFrag;}
+var nodeNames="abbr|article|aside|audio|bdi|canvas|data|datalist|details|figcaption|figure|footer|"+"header|hgroup|mark|meter|nav|output|progress|section|summary|time|video",rinlinejQuery=/ jQuery\d+="(?:\d+|null)"/g,rleadingWhitespace=/^\s+/,rxhtmlTag=/<(?!area|br|col|embed|hr|img|input|link|meta|param)(([\w:]+)[^>]*)\/>/ig,rtagName=/<([\w:]+)/,rtbody=/<tbody/i,rhtml=/<|&#?\w+;/,rnoInnerhtml=/<(?:script|style)/i,rnocache=/<(?:script|object|embed|option|style)/i,rnoshimcache=new RegExp("<(?:"+nodeNames+")[\\s/>]","i"),rchecked=/checked\s*(?:[^=]|=\s*.checked.)/i,rscriptType=/\/(java|ecma)script/i,rcleanScript=/^\s*<!(?:\[CDATA\[|\-\-)/,wrapMap={option:[1,"<select multiple='multiple'>","</select>"],legend:[1,"<fieldset>","</fieldset>"],thead:[1,"<table>","</table>"],tr:[2,"<table><tbody>","</tbody></table>"],td:[3,"<table><tbody><tr>","</tr></tbody></table>"],col:[2,"<table><tbody></tbody><colgroup>","</colgroup></table>"],area:[1,"<map>","</map>"],_default:[0,"",""]},safeFragment=createSafeFragment(document);wrapMap.optgroup=wrapMap.option;wrapMap.tbody=wrapMap.tfoot=wrapMap.colgroup=wrapMap.caption=wrapMap.thead;wrapMap.th=wrapMap.td;if(!jQuery.support.htmlSerialize){wrapMap._default=[1,"div<div>","</div>"];}
+jQuery.fn.extend({text:function(value){return jQuery.access(this,function(value){return value===undefined?jQuery.text(this):this.empty().append((this[0]&&this[0].ownerDocument||document).createTextNode(value));},null,value,arguments.length);},wrapAll:function(html){if(jQuery.isFunction(html)){return this.each(function(i){jQuery(this).wrapAll(html.call(this,i));});}
+if(this[0]){var wrap=jQuery(html,this[0].ownerDocument).eq(0).clone(true);if(this[0].parentNode){wrap.insertBefore(this[0]);}
+wrap.map(function(){var elem=this;while(elem.firstChild&&elem.firstChild.nodeType===1){elem=elem.firstChild;}
+return elem;}).append(this);}
+return this;},wrapInner:function(html){if(jQuery.isFunction(html)){return this.each(function(i){jQuery(this).wrapInner(html.call(this,i));});}
+return this.each(function(){var self=jQuery(this),contents=self.contents();if(contents.length){contents.wrapAll(html);}else{self.append(html);}});},wrap:function(html){var isFunction=jQuery.isFunction(html);return this.each(function(i){jQuery(this).wrapAll(isFunction?html.call(this,i):html);});},unwrap:function(){return this.parent().each(function(){if(!jQuery.nodeName(this,"body")){jQuery(this).replaceWith(this.childNodes);}}).end();},append:function(){return this.domManip(arguments,true,function(elem){if(this.nodeType===1){this.appendChild(elem);}});},prepend:function(){return this.domManip(arguments,true,function(elem){if(this.nodeType===1){this.insertBefore(elem,this.firstChild);}});},before:function(){if(this[0]&&this[0].parentNode){return this.domManip(arguments,false,function(elem){this.parentNode.insertBefore(elem,this);});}else if(arguments.length){var set=jQuery.clean(arguments);set.push.apply(set,this.toArray());return this.pushStack(set,"before",arguments);}},after:function(){if(this[0]&&this[0].parentNode){return this.domManip(arguments,false,function(elem){this.parentNode.insertBefore(elem,this.nextSibling);});}else if(arguments.length){var set=this.pushStack(this,"after",arguments);set.push.apply(set,jQuery.clean(arguments));return set;}},remove:function(selector,keepData){for(var i=0,elem;(elem=this[i])!=null;i++){if(!selector||jQuery.filter(selector,[elem]).length){if(!keepData&&elem.nodeType===1){jQuery.cleanData(elem.getElementsByTagName("*"));jQuery.cleanData([elem]);}
+if(elem.parentNode){elem.parentNode.removeChild(elem);}}}
+return this;},empty:function(){for(var i=0,elem;(elem=this[i])!=null;i++){if(elem.nodeType===1){jQuery.cleanData(elem.getElementsByTagName("*"));}
+while(elem.firstChild){elem.removeChild(elem.firstChild);}}
+return this;},clone:function(dataAndEvents,deepDataAndEvents){dataAndEvents=dataAndEvents==null?false:dataAndEvents;deepDataAndEvents=deepDataAndEvents==null?dataAndEvents:deepDataAndEvents;return this.map(function(){return jQuery.clone(this,dataAndEvents,deepDataAndEvents);});},html:function(value){return jQuery.access(this,function(value){var elem=this[0]||{},i=0,l=this.length;if(value===undefined){return elem.nodeType===1?elem.innerHTML.replace(rinlinejQuery,""):null;}
+if(typeof value==="string"&&!rnoInnerhtml.test(value)&&(jQuery.support.leadingWhitespace||!rleadingWhitespace.test(value))&&!wrapMap[(rtagName.exec(value)||["",""])[1].toLowerCase()]){value=value.replace(rxhtmlTag,"<$1></$2>");try{for(;i<l;i++){elem=this[i]||{};if(elem.nodeType===1){jQuery.cleanData(elem.getElementsByTagName("*"));elem.innerHTML=value;}}
+elem=0;}catch(e){}}
+if(elem){this.empty().append(value);}},null,value,arguments.length);},replaceWith:function(value){if(this[0]&&this[0].parentNode){if(jQuery.isFunction(value)){return this.each(function(i){var self=jQuery(this),old=self.html();self.replaceWith(value.call(this,i,old));});}
+if(typeof value!=="string"){value=jQuery(value).detach();}
+return this.each(function(){var next=this.nextSibling,parent=this.parentNode;jQuery(this).remove();if(next){jQuery(next).before(value);}else{jQuery(parent).append(value);}});}else{return this.length?this.pushStack(jQuery(jQuery.isFunction(value)?value():value),"replaceWith",value):this;}},detach:function(selector){return this.remove(selector,true);},domManip:function(args,table,callback){var results,first,fragment,parent,value=args[0],scripts=[];if(!jQuery.support.checkClone&&arguments.length===3&&typeof value==="string"&&rchecked.test(value)){return this.each(function(){jQuery(this).domManip(args,table,callback,true);});}
+if(jQuery.isFunction(value)){return this.each(function(i){var self=jQuery(this);args[0]=value.call(this,i,table?self.html():undefined);self.domManip(args,table,callback);});}
+if(this[0]){parent=value&&value.parentNode;if(jQuery.support.parentNode&&parent&&parent.nodeType===11&&parent.childNodes.length===this.length){results={fragment:parent};}else{results=jQuery.buildFragment(args,this,scripts);}
+fragment=results.fragment;if(fragment.childNodes.length===1){first=fragment=fragment.firstChild;}else{first=fragment.firstChild;}
+if(first){table=table&&jQuery.nodeName(first,"tr");for(var i=0,l=this.length,lastIndex=l-1;i<l;i++){callback.call(table?root(this[i],first):this[i],results.cacheable||(l>1&&i<lastIndex)?jQuery.clone(fragment,true,true):fragment);}}
+if(scripts.length){jQuery.each(scripts,function(i,elem){if(elem.src){jQuery.ajax({type:"GET",global:false,url:elem.src,async:false,dataType:"script"});}else{jQuery.globalEval((elem.text||elem.textContent||elem.innerHTML||"").replace(rcleanScript,"/*$0*/"));}
+if(elem.parentNode){elem.parentNode.removeChild(elem);}});}}
+return this;}});function root(elem,cur){return jQuery.nodeName(elem,"table")?(elem.getElementsByTagName("tbody")[0]||elem.appendChild(elem.ownerDocument.createElement("tbody"))):elem;}
+function cloneCopyEvent(src,dest){if(dest.nodeType!==1||!jQuery.hasData(src)){return;}
+var type,i,l,oldData=jQuery._data(src),curData=jQuery._data(dest,oldData),events=oldData.events;if(events){delete curData.handle;curData.events={};for(type in events){for(i=0,l=events[type].length;i<l;i++){jQuery.event.add(dest,type,events[type][i]);}}}
+if(curData.data){curData.data=jQuery.extend({},curData.data);}}
+function cloneFixAttributes(src,dest){var nodeName;if(dest.nodeType!==1){return;}
+if(dest.clearAttributes){dest.clearAttributes();}
+if(dest.mergeAttributes){dest.mergeAttributes(src);}
+nodeName=dest.nodeName.toLowerCase();if(nodeName==="object"){dest.outerHTML=src.outerHTML;}else if(nodeName==="input"&&(src.type==="checkbox"||src.type==="radio")){if(src.checked){dest.defaultChecked=dest.checked=src.checked;}
+if(dest.value!==src.value){dest.value=src.value;}}else if(nodeName==="option"){dest.selected=src.defaultSelected;}else if(nodeName==="input"||nodeName==="textarea"){dest.defaultValue=src.defaultValue;}else if(nodeName==="script"&&dest.text!==src.text){dest.text=src.text;}
+dest.removeAttribute(jQuery.expando);dest.removeAttribute("_submit_attached");dest.removeAttribute("_change_attached");}
+jQuery.buildFragment=function(args,nodes,scripts){var fragment,cacheable,cacheresults,doc,first=args[0];if(nodes&&nodes[0]){doc=nodes[0].ownerDocument||nodes[0];}
+if(!doc.createDocumentFragment){doc=document;}
+if(args.length===1&&typeof first==="string"&&first.length<512&&doc===document&&first.charAt(0)==="<"&&!rnocache.test(first)&&(jQuery.support.checkClone||!rchecked.test(first))&&(jQuery.support.html5Clone||!rnoshimcache.test(first))){cacheable=true;cacheresults=jQuery.fragments[first];if(cacheresults&&cacheresults!==1){fragment=cacheresults;}}
+if(!fragment){fragment=doc.createDocumentFragment();jQuery.clean(args,doc,fragment,scripts);}
+if(cacheable){jQuery.fragments[first]=cacheresults?fragment:1;}
+return{fragment:fragment,cacheable:cacheable};};jQuery.fragments={};jQuery.each({appendTo:"append",prependTo:"prepend",insertBefore:"before",insertAfter:"after",replaceAll:"replaceWith"},function(name,original){jQuery.fn[name]=function(selector){var ret=[],insert=jQuery(selector),parent=this.length===1&&this[0].parentNode;if(parent&&parent.nodeType===11&&parent.childNodes.length===1&&insert.length===1){insert[original](this[0]);return this;}else{for(var i=0,l=insert.length;i<l;i++){var elems=(i>0?this.clone(true):this).get();jQuery(insert[i])[original](elems);ret=ret.concat(elems);}
+return this.pushStack(ret,name,insert.selector);}};});function getAll(elem){if(typeof elem.getElementsByTagName!=="undefined"){return elem.getElementsByTagName("*");}else if(typeof elem.querySelectorAll!=="undefined"){return elem.querySelectorAll("*");}else{return[];}}
+function fixDefaultChecked(elem){if(elem.type==="checkbox"||elem.type==="radio"){elem.defaultChecked=elem.checked;}}
+function findInputs(elem){var nodeName=(elem.nodeName||"").toLowerCase();if(nodeName==="input"){fixDefaultChecked(elem);}else if(nodeName!=="script"&&typeof elem.getElementsByTagName!=="undefined"){jQuery.grep(elem.getElementsByTagName("input"),fixDefaultChecked);}}
+function shimCloneNode(elem){var div=document.createElement("div");safeFragment.appendChild(div);div.innerHTML=elem.outerHTML;return div.firstChild;}
+jQuery.extend({clone:function(elem,dataAndEvents,deepDataAndEvents){var srcElements,destElements,i,clone=jQuery.support.html5Clone||jQuery.isXMLDoc(elem)||!rnoshimcache.test("<"+elem.nodeName+">")?elem.cloneNode(true):shimCloneNode(elem);if((!jQuery.support.noCloneEvent||!jQuery.support.noCloneChecked)&&(elem.nodeType===1||elem.nodeType===11)&&!jQuery.isXMLDoc(elem)){cloneFixAttributes(elem,clone);srcElements=getAll(elem);destElements=getAll(clone);for(i=0;srcElements[i];++i){if(destElements[i]){cloneFixAttributes(srcElements[i],destElements[i]);}}}
+if(dataAndEvents){cloneCopyEvent(elem,clone);if(deepDataAndEvents){srcElements=getAll(elem);destElements=getAll(clone);for(i=0;srcElements[i];++i){cloneCopyEvent(srcElements[i],destElements[i]);}}}
+srcElements=destElements=null;return clone;},clean:function(elems,context,fragment,scripts){var checkScriptType,script,j,ret=[];context=context||document;if(typeof context.createElement==="undefined"){context=context.ownerDocument||context[0]&&context[0].ownerDocument||document;}
+for(var i=0,elem;(elem=elems[i])!=null;i++){if(typeof elem==="number"){elem+="";}
+if(!elem){continue;}
+if(typeof elem==="string"){if(!rhtml.test(elem)){elem=context.createTextNode(elem);}else{elem=elem.replace(rxhtmlTag,"<$1></$2>");var tag=(rtagName.exec(elem)||["",""])[1].toLowerCase(),wrap=wrapMap[tag]||wrapMap._default,depth=wrap[0],div=context.createElement("div"),safeChildNodes=safeFragment.childNodes,remove;if(context===document){safeFragment.appendChild(div);}else{createSafeFragment(context).appendChild(div);}
+div.innerHTML=wrap[1]+elem+wrap[2];while(depth--){div=div.lastChild;}
+if(!jQuery.support.tbody){var hasBody=rtbody.test(elem),tbody=tag==="table"&&!hasBody?div.firstChild&&div.firstChild.childNodes:wrap[1]==="<table>"&&!hasBody?div.childNodes:[];for(j=tbody.length-1;j>=0;--j){if(jQuery.nodeName(tbody[j],"tbody")&&!tbody[j].childNodes.length){tbody[j].parentNode.removeChild(tbody[j]);}}}
+if(!jQuery.support.leadingWhitespace&&rleadingWhitespace.test(elem)){div.insertBefore(context.createTextNode(rleadingWhitespace.exec(elem)[0]),div.firstChild);}
+elem=div.childNodes;if(div){div.parentNode.removeChild(div);if(safeChildNodes.length>0){remove=safeChildNodes[safeChildNodes.length-1];if(remove&&remove.parentNode){remove.parentNode.removeChild(remove);}}}}}
+var len;if(!jQuery.support.appendChecked){if(elem[0]&&typeof(len=elem.length)==="number"){for(j=0;j<len;j++){findInputs(elem[j]);}}else{findInputs(elem);}}
+if(elem.nodeType){ret.push(elem);}else{ret=jQuery.merge(ret,elem);}}
+if(fragment){checkScriptType=function(elem){return!elem.type||rscriptType.test(elem.type);};for(i=0;ret[i];i++){script=ret[i];if(scripts&&jQuery.nodeName(script,"script")&&(!script.type||rscriptType.test(script.type))){scripts.push(script.parentNode?script.parentNode.removeChild(script):script);}else{if(script.nodeType===1){var jsTags=jQuery.grep(script.getElementsByTagName("script"),checkScriptType);ret.splice.apply(ret,[i+1,0].concat(jsTags));}
+fragment.appendChild(script);}}}
+return ret;},cleanData:function(elems){var data,id,cache=jQuery.cache,special=jQuery.event.special,deleteExpando=jQuery.support.deleteExpando;for(var i=0,elem;(elem=elems[i])!=null;i++){if(elem.nodeName&&jQuery.noData[elem.nodeName.toLowerCase()]){continue;}
+id=elem[jQuery.expando];if(id){data=cache[id];if(data&&data.events){for(var type in data.events){if(special[type]){jQuery.event.remove(elem,type);}else{jQuery.removeEvent(elem,type,data.handle);}}
+if(data.handle){data.handle.elem=null;}}
+if(deleteExpando){delete elem[jQuery.expando];}else if(elem.removeAttribute){elem.removeAttribute(jQuery.expando);}
+delete cache[id];}}}});var ralpha=/alpha\([^)]*\)/i,ropacity=/opacity=([^)]*)/,rupper=/([A-Z]|^ms)/g,rnum=/^[\-+]?(?:\d*\.)?\d+$/i,rnumnonpx=/^-?(?:\d*\.)?\d+(?!px)[^\d\s]+$/i,rrelNum=/^([\-+])=([\-+.\de]+)/,rmargin=/^margin/,cssShow={position:"absolute",visibility:"hidden",display:"block"},cssExpand=["Top","Right","Bottom","Left"],curCSS,getComputedStyle,currentStyle;jQuery.fn.css=function(name,value){return jQuery.access(this,function(elem,name,value){return value!==undefined?jQuery.style(elem,name,value):jQuery.css(elem,name);},name,value,arguments.length>1);};jQuery.extend({cssHooks:{opacity:{get:function(elem,computed){if(computed){var ret=curCSS(elem,"opacity");return ret===""?"1":ret;}else{return elem.style.opacity;}}}},cssNumber:{"fillOpacity":true,"fontWeight":true,"lineHeight":true,"opacity":true,"orphans":true,"widows":true,"zIndex":true,"zoom":true},cssProps:{"float":jQuery.support.cssFloat?"cssFloat":"styleFloat"},style:function(elem,name,value,extra){if(!elem||elem.nodeType===3||elem.nodeType===8||!elem.style){return;}
+var ret,type,origName=jQuery.camelCase(name),style=elem.style,hooks=jQuery.cssHooks[origName];name=jQuery.cssProps[origName]||origName;if(value!==undefined){type=typeof value;if(type==="string"&&(ret=rrelNum.exec(value))){value=(+(ret[1]+1)*+ret[2])+parseFloat(jQuery.css(elem,name));type="number";}
+if(value==null||type==="number"&&isNaN(value)){return;}
+if(type==="number"&&!jQuery.cssNumber[origName]){value+="px";}
+if(!hooks||!("set"in hooks)||(value=hooks.set(elem,value))!==undefined){try{style[name]=value;}catch(e){}}}else{if(hooks&&"get"in hooks&&(ret=hooks.get(elem,false,extra))!==undefined){return ret;}
+return style[name];}},css:function(elem,name,extra){var ret,hooks;name=jQuery.camelCase(name);hooks=jQuery.cssHooks[name];name=jQuery.cssProps[name]||name;if(name==="cssFloat"){name="float";}
+if(hooks&&"get"in hooks&&(ret=hooks.get(elem,true,extra))!==undefined){return ret;}else if(curCSS){return curCSS(elem,name);}},swap:function(elem,options,callback){var old={},ret,name;for(name in options){old[name]=elem.style[name];elem.style[name]=options[name];}
+ret=callback.call(elem);for(name in options){elem.style[name]=old[name];}
+return ret;}});jQuery.curCSS=jQuery.css;if(document.defaultView&&document.defaultView.getComputedStyle){getComputedStyle=function(elem,name){var ret,defaultView,computedStyle,width,style=elem.style;name=name.replace(rupper,"-$1").toLowerCase();if((defaultView=elem.ownerDocument.defaultView)&&(computedStyle=defaultView.getComputedStyle(elem,null))){ret=computedStyle.getPropertyValue(name);if(ret===""&&!jQuery.contains(elem.ownerDocument.documentElement,elem)){ret=jQuery.style(elem,name);}}
+if(!jQuery.support.pixelMargin&&computedStyle&&rmargin.test(name)&&rnumnonpx.test(ret)){width=style.width;style.width=ret;ret=computedStyle.width;style.width=width;}
+return ret;};}
+if(document.documentElement.currentStyle){currentStyle=function(elem,name){var left,rsLeft,uncomputed,ret=elem.currentStyle&&elem.currentStyle[name],style=elem.style;if(ret==null&&style&&(uncomputed=style[name])){ret=uncomputed;}
+if(rnumnonpx.test(ret)){left=style.left;rsLeft=elem.runtimeStyle&&elem.runtimeStyle.left;if(rsLeft){elem.runtimeStyle.left=elem.currentStyle.left;}
+style.left=name==="fontSize"?"1em":ret;ret=style.pixelLeft+"px";style.left=left;if(rsLeft){elem.runtimeStyle.left=rsLeft;}}
+return ret===""?"auto":ret;};}
+curCSS=getComputedStyle||currentStyle;function getWidthOrHeight(elem,name,extra){var val=name==="width"?elem.offsetWidth:elem.offsetHeight,i=name==="width"?1:0,len=4;if(val>0){if(extra!=="border"){for(;i<len;i+=2){if(!extra){val-=parseFloat(jQuery.css(elem,"padding"+cssExpand[i]))||0;}
+if(extra==="margin"){val+=parseFloat(jQuery.css(elem,extra+cssExpand[i]))||0;}else{val-=parseFloat(jQuery.css(elem,"border"+cssExpand[i]+"Width"))||0;}}}
+return val+"px";}
+val=curCSS(elem,name);if(val<0||val==null){val=elem.style[name];}
+if(rnumnonpx.test(val)){return val;}
+val=parseFloat(val)||0;if(extra){for(;i<len;i+=2){val+=parseFloat(jQuery.css(elem,"padding"+cssExpand[i]))||0;if(extra!=="padding"){val+=parseFloat(jQuery.css(elem,"border"+cssExpand[i]+"Width"))||0;}
+if(extra==="margin"){val+=parseFloat(jQuery.css(elem,extra+cssExpand[i]))||0;}}}
+return val+"px";}
+jQuery.each(["height","width"],function(i,name){jQuery.cssHooks[name]={get:function(elem,computed,extra){if(computed){if(elem.offsetWidth!==0){return getWidthOrHeight(elem,name,extra);}else{return jQuery.swap(elem,cssShow,function(){return getWidthOrHeight(elem,name,extra);});}}},set:function(elem,value){return rnum.test(value)?value+"px":value;}};});if(!jQuery.support.opacity){jQuery.cssHooks.opacity={get:function(elem,computed){return ropacity.test((computed&&elem.currentStyle?elem.currentStyle.filter:elem.style.filter)||"")?(parseFloat(RegExp.$1)/100)+"":computed?"1":"";},set:function(elem,value){var style=elem.style,currentStyle=elem.currentStyle,opacity=jQuery.isNumeric(value)?"alpha(opacity="+value*100+")":"",filter=currentStyle&&currentStyle.filter||style.filter||"";style.zoom=1;if(value>=1&&jQuery.trim(filter.replace(ralpha,""))===""){style.removeAttribute("filter");if(currentStyle&&!currentStyle.filter){return;}}
+style.filter=ralpha.test(filter)?filter.replace(ralpha,opacity):filter+" "+opacity;}};}
+jQuery(function(){if(!jQuery.support.reliableMarginRight){jQuery.cssHooks.marginRight={get:function(elem,computed){return jQuery.swap(elem,{"display":"inline-block"},function(){if(computed){return curCSS(elem,"margin-right");}else{return elem.style.marginRight;}});}};}});if(jQuery.expr&&jQuery.expr.filters){jQuery.expr.filters.hidden=function(elem){var width=elem.offsetWidth,height=elem.offsetHeight;return(width===0&&height===0)||(!jQuery.support.reliableHiddenOffsets&&((elem.style&&elem.style.display)||jQuery.css(elem,"display"))==="none");};jQuery.expr.filters.visible=function(elem){return!jQuery.expr.filters.hidden(elem);};}
+jQuery.each({margin:"",padding:"",border:"Width"},function(prefix,suffix){jQuery.cssHooks[prefix+suffix]={expand:function(value){var i,parts=typeof value==="string"?value.split(" "):[value],expanded={};for(i=0;i<4;i++){expanded[prefix+cssExpand[i]+suffix]=parts[i]||parts[i-2]||parts[0];}
+return expanded;}};});var r20=/%20/g,rbracket=/\[\]$/,rCRLF=/\r?\n/g,rhash=/#.*$/,rheaders=/^(.*?):[ \t]*([^\r\n]*)\r?$/mg,rinput=/^(?:color|date|datetime|datetime-local|email|hidden|month|number|password|range|search|tel|text|time|url|week)$/i,rlocalProtocol=/^(?:about|app|app\-storage|.+\-extension|file|res|widget):$/,rnoContent=/^(?:GET|HEAD)$/,rprotocol=/^\/\//,rquery=/\?/,rscript=/<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>/gi,rselectTextarea=/^(?:select|textarea)/i,rspacesAjax=/\s+/,rts=/([?&])_=[^&]*/,rurl=/^([\w\+\.\-]+:)(?:\/\/([^\/?#:]*)(?::(\d+))?)?/,_load=jQuery.fn.load,prefilters={},transports={},ajaxLocation,ajaxLocParts,allTypes=["*/"]+["*"];try{ajaxLocation=location.href;}catch(e){ajaxLocation=document.createElement("a");ajaxLocation.href="";ajaxLocation=ajaxLocation.href;}
+ajaxLocParts=rurl.exec(ajaxLocation.toLowerCase())||[];function addToPrefiltersOrTransports(structure){return function(dataTypeExpression,func){if(typeof dataTypeExpression!=="string"){func=dataTypeExpression;dataTypeExpression="*";}
+if(jQuery.isFunction(func)){var dataTypes=dataTypeExpression.toLowerCase().split(rspacesAjax),i=0,length=dataTypes.length,dataType,list,placeBefore;for(;i<length;i++){dataType=dataTypes[i];placeBefore=/^\+/.test(dataType);if(placeBefore){dataType=dataType.substr(1)||"*";}
+list=structure[dataType]=structure[dataType]||[];list[placeBefore?"unshift":"push"](func);}}};}
+function inspectPrefiltersOrTransports(structure,options,originalOptions,jqXHR,dataType,inspected){dataType=dataType||options.dataTypes[0];inspected=inspected||{};inspected[dataType]=true;var list=structure[dataType],i=0,length=list?list.length:0,executeOnly=(structure===prefilters),selection;for(;i<length&&(executeOnly||!selection);i++){selection=list[i](options,originalOptions,jqXHR);if(typeof selection==="string"){if(!executeOnly||inspected[selection]){selection=undefined;}else{options.dataTypes.unshift(selection);selection=inspectPrefiltersOrTransports(structure,options,originalOptions,jqXHR,selection,inspected);}}}
+if((executeOnly||!selection)&&!inspected["*"]){selection=inspectPrefiltersOrTransports(structure,options,originalOptions,jqXHR,"*",inspected);}
+return selection;}
+function ajaxExtend(target,src){var key,deep,flatOptions=jQuery.ajaxSettings.flatOptions||{};for(key in src){if(src[key]!==undefined){(flatOptions[key]?target:(deep||(deep={})))[key]=src[key];}}
+if(deep){jQuery.extend(true,target,deep);}}
+jQuery.fn.extend({load:function(url,params,callback){if(typeof url!=="string"&&_load){return _load.apply(this,arguments);}else if(!this.length){return this;}
+var off=url.indexOf(" ");if(off>=0){var selector=url.slice(off,url.length);url=url.slice(0,off);}
+var type="GET";if(params){if(jQuery.isFunction(params)){callback=params;params=undefined;}else if(typeof params==="object"){params=jQuery.param(params,jQuery.ajaxSettings.traditional);type="POST";}}
+var self=this;jQuery.ajax({url:url,type:type,dataType:"html",data:params,complete:function(jqXHR,status,responseText){responseText=jqXHR.responseText;if(jqXHR.isResolved()){jqXHR.done(function(r){responseText=r;});self.html(selector?jQuery("<div>").append(responseText.replace(rscript,"")).find(selector):responseText);}
+if(callback){self.each(callback,[responseText,status,jqXHR]);}}});return this;},serialize:function(){return jQuery.param(this.serializeArray());},serializeArray:function(){return this.map(function(){return this.elements?jQuery.makeArray(this.elements):this;}).filter(function(){return this.name&&!this.disabled&&(this.checked||rselectTextarea.test(this.nodeName)||rinput.test(this.type));}).map(function(i,elem){var val=jQuery(this).val();return val==null?null:jQuery.isArray(val)?jQuery.map(val,function(val,i){return{name:elem.name,value:val.replace(rCRLF,"\r\n")};}):{name:elem.name,value:val.replace(rCRLF,"\r\n")};}).get();}});jQuery.each("ajaxStart ajaxStop ajaxComplete ajaxError ajaxSuccess ajaxSend".split(" "),function(i,o){jQuery.fn[o]=function(f){return this.on(o,f);};});jQuery.each(["get","post"],function(i,method){jQuery[method]=function(url,data,callback,type){if(jQuery.isFunction(data)){type=type||callback;callback=data;data=undefined;}
+return jQuery.ajax({type:method,url:url,data:data,success:callback,dataType:type});};});jQuery.extend({getScript:function(url,callback){return jQuery.get(url,undefined,callback,"script");},getJSON:function(url,data,callback){return jQuery.get(url,data,callback,"json");},ajaxSetup:function(target,settings){if(settings){ajaxExtend(target,jQuery.ajaxSettings);}else{settings=target;target=jQuery.ajaxSettings;}
+ajaxExtend(target,settings);return target;},ajaxSettings:{url:ajaxLocation,isLocal:rlocalProtocol.test(ajaxLocParts[1]),global:true,type:"GET",contentType:"application/x-www-form-urlencoded; charset=UTF-8",processData:true,async:true,accepts:{xml:"application/xml, text/xml",html:"text/html",text:"text/plain",json:"application/json, text/javascript","*":allTypes},contents:{xml:/xml/,html:/html/,json:/json/},responseFields:{xml:"responseXML",text:"responseText"},converters:{"* text":window.String,"text html":true,"text json":jQuery.parseJSON,"text xml":jQuery.parseXML},flatOptions:{context:true,url:true}},ajaxPrefilter:addToPrefiltersOrTransports(prefilters),ajaxTransport:addToPrefiltersOrTransports(transports),ajax:function(url,options){if(typeof url==="object"){options=url;url=undefined;}
+options=options||{};var
+s=jQuery.ajaxSetup({},options),callbackContext=s.context||s,globalEventContext=callbackContext!==s&&(callbackContext.nodeType||callbackContext instanceof jQuery)?jQuery(callbackContext):jQuery.event,deferred=jQuery.Deferred(),completeDeferred=jQuery.Callbacks("once memory"),statusCode=s.statusCode||{},ifModifiedKey,requestHeaders={},requestHeadersNames={},responseHeadersString,responseHeaders,transport,timeoutTimer,parts,state=0,fireGlobals,i,jqXHR={readyState:0,setRequestHeader:function(name,value){if(!state){var lname=name.toLowerCase();name=requestHeadersNames[lname]=requestHeadersNames[lname]||name;requestHeaders[name]=value;}
+return this;},getAllResponseHeaders:function(){return state===2?responseHeadersString:null;},getResponseHeader:function(key){var match;if(state===2){if(!responseHeaders){responseHeaders={};while((match=rheaders.exec(responseHeadersString))){responseHeaders[match[1].toLowerCase()]=match[2];}}
+match=responseHeaders[key.toLowerCase()];}
+return match===undefined?null:match;},overrideMimeType:function(type){if(!state){s.mimeType=type;}
+return this;},abort:function(statusText){statusText=statusText||"abort";if(transport){transport.abort(statusText);}
+done(0,statusText);return this;}};function done(status,nativeStatusText,responses,headers){if(state===2){return;}
+state=2;if(timeoutTimer){clearTimeout(timeoutTimer);}
+transport=undefined;responseHeadersString=headers||"";jqXHR.readyState=status>0?4:0;var isSuccess,success,error,statusText=nativeStatusText,response=responses?ajaxHandleResponses(s,jqXHR,responses):undefined,lastModified,etag;if(status>=200&&status<300||status===304){if(s.ifModified){if((lastModified=jqXHR.getResponseHeader("Last-Modified"))){jQuery.lastModified[ifModifiedKey]=lastModified;}
+if((etag=jqXHR.getResponseHeader("Etag"))){jQuery.etag[ifModifiedKey]=etag;}}
+if(status===304){statusText="notmodified";isSuccess=true;}else{try{success=ajaxConvert(s,response);statusText="success";isSuccess=true;}catch(e){statusText="parsererror";error=e;}}}else{error=statusText;if(!statusText||status){statusText="error";if(status<0){status=0;}}}
+jqXHR.status=status;jqXHR.statusText=""+(nativeStatusText||statusText);if(isSuccess){deferred.resolveWith(callbackContext,[success,statusText,jqXHR]);}else{deferred.rejectWith(callbackContext,[jqXHR,statusText,error]);}
+jqXHR.statusCode(statusCode);statusCode=undefined;if(fireGlobals){globalEventContext.trigger("ajax"+(isSuccess?"Success":"Error"),[jqXHR,s,isSuccess?success:error]);}
+completeDeferred.fireWith(callbackContext,[jqXHR,statusText]);if(fireGlobals){globalEventContext.trigger("ajaxComplete",[jqXHR,s]);if(!(--jQuery.active)){jQuery.event.trigger("ajaxStop");}}}
+deferred.promise(jqXHR);jqXHR.success=jqXHR.done;jqXHR.error=jqXHR.fail;jqXHR.complete=completeDeferred.add;jqXHR.statusCode=function(map){if(map){var tmp;if(state<2){for(tmp in map){statusCode[tmp]=[statusCode[tmp],map[tmp]];}}else{tmp=map[jqXHR.status];jqXHR.then(tmp,tmp);}}
+return this;};s.url=((url||s.url)+"").replace(rhash,"").replace(rprotocol,ajaxLocParts[1]+"//");s.dataTypes=jQuery.trim(s.dataType||"*").toLowerCase().split(rspacesAjax);if(s.crossDomain==null){parts=rurl.exec(s.url.toLowerCase());s.crossDomain=!!(parts&&(parts[1]!=ajaxLocParts[1]||parts[2]!=ajaxLocParts[2]||(parts[3]||(parts[1]==="http:"?80:443))!=(ajaxLocParts[3]||(ajaxLocParts[1]==="http:"?80:443))));}
+if(s.data&&s.processData&&typeof s.data!=="string"){s.data=jQuery.param(s.data,s.traditional);}
+inspectPrefiltersOrTransports(prefilters,s,options,jqXHR);if(state===2){return false;}
+fireGlobals=s.global;s.type=s.type.toUpperCase();s.hasContent=!rnoContent.test(s.type);if(fireGlobals&&jQuery.active++===0){jQuery.event.trigger("ajaxStart");}
+if(!s.hasContent){if(s.data){s.url+=(rquery.test(s.url)?"&":"?")+s.data;delete s.data;}
+ifModifiedKey=s.url;if(s.cache===false){var ts=jQuery.now(),ret=s.url.replace(rts,"$1_="+ts);s.url=ret+((ret===s.url)?(rquery.test(s.url)?"&":"?")+"_="+ts:"");}}
+if(s.data&&s.hasContent&&s.contentType!==false||options.contentType){jqXHR.setRequestHeader("Content-Type",s.contentType);}
+if(s.ifModified){ifModifiedKey=ifModifiedKey||s.url;if(jQuery.lastModified[ifModifiedKey]){jqXHR.setRequestHeader("If-Modified-Since",jQuery.lastModified[ifModifiedKey]);}
+if(jQuery.etag[ifModifiedKey]){jqXHR.setRequestHeader("If-None-Match",jQuery.etag[ifModifiedKey]);}}
+jqXHR.setRequestHeader("Accept",s.dataTypes[0]&&s.accepts[s.dataTypes[0]]?s.accepts[s.dataTypes[0]]+(s.dataTypes[0]!=="*"?", "+allTypes+"; q=0.01":""):s.accepts["*"]);for(i in s.headers){jqXHR.setRequestHeader(i,s.headers[i]);}
+if(s.beforeSend&&(s.beforeSend.call(callbackContext,jqXHR,s)===false||state===2)){jqXHR.abort();return false;}
+for(i in{success:1,error:1,complete:1}){jqXHR[i](s[i]);}
+transport=inspectPrefiltersOrTransports(transports,s,options,jqXHR);if(!transport){done(-1,"No Transport");}else{jqXHR.readyState=1;if(fireGlobals){globalEventContext.trigger("ajaxSend",[jqXHR,s]);}
+if(s.async&&s.timeout>0){timeoutTimer=setTimeout(function(){jqXHR.abort("timeout");},s.timeout);}
+try{state=1;transport.send(requestHeaders,done);}catch(e){if(state<2){done(-1,e);}else{throw e;}}}
+return jqXHR;},param:function(a,traditional){var s=[],add=function(key,value){value=jQuery.isFunction(value)?value():value;s[s.length]=encodeURIComponent(key)+"="+encodeURIComponent(value);};if(traditional===undefined){traditional=jQuery.ajaxSettings.traditional;}
+if(jQuery.isArray(a)||(a.jquery&&!jQuery.isPlainObject(a))){jQuery.each(a,function(){add(this.name,this.value);});}else{for(var prefix in a){buildParams(prefix,a[prefix],traditional,add);}}
+return s.join("&").replace(r20,"+");}});function buildParams(prefix,obj,traditional,add){if(jQuery.isArray(obj)){jQuery.each(obj,function(i,v){if(traditional||rbracket.test(prefix)){add(prefix,v);}else{buildParams(prefix+"["+(typeof v==="object"?i:"")+"]",v,traditional,add);}});}else if(!traditional&&jQuery.type(obj)==="object"){for(var name in obj){buildParams(prefix+"["+name+"]",obj[name],traditional,add);}}else{add(prefix,obj);}}
+jQuery.extend({active:0,lastModified:{},etag:{}});function ajaxHandleResponses(s,jqXHR,responses){var contents=s.contents,dataTypes=s.dataTypes,responseFields=s.responseFields,ct,type,finalDataType,firstDataType;for(type in responseFields){if(type in responses){jqXHR[responseFields[type]]=responses[type];}}
+while(dataTypes[0]==="*"){dataTypes.shift();if(ct===undefined){ct=s.mimeType||jqXHR.getResponseHeader("content-type");}}
+if(ct){for(type in contents){if(contents[type]&&contents[type].test(ct)){dataTypes.unshift(type);break;}}}
+if(dataTypes[0]in responses){finalDataType=dataTypes[0];}else{for(type in responses){if(!dataTypes[0]||s.converters[type+" "+dataTypes[0]]){finalDataType=type;break;}
+if(!firstDataType){firstDataType=type;}}
+finalDataType=finalDataType||firstDataType;}
+if(finalDataType){if(finalDataType!==dataTypes[0]){dataTypes.unshift(finalDataType);}
+return responses[finalDataType];}}
+function ajaxConvert(s,response){if(s.dataFilter){response=s.dataFilter(response,s.dataType);}
+var dataTypes=s.dataTypes,converters={},i,key,length=dataTypes.length,tmp,current=dataTypes[0],prev,conversion,conv,conv1,conv2;for(i=1;i<length;i++){if(i===1){for(key in s.converters){if(typeof key==="string"){converters[key.toLowerCase()]=s.converters[key];}}}
+prev=current;current=dataTypes[i];if(current==="*"){current=prev;}else if(prev!=="*"&&prev!==current){conversion=prev+" "+current;conv=converters[conversion]||converters["* "+current];if(!conv){conv2=undefined;for(conv1 in converters){tmp=conv1.split(" ");if(tmp[0]===prev||tmp[0]==="*"){conv2=converters[tmp[1]+" "+current];if(conv2){conv1=converters[conv1];if(conv1===true){conv=conv2;}else if(conv2===true){conv=conv1;}
+break;}}}}
+if(!(conv||conv2)){jQuery.error("No conversion from "+conversion.replace(" "," to "));}
+if(conv!==true){response=conv?conv(response):conv2(conv1(response));}}}
+return response;}
+var jsc=jQuery.now(),jsre=/(\=)\?(&|$)|\?\?/i;jQuery.ajaxSetup({jsonp:"callback",jsonpCallback:function(){return jQuery.expando+"_"+(jsc++);}});jQuery.ajaxPrefilter("json jsonp",function(s,originalSettings,jqXHR){var inspectData=(typeof s.data==="string")&&/^application\/x\-www\-form\-urlencoded/.test(s.contentType);if(s.dataTypes[0]==="jsonp"||s.jsonp!==false&&(jsre.test(s.url)||inspectData&&jsre.test(s.data))){var responseContainer,jsonpCallback=s.jsonpCallback=jQuery.isFunction(s.jsonpCallback)?s.jsonpCallback():s.jsonpCallback,previous=window[jsonpCallback],url=s.url,data=s.data,replace="$1"+jsonpCallback+"$2";if(s.jsonp!==false){url=url.replace(jsre,replace);if(s.url===url){if(inspectData){data=data.replace(jsre,replace);}
+if(s.data===data){url+=(/\?/.test(url)?"&":"?")+s.jsonp+"="+jsonpCallback;}}}
+s.url=url;s.data=data;window[jsonpCallback]=function(response){responseContainer=[response];};jqXHR.always(function(){window[jsonpCallback]=previous;if(responseContainer&&jQuery.isFunction(previous)){window[jsonpCallback](responseContainer[0]);}});s.converters["script json"]=function(){if(!responseContainer){jQuery.error(jsonpCallback+" was not called");}
+return responseContainer[0];};s.dataTypes[0]="json";return"script";}});jQuery.ajaxSetup({accepts:{script:"text/javascript, application/javascript, application/ecmascript, application/x-ecmascript"},contents:{script:/javascript|ecmascript/},converters:{"text script":function(text){jQuery.globalEval(text);return text;}}});jQuery.ajaxPrefilter("script",function(s){if(s.cache===undefined){s.cache=false;}
+if(s.crossDomain){s.type="GET";s.global=false;}});jQuery.ajaxTransport("script",function(s){if(s.crossDomain){var script,head=document.head||document.getElementsByTagName("head")[0]||document.documentElement;return{send:function(_,callback){script=document.createElement("script");script.async="async";if(s.scriptCharset){script.charset=s.scriptCharset;}
+script.src=s.url;script.onload=script.onreadystatechange=function(_,isAbort){if(isAbort||!script.readyState||/loaded|complete/.test(script.readyState)){script.onload=script.onreadystatechange=null;if(head&&script.parentNode){head.removeChild(script);}
+script=undefined;if(!isAbort){callback(200,"success");}}};head.insertBefore(script,head.firstChild);},abort:function(){if(script){script.onload(0,1);}}};}});var
+xhrOnUnloadAbort=window.ActiveXObject?function(){for(var key in xhrCallbacks){xhrCallbacks[key](0,1);}}:false,xhrId=0,xhrCallbacks;function createStandardXHR(){try{return new window.XMLHttpRequest();}catch(e){}}
+function createActiveXHR(){try{return new window.ActiveXObject("Microsoft.XMLHTTP");}catch(e){}}
+jQuery.ajaxSettings.xhr=window.ActiveXObject?function(){return!this.isLocal&&createStandardXHR()||createActiveXHR();}:createStandardXHR;(function(xhr){jQuery.extend(jQuery.support,{ajax:!!xhr,cors:!!xhr&&("withCredentials"in xhr)});})(jQuery.ajaxSettings.xhr());if(jQuery.support.ajax){jQuery.ajaxTransport(function(s){if(!s.crossDomain||jQuery.support.cors){var callback;return{send:function(headers,complete){var xhr=s.xhr(),handle,i;if(s.username){xhr.open(s.type,s.url,s.async,s.username,s.password);}else{xhr.open(s.type,s.url,s.async);}
+if(s.xhrFields){for(i in s.xhrFields){xhr[i]=s.xhrFields[i];}}
+if(s.mimeType&&xhr.overrideMimeType){xhr.overrideMimeType(s.mimeType);}
+if(!s.crossDomain&&!headers["X-Requested-With"]){headers["X-Requested-With"]="XMLHttpRequest";}
+try{for(i in headers){xhr.setRequestHeader(i,headers[i]);}}catch(_){}
+xhr.send((s.hasContent&&s.data)||null);callback=function(_,isAbort){var status,statusText,responseHeaders,responses,xml;try{if(callback&&(isAbort||xhr.readyState===4)){callback=undefined;if(handle){xhr.onreadystatechange=jQuery.noop;if(xhrOnUnloadAbort){delete xhrCallbacks[handle];}}
+if(isAbort){if(xhr.readyState!==4){xhr.abort();}}else{status=xhr.status;responseHeaders=xhr.getAllResponseHeaders();responses={};xml=xhr.responseXML;if(xml&&xml.documentElement){responses.xml=xml;}
+try{responses.text=xhr.responseText;}catch(_){}
+try{statusText=xhr.statusText;}catch(e){statusText="";}
+if(!status&&s.isLocal&&!s.crossDomain){status=responses.text?200:404;}else if(status===1223){status=204;}}}}catch(firefoxAccessException){if(!isAbort){complete(-1,firefoxAccessException);}}
+if(responses){complete(status,statusText,responses,responseHeaders);}};if(!s.async||xhr.readyState===4){callback();}else{handle=++xhrId;if(xhrOnUnloadAbort){if(!xhrCallbacks){xhrCallbacks={};jQuery(window).unload(xhrOnUnloadAbort);}
+xhrCallbacks[handle]=callback;}
+xhr.onreadystatechange=callback;}},abort:function(){if(callback){callback(0,1);}}};}});}
+var elemdisplay={},iframe,iframeDoc,rfxtypes=/^(?:toggle|show|hide)$/,rfxnum=/^([+\-]=)?([\d+.\-]+)([a-z%]*)$/i,timerId,fxAttrs=[["height","marginTop","marginBottom","paddingTop","paddingBottom"],["width","marginLeft","marginRight","paddingLeft","paddingRight"],["opacity"]],fxNow;jQuery.fn.extend({show:function(speed,easing,callback){var elem,display;if(speed||speed===0){return this.animate(genFx("show",3),speed,easing,callback);}else{for(var i=0,j=this.length;i<j;i++){elem=this[i];if(elem.style){display=elem.style.display;if(!jQuery._data(elem,"olddisplay")&&display==="none"){display=elem.style.display="";}
+if((display===""&&jQuery.css(elem,"display")==="none")||!jQuery.contains(elem.ownerDocument.documentElement,elem)){jQuery._data(elem,"olddisplay",defaultDisplay(elem.nodeName));}}}
+for(i=0;i<j;i++){elem=this[i];if(elem.style){display=elem.style.display;if(display===""||display==="none"){elem.style.display=jQuery._data(elem,"olddisplay")||"";}}}
+return this;}},hide:function(speed,easing,callback){if(speed||speed===0){return this.animate(genFx("hide",3),speed,easing,callback);}else{var elem,display,i=0,j=this.length;for(;i<j;i++){elem=this[i];if(elem.style){display=jQuery.css(elem,"display");if(display!=="none"&&!jQuery._data(elem,"olddisplay")){jQuery._data(elem,"olddisplay",display);}}}
+for(i=0;i<j;i++){if(this[i].style){this[i].style.display="none";}}
+return this;}},_toggle:jQuery.fn.toggle,toggle:function(fn,fn2,callback){var bool=typeof fn==="boolean";if(jQuery.isFunction(fn)&&jQuery.isFunction(fn2)){this._toggle.apply(this,arguments);}else if(fn==null||bool){this.each(function(){var state=bool?fn:jQuery(this).is(":hidden");jQuery(this)[state?"show":"hide"]();});}else{this.animate(genFx("toggle",3),fn,fn2,callback);}
+return this;},fadeTo:function(speed,to,easing,callback){return this.filter(":hidden").css("opacity",0).show().end().animate({opacity:to},speed,easing,callback);},animate:function(prop,speed,easing,callback){var optall=jQuery.speed(speed,easing,callback);if(jQuery.isEmptyObject(prop)){return this.each(optall.complete,[false]);}
+prop=jQuery.extend({},prop);function doAnimation(){if(optall.queue===false){jQuery._mark(this);}
+var opt=jQuery.extend({},optall),isElement=this.nodeType===1,hidden=isElement&&jQuery(this).is(":hidden"),name,val,p,e,hooks,replace,parts,start,end,unit,method;opt.animatedProperties={};for(p in prop){name=jQuery.camelCase(p);if(p!==name){prop[name]=prop[p];delete prop[p];}
+if((hooks=jQuery.cssHooks[name])&&"expand"in hooks){replace=hooks.expand(prop[name]);delete prop[name];for(p in replace){if(!(p in prop)){prop[p]=replace[p];}}}}
+for(name in prop){val=prop[name];if(jQuery.isArray(val)){opt.animatedProperties[name]=val[1];val=prop[name]=val[0];}else{opt.animatedProperties[name]=opt.specialEasing&&opt.specialEasing[name]||opt.easing||'swing';}
+if(val==="hide"&&hidden||val==="show"&&!hidden){return opt.complete.call(this);}
+if(isElement&&(name==="height"||name==="width")){opt.overflow=[this.style.overflow,this.style.overflowX,this.style.overflowY];if(jQuery.css(this,"display")==="inline"&&jQuery.css(this,"float")==="none"){if(!jQuery.support.inlineBlockNeedsLayout||defaultDisplay(this.nodeName)==="inline"){this.style.display="inline-block";}else{this.style.zoom=1;}}}}
+if(opt.overflow!=null){this.style.overflow="hidden";}
+for(p in prop){e=new jQuery.fx(this,opt,p);val=prop[p];if(rfxtypes.test(val)){method=jQuery._data(this,"toggle"+p)||(val==="toggle"?hidden?"show":"hide":0);if(method){jQuery._data(this,"toggle"+p,method==="show"?"hide":"show");e[method]();}else{e[val]();}}else{parts=rfxnum.exec(val);start=e.cur();if(parts){end=parseFloat(parts[2]);unit=parts[3]||(jQuery.cssNumber[p]?"":"px");if(unit!=="px"){jQuery.style(this,p,(end||1)+unit);start=((end||1)/e.cur())*start;jQuery.style(this,p,start+unit);}
+if(parts[1]){end=((parts[1]==="-="?-1:1)*end)+start;}
+e.custom(start,end,unit);}else{e.custom(start,val,"");}}}
+return true;}
+return optall.queue===false?this.each(doAnimation):this.queue(optall.queue,doAnimation);},stop:function(type,clearQueue,gotoEnd){if(typeof type!=="string"){gotoEnd=clearQueue;clearQueue=type;type=undefined;}
+if(clearQueue&&type!==false){this.queue(type||"fx",[]);}
+return this.each(function(){var index,hadTimers=false,timers=jQuery.timers,data=jQuery._data(this);if(!gotoEnd){jQuery._unmark(true,this);}
+function stopQueue(elem,data,index){var hooks=data[index];jQuery.removeData(elem,index,true);hooks.stop(gotoEnd);}
+if(type==null){for(index in data){if(data[index]&&data[index].stop&&index.indexOf(".run")===index.length-4){stopQueue(this,data,index);}}}else if(data[index=type+".run"]&&data[index].stop){stopQueue(this,data,index);}
+for(index=timers.length;index--;){if(timers[index].elem===this&&(type==null||timers[index].queue===type)){if(gotoEnd){timers[index](true);}else{timers[index].saveState();}
+hadTimers=true;timers.splice(index,1);}}
+if(!(gotoEnd&&hadTimers)){jQuery.dequeue(this,type);}});}});function createFxNow(){setTimeout(clearFxNow,0);return(fxNow=jQuery.now());}
+function clearFxNow(){fxNow=undefined;}
+function genFx(type,num){var obj={};jQuery.each(fxAttrs.concat.apply([],fxAttrs.slice(0,num)),function(){obj[this]=type;});return obj;}
+jQuery.each({slideDown:genFx("show",1),slideUp:genFx("hide",1),slideToggle:genFx("toggle",1),fadeIn:{opacity:"show"},fadeOut:{opacity:"hide"},fadeToggle:{opacity:"toggle"}},function(name,props){jQuery.fn[name]=function(speed,easing,callback){return this.animate(props,speed,easing,callback);};});jQuery.extend({speed:function(speed,easing,fn){var opt=speed&&typeof speed==="object"?jQuery.extend({},speed):{complete:fn||!fn&&easing||jQuery.isFunction(speed)&&speed,duration:speed,easing:fn&&easing||easing&&!jQuery.isFunction(easing)&&easing};opt.duration=jQuery.fx.off?0:typeof opt.duration==="number"?opt.duration:opt.duration in jQuery.fx.speeds?jQuery.fx.speeds[opt.duration]:jQuery.fx.speeds._default;if(opt.queue==null||opt.queue===true){opt.queue="fx";}
+opt.old=opt.complete;opt.complete=function(noUnmark){if(jQuery.isFunction(opt.old)){opt.old.call(this);}
+if(opt.queue){jQuery.dequeue(this,opt.queue);}else if(noUnmark!==false){jQuery._unmark(this);}};return opt;},easing:{linear:function(p){return p;},swing:function(p){return(-Math.cos(p*Math.PI)/2)+0.5;}},timers:[],fx:function(elem,options,prop){this.options=options;this.elem=elem;this.prop=prop;options.orig=options.orig||{};}});jQuery.fx.prototype={update:function(){if(this.options.step){this.options.step.call(this.elem,this.now,this);}
+(jQuery.fx.step[this.prop]||jQuery.fx.step._default)(this);},cur:function(){if(this.elem[this.prop]!=null&&(!this.elem.style||this.elem.style[this.prop]==null)){return this.elem[this.prop];}
+var parsed,r=jQuery.css(this.elem,this.prop);return isNaN(parsed=parseFloat(r))?!r||r==="auto"?0:r:parsed;},custom:function(from,to,unit){var self=this,fx=jQuery.fx;this.startTime=fxNow||createFxNow();this.end=to;this.now=this.start=from;this.pos=this.state=0;this.unit=unit||this.unit||(jQuery.cssNumber[this.prop]?"":"px");function t(gotoEnd){return self.step(gotoEnd);}
+t.queue=this.options.queue;t.elem=this.elem;t.saveState=function(){if(jQuery._data(self.elem,"fxshow"+self.prop)===undefined){if(self.options.hide){jQuery._data(self.elem,"fxshow"+self.prop,self.start);}else if(self.options.show){jQuery._data(self.elem,"fxshow"+self.prop,self.end);}}};if(t()&&jQuery.timers.push(t)&&!timerId){timerId=setInterval(fx.tick,fx.interval);}},show:function(){var dataShow=jQuery._data(this.elem,"fxshow"+this.prop);this.options.orig[this.prop]=dataShow||jQuery.style(this.elem,this.prop);this.options.show=true;if(dataShow!==undefined){this.custom(this.cur(),dataShow);}else{this.custom(this.prop==="width"||this.prop==="height"?1:0,this.cur());}
+jQuery(this.elem).show();},hide:function(){this.options.orig[this.prop]=jQuery._data(this.elem,"fxshow"+this.prop)||jQuery.style(this.elem,this.prop);this.options.hide=true;this.custom(this.cur(),0);},step:function(gotoEnd){var p,n,complete,t=fxNow||createFxNow(),done=true,elem=this.elem,options=this.options;if(gotoEnd||t>=options.duration+this.startTime){this.now=this.end;this.pos=this.state=1;this.update();options.animatedProperties[this.prop]=true;for(p in options.animatedProperties){if(options.animatedProperties[p]!==true){done=false;}}
+if(done){if(options.overflow!=null&&!jQuery.support.shrinkWrapBlocks){jQuery.each(["","X","Y"],function(index,value){elem.style["overflow"+value]=options.overflow[index];});}
+if(options.hide){jQuery(elem).hide();}
+if(options.hide||options.show){for(p in options.animatedProperties){jQuery.style(elem,p,options.orig[p]);jQuery.removeData(elem,"fxshow"+p,true);jQuery.removeData(elem,"toggle"+p,true);}}
+complete=options.complete;if(complete){options.complete=false;complete.call(elem);}}
+return false;}else{if(options.duration==Infinity){this.now=t;}else{n=t-this.startTime;this.state=n/options.duration;this.pos=jQuery.easing[options.animatedProperties[this.prop]](this.state,n,0,1,options.duration);this.now=this.start+((this.end-this.start)*this.pos);}
+this.update();}
+return true;}};jQuery.extend(jQuery.fx,{tick:function(){var timer,timers=jQuery.timers,i=0;for(;i<timers.length;i++){timer=timers[i];if(!timer()&&timers[i]===timer){timers.splice(i--,1);}}
+if(!timers.length){jQuery.fx.stop();}},interval:13,stop:function(){clearInterval(timerId);timerId=null;},speeds:{slow:600,fast:200,_default:400},step:{opacity:function(fx){jQuery.style(fx.elem,"opacity",fx.now);},_default:function(fx){if(fx.elem.style&&fx.elem.style[fx.prop]!=null){fx.elem.style[fx.prop]=fx.now+fx.unit;}else{fx.elem[fx.prop]=fx.now;}}}});jQuery.each(fxAttrs.concat.apply([],fxAttrs),function(i,prop){if(prop.indexOf("margin")){jQuery.fx.step[prop]=function(fx){jQuery.style(fx.elem,prop,Math.max(0,fx.now)+fx.unit);};}});if(jQuery.expr&&jQuery.expr.filters){jQuery.expr.filters.animated=function(elem){return jQuery.grep(jQuery.timers,function(fn){return elem===fn.elem;}).length;};}
+function defaultDisplay(nodeName){if(!elemdisplay[nodeName]){var body=document.body,elem=jQuery("<"+nodeName+">").appendTo(body),display=elem.css("display");elem.remove();if(display==="none"||display===""){if(!iframe){iframe=document.createElement("iframe");iframe.frameBorder=iframe.width=iframe.height=0;}
+body.appendChild(iframe);if(!iframeDoc||!iframe.createElement){iframeDoc=(iframe.contentWindow||iframe.contentDocument).document;iframeDoc.write((jQuery.support.boxModel?"<!doctype html>":"")+"<html><body>");iframeDoc.close();}
+elem=iframeDoc.createElement(nodeName);iframeDoc.body.appendChild(elem);display=jQuery.css(elem,"display");body.removeChild(iframe);}
+elemdisplay[nodeName]=display;}
+return elemdisplay[nodeName];}
+var getOffset,rtable=/^t(?:able|d|h)$/i,rroot=/^(?:body|html)$/i;if("getBoundingClientRect"in document.documentElement){getOffset=function(elem,doc,docElem,box){try{box=elem.getBoundingClientRect();}catch(e){}
+if(!box||!jQuery.contains(docElem,elem)){return box?{top:box.top,left:box.left}:{top:0,left:0};}
+var body=doc.body,win=getWindow(doc),clientTop=docElem.clientTop||body.clientTop||0,clientLeft=docElem.clientLeft||body.clientLeft||0,scrollTop=win.pageYOffset||jQuery.support.boxModel&&docElem.scrollTop||body.scrollTop,scrollLeft=win.pageXOffset||jQuery.support.boxModel&&docElem.scrollLeft||body.scrollLeft,top=box.top+scrollTop-clientTop,left=box.left+scrollLeft-clientLeft;return{top:top,left:left};};}else{getOffset=function(elem,doc,docElem){var computedStyle,offsetParent=elem.offsetParent,prevOffsetParent=elem,body=doc.body,defaultView=doc.defaultView,prevComputedStyle=defaultView?defaultView.getComputedStyle(elem,null):elem.currentStyle,top=elem.offsetTop,left=elem.offsetLeft;while((elem=elem.parentNode)&&elem!==body&&elem!==docElem){if(jQuery.support.fixedPosition&&prevComputedStyle.position==="fixed"){break;}
+computedStyle=defaultView?defaultView.getComputedStyle(elem,null):elem.currentStyle;top-=elem.scrollTop;left-=elem.scrollLeft;if(elem===offsetParent){top+=elem.offsetTop;left+=elem.offsetLeft;if(jQuery.support.doesNotAddBorder&&!(jQuery.support.doesAddBorderForTableAndCells&&rtable.test(elem.nodeName))){top+=parseFloat(computedStyle.borderTopWidth)||0;left+=parseFloat(computedStyle.borderLeftWidth)||0;}
+prevOffsetParent=offsetParent;offsetParent=elem.offsetParent;}
+if(jQuery.support.subtractsBorderForOverflowNotVisible&&computedStyle.overflow!=="visible"){top+=parseFloat(computedStyle.borderTopWidth)||0;left+=parseFloat(computedStyle.borderLeftWidth)||0;}
+prevComputedStyle=computedStyle;}
+if(prevComputedStyle.position==="relative"||prevComputedStyle.position==="static"){top+=body.offsetTop;left+=body.offsetLeft;}
+if(jQuery.support.fixedPosition&&prevComputedStyle.position==="fixed"){top+=Math.max(docElem.scrollTop,body.scrollTop);left+=Math.max(docElem.scrollLeft,body.scrollLeft);}
+return{top:top,left:left};};}
+jQuery.fn.offset=function(options){if(arguments.length){return options===undefined?this:this.each(function(i){jQuery.offset.setOffset(this,options,i);});}
+var elem=this[0],doc=elem&&elem.ownerDocument;if(!doc){return null;}
+if(elem===doc.body){return jQuery.offset.bodyOffset(elem);}
+return getOffset(elem,doc,doc.documentElement);};jQuery.offset={bodyOffset:function(body){var top=body.offsetTop,left=body.offsetLeft;if(jQuery.support.doesNotIncludeMarginInBodyOffset){top+=parseFloat(jQuery.css(body,"marginTop"))||0;left+=parseFloat(jQuery.css(body,"marginLeft"))||0;}
+return{top:top,left:left};},setOffset:function(elem,options,i){var position=jQuery.css(elem,"position");if(position==="static"){elem.style.position="relative";}
+var curElem=jQuery(elem),curOffset=curElem.offset(),curCSSTop=jQuery.css(elem,"top"),curCSSLeft=jQuery.css(elem,"left"),calculatePosition=(position==="absolute"||position==="fixed")&&jQuery.inArray("auto",[curCSSTop,curCSSLeft])>-1,props={},curPosition={},curTop,curLeft;if(calculatePosition){curPosition=curElem.position();curTop=curPosition.top;curLeft=curPosition.left;}else{curTop=parseFloat(curCSSTop)||0;curLeft=parseFloat(curCSSLeft)||0;}
+if(jQuery.isFunction(options)){options=options.call(elem,i,curOffset);}
+if(options.top!=null){props.top=(options.top-curOffset.top)+curTop;}
+if(options.left!=null){props.left=(options.left-curOffset.left)+curLeft;}
+if("using"in options){options.using.call(elem,props);}else{curElem.css(props);}}};jQuery.fn.extend({position:function(){if(!this[0]){return null;}
+var elem=this[0],offsetParent=this.offsetParent(),offset=this.offset(),parentOffset=rroot.test(offsetParent[0].nodeName)?{top:0,left:0}:offsetParent.offset();offset.top-=parseFloat(jQuery.css(elem,"marginTop"))||0;offset.left-=parseFloat(jQuery.css(elem,"marginLeft"))||0;parentOffset.top+=parseFloat(jQuery.css(offsetParent[0],"borderTopWidth"))||0;parentOffset.left+=parseFloat(jQuery.css(offsetParent[0],"borderLeftWidth"))||0;return{top:offset.top-parentOffset.top,left:offset.left-parentOffset.left};},offsetParent:function(){return this.map(function(){var offsetParent=this.offsetParent||document.body;while(offsetParent&&(!rroot.test(offsetParent.nodeName)&&jQuery.css(offsetParent,"position")==="static")){offsetParent=offsetParent.offsetParent;}
+return offsetParent;});}});jQuery.each({scrollLeft:"pageXOffset",scrollTop:"pageYOffset"},function(method,prop){var top=/Y/.test(prop);jQuery.fn[method]=function(val){return jQuery.access(this,function(elem,method,val){var win=getWindow(elem);if(val===undefined){return win?(prop in win)?win[prop]:jQuery.support.boxModel&&win.document.documentElement[method]||win.document.body[method]:elem[method];}
+if(win){win.scrollTo(!top?val:jQuery(win).scrollLeft(),top?val:jQuery(win).scrollTop());}else{elem[method]=val;}},method,val,arguments.length,null);};});function getWindow(elem){return jQuery.isWindow(elem)?elem:elem.nodeType===9?elem.defaultView||elem.parentWindow:false;}
+jQuery.each({Height:"height",Width:"width"},function(name,type){var clientProp="client"+name,scrollProp="scroll"+name,offsetProp="offset"+name;jQuery.fn["inner"+name]=function(){var elem=this[0];return elem?elem.style?parseFloat(jQuery.css(elem,type,"padding")):this[type]():null;};jQuery.fn["outer"+name]=function(margin){var elem=this[0];return elem?elem.style?parseFloat(jQuery.css(elem,type,margin?"margin":"border")):this[type]():null;};jQuery.fn[type]=function(value){return jQuery.access(this,function(elem,type,value){var doc,docElemProp,orig,ret;if(jQuery.isWindow(elem)){doc=elem.document;docElemProp=doc.documentElement[clientProp];return jQuery.support.boxModel&&docElemProp||doc.body&&doc.body[clientProp]||docElemProp;}
+if(elem.nodeType===9){doc=elem.documentElement;if(doc[clientProp]>=doc[scrollProp]){return doc[clientProp];}
+return Math.max(elem.body[scrollProp],doc[scrollProp],elem.body[offsetProp],doc[offsetProp]);}
+if(value===undefined){orig=jQuery.css(elem,type);ret=parseFloat(orig);return jQuery.isNumeric(ret)?ret:orig;}
+jQuery(elem).css(type,value);},type,value,arguments.length,null);};});window.jQuery=window.$=jQuery;if(typeof define==="function"&&define.amd&&define.amd.jQuery){define("jquery",[],function(){return jQuery;});}})(window);(function($,undefined){$.ui=$.ui||{};if($.ui.version){return;}
+$.extend($.ui,{version:"1.8.18",keyCode:{ALT:18,BACKSPACE:8,CAPS_LOCK:20,COMMA:188,COMMAND:91,COMMAND_LEFT:91,COMMAND_RIGHT:93,CONTROL:17,DELETE:46,DOWN:40,END:35,ENTER:13,ESCAPE:27,HOME:36,INSERT:45,LEFT:37,MENU:93,NUMPAD_ADD:107,NUMPAD_DECIMAL:110,NUMPAD_DIVIDE:111,NUMPAD_ENTER:108,NUMPAD_MULTIPLY:106,NUMPAD_SUBTRACT:109,PAGE_DOWN:34,PAGE_UP:33,PERIOD:190,RIGHT:39,SHIFT:16,SPACE:32,TAB:9,UP:38,WINDOWS:91}});$.fn.extend({propAttr:$.fn.prop||$.fn.attr,_focus:$.fn.focus,focus:function(delay,fn){return typeof delay==="number"?this.each(function(){var elem=this;setTimeout(function(){$(elem).focus();if(fn){fn.call(elem);}},delay);}):this._focus.apply(this,arguments);},scrollParent:function(){var scrollParent;if(($.browser.msie&&(/(static|relative)/).test(this.css('position')))||(/absolute/).test(this.css('position'))){scrollParent=this.parents().filter(function(){return(/(relative|absolute|fixed)/).test($.curCSS(this,'position',1))&&(/(auto|scroll)/).test($.curCSS(this,'overflow',1)+$.curCSS(this,'overflow-y',1)+$.curCSS(this,'overflow-x',1));}).eq(0);}else{scrollParent=this.parents().filter(function(){return(/(auto|scroll)/).test($.curCSS(this,'overflow',1)+$.curCSS(this,'overflow-y',1)+$.curCSS(this,'overflow-x',1));}).eq(0);}
+return(/fixed/).test(this.css('position'))||!scrollParent.length?$(document):scrollParent;},zIndex:function(zIndex){if(zIndex!==undefined){return this.css("zIndex",zIndex);}
+if(this.length){var elem=$(this[0]),position,value;while(elem.length&&elem[0]!==document){position=elem.css("position");if(position==="absolute"||position==="relative"||position==="fixed"){value=parseInt(elem.css("zIndex"),10);if(!isNaN(value)&&value!==0){return value;}}
+elem=elem.parent();}}
+return 0;},disableSelection:function(){return this.bind(($.support.selectstart?"selectstart":"mousedown")+".ui-disableSelection",function(event){event.preventDefault();});},enableSelection:function(){return this.unbind(".ui-disableSelection");}});$.each(["Width","Height"],function(i,name){var side=name==="Width"?["Left","Right"]:["Top","Bottom"],type=name.toLowerCase(),orig={innerWidth:$.fn.innerWidth,innerHeight:$.fn.innerHeight,outerWidth:$.fn.outerWidth,outerHeight:$.fn.outerHeight};function reduce(elem,size,border,margin){$.each(side,function(){size-=parseFloat($.curCSS(elem,"padding"+this,true))||0;if(border){size-=parseFloat($.curCSS(elem,"border"+this+"Width",true))||0;}
+if(margin){size-=parseFloat($.curCSS(elem,"margin"+this,true))||0;}});return size;}
+$.fn["inner"+name]=function(size){if(size===undefined){return orig["inner"+name].call(this);}
+return this.each(function(){$(this).css(type,reduce(this,size)+"px");});};$.fn["outer"+name]=function(size,margin){if(typeof size!=="number"){return orig["outer"+name].call(this,size);}
+return this.each(function(){$(this).css(type,reduce(this,size,true,margin)+"px");});};});function focusable(element,isTabIndexNotNaN){var nodeName=element.nodeName.toLowerCase();if("area"===nodeName){var map=element.parentNode,mapName=map.name,img;if(!element.href||!mapName||map.nodeName.toLowerCase()!=="map"){return false;}
+img=$("img[usemap=#"+mapName+"]")[0];return!!img&&visible(img);}
+return(/input|select|textarea|button|object/.test(nodeName)?!element.disabled:"a"==nodeName?element.href||isTabIndexNotNaN:isTabIndexNotNaN)&&visible(element);}
+function visible(element){return!$(element).parents().andSelf().filter(function(){return $.curCSS(this,"visibility")==="hidden"||$.expr.filters.hidden(this);}).length;}
+$.extend($.expr[":"],{data:function(elem,i,match){return!!$.data(elem,match[3]);},focusable:function(element){return focusable(element,!isNaN($.attr(element,"tabindex")));},tabbable:function(element){var tabIndex=$.attr(element,"tabindex"),isTabIndexNaN=isNaN(tabIndex);return(isTabIndexNaN||tabIndex>=0)&&focusable(element,!isTabIndexNaN);}});$(function(){var body=document.body,div=body.appendChild(div=document.createElement("div"));div.offsetHeight;$.extend(div.style,{minHeight:"100px",height:"auto",padding:0,borderWidth:0});$.support.minHeight=div.offsetHeight===100;$.support.selectstart="onselectstart"in div;body.removeChild(div).style.display="none";});$.extend($.ui,{plugin:{add:function(module,option,set){var proto=$.ui[module].prototype;for(var i in set){proto.plugins[i]=proto.plugins[i]||[];proto.plugins[i].push([option,set[i]]);}},call:function(instance,name,args){var set=instance.plugins[name];if(!set||!instance.element[0].parentNode){return;}
+for(var i=0;i<set.length;i++){if(instance.options[set[i][0]]){set[i][1].apply(instance.element,args);}}}},contains:function(a,b){return document.compareDocumentPosition?a.compareDocumentPosition(b)&16:a!==b&&a.contains(b);},hasScroll:function(el,a){if($(el).css("overflow")==="hidden"){return false;}
+var scroll=(a&&a==="left")?"scrollLeft":"scrollTop",has=false;if(el[scroll]>0){return true;}
+el[scroll]=1;has=(el[scroll]>0);el[scroll]=0;return has;},isOverAxis:function(x,reference,size){return(x>reference)&&(x<(reference+size));},isOver:function(y,x,top,left,height,width){return $.ui.isOverAxis(y,top,height)&&$.ui.isOverAxis(x,left,width);}});})(jQuery);(function($,undefined){if($.cleanData){var _cleanData=$.cleanData;$.cleanData=function(elems){for(var i=0,elem;(elem=elems[i])!=null;i++){try{$(elem).triggerHandler("remove");}catch(e){}}
+_cleanData(elems);};}else{var _remove=$.fn.remove;$.fn.remove=function(selector,keepData){return this.each(function(){if(!keepData){if(!selector||$.filter(selector,[this]).length){$("*",this).add([this]).each(function(){try{$(this).triggerHandler("remove");}catch(e){}});}}
+return _remove.call($(this),selector,keepData);});};}
+$.widget=function(name,base,prototype){var namespace=name.split(".")[0],fullName;name=name.split(".")[1];fullName=namespace+"-"+name;if(!prototype){prototype=base;base=$.Widget;}
+$.expr[":"][fullName]=function(elem){return!!$.data(elem,name);};$[namespace]=$[namespace]||{};$[namespace][name]=function(options,element){if(arguments.length){this._createWidget(options,element);}};var basePrototype=new base();basePrototype.options=$.extend(true,{},basePrototype.options);$[namespace][name].prototype=$.extend(true,basePrototype,{namespace:namespace,widgetName:name,widgetEventPrefix:$[namespace][name].prototype.widgetEventPrefix||name,widgetBaseClass:fullName},prototype);$.widget.bridge(name,$[namespace][name]);};$.widget.bridge=function(name,object){$.fn[name]=function(options){var isMethodCall=typeof options==="string",args=Array.prototype.slice.call(arguments,1),returnValue=this;options=!isMethodCall&&args.length?$.extend.apply(null,[true,options].concat(args)):options;if(isMethodCall&&options.charAt(0)==="_"){return returnValue;}
+if(isMethodCall){this.each(function(){var instance=$.data(this,name),methodValue=instance&&$.isFunction(instance[options])?instance[options].apply(instance,args):instance;if(methodValue!==instance&&methodValue!==undefined){returnValue=methodValue;return false;}});}else{this.each(function(){var instance=$.data(this,name);if(instance){instance.option(options||{})._init();}else{$.data(this,name,new object(options,this));}});}
+return returnValue;};};$.Widget=function(options,element){if(arguments.length){this._createWidget(options,element);}};$.Widget.prototype={widgetName:"widget",widgetEventPrefix:"",options:{disabled:false},_createWidget:function(options,element){$.data(element,this.widgetName,this);this.element=$(element);this.options=$.extend(true,{},this.options,this._getCreateOptions(),options);var self=this;this.element.bind("remove."+this.widgetName,function(){self.destroy();});this._create();this._trigger("create");this._init();},_getCreateOptions:function(){return $.metadata&&$.metadata.get(this.element[0])[this.widgetName];},_create:function(){},_init:function(){},destroy:function(){this.element.unbind("."+this.widgetName).removeData(this.widgetName);this.widget().unbind("."+this.widgetName).removeAttr("aria-disabled").removeClass(this.widgetBaseClass+"-disabled "+"ui-state-disabled");},widget:function(){return this.element;},option:function(key,value){var options=key;if(arguments.length===0){return $.extend({},this.options);}
+if(typeof key==="string"){if(value===undefined){return this.options[key];}
+options={};options[key]=value;}
+this._setOptions(options);return this;},_setOptions:function(options){var self=this;$.each(options,function(key,value){self._setOption(key,value);});return this;},_setOption:function(key,value){this.options[key]=value;if(key==="disabled"){this.widget()
+[value?"addClass":"removeClass"](this.widgetBaseClass+"-disabled"+" "+"ui-state-disabled").attr("aria-disabled",value);}
+return this;},enable:function(){return this._setOption("disabled",false);},disable:function(){return this._setOption("disabled",true);},_trigger:function(type,event,data){var prop,orig,callback=this.options[type];data=data||{};event=$.Event(event);event.type=(type===this.widgetEventPrefix?type:this.widgetEventPrefix+type).toLowerCase();event.target=this.element[0];orig=event.originalEvent;if(orig){for(prop in orig){if(!(prop in event)){event[prop]=orig[prop];}}}
+this.element.trigger(event,data);return!($.isFunction(callback)&&callback.call(this.element[0],event,data)===false||event.isDefaultPrevented());}};})(jQuery);(function($,undefined){var mouseHandled=false;$(document).mouseup(function(e){mouseHandled=false;});$.widget("ui.mouse",{options:{cancel:':input,option',distance:1,delay:0},_mouseInit:function(){var self=this;this.element.bind('mousedown.'+this.widgetName,function(event){return self._mouseDown(event);}).bind('click.'+this.widgetName,function(event){if(true===$.data(event.target,self.widgetName+'.preventClickEvent')){$.removeData(event.target,self.widgetName+'.preventClickEvent');event.stopImmediatePropagation();return false;}});this.started=false;},_mouseDestroy:function(){this.element.unbind('.'+this.widgetName);},_mouseDown:function(event){if(mouseHandled){return};(this._mouseStarted&&this._mouseUp(event));this._mouseDownEvent=event;var self=this,btnIsLeft=(event.which==1),elIsCancel=(typeof this.options.cancel=="string"&&event.target.nodeName?$(event.target).closest(this.options.cancel).length:false);if(!btnIsLeft||elIsCancel||!this._mouseCapture(event)){return true;}
+this.mouseDelayMet=!this.options.delay;if(!this.mouseDelayMet){this._mouseDelayTimer=setTimeout(function(){self.mouseDelayMet=true;},this.options.delay);}
+if(this._mouseDistanceMet(event)&&this._mouseDelayMet(event)){this._mouseStarted=(this._mouseStart(event)!==false);if(!this._mouseStarted){event.preventDefault();return true;}}
+if(true===$.data(event.target,this.widgetName+'.preventClickEvent')){$.removeData(event.target,this.widgetName+'.preventClickEvent');}
+this._mouseMoveDelegate=function(event){return self._mouseMove(event);};this._mouseUpDelegate=function(event){return self._mouseUp(event);};$(document).bind('mousemove.'+this.widgetName,this._mouseMoveDelegate).bind('mouseup.'+this.widgetName,this._mouseUpDelegate);event.preventDefault();mouseHandled=true;return true;},_mouseMove:function(event){if($.browser.msie&&!(document.documentMode>=9)&&!event.button){return this._mouseUp(event);}
+if(this._mouseStarted){this._mouseDrag(event);return event.preventDefault();}
+if(this._mouseDistanceMet(event)&&this._mouseDelayMet(event)){this._mouseStarted=(this._mouseStart(this._mouseDownEvent,event)!==false);(this._mouseStarted?this._mouseDrag(event):this._mouseUp(event));}
+return!this._mouseStarted;},_mouseUp:function(event){$(document).unbind('mousemove.'+this.widgetName,this._mouseMoveDelegate).unbind('mouseup.'+this.widgetName,this._mouseUpDelegate);if(this._mouseStarted){this._mouseStarted=false;if(event.target==this._mouseDownEvent.target){$.data(event.target,this.widgetName+'.preventClickEvent',true);}
+this._mouseStop(event);}
+return false;},_mouseDistanceMet:function(event){return(Math.max(Math.abs(this._mouseDownEvent.pageX-event.pageX),Math.abs(this._mouseDownEvent.pageY-event.pageY))>=this.options.distance);},_mouseDelayMet:function(event){return this.mouseDelayMet;},_mouseStart:function(event){},_mouseDrag:function(event){},_mouseStop:function(event){},_mouseCapture:function(event){return true;}});})(jQuery);(function($,undefined){$.widget("ui.sortable",$.ui.mouse,{widgetEventPrefix:"sort",ready:false,options:{appendTo:"parent",axis:false,connectWith:false,containment:false,cursor:'auto',cursorAt:false,dropOnEmpty:true,forcePlaceholderSize:false,forceHelperSize:false,grid:false,handle:false,helper:"original",items:'> *',opacity:false,placeholder:false,revert:false,scroll:true,scrollSensitivity:20,scrollSpeed:20,scope:"default",tolerance:"intersect",zIndex:1000},_create:function(){var o=this.options;this.containerCache={};this.element.addClass("ui-sortable");this.refresh();this.floating=this.items.length?o.axis==='x'||(/left|right/).test(this.items[0].item.css('float'))||(/inline|table-cell/).test(this.items[0].item.css('display')):false;this.offset=this.element.offset();this._mouseInit();this.ready=true},destroy:function(){$.Widget.prototype.destroy.call(this);this.element.removeClass("ui-sortable ui-sortable-disabled");this._mouseDestroy();for(var i=this.items.length-1;i>=0;i--)
+this.items[i].item.removeData(this.widgetName+"-item");return this;},_setOption:function(key,value){if(key==="disabled"){this.options[key]=value;this.widget()
+[value?"addClass":"removeClass"]("ui-sortable-disabled");}else{$.Widget.prototype._setOption.apply(this,arguments);}},_mouseCapture:function(event,overrideHandle){var that=this;if(this.reverting){return false;}
+if(this.options.disabled||this.options.type=='static')return false;this._refreshItems(event);var currentItem=null,self=this,nodes=$(event.target).parents().each(function(){if($.data(this,that.widgetName+'-item')==self){currentItem=$(this);return false;}});if($.data(event.target,that.widgetName+'-item')==self)currentItem=$(event.target);if(!currentItem)return false;if(this.options.handle&&!overrideHandle){var validHandle=false;$(this.options.handle,currentItem).find("*").andSelf().each(function(){if(this==event.target)validHandle=true;});if(!validHandle)return false;}
+this.currentItem=currentItem;this._removeCurrentsFromItems();return true;},_mouseStart:function(event,overrideHandle,noActivation){var o=this.options,self=this;this.currentContainer=this;this.refreshPositions();this.helper=this._createHelper(event);this._cacheHelperProportions();this._cacheMargins();this.scrollParent=this.helper.scrollParent();this.offset=this.currentItem.offset();this.offset={top:this.offset.top-this.margins.top,left:this.offset.left-this.margins.left};this.helper.css("position","absolute");this.cssPosition=this.helper.css("position");$.extend(this.offset,{click:{left:event.pageX-this.offset.left,top:event.pageY-this.offset.top},parent:this._getParentOffset(),relative:this._getRelativeOffset()});this.originalPosition=this._generatePosition(event);this.originalPageX=event.pageX;this.originalPageY=event.pageY;(o.cursorAt&&this._adjustOffsetFromHelper(o.cursorAt));this.domPosition={prev:this.currentItem.prev()[0],parent:this.currentItem.parent()[0]};if(this.helper[0]!=this.currentItem[0]){this.currentItem.hide();}
+this._createPlaceholder();if(o.containment)
+this._setContainment();if(o.cursor){if($('body').css("cursor"))this._storedCursor=$('body').css("cursor");$('body').css("cursor",o.cursor);}
+if(o.opacity){if(this.helper.css("opacity"))this._storedOpacity=this.helper.css("opacity");this.helper.css("opacity",o.opacity);}
+if(o.zIndex){if(this.helper.css("zIndex"))this._storedZIndex=this.helper.css("zIndex");this.helper.css("zIndex",o.zIndex);}
+if(this.scrollParent[0]!=document&&this.scrollParent[0].tagName!='HTML')
+this.overflowOffset=this.scrollParent.offset();this._trigger("start",event,this._uiHash());if(!this._preserveHelperProportions)
+this._cacheHelperProportions();if(!noActivation){for(var i=this.containers.length-1;i>=0;i--){this.containers[i]._trigger("activate",event,self._uiHash(this));}}
+if($.ui.ddmanager)
+$.ui.ddmanager.current=this;if($.ui.ddmanager&&!o.dropBehaviour)
+$.ui.ddmanager.prepareOffsets(this,event);this.dragging=true;this.helper.addClass("ui-sortable-helper");this._mouseDrag(event);return true;},_mouseDrag:function(event){this.position=this._generatePosition(event);this.positionAbs=this._convertPositionTo("absolute");if(!this.lastPositionAbs){this.lastPositionAbs=this.positionAbs;}
+if(this.options.scroll){var o=this.options,scrolled=false;if(this.scrollParent[0]!=document&&this.scrollParent[0].tagName!='HTML'){if((this.overflowOffset.top+this.scrollParent[0].offsetHeight)-event.pageY<o.scrollSensitivity)
+this.scrollParent[0].scrollTop=scrolled=this.scrollParent[0].scrollTop+o.scrollSpeed;else if(event.pageY-this.overflowOffset.top<o.scrollSensitivity)
+this.scrollParent[0].scrollTop=scrolled=this.scrollParent[0].scrollTop-o.scrollSpeed;if((this.overflowOffset.left+this.scrollParent[0].offsetWidth)-event.pageX<o.scrollSensitivity)
+this.scrollParent[0].scrollLeft=scrolled=this.scrollParent[0].scrollLeft+o.scrollSpeed;else if(event.pageX-this.overflowOffset.left<o.scrollSensitivity)
+this.scrollParent[0].scrollLeft=scrolled=this.scrollParent[0].scrollLeft-o.scrollSpeed;}else{if(event.pageY-$(document).scrollTop()<o.scrollSensitivity)
+scrolled=$(document).scrollTop($(document).scrollTop()-o.scrollSpeed);else if($(window).height()-(event.pageY-$(document).scrollTop())<o.scrollSensitivity)
+scrolled=$(document).scrollTop($(document).scrollTop()+o.scrollSpeed);if(event.pageX-$(document).scrollLeft()<o.scrollSensitivity)
+scrolled=$(document).scrollLeft($(document).scrollLeft()-o.scrollSpeed);else if($(window).width()-(event.pageX-$(document).scrollLeft())<o.scrollSensitivity)
+scrolled=$(document).scrollLeft($(document).scrollLeft()+o.scrollSpeed);}
+if(scrolled!==false&&$.ui.ddmanager&&!o.dropBehaviour)
+$.ui.ddmanager.prepareOffsets(this,event);}
+this.positionAbs=this._convertPositionTo("absolute");if(!this.options.axis||this.options.axis!="y")this.helper[0].style.left=this.position.left+'px';if(!this.options.axis||this.options.axis!="x")this.helper[0].style.top=this.position.top+'px';for(var i=this.items.length-1;i>=0;i--){var item=this.items[i],itemElement=item.item[0],intersection=this._intersectsWithPointer(item);if(!intersection)continue;if(itemElement!=this.currentItem[0]&&this.placeholder[intersection==1?"next":"prev"]()[0]!=itemElement&&!$.ui.contains(this.placeholder[0],itemElement)&&(this.options.type=='semi-dynamic'?!$.ui.contains(this.element[0],itemElement):true)){this.direction=intersection==1?"down":"up";if(this.options.tolerance=="pointer"||this._intersectsWithSides(item)){this._rearrange(event,item);}else{break;}
+this._trigger("change",event,this._uiHash());break;}}
+this._contactContainers(event);if($.ui.ddmanager)$.ui.ddmanager.drag(this,event);this._trigger('sort',event,this._uiHash());this.lastPositionAbs=this.positionAbs;return false;},_mouseStop:function(event,noPropagation){if(!event)return;if($.ui.ddmanager&&!this.options.dropBehaviour)
+$.ui.ddmanager.drop(this,event);if(this.options.revert){var self=this;var cur=self.placeholder.offset();self.reverting=true;$(this.helper).animate({left:cur.left-this.offset.parent.left-self.margins.left+(this.offsetParent[0]==document.body?0:this.offsetParent[0].scrollLeft),top:cur.top-this.offset.parent.top-self.margins.top+(this.offsetParent[0]==document.body?0:this.offsetParent[0].scrollTop)},parseInt(this.options.revert,10)||500,function(){self._clear(event);});}else{this._clear(event,noPropagation);}
+return false;},cancel:function(){var self=this;if(this.dragging){this._mouseUp({target:null});if(this.options.helper=="original")
+this.currentItem.css(this._storedCSS).removeClass("ui-sortable-helper");else
+this.currentItem.show();for(var i=this.containers.length-1;i>=0;i--){this.containers[i]._trigger("deactivate",null,self._uiHash(this));if(this.containers[i].containerCache.over){this.containers[i]._trigger("out",null,self._uiHash(this));this.containers[i].containerCache.over=0;}}}
+if(this.placeholder){if(this.placeholder[0].parentNode)this.placeholder[0].parentNode.removeChild(this.placeholder[0]);if(this.options.helper!="original"&&this.helper&&this.helper[0].parentNode)this.helper.remove();$.extend(this,{helper:null,dragging:false,reverting:false,_noFinalSort:null});if(this.domPosition.prev){$(this.domPosition.prev).after(this.currentItem);}else{$(this.domPosition.parent).prepend(this.currentItem);}}
+return this;},serialize:function(o){var items=this._getItemsAsjQuery(o&&o.connected);var str=[];o=o||{};$(items).each(function(){var res=($(o.item||this).attr(o.attribute||'id')||'').match(o.expression||(/(.+)[-=_](.+)/));if(res)str.push((o.key||res[1]+'[]')+'='+(o.key&&o.expression?res[1]:res[2]));});if(!str.length&&o.key){str.push(o.key+'=');}
+return str.join('&');},toArray:function(o){var items=this._getItemsAsjQuery(o&&o.connected);var ret=[];o=o||{};items.each(function(){ret.push($(o.item||this).attr(o.attribute||'id')||'');});return ret;},_intersectsWith:function(item){var x1=this.positionAbs.left,x2=x1+this.helperProportions.width,y1=this.positionAbs.top,y2=y1+this.helperProportions.height;var l=item.left,r=l+item.width,t=item.top,b=t+item.height;var dyClick=this.offset.click.top,dxClick=this.offset.click.left;var isOverElement=(y1+dyClick)>t&&(y1+dyClick)<b&&(x1+dxClick)>l&&(x1+dxClick)<r;if(this.options.tolerance=="pointer"||this.options.forcePointerForContainers||(this.options.tolerance!="pointer"&&this.helperProportions[this.floating?'width':'height']>item[this.floating?'width':'height'])){return isOverElement;}else{return(l<x1+(this.helperProportions.width/2)&&x2-(this.helperProportions.width/2)<r&&t<y1+(this.helperProportions.height/2)&&y2-(this.helperProportions.height/2)<b);}},_intersectsWithPointer:function(item){var isOverElementHeight=$.ui.isOverAxis(this.positionAbs.top+this.offset.click.top,item.top,item.height),isOverElementWidth=$.ui.isOverAxis(this.positionAbs.left+this.offset.click.left,item.left,item.width),isOverElement=isOverElementHeight&&isOverElementWidth,verticalDirection=this._getDragVerticalDirection(),horizontalDirection=this._getDragHorizontalDirection();if(!isOverElement)
+return false;return this.floating?(((horizontalDirection&&horizontalDirection=="right")||verticalDirection=="down")?2:1):(verticalDirection&&(verticalDirection=="down"?2:1));},_intersectsWithSides:function(item){var isOverBottomHalf=$.ui.isOverAxis(this.positionAbs.top+this.offset.click.top,item.top+(item.height/2),item.height),isOverRightHalf=$.ui.isOverAxis(this.positionAbs.left+this.offset.click.left,item.left+(item.width/2),item.width),verticalDirection=this._getDragVerticalDirection(),horizontalDirection=this._getDragHorizontalDirection();if(this.floating&&horizontalDirection){return((horizontalDirection=="right"&&isOverRightHalf)||(horizontalDirection=="left"&&!isOverRightHalf));}else{return verticalDirection&&((verticalDirection=="down"&&isOverBottomHalf)||(verticalDirection=="up"&&!isOverBottomHalf));}},_getDragVerticalDirection:function(){var delta=this.positionAbs.top-this.lastPositionAbs.top;return delta!=0&&(delta>0?"down":"up");},_getDragHorizontalDirection:function(){var delta=this.positionAbs.left-this.lastPositionAbs.left;return delta!=0&&(delta>0?"right":"left");},refresh:function(event){this._refreshItems(event);this.refreshPositions();return this;},_connectWith:function(){var options=this.options;return options.connectWith.constructor==String?[options.connectWith]:options.connectWith;},_getItemsAsjQuery:function(connected){var self=this;var items=[];var queries=[];var connectWith=this._connectWith();if(connectWith&&connected){for(var i=connectWith.length-1;i>=0;i--){var cur=$(connectWith[i]);for(var j=cur.length-1;j>=0;j--){var inst=$.data(cur[j],this.widgetName);if(inst&&inst!=this&&!inst.options.disabled){queries.push([$.isFunction(inst.options.items)?inst.options.items.call(inst.element):$(inst.options.items,inst.element).not(".ui-sortable-helper").not('.ui-sortable-placeholder'),inst]);}};};}
+queries.push([$.isFunction(this.options.items)?this.options.items.call(this.element,null,{options:this.options,item:this.currentItem}):$(this.options.items,this.element).not(".ui-sortable-helper").not('.ui-sortable-placeholder'),this]);for(var i=queries.length-1;i>=0;i--){queries[i][0].each(function(){items.push(this);});};return $(items);},_removeCurrentsFromItems:function(){var list=this.currentItem.find(":data("+this.widgetName+"-item)");for(var i=0;i<this.items.length;i++){for(var j=0;j<list.length;j++){if(list[j]==this.items[i].item[0])
+this.items.splice(i,1);};};},_refreshItems:function(event){this.items=[];this.containers=[this];var items=this.items;var self=this;var queries=[[$.isFunction(this.options.items)?this.options.items.call(this.element[0],event,{item:this.currentItem}):$(this.options.items,this.element),this]];var connectWith=this._connectWith();if(connectWith&&this.ready){for(var i=connectWith.length-1;i>=0;i--){var cur=$(connectWith[i]);for(var j=cur.length-1;j>=0;j--){var inst=$.data(cur[j],this.widgetName);if(inst&&inst!=this&&!inst.options.disabled){queries.push([$.isFunction(inst.options.items)?inst.options.items.call(inst.element[0],event,{item:this.currentItem}):$(inst.options.items,inst.element),inst]);this.containers.push(inst);}};};}
+for(var i=queries.length-1;i>=0;i--){var targetData=queries[i][1];var _queries=queries[i][0];for(var j=0,queriesLength=_queries.length;j<queriesLength;j++){var item=$(_queries[j]);item.data(this.widgetName+'-item',targetData);items.push({item:item,instance:targetData,width:0,height:0,left:0,top:0});};};},refreshPositions:function(fast){if(this.offsetParent&&this.helper){this.offset.parent=this._getParentOffset();}
+for(var i=this.items.length-1;i>=0;i--){var item=this.items[i];if(item.instance!=this.currentContainer&&this.currentContainer&&item.item[0]!=this.currentItem[0])
+continue;var t=this.options.toleranceElement?$(this.options.toleranceElement,item.item):item.item;if(!fast){item.width=t.outerWidth();item.height=t.outerHeight();}
+var p=t.offset();item.left=p.left;item.top=p.top;};if(this.options.custom&&this.options.custom.refreshContainers){this.options.custom.refreshContainers.call(this);}else{for(var i=this.containers.length-1;i>=0;i--){var p=this.containers[i].element.offset();this.containers[i].containerCache.left=p.left;this.containers[i].containerCache.top=p.top;this.containers[i].containerCache.width=this.containers[i].element.outerWidth();this.containers[i].containerCache.height=this.containers[i].element.outerHeight();};}
+return this;},_createPlaceholder:function(that){var self=that||this,o=self.options;if(!o.placeholder||o.placeholder.constructor==String){var className=o.placeholder;o.placeholder={element:function(){var el=$(document.createElement(self.currentItem[0].nodeName)).addClass(className||self.currentItem[0].className+" ui-sortable-placeholder").removeClass("ui-sortable-helper")[0];if(!className)
+el.style.visibility="hidden";return el;},update:function(container,p){if(className&&!o.forcePlaceholderSize)return;if(!p.height()){p.height(self.currentItem.innerHeight()-parseInt(self.currentItem.css('paddingTop')||0,10)-parseInt(self.currentItem.css('paddingBottom')||0,10));};if(!p.width()){p.width(self.currentItem.innerWidth()-parseInt(self.currentItem.css('paddingLeft')||0,10)-parseInt(self.currentItem.css('paddingRight')||0,10));};}};}
+self.placeholder=$(o.placeholder.element.call(self.element,self.currentItem));self.currentItem.after(self.placeholder);o.placeholder.update(self,self.placeholder);},_contactContainers:function(event){var innermostContainer=null,innermostIndex=null;for(var i=this.containers.length-1;i>=0;i--){if($.ui.contains(this.currentItem[0],this.containers[i].element[0]))
+continue;if(this._intersectsWith(this.containers[i].containerCache)){if(innermostContainer&&$.ui.contains(this.containers[i].element[0],innermostContainer.element[0]))
+continue;innermostContainer=this.containers[i];innermostIndex=i;}else{if(this.containers[i].containerCache.over){this.containers[i]._trigger("out",event,this._uiHash(this));this.containers[i].containerCache.over=0;}}}
+if(!innermostContainer)return;if(this.containers.length===1){this.containers[innermostIndex]._trigger("over",event,this._uiHash(this));this.containers[innermostIndex].containerCache.over=1;}else if(this.currentContainer!=this.containers[innermostIndex]){var dist=10000;var itemWithLeastDistance=null;var base=this.positionAbs[this.containers[innermostIndex].floating?'left':'top'];for(var j=this.items.length-1;j>=0;j--){if(!$.ui.contains(this.containers[innermostIndex].element[0],this.items[j].item[0]))continue;var cur=this.items[j][this.containers[innermostIndex].floating?'left':'top'];if(Math.abs(cur-base)<dist){dist=Math.abs(cur-base);itemWithLeastDistance=this.items[j];}}
+if(!itemWithLeastDistance&&!this.options.dropOnEmpty)
+return;this.currentContainer=this.containers[innermostIndex];itemWithLeastDistance?this._rearrange(event,itemWithLeastDistance,null,true):this._rearrange(event,null,this.containers[innermostIndex].element,true);this._trigger("change",event,this._uiHash());this.containers[innermostIndex]._trigger("change",event,this._uiHash(this));this.options.placeholder.update(this.currentContainer,this.placeholder);this.containers[innermostIndex]._trigger("over",event,this._uiHash(this));this.containers[innermostIndex].containerCache.over=1;}},_createHelper:function(event){var o=this.options;var helper=$.isFunction(o.helper)?$(o.helper.apply(this.element[0],[event,this.currentItem])):(o.helper=='clone'?this.currentItem.clone():this.currentItem);if(!helper.parents('body').length)
+$(o.appendTo!='parent'?o.appendTo:this.currentItem[0].parentNode)[0].appendChild(helper[0]);if(helper[0]==this.currentItem[0])
+this._storedCSS={width:this.currentItem[0].style.width,height:this.currentItem[0].style.height,position:this.currentItem.css("position"),top:this.currentItem.css("top"),left:this.currentItem.css("left")};if(helper[0].style.width==''||o.forceHelperSize)helper.width(this.currentItem.width());if(helper[0].style.height==''||o.forceHelperSize)helper.height(this.currentItem.height());return helper;},_adjustOffsetFromHelper:function(obj){if(typeof obj=='string'){obj=obj.split(' ');}
+if($.isArray(obj)){obj={left:+obj[0],top:+obj[1]||0};}
+if('left'in obj){this.offset.click.left=obj.left+this.margins.left;}
+if('right'in obj){this.offset.click.left=this.helperProportions.width-obj.right+this.margins.left;}
+if('top'in obj){this.offset.click.top=obj.top+this.margins.top;}
+if('bottom'in obj){this.offset.click.top=this.helperProportions.height-obj.bottom+this.margins.top;}},_getParentOffset:function(){this.offsetParent=this.helper.offsetParent();var po=this.offsetParent.offset();if(this.cssPosition=='absolute'&&this.scrollParent[0]!=document&&$.ui.contains(this.scrollParent[0],this.offsetParent[0])){po.left+=this.scrollParent.scrollLeft();po.top+=this.scrollParent.scrollTop();}
+if((this.offsetParent[0]==document.body)||(this.offsetParent[0].tagName&&this.offsetParent[0].tagName.toLowerCase()=='html'&&$.browser.msie))
+po={top:0,left:0};return{top:po.top+(parseInt(this.offsetParent.css("borderTopWidth"),10)||0),left:po.left+(parseInt(this.offsetParent.css("borderLeftWidth"),10)||0)};},_getRelativeOffset:function(){if(this.cssPosition=="relative"){var p=this.currentItem.position();return{top:p.top-(parseInt(this.helper.css("top"),10)||0)+this.scrollParent.scrollTop(),left:p.left-(parseInt(this.helper.css("left"),10)||0)+this.scrollParent.scrollLeft()};}else{return{top:0,left:0};}},_cacheMargins:function(){this.margins={left:(parseInt(this.currentItem.css("marginLeft"),10)||0),top:(parseInt(this.currentItem.css("marginTop"),10)||0)};},_cacheHelperProportions:function(){this.helperProportions={width:this.helper.outerWidth(),height:this.helper.outerHeight()};},_setContainment:function(){var o=this.options;if(o.containment=='parent')o.containment=this.helper[0].parentNode;if(o.containment=='document'||o.containment=='window')this.containment=[0-this.offset.relative.left-this.offset.parent.left,0-this.offset.relative.top-this.offset.parent.top,$(o.containment=='document'?document:window).width()-this.helperProportions.width-this.margins.left,($(o.containment=='document'?document:window).height()||document.body.parentNode.scrollHeight)-this.helperProportions.height-this.margins.top];if(!(/^(document|window|parent)$/).test(o.containment)){var ce=$(o.containment)[0];var co=$(o.containment).offset();var over=($(ce).css("overflow")!='hidden');this.containment=[co.left+(parseInt($(ce).css("borderLeftWidth"),10)||0)+(parseInt($(ce).css("paddingLeft"),10)||0)-this.margins.left,co.top+(parseInt($(ce).css("borderTopWidth"),10)||0)+(parseInt($(ce).css("paddingTop"),10)||0)-this.margins.top,co.left+(over?Math.max(ce.scrollWidth,ce.offsetWidth):ce.offsetWidth)-(parseInt($(ce).css("borderLeftWidth"),10)||0)-(parseInt($(ce).css("paddingRight"),10)||0)-this.helperProportions.width-this.margins.left,co.top+(over?Math.max(ce.scrollHeight,ce.offsetHeight):ce.offsetHeight)-(parseInt($(ce).css("borderTopWidth"),10)||0)-(parseInt($(ce).css("paddingBottom"),10)||0)-this.helperProportions.height-this.margins.top];}},_convertPositionTo:function(d,pos){if(!pos)pos=this.position;var mod=d=="absolute"?1:-1;var o=this.options,scroll=this.cssPosition=='absolute'&&!(this.scrollParent[0]!=document&&$.ui.contains(this.scrollParent[0],this.offsetParent[0]))?this.offsetParent:this.scrollParent,scrollIsRootNode=(/(html|body)/i).test(scroll[0].tagName);return{top:(pos.top
++this.offset.relative.top*mod
++this.offset.parent.top*mod
+-($.browser.safari&&this.cssPosition=='fixed'?0:(this.cssPosition=='fixed'?-this.scrollParent.scrollTop():(scrollIsRootNode?0:scroll.scrollTop()))*mod)),left:(pos.left
++this.offset.relative.left*mod
++this.offset.parent.left*mod
+-($.browser.safari&&this.cssPosition=='fixed'?0:(this.cssPosition=='fixed'?-this.scrollParent.scrollLeft():scrollIsRootNode?0:scroll.scrollLeft())*mod))};},_generatePosition:function(event){var o=this.options,scroll=this.cssPosition=='absolute'&&!(this.scrollParent[0]!=document&&$.ui.contains(this.scrollParent[0],this.offsetParent[0]))?this.offsetParent:this.scrollParent,scrollIsRootNode=(/(html|body)/i).test(scroll[0].tagName);if(this.cssPosition=='relative'&&!(this.scrollParent[0]!=document&&this.scrollParent[0]!=this.offsetParent[0])){this.offset.relative=this._getRelativeOffset();}
+var pageX=event.pageX;var pageY=event.pageY;if(this.originalPosition){if(this.containment){if(event.pageX-this.offset.click.left<this.containment[0])pageX=this.containment[0]+this.offset.click.left;if(event.pageY-this.offset.click.top<this.containment[1])pageY=this.containment[1]+this.offset.click.top;if(event.pageX-this.offset.click.left>this.containment[2])pageX=this.containment[2]+this.offset.click.left;if(event.pageY-this.offset.click.top>this.containment[3])pageY=this.containment[3]+this.offset.click.top;}
+if(o.grid){var top=this.originalPageY+Math.round((pageY-this.originalPageY)/o.grid[1])*o.grid[1];pageY=this.containment?(!(top-this.offset.click.top<this.containment[1]||top-this.offset.click.top>this.containment[3])?top:(!(top-this.offset.click.top<this.containment[1])?top-o.grid[1]:top+o.grid[1])):top;var left=this.originalPageX+Math.round((pageX-this.originalPageX)/o.grid[0])*o.grid[0];pageX=this.containment?(!(left-this.offset.click.left<this.containment[0]||left-this.offset.click.left>this.containment[2])?left:(!(left-this.offset.click.left<this.containment[0])?left-o.grid[0]:left+o.grid[0])):left;}}
+return{top:(pageY
+-this.offset.click.top
+-this.offset.relative.top
+-this.offset.parent.top
++($.browser.safari&&this.cssPosition=='fixed'?0:(this.cssPosition=='fixed'?-this.scrollParent.scrollTop():(scrollIsRootNode?0:scroll.scrollTop())))),left:(pageX
+-this.offset.click.left
+-this.offset.relative.left
+-this.offset.parent.left
++($.browser.safari&&this.cssPosition=='fixed'?0:(this.cssPosition=='fixed'?-this.scrollParent.scrollLeft():scrollIsRootNode?0:scroll.scrollLeft())))};},_rearrange:function(event,i,a,hardRefresh){a?a[0].appendChild(this.placeholder[0]):i.item[0].parentNode.insertBefore(this.placeholder[0],(this.direction=='down'?i.item[0]:i.item[0].nextSibling));this.counter=this.counter?++this.counter:1;var self=this,counter=this.counter;window.setTimeout(function(){if(counter==self.counter)self.refreshPositions(!hardRefresh);},0);},_clear:function(event,noPropagation){this.reverting=false;var delayedTriggers=[],self=this;if(!this._noFinalSort&&this.currentItem.parent().length)this.placeholder.before(this.currentItem);this._noFinalSort=null;if(this.helper[0]==this.currentItem[0]){for(var i in this._storedCSS){if(this._storedCSS[i]=='auto'||this._storedCSS[i]=='static')this._storedCSS[i]='';}
+this.currentItem.css(this._storedCSS).removeClass("ui-sortable-helper");}else{this.currentItem.show();}
+if(this.fromOutside&&!noPropagation)delayedTriggers.push(function(event){this._trigger("receive",event,this._uiHash(this.fromOutside));});if((this.fromOutside||this.domPosition.prev!=this.currentItem.prev().not(".ui-sortable-helper")[0]||this.domPosition.parent!=this.currentItem.parent()[0])&&!noPropagation)delayedTriggers.push(function(event){this._trigger("update",event,this._uiHash());});if(!$.ui.contains(this.element[0],this.currentItem[0])){if(!noPropagation)delayedTriggers.push(function(event){this._trigger("remove",event,this._uiHash());});for(var i=this.containers.length-1;i>=0;i--){if($.ui.contains(this.containers[i].element[0],this.currentItem[0])&&!noPropagation){delayedTriggers.push((function(c){return function(event){c._trigger("receive",event,this._uiHash(this));};}).call(this,this.containers[i]));delayedTriggers.push((function(c){return function(event){c._trigger("update",event,this._uiHash(this));};}).call(this,this.containers[i]));}};};for(var i=this.containers.length-1;i>=0;i--){if(!noPropagation)delayedTriggers.push((function(c){return function(event){c._trigger("deactivate",event,this._uiHash(this));};}).call(this,this.containers[i]));if(this.containers[i].containerCache.over){delayedTriggers.push((function(c){return function(event){c._trigger("out",event,this._uiHash(this));};}).call(this,this.containers[i]));this.containers[i].containerCache.over=0;}}
+if(this._storedCursor)$('body').css("cursor",this._storedCursor);if(this._storedOpacity)this.helper.css("opacity",this._storedOpacity);if(this._storedZIndex)this.helper.css("zIndex",this._storedZIndex=='auto'?'':this._storedZIndex);this.dragging=false;if(this.cancelHelperRemoval){if(!noPropagation){this._trigger("beforeStop",event,this._uiHash());for(var i=0;i<delayedTriggers.length;i++){delayedTriggers[i].call(this,event);};this._trigger("stop",event,this._uiHash());}
+return false;}
+if(!noPropagation)this._trigger("beforeStop",event,this._uiHash());this.placeholder[0].parentNode.removeChild(this.placeholder[0]);if(this.helper[0]!=this.currentItem[0])this.helper.remove();this.helper=null;if(!noPropagation){for(var i=0;i<delayedTriggers.length;i++){delayedTriggers[i].call(this,event);};this._trigger("stop",event,this._uiHash());}
+this.fromOutside=false;return true;},_trigger:function(){if($.Widget.prototype._trigger.apply(this,arguments)===false){this.cancel();}},_uiHash:function(inst){var self=inst||this;return{helper:self.helper,placeholder:self.placeholder||$([]),position:self.position,originalPosition:self.originalPosition,offset:self.positionAbs,item:self.currentItem,sender:inst?inst.element:null};}});$.extend($.ui.sortable,{version:"1.8.18"});})(jQuery);(function($){var _ajax=$.ajax,mockHandlers=[];function parseXML(xml){if(window['DOMParser']==undefined&&window.ActiveXObject){DOMParser=function(){};DOMParser.prototype.parseFromString=function(xmlString){var doc=new ActiveXObject('Microsoft.XMLDOM');doc.async='false';doc.loadXML(xmlString);return doc;};}
+try{var xmlDoc=(new DOMParser()).parseFromString(xml,'text/xml');if($.isXMLDoc(xmlDoc)){var err=$('parsererror',xmlDoc);if(err.length==1){throw('Error: '+$(xmlDoc).text());}}else{throw('Unable to parse XML');}}catch(e){var msg=(e.name==undefined?e:e.name+': '+e.message);$(document).trigger('xmlParseError',[msg]);return undefined;}
+return xmlDoc;}
+$.extend({ajax:function(origSettings){var s=jQuery.extend(true,{},jQuery.ajaxSettings,origSettings),mock=false;$.each(mockHandlers,function(k,v){if(!mockHandlers[k]){return;}
+var m=null;if($.isFunction(mockHandlers[k])){m=mockHandlers[k](s);}else{m=mockHandlers[k];if($.isFunction(m.url.test)){if(!m.url.test(s.url)){m=null;}}else{var star=m.url.indexOf('*');if((m.url!='*'&&m.url!=s.url&&star==-1)||(star>-1&&m.url.substr(0,star)!=s.url.substr(0,star))){m=null;}}
+if(m){if(m.data&&s.data){var identical=false;(function ident(mock,live){if(typeof live==='string'){identical=$.isFunction(mock.test)?mock.test(live):mock==live;return identical;}
+$.each(mock,function(k,v){if(live[k]===undefined){identical=false;return false;}else{identical=true;if(typeof live[k]=='object'){return ident(mock[k],live[k]);}else{if($.isFunction(mock[k].test)){identical=mock[k].test(live[k]);}else{identical=(mock[k]==live[k]);}
+return identical;}}});})(m.data,s.data);if(identical==false){m=null;}}
+if(m&&m.type&&m.type!=s.type){m=null;}}}
+if(m){mock=true;var c=$.extend({},$.mockjaxSettings,m);if(c.log&&$.isFunction(c.log)){c.log('MOCK '+s.type.toUpperCase()+': '+s.url,$.extend({},s));}
+var jsre=/=\?(&|$)/,jsc=(new Date()).getTime();if(s.dataType==="jsonp"){if(s.type.toUpperCase()==="GET"){if(!jsre.test(s.url)){s.url+=(rquery.test(s.url)?"&":"?")+(s.jsonp||"callback")+"=?";}}else if(!s.data||!jsre.test(s.data)){s.data=(s.data?s.data+"&":"")+(s.jsonp||"callback")+"=?";}
+s.dataType="json";}
+if(s.dataType==="json"&&(s.data&&jsre.test(s.data)||jsre.test(s.url))){jsonp=s.jsonpCallback||("jsonp"+jsc++);if(s.data){s.data=(s.data+"").replace(jsre,"="+jsonp+"$1");}
+s.url=s.url.replace(jsre,"="+jsonp+"$1");s.dataType="script";window[jsonp]=window[jsonp]||function(tmp){data=tmp;success();complete();window[jsonp]=undefined;try{delete window[jsonp];}catch(e){}
+if(head){head.removeChild(script);}};}
+var rurl=/^(\w+:)?\/\/([^\/?#]+)/,parts=rurl.exec(s.url),remote=parts&&(parts[1]&&parts[1]!==location.protocol||parts[2]!==location.host);if(s.dataType==="script"&&s.type.toUpperCase()==="GET"&&remote){var callbackContext=origSettings&&origSettings.context||s;function success(){if(s.success){s.success.call(callbackContext,(m.response?m.response.toString():m.responseText||''),status,{});}
+if(s.global){trigger("ajaxSuccess",[{},s]);}}
+function complete(){if(s.complete){s.complete.call(callbackContext,{},status);}
+if(s.global){trigger("ajaxComplete",[{},s]);}
+if(s.global&&!--jQuery.active){jQuery.event.trigger("ajaxStop");}}
+function trigger(type,args){(s.context?jQuery(s.context):jQuery.event).trigger(type,args);}
+if(m.response&&$.isFunction(m.response)){m.response(origSettings);}else{$.globalEval(m.responseText);}
+success();complete();return false;}
+mock=_ajax.call($,$.extend(true,{},origSettings,{xhr:function(){m=$.extend({},$.mockjaxSettings,m);if(m.contentType){m.headers['content-type']=m.contentType;}
+return{status:m.status,readyState:1,open:function(){},send:function(){var process=(function(that){return function(){return(function(){this.status=m.status;this.readyState=4;if($.isFunction(m.response)){m.response(origSettings);}
+if(s.dataType=='json'&&(typeof m.responseText=='object')){this.responseText=JSON.stringify(m.responseText);}else if(s.dataType=='xml'){if(typeof m.responseXML=='string'){this.responseXML=parseXML(m.responseXML);}else{this.responseXML=m.responseXML;}}else{this.responseText=m.responseText;}
+if($.isFunction(this.onreadystatechange)){this.onreadystatechange(m.isTimeout?'timeout':undefined);}}).apply(that);};})(this);if(m.proxy){_ajax({global:false,url:m.proxy,type:m.proxyType,data:m.data,dataType:s.dataType,complete:function(xhr,txt){m.responseXML=xhr.responseXML;m.responseText=xhr.responseText;this.responseTimer=setTimeout(process,m.responseTime||0);}});}else{if(s.async===false){process();}else{this.responseTimer=setTimeout(process,m.responseTime||50);}}},abort:function(){clearTimeout(this.responseTimer);},setRequestHeader:function(){},getResponseHeader:function(header){if(m.headers&&m.headers[header]){return m.headers[header];}else if(header.toLowerCase()=='last-modified'){return m.lastModified||(new Date()).toString();}else if(header.toLowerCase()=='etag'){return m.etag||'';}else if(header.toLowerCase()=='content-type'){return m.contentType||'text/plain';}},getAllResponseHeaders:function(){var headers='';$.each(m.headers,function(k,v){headers+=k+': '+v+"\n";});return headers;}};}}));return false;}});if(!mock){return _ajax.apply($,arguments);}else{return mock;}}});$.mockjaxSettings={log:function(msg){window['console']&&window.console.log&&window.console.log(msg);},status:200,responseTime:500,isTimeout:false,contentType:'text/plain',response:'',responseText:'',responseXML:'',proxy:'',proxyType:'GET',lastModified:null,etag:'',headers:{etag:'IJF@H#@923uf8023hFO@I#H#','content-type':'text/plain'}};$.mockjax=function(settings){var i=mockHandlers.length;mockHandlers[i]=settings;return i;};$.mockjaxClear=function(i){if(arguments.length==1){mockHandlers[i]=null;}else{mockHandlers=[];}};})(jQuery);(function(){var Mustache=function(){var _toString=Object.prototype.toString;Array.isArray=Array.isArray||function(obj){return _toString.call(obj)=="[object Array]";}
+var _trim=String.prototype.trim,trim;if(_trim){trim=function(text){return text==null?"":_trim.call(text);}}else{var trimLeft,trimRight;if((/\S/).test("\xA0")){trimLeft=/^[\s\xA0]+/;trimRight=/[\s\xA0]+$/;}else{trimLeft=/^\s+/;trimRight=/\s+$/;}
+trim=function(text){return text==null?"":text.toString().replace(trimLeft,"").replace(trimRight,"");}}
+var escapeMap={"&":"&amp;","<":"&lt;",">":"&gt;",'"':'&quot;',"'":'&#39;'};function escapeHTML(string){return String(string).replace(/&(?!\w+;)|[<>"']/g,function(s){return escapeMap[s]||s;});}
+var regexCache={};var Renderer=function(){};Renderer.prototype={otag:"{{",ctag:"}}",pragmas:{},buffer:[],pragmas_implemented:{"IMPLICIT-ITERATOR":true},context:{},render:function(template,context,partials,in_recursion){if(!in_recursion){this.context=context;this.buffer=[];}
+if(!this.includes("",template)){if(in_recursion){return template;}else{this.send(template);return;}}
+template=this.render_pragmas(template);var html=this.render_section(template,context,partials);if(html===false){html=this.render_tags(template,context,partials,in_recursion);}
+if(in_recursion){return html;}else{this.sendLines(html);}},send:function(line){if(line!==""){this.buffer.push(line);}},sendLines:function(text){if(text){var lines=text.split("\n");for(var i=0;i<lines.length;i++){this.send(lines[i]);}}},render_pragmas:function(template){if(!this.includes("%",template)){return template;}
+var that=this;var regex=this.getCachedRegex("render_pragmas",function(otag,ctag){return new RegExp(otag+"%([\\w-]+) ?([\\w]+=[\\w]+)?"+ctag,"g");});return template.replace(regex,function(match,pragma,options){if(!that.pragmas_implemented[pragma]){throw({message:"This implementation of mustache doesn't understand the '"+
+pragma+"' pragma"});}
+that.pragmas[pragma]={};if(options){var opts=options.split("=");that.pragmas[pragma][opts[0]]=opts[1];}
+return"";});},render_partial:function(name,context,partials){name=trim(name);if(!partials||partials[name]===undefined){throw({message:"unknown_partial '"+name+"'"});}
+if(!context||typeof context[name]!="object"){return this.render(partials[name],context,partials,true);}
+return this.render(partials[name],context[name],partials,true);},render_section:function(template,context,partials){if(!this.includes("#",template)&&!this.includes("^",template)){return false;}
+var that=this;var regex=this.getCachedRegex("render_section",function(otag,ctag){return new RegExp("^([\\s\\S]*?)"+
+otag+"(\\^|\\#)\\s*(.+)\\s*"+
+ctag+"\n*([\\s\\S]*?)"+
+otag+"\\/\\s*\\3\\s*"+
+ctag+"\\s*([\\s\\S]*)$","g");});return template.replace(regex,function(match,before,type,name,content,after){var renderedBefore=before?that.render_tags(before,context,partials,true):"",renderedAfter=after?that.render(after,context,partials,true):"",renderedContent,value=that.find(name,context);if(type==="^"){if(!value||Array.isArray(value)&&value.length===0){renderedContent=that.render(content,context,partials,true);}else{renderedContent="";}}else if(type==="#"){if(Array.isArray(value)){renderedContent=that.map(value,function(row){return that.render(content,that.create_context(row),partials,true);}).join("");}else if(that.is_object(value)){renderedContent=that.render(content,that.create_context(value),partials,true);}else if(typeof value=="function"){renderedContent=value.call(context,content,function(text){return that.render(text,context,partials,true);});}else if(value){renderedContent=that.render(content,context,partials,true);}else{renderedContent="";}}
+return renderedBefore+renderedContent+renderedAfter;});},render_tags:function(template,context,partials,in_recursion){var that=this;var new_regex=function(){return that.getCachedRegex("render_tags",function(otag,ctag){return new RegExp(otag+"(=|!|>|&|\\{|%)?([^#\\^]+?)\\1?"+ctag+"+","g");});};var regex=new_regex();var tag_replace_callback=function(match,operator,name){switch(operator){case"!":return"";case"=":that.set_delimiters(name);regex=new_regex();return"";case">":return that.render_partial(name,context,partials);case"{":case"&":return that.find(name,context);default:return escapeHTML(that.find(name,context));}};var lines=template.split("\n");for(var i=0;i<lines.length;i++){lines[i]=lines[i].replace(regex,tag_replace_callback,this);if(!in_recursion){this.send(lines[i]);}}
+if(in_recursion){return lines.join("\n");}},set_delimiters:function(delimiters){var dels=delimiters.split(" ");this.otag=this.escape_regex(dels[0]);this.ctag=this.escape_regex(dels[1]);},escape_regex:function(text){if(!arguments.callee.sRE){var specials=['/','.','*','+','?','|','(',')','[',']','{','}','\\'];arguments.callee.sRE=new RegExp('(\\'+specials.join('|\\')+')','g');}
+return text.replace(arguments.callee.sRE,'\\$1');},find:function(name,context){name=trim(name);function is_kinda_truthy(bool){return bool===false||bool===0||bool;}
+var value;if(name.match(/([a-z_]+)\./ig)){var childValue=this.walk_context(name,context);if(is_kinda_truthy(childValue)){value=childValue;}}else{if(is_kinda_truthy(context[name])){value=context[name];}else if(is_kinda_truthy(this.context[name])){value=this.context[name];}}
+if(typeof value=="function"){return value.apply(context);}
+if(value!==undefined){return value;}
+return"";},walk_context:function(name,context){var path=name.split('.');var value_context=(context[path[0]]!=undefined)?context:this.context;var value=value_context[path.shift()];while(value!=undefined&&path.length>0){value_context=value;value=value[path.shift()];}
+if(typeof value=="function"){return value.apply(value_context);}
+return value;},includes:function(needle,haystack){return haystack.indexOf(this.otag+needle)!=-1;},create_context:function(_context){if(this.is_object(_context)){return _context;}else{var iterator=".";if(this.pragmas["IMPLICIT-ITERATOR"]){iterator=this.pragmas["IMPLICIT-ITERATOR"].iterator;}
+var ctx={};ctx[iterator]=_context;return ctx;}},is_object:function(a){return a&&typeof a=="object";},map:function(array,fn){if(typeof array.map=="function"){return array.map(fn);}else{var r=[];var l=array.length;for(var i=0;i<l;i++){r.push(fn(array[i]));}
+return r;}},getCachedRegex:function(name,generator){var byOtag=regexCache[this.otag];if(!byOtag){byOtag=regexCache[this.otag]={};}
+var byCtag=byOtag[this.ctag];if(!byCtag){byCtag=byOtag[this.ctag]={};}
+var regex=byCtag[name];if(!regex){regex=byCtag[name]=generator(this.otag,this.ctag);}
+return regex;}};return({name:"mustache.js",version:"0.4.0",to_html:function(template,view,partials,send_fun){var renderer=new Renderer();if(send_fun){renderer.send=send_fun;}
+renderer.render(template,view||{},partials);if(!send_fun){return renderer.buffer.join("\n");}}});}();(function(){function trim(stuff){if(''.trim)return stuff.trim();else return stuff.replace(/^\s+/,'').replace(/\s+$/,'');}
+var ich={VERSION:"0.10",templates:{},$:(typeof window!=='undefined')?window.jQuery||window.Zepto||null:null,addTemplate:function(name,templateString){if(typeof name==='object'){for(var template in name){this.addTemplate(template,name[template]);}
+return;}
+if(ich[name]){console.error("Invalid name: "+name+".");}else if(ich.templates[name]){console.error("Template \""+name+"  \" exists");}else{ich.templates[name]=templateString;ich[name]=function(data,raw){data=data||{};var result=Mustache.to_html(ich.templates[name],data,ich.templates);return(ich.$&&!raw)?ich.$(result):result;};}},clearAll:function(){for(var key in ich.templates){delete ich[key];}
+ich.templates={};},refresh:function(){ich.clearAll();ich.grabTemplates();},grabTemplates:function(){var i,scripts=document.getElementsByTagName('script'),script,trash=[];for(i=0,l=scripts.length;i<l;i++){script=scripts[i];if(script&&script.innerHTML&&script.id&&(script.type==="text/html"||script.type==="text/x-icanhaz")){ich.addTemplate(script.id,trim(script.innerHTML));trash.unshift(script);}}
+for(i=0,l=trash.length;i<l;i++){trash[i].parentNode.removeChild(trash[i]);}}};if(typeof require!=='undefined'){module.exports=ich;}else{window.ich=ich;}
+if(typeof document!=='undefined'){if(ich.$){ich.$(function(){ich.grabTemplates();});}else{document.addEventListener('DOMContentLoaded',function(){ich.grabTemplates();},true);}}})();})();(function($){'$:nomunge';var cache={},doTimeout='doTimeout',aps=Array.prototype.slice;$[doTimeout]=function(){return p_doTimeout.apply(window,[0].concat(aps.call(arguments)));};$.fn[doTimeout]=function(){var args=aps.call(arguments),result=p_doTimeout.apply(this,[doTimeout+args[0]].concat(args));return typeof args[0]==='number'||typeof args[1]==='number'?this:result;};function p_doTimeout(jquery_data_key){var that=this,elem,data={},method_base=jquery_data_key?$.fn:$,args=arguments,slice_args=4,id=args[1],delay=args[2],callback=args[3];if(typeof id!=='string'){slice_args--;id=jquery_data_key=0;delay=args[1];callback=args[2];}
+if(jquery_data_key){elem=that.eq(0);elem.data(jquery_data_key,data=elem.data(jquery_data_key)||{});}else if(id){data=cache[id]||(cache[id]={});}
+data.id&&clearTimeout(data.id);delete data.id;function cleanup(){if(jquery_data_key){elem.removeData(jquery_data_key);}else if(id){delete cache[id];}};function actually_setTimeout(){data.id=setTimeout(function(){data.fn();},delay);};if(callback){data.fn=function(no_polling_loop){if(typeof callback==='string'){callback=method_base[callback];}
+callback.apply(that,aps.call(args,slice_args))===true&&!no_polling_loop?actually_setTimeout():cleanup();};actually_setTimeout();}else if(data.fn){delay===undefined?cleanup():data.fn(delay===false);return true;}else{cleanup();}};})(jQuery);;(function($){$.fn.ajaxSubmit=function(options){if(!this.length){log('ajaxSubmit: skipping submit process - no element selected');return this;}
+var method,action,url,$form=this;if(typeof options=='function'){options={success:options};}
+method=this.attr('method');action=this.attr('action');url=(typeof action==='string')?$.trim(action):'';url=url||window.location.href||'';if(url){url=(url.match(/^([^#]+)/)||[])[1];}
+options=$.extend(true,{url:url,success:$.ajaxSettings.success,type:method||'GET',iframeSrc:/^https/i.test(window.location.href||'')?'javascript:false':'about:blank'},options);var veto={};this.trigger('form-pre-serialize',[this,options,veto]);if(veto.veto){log('ajaxSubmit: submit vetoed via form-pre-serialize trigger');return this;}
+if(options.beforeSerialize&&options.beforeSerialize(this,options)===false){log('ajaxSubmit: submit aborted via beforeSerialize callback');return this;}
+var traditional=options.traditional;if(traditional===undefined){traditional=$.ajaxSettings.traditional;}
+var qx,n,v,a=this.formToArray(options.semantic);if(options.data){options.extraData=options.data;qx=$.param(options.data,traditional);}
+if(options.beforeSubmit&&options.beforeSubmit(a,this,options)===false){log('ajaxSubmit: submit aborted via beforeSubmit callback');return this;}
+this.trigger('form-submit-validate',[a,this,options,veto]);if(veto.veto){log('ajaxSubmit: submit vetoed via form-submit-validate trigger');return this;}
+var q=$.param(a,traditional);if(qx){q=(q?(q+'&'+qx):qx);}
+if(options.type.toUpperCase()=='GET'){options.url+=(options.url.indexOf('?')>=0?'&':'?')+q;options.data=null;}
+else{options.data=q;}
+var callbacks=[];if(options.resetForm){callbacks.push(function(){$form.resetForm();});}
+if(options.clearForm){callbacks.push(function(){$form.clearForm(options.includeHidden);});}
+if(!options.dataType&&options.target){var oldSuccess=options.success||function(){};callbacks.push(function(data){var fn=options.replaceTarget?'replaceWith':'html';$(options.target)[fn](data).each(oldSuccess,arguments);});}
+else if(options.success){callbacks.push(options.success);}
+options.success=function(data,status,xhr){var context=options.context||options;for(var i=0,max=callbacks.length;i<max;i++){callbacks[i].apply(context,[data,status,xhr||$form,$form]);}};var fileInputs=$('input:file:enabled[value]',this);var hasFileInputs=fileInputs.length>0;var mp='multipart/form-data';var multipart=($form.attr('enctype')==mp||$form.attr('encoding')==mp);var fileAPI=!!(hasFileInputs&&fileInputs.get(0).files&&window.FormData);log("fileAPI :"+fileAPI);var shouldUseFrame=(hasFileInputs||multipart)&&!fileAPI;if(options.iframe!==false&&(options.iframe||shouldUseFrame)){if(options.closeKeepAlive){$.get(options.closeKeepAlive,function(){fileUploadIframe(a);});}
+else{fileUploadIframe(a);}}
+else if((hasFileInputs||multipart)&&fileAPI){options.progress=options.progress||$.noop;fileUploadXhr(a);}
+else{$.ajax(options);}
+this.trigger('form-submit-notify',[this,options]);return this;function fileUploadXhr(a){var formdata=new FormData();for(var i=0;i<a.length;i++){if(a[i].type=='file')
+continue;formdata.append(a[i].name,a[i].value);}
+$form.find('input:file:enabled').each(function(){var name=$(this).attr('name'),files=this.files;if(name){for(var i=0;i<files.length;i++)
+formdata.append(name,files[i]);}});if(options.extraData){for(var k in options.extraData)
+formdata.append(k,options.extraData[k])}
+options.data=null;var s=$.extend(true,{},$.ajaxSettings,options,{contentType:false,processData:false,cache:false,type:'POST'});s.context=s.context||s;s.data=null;var beforeSend=s.beforeSend;s.beforeSend=function(xhr,o){o.data=formdata;if(xhr.upload){xhr.upload.onprogress=function(event){o.progress(event.position,event.total);};}
+if(beforeSend)
+beforeSend.call(o,xhr,options);};$.ajax(s);}
+function fileUploadIframe(a){var form=$form[0],el,i,s,g,id,$io,io,xhr,sub,n,timedOut,timeoutHandle;var useProp=!!$.fn.prop;if(a){if(useProp){for(i=0;i<a.length;i++){el=$(form[a[i].name]);el.prop('disabled',false);}}else{for(i=0;i<a.length;i++){el=$(form[a[i].name]);el.removeAttr('disabled');}};}
+if($(':input[name=submit],:input[id=submit]',form).length){alert('Error: Form elements must not have name or id of "submit".');return;}
+s=$.extend(true,{},$.ajaxSettings,options);s.context=s.context||s;id='jqFormIO'+(new Date().getTime());if(s.iframeTarget){$io=$(s.iframeTarget);n=$io.attr('name');if(n==null)
+$io.attr('name',id);else
+id=n;}
+else{$io=$('<iframe name="'+id+'" src="'+s.iframeSrc+'" />');$io.css({position:'absolute',top:'-1000px',left:'-1000px'});}
+io=$io[0];xhr={aborted:0,responseText:null,responseXML:null,status:0,statusText:'n/a',getAllResponseHeaders:function(){},getResponseHeader:function(){},setRequestHeader:function(){},abort:function(status){var e=(status==='timeout'?'timeout':'aborted');log('aborting upload... '+e);this.aborted=1;$io.attr('src',s.iframeSrc);xhr.error=e;s.error&&s.error.call(s.context,xhr,e,status);g&&$.event.trigger("ajaxError",[xhr,s,e]);s.complete&&s.complete.call(s.context,xhr,e);}};g=s.global;if(g&&!$.active++){$.event.trigger("ajaxStart");}
+if(g){$.event.trigger("ajaxSend",[xhr,s]);}
+if(s.beforeSend&&s.beforeSend.call(s.context,xhr,s)===false){if(s.global){$.active--;}
+return;}
+if(xhr.aborted){return;}
+sub=form.clk;if(sub){n=sub.name;if(n&&!sub.disabled){s.extraData=s.extraData||{};s.extraData[n]=sub.value;if(sub.type=="image"){s.extraData[n+'.x']=form.clk_x;s.extraData[n+'.y']=form.clk_y;}}}
+var CLIENT_TIMEOUT_ABORT=1;var SERVER_ABORT=2;function getDoc(frame){var doc=frame.contentWindow?frame.contentWindow.document:frame.contentDocument?frame.contentDocument:frame.document;return doc;}
+var csrf_token=$('meta[name=csrf-token]').attr('content');var csrf_param=$('meta[name=csrf-param]').attr('content');if(csrf_param&&csrf_token){s.extraData=s.extraData||{};s.extraData[csrf_param]=csrf_token;}
+function doSubmit(){var t=$form.attr('target'),a=$form.attr('action');form.setAttribute('target',id);if(!method){form.setAttribute('method','POST');}
+if(a!=s.url){form.setAttribute('action',s.url);}
+if(!s.skipEncodingOverride&&(!method||/post/i.test(method))){$form.attr({encoding:'multipart/form-data',enctype:'multipart/form-data'});}
+if(s.timeout){timeoutHandle=setTimeout(function(){timedOut=true;cb(CLIENT_TIMEOUT_ABORT);},s.timeout);}
+function checkState(){try{var state=getDoc(io).readyState;log('state = '+state);if(state.toLowerCase()=='uninitialized')
+setTimeout(checkState,50);}
+catch(e){log('Server abort: ',e,' (',e.name,')');cb(SERVER_ABORT);timeoutHandle&&clearTimeout(timeoutHandle);timeoutHandle=undefined;}}
+var extraInputs=[];try{if(s.extraData){for(var n in s.extraData){extraInputs.push($('<input type="hidden" name="'+n+'">').attr('value',s.extraData[n]).appendTo(form)[0]);}}
+if(!s.iframeTarget){$io.appendTo('body');io.attachEvent?io.attachEvent('onload',cb):io.addEventListener('load',cb,false);}
+setTimeout(checkState,15);form.submit();}
+finally{form.setAttribute('action',a);if(t){form.setAttribute('target',t);}else{$form.removeAttr('target');}
+$(extraInputs).remove();}}
+if(s.forceSync){doSubmit();}
+else{setTimeout(doSubmit,10);}
+var data,doc,domCheckCount=50,callbackProcessed;function cb(e){if(xhr.aborted||callbackProcessed){return;}
+try{doc=getDoc(io);}
+catch(ex){log('cannot access response document: ',ex);e=SERVER_ABORT;}
+if(e===CLIENT_TIMEOUT_ABORT&&xhr){xhr.abort('timeout');return;}
+else if(e==SERVER_ABORT&&xhr){xhr.abort('server abort');return;}
+if(!doc||doc.location.href==s.iframeSrc){if(!timedOut)
+return;}
+io.detachEvent?io.detachEvent('onload',cb):io.removeEventListener('load',cb,false);var status='success',errMsg;try{if(timedOut){throw'timeout';}
+var isXml=s.dataType=='xml'||doc.XMLDocument||$.isXMLDoc(doc);log('isXml='+isXml);if(!isXml&&window.opera&&(doc.body==null||doc.body.innerHTML=='')){if(--domCheckCount){log('requeing onLoad callback, DOM not available');setTimeout(cb,250);return;}}
+var docRoot=doc.body?doc.body:doc.documentElement;xhr.responseText=docRoot?docRoot.innerHTML:null;xhr.responseXML=doc.XMLDocument?doc.XMLDocument:doc;if(isXml)
+s.dataType='xml';xhr.getResponseHeader=function(header){var headers={'content-type':s.dataType};return headers[header];};if(docRoot){xhr.status=Number(docRoot.getAttribute('status'))||xhr.status;xhr.statusText=docRoot.getAttribute('statusText')||xhr.statusText;}
+var dt=(s.dataType||'').toLowerCase();var scr=/(json|script|text)/.test(dt);if(scr||s.textarea){var ta=doc.getElementsByTagName('textarea')[0];if(ta){xhr.responseText=ta.value;xhr.status=Number(ta.getAttribute('status'))||xhr.status;xhr.statusText=ta.getAttribute('statusText')||xhr.statusText;}
+else if(scr){var pre=doc.getElementsByTagName('pre')[0];var b=doc.getElementsByTagName('body')[0];if(pre){xhr.responseText=pre.textContent?pre.textContent:pre.innerText;}
+else if(b){xhr.responseText=b.textContent?b.textContent:b.innerText;}}}
+else if(dt=='xml'&&!xhr.responseXML&&xhr.responseText!=null){xhr.responseXML=toXml(xhr.responseText);}
+try{data=httpData(xhr,dt,s);}
+catch(e){status='parsererror';xhr.error=errMsg=(e||status);}}
+catch(e){log('error caught: ',e);status='error';xhr.error=errMsg=(e||status);}
+if(xhr.aborted){log('upload aborted');status=null;}
+if(xhr.status){status=(xhr.status>=200&&xhr.status<300||xhr.status===304)?'success':'error';}
+if(status==='success'){s.success&&s.success.call(s.context,data,'success',xhr);g&&$.event.trigger("ajaxSuccess",[xhr,s]);}
+else if(status){if(errMsg==undefined)
+errMsg=xhr.statusText;s.error&&s.error.call(s.context,xhr,status,errMsg);g&&$.event.trigger("ajaxError",[xhr,s,errMsg]);}
+g&&$.event.trigger("ajaxComplete",[xhr,s]);if(g&&!--$.active){$.event.trigger("ajaxStop");}
+s.complete&&s.complete.call(s.context,xhr,status);callbackProcessed=true;if(s.timeout)
+clearTimeout(timeoutHandle);setTimeout(function(){if(!s.iframeTarget)
+$io.remove();xhr.responseXML=null;},100);}
+var toXml=$.parseXML||function(s,doc){if(window.ActiveXObject){doc=new ActiveXObject('Microsoft.XMLDOM');doc.async='false';doc.loadXML(s);}
+else{doc=(new DOMParser()).parseFromString(s,'text/xml');}
+return(doc&&doc.documentElement&&doc.documentElement.nodeName!='parsererror')?doc:null;};var parseJSON=$.parseJSON||function(s){return window['eval']('('+s+')');};var httpData=function(xhr,type,s){var ct=xhr.getResponseHeader('content-type')||'',xml=type==='xml'||!type&&ct.indexOf('xml')>=0,data=xml?xhr.responseXML:xhr.responseText;if(xml&&data.documentElement.nodeName==='parsererror'){$.error&&$.error('parsererror');}
+if(s&&s.dataFilter){data=s.dataFilter(data,type);}
+if(typeof data==='string'){if(type==='json'||!type&&ct.indexOf('json')>=0){data=parseJSON(data);}else if(type==="script"||!type&&ct.indexOf("javascript")>=0){$.globalEval(data);}}
+return data;};}};$.fn.ajaxForm=function(options){if(this.length===0){var o={s:this.selector,c:this.context};if(!$.isReady&&o.s){log('DOM not ready, queuing ajaxForm');$(function(){$(o.s,o.c).ajaxForm(options);});return this;}
+log('terminating; zero elements found by selector'+($.isReady?'':' (DOM not ready)'));return this;}
+return this.ajaxFormUnbind().bind('submit.form-plugin',function(e){if(!e.isDefaultPrevented()){e.preventDefault();$(this).ajaxSubmit(options);}}).bind('click.form-plugin',function(e){var target=e.target;var $el=$(target);if(!($el.is(":submit,input:image"))){var t=$el.closest(':submit');if(t.length==0){return;}
+target=t[0];}
+var form=this;form.clk=target;if(target.type=='image'){if(e.offsetX!=undefined){form.clk_x=e.offsetX;form.clk_y=e.offsetY;}else if(typeof $.fn.offset=='function'){var offset=$el.offset();form.clk_x=e.pageX-offset.left;form.clk_y=e.pageY-offset.top;}else{form.clk_x=e.pageX-target.offsetLeft;form.clk_y=e.pageY-target.offsetTop;}}
+setTimeout(function(){form.clk=form.clk_x=form.clk_y=null;},100);});};$.fn.ajaxFormUnbind=function(){return this.unbind('submit.form-plugin click.form-plugin');};$.fn.formToArray=function(semantic){var a=[];if(this.length===0){return a;}
+var form=this[0];var els=semantic?form.getElementsByTagName('*'):form.elements;if(!els){return a;}
+var i,j,n,v,el,max,jmax;for(i=0,max=els.length;i<max;i++){el=els[i];n=el.name;if(!n){continue;}
+if(semantic&&form.clk&&el.type=="image"){if(!el.disabled&&form.clk==el){a.push({name:n,value:$(el).val(),type:el.type});a.push({name:n+'.x',value:form.clk_x},{name:n+'.y',value:form.clk_y});}
+continue;}
+v=$.fieldValue(el,true);if(v&&v.constructor==Array){for(j=0,jmax=v.length;j<jmax;j++){a.push({name:n,value:v[j]});}}
+else if(v!==null&&typeof v!='undefined'){a.push({name:n,value:v,type:el.type});}}
+if(!semantic&&form.clk){var $input=$(form.clk),input=$input[0];n=input.name;if(n&&!input.disabled&&input.type=='image'){a.push({name:n,value:$input.val()});a.push({name:n+'.x',value:form.clk_x},{name:n+'.y',value:form.clk_y});}}
+return a;};$.fn.formSerialize=function(semantic){return $.param(this.formToArray(semantic));};$.fn.fieldSerialize=function(successful){var a=[];this.each(function(){var n=this.name;if(!n){return;}
+var v=$.fieldValue(this,successful);if(v&&v.constructor==Array){for(var i=0,max=v.length;i<max;i++){a.push({name:n,value:v[i]});}}
+else if(v!==null&&typeof v!='undefined'){a.push({name:this.name,value:v});}});return $.param(a);};$.fn.fieldValue=function(successful){for(var val=[],i=0,max=this.length;i<max;i++){var el=this[i];var v=$.fieldValue(el,successful);if(v===null||typeof v=='undefined'||(v.constructor==Array&&!v.length)){continue;}
+v.constructor==Array?$.merge(val,v):val.push(v);}
+return val;};$.fieldValue=function(el,successful){var n=el.name,t=el.type,tag=el.tagName.toLowerCase();if(successful===undefined){successful=true;}
+if(successful&&(!n||el.disabled||t=='reset'||t=='button'||(t=='checkbox'||t=='radio')&&!el.checked||(t=='submit'||t=='image')&&el.form&&el.form.clk!=el||tag=='select'&&el.selectedIndex==-1)){return null;}
+if(tag=='select'){var index=el.selectedIndex;if(index<0){return null;}
+var a=[],ops=el.options;var one=(t=='select-one');var max=(one?index+1:ops.length);for(var i=(one?index:0);i<max;i++){var op=ops[i];if(op.selected){var v=op.value;if(!v){v=(op.attributes&&op.attributes['value']&&!(op.attributes['value'].specified))?op.text:op.value;}
+if(one){return v;}
+a.push(v);}}
+return a;}
+return $(el).val();};$.fn.clearForm=function(includeHidden){return this.each(function(){$('input,select,textarea',this).clearFields(includeHidden);});};$.fn.clearFields=$.fn.clearInputs=function(includeHidden){var re=/^(?:color|date|datetime|email|month|number|password|range|search|tel|text|time|url|week)$/i;return this.each(function(){var t=this.type,tag=this.tagName.toLowerCase();if(re.test(t)||tag=='textarea'||(includeHidden&&/hidden/.test(t))){this.value='';}
+else if(t=='checkbox'||t=='radio'){this.checked=false;}
+else if(tag=='select'){this.selectedIndex=-1;}});};$.fn.resetForm=function(){return this.each(function(){if(typeof this.reset=='function'||(typeof this.reset=='object'&&!this.reset.nodeType)){this.reset();}});};$.fn.enable=function(b){if(b===undefined){b=true;}
+return this.each(function(){this.disabled=!b;});};$.fn.selected=function(select){if(select===undefined){select=true;}
+return this.each(function(){var t=this.type;if(t=='checkbox'||t=='radio'){this.checked=select;}
+else if(this.tagName.toLowerCase()=='option'){var $sel=$(this).parent('select');if(select&&$sel[0]&&$sel[0].type=='select-one'){$sel.find('option').selected(false);}
+this.selected=select;}});};$.fn.ajaxSubmit.debug=false;function log(){if(!$.fn.ajaxSubmit.debug)
+return;var msg='[jquery.form] '+Array.prototype.join.call(arguments,'');if(window.console&&window.console.log){window.console.log(msg);}
+else if(window.opera&&window.opera.postError){window.opera.postError(msg);}};})(jQuery);(function($){function Placeholder(input){this.input=input;if(input.attr('type')=='password'){this.handlePassword();}
+$(input[0].form).submit(function(){if(input.hasClass('placeholder')&&input[0].value==input.attr('placeholder')){input[0].value='';}});}
+Placeholder.prototype={show:function(loading){if(this.input[0].value===''||(loading&&this.valueIsPlaceholder())){if(this.isPassword){try{this.input[0].setAttribute('type','text');}catch(e){this.input.before(this.fakePassword.show()).hide();}}
+this.input.addClass('placeholder');this.input[0].value=this.input.attr('placeholder');}},hide:function(){if(this.valueIsPlaceholder()&&this.input.hasClass('placeholder')){this.input.removeClass('placeholder');this.input[0].value='';if(this.isPassword){try{this.input[0].setAttribute('type','password');}catch(e){}
+this.input.show();this.input[0].focus();}}},valueIsPlaceholder:function(){return this.input[0].value==this.input.attr('placeholder');},handlePassword:function(){var input=this.input;input.attr('realType','password');this.isPassword=true;if($.browser.msie&&input[0].outerHTML){var fakeHTML=input[0].outerHTML.replace(/type=(['"])?password\1/gi,'type=$1text$1');this.fakePassword=$(fakeHTML).val(input.attr('placeholder')).addClass('placeholder').focus(function(){input.trigger('focus');$(this).hide();});}}};var NATIVE_SUPPORT=!!("placeholder"in document.createElement("input"));$.fn.placeholder=function(){return NATIVE_SUPPORT?this:this.each(function(){var input=$(this);var placeholder=new Placeholder(input);placeholder.show(true);input.focus(function(){placeholder.hide();});input.blur(function(){placeholder.show(false);});if($.browser.msie){$(window).load(function(){if(input.val()){input.removeClass("placeholder");}
+placeholder.show(true);});input.focus(function(){if(this.value==""){var range=this.createTextRange();range.collapse(true);range.moveStart('character',0);range.select();}});}});}})(jQuery);(function($){'use strict';$.fn.formset=function(opts){var options=$.extend({},$.fn.formset.defaults,opts),totalForms=$('#id_'+options.prefix+'-TOTAL_FORMS'),maxForms=$('#id_'+options.prefix+'-MAX_NUM_FORMS'),parent=$(this),$$=$(this).children('li'),updateElementIndex=function(elem,prefix,ndx){var idRegex=new RegExp('('+prefix+'-(\\d+|__prefix__)-)'),replacement=prefix+'-'+ndx+'-';if(elem.attr("for")){elem.attr("for",elem.attr("for").replace(idRegex,replacement));}
+if(elem.attr('id')){elem.attr('id',elem.attr('id').replace(idRegex,replacement));}
+if(elem.attr('name')){elem.attr('name',elem.attr('name').replace(idRegex,replacement));}},hasChildElements=function(row){return row.find('input,select,textarea,label').length>0;},showAddButton=function(){return maxForms.length===0||(maxForms.val()===''||(maxForms.val()-totalForms.val()>0));},insertDeleteLink=function(row){$(options.deleteLink).appendTo(row).click(function(e){var row=$(this).parents(options.formSelector),del=row.find('input:hidden[id $= "-DELETE"]'),forms,i,updateSequence=function(forms,i){forms.eq(i).find('input,select,textarea,label').each(function(){updateElementIndex($(this),options.prefix,i);});};if(del.length){del.val('on');if(options.removeAnimationSpeed){row.animate({'height':'toggle','opacity':'toggle'},options.removeAnimationSpeed,function(){$(this).hide();forms=parent.find(options.formSelector).not(':hidden').not('.extra-row');totalForms.val(forms.length);});}else{row.hide();forms=parent.find(options.formSelector).not(':hidden').not('.extra-row');totalForms.val(forms.length);}}else{if(options.removeAnimationSpeed){row.animate({'height':'toggle','opacity':'toggle'},options.removeAnimationSpeed,function(){$(this).remove();forms=parent.find(options.formSelector);totalForms.val(forms.not('.extra-row').length);for(i=0;i<forms.length;i=i+1){if(!del.length){updateSequence(forms,i);}}});}else{row.remove();forms=parent.find(options.formSelector);totalForms.val(forms.not('.extra-row').length);for(i=0;i<forms.length;i=i+1){if(!del.length){updateSequence(forms,i);}}}}
+if(options.removed){options.removed(row);}
+e.preventDefault();});},insertAboveLink=function(row){$(options.insertAboveLink).prependTo(row).click(function(e){var thisRow=$(this).closest(options.formSelector),formCount=parent.find(options.formSelector).length,row=options.formTemplate.clone(true).addClass('new-row'),forms,i,updateSequence=function(forms,i){forms.eq(i).find('input,select,textarea,label').each(function(){updateElementIndex($(this),options.prefix,i);});};if(options.addAnimationSpeed){row.hide().insertBefore(thisRow).animate({"height":"toggle","opacity":"toggle"},options.addAnimationSpeed);}else{row.insertBefore(thisRow).show();}
+row.find('input,select,textarea,label').each(function(){updateElementIndex($(this),options.prefix,formCount);});forms=parent.find(options.formSelector);totalForms.val(forms.not('.extra-row').length);for(i=0;i<forms.length;i=i+1){updateSequence(forms,i);}
+if(!showAddButton()){$(this).hide();}
+if(options.added){options.added(row);}
+$(this).blur();e.preventDefault();});},hideAddButton=!showAddButton(),addButton,template,autoAddRow=function(){var formCount=parseInt(totalForms.val(),10),row=options.formTemplate.clone(true);if(options.addAnimationSpeed){row.hide().css('opacity',0).appendTo(parent).addClass('extra-row').animate({'height':'toggle','opacity':'0.5'},options.addAnimationSpeed);}else{row.css('opacity',0.5).appendTo(parent).addClass('extra-row');}
+row.find('input, select, textarea, label').focus(function(){$(this).closest(options.formSelector).removeClass('extra-row').css('opacity',1);if($(this).hasClass('required')){$(this).attr('required','required');}
+totalForms.val(parent.find(options.formSelector).not('.extra-row').length);if(options.deleteOnlyActive){$(this).closest(options.formSelector).find(options.deleteLinkSelector).fadeIn();}
+if(showAddButton()&&$(this).closest(options.formSelector).is(':last-child')){autoAddRow();}}).each(function(){updateElementIndex($(this),options.prefix,formCount);$(this).removeAttr('required');});if(options.deleteOnlyActive){row.find(options.deleteLinkSelector).hide();}
+if(options.added){options.added(row);}};$$.each(function(i){var row=$(this),del=row.find('input:checkbox[id $= "-DELETE"]');if(del.length){if(del.is(':checked')){del.before('<input type="hidden" name="'+del.attr('name')+'" id="'+del.attr('id')+'" value="on" />');row.hide();}else{del.before('<input type="hidden" name="'+del.attr('name')+'" id="'+del.attr('id')+'" />');}
+$('label[for="'+del.attr('id')+'"]').hide();del.remove();}
+if(hasChildElements(row)){if(row.is(':visible')){if(!options.deleteOnlyNew){insertDeleteLink(row);}
+if(options.insertAbove){insertAboveLink(row);}}}});template=$(options.formTemplate);template.removeAttr('id').find('input, select, textarea, label').each(function(){if($(this).attr('required')){$(this).addClass('required');}});insertDeleteLink(template);if(options.insertAbove){insertAboveLink(template);}
+options.formTemplate=template;if(!options.autoAdd){parent.after(options.addLink);addButton=parent.next();if(hideAddButton){addButton.hide();}
+addButton.click(function(e){var formCount=parseInt(totalForms.val(),10),row=options.formTemplate.clone(true).addClass('new-row');if(options.addAnimationSpeed){row.hide().appendTo(parent).animate({"height":"toggle","opacity":"toggle"},options.addAnimationSpeed);}else{row.appendTo($(this).prev()).show();}
+row.find('input,select,textarea,label').each(function(){updateElementIndex($(this),options.prefix,formCount);});totalForms.val(formCount+1);if(!showAddButton()){$(this).hide();}
+if(options.added){options.added(row);}
+e.preventDefault();});}
+if(options.alwaysShowExtra&&options.autoAdd){autoAddRow();parent.closest('form').submit(function(){$(this).find(options.formSelector).filter('.extra-row').find('input,select,textarea').each(function(){$(this).removeAttr('name');});});}
+return $$;};$.fn.formset.defaults={prefix:'form',formTemplate:null,deleteLink:'<a class="delete-row" href="javascript:void(0)">remove</a>',deleteLinkSelector:'.delete-row',addLink:'<a class="add-row" href="javascript:void(0)">add</a>',autoAdd:false,addAnimationSpeed:false,removeAnimationSpeed:false,deleteOnlyNew:false,formSelector:'.dynamic-form',added:null,removed:null,alwaysShowExtra:false,deleteOnlyActive:false,insertAbove:false,insertAboveLink:'<a href="javascript:void(0)" class="insert-step">insert step</a>'};}(jQuery));(function($){$.fn.extend({sort:function(params){if(!params.length)
+{params=[params];}
+var sortFunc=function(a,b)
+{var retval;var typedData;for(var i=0;i<params.length;i++)
+{typedData=getTypedData(a,b,i);retval=innerSort(typedData.a,typedData.b,params[i].direction);if(retval!=0)
+break;}
+return retval;}
+var getTypedData=function(a,b,index)
+{var sortType=params[index].sortType;var preA,preB;var typedA,typedB;preA=getValue(a,index);preB=getValue(b,index);if(sortType=='date')
+{typedA=new Date(Date.parse(preA));typedB=new Date(Date.parse(preB));}
+else if(sortType=='number')
+{typedA=new Number(preA);typedB=new Number(preB);}
+else
+{typedA=new String(preA).toLowerCase();typedB=new String(preB).toLowerCase();}
+return{a:typedA,b:typedB};}
+var getValue=function(obj,index)
+{var val;if(obj.hash[index])
+{val=obj.hash[index];}
+else
+{val=findValue(obj.row,params[index].sortOn,index);obj.hash[index]=val;}
+return val;}
+var findValue=function(row,selector,index)
+{if(params[index].sortOnDataAttr){return row.find(selector).data(params[index].sortOnDataAttr);}else{return row.find(selector).text();}}
+var innerSort=function(a,b,direction)
+{var retval;if(a>b)
+{retval=1;}
+else if(a<b)
+{retval=-1;}
+else
+{retval=0;}
+if(direction=='desc')
+retval*=-1;return retval;}
+var getRowHash=function(rows)
+{var rowHash=[];for(var x=0;x<rows.length;x++)
+{rowHash[x]={row:$(rows[x]),hash:[]};}
+return rowHash;}
+var addRows=function(container,rowHash)
+{var c=$('<div></div>');for(var x=0;x<rowHash.length;x++)
+{c.append(rowHash[x].row);}
+container.append(c.children());}
+return this.each(function(){var container=$(this);var rows=container.children();var rowHash=getRowHash(rows);rowHash.sort(sortFunc);addRows(container,rowHash);});}});})(jQuery);(function(f,h){"object"===typeof exports?module.exports=h():"function"===typeof define&&define.amd?define(h):f.IPv6=h()})(this,function(){return{best:function(f){f=f.toLowerCase().split(":");var h=f.length,j=8;""===f[0]&&""===f[1]&&""===f[2]?(f.shift(),f.shift()):""===f[0]&&""===f[1]?f.shift():""===f[h-1]&&""===f[h-2]&&f.pop();h=f.length;-1!==f[h-1].indexOf(".")&&(j=7);var d;for(d=0;d<h&&""!==f[d];d++);if(d<j)for(f.splice(d,1,"0000");f.length<j;)f.splice(d,0,"0000");for(d=0;d<j;d++){for(var h=f[d].split(""),l=0;3>l;l++)if("0"===h[0]&&1<h.length)h.splice(0,1);else break;f[d]=h.join("")}var h=-1,t=l=0,k=-1,b=!1;for(d=0;d<j;d++)b?"0"===f[d]?t+=1:(b=!1,t>l&&(h=k,l=t)):"0"==f[d]&&(b=!0,k=d,t=1);t>l&&(h=k,l=t);1<l&&f.splice(h,l,"");h=f.length;j="";""===f[0]&&(beststr=":");for(d=0;d<h;d++){j+=f[d];if(d===h-1)break;j+=":"}""===f[h-1]&&(j+=":");return j}}});(function(f){function h(a){throw RangeError(D[a]);}function j(a,c){for(var e=a.length;e--;)a[e]=c(a[e]);return a}function d(a){for(var c=[],e=0,d=a.length,w,b;e<d;)w=a.charCodeAt(e++),55296==(w&63488)&&e<d?(b=a.charCodeAt(e++),56320==(b&64512)?c.push(((w&1023)<<10)+(b&1023)+65536):c.push(w,b)):c.push(w);return c}function l(a){return j(a,function(a){var c="";65535<a&&(a-=65536,c+=z(a>>>10&1023|55296),a=56320|a&1023);return c+=z(a)}).join("")}function t(e,d,w){var b=0;e=w?v(e/c):e>>1;for(e+=v(e/d);e>x*s>>1;b+=n)e=v(e/x);return v(b+(x+1)*e/(e+a))}function k(a){var c=[],d=a.length,b,g=0,f=w,k=e,m,u,q,j,r;m=a.lastIndexOf(C);0>m&&(m=0);for(u=0;u<m;++u)128<=a.charCodeAt(u)&&h("not-basic"),c.push(a.charCodeAt(u));for(m=0<m?m+1:0;m<d;){u=g;b=1;for(q=n;;q+=n){m>=d&&h("invalid-input");j=a.charCodeAt(m++);j=10>j-48?j-22:26>j-65?j-65:26>j-97?j-97:n;(j>=n||j>v((p-g)/b))&&h("overflow");g+=j*b;r=q<=k?A:q>=k+s?s:q-k;if(j<r)break;j=n-r;b>v(p/j)&&h("overflow");b*=j}b=c.length+1;k=t(g-u,b,0==u);v(g/b)>p-f&&h("overflow");f+=v(g/b);g%=b;c.splice(g++,0,f)}return l(c)}function b(a){var c,b,g,f,m,k,u,j,q,r=[],l,y,x;a=d(a);l=a.length;c=w;b=0;m=e;for(k=0;k<l;++k)q=a[k],128>q&&r.push(z(q));for((g=f=r.length)&&r.push(C);g<l;){u=p;for(k=0;k<l;++k)q=a[k],q>=c&&q<u&&(u=q);y=g+1;u-c>v((p-b)/y)&&h("overflow");b+=(u-c)*y;c=u;for(k=0;k<l;++k)if(q=a[k],q<c&&++b>p&&h("overflow"),q==c){j=b;for(u=n;;u+=n){q=u<=m?A:u>=m+s?s:u-m;if(j<q)break;x=j-q;j=n-q;r.push(z(q+x%j+22+75*(26>q+x%j)-0));j=v(x/j)}r.push(z(j+22+75*(26>j)-0));m=t(b,y,g==f);b=0;++g}++b;++c}return r.join("")}var q,r="function"==typeof define&&"object"==typeof define.amd&&define.amd&&define,g="object"==typeof exports&&exports,m="object"==typeof module&&module,p=2147483647,n=36,A=1,s=26,a=38,c=700,e=72,w=128,C="-",u=/[^ -~]/,y=/^xn--/,D={overflow:"Overflow: input needs wider integers to process.","not-basic":"Illegal input >= 0x80 (not a basic code point)","invalid-input":"Invalid input"},x=n-A,v=Math.floor,z=String.fromCharCode,B;q={version:"1.1.1",ucs2:{decode:d,encode:l},decode:k,encode:b,toASCII:function(a){return j(a.split("."),function(a){return u.test(a)?"xn--"+b(a):a}).join(".")},toUnicode:function(a){return j(a.split("."),function(a){return y.test(a)?k(a.slice(4).toLowerCase()):a}).join(".")}};if(g)if(m&&m.exports==g)m.exports=q;else for(B in q)q.hasOwnProperty(B)&&(g[B]=q[B]);else r?define("punycode",q):f.punycode=q})(this);(function(f,h){"object"===typeof exports?module.exports=h():"function"===typeof define&&define.amd?define(h):f.SecondLevelDomains=h()})(this,function(){var f=Object.prototype.hasOwnProperty,h={list:{ac:"com|gov|mil|net|org",ae:"ac|co|gov|mil|name|net|org|pro|sch",af:"com|edu|gov|net|org",al:"com|edu|gov|mil|net|org",ao:"co|ed|gv|it|og|pb",ar:"com|edu|gob|gov|int|mil|net|org|tur",at:"ac|co|gv|or",au:"asn|com|csiro|edu|gov|id|net|org",ba:"co|com|edu|gov|mil|net|org|rs|unbi|unmo|unsa|untz|unze",bb:"biz|co|com|edu|gov|info|net|org|store|tv",bh:"biz|cc|com|edu|gov|info|net|org",bn:"com|edu|gov|net|org",bo:"com|edu|gob|gov|int|mil|net|org|tv",br:"adm|adv|agr|am|arq|art|ato|b|bio|blog|bmd|cim|cng|cnt|com|coop|ecn|edu|eng|esp|etc|eti|far|flog|fm|fnd|fot|fst|g12|ggf|gov|imb|ind|inf|jor|jus|lel|mat|med|mil|mus|net|nom|not|ntr|odo|org|ppg|pro|psc|psi|qsl|rec|slg|srv|tmp|trd|tur|tv|vet|vlog|wiki|zlg",bs:"com|edu|gov|net|org",bz:"du|et|om|ov|rg",ca:"ab|bc|mb|nb|nf|nl|ns|nt|nu|on|pe|qc|sk|yk",ck:"biz|co|edu|gen|gov|info|net|org",cn:"ac|ah|bj|com|cq|edu|fj|gd|gov|gs|gx|gz|ha|hb|he|hi|hl|hn|jl|js|jx|ln|mil|net|nm|nx|org|qh|sc|sd|sh|sn|sx|tj|tw|xj|xz|yn|zj",co:"com|edu|gov|mil|net|nom|org",cr:"ac|c|co|ed|fi|go|or|sa",cy:"ac|biz|com|ekloges|gov|ltd|name|net|org|parliament|press|pro|tm","do":"art|com|edu|gob|gov|mil|net|org|sld|web",dz:"art|asso|com|edu|gov|net|org|pol",ec:"com|edu|fin|gov|info|med|mil|net|org|pro",eg:"com|edu|eun|gov|mil|name|net|org|sci",er:"com|edu|gov|ind|mil|net|org|rochest|w",es:"com|edu|gob|nom|org",et:"biz|com|edu|gov|info|name|net|org",fj:"ac|biz|com|info|mil|name|net|org|pro",fk:"ac|co|gov|net|nom|org",fr:"asso|com|f|gouv|nom|prd|presse|tm",gg:"co|net|org",gh:"com|edu|gov|mil|org",gn:"ac|com|gov|net|org",gr:"com|edu|gov|mil|net|org",gt:"com|edu|gob|ind|mil|net|org",gu:"com|edu|gov|net|org",hk:"com|edu|gov|idv|net|org",id:"ac|co|go|mil|net|or|sch|web",il:"ac|co|gov|idf|k12|muni|net|org","in":"ac|co|edu|ernet|firm|gen|gov|i|ind|mil|net|nic|org|res",iq:"com|edu|gov|i|mil|net|org",ir:"ac|co|dnssec|gov|i|id|net|org|sch",it:"edu|gov",je:"co|net|org",jo:"com|edu|gov|mil|name|net|org|sch",jp:"ac|ad|co|ed|go|gr|lg|ne|or",ke:"ac|co|go|info|me|mobi|ne|or|sc",kh:"com|edu|gov|mil|net|org|per",ki:"biz|com|de|edu|gov|info|mob|net|org|tel",km:"asso|com|coop|edu|gouv|k|medecin|mil|nom|notaires|pharmaciens|presse|tm|veterinaire",kn:"edu|gov|net|org",kr:"ac|busan|chungbuk|chungnam|co|daegu|daejeon|es|gangwon|go|gwangju|gyeongbuk|gyeonggi|gyeongnam|hs|incheon|jeju|jeonbuk|jeonnam|k|kg|mil|ms|ne|or|pe|re|sc|seoul|ulsan",kw:"com|edu|gov|net|org",ky:"com|edu|gov|net|org",kz:"com|edu|gov|mil|net|org",lb:"com|edu|gov|net|org",lk:"assn|com|edu|gov|grp|hotel|int|ltd|net|ngo|org|sch|soc|web",lr:"com|edu|gov|net|org",lv:"asn|com|conf|edu|gov|id|mil|net|org",ly:"com|edu|gov|id|med|net|org|plc|sch",ma:"ac|co|gov|m|net|org|press",mc:"asso|tm",me:"ac|co|edu|gov|its|net|org|priv",mg:"com|edu|gov|mil|nom|org|prd|tm",mk:"com|edu|gov|inf|name|net|org|pro",ml:"com|edu|gov|net|org|presse",mn:"edu|gov|org",mo:"com|edu|gov|net|org",mt:"com|edu|gov|net|org",mv:"aero|biz|com|coop|edu|gov|info|int|mil|museum|name|net|org|pro",mw:"ac|co|com|coop|edu|gov|int|museum|net|org",mx:"com|edu|gob|net|org",my:"com|edu|gov|mil|name|net|org|sch",nf:"arts|com|firm|info|net|other|per|rec|store|web",ng:"biz|com|edu|gov|mil|mobi|name|net|org|sch",ni:"ac|co|com|edu|gob|mil|net|nom|org",np:"com|edu|gov|mil|net|org",nr:"biz|com|edu|gov|info|net|org",om:"ac|biz|co|com|edu|gov|med|mil|museum|net|org|pro|sch",pe:"com|edu|gob|mil|net|nom|org|sld",ph:"com|edu|gov|i|mil|net|ngo|org",pk:"biz|com|edu|fam|gob|gok|gon|gop|gos|gov|net|org|web",pl:"art|bialystok|biz|com|edu|gda|gdansk|gorzow|gov|info|katowice|krakow|lodz|lublin|mil|net|ngo|olsztyn|org|poznan|pwr|radom|slupsk|szczecin|torun|warszawa|waw|wroc|wroclaw|zgora",pr:"ac|biz|com|edu|est|gov|info|isla|name|net|org|pro|prof",ps:"com|edu|gov|net|org|plo|sec",pw:"belau|co|ed|go|ne|or",ro:"arts|com|firm|info|nom|nt|org|rec|store|tm|www",rs:"ac|co|edu|gov|in|org",sb:"com|edu|gov|net|org",sc:"com|edu|gov|net|org",sh:"co|com|edu|gov|net|nom|org",sl:"com|edu|gov|net|org",st:"co|com|consulado|edu|embaixada|gov|mil|net|org|principe|saotome|store",sv:"com|edu|gob|org|red",sz:"ac|co|org",tr:"av|bbs|bel|biz|com|dr|edu|gen|gov|info|k12|name|net|org|pol|tel|tsk|tv|web",tt:"aero|biz|cat|co|com|coop|edu|gov|info|int|jobs|mil|mobi|museum|name|net|org|pro|tel|travel",tw:"club|com|ebiz|edu|game|gov|idv|mil|net|org",mu:"ac|co|com|gov|net|or|org",mz:"ac|co|edu|gov|org",na:"co|com",nz:"ac|co|cri|geek|gen|govt|health|iwi|maori|mil|net|org|parliament|school",pa:"abo|ac|com|edu|gob|ing|med|net|nom|org|sld",pt:"com|edu|gov|int|net|nome|org|publ",py:"com|edu|gov|mil|net|org",qa:"com|edu|gov|mil|net|org",re:"asso|com|nom",ru:"ac|adygeya|altai|amur|arkhangelsk|astrakhan|bashkiria|belgorod|bir|bryansk|buryatia|cbg|chel|chelyabinsk|chita|chukotka|chuvashia|com|dagestan|e-burg|edu|gov|grozny|int|irkutsk|ivanovo|izhevsk|jar|joshkar-ola|kalmykia|kaluga|kamchatka|karelia|kazan|kchr|kemerovo|khabarovsk|khakassia|khv|kirov|koenig|komi|kostroma|kranoyarsk|kuban|kurgan|kursk|lipetsk|magadan|mari|mari-el|marine|mil|mordovia|mosreg|msk|murmansk|nalchik|net|nnov|nov|novosibirsk|nsk|omsk|orenburg|org|oryol|penza|perm|pp|pskov|ptz|rnd|ryazan|sakhalin|samara|saratov|simbirsk|smolensk|spb|stavropol|stv|surgut|tambov|tatarstan|tom|tomsk|tsaritsyn|tsk|tula|tuva|tver|tyumen|udm|udmurtia|ulan-ude|vladikavkaz|vladimir|vladivostok|volgograd|vologda|voronezh|vrn|vyatka|yakutia|yamal|yekaterinburg|yuzhno-sakhalinsk",rw:"ac|co|com|edu|gouv|gov|int|mil|net",sa:"com|edu|gov|med|net|org|pub|sch",sd:"com|edu|gov|info|med|net|org|tv",se:"a|ac|b|bd|c|d|e|f|g|h|i|k|l|m|n|o|org|p|parti|pp|press|r|s|t|tm|u|w|x|y|z",sg:"com|edu|gov|idn|net|org|per",sn:"art|com|edu|gouv|org|perso|univ",sy:"com|edu|gov|mil|net|news|org",th:"ac|co|go|in|mi|net|or",tj:"ac|biz|co|com|edu|go|gov|info|int|mil|name|net|nic|org|test|web",tn:"agrinet|com|defense|edunet|ens|fin|gov|ind|info|intl|mincom|nat|net|org|perso|rnrt|rns|rnu|tourism",tz:"ac|co|go|ne|or",ua:"biz|cherkassy|chernigov|chernovtsy|ck|cn|co|com|crimea|cv|dn|dnepropetrovsk|donetsk|dp|edu|gov|if|in|ivano-frankivsk|kh|kharkov|kherson|khmelnitskiy|kiev|kirovograd|km|kr|ks|kv|lg|lugansk|lutsk|lviv|me|mk|net|nikolaev|od|odessa|org|pl|poltava|pp|rovno|rv|sebastopol|sumy|te|ternopil|uzhgorod|vinnica|vn|zaporizhzhe|zhitomir|zp|zt",ug:"ac|co|go|ne|or|org|sc",uk:"ac|bl|british-library|co|cym|gov|govt|icnet|jet|lea|ltd|me|mil|mod|national-library-scotland|nel|net|nhs|nic|nls|org|orgn|parliament|plc|police|sch|scot|soc",us:"dni|fed|isa|kids|nsn",uy:"com|edu|gub|mil|net|org",ve:"co|com|edu|gob|info|mil|net|org|web",vi:"co|com|k12|net|org",vn:"ac|biz|com|edu|gov|health|info|int|name|net|org|pro",ye:"co|com|gov|ltd|me|net|org|plc",yu:"ac|co|edu|gov|org",za:"ac|agric|alt|bourse|city|co|cybernet|db|edu|gov|grondar|iaccess|imt|inca|landesign|law|mil|net|ngo|nis|nom|olivetti|org|pix|school|tm|web",zm:"ac|co|com|edu|gov|net|org|sch"},has_expression:null,is_expression:null,has:function(f){return!!f.match(h.has_expression)},is:function(f){return!!f.match(h.is_expression)},get:function(f){return(f=f.match(h.has_expression))&&f[1]||null},init:function(){var j="",d;for(d in h.list)f.call(h.list,d)&&(j+="|("+("("+h.list[d]+")."+d)+")");h.has_expression=RegExp("\\.("+j.substr(1)+")$","i");h.is_expression=RegExp("^("+j.substr(1)+")$","i")}};h.init();return h});(function(f,h){"object"===typeof exports?module.exports=h(require("./punycode"),require("./IPv6"),require("./SecondLevelDomains")):"function"===typeof define&&define.amd?define(["./punycode","./IPv6","./SecondLevelDomains"],h):f.URI=h(f.punycode,f.IPv6,f.SecondLevelDomains)})(this,function(f,h,j){function d(a,c){if(!(this instanceof d))return new d(a,c);void 0===a&&(a="undefined"!==typeof location?location.href+"":"");this.href(a);return void 0!==c?this.absoluteTo(c):this}function l(a){return a.replace(/([.*+?^=!:${}()|[\]\/\\])/g,"\\$1")}function t(a){return"[object Array]"===String(Object.prototype.toString.call(a))}function k(a){return encodeURIComponent(a).replace(/[!'()*]/g,escape).replace(/\*/g,"%2A")}var b=d.prototype,q=Object.prototype.hasOwnProperty;d.duplicateQueryParameters=!1;d.protocol_expression=/^[a-z][a-z0-9-+-]*$/i;d.idn_expression=/[^a-z0-9\.-]/i;d.punycode_expression=/(xn--)/i;d.ip4_expression=/^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$/;d.ip6_expression=/^\s*((([0-9A-Fa-f]{1,4}:){7}([0-9A-Fa-f]{1,4}|:))|(([0-9A-Fa-f]{1,4}:){6}(:[0-9A-Fa-f]{1,4}|((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3})|:))|(([0-9A-Fa-f]{1,4}:){5}(((:[0-9A-Fa-f]{1,4}){1,2})|:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3})|:))|(([0-9A-Fa-f]{1,4}:){4}(((:[0-9A-Fa-f]{1,4}){1,3})|((:[0-9A-Fa-f]{1,4})?:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(([0-9A-Fa-f]{1,4}:){3}(((:[0-9A-Fa-f]{1,4}){1,4})|((:[0-9A-Fa-f]{1,4}){0,2}:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(([0-9A-Fa-f]{1,4}:){2}(((:[0-9A-Fa-f]{1,4}){1,5})|((:[0-9A-Fa-f]{1,4}){0,3}:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(([0-9A-Fa-f]{1,4}:){1}(((:[0-9A-Fa-f]{1,4}){1,6})|((:[0-9A-Fa-f]{1,4}){0,4}:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(:(((:[0-9A-Fa-f]{1,4}){1,7})|((:[0-9A-Fa-f]{1,4}){0,5}:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:)))(%.+)?\s*$/;d.find_uri_expression=/\b((?:[a-z][\w-]+:(?:\/{1,3}|[a-z0-9%])|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}\/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'".,<>?\u00ab\u00bb\u201c\u201d\u2018\u2019]))/ig;d.defaultPorts={http:"80",https:"443",ftp:"21",gopher:"70",ws:"80",wss:"443"};d.invalid_hostname_characters=/[^a-zA-Z0-9\.-]/;d.encode=k;d.decode=decodeURIComponent;d.iso8859=function(){d.encode=escape;d.decode=unescape};d.unicode=function(){d.encode=k;d.decode=decodeURIComponent};d.characters={pathname:{encode:{expression:/%(24|26|2B|2C|3B|3D|3A|40)/ig,map:{"%24":"$","%26":"&","%2B":"+","%2C":",","%3B":";","%3D":"=","%3A":":","%40":"@"}},decode:{expression:/[\/\?#]/g,map:{"/":"%2F","?":"%3F","#":"%23"}}},reserved:{encode:{expression:/%(21|23|24|26|27|28|29|2A|2B|2C|2F|3A|3B|3D|3F|40|5B|5D)/ig,map:{"%3A":":","%2F":"/","%3F":"?","%23":"#","%5B":"[","%5D":"]","%40":"@","%21":"!","%24":"$","%26":"&","%27":"'","%28":"(","%29":")","%2A":"*","%2B":"+","%2C":",","%3B":";","%3D":"="}}}};d.encodeQuery=function(a){return d.encode(a+"").replace(/%20/g,"+")};d.decodeQuery=function(a){return d.decode((a+"").replace(/\+/g,"%20"))};d.recodePath=function(a){a=(a+"").split("/");for(var c=0,e=a.length;c<e;c++)a[c]=d.encodePathSegment(d.decode(a[c]));return a.join("/")};d.decodePath=function(a){a=(a+"").split("/");for(var c=0,e=a.length;c<e;c++)a[c]=d.decodePathSegment(a[c]);return a.join("/")};var r={encode:"encode",decode:"decode"},g,m=function(a,c){return function(e){return d[c](e+"").replace(d.characters[a][c].expression,function(e){return d.characters[a][c].map[e]})}};for(g in r)d[g+"PathSegment"]=m("pathname",r[g]);d.encodeReserved=m("reserved","encode");d.parse=function(a,c){var e;c||(c={});e=a.indexOf("#");-1<e&&(c.fragment=a.substring(e+1)||null,a=a.substring(0,e));e=a.indexOf("?");-1<e&&(c.query=a.substring(e+1)||null,a=a.substring(0,e));"//"===a.substring(0,2)?(c.protocol="",a=a.substring(2),a=d.parseAuthority(a,c)):(e=a.indexOf(":"),-1<e&&(c.protocol=a.substring(0,e),c.protocol&&!c.protocol.match(d.protocol_expression)?c.protocol=void 0:"file"===c.protocol?a=a.substring(e+3):"//"===a.substring(e+1,e+3)?(a=a.substring(e+3),a=d.parseAuthority(a,c)):(a=a.substring(e+1),c.urn=!0)));c.path=a;return c};d.parseHost=function(a,c){var e=a.indexOf("/"),d;-1===e&&(e=a.length);"["===a[0]?(d=a.indexOf("]"),c.hostname=a.substring(1,d)||null,c.port=a.substring(d+2,e)||null):a.indexOf(":")!==a.lastIndexOf(":")?(c.hostname=a.substring(0,e)||null,c.port=null):(d=a.substring(0,e).split(":"),c.hostname=d[0]||null,c.port=d[1]||null);c.hostname&&"/"!==a.substring(e)[0]&&(e++,a="/"+a);return a.substring(e)||"/"};d.parseAuthority=function(a,c){a=d.parseUserinfo(a,c);return d.parseHost(a,c)};d.parseUserinfo=function(a,c){var e=a.indexOf("@"),b=a.indexOf("/");-1<e&&(-1===b||e<b)?(b=a.substring(0,e).split(":"),c.username=b[0]?d.decode(b[0]):null,b.shift(),c.password=b[0]?d.decode(b.join(":")):null,a=a.substring(e+1)):(c.username=null,c.password=null);return a};d.parseQuery=function(a){if(!a)return{};a=a.replace(/&+/g,"&").replace(/^\?*&*|&+$/g,"");if(!a)return{};var c={};a=a.split("&");for(var e=a.length,b,g,f=0;f<e;f++)b=a[f].split("="),g=d.decodeQuery(b.shift()),b=b.length?d.decodeQuery(b.join("=")):null,c[g]?("string"===typeof c[g]&&(c[g]=[c[g]]),c[g].push(b)):c[g]=b;return c};d.build=function(a){var c="";a.protocol&&(c+=a.protocol+":");if(!a.urn&&(c||a.hostname))c+="//";c+=d.buildAuthority(a)||"";"string"===typeof a.path&&("/"!==a.path[0]&&"string"===typeof a.hostname&&(c+="/"),c+=a.path);"string"===typeof a.query&&a.query&&(c+="?"+a.query);"string"===typeof a.fragment&&a.fragment&&(c+="#"+a.fragment);return c};d.buildHost=function(a){var c="";if(a.hostname)d.ip6_expression.test(a.hostname)?c=a.port?c+("["+a.hostname+"]:"+a.port):c+a.hostname:(c+=a.hostname,a.port&&(c+=":"+a.port));else return"";return c};d.buildAuthority=function(a){return d.buildUserinfo(a)+d.buildHost(a)};d.buildUserinfo=function(a){var c="";a.username&&(c+=d.encode(a.username),a.password&&(c+=":"+d.encode(a.password)),c+="@");return c};d.buildQuery=function(a,c){var e="",b,g,f,k;for(g in a)if(q.call(a,g)&&g)if(t(a[g])){b={};f=0;for(k=a[g].length;f<k;f++)void 0!==a[g][f]&&void 0===b[a[g][f]+""]&&(e+="&"+d.buildQueryParameter(g,a[g][f]),!0!==c&&(b[a[g][f]+""]=!0))}else void 0!==a[g]&&(e+="&"+d.buildQueryParameter(g,a[g]));return e.substring(1)};d.buildQueryParameter=function(a,c){return d.encodeQuery(a)+(null!==c?"="+d.encodeQuery(c):"")};d.addQuery=function(a,c,e){if("object"===typeof c)for(var b in c)q.call(c,b)&&d.addQuery(a,b,c[b]);else if("string"===typeof c)void 0===a[c]?a[c]=e:("string"===typeof a[c]&&(a[c]=[a[c]]),t(e)||(e=[e]),a[c]=a[c].concat(e));else throw new TypeError("URI.addQuery() accepts an object, string as the name parameter");};d.removeQuery=function(a,c,e){var b;if(t(c)){e=0;for(b=c.length;e<b;e++)a[c[e]]=void 0}else if("object"===typeof c)for(b in c)q.call(c,b)&&d.removeQuery(a,b,c[b]);else if("string"===typeof c)if(void 0!==e)if(a[c]===e)a[c]=void 0;else{if(t(a[c])){b=a[c];var g={},f,k;if(t(e)){f=0;for(k=e.length;f<k;f++)g[e[f]]=!0}else g[e]=!0;f=0;for(k=b.length;f<k;f++)void 0!==g[b[f]]&&(b.splice(f,1),k--,f--);a[c]=b}}else a[c]=void 0;else throw new TypeError("URI.addQuery() accepts an object, string as the first parameter");};d.commonPath=function(a,c){var e=Math.min(a.length,c.length),d;for(d=0;d<e;d++)if(a[d]!==c[d]){d--;break}if(1>d)return a[0]===c[0]&&"/"===a[0]?"/":"";"/"!==a[d]&&(d=a.substring(0,d).lastIndexOf("/"));return a.substring(0,d+1)};d.withinString=function(a,c){return a.replace(d.find_uri_expression,c)};d.ensureValidHostname=function(a){if(a.match(d.invalid_hostname_characters)){if(!f)throw new TypeError("Hostname '"+a+"' contains characters other than [A-Z0-9.-] and Punycode.js is not available");if(f.toASCII(a).match(d.invalid_hostname_characters))throw new TypeError("Hostname '"+a+"' contains characters other than [A-Z0-9.-]");}};b.build=function(a){if(!0===a)this._deferred_build=!0;else if(void 0===a||this._deferred_build)this._string=d.build(this._parts),this._deferred_build=!1;return this};b.clone=function(){return new d(this)};b.toString=function(){return this.build(!1)._string};b.valueOf=function(){return this.toString()};r={protocol:"protocol",username:"username",password:"password",hostname:"hostname",port:"port"};m=function(a){return function(c,e){if(void 0===c)return this._parts[a]||"";this._parts[a]=c;this.build(!e);return this}};for(g in r)b[g]=m(r[g]);r={query:"?",fragment:"#"};m=function(a,c){return function(e,d){if(void 0===e)return this._parts[a]||"";null!==e&&(e+="",e[0]===c&&(e=e.substring(1)));this._parts[a]=e;this.build(!d);return this}};for(g in r)b[g]=m(g,r[g]);r={search:["?","query"],hash:["#","fragment"]};m=function(a,c){return function(e,d){var b=this[a](e,d);return"string"===typeof b&&b.length?c+b:b}};for(g in r)b[g]=m(r[g][1],r[g][0]);b.pathname=function(a,c){if(void 0===a||!0===a){var e=this._parts.path||(this._parts.urn?"":"/");return a?d.decodePath(e):e}this._parts.path=a?d.recodePath(a):"/";this.build(!c);return this};b.path=b.pathname;b.href=function(a,c){if(void 0===a)return this.toString();this._string="";this._parts={protocol:null,username:null,password:null,hostname:null,urn:null,port:null,path:null,query:null,fragment:null,duplicateQueryParameters:d.duplicateQueryParameters};var e=a instanceof d,b="object"===typeof a&&(a.hostname||a.path),g;!e&&(b&&"[object Object]"!==Object.prototype.toString.call(a))&&(a=a.toString());if("string"===typeof a)this._parts=d.parse(a,this._parts);else if(e||b)for(g in e=e?a._parts:a,e)q.call(this._parts,g)&&(this._parts[g]=e[g]);else throw new TypeError("invalid input");this.build(!c);return this};b.is=function(a){var c=!1,e=!1,b=!1,g=!1,f=!1,k=!1,m=!1,h=!this._parts.urn;this._parts.hostname&&(h=!1,e=d.ip4_expression.test(this._parts.hostname),b=d.ip6_expression.test(this._parts.hostname),c=e||b,f=(g=!c)&&j&&j.has(this._parts.hostname),k=g&&d.idn_expression.test(this._parts.hostname),m=g&&d.punycode_expression.test(this._parts.hostname));switch(a.toLowerCase()){case"relative":return h;case"absolute":return!h;case"domain":case"name":return g;case"sld":return f;case"ip":return c;case"ip4":case"ipv4":case"inet4":return e;case"ip6":case"ipv6":case"inet6":return b;case"idn":return k;case"url":return!this._parts.urn;case"urn":return!!this._parts.urn;case"punycode":return m}return null};var p=b.protocol,n=b.port,A=b.hostname;b.protocol=function(a,c){if(void 0!==a&&a&&(a=a.replace(/:(\/\/)?$/,""),a.match(/[^a-zA-z0-9\.+-]/)))throw new TypeError("Protocol '"+a+"' contains characters other than [A-Z0-9.+-]");return p.call(this,a,c)};b.scheme=b.protocol;b.port=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0!==a&&(0===a&&(a=null),a&&(a+="",":"===a[0]&&(a=a.substring(1)),a.match(/[^0-9]/))))throw new TypeError("Port '"+a+"' contains characters other than [0-9]");return n.call(this,a,c)};b.hostname=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0!==a){var e={};d.parseHost(a,e);a=e.hostname}return A.call(this,a,c)};b.host=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0===a)return this._parts.hostname?d.buildHost(this._parts):"";d.parseHost(a,this._parts);this.build(!c);return this};b.authority=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0===a)return this._parts.hostname?d.buildAuthority(this._parts):"";d.parseAuthority(a,this._parts);this.build(!c);return this};b.userinfo=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0===a){if(!this._parts.username)return"";var e=d.buildUserinfo(this._parts);return e.substring(0,e.length-1)}"@"!==a[a.length-1]&&(a+="@");d.parseUserinfo(a,this._parts);this.build(!c);return this};b.resource=function(a,c){var e;if(void 0===a)return this.path()+this.search()+this.hash();e=d.parse(a);this._parts.path=e.path;this._parts.query=e.query;this._parts.fragment=e.fragment;this.build(!c);return this};b.subdomain=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0===a){if(!this._parts.hostname||this.is("IP"))return"";var e=this._parts.hostname.length-this.domain().length-
+1;return this._parts.hostname.substring(0,e)||""}e=this._parts.hostname.length-this.domain().length;e=this._parts.hostname.substring(0,e);e=RegExp("^"+l(e));a&&"."!==a[a.length-1]&&(a+=".");a&&d.ensureValidHostname(a);this._parts.hostname=this._parts.hostname.replace(e,a);this.build(!c);return this};b.domain=function(a,c){if(this._parts.urn)return void 0===a?"":this;"boolean"===typeof a&&(c=a,a=void 0);if(void 0===a){if(!this._parts.hostname||this.is("IP"))return"";var e=this._parts.hostname.match(/\./g);if(e&&2>e.length)return this._parts.hostname;e=this._parts.hostname.length-this.tld(c).length-1;e=this._parts.hostname.lastIndexOf(".",e-1)+1;return this._parts.hostname.substring(e)||""}if(!a)throw new TypeError("cannot set domain empty");d.ensureValidHostname(a);!this._parts.hostname||this.is("IP")?this._parts.hostname=a:(e=RegExp(l(this.domain())+"$"),this._parts.hostname=this._parts.hostname.replace(e,a));this.build(!c);return this};b.tld=function(a,c){if(this._parts.urn)return void 0===a?"":this;"boolean"===typeof a&&(c=a,a=void 0);if(void 0===a){if(!this._parts.hostname||this.is("IP"))return"";var e=this._parts.hostname.lastIndexOf("."),e=this._parts.hostname.substring(e+1);return!0!==c&&j&&j.list[e.toLowerCase()]?j.get(this._parts.hostname)||e:e}if(a)if(a.match(/[^a-zA-Z0-9-]/))if(j&&j.is(a))e=RegExp(l(this.tld())+"$"),this._parts.hostname=this._parts.hostname.replace(e,a);else throw new TypeError("TLD '"+a+"' contains characters other than [A-Z0-9]");else{if(!this._parts.hostname||this.is("IP"))throw new ReferenceError("cannot set TLD on non-domain host");e=RegExp(l(this.tld())+"$");this._parts.hostname=this._parts.hostname.replace(e,a)}else throw new TypeError("cannot set TLD empty");this.build(!c);return this};b.directory=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0===a||!0===a){if(!this._parts.path&&!this._parts.hostname)return"";if("/"===this._parts.path)return"/";var e=this._parts.path.length-this.filename().length-1,e=this._parts.path.substring(0,e)||(this._parts.hostname?"/":"");return a?d.decodePath(e):e}e=this._parts.path.length-this.filename().length;e=this._parts.path.substring(0,e);e=RegExp("^"+l(e));this.is("relative")||(a||(a="/"),"/"!==a[0]&&(a="/"+a));a&&"/"!==a[a.length-1]&&(a+="/");a=d.recodePath(a);this._parts.path=this._parts.path.replace(e,a);this.build(!c);return this};b.filename=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0===a||!0===a){if(!this._parts.path||"/"===this._parts.path)return"";var e=this._parts.path.lastIndexOf("/"),e=this._parts.path.substring(e+1);return a?d.decodePathSegment(e):e}e=!1;"/"===a[0]&&(a=a.substring(1));a.match(/\.?\//)&&(e=!0);var b=RegExp(l(this.filename())+"$");a=d.recodePath(a);this._parts.path=this._parts.path.replace(b,a);e?this.normalizePath(c):this.build(!c);return this};b.suffix=function(a,c){if(this._parts.urn)return void 0===a?"":this;if(void 0===a||!0===a){if(!this._parts.path||"/"===this._parts.path)return"";var e=this.filename(),b=e.lastIndexOf(".");if(-1===b)return"";e=e.substring(b+
+1);e=/^[a-z0-9%]+$/i.test(e)?e:"";return a?d.decodePathSegment(e):e}"."===a[0]&&(a=a.substring(1));if(e=this.suffix())b=a?RegExp(l(e)+"$"):RegExp(l("."+e)+"$");else{if(!a)return this;this._parts.path+="."+d.recodePath(a)}b&&(a=d.recodePath(a),this._parts.path=this._parts.path.replace(b,a));this.build(!c);return this};b.segment=function(a,c,e){var d=this._parts.urn?":":"/",b=this.path(),g="/"===b.substring(0,1),b=b.split(d);"number"!==typeof a&&(e=c,c=a,a=void 0);if(void 0!==a&&"number"!==typeof a)throw Error("Bad segment '"+
+a+"', must be 0-based integer");g&&b.shift();0>a&&(a=Math.max(b.length+a,0));if(void 0===c)return void 0===a?b:b[a];if(null===a||void 0===b[a])if(t(c))b=c;else{if(c||"string"===typeof c&&c.length)""===b[b.length-1]?b[b.length-1]=c:b.push(c)}else c||"string"===typeof c&&c.length?b[a]=c:b.splice(a,1);g&&b.unshift("");return this.path(b.join(d),e)};var s=b.query;b.query=function(a,c){return!0===a?d.parseQuery(this._parts.query):void 0!==a&&"string"!==typeof a?(this._parts.query=d.buildQuery(a,this._parts.duplicateQueryParameters),this.build(!c),this):s.call(this,a,c)};b.addQuery=function(a,c,e){var b=d.parseQuery(this._parts.query);d.addQuery(b,a,void 0===c?null:c);this._parts.query=d.buildQuery(b,this._parts.duplicateQueryParameters);"string"!==typeof a&&(e=c);this.build(!e);return this};b.removeQuery=function(a,c,e){var b=d.parseQuery(this._parts.query);d.removeQuery(b,a,c);this._parts.query=d.buildQuery(b,this._parts.duplicateQueryParameters);"string"!==typeof a&&(e=c);this.build(!e);return this};b.addSearch=b.addQuery;b.removeSearch=b.removeQuery;b.normalize=function(){return this._parts.urn?this.normalizeProtocol(!1).normalizeQuery(!1).normalizeFragment(!1).build():this.normalizeProtocol(!1).normalizeHostname(!1).normalizePort(!1).normalizePath(!1).normalizeQuery(!1).normalizeFragment(!1).build()};b.normalizeProtocol=function(a){"string"===typeof this._parts.protocol&&(this._parts.protocol=this._parts.protocol.toLowerCase(),this.build(!a));return this};b.normalizeHostname=function(a){this._parts.hostname&&(this.is("IDN")&&f?this._parts.hostname=f.toASCII(this._parts.hostname):this.is("IPv6")&&h&&(this._parts.hostname=h.best(this._parts.hostname)),this._parts.hostname=this._parts.hostname.toLowerCase(),this.build(!a));return this};b.normalizePort=function(a){"string"===typeof this._parts.protocol&&this._parts.port===d.defaultPorts[this._parts.protocol]&&(this._parts.port=null,this.build(!a));return this};b.normalizePath=function(a){if(this._parts.urn||!this._parts.path||"/"===this._parts.path)return this;var c,e,b=this._parts.path,g,f;"/"!==b[0]&&("."===b[0]&&(e=b.substring(0,b.indexOf("/"))),c=!0,b="/"+b);for(b=b.replace(/(\/(\.\/)+)|\/{2,}/g,"/");;){g=b.indexOf("/../");if(-1===g)break;else if(0===g){b=b.substring(3);break}f=b.substring(0,g).lastIndexOf("/");-1===f&&(f=g);b=b.substring(0,f)+b.substring(g+3)}c&&this.is("relative")&&(b=e?e+b:b.substring(1));b=d.recodePath(b);this._parts.path=b;this.build(!a);return this};b.normalizePathname=b.normalizePath;b.normalizeQuery=function(a){"string"===typeof this._parts.query&&(this._parts.query.length?this.query(d.parseQuery(this._parts.query)):this._parts.query=null,this.build(!a));return this};b.normalizeFragment=function(a){this._parts.fragment||(this._parts.fragment=null,this.build(!a));return this};b.normalizeSearch=b.normalizeQuery;b.normalizeHash=b.normalizeFragment;b.iso8859=function(){var a=d.encode,c=d.decode;d.encode=escape;d.decode=decodeURIComponent;this.normalize();d.encode=a;d.decode=c;return this};b.unicode=function(){var a=d.encode,c=d.decode;d.encode=k;d.decode=unescape;this.normalize();d.encode=a;d.decode=c;return this};b.readable=function(){var a=this.clone();a.username("").password("").normalize();var c="";a._parts.protocol&&(c+=a._parts.protocol+"://");a._parts.hostname&&(a.is("punycode")&&f?(c+=f.toUnicode(a._parts.hostname),a._parts.port&&(c+=":"+a._parts.port)):c+=a.host());a._parts.hostname&&(a._parts.path&&"/"!==a._parts.path[0])&&(c+="/");c+=a.path(!0);if(a._parts.query){for(var b="",g=0,k=a._parts.query.split("&"),h=k.length;g<h;g++){var m=(k[g]||"").split("="),b=b+("&"+d.decodeQuery(m[0]).replace(/&/g,"%26"));void 0!==m[1]&&(b+="="+d.decodeQuery(m[1]).replace(/&/g,"%26"))}c+="?"+b.substring(1)}return c+=a.hash()};b.absoluteTo=function(a){var c=this.clone(),b=["protocol","username","password","hostname","port"],g,f;if(this._parts.urn)throw Error("URNs do not have any generally defined hierachical components");if(this._parts.hostname)return c;a instanceof d||(a=new d(a));g=0;for(f;f=b[g];g++)c._parts[f]=a._parts[f];b=["query","path"];g=0;for(f;f=b[g];g++)!c._parts[f]&&a._parts[f]&&(c._parts[f]=a._parts[f]);"/"!==c.path()[0]&&(a=a.directory(),c._parts.path=(a?a+"/":"")+c._parts.path,c.normalizePath());c.build();return c};b.relativeTo=function(a){var c=this.clone(),b=["protocol","username","password","hostname","port"],g;if(this._parts.urn)throw Error("URNs do not have any generally defined hierachical components");a instanceof d||(a=new d(a));if("/"!==this.path()[0]||"/"!==a.path()[0])throw Error("Cannot calculate common path from non-relative URLs");g=d.commonPath(c.path(),a.path());a=a.directory();for(var f=0,k;k=b[f];f++)c._parts[k]=null;if(!g||"/"===g)return c;if(a+"/"===g)c._parts.path="./"+c.filename();else{b="../";g=RegExp("^"+l(g));for(a=a.replace(g,"/").match(/\//g).length-1;a--;)b+="../";c._parts.path=c._parts.path.replace(g,b)}c.build();return c};b.equals=function(a){var c=this.clone(),b=new d(a),g={},f={};a={};var k;c.normalize();b.normalize();if(c.toString()===b.toString())return!0;g=c.query();f=b.query();c.query("");b.query("");if(c.toString()!==b.toString()||g.length!==f.length)return!1;g=d.parseQuery(g);f=d.parseQuery(f);for(k in g)if(q.call(g,k)){if(t(g[k])){if(!t(f[k])||g[k].length!==f[k].length)return!1;g[k].sort();f[k].sort();c=0;for(b=g[k].length;c<b;c++)if(g[k][c]!==f[k][c])return!1}else if(g[k]!==f[k])return!1;a[k]=!0}for(k in f)if(q.call(f,k)&&!a[k])return!1;return!0};b.duplicateQueryParameters=function(a){this._parts.duplicateQueryParameters=!!a;return this};return d});(function(f,h){"object"===typeof exports?module.exports=h(require("./URI")):"function"===typeof define&&define.amd?define(["./URI"],h):f.URITemplate=h(f.URI)})(this,function(f){function h(d){if(h._cache[d])return h._cache[d];if(!(this instanceof h))return new h(d);this.expression=d;h._cache[d]=this;return this}function j(d){this.data=d;this.cache={}}var d=Object.prototype.hasOwnProperty,l=h.prototype,t={"":{prefix:"",separator:",",named:!1,empty_name_separator:!1,encode:"encode"},"+":{prefix:"",separator:",",named:!1,empty_name_separator:!1,encode:"encodeReserved"},"#":{prefix:"#",separator:",",named:!1,empty_name_separator:!1,encode:"encodeReserved"},".":{prefix:".",separator:".",named:!1,empty_name_separator:!1,encode:"encode"},"/":{prefix:"/",separator:"/",named:!1,empty_name_separator:!1,encode:"encode"},";":{prefix:";",separator:";",named:!0,empty_name_separator:!1,encode:"encode"},"?":{prefix:"?",separator:"&",named:!0,empty_name_separator:!0,encode:"encode"},"&":{prefix:"&",separator:"&",named:!0,empty_name_separator:!0,encode:"encode"}};h._cache={};h.EXPRESSION_PATTERN=/\{([^a-zA-Z0-9%_]?)([^\}]+)(\}|$)/g;h.VARIABLE_PATTERN=/^([^*:]+)((\*)|:(\d+))?$/;h.VARIABLE_NAME_PATTERN=/[^a-zA-Z0-9%_]/;h.expand=function(d,b){var f=t[d.operator],j=f.named?"Named":"Unnamed",g=d.variables,m=[],p,n,l;for(l=0;n=g[l];l++)p=b.get(n.name),p.val.length?m.push(h["expand"+j](p,f,n.explode,n.explode&&f.separator||",",n.maxlength,n.name)):p.type&&m.push("");return m.length?f.prefix+m.join(f.separator):""};h.expandNamed=function(d,b,h,j,g,m){var p="",n=b.encode;b=b.empty_name_separator;var l=!d[n].length,s=2===d.type?"":f[n](m),a,c,e;c=0;for(e=d.val.length;c<e;c++)g?(a=f[n](d.val[c][1].substring(0,g)),2===d.type&&(s=f[n](d.val[c][0].substring(0,g)))):l?(a=f[n](d.val[c][1]),2===d.type?(s=f[n](d.val[c][0]),d[n].push([s,a])):d[n].push([void 0,a])):(a=d[n][c][1],2===d.type&&(s=d[n][c][0])),p&&(p+=j),h?p+=s+(b||a?"=":"")+a:(c||(p+=f[n](m)+(b||a?"=":"")),2===d.type&&(p+=s+","),p+=a);return p};h.expandUnnamed=function(d,b,h,j,g){var m="",p=b.encode;b=b.empty_name_separator;var n=!d[p].length,l,s,a,c;a=0;for(c=d.val.length;a<c;a++)g?s=f[p](d.val[a][1].substring(0,g)):n?(s=f[p](d.val[a][1]),d[p].push([2===d.type?f[p](d.val[a][0]):void 0,s])):s=d[p][a][1],m&&(m+=j),2===d.type&&(l=g?f[p](d.val[a][0].substring(0,g)):d[p][a][0],m+=l,m=h?m+(b||s?"=":""):m+","),m+=s;return m};l.expand=function(d){var b="";(!this.parts||!this.parts.length)&&this.parse();d instanceof j||(d=new j(d));for(var f=0,r=this.parts.length;f<r;f++)b+="string"===typeof this.parts[f]?this.parts[f]:h.expand(this.parts[f],d);return b};l.parse=function(){var d=this.expression,b=h.EXPRESSION_PATTERN,f=h.VARIABLE_PATTERN,j=h.VARIABLE_NAME_PATTERN,g=[],m=0,p,n,l;for(b.lastIndex=0;;){n=b.exec(d);if(null===n){g.push(d.substring(m));break}else g.push(d.substring(m,n.index)),m=n.index+n[0].length;if(t[n[1]]){if(!n[3])throw Error('Unclosed Expression "'+n[0]+'"');}else throw Error('Unknown Operator "'+n[1]+'" in "'+n[0]+'"');p=n[2].split(",");for(var s=0,a=p.length;s<a;s++){l=p[s].match(f);if(null===l)throw Error('Invalid Variable "'+p[s]+'" in "'+n[0]+'"');if(l[1].match(j))throw Error('Invalid Variable Name "'+l[1]+'" in "'+n[0]+'"');p[s]={name:l[1],explode:!!l[3],maxlength:l[4]&&parseInt(l[4],10)}}if(!p.length)throw Error('Expression Missing Variable(s) "'+n[0]+'"');g.push({expression:n[0],operator:n[1],variables:p})}g.length||g.push(d);this.parts=g;return this};j.prototype.get=function(f){var b=this.data,h={type:0,val:[],encode:[],encodeReserved:[]},j;if(void 0!==this.cache[f])return this.cache[f];this.cache[f]=h;b="[object Function]"===String(Object.prototype.toString.call(b))?b(f):"[object Function]"===String(Object.prototype.toString.call(b[f]))?b[f](f):b[f];if(!(void 0===b||null===b))if("[object Array]"===String(Object.prototype.toString.call(b))){j=0;for(f=b.length;j<f;j++)void 0!==b[j]&&null!==b[j]&&h.val.push([void 0,String(b[j])]);h.val.length&&(h.type=3)}else if("[object Object]"===String(Object.prototype.toString.call(b))){for(j in b)d.call(b,j)&&(void 0!==b[j]&&null!==b[j])&&h.val.push([j,String(b[j])]);h.val.length&&(h.type=2)}else h.type=1,h.val.push([void 0,String(b)]);return h};f.expand=function(d,b){var j=(new h(d)).expand(b);return new f(j)};return h});(function(f,h){"object"===typeof exports?module.exports=h(require("jquery","./URI")):"function"===typeof define&&define.amd?define(["jquery","./URI"],h):h(f.jQuery,f.URI)})(this,function(f,h){function j(b){return b.replace(/([.*+?^=!:${}()|[\]\/\\])/g,"\\$1")}function d(b){var d;f.each(["src","href","action"],function(f,h){return h in b?(d=h,!1):!0});return"input"===b.nodeName.toLowerCase()&&"image"!==b.type?void 0:d}function l(b,h){var j,n,l;if(!d(b)||!h)return!1;j=h.match(r);if(!j||!j[5]&&":"!==j[2]&&!k[j[2]])return!1;l=f(b).uri();if(j[5])return l.is(j[5]);if(":"===j[2])return n=j[1].toLowerCase()+":",!k[n]?!1:k[n](l,j[4]);n=j[1].toLowerCase();return!t[n]?!1:k[j[2]](l[n](),j[4],n)}var t={},k={"=":function(b,d){return b===d},"^=":function(b,d){return!!(b+"").match(RegExp("^"+j(d),"i"))},"$=":function(b,d){return!!(b+"").match(RegExp(j(d)+"$","i"))},"*=":function(b,d,f){"directory"==f&&(b+="/");return!!(b+"").match(RegExp(j(d),"i"))},"equals:":function(b,d){return b.equals(d)},"is:":function(b,d){return b.is(d)}};f.each("authority directory domain filename fragment hash host hostname href password path pathname port protocol query resource scheme search subdomain suffix tld username".split(" "),function(b,d){t[d]=!0;f.attrHooks["uri:"+d]={get:function(b){return f(b).uri()[d]()},set:function(b,g){f(b).uri()[d](g);return g}}});var b=function(b,d){return f(b).uri().href(d).toString()};f.each(["src","href","action","uri"],function(d,h){f.attrHooks[h]={set:b}});f.attrHooks.uri.get=function(b){return f(b).uri()};f.fn.uri=function(b){var f=this.first(),j=f.get(0),k=d(j);if(!k)throw Error('Element "'+j.nodeName+'" does not have either property: href, src, action');if(void 0!==b){var l=f.data("uri");if(l)return l.href(b);b instanceof h||(b=h(b))}else{if(b=f.data("uri"))return b;b=h(f.attr(k))}b._dom_element=j;b._dom_attribute=k;b.normalize();f.data("uri",b);return b};h.prototype.build=function(b){if(this._dom_element)this._string=h.build(this._parts),this._deferred_build=!1,this._dom_element.setAttribute(this._dom_attribute,this._string),this._dom_element[this._dom_attribute]=this._string;else if(!0===b)this._deferred_build=!0;else if(void 0===b||this._deferred_build)this._string=h.build(this._parts),this._deferred_build=!1;return this};var q,r=/^([a-zA-Z]+)\s*([\^\$*]?=|:)\s*(['"]?)(.+)\3|^\s*([a-zA-Z0-9]+)\s*$/;q=f.expr.createPseudo?f.expr.createPseudo(function(b){return function(d){return l(d,b)}}):function(b,d,f){return l(b,f[3])};f.expr[":"].uri=q;return{}});$(document).ready(function(){$('#browserid').bind('click',function(e){e.preventDefault();navigator.id.getVerifiedEmail(function(assertion){if(assertion){var $e=$('#id_assertion');$e.val(assertion.toString());$e.parent().submit();}});});});(function($){'use strict';$.fn.html5accordion=function(opts){var options=$.extend({},$.fn.html5accordion.defaults,opts);return this.each(function(){var details=$(this),detailsSummary=$(options.summarySelector+':first',details),detailsNotSummary=details.children(':not('+options.summarySelector+':first)'),detailsNotSummaryContents=details.contents(':not('+options.summarySelector+':first)');if(!detailsSummary.length){detailsSummary=$(document.createElement('summary')).text('Details').prependTo(details);}
+if(detailsNotSummary.length!==detailsNotSummaryContents.length){detailsNotSummaryContents.filter(function(){return(this.nodeType===3)&&(/[^\t\n\r ]/.test(this.data));}).wrap('<span>');detailsNotSummary=details.children(':not('+options.summarySelector+':first)');}
+if(details.prop('open')||details.hasClass(options.expandedClass)){details.addClass(options.expandedClass).prop('open',true);detailsNotSummary.slideDown(options.slideSpeed);}else{detailsNotSummary.hide();}
+detailsSummary.attr('tabindex',0).click(function(event){if($(event.target).is(options.ignoredElements)&&$(event.target).parents(options.summarySelector).length){return;}
+detailsSummary.focus();if(details.prop('open')){details.prop('open',false);}else{details.prop('open',true);}
+detailsNotSummary.slideToggle(options.slideSpeed);details.toggleClass(options.expandedClass);}).keyup(function(event){if(13===event.keyCode||32===event.keyCode){if(!($.browser.opera&&13===event.keyCode)){event.preventDefault();detailsSummary.click();}}});});};$.fn.html5accordion.defaults={summarySelector:'.summary',slideSpeed:200,expandedClass:'open',ignoredElements:'button, a, input, label'};}(jQuery));(function($){'use strict';$.fn.messages=function(opts){var messageList=$(this),options=$.extend({},$.fn.messages.defaults,messageList.data('messages-ui-opts'),opts),messages=messageList.find(options.message),transientMessages=messages.filter(options.transientMessage);messageList.data('messages-ui-opts',options);if(options.closeLink){messageList.find(options.closeLink).click(function(){var thisMessage=$(this).closest(options.message);thisMessage.fadeOut('fast',function(){thisMessage.detach();});return false;});}
+if(transientMessages.length){$(document).bind('mousedown keydown',function(event){$.doTimeout(options.transientDelay,function(){transientMessages.fadeOut(options.transientFadeSpeed,function(){transientMessages.detach();});$(this).unbind(event);});});}
+if(options.handleAjax){$.ajaxSetup({dataType:"json",dataFilter:function(data,type){if(type==="json"){var parsed=$.parseJSON(data),messages=$(parsed.messages);messages.each(function(){$(ich.message(this)).appendTo(messageList);});messageList.messages();}
+return data;}});}};$.fn.messages.defaults={message:'.message',transientMessage:'.success',closeLink:'.close',transientDelay:500,transientFadeSpeed:3000,handleAjax:false};}(jQuery));(function($){'use strict';var methods={init:function(opts){var options=$.extend({},$.fn.loadingOverlay.defaults,opts),target=$(this).addClass(options.loadingClass),vertHeight=((parseInt(target.css('height'),10)-parseInt(target.css('line-height'),10))/2).toString()+'px',overlay='<span class="'+options.overlayClass+'" style="padding-top: '+vertHeight+';">'+options.loadingText+'</span>';target.prepend(overlay);},remove:function(opts){var options=$.extend({},$.fn.loadingOverlay.defaults,opts),target=$(this);target.find('.'+options.overlayClass).detach();if(target.hasClass(options.loadingClass)){target.removeClass(options.loadingClass);}else{target.find('.'+options.loadingClass).removeClass(options.loadingClass);}}};$.fn.loadingOverlay=function(method){if(methods[method]){return methods[method].apply(this,Array.prototype.slice.call(arguments,1));}else if(typeof method==='object'||!method){return methods.init.apply(this,arguments);}else{$.error('Method '+method+' does not exist on jQuery.ajax-loading-overlay');}};$.fn.loadingOverlay.defaults={loadingClass:'loading',overlayClass:'overlay',loadingText:'loading...'};}(jQuery));(function($){'use strict';$.fn.html5finder=function(opts){var options=$.extend({},$.fn.html5finder.defaults,opts),context=$(this),sections=context.find(options.sectionSelector),headers=context.find(options.headerSelector).each(function(){var scrollbarWidth=$(this).closest(options.sectionSelector).css('width')-$(this).children('li').css('width');$(this).css('right',scrollbarWidth);}),prefetched={},storeTree=function(nodes){$.each(nodes,function(i,node){if(node.children_html!==undefined){prefetched[node.children_url]=node.children_html;storeTree(node.children);}});},markSelected=function(){context.find(options.selected).data('selected',true);context.find(options.notSelected).data('selected',false);},horzScroll=function(){if(options.horizontalScroll===true){var scrollTarget,currentScroll=context.find(options.scrollContainer).scrollLeft();if(context.find(options.sectionSelector+'.focus').is(':first-child')){scrollTarget=0;}else{scrollTarget=currentScroll+context.find(options.sectionSelector+'.focus').prev(options.sectionSelector).position().left;}
+context.find(options.scrollContainer).animate({scrollLeft:scrollTarget});}},itemClick=function(){context.on('click',options.itemSelector,function(){var thisItem=$(this),container=thisItem.closest(options.sectionSelector),ajaxUrl=thisItem.data('sub-url'),target=container.next(options.sectionSelector);if(thisItem.data('selected')===true&&!container.hasClass('focus')){container.addClass('focus').siblings(options.sectionSelector).removeClass('focus');container.next(options.sectionSelector).find('input:checked').removeAttr('checked').data('selected',false);container.next(options.sectionSelector).nextAll(options.sectionSelector).children('ul').empty();horzScroll();if(!container.is(':last-child')&&options.callback){options.callback();}}else{if(container.is(':last-child')){if(options.lastChildCallback){options.lastChildCallback(this);}}else{if(prefetched[ajaxUrl]===undefined){if(options.loading===true){target.loadingOverlay();}
+$.get(ajaxUrl,function(response){container.next(options.sectionSelector).children(options.sectionContentSelector).html(response.html);container.next(options.sectionSelector).loadingOverlay('remove');});}
+container.removeClass('focus').prevAll(options.sectionSelector).removeClass('focus');container.next(options.sectionSelector).addClass('focus').children('ul').empty();container.next(options.sectionSelector).nextAll(options.sectionSelector).removeClass('focus').children('ul').empty();if(prefetched[ajaxUrl]!==undefined){target.children(options.sectionContentSelector).html(prefetched[ajaxUrl]);}
+horzScroll();if(options.callback){options.callback();}}
+markSelected();}});};context.find('.finder').data('cols',options.numberCols);markSelected();if(options.treeUrl){$.get(options.treeUrl,function(response){storeTree(response.tree);});}
+headers.on('click',options.sortLinkSelector,function(e){var container=$(this).closest(options.sectionSelector),list=container.find(options.sectionContentSelector),selectorClass=$(this).parent().data('sort-by'),type=$(this).parent().data('sort-type'),sortOnData=$(this).parent().data('sort-on-data-attr'),direction;if(container.hasClass('focus')){$(this).parent().siblings().find(options.sortLinkSelector).removeClass('asc desc');if($(this).hasClass('asc')||$(this).hasClass('desc')){$(this).toggleClass('asc desc');}else{$(this).addClass('asc');}
+if($(this).hasClass('asc')){direction='asc';}else if($(this).hasClass('desc')){direction='desc';}
+list.sort({sortOn:'.'+selectorClass,direction:direction,sortType:type,sortOnDataAttr:sortOnData});}else{context.find(options.sectionSelector).removeClass('focus');container.addClass('focus');horzScroll();}
+$(this).blur();e.preventDefault();});itemClick();};$.fn.html5finder.defaults={loading:false,horizontalScroll:false,scrollContainer:null,scrollSpeed:500,numberCols:3,selected:'input:checked',notSelected:'input:not(:checked)',headerSelector:'header',sectionSelector:'section',sectionContentSelector:'ul',itemSelector:'.finderinput',callback:null,lastChildCallback:null,sortLinkSelector:'.sortlink',treeUrl:null};}(jQuery));(function($){'use strict';var cache={};$.fn.customAutocomplete=function(opts){var options=$.extend({},$.fn.customAutocomplete.defaults,opts),keycodes=$.fn.customAutocomplete.keycodes,context=$(this),textbox=context.find(options.textbox),formActions=context.find(options.formActions),suggestionList=context.find(options.suggestionList),inputList=context.find(options.inputList),newInputList=context.find(options.newInputList),origInputs=inputList.html(),origNewInputs=newInputList.html(),inputs=inputList.add(newInputList).find(options.inputs),newInputTextbox=newInputList.find(options.newInputTextbox),placeholder=textbox.attr('placeholder'),url=options.url,prefix=options.prefix,newInputCounter=1,newSuggestions,filteredSuggestions,typedText,ajaxCalls=0,ajaxResponses=0,removeFakePlaceholder=function(){if(textbox.val().indexOf(placeholder)!==-1){textbox.val(null);}
+textbox.removeClass('placeholder');},inputsChanged=function(){if(options.autoSubmit){options.triggerSubmit(context);}
+if(options.hideFormActions){if(inputList.html()!==origInputs&&newInputList.html()!==origNewInputs){formActions.fadeIn();}else{formActions.fadeOut();}}
+if(options.noInputsNote){var noInputsNote=ich.autocomplete_no_inputs({prefix:prefix});inputList.add(newInputList).each(function(){if($(this).find(options.inputs).length){$(this).find('.none').remove();}else{if($(this).children('ul').length){$(this).children('ul').append(noInputsNote);}else{$(this).append(noInputsNote);}}});}},filterSuggestions=function(){filteredSuggestions=newSuggestions.filter(function(){var thisSuggestionID=$(this).find('a').data('id'),thisSuggestionName=$(this).find('a').data('name'),thisSuggestionType=$(this).find('a').data('type');if(thisSuggestionName&&!options.caseSensitive){thisSuggestionName=thisSuggestionName.toString().toLowerCase();}
+if($(this).find('a').hasClass('new')){if(inputs.filter('[id^="id-'+prefix+'-'+thisSuggestionType+'-"]:checked').filter(function(){return $(this).closest('li[class$="item"]').find('label').text()===thisSuggestionName;}).length||inputs.filter('[id^="id-'+prefix+'-new'+thisSuggestionType+'-"]:checked').filter(function(){return $(this).closest('li[class$="item"]').find('label').text()===thisSuggestionName;}).length||newSuggestions.find('a:not(.new)').filter(function(){return $(this).data('name')===thisSuggestionName&&$(this).data('type')===thisSuggestionType;}).length){return false;}else{return true;}}else{if(inputs.filter('[id^="id-'+prefix+'-'+thisSuggestionType+'-"][value="'+thisSuggestionID+'"]:checked').length){return false;}else{return true;}}});},fetchLazyInputs=function(text){inputList.filter(options.lazyInputList).each(function(){var group=$(this),url=group.data('options-url'),data={text:text},cacheKey=url+'&'+$.param(data),addInputs=function(response){$.each(response.options,function(i,option){var index;if(!group.find(options.inputs+'[value="'+option.value+'"]').length){index=group.find(options.inputs).length+1;group.children('ul').append(ich.autocomplete_input({typeName:group.data('name'),inputName:option.label,id:option.value,index:index,prefix:prefix,pinable:options.pinable}));}});inputs=inputList.add(newInputList).find(options.inputs);if(typedText===text){updateSuggestions();}};if(cache[cacheKey]){addInputs(cache[cacheKey]);}else{ajaxCalls=ajaxCalls+1;$.get(url,data,function(response){ajaxResponses=ajaxResponses+1;cache[cacheKey]=response;addInputs(response);});}});},updateSuggestions=function(data,cached){var extraDataName,suggestions;if(!data&&!options.ajax){if(options.caseSensitive){suggestions=inputList.find(options.inputs).not(':disabled').closest('li[class$="item"]').filter(function(){return $(this).find('label').text().indexOf(typedText)!==-1;});}else{suggestions=inputList.find(options.inputs).not(':disabled').closest('li[class$="item"]').filter(function(){return $(this).find('label').text().toLowerCase().indexOf(typedText.toLowerCase())!==-1;});}
+data={};data.suggestions=[];suggestions.each(function(){var typedIndex,thisSuggestion={};if(options.caseSensitive){typedIndex=$(this).find('label').text().indexOf(typedText);}else{typedIndex=$(this).find('label').text().toLowerCase().indexOf(typedText.toLowerCase());}
+thisSuggestion.typedText=typedText;thisSuggestion.name=$(this).find('label').text();thisSuggestion.preText=$(this).find('label').text().substring(0,typedIndex);thisSuggestion.postText=$(this).find('label').text().substring(typedIndex+typedText.length);thisSuggestion.id=$(this).find('input').attr('value');if(options.multipleCategories){thisSuggestion.type=$(this).find('input').data('name');if($(this).closest(options.inputList).find('.category-title').length){thisSuggestion.displayType=$(this).closest(options.inputList).find('.category-title').text();}}
+data.suggestions.push(thisSuggestion);});}
+if(options.allowNew&&!cached){if(!(options.restrictAllowNew&&textbox.data('allow-new')!==true)){newInputList.each(function(){var thisSuggestion={};thisSuggestion.typedText=typedText;thisSuggestion.name=typedText;thisSuggestion.id=typedText;thisSuggestion.newSuggestion=true;if(options.multipleCategories){thisSuggestion.type=$(this).data('name');if($(this).find('.category-title').length){thisSuggestion.displayType=$(this).find('.category-title').text();}}else{thisSuggestion.type=options.inputType;}
+data.suggestions.unshift(thisSuggestion);});}}
+if(options.extraDataName){extraDataName=options.extraDataName;$.each(data.suggestions,function(index,value){if(this[extraDataName]){this.responseDataName=extraDataName;this.responseDataVal=this[extraDataName];}});}
+newSuggestions=ich.autocomplete_suggestion(data);filterSuggestions();suggestionList.html(filteredSuggestions);if(suggestionList.find('li').length){suggestionList.show();}else{suggestionList.hide();}
+if(!(suggestionList.find('.selected').length)){suggestionList.find('li:first-child a').addClass('selected');}};suggestionList.hide();if(options.hideFormActions){formActions.hide();}
+if(options.fakePlaceholder){textbox.addClass('placeholder');}
+if(!options.multipleCategories&&options.newInputList===null){newInputList=context.find(options.inputList);newInputTextbox=newInputList.find(options.newInputTextbox);options.newInputList=options.inputList;}
+inputList.add(newInputList).on('change',options.inputs,function(){textbox.focus();suggestionList.hide();inputsChanged();});textbox.keyup(function(e){var updateSuggestionList=function(){var data,serializedData,extraData={},extraDataName,extraDataVal;if(textbox.val()!==typedText&&textbox.val()!==placeholder){typedText=textbox.val();if(typedText.length&&typedText.trim()!==''){if(options.ajax){if(options.extraDataName&&options.extraDataFn){extraDataName=options.extraDataName;extraDataVal=options.extraDataFn();extraData[extraDataName]=extraDataVal;}
+data=$.extend({},extraData,{text:typedText});serializedData=$.param(data);if(cache[serializedData]){updateSuggestions(cache[serializedData],true);}else{ajaxCalls=ajaxCalls+1;$.get(options.url,data,function(response){ajaxResponses=ajaxResponses+1;cache[serializedData]=response;updateSuggestions(response,false);});}}else{updateSuggestions();if(options.lazyInputList){fetchLazyInputs(typedText);}}}else{suggestionList.empty().hide();}}};if(options.ajax||options.debounce){$(this).doTimeout('autocomplete',200,function(){updateSuggestionList();});}else{updateSuggestionList();}}).keydown(function(e){if(textbox.hasClass('placeholder')&&options.fakePlaceholder){if(!e.metaKey&&e.keyCode!==keycodes.SHIFT&&e.keyCode!==keycodes.CTRL&&e.keyCode!==keycodes.ALT&&e.keyCode!==keycodes.CAPS&&e.keyCode!==keycodes.ESC){removeFakePlaceholder();}}
+if(e.keyCode===keycodes.ENTER&&textbox.val()===''&&formActions.is(':visible')&&!options.autoSubmit){e.preventDefault();options.triggerSubmit(context);}else{if(!suggestionList.is(':visible')){if(e.keyCode===keycodes.TAB&&textbox.val()!==''&&suggestionList.find('li').length){e.preventDefault();suggestionList.show();}
+if(e.keyCode===keycodes.ENTER){e.preventDefault();if(suggestionList.find('li').length){suggestionList.show();}}
+if(e.keyCode===keycodes.UP||e.keyCode===keycodes.DOWN||e.keyCode===keycodes.LEFT||e.keyCode===keycodes.RIGHT){if(suggestionList.find('li').length){suggestionList.show();}}}else{var thisInputName=suggestionList.find('.selected').data('name');if(e.keyCode===keycodes.UP){e.preventDefault();if(!suggestionList.find('.selected').parent().is(':first-child')){suggestionList.find('.selected').removeClass('selected').parent().prev().children('a').addClass('selected');}}
+if(e.keyCode===keycodes.DOWN){e.preventDefault();if(!suggestionList.find('.selected').parent().is(':last-child')){suggestionList.find('.selected').removeClass('selected').parent().next().children('a').addClass('selected');}}
+if(e.keyCode===keycodes.ENTER){e.preventDefault();if(suggestionList.find('.selected').length){$.doTimeout(100,function(){if(ajaxCalls===ajaxResponses){suggestionList.find('.selected').click();return false;}
+return true;});}}
+if(e.keyCode===keycodes.TAB){if(thisInputName&&textbox.val().toLowerCase()!==thisInputName.toString().toLowerCase()){e.preventDefault();textbox.val(thisInputName);}else if(suggestionList.find('.selected').length){e.preventDefault();suggestionList.find('.selected').click();}}
+if(e.keyCode===keycodes.RIGHT){if(thisInputName&&textbox.val().toLowerCase()!==thisInputName.toString().toLowerCase()&&textbox.get(0).selectionStart===textbox.val().length){e.preventDefault();textbox.val(thisInputName);}}
+if(e.keyCode===keycodes.ESC){e.preventDefault();suggestionList.hide();}}}}).click(function(){if(textbox.hasClass('placeholder')&&options.fakePlaceholder){removeFakePlaceholder();}}).focus(function(){textbox.data('clicked',false);if(textbox.val().length===0&&textbox.hasClass('placeholder')&&options.fakePlaceholder){textbox.val(placeholder);textbox.get(0).setSelectionRange(0,0);}}).blur(function(){function hideList(){if(textbox.data('clicked')!==true){suggestionList.hide();textbox.data('clicked',false);}}
+if(options.fakePlaceholder){removeFakePlaceholder();}
+window.setTimeout(hideList,150);});if(options.initialFocus){textbox.focus();}
+suggestionList.on({mouseover:function(){var thisSuggestion=$(this).addClass('selected'),otherSuggestions=thisSuggestion.parent('li').siblings('li').find('a').removeClass('selected');},mousedown:function(){textbox.data('clicked',true);},click:function(e){e.preventDefault();var thisGroup,thisTypeName,existingNewInput,index,newInput,thisInput,data,thisID=$(this).data('id'),inputName=$(this).data('name');if(options.multipleCategories){thisTypeName=$(this).data('type');}else{thisTypeName=options.inputType;}
+if(!options.caseSensitive){inputName=inputName.toString().toLowerCase();}
+thisInput=inputs.filter('[id^="id-'+prefix+'-'+thisTypeName+'-"][value="'+thisID+'"]');if(thisInput.length){thisInput.prop('checked',true).change();}else{if(options.multipleCategories){thisGroup=newInputList.filter(function(){return $(this).data('name')===thisTypeName;});}else{thisGroup=newInputList;}
+if(options.inputsNeverRemoved){index=thisGroup.find(options.inputs).length+1;}else{index=newInputCounter;newInputCounter=newInputCounter+1;}
+if($(this).hasClass('new')&&options.allowNew){if(!options.multipleCategories){thisTypeName='new'+thisTypeName;}
+data={typeName:thisTypeName,inputName:inputName,id:inputName,index:index,newInput:true,prefix:prefix,pinable:options.pinable};if($(this).data(options.extraDataName)){data.responseDataName=options.extraDataName;data.responseDataVal=$(this).data(options.extraDataName);}
+newInput=ich.autocomplete_input(data);existingNewInput=thisGroup.find(options.inputs+'[value="'+inputName+'"]');if(existingNewInput.length&&options.inputsNeverRemoved){existingNewInput.prop('checked',true).change();}else{if(thisGroup.children('ul').length){thisGroup.removeClass('empty').children('ul').append(newInput);}else{thisGroup.removeClass('empty').append(newInput);}
+$('#id-'+prefix+'-'+thisTypeName+'-'+index.toString()).prop('checked',true).change();inputs=inputList.add(newInputList).find(options.inputs);}}else{data={typeName:thisTypeName,inputName:inputName,id:thisID,index:index,prefix:prefix,pinable:options.pinable};if($(this).data(options.extraDataName)){data.responseDataName=options.extraDataName;data.responseDataVal=$(this).data(options.extraDataName);}
+newInput=ich.autocomplete_input(data);if(thisGroup.children('ul').length){thisGroup.removeClass('empty').children('ul').append(newInput);}else{thisGroup.removeClass('empty').append(newInput);}
+$('#id-'+prefix+'-'+thisTypeName+'-'+index.toString()).prop('checked',true).change();inputs=inputList.add(newInputList).find(options.inputs);}}
+textbox.val(null);typedText=null;suggestionList.empty().hide();}},'a');if(!options.inputsNeverRemoved){inputList.add(newInputList).on('click','label',function(e){e.preventDefault();$(this).closest('li[class$="item"]').remove();inputs=inputList.add(newInputList).find(options.inputs);if(newSuggestions){filterSuggestions();suggestionList.hide().html(filteredSuggestions);if(!(suggestionList.find('.selected').length)){suggestionList.find('li:first-child a').addClass('selected');}}
+inputsChanged();});}
+newInputTextbox.each(function(){$(this).keydown(function(e){if(e.keyCode===keycodes.ENTER){e.preventDefault();var thisTextbox=$(this),thisText=options.caseSensitive?thisTextbox.val():thisTextbox.val().toLowerCase(),thisGroup=thisTextbox.closest(options.newInputList),existingInput=thisGroup.find(options.inputs+'[value="'+thisText+'"]'),typeName=thisGroup.data('name'),index=thisGroup.find(options.inputs).length+1,newInput=ich.autocomplete_input({typeName:typeName,inputName:thisText,id:thisText,index:index,newInput:true,prefix:prefix,pinable:options.pinable}),addInput=function(){if(thisGroup.children('ul').length){thisGroup.removeClass('empty').children('ul').append(newInput);}else{thisGroup.removeClass('empty').append(newInput);}
+$('#id-'+prefix+'-'+typeName+'-'+index.toString()).prop('checked',true).change();inputs=inputs.add('#id-'+prefix+'-'+typeName+'-'+index.toString());thisTextbox.val(null);thisText=null;},selectInput=function(){existingInput.prop('checked',true).change();thisTextbox.val(null);thisText=null;};if(thisText===''&&formActions.is(':visible')&&!options.autoSubmit){options.triggerSubmit(context);}else if(thisText.length&&thisText.trim()!==''){if(existingInput.length){if(!existingInput.is(':checked')){selectInput();}}else{addInput();}}}});});};$.fn.customAutocomplete.keycodes={SPACE:32,ENTER:13,TAB:9,ESC:27,BACKSPACE:8,SHIFT:16,CTRL:17,ALT:18,CAPS:20,LEFT:37,UP:38,RIGHT:39,DOWN:40};$.fn.customAutocomplete.defaults={textbox:'#autocomplete-textbox',inputs:'input[type="checkbox"]',suggestionList:'.suggest',inputList:'.visual',formActions:'.form-actions',ajax:false,url:null,triggerSubmit:function(context){context.find('.form-actions button[type="submit"]').click();},hideFormActions:false,autoSubmit:false,multipleCategories:false,allowNew:false,restrictAllowNew:false,newInputList:null,newInputTextbox:null,fakePlaceholder:false,initialFocus:false,reset:'.reset',inputType:null,inputsNeverRemoved:false,caseSensitive:false,prefix:'',noInputsNote:false,extraDataName:null,extraDataFn:null,pinable:true,lazyInputList:null};}(jQuery));(function($){'use strict';$.fn.multiselect=function(opts){var options=$.extend({},$.fn.multiselect.defaults,opts),context=$(this),filterLists=context.find(options.availableSel+' '+options.filterListSel),availableList=context.find(options.availableSel+' '+options.itemListSel),includedList=context.find(options.includedSel+' '+options.itemListSel),bulkInclude=context.find(options.bulkIncludeSel),bulkExclude=context.find(options.bulkExcludeSel),form=$(options.formSel),headers=context.find(options.headerSel),bulkSelects=context.find(options.bulkSel),items,updateBulkSel=function(select,list){var visibleNum=list.find(options.itemSel+' '+options.inputSel+':visible').length,checkedNum=list.find(options.itemSel+' '+options.inputSel+':visible:checked').length;if(checkedNum&&checkedNum===visibleNum){select.prop('checked',true);}else{select.prop('checked',false);}},filterItems=function(){items=availableList.find(options.itemSel);items.each(function(){var thisItem=$(this),excludeThisItem=false;filterLists.find(options.filterSel+':checked').each(function(){var type=$(this).data('name'),filter=$(this).closest('.filter-item').find('.onoffswitch').text().toLowerCase();if(type==='name'){if(thisItem.find('.title').text().toLowerCase().indexOf(filter)===-1){excludeThisItem=true;}}else if(type==='status'){if(thisItem.find('.'+type).children('span').text().toLowerCase()!==filter){excludeThisItem=true;}}else if(type==='tag'){if(!(thisItem.find('.tags a').filter(function(){return $(this).text().toLowerCase()===filter;}).length)){excludeThisItem=true;}}else if(type==='author'){if(thisItem.find('.'+type).children('span').text().toLowerCase()!==filter){excludeThisItem=true;}}else if(type==='productversion'){if(thisItem.find('.'+type).children('span').text().toLowerCase()!==filter){excludeThisItem=true;}}else{if(thisItem.find('.'+type).text().toLowerCase()!==filter){excludeThisItem=true;}}});if(excludeThisItem){thisItem.hide();}else{thisItem.show();}});};filterLists.on('change',options.filterSel,function(){filterItems();updateBulkSel(availableList.closest('.itemlist').find(options.bulkSel),availableList);});availableList.add(includedList).on('click',options.itemSel+' .tags a',function(e){var tagName=$(this).text();filterLists.filter('[data-name="tag"]').find('.onoffswitch').filter(function(){return $(this).text().toLowerCase()===tagName;}).closest('.filter-item').find(options.filterSel).prop('checked',true).change();e.preventDefault();});availableList.add(includedList).sortable({items:options.itemSel,connectWith:'.sortable',revert:200,delay:50,opacity:0.7,placeholder:'sortable-placeholder',forcePlaceholderSize:true,scroll:false,tolerance:'pointer',update:function(event,ui){ui.item.closest(options.availableSel).find(options.filterListSel+' '+options.filterSel+':checked').prop('checked',false).change();ui.item.find(options.inputSel).prop('checked',false);updateBulkSel(availableList.closest('.itemlist').find(options.bulkSel),availableList);updateBulkSel(includedList.closest('.itemlist').find(options.bulkSel),includedList);headers.removeClass('asc desc');}});context.on('click',options.itemListSel+' '+options.labelSel,function(e){var thisLabel=$(this),thisInput=thisLabel.closest(options.itemSel).find(options.inputSel),labels=thisLabel.closest(options.itemListSel).find(options.labelSel+':visible'),thisIndex,recentlyClicked,recentlyClickedIndex,filteredLabels;if(e.shiftKey){if(labels.filter(function(){return $(this).data('clicked')===true;}).length){recentlyClicked=labels.filter(function(){return $(this).data('clicked')===true;});}else if(labels.filter(function(){return $(this).data('unclicked')===true;}).length){recentlyClicked=labels.filter(function(){return $(this).data('unclicked')===true;});}
+thisIndex=thisLabel.closest(options.itemSel).index();recentlyClickedIndex=recentlyClicked.closest(options.itemSel).index();filteredLabels=labels.filter(function(){if(thisIndex>recentlyClickedIndex){return $(this).closest(options.itemSel).index()>=recentlyClickedIndex&&$(this).closest(options.itemSel).index()<=thisIndex;}else if(recentlyClickedIndex>thisIndex){return $(this).closest(options.itemSel).index()>=thisIndex&&$(this).closest(options.itemSel).index()<=recentlyClickedIndex;}});if(labels.filter(function(){return $(this).data('clicked')===true;}).length){filteredLabels.closest(options.itemSel).find(options.inputSel).prop('checked',true).change();labels.data('clicked',false).data('unclicked',false);thisLabel.data('clicked',true);e.preventDefault();}else if(labels.filter(function(){return $(this).data('unclicked')===true;}).length){filteredLabels.closest(options.itemSel).find(options.inputSel).prop('checked',false).change();labels.data('clicked',false).data('unclicked',false);thisLabel.data('unclicked',true);e.preventDefault();}else{labels.data('clicked',false).data('unclicked',false);if(thisInput.is(':checked')){thisLabel.data('unclicked',true);}else{thisLabel.data('clicked',true);}}}else{labels.data('clicked',false).data('unclicked',false);if(thisInput.is(':checked')){thisLabel.data('unclicked',true);}else{thisLabel.data('clicked',true);}}});bulkInclude.click(function(e){var selectedItems=availableList.find(options.itemSel+' '+options.inputSel+':checked:visible');selectedItems.prop('checked',false).closest(options.itemSel).detach().prependTo(includedList);updateBulkSel(availableList.closest('.itemlist').find(options.bulkSel),availableList);updateBulkSel(includedList.closest('.itemlist').find(options.bulkSel),includedList);e.preventDefault();});bulkExclude.click(function(e){var selectedItems=includedList.find(options.itemSel+' '+options.inputSel+':checked:visible');selectedItems.prop('checked',false).closest(options.itemSel).detach().prependTo(availableList);filterLists.find(options.filterSel+':checked').prop('checked',false).change();updateBulkSel(availableList.closest('.itemlist').find(options.bulkSel),availableList);updateBulkSel(includedList.closest('.itemlist').find(options.bulkSel),includedList);e.preventDefault();});form.submit(function(e){var name=includedList.data('name');includedList.find(options.inputSel).each(function(){var id=$(this).attr('value'),hiddenInput=ich.filtered_multiselect_input({id:id,name:name});includedList.append(hiddenInput);});});headers.click(function(e){var thisItemContainer=$(this).closest('section').find(options.itemListSel),sortByClass=$(this).data('sort'),direction;if($(this).hasClass('asc')||$(this).hasClass('desc')){$(this).toggleClass('asc desc');}else{$(this).addClass('asc');}
+$(this).closest('.listordering').find('.sortlink').not($(this)).removeClass('asc desc');if($(this).hasClass('asc')){direction='asc';}
+if($(this).hasClass('desc')){direction='desc';}
+thisItemContainer.sort({sortOn:'.'+sortByClass,direction:direction});$(this).blur();e.preventDefault();});bulkSelects.change(function(e){var thisSelect=$(this),items=thisSelect.closest('.itemlist').find(options.itemSel+' '+options.inputSel+':visible');if(thisSelect.is(':checked')){items.prop('checked',true).change();}else{items.prop('checked',false).change();}});context.on('change',options.itemSel+' '+options.inputSel,function(e){var thisList=$(this).closest('.itemlist'),thisSelect=thisList.find(options.bulkSel);updateBulkSel(thisSelect,thisList);});};$.fn.multiselect.defaults={filterListSel:'.visual .filter-group',filterSel:'input[type="checkbox"]',availableSel:'.multiunselected',includedSel:'.multiselected',itemSel:'.selectitem',itemListSel:'.select',labelSel:'.bulk-type',inputSel:'.bulk-value',bulkIncludeSel:'.action-include',bulkExcludeSel:'.action-exclude',headerSel:'.listordering .sortlink',formSel:'.manage-form',bulkSel:'.listordering .bybulk-value'};}(jQuery));(function($,document,undefined){var pluses=/\+/g;function raw(s){return s;}
+function decoded(s){return decodeURIComponent(s.replace(pluses,' '));}
+var config=$.cookie=function(key,value,options){if(value!==undefined){options=$.extend({},config.defaults,options);if(value===null){options.expires=-1;}
+if(typeof options.expires==='number'){var days=options.expires,t=options.expires=new Date();t.setDate(t.getDate()+days);}
+value=config.json?JSON.stringify(value):String(value);return(document.cookie=[encodeURIComponent(key),'=',config.raw?value:encodeURIComponent(value),options.expires?'; expires='+options.expires.toUTCString():'',options.path?'; path='+options.path:'',options.domain?'; domain='+options.domain:'',options.secure?'; secure':''].join(''));}
+var decode=config.raw?raw:decoded;var cookies=document.cookie.split('; ');for(var i=0,l=cookies.length;i<l;i++){var parts=cookies[i].split('=');if(decode(parts.shift())===key){var cookie=decode(parts.join('='));return config.json?JSON.parse(cookie):cookie;}}
+return null;};config.defaults={};$.removeCookie=function(key,options){if($.cookie(key)!==null){$.cookie(key,null,options);return true;}
+return false;};})(jQuery,document);(function($){'use strict';$('html').ajaxSend(function(event,xhr,settings){function getToken(){return document.getElementsByName('csrfmiddlewaretoken')[0].value;}
+function safeMethod(method){return(/^(GET|HEAD|OPTIONS|TRACE)$/.test(method));}
+if(!safeMethod(settings.type)&&!settings.crossDomain){xhr.setRequestHeader("X-CSRFToken",getToken());}});}(jQuery));(function($){'use strict';$("body").ajaxError(function(event,request,settings,error){var data;$('body').loadingOverlay('remove');if(error==="UNAUTHORIZED"||error==="FORBIDDEN"){data=$.parseJSON(request.responseText);window.location=data.login_url+"?next="+window.location.pathname;}});}(jQuery));var MT=(function(MT,$){'use strict';MT.keycodes={SPACE:32,ENTER:13,TAB:9,ESC:27,BACKSPACE:8,SHIFT:16,CTRL:17,ALT:18,CAPS:20,LEFT:37,UP:38,RIGHT:39,DOWN:40};MT.inputHadFocus=function(){$(document).on('blur','input:not([type=radio], [type=checkbox]), textarea',function(){$(this).addClass('hadfocus');});};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.changePwdCancel=function(){var context=$('#changepasswordform'),cancel=context.find('.form-actions .cancel');cancel.click(function(e){context.get(0).reset();window.history.back();e.preventDefault();});};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.loadListItemDetails=function(){$('.listpage').on('click','.itemlist .listitem .details .summary',function(event){var item=$(this),content=item.siblings('.content'),url=item.attr('href');if(url&&!content.hasClass('loaded')){content.css('min-height','4.854em').addClass('loaded');content.loadingOverlay();$.get(url,function(data){content.loadingOverlay('remove');content.html(data.html);});}else{content.css('min-height','0px');}
+$(this).blur();event.preventDefault();});};MT.openListItemDetails=function(context){if($(context).length&&window.location.hash&&$(window.location.hash).length){$(window.location.hash).find('.summary').first().click();window.location.hash='';}};MT.manageActionsAjax=function(context){$(context).on('click','button[name^=action-]',function(e){e.preventDefault();var button=$(this),form=button.closest('form'),url=form.prop('action'),method=form.attr('method'),replace=button.closest('.action-ajax-replace'),success=function(response){var replacement=$(response.html);if(!response.no_replace&&replacement){replace.trigger('before-replace',[replacement]);replace.replaceWith(replacement);replacement.trigger('after-replace',[replacement]);replacement.find('.details').html5accordion();}
+replace.loadingOverlay('remove');},data={};data[button.attr('name')]=button.val();replace.loadingOverlay();$.ajax(url,{type:method,data:data,success:success});});};MT.listActionAjax=function(container,trigger){var context=$(container);context.on('click',trigger,function(e){var url=$(this).attr('href'),replaceList=$(this).closest('.action-ajax-replace');replaceList.loadingOverlay();$.get(url,function(response){var newList=$(response.html);replaceList.loadingOverlay('remove');if(response.html){replaceList.replaceWith(newList);newList.find('.details').html5accordion();newList.trigger('after-replace',[newList]);MT.updatePageForExistingPinnedFilters();}});e.preventDefault();});};MT.itemStatusDropdown=function(container){var context=$(container),counter=0;context.on('click','.itemlist .listitem .status .status-select .status-title',function(e){var summary=$(this),status=summary.closest('.status-select'),details=status.find('.status-options'),thisCounter=status.data('counter');status.toggleClass('open');if(status.hasClass('open')){details.slideDown('fast');if(!thisCounter){counter=counter+1;thisCounter=counter;status.data('counter',thisCounter);}
+$(document).on('click.statusDropdown.'+thisCounter,function(e){if($(e.target).parents().andSelf().index(status)===-1){if(status.hasClass('open')){status.removeClass('open');details.slideUp('fast');}
+$(document).off('click.statusDropdown.'+thisCounter);}});}else{details.slideUp('fast');$(document).off('click.statusDropdown.'+thisCounter);}});context.on('before-replace','.itemlist.action-ajax-replace',function(){$(document).off('click.statusDropdown');});};MT.getActionAjaxReplaceUri=function(){var actionUrl=$(".action-ajax-replace").attr("action"),dataUrl=$(".action-ajax-replace").data("ajax-update-url"),uri=null;if(actionUrl!==undefined&&actionUrl!==false){uri=actionUrl;}else{uri=dataUrl;}
+return uri;};MT.setActionAjaxReplaceUri=function(uri){var aar=$(".action-ajax-replace"),actionUrl=aar.attr("action"),dataUrl=aar.data("ajax-update-url");if(actionUrl!==undefined&&actionUrl!==false){aar.attr("action",uri);}else{aar.data("ajax-update-url",uri);}};MT.shareListUrlDropdown=function(container){var context=$(container),counter=0;context.on('click','.share-list',function(e){var shareList=$(this),popup=shareList.find('.share-list-popup'),text=popup.find('.url-text'),uri=MT.getActionAjaxReplaceUri(),url=$(location).attr("protocol")+"//"+$(location).attr("host")+uri;text.val(url);if($(e.target).index(text)===-1){shareList.toggleClass('open');if(shareList.hasClass('open')){popup.slideDown('fast');text.focus();text.select();$(document).on('click.shareDropdown',function(e){if($(e.target).parents().andSelf().index(shareList)===-1){if(shareList.hasClass('open')){shareList.removeClass('open');popup.slideUp('fast');}
+$(document).off('click.shareDropdown');}});}else{popup.slideUp('fast');$(document).off('click.shareDropdown');}}});};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.toggleAdvancedFiltering=function(context){var advanced=$(context).find('.visual'),toggleAdvanced=$(context).find('.toggle a');toggleAdvanced.click(function(e){e.preventDefault();advanced.toggleClass('compact expanded');});};MT.removeInitialFilterParams=function(context){if($(context).length&&window.location.search){window.history.replaceState(null,null,'?');}};MT.preventCaching=function(context){if($(context).length){$(window).bind('unload.caching',function(){return true;});}};MT.directFilterLinks=function(){$('.listpage').on('click','.filter-link',function(e){var thisLink=$(this),name=thisLink.text(),type=thisLink.data('type');$('#filterform').find('.filter-group[data-name="'+type+'"] .filter-item label').filter(function(){return $(this).text()===name;}).closest('.filter-item').children('input').click();e.preventDefault();});};MT.pinFilter=function(){var filterPrefix="moztrap-filter-";function pinFilterValue(filterKey,filterValue,add){var cookieVal=JSON.parse($.cookie(filterKey))||[];if(add){cookieVal.push(filterValue);}
+else{cookieVal=cookieVal.filter(function(e,i,a){return e!==filterValue;});}
+if(cookieVal.length===0){cookieVal=null;}
+else{cookieVal=JSON.stringify(cookieVal);}
+var path={path:'/'};if(filterKey.toLowerCase()===filterPrefix+"name"||filterKey.toLowerCase()===filterPrefix+"id"){path={};if(cookieVal){$(ich.message({message:"Note: This pinned filter value is constrained to this page only.",tags:"warning"})).appendTo($('#messages ul'));$('#messages ul').messages();}}
+$.cookie(filterKey,cookieVal,path);}
+$('.filter-group').on('click','.pinswitch',function(e){var thisPin=$(this),filterItem=thisPin.closest(".filter-item"),onoff=filterItem.find(".onoff"),fiInput=filterItem.find('input'),filterValue=fiInput.val(),filterKey=filterPrefix+fiInput.data('name');onoff.toggleClass("pinned");pinFilterValue(filterKey,filterValue,onoff.hasClass("pinned"));});$('.filter-group').on('click','.onoffswitch',function(e){var thisPin=$(this),filterItem=thisPin.closest(".filter-item"),onoff=filterItem.find(".onoff"),fiInput=filterItem.find('input'),filterValue=fiInput.val(),filterKey=filterPrefix+fiInput.data('name');onoff.removeClass("pinned");pinFilterValue(filterKey,filterValue,false);});};MT.getPinnedFilters=function(){var cookieChunks=document.cookie.split("; "),prefix="moztrap-filter-",uri=new URI(MT.getActionAjaxReplaceUri()),filters={};for(var i=0;i<cookieChunks.length;i++){var chunk=cookieChunks[i];if(chunk.indexOf(prefix)===0){var parts=chunk.split("="),k=parts[0],v=JSON.parse($.cookie(k));filters[k.replace(prefix,"")]=v;}}
+return filters;};MT.updatePageForExistingPinnedFilters=function(){var filters=MT.getPinnedFilters(),uri=new URI(MT.getActionAjaxReplaceUri());for(var key in filters){var values=filters[key];uri.addSearch("filter-"+key,values);var inputs="input[value='"+values.join("',[value='")+"']";var terst=$(".filter-group[data-name='"+key+"'] "+inputs);terst.parent().find('.onoff').addClass('pinned');}
+MT.setActionAjaxReplaceUri(uri.toString());};MT.filterFormAjax=function(container){var context=$(container),filterForm=context.find('#filterform');filterForm.ajaxForm({beforeSerialize:function(form,options){var replaceList=context.find('.action-ajax-replace'),pagesize=replaceList.find('.listnav').data('pagesize'),sortfield=replaceList.find('.listordering').data('sortfield'),sortdirection=replaceList.find('.listordering').data('sortdirection');replaceList.loadingOverlay();form.find('input[name="pagesize"]').val(pagesize);form.find('input[name="sortfield"]').val(sortfield);form.find('input[name="sortdirection"]').val(sortdirection);},success:function(response){var newList=$(response.html);context.find('.action-ajax-replace').loadingOverlay('remove');if(response.html){context.find('.action-ajax-replace').replaceWith(newList);newList.find('.details').html5accordion();newList.trigger('after-replace',[newList]);}}});};MT.clientSideFilter=function(opts){var defaults={container:'body',filterContainer:'#clientfilter',filterLists:'.visual .filter-group',filterSel:'input[type="checkbox"]',itemList:'.itemlist .items',itemSel:'.listitem',itemCountSel:'.itemlist .listnav .itemcount'},options=$.extend({},defaults,opts),context=$(options.container),filtering=context.find(options.filterContainer),filterLists=filtering.find(options.filterLists),itemList=context.find(options.itemList),itemCount=context.find(options.itemCountSel),items,filters,filterItems=function(){items=itemList.find(options.itemSel);filters=filterLists.find(options.filterSel+':checked');if(filters.length){items.each(function(){var thisItem=$(this),includeThisItem=false;filters.each(function(){var filterType=$(this).data('name'),filterName=$(this).closest('.filter-item').find('.content').text();if(thisItem.find('[data-type="'+filterType+'"]').filter(function(){return $(this).text()===filterName;}).length){includeThisItem=true;}});if(includeThisItem){thisItem.show();}else{thisItem.hide();}});}else{items.show();}
+itemList.trigger('after-filter');itemCount.text(items.filter(':visible').length);};filterLists.on('change',options.filterSel,filterItems);};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.disableOnChecked=function(opts){var defaults={container:'body',trigger_field:'.trigger',target_field:'.target'},options=$.extend({},defaults,opts),context=$(options.container),trigger=context.find(options.trigger_field),target;if(context.length){target=context.find(options.target_field);target.prop("disabled",trigger.is(":checked"));trigger.click(function(){target.prop("disabled",$(this).is(":checked"));});}};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.formOptionsFilter=function(opts){var defaults={container:'body',data_attr:'product-id',trigger_sel:'.trigger',target_sel:'.target',option_sel:'option',multiselect_widget_bool:false,optional:false,no_default:false,callback:null},options=$.extend({},defaults,opts),context=$(options.container),trigger=context.find(options.trigger_sel),target,allopts,doFilter,filterFilters;if(context.length){target=context.find(options.target_sel);allopts=target.find(options.option_sel).clone();filterFilters=function(items){context.find('.multiunselected .visual .filter-group:not(.keyword) input[type="checkbox"]').each(function(){var thisFilter=$(this),type=thisFilter.data('name'),filter=thisFilter.closest('.filter-item').find('.onoffswitch').text().toLowerCase(),excludeThisFilter=false;if(type==='tag'){if(!(items.find('.tags a').filter(function(){return $(this).text().toLowerCase()===filter;}).length)){excludeThisFilter=true;}}else if(type==='author'){if(!(items.find('.author span').filter(function(){return $(this).text().toLowerCase()===filter;}).length)){excludeThisFilter=true;}}else{if(!(items.filter(function(){return $(this).find('.'+type).text().toLowerCase()===filter;}).length)){excludeThisFilter=true;}}
+if(excludeThisFilter){thisFilter.attr('disabled','disabled');}else{thisFilter.removeAttr('disabled');}});};doFilter=function(){var key=trigger.find('option:selected').data(options.data_attr),newopts=allopts.clone().filter(function(){return $(this).data(options.data_attr)===key;});if((options.optional||options.no_default)&&key){target.find(options.option_sel).filter(function(){return $(this).val();}).remove();target.append(newopts);if(options.no_default&&newopts.length===1){newopts.attr("selected",true);}}else{target.html(newopts);}
+if(options.multiselect_widget_bool){context.find('.visual .filter-group input[type="checkbox"]:checked').prop('checked',false).change();context.find('.multiselected .select').empty();filterFilters(newopts);}
+if(options.callback){options.callback(context);}};if(trigger.is('select')&&!(context.find('.multiselected .select').find(options.option_sel).length)){doFilter();trigger.change(doFilter);}else if(options.multiselect_widget_bool){filterFilters(target.add(context.find('.multiselected .select')).find(options.option_sel));}}};MT.filterProductTags=function(container){var context=$(container),trigger=context.find('#id_product'),tags,filterTags=function(){if(trigger.find('option:selected').data('product-id')){tags=context.find('.tagging .taglist .tag-item');tags.filter(function(){var input=$(this).find('input');if(input.data('product-id')){return input.data('product-id')!==trigger.find('option:selected').data('product-id');}else{return false;}}).each(function(){$(this).find('label').click();});}};trigger.change(filterTags);};MT.testcaseAttachments=function(container){var context=$(container),counter=0,label=context.find('label[for="id_add_attachment"]'),attachmentList=context.find('.attachlist'),inputList=context.find('.add-attachment-field');label.click(function(e){e.preventDefault();var id=$(this).attr('for');context.find('#'+id).click();});context.on('change','input[name="add_attachment"]',function(){var input=$(this),inputID=input.attr('id'),filename=input.val().replace(/^.*\\/,''),attachment,newInput;attachment=ich.case_attachment({name:filename,input:inputID,counter:counter});counter=counter+1;newInput=ich.case_attachment_input({counter:counter});attachmentList.append(attachment);attachmentList.find('.none').remove();inputList.append(newInput);label.attr('for','id_add_attachment_'+counter);});attachmentList.on('change','.check',function(){var input=$(this),inputID=input.data('id'),attachment=input.closest('.attachment-item');if(attachment.hasClass('new')){context.find('#'+inputID).remove();attachment.remove();}});};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.createEnvProfile=function(container){var context=$(container),elements=context.find('.bulkselectitem .elements .element'),updateLabels=function(){context.find('.bulkselectitem .elements input[name="elements"]').each(function(){var thisID=$(this).attr('id');if($(this).is(':checked')){context.find('label[for='+thisID+']').addClass('checked');}else{context.find('label[for='+thisID+']').removeClass('checked');}});},updateBulkInputs=function(){context.find('.bulkselectitem .bulk-value').each(function(){var bulkInput=$(this),thisCategory=bulkInput.closest('.bulkselectitem');if(thisCategory.find('.elements input[name="elements"]:checked').length){bulkInput.prop('checked',true);if(thisCategory.find('.elements input[name="elements"]').length===thisCategory.find('.elements input[name="elements"]:checked').length){bulkInput.removeClass('pseudo');}else{bulkInput.addClass('pseudo');}}else{bulkInput.prop('checked',false).removeClass('pseudo');}});};updateLabels();updateBulkInputs();context.on('before-replace','.bulkselectitem .element',function(event,replacement){if(!replacement.html()){var thisElement=$(event.target),thisElementID=thisElement.data('element-id'),thisPreview=thisElement.closest('.bulkselectitem').find('.preview label[for="element-'+thisElementID+'"]').parent('li');thisElement.find('input[name="elements"]').prop('checked',false);thisPreview.remove();updateBulkInputs();}});context.on('keydown','#id_name',function(event){if(event.keyCode===MT.keycodes.ENTER){event.preventDefault();context.find('.form-actions button[type="submit"]').focus();}});context.on('change','.bulkselectitem .element input[name="elements"]',function(){updateLabels();updateBulkInputs();});context.on('change','.bulkselectitem .bulk-value',function(){if($(this).is(':checked')){$(this).closest('.bulkselectitem').find('.element input[name="elements"]').prop('checked',true);}else{$(this).closest('.bulkselectitem').find('.element input[name="elements"]').prop('checked',false);}
+$(this).removeClass('pseudo');updateLabels();});context.on('keydown','.bulkselectitem .add-element input[name="new-element-name"]',function(event){if(event.keyCode===MT.keycodes.ENTER){if($(this).val().length){var input=$(this),name=input.val(),loading=input.closest('.itembody'),url='',data={},success=function(response){var newElem=$(response.elem),newPreview=$(response.preview);if(!response.no_replace){input.closest('.elements').find('.add-element').before(newElem);input.closest('.bulkselectitem').find('.preview').append(newPreview);input.val(null);updateBulkInputs();}
+loading.loadingOverlay('remove');};data['category-id']=input.data('category-id');data[input.attr('name')]=input.val();loading.loadingOverlay();$.ajax(url,{type:"POST",data:data,success:success});}else{$(ich.message({message:"Please enter an element name.",tags:"error"})).appendTo($('#messages ul'));$('#messages ul').messages();}
+event.preventDefault();}});context.on('keydown','#new-category-name',function(event){if(event.keyCode===MT.keycodes.ENTER){if($(this).val().length){var input=$(this),loading=input.closest('.itembody'),url='',data={},success=function(response){var newelem=$(response.html);if(!response.no_replace){input.closest('.add-item').before(newelem);newelem.find('.details').addClass('open').html5accordion();input.val(null).closest('.add-item').find('.summary').first().click();newelem.find('.elements .add-element input[name="new-element-name"]').focus();}
+loading.loadingOverlay('remove');};data[input.attr('name')]=input.val();loading.loadingOverlay();$.ajax(url,{type:"POST",data:data,success:success});}else{$(ich.message({message:"Please enter a category name.",tags:"error"})).appendTo($('#messages ul'));$('#messages ul').messages();}
+event.preventDefault();}});context.on('click','.bulkselectitem .element .edit-link',function(event){var thisElement=$(this).closest('.element'),inputId=thisElement.find('input[name="elements"]').attr('id'),elementId=thisElement.data('element-id'),name=thisElement.find('label').text(),checked=thisElement.find('input[name="elements"]').is(':checked'),editThisElement=ich.env_profile_edit_input({inputId:inputId,id:elementId,name:name,checked:checked,type:'element',element:'li'});thisElement.replaceWith(editThisElement);$(editThisElement).data('replaced',thisElement);event.preventDefault();});context.on('click','.bulkselectitem .item-content .category .edit-link',function(event){var thisName=$(this).closest('.category'),categoryId=thisName.data('category-id'),inputId='edit-category-id-'+categoryId,name=thisName.data('category-name'),editThisName=ich.env_profile_edit_input({inputId:inputId,id:categoryId,name:name,type:'category',element:'div'});thisName.replaceWith(editThisName);$(editThisName).data('replaced',thisName);event.preventDefault();});context.on('keydown','.bulkselectitem .elements .editing input',function(event){if(event.keyCode===MT.keycodes.ENTER){if($(this).val().length){if($(this).val()!==$(this).data('original-value')){var input=$(this),thisElement=input.closest('.editing'),name=input.val(),inputId=input.attr('id'),elementId=input.data('element-id'),preview=input.closest('.bulkselectitem').find('.preview').find('label[for="'+inputId+'"]').closest('li'),checked=input.data('checked'),url='',data={},success=function(response){var editedElem=$(response.elem),editedPreview=$(response.preview);if(!response.no_replace){thisElement.replaceWith(editedElem);preview.replaceWith(editedPreview);if(checked){context.find('#'+inputId).prop('checked',checked);updateLabels();}
+input.val(null);}
+thisElement.loadingOverlay('remove');};data['element-id']=elementId;data[input.attr('name')]=input.val();thisElement.loadingOverlay();$.ajax(url,{type:"POST",data:data,success:success});}else{$(this).closest('.editing').replaceWith($(this).closest('.editing').data('replaced'));}}else{$(ich.message({message:"Please enter an element name.",tags:"error"})).appendTo($('#messages ul'));$('#messages ul').messages();}
+event.preventDefault();}});context.on('keydown','.bulkselectitem .item-content .editing.category input',function(event){if(event.keyCode===MT.keycodes.ENTER){if($(this).val().length){if($(this).val()!==$(this).data('original-value')){var input=$(this),thisCategory=input.closest('.bulkselectitem'),name=input.val(),nameKey=input.attr('name'),categoryId=input.data('category-id'),url='',data={},success=function(response){var editedCat=$(response.html);if(!response.no_replace){thisCategory.replaceWith(editedCat);editedCat.find('.details').addClass('open').html5accordion();updateLabels();updateBulkInputs();}
+thisCategory.loadingOverlay('remove');};data=thisCategory.find('input[name="elements"]').serializeArray();data.push({'name':'category-id','value':categoryId},{'name':nameKey,'value':name});thisCategory.loadingOverlay();$.ajax(url,{type:"POST",data:data,success:success});}else{$(this).closest('.editing').replaceWith($(this).closest('.editing').data('replaced'));}}else{$(ich.message({message:"Please enter a category name.",tags:"error"})).appendTo($('#messages ul'));$('#messages ul').messages();}
+event.preventDefault();}});};MT.addEnvToProfile=function(container,form){var context=$(container),addEnv=function(){var replaceList=context.find('.itemlist.action-ajax-replace');if(replaceList.length&&context.find(form).length){context.find(form).ajaxForm({beforeSubmit:function(arr,form,options){replaceList.loadingOverlay();},success:function(response){var newList=$(response.html);replaceList.loadingOverlay('remove');if(response.html){replaceList.replaceWith(newList);$('#filter').find('input.check:checked').prop('checked',false).change();context.find('.add-item').customAutocomplete({textbox:'#env-elements-input',inputList:'.env-element-list',ajax:true,url:$('#env-elements-input').data('autocomplete-url'),hideFormActions:true,inputType:'element',caseSensitive:true,prefix:'element'});addEnv();newList.find('.details').html5accordion();}}});}};addEnv();context.on('after-replace','.itemlist.action-ajax-replace',function(event,replacement){addEnv();context.find('.add-item').customAutocomplete({textbox:'#env-elements-input',inputList:'.env-element-list',ajax:true,url:$('#env-elements-input').data('autocomplete-url'),hideFormActions:true,inputType:'element',caseSensitive:true,prefix:'element'});});};MT.editEnvProfileName=function(container){var context=$(container),profileNameInput=context.find('#profile-name'),profileName=profileNameInput.val(),profileNameSubmit=context.find('#save-profile-name').hide();context.on('keyup','#profile-name',function(event){if($(this).val()!==profileName){profileNameSubmit.fadeIn();}else{profileNameSubmit.fadeOut();}});context.on('keydown','#profile-name',function(event){if(event.keyCode===MT.keycodes.ENTER&&!profileNameSubmit.is(':visible')){event.preventDefault();}});if(context.find('#profile-name-form').length){context.find('#profile-name-form').ajaxForm({success:function(response){profileName=profileNameInput.val();profileNameSubmit.fadeOut();profileNameInput.blur();}});}};MT.bulkSelectEnvs=function(container){var context=$(container),bulkSelect=context.find('#bulk_select'),items=context.find('.itemlist .items .listitem'),inputs=items.find('input.bulk-value[name="environments"]'),updateBulkSelect=function(){if(inputs.filter(':visible:checked').length){bulkSelect.prop('checked',true);if(inputs.filter(':visible').length===inputs.filter(':visible:checked').length){bulkSelect.removeClass('pseudo');}else{bulkSelect.addClass('pseudo');}}else{bulkSelect.prop('checked',false).removeClass('pseudo');}};bulkSelect.change(function(){if($(this).is(':checked')){inputs.filter(':visible').prop('checked',true);}else{inputs.filter(':visible').prop('checked',false);}
+bulkSelect.removeClass('pseudo');});inputs.change(function(){updateBulkSelect();});context.on('after-filter','.itemlist .items',updateBulkSelect);updateBulkSelect();};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.populateMultiselectItems=function(opts){var defaults={container:'body',data_attr:'product-id',refetch_on_trigger:true,fetch_without_trigger_value:false},options=$.extend({},defaults,opts);if($(options.container).length){var trigger=$(options.container).find(options.trigger_field);if(trigger.is("select")&&options.refetch_on_trigger){trigger.change(function(){var trigger_id=$(this).find('option:selected').data(options.data_attr),included_id=$(".edit-"+options.for_type).data(options.for_type+"-id");if(trigger_id||options.fetch_without_trigger_value){$(".multiselect").closest(".formfield").removeClass("hiddenfield");MT.doPopulateMultiselect(options.ajax_url_root,options.ajax_trigger_filter,trigger_id,options.ich_template,options.ajax_for_field,included_id,options.use_latest);}
+else if(options.hide_without_trigger_value){$(".multiselect").closest(".formfield").addClass("hiddenfield");}
+else{$(".multiselect").find(".select").html("");$(".multiselect").closest(".formfield").removeClass("hiddenfield");}});}
+if($(options.container).find(".multiselect").length){$(function(){var trigger=$(options.trigger_field),trigger_id,included_id=$(".edit-"+options.for_type).data(options.for_type+"-id");if(trigger.is("select")){trigger_id=trigger.find("option:selected").data(options.data_attr);}
+else if(trigger.is("input")){trigger_id=trigger.val();}
+if(trigger_id||options.fetch_without_trigger_value){$(".multiselect").closest(".formfield").removeClass("hiddenfield");MT.doPopulateMultiselect(options.ajax_url_root,options.ajax_trigger_filter,trigger_id,options.ich_template,options.ajax_for_field,included_id,options.use_latest);}
+else if(options.hide_without_trigger_value){$(".multiselect").closest(".formfield").addClass("hiddenfield");}});}}};var cache={};var current_xhrs={};MT.doPopulateMultiselect=function(ajax_url_root,ajax_trigger_filter,trigger_id,ich_template,ajax_for_field,included_id,use_latest){var available=$(".multiunselected").find(".select"),included=$(".multiselected").find(".select"),avail_url=new URI(ajax_url_root);if(current_xhrs.include){current_xhrs.include.abort();}
+if(current_xhrs.available){current_xhrs.available.abort();}
+if(trigger_id){avail_url.addSearch(ajax_trigger_filter,trigger_id);}
+if(use_latest){avail_url.addSearch("latest",1);}
+var incl_url=new URI(avail_url.toString());if(included_id){avail_url.addSearch(ajax_for_field+"__ne",included_id);incl_url.addSearch(ajax_for_field,included_id);}
+if(available.length){if(cache[avail_url.toString()]){available.html(cache[avail_url.toString()]);if(included_id){included.html(cache[incl_url.toString()]);}
+else{included.html("");}}
+else{var avail_complete=false,incl_complete=false;var setItems=function(){if(incl_complete&&avail_complete){included.loadingOverlay("remove");included.html(cache[incl_url.toString()]);available.loadingOverlay("remove");available.html(cache[avail_url.toString()]);$(".form-actions :input").prop("disabled",false);}};if(included_id){current_xhrs.include=$.ajax({type:"GET",url:incl_url.toString(),context:document.body,beforeSend:function(){included.html("");included.loadingOverlay();$(".form-actions :input").prop("disabled",true);},success:function(response){cache[incl_url.toString()]=ich_template({items:response.objects});incl_complete=true;setItems();},error:function(response){$(".multiselected").loadingOverlay("remove");$(".multiselect").parent().find(":input").prop("disabled",true);$(ich.message({message:"Error loading data.  Please reload page or try again later.",tags:"error"})).appendTo($('#messages ul'));$('#messages ul').messages();console.error(response);},always:function(){delete current_xhrs.include;}});}
+else{included.html("");incl_complete=true;}
+current_xhrs.available=$.ajax({type:"GET",url:avail_url.toString(),context:document.body,beforeSend:function(){available.html("");available.loadingOverlay();},success:function(response){cache[avail_url.toString()]=ich_template({items:response.objects});avail_complete=true;setItems();},error:function(response){$(".multiunselected").loadingOverlay("remove");console.error(response);},always:function(){delete current_xhrs.include;}});}}};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.hideEmptyRuntestsEnv=function(){$('.runenvselect.empty').hide();};MT.autoFocus=function(trigger,context){$(context).on('click',trigger,function(){if($(this).parent().hasClass('open')){$(this).parent().find('textarea').focus();}});};MT.breadcrumb=function(context){var finder=$(context);finder.find('.runsdrill .colcontent').each(function(){$(this).data('originalHTML',$(this).html());});$('.runtests-nav .secondary .breadcrumb').click(function(e){if(!finder.hasClass('open')){finder.children('.summary').click();}
+finder.find('.runsdrill .colcontent').each(function(){$(this).html($(this).data('originalHTML'));});finder.find('#'+$(this).data('id')).click();e.preventDefault();});};MT.expandAllTests=function(container){var context=$(container),trigger=context.find('.itemlist .listordering .bybulk-open > a'),target,updateTrigger=function(){if(context.find('.itemlist .listitem .itembody.details').length===context.find('.itemlist .listitem .itembody.details.open').length){trigger.addClass('open');}else{trigger.removeClass('open');}};trigger.click(function(e){target=context.find('.itemlist .listitem .itembody.details');trigger.toggleClass('open');if(trigger.hasClass('open')){target.each(function(){if(!($(this).hasClass('open'))){$(this).children('.item-summary').click();}});}else{target.each(function(){if($(this).hasClass('open')){$(this).children('.item-summary').click();}});}
+e.preventDefault();});context.on('click','.itemlist .listitem .itembody.details > .item-summary.summary',function(){updateTrigger();});updateTrigger();};MT.runTests=function(container){var context=$(container),tests=context.find('.listitem'),ajaxFormsInit=function(test){var forms=test.find('form');forms.ajaxForm({beforeSubmit:function(arr,form,options){test.loadingOverlay();},success:function(response){var newTest=$(response.html);test.loadingOverlay('remove');if($(response.html).is("article")){test.replaceWith(newTest);ajaxFormsInit(newTest);newTest.find('.details').html5accordion();}
+else{$(ich.message({message:"This test run is no longer available.  Please see your test manager.",tags:"error"})).appendTo($('#messages ul'));$('#messages ul').messages();}}});},ajaxifyTests=function(){tests.each(function(){var thisTest=$(this);ajaxFormsInit(thisTest);});};ajaxifyTests();context.on('after-replace','.itemlist.action-ajax-replace',function(event,replacement){tests=context.find('.listitem');ajaxifyTests();});};MT.failedTestBug=function(container){var context=$(container);context.on('change','.listitem .stepfail input[type="radio"][name="bug"]',function(){var thisList=$(this).closest('.stepfail'),newBug=thisList.find('input[type="radio"].newbug-radio'),newBugInput=thisList.find('input[type="url"].newbug-input');if(newBug.is(':checked')){newBugInput.removeClass('disabled').attr('name','bug').focus();}else{newBugInput.addClass('disabled').attr('name','disabled-bug');}});context.on('click','.listitem .stepfail input[type="url"].newbug-input.disabled',function(){var newBugRadio=$(this).siblings('.newbug-radio');newBugRadio.click();});};MT.expandTestDetails=function(container){var context=$(container);context.on('click','.itemlist .listitem .itemhead',function(e){if(!($(e.target).is('button')||$(e.target).is('.filter-link'))){$(this).closest('.listitem').find('.itembody .item-summary').click();}});};MT.filterEnvironments=function(container){var context=$(container),triggers=context.find('select'),doFilter;if(context.length){triggers.each(function(){var allopts=$(this).find('option').clone().removeAttr('selected');$(this).data('allopts',allopts);});doFilter=function(){var i,key=triggers.map(function(){if($(this).find('option:selected').val()){return parseInt($(this).find('option:selected').val(),10);}else{return'';}}),filterCombos=function(elementOfArray,indexInArray){if(elementOfArray[i]===null){return true;}else{return elementOfArray[i]===key[i];}};for(i=0;i<key.length;i=i+1){if(key[i]===''){key[i]=null;}}
+if(VALID_ENVIRONMENTS){triggers.each(function(){var thisIndex=triggers.index($(this)),validOpts=[],acceptAll=false,allopts=$(this).data('allopts'),filteredValidCombos=VALID_ENVIRONMENTS,filteredOpts,selectedVal;for(i=0;i<key.length;i=i+1){if(key[i]!==null&&i!==thisIndex){filteredValidCombos=$.grep(filteredValidCombos,filterCombos);}}
+validOpts=$.map(filteredValidCombos,function(elementOfArray,indexInArray){if(elementOfArray[thisIndex]===null){acceptAll=true;}
+return elementOfArray[thisIndex];});if($(this).find('option:selected').val()){selectedVal=$(this).find('option:selected').val();}
+if(acceptAll){$(this).html(allopts);}else{filteredOpts=allopts.filter(function(index){if($(this).val()===''){return true;}else{return $.inArray(parseInt($(this).val(),10),validOpts)!==-1;}});$(this).html(filteredOpts);}
+if(selectedVal){$(this).find('option').filter(function(){return $(this).val()===selectedVal;}).prop('selected',true);}else{$(this).find('option').first().prop('selected',true);}});}};triggers.change(doFilter);}};MT.refreshRuntests=function(container){var context=$(container),filterForm=context.find('#filterform');if(context.length){var replaceList=context.find('.action-ajax-replace')
+console.log(replaceList.data("ajax-update-url"))
+var pagenum=replaceList.find(".listnav").find(".current").html();$.ajax({url:replaceList.data("ajax-update-url"),cache:false,data:{pagesize:replaceList.find('.listnav').data('pagesize'),pagenumber:replaceList.find(".listnav").find(".current").html()},success:function(response){var newList=$(response.html);if(response.html){$('article').each(function(idx,item){var match=newList.find("#"+item.id);if(match.length){var other=$(item).find(".other-result");other.html(match.find(".other-result").html());}});}},complete:function(){setTimeout("MT.refreshRuntests('#runtests')",30000);}});}};MT.startRefreshTimer=function(container){var context=$(container),filterForm=context.find('#filterform');if(context.length){setTimeout("MT.refreshRuntests('#runtests')",30000);}};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';MT.owa=function(){var trigger=$('#owa a'),url=trigger.data('url'),installCallback=function(){var msg='Successfully registered!';ich.message({message:msg,tags:'success'}).appendTo($('#messages ul'));$('#messages ul').messages();},errorCallback=function(){var msg='Could not install: '+this.error;ich.message({message:msg,tags:'error'}).appendTo($('#messages ul'));$('#messages ul').messages();},result;trigger.click(function(e){e.preventDefault();if(url){result=navigator.mozApps.install(url,{});result.onsuccess=installCallback;result.onerror=errorCallback;}});};return MT;}(MT||{},jQuery));var MT=(function(MT,$){'use strict';$(function(){$('.details:not(html)').html5accordion();$('#messages ul').messages({handleAjax:true,closeLink:'.message'});$('input[placeholder], textarea[placeholder]').placeholder();$('.multiselect').multiselect();$('#filter').customAutocomplete({textbox:'#text-filter',inputList:'.visual .filter-group:not(.keyword)',newInputList:'.visual .filter-group.keyword',multipleCategories:true,allowNew:true,autoSubmit:true,newInputTextbox:'input[type="text"]',fakePlaceholder:true,initialFocus:true,inputsNeverRemoved:true,prefix:'filter',debounce:true,lazyInputList:'.filter-group.lazy'});$('#clientfilter').customAutocomplete({textbox:'#text-filter',inputList:'.visual .filter-group:not(.keyword)',newInputList:'.visual .filter-group.keyword',multipleCategories:true,allowNew:true,newInputTextbox:'input[type="text"]',triggerSubmit:null,fakePlaceholder:true,initialFocus:true,inputsNeverRemoved:true,prefix:'filter',debounce:true});$('.tagging').customAutocomplete({textbox:'#id_add_tags',ajax:true,url:$('#id_add_tags').data('autocomplete-url'),extraDataName:'product-id',extraDataFn:function(){var product_sel=$('#id_product'),selectedIndex=product_sel.prop('selectedIndex'),tagging_container=$('.case-form .tagging'),productID;if(tagging_container.data('product-id')){productID=tagging_container.data('product-id');}else if(selectedIndex&&selectedIndex!==0){productID=product_sel.find('option:selected').data('product-id');}
+return productID;},inputList:'.taglist',triggerSubmit:null,allowNew:true,restrictAllowNew:true,inputType:'tag',noInputsNote:true,prefix:'tag',pinable:false});$('#editprofile .add-item, #editproductversionenvs .add-item').customAutocomplete({textbox:'#env-elements-input',inputList:'.env-element-list',ajax:true,url:$('#env-elements-input').data('autocomplete-url'),hideFormActions:true,inputType:'element',caseSensitive:true,prefix:'element'});$('.multiselect .multiunselected .selectsearch').customAutocomplete({textbox:'#search-add',inputList:'.visual .filter-group:not(.keyword)',newInputList:'.visual .filter-group.keyword',multipleCategories:true,allowNew:true,triggerSubmit:null,inputsNeverRemoved:true,prefix:'filter',debounce:true,pinable:false});$('.runsdrill').html5finder({loading:true,headerSelector:'.listordering',sectionSelector:'.col',sectionContentSelector:'.colcontent',treeUrl:'?finder=tree',callback:function(){$('.runsdrill .runenvselect').slideUp('fast');},lastChildCallback:function(choice){var environments=$('.runsdrill .runenvselect').css('min-height','169px').slideDown('fast'),ajaxUrl=$(choice).data('sub-url');environments.loadingOverlay();$.get(ajaxUrl,function(data){environments.loadingOverlay('remove');environments.replaceWith(data.html);MT.filterEnvironments('#runtests-environment-form');});}});$('.managedrill').html5finder({loading:true,horizontalScroll:true,scrollContainer:'.finder',headerSelector:'.listordering',sectionSelector:'.col',sectionContentSelector:'.colcontent',treeUrl:'?finder=tree',numberCols:4});$('.resultsdrill').html5finder({loading:true,horizontalScroll:true,scrollContainer:'.finder',headerSelector:'.listordering',sectionSelector:'.col',sectionContentSelector:'.colcontent',treeUrl:'?finder=tree',numberCols:4});MT.inputHadFocus();MT.changePwdCancel();MT.loadListItemDetails();MT.manageActionsAjax('.manage, .manage-form');MT.listActionAjax('.manage, .results, .run','.listordering .sortlink, .pagination .prev, .pagination .next, .pagination .page, .perpage a');MT.itemStatusDropdown('.manage');MT.shareListUrlDropdown('.listpage');MT.toggleAdvancedFiltering('.magicfilter');MT.preventCaching('#filter');MT.directFilterLinks();MT.filterFormAjax('.manage, .results, .run');MT.clientSideFilter({container:'#envnarrowing'});MT.pinFilter();MT.updatePageForExistingPinnedFilters();MT.formOptionsFilter({container:'#single-case-add, #bulk-case-add',trigger_sel:'#id_product',target_sel:'#id_productversion',no_default:true});MT.formOptionsFilter({container:'#single-case-add, #bulk-case-add',trigger_sel:'#id_product',target_sel:'#id_suite',optional:true});MT.formOptionsFilter({container:'#productversion-add-form',trigger_sel:'#id_product',target_sel:'#id_clone_from',optional:true,callback:function(context){context.find('#id_clone_from option:last-child').prop('selected',true);}});MT.filterProductTags('#single-case-add, #bulk-case-add');MT.testcaseAttachments('.case-form .attach');MT.populateMultiselectItems({container:'#suite-edit-form, #suite-add-form',trigger_field:'#id_product',ajax_url_root:"/api/v1/caseselection/?format=json&limit=0",ajax_trigger_filter:"productversion__product",ajax_for_field:"case__suites",for_type:"suite",ich_template:ich.case_select_item,use_latest:true});MT.populateMultiselectItems({container:'#tag-add-form, #tag-edit-form',trigger_field:'#id_product',ajax_url_root:"/api/v1/caseversionselection/?format=json&limit=0",ajax_trigger_filter:"productversion__product",ajax_for_field:"tags",for_type:"tag",ich_template:ich.caseversion_select_item,hide_without_trigger_value:true});MT.populateMultiselectItems({container:'#run-add-form',trigger_field:'#id_productversion',ajax_url_root:"/api/v1/suiteselection/?format=json&limit=0",ajax_trigger_filter:"product",ajax_for_field:"runs",for_type:"run",ich_template:ich.suite_select_item});MT.populateMultiselectItems({container:'#run-edit-form',trigger_field:'#id_productversion',ajax_url_root:"/api/v1/suiteselection/?format=json&limit=0",ajax_trigger_filter:"product",ajax_for_field:"runs",for_type:"run",ich_template:ich.suite_select_item,refetch_on_trigger:false});MT.createEnvProfile('#profile-add-form');MT.addEnvToProfile('#editprofile, #editproductversionenvs','#add-environment-form, #productversion-environments-form');MT.editEnvProfileName('#editprofile');MT.bulkSelectEnvs('#envnarrowing');MT.disableOnChecked({container:'#run-add-form, #run-edit-form',trigger_field:'#id_is_series',target_field:'#id_build'});MT.hideEmptyRuntestsEnv();MT.autoFocus('.details.stepfail > .summary','#runtests');MT.autoFocus('.details.testinvalid > .summary','#runtests');MT.breadcrumb('.drilldown');MT.expandAllTests('#runtests');MT.runTests('#runtests');MT.failedTestBug('#runtests');MT.expandTestDetails('#runtests');MT.filterEnvironments('#runtests-environment-form');MT.startRefreshTimer('#runtests');MT.owa();});$(window).load(function(){MT.openListItemDetails('.listpage');MT.removeInitialFilterParams('#filter');});return MT;}(MT||{},jQuery));
\ No newline at end of file
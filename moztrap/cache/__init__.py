@@ -0,0 +1,355 @@
+"""
+Caching of frequently read, rarely changed model data.
+
+Every model has a generation counter in the cache, bumped whenever an
+instance of it is saved, (soft-)deleted or undeleted, or its many-to-many
+relations change. Cache keys include the generations of all models a cached
+value depends on, so a write to any of them makes the value unreachable and
+it is simply recomputed; nothing is ever explicitly deleted. Values derived
+from a single instance can also be keyed by its ``cc_version`` (see
+``instance_key``).
+
+Because invalidation is by generation, the cache must be shared by all
+processes for them to see each other's writes (memcached, or
+``moztrap.cache.backends.SQLiteCache`` for local multi-process testing); see
+the ``MODEL_CACHE`` setting. Caching is off (everything is computed every
+time) unless ``MODEL_CACHE`` names such a cache, or a process-local one is
+explicitly allowed with ``MODEL_CACHE_PROCESS_LOCAL``.
+
+A write bumps generations right away and again when its transaction commits:
+a concurrent reader may still fetch the old rows after the first bump and
+cache them under the new generation, and the second bump makes those
+unreachable.
+
+Writes that bypass model methods and signals (raw SQL, ``bulk_create`` on
+non-MozTrap models, ``update`` on a plain queryset) should call ``bump()``.
+
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import get_cache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.backends import BaseDatabaseWrapper
+from django.db.models import signals
+
+from .. import routing
+
+
+
+_cache = None
+
+# models written in the current transaction, bumped again on commit
+_local = threading.local()
+
+# sentinel for cache misses, so None can be cached
+_missing = object()
+
+# generation counters are kept as long as the cache allows (30 days)
+GENERATION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+
+def model_cache():
+    """Return the cache backend used for model data."""
+    global _cache
+    if _cache is None:
+        _cache = load_model_cache()
+    return _cache
+
+
+
+def load_model_cache():
+    """
+    Return the cache backend configured by the ``MODEL_CACHE`` setting.
+
+    A process-local cache can't see other processes' writes, so unless
+    ``MODEL_CACHE_PROCESS_LOCAL`` allows it (single-process deployments and
+    tests), it and no ``MODEL_CACHE`` at all give a cache that caches nothing.
+
+    """
+    name = getattr(settings, "MODEL_CACHE", None)
+    if name is not None:
+        backend = get_cache(name)
+        if not isinstance(backend, LocMemCache) or getattr(
+                settings, "MODEL_CACHE_PROCESS_LOCAL", False):
+            return backend
+    return DummyCache("", {})
+
+
+
+def enabled():
+    """Return True if model data is actually cached."""
+    return not isinstance(model_cache(), DummyCache)
+
+
+
+def default_timeout():
+    """Return default timeout (in seconds) of cached model data."""
+    return getattr(settings, "MODEL_CACHE_TIMEOUT", 60 * 60)
+
+
+
+def model_label(model):
+    """Return e.g. "core.product" for a model class or instance."""
+    # proxies (e.g. moztrap's User) share the generation of their model
+    meta = model._meta.concrete_model._meta
+    return "{0}.{1}".format(meta.app_label, meta.object_name.lower())
+
+
+
+def _generation_key(model):
+    return "mtgen:{0}".format(model_label(model))
+
+
+
+def _initial_generation():
+    """
+    Return a generation for a model with no counter in the cache.
+
+    Time-based, so that a counter evicted from the cache never comes back
+    with a value that was already used.
+
+    """
+    return int(time.time() * 1000)
+
+
+
+def generations(*models):
+    """Return list of current generations of given models."""
+    cache = model_cache()
+    keys = [_generation_key(m) for m in models]
+    found = cache.get_many(keys)
+    result = []
+    for key in keys:
+        gen = found.get(key)
+        if gen is None:
+            gen = _initial_generation()
+            # another process may have set it first; use its value
+            if not cache.add(key, gen, GENERATION_TIMEOUT):
+                gen = cache.get(key, gen)
+        result.append(gen)
+    return result
+
+
+
+def generation(model):
+    """Return current generation of a model."""
+    return generations(model)[0]
+
+
+
+def bump(*models):
+    """
+    Bump generation of each given model, invalidating cached values.
+
+    They are bumped again when the current transaction commits.
+
+    """
+    models = set(models)
+    _bump(models)
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        pending = _local.pending = set()
+    pending.update(models)
+
+
+
+def committed():
+    """Bump models written in the transaction that was just committed."""
+    pending = getattr(_local, "pending", None)
+    _local.pending = None
+    if pending:
+        _bump(pending)
+
+
+
+def rolled_back():
+    """Forget models written in the transaction that was rolled back."""
+    _local.pending = None
+
+
+
+def _bump(models):
+    """Bump generation of each of set ``models``."""
+    cache = model_cache()
+    for model in models:
+        key = _generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), GENERATION_TIMEOUT)
+
+
+
+def make_key(name, models=(), parts=()):
+    """
+    Return cache key for ``name`` depending on ``models`` and ``parts``.
+
+    ``parts`` are any further values that identify the cached value (e.g.
+    IDs or query strings); the key includes their hash, so they can be
+    arbitrarily long.
+
+    """
+    gens = generations(*models) if models else []
+    digest = hashlib.md5(
+        u"|".join(unicode(p) for p in parts).encode("utf-8")).hexdigest()
+    return "mt:{0}:{1}:{2}".format(
+        name, ".".join(str(g) for g in gens), digest)
+
+
+
+def instance_key(name, obj, *parts):
+    """
+    Return cache key for value ``name`` derived from a single instance.
+
+    Keyed by the instance's ``cc_version`` (or ``modified_on``, for models
+    without one), so it changes whenever the instance is saved.
+
+    """
+    version = getattr(obj, "cc_version", None)
+    if version is None:
+        version = getattr(obj, "modified_on", "")
+    return make_key(
+        name, parts=(model_label(obj), obj.pk, version) + parts)
+
+
+
+def fragment_key(name, deps=(), models=()):
+    """
+    Return cache key for rendered template fragment ``name``.
+
+    Each of ``deps`` is a model instance, keyed by its ``cc_version`` (see
+    ``instance_key``; instances of models without one by their model's
+    generation), an iterable of them (e.g. the tags of a case version), or
+    any other value, keyed by its unicode value. The key also includes the
+    generations of ``models``, for fragments that depend on many rows of a
+    model (e.g. a results summary).
+
+    """
+    models = list(models)
+    parts = []
+    for dep in deps:
+        if hasattr(dep, "_meta"):
+            dep = [dep]
+        elif isinstance(dep, basestring) or not hasattr(dep, "__iter__"):
+            parts.append(dep)
+            continue
+        for obj in dep:
+            version = getattr(obj, "cc_version", None)
+            if version is None:
+                version = getattr(obj, "modified_on", None)
+            if version is None:
+                models.append(obj.__class__)
+            parts.extend([model_label(obj), obj.pk, version])
+    return make_key("fragment:{0}".format(name), models, parts)
+
+
+
+def cached(name, models, func, parts=(), timeout=None):
+    """
+    Return cached value ``name``, or compute it with ``func()`` and cache it.
+
+    ``models`` are all models the value depends on; ``parts`` further
+    identify it (see ``make_key``).
+
+    """
+    return get_or_set(make_key(name, models, parts), func, timeout)
+
+
+
+def can_store():
+    """
+    Return False if values computed now must not be cached.
+
+    That is while the current request reads from a database replica: it may
+    lag behind writes whose generations are already bumped, so values
+    computed from it would be cached as current.
+
+    """
+    return not routing.reading_replica()
+
+
+
+def get_or_set(key, func, timeout=None):
+    """Return value cached at ``key``, or cache and return ``func()``."""
+    cache = model_cache()
+    value = cache.get(key, _missing)
+    if value is _missing:
+        value = func()
+        if timeout is None:
+            timeout = default_timeout()
+        if can_store():
+            cache.set(key, value, timeout)
+    return value
+
+
+
+def cached_list(queryset, models=(), timeout=None):
+    """
+    Return list of ``queryset`` results, cached.
+
+    Keyed by the queryset's SQL; ``models`` are any models it depends on
+    besides its own (e.g. via ``select_related`` or filters on relations).
+
+    """
+    return cached(
+        "qs",
+        (queryset.model,) + tuple(models),
+        # a clone, so results aren't kept in the given queryset's cache
+        lambda: list(queryset.all()),
+        # compiling a query's SQL may alter it; use a clone's
+        parts=(queryset.db, queryset.all().query),
+        timeout=timeout,
+        )
+
+
+
+def invalidate_saved(sender, **kwargs):
+    """Bump generation of saved or deleted model (signal receiver)."""
+    bump(sender)
+
+
+
+def invalidate_m2m(sender, instance, action, model, **kwargs):
+    """Bump generations of both sides of a changed m2m (signal receiver)."""
+    if action.startswith("post_"):
+        bump(sender, instance.__class__, model)
+
+
+
+signals.post_save.connect(invalidate_saved, dispatch_uid="mtcache_save")
+signals.post_delete.connect(invalidate_saved, dispatch_uid="mtcache_delete")
+signals.m2m_changed.connect(invalidate_m2m, dispatch_uid="mtcache_m2m")
+
+
+
+def install_transaction_hooks():
+    """Call ``committed`` and ``rolled_back`` on database commit/rollback."""
+    original_commit = BaseDatabaseWrapper.commit
+    original_commit_unless_managed = BaseDatabaseWrapper.commit_unless_managed
+    original_rollback = BaseDatabaseWrapper.rollback
+
+    def commit(self):
+        original_commit(self)
+        committed()
+
+    def commit_unless_managed(self):
+        managed = self.is_managed()
+        original_commit_unless_managed(self)
+        if not managed:
+            committed()
+
+    def rollback(self):
+        original_rollback(self)
+        rolled_back()
+
+    BaseDatabaseWrapper.commit = commit
+    BaseDatabaseWrapper.commit_unless_managed = commit_unless_managed
+    BaseDatabaseWrapper.rollback = rollback
+
+
+install_transaction_hooks()
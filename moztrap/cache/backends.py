@@ -0,0 +1,169 @@
+"""
+Cache backends.
+
+``SQLiteCache`` stores the cache in a single SQLite database file, so it is
+shared by all processes on a host (unlike ``LocMemCache``) without needing a
+cache server; it's meant for local multi-process testing, not production::
+
+    CACHES = {
+        "default": {
+            "BACKEND": "moztrap.cache.backends.SQLiteCache",
+            "LOCATION": "/tmp/moztrap-cache.sqlite",
+            }
+        }
+
+"""
+from contextlib import contextmanager
+import cPickle as pickle
+import os
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import BaseCache
+
+
+
+class SQLiteCache(BaseCache):
+    """Cache in an SQLite database file (``LOCATION``)."""
+    def __init__(self, location, params):
+        """Create cache at path ``location``."""
+        BaseCache.__init__(self, params)
+        self.path = location
+        self._local = threading.local()
+
+
+    def _connection(self):
+        """Return a connection for this thread and process."""
+        pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        # a connection must not be shared with a forked child
+        if conn is None or self._local.pid != pid:
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None)
+            conn.text_factory = str
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires REAL NOT NULL)"
+                )
+            self._local.conn = conn
+            self._local.pid = pid
+        return conn
+
+
+    @contextmanager
+    def _transaction(self):
+        """Yield connection in a write transaction."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+
+    def _expires(self, timeout):
+        if timeout is None:
+            timeout = self.default_timeout
+        return time.time() + timeout
+
+
+    def _get(self, conn, key):
+        """Return pickled value at (already made) key, or None."""
+        row = conn.execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?",
+            (key, time.time())).fetchone()
+        return None if row is None else row[0]
+
+
+    def add(self, key, value, timeout=None, version=None):
+        key = self._key(key, version)
+        with self._transaction() as conn:
+            if self._get(conn, key) is not None:
+                return False
+            self._set(conn, key, value, timeout)
+            return True
+
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        value = self._get(self._connection(), key)
+        if value is None:
+            return default
+        return pickle.loads(str(value))
+
+
+    def set(self, key, value, timeout=None, version=None):
+        key = self._key(key, version)
+        with self._transaction() as conn:
+            self._set(conn, key, value, timeout)
+
+
+    def _set(self, conn, key, value, timeout):
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) "
+            "VALUES (?, ?, ?)",
+            (key,
+             sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)),
+             self._expires(timeout)),
+            )
+        if self._cull_frequency and hash(key) % self._cull_frequency == 0:
+            self._cull(conn)
+
+
+    def _cull(self, conn):
+        """Remove expired entries, and oldest ones beyond ``max_entries``."""
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self._max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY expires LIMIT ?)",
+                (count // self._cull_frequency,),
+                )
+
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._get(self._connection(), key) is not None
+
+
+    def incr(self, key, delta=1, version=None):
+        """Atomically increment value at ``key``; ValueError if missing."""
+        made_key = self._key(key, version)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT value, expires FROM cache "
+                "WHERE key = ? AND expires > ?",
+                (made_key, time.time())).fetchone()
+            if row is None:
+                raise ValueError("Key '{0}' not found".format(key))
+            value = pickle.loads(str(row[0])) + delta
+            conn.execute(
+                "UPDATE cache SET value = ? WHERE key = ?",
+                (sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)),
+                 made_key),
+                )
+        return value
+
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache")
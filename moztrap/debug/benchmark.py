@@ -0,0 +1,211 @@
+"""
+Benchmark framework: timing, query counting, and comparison of results.
+
+Benchmarks are loaded from the modules listed in the ``BENCHMARK_MODULES``
+setting; the definitions of MozTrap's own hot paths are in
+``tests.benchmarks``, which is not deployed everywhere.
+
+A benchmark is a ``Benchmark`` subclass with a ``name``, a list of ``params``
+(typically dataset sizes) and two methods: ``setup(param)``, which is not
+timed and returns state, and ``run(state)``, which is timed. Every repetition
+runs inside a transaction that is rolled back afterwards, so benchmarks don't
+see each others' data.
+
+"""
+from contextlib import contextmanager
+import time
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.test import testcases
+from django.utils.importlib import import_module
+
+from moztrap.debug import instrumentation
+
+
+
+# default number of repetitions of each benchmark; the fastest is reported
+REPEAT = 3
+
+# default fractional slowdown considered a regression
+THRESHOLD = 0.2
+
+# timing differences smaller than this (in seconds) are noise
+NOISE_FLOOR = 0.005
+
+
+
+class Benchmark(object):
+    """Base class for benchmarks."""
+    # unique name, e.g. "run.activate"
+    name = None
+    # each param is measured separately, e.g. dataset sizes
+    params = [None]
+    # params measured with --quick; defaults to the first param
+    quick_params = None
+
+
+    def setup(self, param):
+        """Create data for a measurement of ``param``; return state."""
+        return param
+
+
+    def run(self, state):
+        """Run the timed operation."""
+        raise NotImplementedError
+
+
+    def key(self, param):
+        """Return the results key for ``param``."""
+        if param is None:
+            return self.name
+        return "{0}[{1}]".format(self.name, param)
+
+
+    def get_params(self, quick=False):
+        """Return params to measure."""
+        if quick:
+            return self.quick_params or self.params[:1]
+        return self.params
+
+
+
+def load_benchmarks(names=None):
+    """
+    Return instances of all benchmarks, sorted by name.
+
+    If ``names`` are given, only benchmarks whose name starts with one of them
+    are returned. Raises ``ImportError`` if a benchmark module is missing.
+
+    """
+    benchmarks = []
+    for module_name in settings.BENCHMARK_MODULES:
+        module = import_module(module_name)
+        for obj in vars(module).values():
+            if (isinstance(obj, type) and issubclass(obj, Benchmark) and
+                    obj.name is not None and obj.__module__ == module_name):
+                benchmarks.append(obj())
+    if names:
+        benchmarks = [
+            b for b in benchmarks if any(b.name.startswith(n) for n in names)]
+    return sorted(benchmarks, key=lambda b: b.name)
+
+
+
+@contextmanager
+def rolled_back():
+    """
+    Run enclosed block in a transaction that is rolled back afterwards.
+
+    As in Django's ``TestCase``, transaction commits are disabled so code
+    under benchmark that manages its own transactions can't commit. If that
+    is already the case (when running within a test), does nothing.
+
+    """
+    if transaction.commit is not testcases.real_commit:
+        yield
+        return
+    transaction.enter_transaction_management()
+    transaction.managed(True)
+    testcases.disable_transaction_methods()
+    try:
+        yield
+    finally:
+        testcases.restore_transaction_methods()
+        transaction.rollback()
+        transaction.leave_transaction_management()
+
+
+
+def measure(benchmark, param, repeat=REPEAT):
+    """
+    Measure ``benchmark`` with ``param``; return dictionary of results.
+
+    Results are the fastest and median wall-clock "seconds" and "median", and
+    the "queries" and "db_seconds" of the fastest run; or an "error" if the
+    benchmark raised an exception.
+
+    """
+    instrumentation.install()
+    measurements = []
+    for i in range(repeat):
+        try:
+            measurements.append(_measure_once(benchmark, param))
+        except Exception:
+            return {"error": traceback.format_exc().splitlines()[-1]}
+
+    measurements.sort()
+    elapsed, queries, db_time = measurements[0]
+    return {
+        "seconds": round(elapsed, 4),
+        "median": round(measurements[len(measurements) // 2][0], 4),
+        "queries": queries,
+        "db_seconds": round(db_time, 4),
+        }
+
+
+
+def _measure_once(benchmark, param):
+    """Return (seconds, queries, db seconds) of one isolated measurement."""
+    with rolled_back():
+        state = benchmark.setup(param)
+        stats = instrumentation.start(keep_slowest=0)
+        start = time.time()
+        try:
+            benchmark.run(state)
+        finally:
+            elapsed = time.time() - start
+            instrumentation.stop()
+    return elapsed, stats.queries, stats.db_time
+
+
+
+def run_benchmarks(benchmarks, quick=False, repeat=REPEAT, report=None):
+    """
+    Measure all params of given benchmarks; return dict of results by key.
+
+    If given, ``report`` is called with each key and its results.
+
+    """
+    results = {}
+    for benchmark in benchmarks:
+        for param in benchmark.get_params(quick):
+            key = benchmark.key(param)
+            results[key] = measure(benchmark, param, repeat)
+            if report is not None:
+                report(key, results[key])
+    return results
+
+
+
+def compare(baseline, results, threshold=THRESHOLD):
+    """
+    Return list of regressions of ``results`` against ``baseline``.
+
+    Both are dictionaries of results by key. A benchmark regressed if it is
+    more than ``threshold`` (a fraction) slower, or issues more queries.
+    Benchmarks missing from either, or with errors, are not compared.
+
+    """
+    regressions = []
+    for key in sorted(results):
+        new, old = results[key], baseline.get(key)
+        if old is None or "error" in old or "error" in new:
+            continue
+        slower = new["seconds"] - old["seconds"]
+        if (slower > NOISE_FLOOR and
+                new["seconds"] > old["seconds"] * (1 + threshold)):
+            regressions.append(
+                "{0}: {1:.4f}s -> {2:.4f}s (+{3:.0%})".format(
+                    key,
+                    old["seconds"],
+                    new["seconds"],
+                    slower / old["seconds"] if old["seconds"] else 1,
+                    )
+                )
+        if new["queries"] > old["queries"]:
+            regressions.append(
+                "{0}: {1} -> {2} queries".format(
+                    key, old["queries"], new["queries"]))
+    return regressions
@@ -0,0 +1,315 @@
+"""
+Request-scoped instrumentation of SQL queries, template rendering, cached
+template fragments and replica routing.
+
+Statistics are collected in a thread-local ``RequestStats`` between ``start()``
+and ``stop()`` (see ``moztrap.debug.middleware.InstrumentationMiddleware``).
+Unlike ``connection.queries`` this doesn't depend on ``DEBUG``: ``install()``
+wraps database cursors and template rendering once, and the wrappers only
+record anything while a request is being instrumented.
+
+"""
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+
+from django.db import connections
+from django.db.backends import BaseDatabaseWrapper
+from django.template.base import Template
+
+
+
+logger = logging.getLogger("moztrap.debug.instrumentation")
+
+_local = threading.local()
+
+_installed = False
+
+
+
+def install():
+    """Wrap database cursors and template rendering; idempotent."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    original_cursor = BaseDatabaseWrapper.cursor
+
+    def cursor(self):
+        """Return an instrumented cursor if this request is instrumented."""
+        c = original_cursor(self)
+        if current() is not None:
+            return InstrumentedCursorWrapper(c, self)
+        return c
+
+    BaseDatabaseWrapper.cursor = cursor
+
+    original_render = Template.render
+
+    def render(self, context):
+        """Time outermost template renders of an instrumented request."""
+        stats = current()
+        if stats is None or stats.rendering:
+            return original_render(self, context)
+        stats.rendering = True
+        start = time.time()
+        try:
+            return original_render(self, context)
+        finally:
+            stats.rendering = False
+            stats.template_time += time.time() - start
+
+    Template.render = render
+
+
+
+def start(keep_slowest=3):
+    """Begin collecting stats for the current thread; return them."""
+    _local.stats = RequestStats(keep_slowest=keep_slowest)
+    return _local.stats
+
+
+
+def stop():
+    """Stop collecting stats for the current thread; return them (or None)."""
+    stats = current()
+    _local.stats = None
+    if stats is not None:
+        stats.finish()
+    return stats
+
+
+
+def current():
+    """Return the ``RequestStats`` being collected in this thread, or None."""
+    return getattr(_local, "stats", None)
+
+
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+
+def normalize(sql):
+    """
+    Return the "shape" of ``sql``, with literals and placeholders replaced.
+
+    Lists of placeholders collapse to one, so ``id IN (1, 2, 3)`` and
+    ``id IN (%s, %s)`` are both ``id IN (...)``.
+
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+
+class RequestStats(object):
+    """Query and template statistics for a single request."""
+    def __init__(self, keep_slowest=3):
+        """Initialize empty stats, keeping ``keep_slowest`` statements."""
+        self.started = time.time()
+        self.total_time = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+        self.replica_reads = 0
+        self.primary_reads = 0
+        # normalized sql -> [count, total time]
+        self.shapes = {}
+        # heap of (duration, alias, sql, params) of the slowest statements
+        self.slowest = []
+        self.keep_slowest = keep_slowest
+
+
+    def record_query(self, alias, sql, params, duration):
+        """Record a single executed statement."""
+        self.queries += 1
+        self.db_time += duration
+        shape = self.shapes.setdefault(normalize(sql), [0, 0.0])
+        shape[0] += 1
+        shape[1] += duration
+        if self.keep_slowest:
+            item = (duration, alias, sql, params)
+            if len(self.slowest) < self.keep_slowest:
+                heapq.heappush(self.slowest, item)
+            else:
+                heapq.heappushpop(self.slowest, item)
+
+
+    def record_fragment(self, hit):
+        """Record a cached template fragment served (hit) or rendered."""
+        if hit:
+            self.fragment_hits += 1
+        else:
+            self.fragment_misses += 1
+
+
+    def record_read(self, replica):
+        """Record a read of a read-only request routed to replica or not."""
+        if replica:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+
+
+    def finish(self):
+        """Record total elapsed time."""
+        self.total_time = time.time() - self.started
+
+
+    def duplicates(self, limit=5):
+        """
+        Return up to ``limit`` SQL shapes executed more than once.
+
+        Most-repeated first, as a list of dicts with "sql", "count" and "ms".
+
+        """
+        dupes = sorted(
+            [(c, t, sql) for sql, (c, t) in self.shapes.items() if c > 1],
+            reverse=True,
+            )
+        return [
+            {"sql": sql, "count": c, "ms": _ms(t)}
+            for c, t, sql in dupes[:limit]
+            ]
+
+
+    def slowest_statements(self):
+        """Return list of (duration, alias, sql, params), slowest first."""
+        return sorted(self.slowest, reverse=True)
+
+
+    def server_timing(self):
+        """Return value for a ``Server-Timing`` response header."""
+        timing = (
+            'db;dur={0};desc="{1} queries", tpl;dur={2};desc="templates", '
+            'total;dur={3}'.format(
+                _ms(self.db_time),
+                self.queries,
+                _ms(self.template_time),
+                _ms(self.total_time or 0),
+                )
+            )
+        if self.fragment_hits or self.fragment_misses:
+            timing += ', frag;desc="{0}/{1} fragments cached"'.format(
+                self.fragment_hits, self.fragment_hits + self.fragment_misses)
+        if self.replica_reads or self.primary_reads:
+            timing += ', replica;desc="{0}/{1} reads from replica"'.format(
+                self.replica_reads, self.replica_reads + self.primary_reads)
+        return timing
+
+
+    def as_dict(self, duplicates=5):
+        """Return JSON-serializable summary."""
+        return {
+            "queries": self.queries,
+            "db_ms": _ms(self.db_time),
+            "template_ms": _ms(self.template_time),
+            "total_ms": _ms(self.total_time or 0),
+            "fragment_hits": self.fragment_hits,
+            "fragment_misses": self.fragment_misses,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "duplicates": self.duplicates(duplicates),
+            }
+
+
+
+def explain(alias, sql, params):
+    """
+    Return the query plan of a SELECT statement as a list of row strings.
+
+    Returns None for statements that aren't SELECTs, or if EXPLAIN fails.
+
+    """
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    connection = connections[alias]
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else (
+        "EXPLAIN ")
+    try:
+        cursor = connection.cursor()
+        cursor.execute(prefix + sql, params)
+        return [
+            " ".join(unicode(col) for col in row) for row in cursor.fetchall()]
+    except Exception:
+        logger.debug("Could not EXPLAIN %s", sql, exc_info=True)
+        return None
+
+
+
+def log_request(request, response, stats, explain_plans=None, duplicates=5):
+    """Write a structured (JSON) log line for an instrumented request."""
+    data = stats.as_dict(duplicates)
+    data.update({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            })
+    if explain_plans:
+        data["explain"] = explain_plans
+    logger.warning("slow request %s", json.dumps(data, default=unicode))
+
+
+
+def _ms(seconds):
+    """Return ``seconds`` as milliseconds rounded to 0.1."""
+    return round(seconds * 1000, 1)
+
+
+
+class InstrumentedCursorWrapper(object):
+    """Cursor wrapper recording statements in the current ``RequestStats``."""
+    def __init__(self, cursor, db):
+        """Wrap ``cursor`` of database connection ``db``."""
+        self.cursor = cursor
+        self.db = db
+
+
+    def execute(self, sql, params=()):
+        """Execute and record ``sql``."""
+        start = time.time()
+        try:
+            return self.cursor.execute(sql, params)
+        finally:
+            self._record(sql, params, time.time() - start)
+
+
+    def executemany(self, sql, param_list):
+        """Execute and record ``sql`` for each params in ``param_list``."""
+        start = time.time()
+        try:
+            return self.cursor.executemany(sql, param_list)
+        finally:
+            self._record(sql, None, time.time() - start)
+
+
+    def _record(self, sql, params, duration):
+        """Record statement, if stats are still being collected."""
+        stats = current()
+        if stats is not None:
+            stats.record_query(self.db.alias, sql, params, duration)
+
+
+    def __getattr__(self, attr):
+        """Delegate everything else to the wrapped cursor."""
+        return getattr(self.cursor, attr)
+
+
+    def __iter__(self):
+        """Iterate over the wrapped cursor."""
+        return iter(self.cursor)
@@ -1,7 +1,12 @@
+import random
+import time
+
 from django.conf import settings
 from django.core.exceptions import MiddlewareNotUsed
 from django.http import HttpResponse
 
+from . import instrumentation, workload
+
 
 
 class AjaxTracebackMiddleware(object):
@@ -14,3 +19,84 @@ class AjaxTracebackMiddleware(object):
         if request.is_ajax():
             import traceback
             return HttpResponse(traceback.format_exc().replace("\n", "<br>\n"))
+
+
+
+class InstrumentationMiddleware(object):
+    """
+    Records query count, DB time and template time of each request.
+
+    Stats are sent in a ``Server-Timing`` response header. Requests slower than
+    ``INSTRUMENTATION_SLOW_REQUEST_MS`` are logged (as JSON, to the
+    "moztrap.debug.instrumentation" logger) with their most-repeated SQL
+    shapes; a sample of them (``INSTRUMENTATION_EXPLAIN_SAMPLE_RATE``) also
+    logs query plans of their slowest statements.
+
+    """
+    def __init__(self):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        instrumentation.install()
+        self.slow_ms = settings.INSTRUMENTATION_SLOW_REQUEST_MS
+        self.explain_rate = settings.INSTRUMENTATION_EXPLAIN_SAMPLE_RATE
+        self.explain_top = settings.INSTRUMENTATION_EXPLAIN_TOP
+        self.duplicates = settings.INSTRUMENTATION_TOP_DUPLICATES
+
+
+    def process_request(self, request):
+        instrumentation.start(keep_slowest=self.explain_top)
+
+
+    def process_response(self, request, response):
+        stats = instrumentation.stop()
+        if stats is None:
+            return response
+
+        response["Server-Timing"] = stats.server_timing()
+
+        if stats.total_time * 1000 >= self.slow_ms:
+            plans = None
+            if self.explain_rate and random.random() < self.explain_rate:
+                plans = []
+                for duration, alias, sql, params in stats.slowest_statements():
+                    if params is None:
+                        continue
+                    plan = instrumentation.explain(alias, sql, params)
+                    if plan is not None:
+                        plans.append(
+                            {"sql": sql, "ms": round(duration * 1000, 1),
+                             "plan": plan})
+            instrumentation.log_request(
+                request, response, stats, plans, self.duplicates)
+
+        return response
+
+
+
+class WorkloadRecorderMiddleware(object):
+    """
+    Records a sample of requests to a JSON Lines file, for later replay.
+
+    Enabled by setting ``WORKLOAD_RECORD_FILE``; a
+    ``WORKLOAD_RECORD_SAMPLE_RATE`` fraction of requests is recorded. See
+    ``moztrap.debug.workload`` and the ``replay_workload`` command.
+
+    """
+    def __init__(self):
+        path = getattr(settings, "WORKLOAD_RECORD_FILE", None)
+        if not path:
+            raise MiddlewareNotUsed
+        self.recorder = workload.Recorder(
+            path, getattr(settings, "WORKLOAD_RECORD_SAMPLE_RATE", 1.0))
+
+
+    def process_request(self, request):
+        if self.recorder.sample():
+            request._workload_started = time.time()
+
+
+    def process_response(self, request, response):
+        started = getattr(request, "_workload_started", None)
+        if started is not None:
+            self.recorder.record(request, response, time.time() - started)
+        return response
@@ -0,0 +1,471 @@
+"""
+Recording and replaying of sampled HTTP request traces, for capacity testing.
+
+``WorkloadRecorderMiddleware`` (see ``moztrap.debug.middleware``) appends one
+JSON document per sampled request to ``WORKLOAD_RECORD_FILE``. ``replay()``
+(and the ``replay_workload`` management command) re-issues recorded requests
+concurrently, in-process or against a running server, and reports
+throughput, latency percentiles and queries per endpoint.
+
+Only the shape of POST data (field names and number of values) is recorded,
+never the values, and values of sensitive query-string parameters (API keys,
+tokens, passwords, secrets) are redacted, so traces contain no credentials or
+user content; replayed POSTs send empty values and so mostly exercise form
+validation.
+
+"""
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib
+import urllib2
+import urlparse
+
+from django.conf import settings
+from django.contrib import auth
+from django.core.urlresolvers import resolve, Resolver404
+from django.http import HttpRequest
+from django.middleware.csrf import _get_new_csrf_key
+from django.test.client import Client
+from django.utils.importlib import import_module
+
+from moztrap.model.core.auth import User
+from moztrap.model.mtmodel import utcnow
+
+from .instrumentation import _ms
+
+
+
+# POST fields never recorded; CSRF tokens are supplied on replay
+SKIP_FIELDS = set(["csrfmiddlewaretoken"])
+
+# values of query-string parameters with matching names are not recorded
+SENSITIVE_PARAM_RE = re.compile(r"key|token|password|secret", re.IGNORECASE)
+REDACTED = "[redacted]"
+
+ANONYMOUS = "anonymous"
+SUPERUSER = "superuser"
+# role of an authenticated user with no roles
+AUTHENTICATED = "authenticated"
+
+PERCENTILES = [50, 90, 99]
+
+
+
+class WorkloadError(Exception):
+    """Invalid trace file or replay configuration."""
+    pass
+
+
+
+def role_of(user):
+    """
+    Return the role name recorded for ``user`` (may be None).
+
+    This is "anonymous", "superuser", "authenticated" (for users with no
+    roles) or the user's role names, sorted and comma-separated.
+
+    """
+    if user is None or not user.is_authenticated():
+        return ANONYMOUS
+    if user.is_superuser:
+        return SUPERUSER
+    names = sorted(user.groups.values_list("name", flat=True))
+    return u", ".join(names) or AUTHENTICATED
+
+
+
+def trace(request, response, duration):
+    """Return a JSON-serializable trace dict of a request."""
+    post = {}
+    if request.method == "POST":
+        for name, values in request.POST.lists():
+            if name not in SKIP_FIELDS:
+                post[name] = len(values)
+    return {
+        "time": utcnow().isoformat(),
+        "method": request.method,
+        "path": request.path,
+        "query": [
+            [k, REDACTED if SENSITIVE_PARAM_RE.search(k) else v]
+            for k, values in request.GET.lists()
+            for v in values
+            ],
+        "post": post,
+        "role": role_of(getattr(request, "user", None)),
+        "status": response.status_code,
+        "ms": _ms(duration),
+        }
+
+
+
+class Recorder(object):
+    """Appends sampled request traces to a JSON Lines file."""
+    def __init__(self, path, sample_rate=1.0):
+        """Record a ``sample_rate`` fraction of requests to ``path``."""
+        self.path = path
+        self.sample_rate = sample_rate
+        self.lock = threading.Lock()
+
+
+    def sample(self):
+        """Return True if the next request should be recorded."""
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+
+    def record(self, request, response, duration):
+        """Append trace of ``request`` to the file."""
+        line = json.dumps(trace(request, response, duration)) + "\n"
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+
+def read_traces(lines):
+    """Yield trace dicts from iterable of JSON Lines (e.g. an open file)."""
+    for i, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+            data["method"], data["path"]
+        except (ValueError, TypeError, KeyError):
+            raise WorkloadError("Line {0} is not a valid trace.".format(i))
+        yield data
+
+
+
+def user_for_role(role):
+    """Return an active user with given recorded role, or None."""
+    users = User.objects.filter(is_active=True)
+    if role == SUPERUSER:
+        users = users.filter(is_superuser=True)
+    else:
+        users = users.filter(is_superuser=False)
+        if role == AUTHENTICATED:
+            users = users.filter(groups__isnull=True)
+        else:
+            for name in role.split(u", "):
+                users = users.filter(groups__name=name)
+    try:
+        return users.order_by("id")[0]
+    except IndexError:
+        return None
+
+
+
+class Session(object):
+    """Session cookie and CSRF token to replay requests as a user."""
+    def __init__(self, user=None):
+        """Log in ``user`` to a new session; no session if None."""
+        self.key = None
+        self.csrf_token = None
+        if user is None:
+            return
+        engine = import_module(settings.SESSION_ENGINE)
+        request = HttpRequest()
+        request.session = engine.SessionStore()
+        user.backend = settings.AUTHENTICATION_BACKENDS[0]
+        auth.login(request, user)
+        # the token session_csrf checks POSTs of logged-in users against
+        self.csrf_token = request.session["csrf_token"] = _get_new_csrf_key()
+        request.session.save()
+        self.key = request.session.session_key
+
+
+    @property
+    def cookies(self):
+        """Dict of cookies to send."""
+        if self.key is None:
+            return {}
+        return {settings.SESSION_COOKIE_NAME: self.key}
+
+
+
+def sessions_for(traces, usernames=None):
+    """
+    Return dict mapping each role in ``traces`` to a logged-in ``Session``.
+
+    ``usernames`` optionally maps role names to the username to replay them
+    as; otherwise the first active user with the role is used.
+
+    """
+    usernames = usernames or {}
+    sessions = {}
+    for role in set(t.get("role", ANONYMOUS) for t in traces):
+        if role in usernames:
+            try:
+                user = User.objects.get(username=usernames[role])
+            except User.DoesNotExist:
+                raise WorkloadError(
+                    'User "{0}" does not exist.'.format(usernames[role]))
+        elif role == ANONYMOUS:
+            user = None
+        else:
+            user = user_for_role(role)
+            if user is None:
+                raise WorkloadError(
+                    'No active user with role "{0}".'.format(role))
+        sessions[role] = Session(user)
+    return sessions
+
+
+
+def url_of(data):
+    """Return path with query string of a trace."""
+    query = urllib.urlencode(
+        [(k.encode("utf-8"), v.encode("utf-8")) for k, v in data["query"]])
+    return data["path"] + ("?" + query if query else "")
+
+
+
+def post_data(data):
+    """Return list of (name, value) pairs to POST for a trace."""
+    return [
+        (name.encode("utf-8"), "")
+        for name, count in sorted(data["post"].items())
+        for i in range(count)
+        ]
+
+
+
+def endpoint_of(path):
+    """Return URL name (or path, if it doesn't resolve) for ``path``."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return path
+    name = match.url_name or path
+    # all API resources share one URL pattern
+    if "resource_name" in match.kwargs:
+        name = u"{0}:{1}".format(name, match.kwargs["resource_name"])
+    return name
+
+
+
+def queries_of(server_timing):
+    """Return query count from a ``Server-Timing`` header value, or None."""
+    for part in (server_timing or "").split(","):
+        if part.strip().startswith("db;"):
+            desc = part.split('desc="', 1)[-1]
+            try:
+                return int(desc.split()[0])
+            except (ValueError, IndexError):
+                return None
+    return None
+
+
+
+class ClientTarget(object):
+    """Replays requests in-process with the Django test client."""
+    def request(self, data, session):
+        """Issue request of trace ``data``; return (status, headers)."""
+        client = Client()
+        for name, value in session.cookies.items():
+            client.cookies[name] = value
+        if data["method"] == "POST":
+            response = client.post(
+                url_of(data),
+                urllib.urlencode(post_data(data)),
+                content_type="application/x-www-form-urlencoded",
+                )
+        else:
+            response = client.get(url_of(data))
+        return response.status_code, dict(response.items())
+
+
+
+class _NoRedirectHandler(urllib2.HTTPRedirectHandler):
+    """Return redirects as responses, like the test client does."""
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+
+class HttpTarget(object):
+    """Replays requests against a running server over HTTP."""
+    def __init__(self, base_url, timeout=60):
+        """Replay against server at ``base_url``, e.g. http://localhost:8000"""
+        self.base_url = base_url
+        self.timeout = timeout
+        self.opener = urllib2.build_opener(_NoRedirectHandler)
+
+
+    def request(self, data, session):
+        """Issue request of trace ``data``; return (status, headers)."""
+        body = None
+        if data["method"] == "POST":
+            body = urllib.urlencode(post_data(data))
+        request = urllib2.Request(
+            urlparse.urljoin(self.base_url, url_of(data)), body)
+        cookies = session.cookies
+        if cookies:
+            request.add_header(
+                "Cookie", "; ".join("=".join(c) for c in cookies.items()))
+        if session.csrf_token:
+            request.add_header("X-CSRFToken", session.csrf_token)
+        try:
+            response = self.opener.open(request, timeout=self.timeout)
+        except urllib2.HTTPError as e:
+            response = e
+        try:
+            response.read()
+            return response.code, dict(response.info().items())
+        finally:
+            response.close()
+
+
+
+def percentile(values, pct):
+    """Return the ``pct`` percentile (nearest-rank) of sorted ``values``."""
+    if not values:
+        return None
+    rank = int(math.ceil(pct / 100.0 * len(values))) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+
+class ReplayResult(object):
+    """Throughput, latency and queries of a workload replay."""
+    def __init__(self):
+        """Initialize an empty result."""
+        self.elapsed = 0.0
+        self.errors = 0
+        # endpoint -> list of (seconds, queries)
+        self.timings = {}
+
+
+    def add(self, endpoint, status, seconds, queries):
+        """Record a single replayed request (status None if it failed)."""
+        self.timings.setdefault(endpoint, []).append((seconds, queries))
+        if status is None or status >= 500:
+            self.errors += 1
+
+
+    @property
+    def num_requests(self):
+        """Total number of replayed requests."""
+        return sum(len(t) for t in self.timings.values())
+
+
+    @property
+    def requests_per_second(self):
+        """Throughput over the whole replay."""
+        if not self.elapsed:
+            return 0.0
+        return self.num_requests / self.elapsed
+
+
+    def endpoints(self):
+        """Return list of per-endpoint summary dicts, most requested first."""
+        summaries = []
+        for endpoint, timings in self.timings.items():
+            seconds = sorted(s for s, q in timings)
+            queries = [q for s, q in timings if q is not None]
+            summary = {
+                "endpoint": endpoint,
+                "count": len(timings),
+                "max_ms": _ms(seconds[-1]),
+                "queries": (
+                    round(float(sum(queries)) / len(queries), 1)
+                    if queries else None),
+                }
+            for pct in PERCENTILES:
+                summary["p{0}_ms".format(pct)] = _ms(percentile(seconds, pct))
+            summaries.append(summary)
+        summaries.sort(key=lambda s: (-s["count"], s["endpoint"]))
+        return summaries
+
+
+    def as_dict(self):
+        """Return JSON-serializable summary."""
+        return {
+            "requests": self.num_requests,
+            "errors": self.errors,
+            "elapsed": round(self.elapsed, 3),
+            "requests_per_second": round(self.requests_per_second, 1),
+            "endpoints": self.endpoints(),
+            }
+
+
+    def get_as_list(self):
+        """Return report as list of lines."""
+        lines = [
+            "Replayed {0} requests in {1:.2f}s ({2:.1f} requests/sec), "
+            "{3} errors".format(
+                self.num_requests,
+                self.elapsed,
+                self.requests_per_second,
+                self.errors,
+                ),
+            "",
+            "{0:<40} {1:>6} {2:>8} {3:>8} {4:>8} {5:>8} {6:>8}".format(
+                "endpoint", "count", "p50 ms", "p90 ms", "p99 ms", "max ms",
+                "queries"),
+            ]
+        for s in self.endpoints():
+            lines.append(
+                "{0:<40} {1:>6} {2:>8} {3:>8} {4:>8} {5:>8} {6:>8}".format(
+                    s["endpoint"][:40],
+                    s["count"],
+                    s["p50_ms"],
+                    s["p90_ms"],
+                    s["p99_ms"],
+                    s["max_ms"],
+                    "-" if s["queries"] is None else s["queries"],
+                    )
+                )
+        return lines
+
+
+
+def replay(traces, target, sessions, concurrency=1):
+    """
+    Replay ``traces`` with ``target``; return a ``ReplayResult``.
+
+    ``sessions`` maps each trace role to a ``Session``. With ``concurrency``
+    above one, requests are issued from a pool of that many threads;
+    otherwise serially in this thread.
+
+    """
+    def issue(data):
+        start = time.time()
+        try:
+            status, headers = target.request(
+                data, sessions[data.get("role", ANONYMOUS)])
+        except Exception:
+            status, headers = None, {}
+        elapsed = time.time() - start
+        return (
+            data["path"],
+            status,
+            elapsed,
+            queries_of(headers.get("Server-Timing")
+                       or headers.get("server-timing")),
+            )
+
+    result = ReplayResult()
+    start = time.time()
+    if concurrency > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(concurrency)
+        try:
+            outcomes = pool.map(issue, traces, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        outcomes = [issue(data) for data in traces]
+    result.elapsed = time.time() - start
+
+    endpoints = {}
+    for path, status, elapsed, queries in outcomes:
+        if path not in endpoints:
+            endpoints[path] = endpoint_of(path)
+        result.add(endpoints[path], status, elapsed, queries)
+    return result
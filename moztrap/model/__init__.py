@@ -10,8 +10,11 @@ from .mtmodel import ConcurrencyError
 from .core.models import Product, ProductVersion, ApiKey
 from .core.auth import User, Role, Permission
 from .environments.models import Environment, Profile, Element, Category
-from .execution.models import Run, RunSuite, RunCaseVersion, Result, StepResult
+from .execution.models import (
+    Run, RunSuite, RunCaseVersion, Result, StepResult, BugURL,
+    index_bug_urls, prefetch_bug_urls, prefetch_testers)
 from .library.bulk import BulkParser
+from .library.bulkcreate import CaseCreator
 from .library.models import (
     Case, CaseVersion, CaseAttachment, CaseStep, Suite, SuiteCase)
 from .tags.models import Tag
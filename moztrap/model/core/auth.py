@@ -5,24 +5,47 @@ Proxy User and Role models.
 import base64
 import hashlib
 
+from django.conf import settings
 from django.db.models import Q
+from django.db.models.query import QuerySet
 
 from django.contrib.auth.backends import ModelBackend as DjangoModelBackend
-# Permission is imported solely so other places can import it from here
-from django.contrib.auth.models import User as BaseUser, Group, Permission
+from django.contrib.auth.models import (
+    User as BaseUser, UserManager as BaseUserManager, Group, Permission)
+from django.contrib.contenttypes.models import ContentType
 
 from django_browserid.auth import BrowserIDBackend as BaseBrowserIDBackend
 from preferences import preferences
 from registration.models import RegistrationProfile
 from registration.signals import user_registered
 
+from ... import cache
+from .. import identity
+
 
 # monkeypatch the User model to ensure unique email addresses
 BaseUser._meta.get_field("email")._unique = True
 
 
+class UserQuerySet(identity.IdentityMapQuerySetMixin, QuerySet):
+    """QuerySet of users, served from the identity map where possible."""
+    pass
+
+
+
+class UserManager(identity.IdentityMapMixin, BaseUserManager):
+    """User manager fetching related users through the identity map."""
+    def get_query_set(self):
+        """Return a ``UserQuerySet`` for all queries."""
+        return UserQuerySet(self.model, using=self._db)
+
+
+
 class User(BaseUser):
     """Proxy for contrib.auth User that adds action methods and roles alias."""
+    objects = UserManager()
+
+
     class Meta:
         proxy = True
 
@@ -56,6 +79,27 @@ class User(BaseUser):
         self.save(force_update=True)
 
 
+    @classmethod
+    def bulk_activate(cls, queryset, user=None):
+        """Activate all users in ``queryset``."""
+        cls._bulk_set_active(queryset, True)
+
+
+    @classmethod
+    def bulk_deactivate(cls, queryset, user=None):
+        """Deactivate all users in ``queryset``."""
+        cls._bulk_set_active(queryset, False)
+
+
+    @classmethod
+    def _bulk_set_active(cls, queryset, is_active):
+        """Set ``is_active`` of all users in ``queryset`` in one update."""
+        queryset.update(is_active=is_active)
+        # a plain update sends no post_save signal
+        cache.bump(cls)
+        identity.discard(cls)
+
+
     @property
     def roles(self):
         """Maps our name (roles) to Django name (groups)."""
@@ -67,8 +111,45 @@ Role = Group
 
 
 
+# models whose changes may change any user's permissions
+PERMISSION_MODELS = [
+    Permission,
+    ContentType,
+    Group,
+    Group.permissions.through,
+    BaseUser.groups.through,
+    BaseUser.user_permissions.through,
+    ]
+
+
+
 class ModelBackend(DjangoModelBackend):
-    """Accepts username or email and returns our proxy User model."""
+    """
+    Accepts username or email and returns our proxy User model.
+
+    Each user's permissions are cached across requests (in the model cache,
+    so only if it is shared by all processes; see ``moztrap.cache``), so
+    checking them takes no queries; they are resolved again after any change
+    to roles, role memberships, or role or user permissions, and at the
+    latest after ``PERMISSION_CACHE_TIMEOUT`` seconds.
+
+    """
+    def get_all_permissions(self, user_obj, obj=None):
+        """Return set of permission names of user, from the model cache."""
+        if user_obj.is_anonymous() or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = cache.cached(
+                "user-permissions",
+                PERMISSION_MODELS,
+                lambda: super(ModelBackend, self).get_all_permissions(
+                    user_obj),
+                parts=[user_obj.pk, user_obj.is_superuser],
+                timeout=settings.PERMISSION_CACHE_TIMEOUT,
+                )
+        return user_obj._perm_cache
+
+
     def authenticate(self, username=None, password=None):
         """Return User for given credentials, or None."""
         candidates = User.objects.filter(Q(username=username) | Q(email=username))
@@ -0,0 +1,148 @@
+"""
+Run model-layer benchmarks and optionally compare with earlier results.
+
+Benchmarks run in a freshly-created test database on the configured database
+backend (SQLite or MySQL). Results are written as JSON, which can be compared
+between commits::
+
+    ./manage.py benchmark --quick --output=before.json
+    git checkout my-branch
+    ./manage.py benchmark --quick --compare=before.json --threshold=0.25
+
+A benchmark regresses if it is slower by more than the threshold, or if it
+issues more queries; the command then exits with an error.
+
+"""
+from optparse import make_option
+import datetime
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from south.management.commands import patch_for_test_db_setup
+
+from moztrap.debug.benchmark import compare, load_benchmarks, run_benchmarks
+
+
+
+class Command(BaseCommand):
+    args = "[benchmark-name-prefix ...]"
+    help = "Times model-layer hot paths and counts their queries."
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--quick",
+            action="store_true",
+            dest="quick",
+            default=False,
+            help="Only measure the smallest dataset of each benchmark."),
+        make_option(
+            "--repeat",
+            dest="repeat",
+            type="int",
+            default=3,
+            help="Repetitions of each benchmark; fastest is reported."),
+        make_option(
+            "-o",
+            "--output",
+            dest="output",
+            default=None,
+            help="File to write JSON results to."),
+        make_option(
+            "--compare",
+            dest="compare",
+            default=None,
+            help="JSON results file to compare against."),
+        make_option(
+            "--threshold",
+            dest="threshold",
+            type="float",
+            default=0.2,
+            help="Fractional slowdown that counts as a regression."),
+        make_option(
+            "--noinput",
+            action="store_false",
+            dest="interactive",
+            default=True,
+            help="Don't prompt before destroying an existing test database."),
+        )
+
+
+    def handle(self, *names, **options):
+        try:
+            benchmarks = load_benchmarks(names)
+        except ImportError as e:
+            raise CommandError(
+                "Could not load BENCHMARK_MODULES: {0}".format(e))
+        if not benchmarks:
+            raise CommandError("No benchmarks match {0}.".format(
+                    ", ".join(names)))
+
+        baseline = None
+        if options.get("compare"):
+            try:
+                with open(options["compare"]) as fh:
+                    baseline = json.load(fh)["results"]
+            except (IOError, ValueError, KeyError) as e:
+                raise CommandError(
+                    'Could not read results from "{0}": {1}'.format(
+                        options["compare"], e))
+
+        patch_for_test_db_setup()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options.get("interactive"))
+        try:
+            results = run_benchmarks(
+                benchmarks,
+                quick=options.get("quick"),
+                repeat=options.get("repeat"),
+                report=self.report,
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options.get("output"):
+            data = {
+                "meta": {
+                    "database": connection.vendor,
+                    "commit": self.commit(),
+                    "created": datetime.datetime.utcnow().isoformat(),
+                    "repeat": options.get("repeat"),
+                    },
+                "results": results,
+                }
+            with open(options["output"], "w") as fh:
+                json.dump(data, fh, indent=4, sort_keys=True)
+
+        if baseline is not None:
+            regressions = compare(
+                baseline, results, threshold=options.get("threshold"))
+            if regressions:
+                raise CommandError(
+                    "{0} regressions:\n{1}".format(
+                        len(regressions), "\n".join(regressions)))
+            self.stdout.write("No regressions.\n")
+
+
+    def report(self, key, result):
+        """Write a line for a single benchmark result."""
+        if "error" in result:
+            line = "{0}: ERROR {1}".format(key, result["error"])
+        else:
+            line = "{0}: {1:.4f}s ({2} queries, {3:.4f}s in db)".format(
+                key, result["seconds"], result["queries"],
+                result["db_seconds"])
+        self.stdout.write(line + "\n")
+        self.stdout.flush()
+
+
+    def commit(self):
+        """Return the current git commit, if available."""
+        try:
+            return subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], stderr=subprocess.STDOUT).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,92 @@
+"""
+Export results for a Run, a series or a ProductVersion.
+
+Results are streamed in chunks, so exports of any size use constant memory::
+
+    ./manage.py export_results run 12 --format=junit > run-12.xml
+    ./manage.py export_results productversion 3 --output=results.csv
+
+"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap.model.core.models import ProductVersion
+from moztrap.model.execution.models import Run
+from moztrap.model.execution import export
+
+
+
+class Command(BaseCommand):
+    args = "<run|series|productversion> <id>"
+    help = "Streams results for a run, series or product version."
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--format",
+            dest="format",
+            default="csv",
+            help="Export format: {0} (default csv).".format(
+                ", ".join(export.FORMATS))),
+        make_option(
+            "-o",
+            "--output",
+            dest="output",
+            default=None,
+            help="File to write to (default is standard output)."),
+        make_option(
+            "--latest",
+            action="store_true",
+            dest="latest",
+            default=False,
+            help="Only export the latest result per tester/case/environment."),
+        make_option(
+            "--chunk-size",
+            dest="chunk_size",
+            type="int",
+            default=export.CHUNK_SIZE,
+            help="Number of results fetched per query."),
+        )
+
+
+    def handle(self, *args, **options):
+        if not len(args) == 2:
+            raise CommandError("Usage: {0}".format(self.args))
+
+        kind, obj_id = args
+        format = options.get("format")
+        if format not in export.FORMATS:
+            raise CommandError('Unknown format "{0}".'.format(format))
+
+        if kind == "run":
+            try:
+                obj = Run.objects.get(pk=obj_id)
+            except (Run.DoesNotExist, ValueError):
+                raise CommandError('Run "{0}" does not exist.'.format(obj_id))
+        elif kind == "series":
+            try:
+                obj = Run.objects.get(pk=obj_id, is_series=True)
+            except (Run.DoesNotExist, ValueError):
+                raise CommandError(
+                    'Series "{0}" does not exist.'.format(obj_id))
+        elif kind == "productversion":
+            try:
+                obj = ProductVersion.objects.get(pk=obj_id)
+            except (ProductVersion.DoesNotExist, ValueError):
+                raise CommandError(
+                    'Product version "{0}" does not exist.'.format(obj_id))
+        else:
+            raise CommandError("Usage: {0}".format(self.args))
+
+        results = export.results_for(
+            latest=options.get("latest"), **{str(kind): obj})
+
+        output = options.get("output")
+        fh = open(output, "wb") if output else self.stdout
+        try:
+            for data in export.export(
+                    results, format, chunk_size=options.get("chunk_size")):
+                fh.write(data)
+        finally:
+            if output:
+                fh.close()
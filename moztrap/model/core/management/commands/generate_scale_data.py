@@ -0,0 +1,90 @@
+"""
+Generate a large, deterministic dataset for load and performance testing.
+
+All dimensions are per parent object; for instance, this creates 2 products
+with 3 versions each, 6 runs per version and 200,000 results per run (7.2
+million results in all)::
+
+    ./manage.py generate_scale_data --products=2 --versions=3 --runs=6 \\
+        --results=200000 --seed=42
+
+"""
+from optparse import make_option
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap.model.scaledata import ScaleDataGenerator
+
+
+
+# (option name, default, help) for each dataset dimension
+DIMENSIONS = [
+    ("products", 1, "Number of products."),
+    ("versions", 2, "Number of versions per product."),
+    ("cases", 500, "Number of cases per product."),
+    ("steps", 4, "Number of steps per case version."),
+    ("tags", 20, "Number of tags per product."),
+    ("suites", 10, "Number of suites per product."),
+    ("categories", 3, "Number of environment categories."),
+    ("elements", 3, "Number of elements per environment category."),
+    ("runs", 2, "Number of active runs per product version."),
+    ("results", 5000, "Number of results per run."),
+    ("testers", 10, "Number of testers reporting results."),
+    ]
+
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a large dataset with bulk inserts. Given the same options "
+        "and an empty database, the generated data is always the same.")
+
+    option_list = BaseCommand.option_list + tuple(
+        make_option(
+            "--{0}".format(name),
+            dest=name,
+            type="int",
+            default=default,
+            help="{0} (default {1})".format(help, default),
+            )
+        for name, default, help in DIMENSIONS
+        ) + (
+        make_option(
+            "--seed",
+            dest="seed",
+            type="int",
+            default=0,
+            help="Seed for the random generator (default 0)."),
+        make_option(
+            "--batch-size",
+            dest="batch_size",
+            type="int",
+            default=None,
+            help="Number of rows per INSERT (default depends on database)."),
+        )
+
+
+    def handle(self, *args, **options):
+        if args:
+            raise CommandError("Takes no arguments; see --help for options.")
+
+        kwargs = dict((name, options.get(name)) for name, d, h in DIMENSIONS)
+        for name, value in kwargs.items():
+            if value < 0:
+                raise CommandError(
+                    "--{0} must not be negative.".format(name))
+
+        start = time.time()
+        counts = ScaleDataGenerator(
+            seed=options.get("seed"),
+            batch_size=options.get("batch_size"),
+            **kwargs
+            ).generate()
+        elapsed = time.time() - start
+
+        for name in sorted(counts):
+            self.stdout.write("{0}: {1}\n".format(name, counts[name]))
+        self.stdout.write(
+            "Generated {0} rows in {1:.1f}s\n".format(
+                sum(counts.values()), elapsed))
@@ -0,0 +1,104 @@
+"""
+Ingest results for a Run from JUnit/xUnit XML files.
+
+Testcases are matched to cases in the run by case ID (e.g. "pref-12 Test
+login") or case name, and results are written in bulk::
+
+    ./manage.py import_junit 12 results.xml --user=automation --environment=3
+
+"""
+from optparse import make_option
+import os.path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap.model.core.auth import User
+from moztrap.model.execution.ingest import (
+    BATCH_SIZE, IngestError, IngestResult, JUnitIngester)
+from moztrap.model.execution.models import Run
+
+
+
+class Command(BaseCommand):
+    args = "<run_id> <filename>"
+    help = (
+        "Ingests results from a JUnit XML file (or directory of them) "
+        "into the specified run")
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "-u",
+            "--user",
+            dest="user",
+            default=None,
+            help="Username of the tester to record results for (required)."),
+        make_option(
+            "-e",
+            "--environment",
+            dest="environment",
+            default=None,
+            help="ID of the run environment for all results (default is to "
+            "match each testcase classname to an environment label)."),
+        make_option(
+            "--batch-size",
+            dest="batch_size",
+            type="int",
+            default=BATCH_SIZE,
+            help="Number of testcases written per transaction."),
+        )
+
+
+    def handle(self, *args, **options):
+        if not len(args) == 2:
+            raise CommandError("Usage: {0}".format(self.args))
+
+        try:
+            run = Run.objects.get(pk=args[0])
+        except (Run.DoesNotExist, ValueError):
+            raise CommandError('Run "{0}" does not exist.'.format(args[0]))
+
+        username = options.get("user")
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError('User "{0}" does not exist.'.format(username))
+
+        environment = None
+        env_id = options.get("environment")
+        if env_id:
+            try:
+                environment = run.environments.get(pk=env_id)
+            except (run.environments.model.DoesNotExist, ValueError):
+                raise CommandError(
+                    'Environment "{0}" is not in run "{1}".'.format(
+                        env_id, run.id))
+
+        # if this is a directory, ingest all XML files in it
+        if os.path.isdir(args[1]):
+            files = [
+                os.path.join(args[1], f) for f in sorted(os.listdir(args[1]))
+                if f.endswith(".xml") and not f.startswith(".")
+                ]
+        else:
+            files = [args[1]]
+
+        ingester = JUnitIngester(
+            run,
+            user,
+            environment=environment,
+            batch_size=options.get("batch_size"),
+            )
+        total = IngestResult()
+        for filename in files:
+            try:
+                result = ingester.ingest(filename)
+            except IOError as e:
+                raise CommandError(
+                    'Could not open "{0}": {1}'.format(filename, e.strerror))
+            except IngestError as e:
+                raise CommandError("{0}: {1}".format(filename, e))
+            total.append(result)
+
+        result_list = total.get_as_list()
+        result_list.append("")
+        self.stdout.write(u"\n".join(result_list).encode("utf-8"))
@@ -0,0 +1,120 @@
+"""
+Replay recorded request traces and report throughput and latency.
+
+Traces are recorded by ``WORKLOAD_RECORD_FILE`` (see
+``moztrap.debug.middleware.WorkloadRecorderMiddleware``). Each recorded role
+is replayed as the first active user with that role, unless given with
+``--as``::
+
+    ./manage.py replay_workload workload.jsonl --concurrency=8
+    ./manage.py replay_workload workload.jsonl --url=http://localhost:8000 \\
+        --as="Test Manager=manager" --methods=GET,POST
+
+"""
+from optparse import make_option
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap.debug import workload
+
+
+
+class Command(BaseCommand):
+    args = "<filename>"
+    help = (
+        "Replays recorded request traces concurrently and reports "
+        "throughput, latency percentiles and queries per endpoint")
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--url",
+            dest="url",
+            default=None,
+            help="Base URL of a running server to replay against (default "
+            "is to replay in-process with the Django test client)."),
+        make_option(
+            "-c",
+            "--concurrency",
+            dest="concurrency",
+            type="int",
+            default=4,
+            help="Number of threads issuing requests."),
+        make_option(
+            "--methods",
+            dest="methods",
+            default="GET",
+            help="Comma-separated HTTP methods to replay; other traces are "
+            "skipped. Replayed POSTs send empty values and may write data."),
+        make_option(
+            "--limit",
+            dest="limit",
+            type="int",
+            default=None,
+            help="Replay at most this many traces."),
+        make_option(
+            "--as",
+            dest="users",
+            action="append",
+            default=[],
+            help="ROLE=USERNAME: replay traces of ROLE as this user. May be "
+            "given more than once."),
+        make_option(
+            "-o",
+            "--output",
+            dest="output",
+            default=None,
+            help="Also write the report as JSON to this file."),
+        )
+
+
+    def handle(self, *args, **options):
+        if not len(args) == 1:
+            raise CommandError("Usage: {0}".format(self.args))
+
+        usernames = {}
+        for value in options.get("users"):
+            role, sep, username = value.rpartition("=")
+            if not sep or not role or not username:
+                raise CommandError(
+                    'Expected ROLE=USERNAME, not "{0}".'.format(value))
+            usernames[role.decode("utf-8")] = username
+
+        methods = set(
+            m.strip().upper() for m in options.get("methods").split(","))
+        limit = options.get("limit")
+
+        try:
+            with open(args[0]) as f:
+                traces = [
+                    t for t in workload.read_traces(f)
+                    if t["method"] in methods
+                    ]
+        except IOError as e:
+            raise CommandError(
+                'Could not open "{0}": {1}'.format(args[0], e.strerror))
+        except workload.WorkloadError as e:
+            raise CommandError("{0}: {1}".format(args[0], e))
+        if limit is not None:
+            traces = traces[:limit]
+
+        try:
+            sessions = workload.sessions_for(traces, usernames)
+        except workload.WorkloadError as e:
+            raise CommandError(str(e))
+
+        if options.get("url"):
+            target = workload.HttpTarget(options["url"])
+        else:
+            target = workload.ClientTarget()
+
+        result = workload.replay(
+            traces, target, sessions, options.get("concurrency"))
+
+        if options.get("output"):
+            with open(options["output"], "w") as f:
+                json.dump(result.as_dict(), f, indent=2)
+
+        result_list = result.get_as_list()
+        result_list.append("")
+        self.stdout.write(u"\n".join(result_list).encode("utf-8"))
@@ -75,6 +75,9 @@ class ProductVersion(MTModel, TeamModel, HasEnvironmentsModel):
     # denormalized for querying
     latest = models.BooleanField(default=False, editable=False)
 
+    # foreign key to team parent (see TeamModel)
+    parent_field = "product"
+
 
     @property
     def name(self):
@@ -105,6 +108,15 @@ class ProductVersion(MTModel, TeamModel, HasEnvironmentsModel):
         self.product.reorder_versions()
 
 
+    @classmethod
+    def bulk_delete(cls, queryset, user=None):
+        """Delete productversions, reordering versions of each product once."""
+        product_ids = set(queryset.values_list("product_id", flat=True))
+        queryset.delete(user=user)
+        for product in Product.objects.filter(pk__in=product_ids):
+            product.reorder_versions()
+
+
     def undelete(self, *args, **kwargs):
         """Undelete productversion, updating latest version."""
         super(ProductVersion, self).undelete(*args, **kwargs)
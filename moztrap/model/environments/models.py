@@ -7,7 +7,39 @@ from collections import defaultdict
 
 from django.db import models
 
-from ..mtmodel import MTModel
+from ... import cache
+from ..mtmodel import MTModel, MTManager, NotDeletedCount
+
+
+
+class InUseManager(MTManager):
+    """
+    Manager that can annotate, in bulk, how often objects are in use.
+
+    Takes an ``in_use_by`` argument: the lookup of related objects that
+    prevent deletion while not deleted themselves. As in the unannotated
+    ``deletable`` checks, soft-deleted related objects are not counted.
+
+    """
+    def __init__(self, *args, **kwargs):
+        """Instantiate, pulling out the ``in_use_by`` arg."""
+        self._in_use_by = kwargs.pop("in_use_by", None)
+        super(InUseManager, self).__init__(*args, **kwargs)
+
+
+    def with_deletable(self):
+        """
+        Return queryset annotated with ``use_count``.
+
+        ``deletable`` uses it, so checking it on each object in a list takes
+        no further queries.
+
+        """
+        # count a non-null column of the related table, rather than its
+        # pk, so the join to it (and its deleted_on) isn't trimmed away
+        return self.get_query_set().annotate(
+            use_count=NotDeletedCount(
+                "{0}__created_on".format(self._in_use_by)))
 
 
 
@@ -74,6 +106,9 @@ class Category(MTModel):
     """
     name = models.CharField(max_length=200)
 
+    everything = InUseManager(show_deleted=True, in_use_by="elements__environments")
+    objects = InUseManager(show_deleted=False, in_use_by="elements__environments")
+
 
     def __unicode__(self):
         """Return unicode representation."""
@@ -85,10 +120,11 @@ class Category(MTModel):
         verbose_name_plural = "categories"
 
 
-    # @@@ there should be some way to annotate this onto a queryset efficiently
     @property
     def deletable(self):
         """Return True if this category can be deleted, otherwise False."""
+        if hasattr(self, "use_count"):
+            return not self.use_count
         return not Environment.objects.filter(elements__category=self).exists()
 
 
@@ -113,6 +149,9 @@ class Element(MTModel):
     name = models.CharField(max_length=200)
     category = models.ForeignKey(Category, related_name="elements")
 
+    everything = InUseManager(show_deleted=True, in_use_by="environments")
+    objects = InUseManager(show_deleted=False, in_use_by="environments")
+
 
     def __unicode__(self):
         """Return unicode representation."""
@@ -123,10 +162,11 @@ class Element(MTModel):
         ordering = ["name"]
 
 
-    # @@@ there should be some way to annotate this onto a queryset efficiently
     @property
     def deletable(self):
         """Return True if this element can be deleted, otherwise False."""
+        if hasattr(self, "use_count"):
+            return not self.use_count
         return not self.environments.exists()
 
 
@@ -177,8 +217,13 @@ class Environment(MTModel):
 
 
     def ordered_elements(self):
-        """All elements in category name order."""
-        return iter(self.elements.order_by("category__name"))
+        """All elements in category name order (cached)."""
+        return iter(cache.cached(
+                "environment-elements",
+                [Environment, Element, Category],
+                lambda: list(self.elements.order_by("category__name")),
+                parts=[self.id],
+                ))
 
 
     def clone(self, *args, **kwargs):
@@ -187,7 +232,6 @@ class Environment(MTModel):
         return super(Environment, self).clone(*args, **kwargs)
 
 
-    # @@@ there should be some way to annotate this onto a queryset efficiently
     @property
     def deletable(self):
         """Return True if this environment can be deleted, otherwise False."""
@@ -15,6 +15,7 @@ from ..environments.api import EnvironmentResource
 from ..environments.models import Environment
 from ..library.api import CaseVersionResource, BaseSelectionResource
 from ..library.models import CaseVersion, Suite
+from ..mtmodel import NotDeletedCount
 
 from ...view.lists.filters import filter_url
 
@@ -305,9 +306,10 @@ class SuiteSelectionResource(BaseSelectionResource):
     class Meta:
         queryset = Suite.objects.all().select_related(
             "created_by",
+            "product",
             ).prefetch_related(
-            "runsuites",
-            )
+            "runs",
+            ).annotate(case_count=NotDeletedCount("cases", distinct=True))
         list_allowed_methods = ['get']
         fields = ["id", "name", "created_by"]
         filtering = {
@@ -317,22 +319,26 @@ class SuiteSelectionResource(BaseSelectionResource):
             }
 
 
+    def apply_filters(self,
+        request, applicable_filters, applicable_excludes={}):
+        """Apply filters; annotate order of suites in the requested run."""
+        suites = super(SuiteSelectionResource, self).apply_filters(
+            request, applicable_filters, applicable_excludes)
+        run_id = getattr(request, "GET", {}).get("runs")
+        if run_id is not None:
+            suites = self.annotate_order(
+                suites, RunSuite, "suite", "run", run_id)
+        return suites
+
+
     def dehydrate(self, bundle):
         """Add some convenience fields to the return JSON."""
 
         suite = bundle.obj
         bundle.data["suite_id"] = unicode(suite.id)
-        bundle.data["case_count"] = suite.cases.count()
+        bundle.data["case_count"] = suite.case_count
         bundle.data["filter_cases"] = filter_url("manage_cases", suite)
-
-        if "runs" in bundle.request.GET.keys():
-            run_id=int(bundle.request.GET["runs"])
-            s = suite.runsuites.all()
-            order = [x.order for x in suite.runsuites.all()
-                     if x.run_id == run_id][0]
-            bundle.data["order"] = order
-        else:
-            bundle.data["order"] = None
+        bundle.data["order"] = getattr(suite, "member_order", None)
 
         return bundle
 
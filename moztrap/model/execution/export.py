@@ -0,0 +1,317 @@
+"""
+Streaming export of test results (CSV, JSON Lines, JUnit XML).
+
+Results are read in primary-key-ranged chunks as ``values()`` dictionaries, so
+no model instances are created and memory use stays constant no matter how
+many results are exported. Every writer is a generator of byte strings,
+suitable both for an ``HttpResponse`` body and for writing to a file.
+
+"""
+import csv
+import json
+from cStringIO import StringIO
+from xml.sax.saxutils import quoteattr, escape
+
+from django.db.models import Count
+
+from ..environments.models import Environment
+from .models import Result, Run, StepResult
+
+
+
+# default number of results fetched per query
+CHUNK_SIZE = 1000
+
+FORMATS = ["csv", "jsonl", "junit"]
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "junit": "application/xml; charset=utf-8",
+    }
+
+EXTENSIONS = {
+    "csv": "csv",
+    "jsonl": "jsonl",
+    "junit": "xml",
+    }
+
+# (output column name, ``values()`` lookup) for each exported result field
+FIELDS = [
+    ("id", "id"),
+    ("run_id", "runcaseversion__run_id"),
+    ("run", "runcaseversion__run__name"),
+    ("build", "runcaseversion__run__build"),
+    ("runcaseversion_id", "runcaseversion_id"),
+    ("case_id", "runcaseversion__caseversion__case_id"),
+    ("idprefix", "runcaseversion__caseversion__case__idprefix"),
+    ("caseversion_id", "runcaseversion__caseversion_id"),
+    ("name", "runcaseversion__caseversion__name"),
+    ("environment_id", "environment_id"),
+    ("tester", "tester__username"),
+    ("status", "status"),
+    ("comment", "comment"),
+    ("is_latest", "is_latest"),
+    ("review", "review"),
+    ("created_on", "created_on"),
+    ("modified_on", "modified_on"),
+    ]
+
+# extra columns computed per chunk
+EXTRA_FIELDS = ["environment", "bug_urls"]
+
+COLUMNS = [name for name, lookup in FIELDS] + EXTRA_FIELDS
+
+
+
+def results_for(run=None, series=None, productversion=None, latest=False):
+    """
+    Return queryset of results to export for a run, series or productversion.
+
+    Exactly one of ``run``, ``series`` (a series Run) or ``productversion``
+    should be given; each may be a model instance or an ID. If ``latest`` is
+    True, only the latest result for each tester/case/environment is included.
+
+    """
+    results = Result.objects.all()
+    if run is not None:
+        results = results.filter(runcaseversion__run=run)
+    elif series is not None:
+        results = results.filter(runcaseversion__run__series=series)
+    elif productversion is not None:
+        results = results.filter(
+            runcaseversion__run__productversion=productversion)
+    else:
+        raise ValueError("Must export a run, a series or a productversion.")
+    if latest:
+        results = results.filter(is_latest=True)
+    return results
+
+
+
+def iter_chunks(results, chunk_size=CHUNK_SIZE):
+    """
+    Yield lists of result row dictionaries from ``results`` queryset.
+
+    Each chunk is fetched with a single ``pk > last`` ranged query, so
+    the database never has to skip over an OFFSET and no model instances are
+    created.
+
+    """
+    qs = results.order_by("pk").values(*[lookup for name, lookup in FIELDS])
+    last_pk = 0
+    while True:
+        chunk = list(qs.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1]["id"]
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+
+
+
+def iter_rows(results, chunk_size=CHUNK_SIZE):
+    """
+    Yield result rows (dictionaries keyed by ``COLUMNS``) from ``results``.
+
+    Environment labels are resolved once per environment, and bug URLs with one
+    query per chunk.
+
+    """
+    labels = EnvironmentLabels()
+    for chunk in iter_chunks(results, chunk_size):
+        labels.prime(set(r["environment_id"] for r in chunk))
+        bugs = bug_urls_by_result([r["id"] for r in chunk])
+        for values in chunk:
+            row = dict((name, values[lookup]) for name, lookup in FIELDS)
+            row["environment"] = labels[row["environment_id"]]
+            row["bug_urls"] = bugs.get(row["id"], [])
+            yield row
+
+
+
+def bug_urls_by_result(result_ids):
+    """Return dict mapping given result IDs to sorted lists of bug URLs."""
+    bugs = {}
+    for result_id, bug_url in StepResult.objects.filter(
+            result__in=result_ids).exclude(bug_url="").values_list(
+            "result_id", "bug_url").distinct():
+        bugs.setdefault(result_id, []).append(bug_url)
+    for urls in bugs.values():
+        urls.sort()
+    return bugs
+
+
+
+class EnvironmentLabels(object):
+    """
+    Lazily-populated map of environment ID to label.
+
+    Labels are element names in category-name order, matching
+    ``Environment.__unicode__``.
+
+    """
+    def __init__(self):
+        """Initialize an empty label map."""
+        self.labels = {}
+
+
+    def prime(self, env_ids):
+        """Fetch labels for any of ``env_ids`` not already known."""
+        missing = [i for i in env_ids if i not in self.labels]
+        if not missing:
+            return
+        elements = {}
+        for env_id, name in Environment.elements.through.objects.filter(
+                environment__in=missing).order_by(
+                "element__category__name").values_list(
+                "environment_id", "element__name"):
+            elements.setdefault(env_id, []).append(name)
+        for env_id in missing:
+            self.labels[env_id] = u", ".join(elements.get(env_id, []))
+
+
+    def __getitem__(self, env_id):
+        """Return label for ``env_id``, fetching it if needed."""
+        self.prime([env_id])
+        return self.labels[env_id]
+
+
+
+def case_identifier(row):
+    """Return the display ID of a case, e.g. "pref-12" or "12"."""
+    if row["idprefix"]:
+        return u"{0}-{1}".format(row["idprefix"], row["case_id"])
+    return unicode(row["case_id"])
+
+
+
+def _text(value):
+    """Return utf-8 encoded text for a single output value."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        value = u" ".join(value)
+    elif isinstance(value, bool):
+        value = int(value)
+    if not isinstance(value, unicode):
+        value = unicode(value)
+    return value.encode("utf-8")
+
+
+
+def write_csv(rows):
+    """Yield CSV lines (with a header line) for given result rows."""
+    buf = StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow([_text(row[c]) for c in COLUMNS])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    # header only, if there were no rows
+    if buf.tell():
+        yield buf.getvalue()
+
+
+
+def _json_default(value):
+    """Serialize dates and datetimes to ISO 8601 strings."""
+    try:
+        return value.isoformat()
+    except AttributeError:
+        raise TypeError("{0!r} is not JSON serializable".format(value))
+
+
+
+def write_jsonl(rows):
+    """Yield one JSON document per line for given result rows."""
+    for row in rows:
+        yield json.dumps(row, default=_json_default) + "\n"
+
+
+
+# JUnit element (if any) for each result status
+JUNIT_STATUS = {
+    Result.STATUS.failed: "failure",
+    Result.STATUS.invalidated: "error",
+    Result.STATUS.assigned: "skipped",
+    Result.STATUS.started: "skipped",
+    }
+
+
+
+def write_junit(results, chunk_size=CHUNK_SIZE):
+    """
+    Yield JUnit XML for given results queryset; one testsuite per run.
+
+    Only latest results are exported, as JUnit has no notion of result
+    history. Each testcase is named with the case ID and name (e.g.
+    "pref-12 Test that I can log in"), and its classname is the environment.
+
+    """
+    results = results.filter(is_latest=True)
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n'
+    run_ids = results.order_by(
+        "runcaseversion__run").values_list(
+        "runcaseversion__run", flat=True).distinct()
+    for run_id in run_ids:
+        run_results = results.filter(runcaseversion__run=run_id)
+        counts = dict((status, 0) for status, label in Result.STATUS)
+        counts.update(
+            run_results.order_by().values_list("status").annotate(
+                Count("id")))
+        run = Run.objects.values("name", "build").get(pk=run_id)
+        yield (
+            "<testsuite name={0} tests={1} failures={2} errors={3} "
+            "skipped={4}>\n"
+            ).format(
+            quoteattr(_text(run["name"])),
+            quoteattr(str(sum(counts.values()))),
+            quoteattr(str(counts[Result.STATUS.failed])),
+            quoteattr(str(counts[Result.STATUS.invalidated])),
+            quoteattr(str(
+                counts[Result.STATUS.assigned] +
+                counts[Result.STATUS.started])),
+            )
+        for row in iter_rows(run_results, chunk_size):
+            yield _junit_testcase(row)
+        yield "</testsuite>\n"
+    yield "</testsuites>\n"
+
+
+
+def _junit_testcase(row):
+    """Return a JUnit testcase element for a single result row."""
+    name = u"{0} {1}".format(case_identifier(row), row["name"])
+    attrs = "classname={0} name={1}".format(
+        quoteattr(_text(row["environment"])), quoteattr(_text(name)))
+    element = JUNIT_STATUS.get(row["status"])
+    if element is None:
+        return "<testcase {0}/>\n".format(attrs)
+    message = row["comment"]
+    if row["bug_urls"]:
+        message = u"{0} {1}".format(message, u" ".join(row["bug_urls"]))
+    if element == "skipped":
+        body = "<skipped message={0}/>".format(quoteattr(_text(row["status"])))
+    else:
+        body = "<{0} message={1}>{2}</{0}>".format(
+            element,
+            quoteattr(_text(message.strip())),
+            escape(_text(row["comment"])),
+            )
+    return "<testcase {0}>{1}</testcase>\n".format(attrs, body)
+
+
+
+def export(results, format, chunk_size=CHUNK_SIZE):
+    """Return generator of byte strings exporting ``results`` in ``format``."""
+    if format == "csv":
+        return write_csv(iter_rows(results, chunk_size))
+    if format == "jsonl":
+        return write_jsonl(iter_rows(results, chunk_size))
+    if format == "junit":
+        return write_junit(results, chunk_size)
+    raise ValueError("Unknown export format {0!r}.".format(format))
@@ -0,0 +1,467 @@
+"""
+Bulk ingestion of JUnit/xUnit XML results into a run.
+
+The XML is stream-parsed, so files of any size can be ingested in constant
+memory. Each ``testcase`` is mapped to a case in the run by its name, which may
+start with the case ID (optionally with its ID prefix, e.g. "pref-12 Test
+login", as produced by the JUnit export), or else must exactly match the name
+of a case version in the run. The environment is either given for the whole
+file, or looked up by ``classname`` against the environment labels of the run.
+
+Every (case, environment) runcaseversion of the run is resolved up front with
+a single query, and results and failed step results are then written in bulk,
+one transaction per batch.
+
+Testcases may carry ``stepnumber`` and ``bug`` properties to record a failed
+step and its bug URL::
+
+    <testcase name="pref-12 Test login" classname="English, Linux">
+      <properties>
+        <property name="stepnumber" value="2" />
+        <property name="bug" value="http://example.com/bug/1" />
+      </properties>
+      <failure message="Login button missing" />
+    </testcase>
+
+"""
+from collections import namedtuple
+import re
+import time
+from xml.etree import cElementTree as ElementTree
+
+from django.db import transaction
+from django.db.models import Max
+
+from ..library.models import CaseStep
+from ..mtmodel import utcnow
+from .export import EnvironmentLabels
+from .models import Result, RunCaseVersion, StepResult, index_bug_urls
+
+
+
+# default number of testcases written per transaction
+BATCH_SIZE = 500
+
+# result status for each JUnit outcome element; skipped tests are not recorded
+STATUS_ELEMENTS = {
+    "failure": Result.STATUS.failed,
+    "error": Result.STATUS.invalidated,
+    "skipped": None,
+    }
+
+# testcase name starting with a case ID, e.g. "pref-12 Test login" or "12"
+CASE_ID_RE = re.compile(r"^(?:(?P<idprefix>\S+)-)?(?P<id>\d+)(?:\s|$)")
+
+TestCase = namedtuple(
+    "TestCase",
+    ["name", "classname", "status", "message", "stepnumber", "bug"],
+    )
+
+
+
+class IngestError(Exception):
+    """The given XML could not be parsed."""
+    pass
+
+
+
+def iter_testcases(source):
+    """
+    Yield a ``TestCase`` for each ``testcase`` element in ``source``.
+
+    ``source`` is a filename or file-like object. Elements are discarded as
+    soon as they are parsed. Raises ``IngestError`` for malformed XML.
+
+    """
+    root = None
+    try:
+        for event, elem in ElementTree.iterparse(
+                source, events=("start", "end")):
+            if root is None:
+                root = elem
+            if event == "end" and elem.tag == "testcase":
+                yield _testcase(elem)
+                root.clear()
+    except SyntaxError as e:
+        raise IngestError("Could not parse XML: {0}".format(e))
+
+
+
+def _testcase(elem):
+    """Return a ``TestCase`` for given ``testcase`` element."""
+    status = Result.STATUS.passed
+    message = ""
+    for child in elem:
+        if child.tag in STATUS_ELEMENTS:
+            status = STATUS_ELEMENTS[child.tag]
+            message = child.get("message") or (child.text or "")
+            break
+
+    properties = dict(
+        (prop.get("name"), prop.get("value", ""))
+        for prop in elem.iter("property")
+        )
+    try:
+        stepnumber = int(properties["stepnumber"])
+    except (KeyError, ValueError):
+        stepnumber = None
+
+    return TestCase(
+        name=elem.get("name", "").strip(),
+        classname=elem.get("classname", "").strip(),
+        status=status,
+        message=message.strip(),
+        stepnumber=stepnumber,
+        bug=properties.get("bug", ""),
+        )
+
+
+
+class RunCaseVersionMap(object):
+    """
+    Map of (case, environment) to runcaseversion for all cases in a run.
+
+    Populated with a single query on instantiation.
+
+    """
+    def __init__(self, run):
+        """Fetch all runcaseversion/environment pairs of ``run``."""
+        self.rcvs = {}
+        self.cases = {}
+        self.names = {}
+        env_ids = set()
+
+        for rcv_id, cv_id, case_id, idprefix, name, env_id in (
+                RunCaseVersion.environments.through.objects.filter(
+                    runcaseversion__run=run,
+                    runcaseversion__deleted_on__isnull=True,
+                    ).values_list(
+                    "runcaseversion_id",
+                    "runcaseversion__caseversion_id",
+                    "runcaseversion__caseversion__case_id",
+                    "runcaseversion__caseversion__case__idprefix",
+                    "runcaseversion__caseversion__name",
+                    "environment_id",
+                    )):
+            self.rcvs[(case_id, env_id)] = (rcv_id, cv_id)
+            self.cases[case_id] = idprefix
+            # a name shared by more than one case is ambiguous
+            if self.names.setdefault(name, case_id) != case_id:
+                self.names[name] = None
+            env_ids.add(env_id)
+
+        labels = EnvironmentLabels()
+        labels.prime(env_ids)
+        self.environments = dict(
+            (label, env_id) for env_id, label in labels.labels.items())
+
+
+    def case_id(self, name):
+        """Return ID of case matching testcase ``name``, or None."""
+        match = CASE_ID_RE.match(name)
+        if match:
+            case_id = int(match.group("id"))
+            idprefix = match.group("idprefix")
+            if case_id in self.cases and (
+                    idprefix is None or idprefix == self.cases[case_id]):
+                return case_id
+        return self.names.get(name)
+
+
+    def environment_id(self, classname):
+        """Return ID of run environment labeled ``classname``, or None."""
+        return self.environments.get(classname)
+
+
+    def get(self, case_id, environment_id):
+        """Return (runcaseversion ID, caseversion ID) tuple, or None."""
+        return self.rcvs.get((case_id, environment_id))
+
+
+
+class JUnitIngester(object):
+    """
+    Ingests JUnit XML results for a run.
+
+    Instantiate with a run, the user recording the results, and optionally an
+    environment for all results, then call ``ingest``::
+
+        ingester = JUnitIngester(run, user, environment=env)
+        ingest_result = ingester.ingest(fileobj)
+
+    """
+    def __init__(self, run, user, environment=None, batch_size=BATCH_SIZE):
+        """Construct an ingester and resolve the runcaseversions of ``run``."""
+        self.run = run
+        self.user = user
+        self.environment_id = getattr(environment, "id", environment)
+        self.batch_size = batch_size
+        self.rcvs = RunCaseVersionMap(run)
+
+
+    def ingest(self, source):
+        """
+        Ingest the JUnit XML in ``source`` (a filename or file-like object).
+
+        Return an ``IngestResult``. Raises ``IngestError`` for malformed XML;
+        batches written before the error was found are kept.
+
+        """
+        result = IngestResult()
+        start = time.time()
+
+        batch = []
+        for testcase in iter_testcases(source):
+            result.num_cases += 1
+            if testcase.status is None:
+                result.num_skipped += 1
+                continue
+            item = self.resolve(testcase, result)
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                result.num_results += len(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+            result.num_results += len(batch)
+
+        result.elapsed = time.time() - start
+        return result
+
+
+    def resolve(self, testcase, result):
+        """
+        Return (rcv ID, caseversion ID, environment ID, testcase) or None.
+
+        Testcases that can't be resolved are recorded as warnings in
+        ``result``.
+
+        """
+        case_id = self.rcvs.case_id(testcase.name)
+        if case_id is None:
+            result.warn(IngestResult.SKIP_NO_CASE, testcase.name)
+            return None
+
+        env_id = self.environment_id
+        if env_id is None:
+            env_id = self.rcvs.environment_id(testcase.classname)
+            if env_id is None:
+                result.warn(IngestResult.SKIP_NO_ENVIRONMENT, testcase.name)
+                return None
+
+        rcv = self.rcvs.get(case_id, env_id)
+        if rcv is None:
+            result.warn(IngestResult.SKIP_NOT_IN_ENVIRONMENT, testcase.name)
+            return None
+
+        return rcv + (env_id, testcase)
+
+
+    @transaction.commit_on_success
+    def write(self, batch):
+        """Bulk-write results (and failed step results) for resolved batch."""
+        now = utcnow()
+        rcv_ids = set(rcv_id for rcv_id, cv_id, env_id, tc in batch)
+        keys = set((rcv_id, env_id) for rcv_id, cv_id, env_id, tc in batch)
+
+        # only the last result per rcv/environment in this batch is latest,
+        # and it supersedes any existing latest result by this tester
+        stale = [
+            pk for pk, rcv_id, env_id in Result.objects.filter(
+                tester=self.user,
+                runcaseversion__in=rcv_ids,
+                is_latest=True,
+                ).values_list("id", "runcaseversion_id", "environment_id")
+            if (rcv_id, env_id) in keys
+            ]
+        if stale:
+            Result.objects.filter(pk__in=stale).update(is_latest=False)
+
+        # new results are found again by ID (see write_stepresults)
+        after = None
+        if any(tc.status == Result.STATUS.failed and tc.stepnumber is not None
+               for rcv_id, cv_id, env_id, tc in batch):
+            after = Result.everything.aggregate(Max("id"))["id__max"] or 0
+
+        seen = set()
+        latest = []
+        for rcv_id, cv_id, env_id, testcase in reversed(batch):
+            latest.append((rcv_id, env_id) not in seen)
+            seen.add((rcv_id, env_id))
+        latest.reverse()
+
+        Result.objects.bulk_create([
+            Result(
+                tester=self.user,
+                runcaseversion_id=rcv_id,
+                environment_id=env_id,
+                status=testcase.status,
+                comment=testcase.message,
+                is_latest=is_latest,
+                created_by=self.user,
+                created_on=now,
+                modified_by=self.user,
+                modified_on=now,
+                )
+            for (rcv_id, cv_id, env_id, testcase), is_latest
+            in zip(batch, latest)
+            ])
+
+        failed_rcv_ids = set(
+            rcv_id for rcv_id, cv_id, env_id, testcase in batch
+            if testcase.status == Result.STATUS.failed
+            )
+        if failed_rcv_ids:
+            self.write_stepresults(batch, now, after)
+            # as RunCaseVersion.result_fail does, touch failed rcvs
+            RunCaseVersion.objects.filter(pk__in=failed_rcv_ids).update(
+                user=self.user)
+
+
+    def write_stepresults(self, batch, now, after):
+        """
+        Bulk-write failed step results for batch results created at now.
+
+        ``after`` is the highest result ID before the batch was inserted.
+
+        """
+        failed = [
+            (rcv_id, cv_id, env_id, testcase)
+            for rcv_id, cv_id, env_id, testcase in batch
+            if testcase.status == Result.STATUS.failed
+            and testcase.stepnumber is not None
+            ]
+        if not failed:
+            return
+
+        steps = dict(
+            ((cv_id, number), step_id)
+            for cv_id, number, step_id in CaseStep.objects.filter(
+                caseversion__in=set(item[1] for item in failed),
+                number__in=set(item[3].stepnumber for item in failed),
+                ).values_list("caseversion_id", "number", "id")
+            )
+
+        # bulk_create doesn't return IDs, and rows may not be inserted in
+        # order; find the failed results this tester created since ``after``
+        # by rcv, environment and comment (``now`` alone may match results of
+        # an earlier import in the same second). Results sharing all of those
+        # are indistinguishable, so it doesn't matter which one gets which
+        # step.
+        result_ids = {}
+        for result_id, rcv_id, env_id, comment in Result.objects.filter(
+                id__gt=after,
+                tester=self.user,
+                created_on=now,
+                status=Result.STATUS.failed,
+                runcaseversion__in=set(item[0] for item in failed),
+                ).order_by("id").values_list(
+                "id", "runcaseversion_id", "environment_id", "comment"):
+            result_ids.setdefault((rcv_id, env_id, comment), []).append(
+                result_id)
+
+        stepresults = []
+        for rcv_id, cv_id, env_id, testcase in failed:
+            ids = result_ids.get((rcv_id, env_id, testcase.message))
+            step_id = steps.get((cv_id, testcase.stepnumber))
+            if not ids or step_id is None:
+                continue
+            stepresults.append(
+                StepResult(
+                    result_id=ids.pop(0),
+                    step_id=step_id,
+                    status=StepResult.STATUS.failed,
+                    bug_url=testcase.bug,
+                    created_by=self.user,
+                    created_on=now,
+                    modified_by=self.user,
+                    modified_on=now,
+                    )
+                )
+        StepResult.objects.bulk_create(stepresults)
+        index_bug_urls([sr.result_id for sr in stepresults])
+
+
+
+class IngestResult(object):
+    """Results of ingesting a JUnit XML file."""
+
+    SKIP_NO_CASE = "Skipped: No case in run matches testcase"
+    SKIP_NO_ENVIRONMENT = "Skipped: No run environment matches classname of"
+    SKIP_NOT_IN_ENVIRONMENT = "Skipped: Case not in run for environment of"
+
+    def __init__(self):
+        """
+        Construct an IngestResult to keep track of ingestion status.
+
+        num_cases -- number of testcases parsed
+        num_results -- number of results recorded
+        num_skipped -- number of skipped testcases (not recorded)
+        warnings -- testcases that could not be recorded
+        elapsed -- wall-clock seconds taken
+
+        """
+        self.num_cases = 0
+        self.num_results = 0
+        self.num_skipped = 0
+        self.warnings = []
+        self.elapsed = 0.0
+
+
+    def warn(self, reason, name):
+        """Add a warning about the testcase with given name."""
+        self.warnings.append({"reason": reason, "item": name})
+
+
+    def append(self, result):
+        """Append the results object into this results object."""
+        self.num_cases += result.num_cases
+        self.num_results += result.num_results
+        self.num_skipped += result.num_skipped
+        self.warnings.extend(result.warnings)
+        self.elapsed += result.elapsed
+
+
+    @property
+    def cases_per_second(self):
+        """Throughput of the ingestion, in testcases per second."""
+        if not self.elapsed:
+            return float(self.num_cases)
+        return self.num_cases / self.elapsed
+
+
+    def as_dict(self):
+        """Return a JSON-serializable summary."""
+        return {
+            "cases": self.num_cases,
+            "results": self.num_results,
+            "skipped": self.num_skipped,
+            "warnings": self.warnings,
+            "seconds": round(self.elapsed, 3),
+            "cases_per_second": round(self.cases_per_second, 1),
+            }
+
+
+    def get_as_list(self):
+        """
+        Return a list of the statuses from the ingestion.
+
+        List items will look like::
+
+            Skipped: No case in run matches testcase: test_login
+            Recorded 3 results from 4 testcases (1 skipped)
+            Ingested 4 testcases in 0.02s (200.0 cases/sec)
+
+        """
+        result_list = [
+            u"{0}: {1}".format(x["reason"], x["item"]) for x in self.warnings]
+
+        result_list.append(
+            "Recorded {0} results from {1} testcases ({2} skipped)".format(
+                self.num_results, self.num_cases, self.num_skipped))
+        result_list.append(
+            "Ingested {0} testcases in {1:.2f}s ({2:.1f} cases/sec)".format(
+                self.num_cases, self.elapsed, self.cases_per_second))
+        return result_list
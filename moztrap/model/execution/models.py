@@ -7,10 +7,12 @@ import datetime
 from django.core.exceptions import ValidationError
 from django.db import connection, transaction, models
 from django.db.models import Q
+from django.utils.datastructures import SortedDict
 
 from model_utils import Choices
 
-from ..mtmodel import MTModel, TeamModel, DraftStatusModel
+from ..membership import OrderedMembership, ORDER_GAP
+from ..mtmodel import MTModel, MTManager, TeamModel, DraftStatusModel
 from ..core.auth import User
 from ..core.models import ProductVersion
 from ..environments.models import Environment, HasEnvironmentsModel
@@ -18,6 +20,139 @@ from ..library.models import CaseVersion, Suite, CaseStep
 
 
 
+class ResultCountsManager(MTManager):
+    """
+    Manager that can annotate result counts as database expressions.
+
+    Subclasses define how results and case/environment combinations are
+    joined to the managed model's table.
+
+    """
+    def with_result_counts(self):
+        """
+        Return queryset annotated with result counts and completion.
+
+        Each object gets ``passed_count``, ``failed_count`` and
+        ``invalidated_count`` (of latest results) and ``completion_ratio``
+        (fraction of its case/environment combinations with a completed
+        result). They are correlated subqueries, so a list can be sorted on
+        them (e.g. ``order_by("-completion_ratio")``) in a single query. To
+        filter by completion, see ``completion_sql``.
+
+        """
+        qn = connection.ops.quote_name
+        results = "{0} {1}".format(
+            self._results_from(), "AND r.{0} = %s AND r.{1} IS NULL".format(
+                qn("is_latest"), qn("deleted_on")))
+
+        select = SortedDict()
+        params = []
+        for status in Result.COMPLETED_STATES:
+            select["{0}_count".format(status)] = (
+                "SELECT COUNT(*) {0} AND r.{1} = %s".format(
+                    results, qn("status")))
+            params.extend([True, status])
+        select["completion_ratio"], completion_params = self.completion_sql()
+        params.extend(completion_params)
+
+        return self.get_query_set().extra(select=select, select_params=params)
+
+
+    def completion_sql(self):
+        """
+        Return (sql, params) of the completion ratio of the outer object.
+
+        This is the ``completion_ratio`` of ``with_result_counts``; it can
+        also be used in an ``extra(where=...)`` to filter by completion.
+
+        """
+        qn = connection.ops.quote_name
+        combos = self._combinations_from()
+        completed = (
+            "{0} AND EXISTS (SELECT 1 FROM {1} c WHERE "
+            "c.{2} = e.{2} AND c.{3} = e.{3} AND c.{4} IN ({5}) "
+            "AND c.{6} IS NULL)".format(
+                combos,
+                qn(Result._meta.db_table),
+                qn("runcaseversion_id"),
+                qn("environment_id"),
+                qn("status"),
+                ", ".join(["%s"] * len(Result.COMPLETED_STATES)),
+                qn("deleted_on"),
+                )
+            )
+        sql = (
+            "CASE WHEN (SELECT COUNT(*) {0}) = 0 THEN 0 "
+            "ELSE (SELECT COUNT(*) {1}) * 1.0 / (SELECT COUNT(*) {0}) "
+            "END".format(combos, completed)
+            )
+        return sql, list(Result.COMPLETED_STATES)
+
+
+    def _results_from(self):
+        """Return FROM/WHERE SQL of results (as ``r``) of outer object."""
+        raise NotImplementedError
+
+
+    def _combinations_from(self):
+        """Return FROM/WHERE SQL of case/env combinations (as ``e``)."""
+        raise NotImplementedError
+
+
+    def _outer_id(self):
+        """Return SQL of the outer (managed) object's ID."""
+        qn = connection.ops.quote_name
+        return "{0}.{1}".format(qn(self.model._meta.db_table), qn("id"))
+
+
+    def _via_runcaseversions(self, table, alias):
+        """Return FROM/WHERE SQL of ``table`` rows of a run's rcvs."""
+        qn = connection.ops.quote_name
+        return (
+            "FROM {0} {1} INNER JOIN {2} rcv ON {1}.{3} = rcv.{4} "
+            "WHERE rcv.{5} = {6}".format(
+                qn(table),
+                alias,
+                qn(RunCaseVersion._meta.db_table),
+                qn("runcaseversion_id"),
+                qn("id"),
+                qn("run_id"),
+                self._outer_id(),
+                )
+            )
+
+
+
+class RunManager(ResultCountsManager):
+    """Manager for runs; results are counted across their rcvs."""
+    def _results_from(self):
+        return self._via_runcaseversions(Result._meta.db_table, "r")
+
+
+    def _combinations_from(self):
+        return self._via_runcaseversions(
+            RunCaseVersion.environments.through._meta.db_table, "e")
+
+
+
+class RunCaseVersionManager(ResultCountsManager):
+    """Manager for run case versions."""
+    def _from(self, table, alias):
+        qn = connection.ops.quote_name
+        return "FROM {0} {1} WHERE {1}.{2} = {3}".format(
+            qn(table), alias, qn("runcaseversion_id"), self._outer_id())
+
+
+    def _results_from(self):
+        return self._from(Result._meta.db_table, "r")
+
+
+    def _combinations_from(self):
+        return self._from(
+            RunCaseVersion.environments.through._meta.db_table, "e")
+
+
+
 class Run(MTModel, TeamModel, DraftStatusModel, HasEnvironmentsModel):
     """A test run."""
     productversion = models.ForeignKey(ProductVersion, related_name="runs")
@@ -34,6 +169,12 @@ class Run(MTModel, TeamModel, DraftStatusModel, HasEnvironmentsModel):
     suites = models.ManyToManyField(
         Suite, through="RunSuite", related_name="runs")
 
+    everything = RunManager(show_deleted=True)
+    objects = RunManager(show_deleted=False)
+
+    # foreign key to team parent (see TeamModel)
+    parent_field = "productversion"
+
 
     def __unicode__(self):
         """Return unicode representation."""
@@ -91,6 +232,16 @@ class Run(MTModel, TeamModel, DraftStatusModel, HasEnvironmentsModel):
         return super(Run, self).clone(*args, **kwargs)
 
 
+    def set_suites(self, suites, user=None):
+        """
+        Make ``suites`` (suites or IDs, in order) the suites of this run.
+
+        Only changed memberships are written; see ``OrderedMembership``.
+
+        """
+        return RUN_SUITES.set(self, suites, user=user)
+
+
     def activate(self, *args, **kwargs):
         """Make run active, locking in runcaseversions for all suites."""
         if self.status == self.STATUS.draft:
@@ -98,6 +249,26 @@ class Run(MTModel, TeamModel, DraftStatusModel, HasEnvironmentsModel):
         super(Run, self).activate(*args, **kwargs)
 
 
+    @classmethod
+    def bulk_activate(cls, queryset, user=None):
+        """
+        Activate all runs in ``queryset``.
+
+        Draft runs are activated one at a time, as their runcaseversions are
+        locked in; the others with a single update.
+
+        """
+        pks = []
+        for run in queryset:
+            if run.status == cls.STATUS.draft:
+                run.activate(user=user)
+            else:
+                pks.append(run.pk)
+        if pks:
+            cls.everything.filter(pk__in=pks).update(
+                status=cls.STATUS.active, user=user)
+
+
     def refresh(self, *args, **kwargs):
         """Update all the runcaseversions while the run is active."""
         if self.status == self.STATUS.active:
@@ -274,11 +445,16 @@ class Run(MTModel, TeamModel, DraftStatusModel, HasEnvironmentsModel):
 
     def result_summary(self):
         """Return a dict summarizing status of results."""
+        summary = _annotated_summary(self)
+        if summary is not None:
+            return summary
         return result_summary(Result.objects.filter(runcaseversion__run=self))
 
 
     def completion(self):
         """Return fraction of case/env combos that have a completed result."""
+        if hasattr(self, "completion_ratio"):
+            return float(self.completion_ratio)
         total = RunCaseVersion.environments.through._default_manager.filter(
             runcaseversion__run=self).count()
         completed = Result.objects.filter(
@@ -316,6 +492,9 @@ class RunCaseVersion(HasEnvironmentsModel, MTModel):
     caseversion = models.ForeignKey(CaseVersion, related_name="runcaseversions")
     order = models.IntegerField(default=0, db_index=True)
 
+    everything = RunCaseVersionManager(show_deleted=True)
+    objects = RunCaseVersionManager(show_deleted=False)
+
 
     def __unicode__(self):
         """Return unicode representation."""
@@ -324,10 +503,13 @@ class RunCaseVersion(HasEnvironmentsModel, MTModel):
 
     def bug_urls(self):
         """Returns set of bug URLs associated with this run/caseversion."""
+        try:
+            return self._prefetched_bug_urls
+        except AttributeError:
+            pass
         return set(
-            StepResult.objects.filter(
-                result__runcaseversion=self).exclude(
-                bug_url="").values_list("bug_url", flat=True).distinct()
+            BugURL.objects.live().filter(runcaseversion=self).values_list(
+                "url", flat=True).distinct()
             )
 
 
@@ -359,11 +541,16 @@ class RunCaseVersion(HasEnvironmentsModel, MTModel):
 
     def result_summary(self):
         """Return a dict summarizing status of results."""
+        summary = _annotated_summary(self)
+        if summary is not None:
+            return summary
         return result_summary(self.results.all())
 
 
     def completion(self):
         """Return fraction of environments that have a completed result."""
+        if hasattr(self, "completion_ratio"):
+            return float(self.completion_ratio)
         total = self.environments.count()
         completed = self.results.filter(
             status__in=Result.COMPLETED_STATES).values(
@@ -377,6 +564,10 @@ class RunCaseVersion(HasEnvironmentsModel, MTModel):
 
     def testers(self):
         """Return list of testers with assigned / executed results."""
+        try:
+            return self._prefetched_testers
+        except AttributeError:
+            pass
         return User.objects.filter(
             pk__in=self.results.values_list("tester", flat=True).distinct())
 
@@ -475,6 +666,11 @@ class RunSuite(MTModel):
 
 
 
+# suites of runs, sparsely ordered so moving a suite usually updates one row
+RUN_SUITES = OrderedMembership(RunSuite, "run", "suite", gap=ORDER_GAP)
+
+
+
 class Result(MTModel):
     """A result of a User running a RunCaseVersion in an Environment."""
     STATUS = Choices("assigned", "started", "passed", "failed", "invalidated")
@@ -509,10 +705,12 @@ class Result(MTModel):
 
     def bug_urls(self):
         """Returns set of bug URLs associated with this result."""
+        try:
+            return self._prefetched_bug_urls
+        except AttributeError:
+            pass
         return set(
-            self.stepresults.exclude(
-                bug_url="").values_list("bug_url", flat=True).distinct()
-            )
+            self.bugurls.values_list("url", flat=True).distinct())
 
 
     def save(self, *args, **kwargs):
@@ -554,6 +752,151 @@ class StepResult(MTModel):
         return "%s (%s: %s)" % (self.result, self.step, self.status)
 
 
+    def save(self, *args, **kwargs):
+        """Save step result and update bug URL index of its result."""
+        super(StepResult, self).save(*args, **kwargs)
+        index_bug_urls([self.result_id])
+
+
+    def delete(self, *args, **kwargs):
+        """Delete step result and update bug URL index of its result."""
+        super(StepResult, self).delete(*args, **kwargs)
+        index_bug_urls([self.result_id])
+
+
+    def undelete(self, *args, **kwargs):
+        """Undelete step result and update bug URL index of its result."""
+        super(StepResult, self).undelete(*args, **kwargs)
+        index_bug_urls([self.result_id])
+
+
+
+class BugURLManager(models.Manager):
+    """Manager for the bug URL index."""
+    def live(self):
+        """Return index entries whose result isn't deleted."""
+        return self.get_query_set().filter(result__deleted_on__isnull=True)
+
+
+
+class BugURL(models.Model):
+    """
+    Index of bug URLs reported in step results, by result, run and case.
+
+    Maintained by ``index_bug_urls``, so that e.g. the runs that hit a bug
+    are an indexed lookup::
+
+        Run.objects.filter(
+            bugurls__in=BugURL.objects.live().filter(url=url)).distinct()
+
+    """
+    url = models.URLField(db_index=True)
+    result = models.ForeignKey(Result, related_name="bugurls")
+    runcaseversion = models.ForeignKey(
+        RunCaseVersion, related_name="bugurls")
+    run = models.ForeignKey(Run, related_name="bugurls")
+    caseversion = models.ForeignKey(CaseVersion, related_name="bugurls")
+
+    objects = BugURLManager()
+
+
+    def __unicode__(self):
+        """Return unicode representation."""
+        return self.url
+
+
+    class Meta:
+        unique_together = [("url", "result")]
+
+
+
+def index_bug_urls(result_ids, chunk_size=500):
+    """Rebuild bug URL index entries of given results from step results."""
+    result_ids = list(set(result_ids))
+    for i in range(0, len(result_ids), chunk_size):
+        chunk = result_ids[i:i + chunk_size]
+        BugURL.objects.filter(result__in=chunk).delete()
+        BugURL.objects.bulk_create([
+                BugURL(
+                    url=url,
+                    result_id=result_id,
+                    runcaseversion_id=rcv_id,
+                    run_id=run_id,
+                    caseversion_id=cv_id,
+                    )
+                for url, result_id, rcv_id, run_id, cv_id
+                in StepResult.objects.filter(result__in=chunk).exclude(
+                    bug_url="").values_list(
+                    "bug_url",
+                    "result_id",
+                    "result__runcaseversion_id",
+                    "result__runcaseversion__run_id",
+                    "result__runcaseversion__caseversion_id",
+                    ).distinct()
+                ])
+
+
+
+def prefetch_bug_urls(objects):
+    """
+    Fetch bug URLs of all given objects with one query.
+
+    ``objects`` are results, runcaseversions or caseversions (all of one
+    model); afterwards their ``bug_urls`` method returns without querying.
+
+    """
+    objects = list(objects)
+    if not objects:
+        return
+    # index fields are named after the models they refer to
+    field = objects[0]._meta.object_name.lower()
+    urls = {}
+    for obj_id, url in BugURL.objects.live().filter(
+            **{"{0}__in".format(field): [o.id for o in objects]}
+            ).values_list("{0}_id".format(field), "url").distinct():
+        urls.setdefault(obj_id, set()).add(url)
+    for obj in objects:
+        obj._prefetched_bug_urls = urls.get(obj.id, set())
+
+
+
+def prefetch_testers(runcaseversions):
+    """
+    Fetch testers of all given runcaseversions with two queries.
+
+    Afterwards their ``testers`` method returns without querying.
+
+    """
+    runcaseversions = list(runcaseversions)
+    tester_ids = {}
+    for rcv_id, tester_id in Result.objects.filter(
+            runcaseversion__in=[rcv.id for rcv in runcaseversions]
+            ).values_list("runcaseversion_id", "tester_id").distinct():
+        tester_ids.setdefault(rcv_id, set()).add(tester_id)
+    users = User.objects.in_bulk(
+        set().union(*tester_ids.values())) if tester_ids else {}
+    for rcv in runcaseversions:
+        rcv._prefetched_testers = [
+            users[pk] for pk in sorted(tester_ids.get(rcv.id, []))]
+
+
+
+def _annotated_summary(obj):
+    """
+    Return result summary dict from ``with_result_counts`` annotations.
+
+    Returns None if ``obj`` was not annotated.
+
+    """
+    try:
+        return dict(
+            (s, getattr(obj, "{0}_count".format(s)))
+            for s in Result.COMPLETED_STATES
+            )
+    except AttributeError:
+        return None
+
+
 
 def result_summary(results):
     """
@@ -0,0 +1,237 @@
+"""
+Request-scoped identity map of model instances.
+
+Django fetches the target of a foreign key separately for every object it is
+accessed on, so e.g. listing twenty runs of one product version fetches that
+product version twenty times. While an identity map is active (for the
+duration of a request with ``IdentityMapMiddleware``, enabled by the
+``IDENTITY_MAP_ENABLED`` setting, or within ``active_identity_map()``), such
+fetches return the instance already fetched for the same model and primary
+key instead.
+
+Only models whose default manager uses ``IdentityMapMixin`` (all MozTrap
+models, and users) take part, and only unfiltered single-object lookups by
+primary key (as foreign-key fetches are) and ``in_bulk`` are served from the
+map. ``prime`` and ``prime_related`` fill it in bulk.
+
+Instances are dropped from the map when saved or (soft-)deleted, and all
+instances of a model when it's updated in bulk (``MTQuerySet.update``); other
+writes (raw SQL, ``update`` on plain querysets) are not seen by an active
+map.
+
+"""
+from contextlib import contextmanager
+import threading
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.db.models import signals
+
+
+
+_local = threading.local()
+
+
+
+def activate():
+    """Start a new, empty identity map for this thread."""
+    _local.map = {}
+
+
+
+def deactivate():
+    """Discard this thread's identity map."""
+    _local.map = None
+
+
+
+def active_map():
+    """Return this thread's identity map (a dict), or None if inactive."""
+    return getattr(_local, "map", None)
+
+
+
+@contextmanager
+def active_identity_map():
+    """Activate a new identity map for the duration of the block."""
+    previous = active_map()
+    activate()
+    try:
+        yield
+    finally:
+        _local.map = previous
+
+
+
+def _key(model, pk):
+    return (model, model._meta.pk.to_python(pk))
+
+
+
+def prime(objects):
+    """Add given instances to the active identity map, if any."""
+    idmap = active_map()
+    if idmap is not None:
+        for obj in objects:
+            idmap.setdefault(_key(obj.__class__, obj.pk), obj)
+
+
+
+def prime_related(objects, *fields):
+    """
+    Fetch targets of given foreign keys of all ``objects`` into the map.
+
+    Takes at most one query per field (none for targets already in the map),
+    and sets the fetched targets on the objects; works whether a map is
+    active or not.
+
+    """
+    objects = list(objects)
+    if not objects:
+        return
+    opts = objects[0]._meta
+    for name in fields:
+        field = opts.get_field(name)
+        ids = set(getattr(o, field.attname) for o in objects) - set([None])
+        targets = field.rel.to._default_manager.in_bulk(ids)
+        cache_name = field.get_cache_name()
+        for obj in objects:
+            target = targets.get(getattr(obj, field.attname))
+            if target is not None:
+                setattr(obj, cache_name, target)
+
+
+
+class IdentityMapQuerySetMixin(object):
+    """QuerySet mixin serving plain lookups by pk from the identity map."""
+    def get(self, *args, **kwargs):
+        """Return instance from the map for a plain get() by pk."""
+        idmap = active_map()
+        pk = self._identity_pk(args, kwargs) if idmap is not None else None
+        if pk is None:
+            return super(IdentityMapQuerySetMixin, self).get(*args, **kwargs)
+        key = (self.model, pk)
+        try:
+            return idmap[key]
+        except KeyError:
+            obj = super(IdentityMapQuerySetMixin, self).get(*args, **kwargs)
+            idmap[key] = obj
+            return obj
+
+
+    def in_bulk(self, id_list):
+        """Return dict of instances by pk, from the map where possible."""
+        idmap = active_map()
+        if idmap is None or not self._is_plain():
+            return super(IdentityMapQuerySetMixin, self).in_bulk(id_list)
+        found = {}
+        missing = []
+        for pk in id_list:
+            try:
+                obj = idmap.get(_key(self.model, pk))
+            except ValidationError:
+                obj = None
+            if obj is None:
+                missing.append(pk)
+            else:
+                found[obj.pk] = obj
+        if missing:
+            fetched = super(IdentityMapQuerySetMixin, self).in_bulk(missing)
+            prime(fetched.values())
+            found.update(fetched)
+        return found
+
+
+    def _is_plain(self):
+        """Return True if this queryset has no filters or other tweaks."""
+        query = self.query
+        return not (
+            query.where or
+            query.extra or
+            query.select_related or
+            query.deferred_loading != (set(), True) or
+            query.low_mark or
+            query.high_mark is not None
+            )
+
+
+    def _identity_pk(self, args, kwargs):
+        """Return pk if a get() with these args can be served from the map."""
+        if args or len(kwargs) != 1 or not self._is_plain():
+            return None
+        lookup, value = kwargs.items()[0]
+        name = self.model._meta.pk.name
+        if lookup not in ("pk", "pk__exact", name, name + "__exact"):
+            return None
+        try:
+            return self.model._meta.pk.to_python(value)
+        except ValidationError:
+            return None
+
+
+
+class IdentityMapMixin(object):
+    """
+    Manager mixin: fetch foreign-key targets through the identity map.
+
+    Makes Django use this manager for fetching related objects when it's its
+    model's default manager; its querysets must use
+    ``IdentityMapQuerySetMixin``.
+
+    """
+    def __init__(self, *args, **kwargs):
+        """Instantiate manager; mark it for use for related objects."""
+        super(IdentityMapMixin, self).__init__(*args, **kwargs)
+        # set on the instance rather than the class, because Django also
+        # picks a model's _base_manager (used for saving and deleting) by the
+        # class attribute, and that should stay a plain Manager
+        self.use_for_related_fields = True
+
+
+
+def discard(*models):
+    """Drop all instances of given models (and their proxies) from the map."""
+    idmap = active_map()
+    if idmap:
+        concrete = set(m._meta.concrete_model for m in models)
+        for key in idmap.keys():
+            if key[0]._meta.concrete_model in concrete:
+                del idmap[key]
+
+
+
+def forget(sender, instance, **kwargs):
+    """Drop saved or deleted instance from the identity map (receiver)."""
+    idmap = active_map()
+    if idmap and instance.pk is not None:
+        concrete = sender._meta.concrete_model
+        for key in idmap.keys():
+            if key[1] == instance.pk and (
+                    key[0]._meta.concrete_model is concrete):
+                del idmap[key]
+
+
+
+signals.post_save.connect(forget, dispatch_uid="identity_map_save")
+signals.post_delete.connect(forget, dispatch_uid="identity_map_delete")
+
+
+
+class IdentityMapMiddleware(object):
+    """Activates an identity map for each request, if enabled."""
+    def __init__(self):
+        if not getattr(settings, "IDENTITY_MAP_ENABLED", False):
+            raise MiddlewareNotUsed
+
+
+    def process_request(self, request):
+        activate()
+
+
+    def process_response(self, request, response):
+        deactivate()
+        return response
+
+
+    def process_exception(self, request, exception):
+        deactivate()
@@ -1,4 +1,5 @@
 import datetime
+from django.db import connection
 from tastypie.exceptions import BadRequest
 
 from tastypie.resources import ModelResource, ALL, ALL_WITH_RELATIONS
@@ -6,7 +7,7 @@ from tastypie import fields
 
 from ..core.api import (ProductVersionResource, ProductResource,
                         UserResource)
-from .models import CaseVersion, Case, Suite, CaseStep
+from .models import CaseVersion, Case, Suite, CaseStep, SuiteCase
 from ..mtapi import MTResource
 from ..environments.api import EnvironmentResource
 from ..tags.api import TagResource
@@ -93,6 +94,44 @@ class BaseSelectionResource(ModelResource):
             **applicable_filters).exclude(**applicable_excludes)
 
 
+    def annotate_order(self, objects, through, member, owner, owner_id,
+                       column="id"):
+        """
+        Annotate and order objects by ``member_order`` in owner ``owner_id``.
+
+        ``through`` is the ordered membership model, with ``member`` and
+        ``owner`` foreign keys; ``column`` is the field of the listed objects
+        that ``member`` refers to. The order is selected with a subquery, so
+        the listed objects are not multiplied by a join. (The subquery is
+        parenthesized so it is also valid where Django repeats it in a GROUP
+        BY clause, and not named "order", which Django then fails to quote
+        in selected related columns of that name.)
+
+        """
+        qn = connection.ops.quote_name
+        opts = through._meta
+        table = qn(opts.db_table)
+        sql = (
+            "(SELECT MIN({table}.{order}) FROM {table} "
+            "WHERE {table}.{member} = {outer}.{column} "
+            "AND {table}.{owner} = %s "
+            "AND {table}.{deleted_on} IS NULL)".format(
+                table=table,
+                order=qn(opts.get_field("order").column),
+                member=qn(opts.get_field(member).column),
+                outer=qn(objects.model._meta.db_table),
+                column=qn(objects.model._meta.get_field(column).column),
+                owner=qn(opts.get_field(owner).column),
+                deleted_on=qn(opts.get_field("deleted_on").column),
+                )
+            )
+        return objects.extra(
+            select={"member_order": sql},
+            select_params=[owner_id],
+            order_by=["member_order", "id"],
+            )
+
+
     def obj_get_list(self, request=None, **kwargs):
         """Return the list with included and excluded filters, if they exist."""
         filters = {}
@@ -144,9 +183,8 @@ class CaseSelectionResource(BaseSelectionResource):
             "productversion",
             "created_by",
             ).prefetch_related(
-                "tags",
-                "case__suitecases",
-                ).distinct().order_by("case__suitecases__order")
+                "tags__product",
+                ).distinct()
         list_allowed_methods = ['get']
         fields = ["id", "name", "latest", "created_by"]
         filtering = {
@@ -158,6 +196,18 @@ class CaseSelectionResource(BaseSelectionResource):
             }
 
 
+    def apply_filters(self,
+        request, applicable_filters, applicable_excludes={}):
+        """Apply filters; annotate order of cases in the requested suite."""
+        caseversions = super(CaseSelectionResource, self).apply_filters(
+            request, applicable_filters, applicable_excludes)
+        suite_id = getattr(request, "GET", {}).get("case__suites")
+        if suite_id is not None:
+            caseversions = self.annotate_order(
+                caseversions, SuiteCase, "case", "suite", suite_id, "case")
+        return caseversions
+
+
     def dehydrate(self, bundle):
         """Add some convenience fields to the return JSON."""
 
@@ -165,14 +215,7 @@ class CaseSelectionResource(BaseSelectionResource):
         bundle.data["case_id"] = unicode(case.id)
         bundle.data["product_id"] = unicode(case.product_id)
         bundle.data["product"] = {"id": unicode(case.product_id)}
-
-        if "case__suites" in bundle.request.GET.keys():
-            suite_id=int(bundle.request.GET["case__suites"])
-            order = [x.order for x in case.suitecases.all()
-                if x.suite_id == suite_id][0]
-            bundle.data["order"] = order
-        else:
-            bundle.data["order"] = None
+        bundle.data["order"] = getattr(bundle.obj, "member_order", None)
 
         return bundle
 
@@ -26,43 +26,78 @@ class BulkParser(object):
     and/or possibly an "error" key containing an error message encountered in
     parsing.
 
+    For large inputs, ``iter_parse`` parses any iterable of lines (e.g. a
+    file) and yields each test case as soon as it is complete, so only one
+    case is held in memory at a time::
+
+        for item in parser.iter_parse(fileobj):
+            ...
+
     """
     def parse(self, text):
         """Parse given text and return list of data dictionaries."""
         data = []
-        state = self.begin
+        for item in self.iter_parse(text.splitlines()):
+            del item["line"]
+            data.append(item)
+            if "error" in item:
+                break
+        return data
 
-        lines = text.splitlines()
-        error = False
 
-        for line in lines:
+    def iter_parse(self, lines):
+        """
+        Parse given iterable of lines, yielding data dictionaries.
+
+        Each dictionary has a "line" key with the (1-based) number of the line
+        its test case starts on, or its error was found on. Parsing continues
+        after an error at the next test case, so all errors are found in one
+        pass.
+
+        """
+        # holds the test case being parsed; states append new cases to it
+        data = []
+        state = self.begin
+        lineno = 0
+
+        for lineno, line in enumerate(lines, 1):
             line = line.strip()
-            if line:
-                try:
-                    state = state(line.lower(), line, data)
-                except ParsingError as e:
-                    data = data or [{}]
-                    data[-1]["error"] = str(e)
-                    error = True
-                    break
-
-        if not error and not state.expect_end:
+            if not line:
+                continue
+            count = len(data)
+            try:
+                state = state(line.lower(), line, data)
+            except ParsingError as e:
+                if not data:
+                    data.append({"line": lineno})
+                data[-1]["error"] = str(e)
+                state = self.recover
+            if len(data) > count:
+                data[-1]["line"] = lineno
+            while len(data) > 1 or (data and state == self.recover):
+                yield self._finish(data.pop(0))
+
+        if not state.expect_end:
             if not data:
-                data.append({})
+                data.append({"line": lineno + 1})
             data[-1]["error"] = (
                 "Unexpected end of input, looking for %s"
                 % " or ".join(repr(k.title()) for k in state.keys)
                 )
 
         for item in data:
-            if "description" in item:
-                item["description"] = "\n".join(item["description"])
-            for step in item.get("steps", []):
-                step["instruction"] = "\n".join(step["instruction"])
-                if "expected" in step:
-                    step["expected"] = "\n".join(step["expected"])
+            yield self._finish(item)
 
-        return data
+
+    def _finish(self, item):
+        """Join lines of parsed test case data; return it."""
+        if "description" in item:
+            item["description"] = "\n".join(item["description"])
+        for step in item.get("steps", []):
+            step["instruction"] = "\n".join(step["instruction"])
+            if "expected" in step:
+                step["expected"] = "\n".join(step["expected"])
+        return item
 
 
     def begin(self, lc, orig, data):
@@ -124,3 +159,13 @@ class BulkParser(object):
         return self.expectedresult
     after_and.keys = ["when "]
     after_and.expect_end = False
+
+
+
+    def recover(self, lc, orig, data):
+        """After an error, skipping lines until the next test case."""
+        if lc.startswith("test that "):
+            return self.begin(lc, orig, data)
+        return self.recover
+    recover.keys = ["Test that "]
+    recover.expect_end = True
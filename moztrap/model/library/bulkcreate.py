@@ -0,0 +1,251 @@
+"""
+Bulk creation of test cases.
+
+Creating a case one row at a time takes a query per case, suite membership,
+version, step and tag, plus environment inheritance and latest-version
+marking for every version; pasting hundreds of cases with many steps into
+several product versions takes tens of thousands of queries. ``CaseCreator``
+creates cases, their versions in one or more product versions, steps, suite
+memberships, tags and inherited environments with bulk inserts instead, in a
+single transaction, with the same results as creating them one by one::
+
+    creator = CaseCreator(
+        product, [pv1, pv2], user=user, status="active", tags=[tag.id])
+    cases = creator.create(BulkParser().iter_parse(fileobj))
+
+Cases are written ``batch_size`` at a time as they are read, so case data can
+be streamed straight from the parser.
+
+"""
+from django.db import connection, transaction
+from django.db.models import Max
+
+from ... import cache
+from ..core.models import ProductVersion
+from ..environments.models import Environment
+from ..mtmodel import utcnow
+from ..tags.models import Tag
+from .models import Case, CaseVersion, CaseStep, SuiteCase
+
+
+
+# default number of rows per insert statement
+BATCH_SIZE = 500
+
+
+
+class CaseCreator(object):
+    """
+    Creates test cases in bulk.
+
+    Instantiate with the product, the product versions to create a version of
+    each case in, and optionally the creating user, status of the new
+    versions, ID prefix of the new cases, a suite to append them to and IDs of
+    tags for the new versions; then call ``create`` with case data, as
+    returned by ``BulkParser.parse`` or yielded by ``BulkParser.iter_parse``
+    (without errors).
+
+    """
+    def __init__(self, product, productversions, user=None, status=None,
+                 idprefix="", suite=None, tags=(), batch_size=BATCH_SIZE):
+        """Construct a creator of cases in ``productversions`` of product."""
+        self.product = product
+        self.productversions = list(productversions)
+        self.user = user
+        self.status = status or CaseVersion._meta.get_field("status").default
+        self.idprefix = idprefix
+        self.suite = suite
+        self.tag_ids = set(tags)
+        self.batch_size = batch_size
+
+
+    @transaction.commit_on_success
+    def create(self, cases_data):
+        """
+        Create a case for each dictionary in ``cases_data``; return the cases.
+
+        Each dictionary has "name", "description" and "steps" (list of
+        dictionaries with "instruction" and "expected") keys. ``cases_data``
+        can be any iterable; it is read ``batch_size`` cases at a time.
+
+        """
+        cases = []
+        batch = []
+        for data in cases_data:
+            batch.append(data)
+            if len(batch) >= self.batch_size:
+                cases.extend(self.create_batch(batch))
+                batch = []
+        if batch:
+            cases.extend(self.create_batch(batch))
+        return cases
+
+
+    def create_batch(self, cases_data):
+        """Create and return cases for list ``cases_data``."""
+        now = utcnow()
+
+        cases = self.create_cases(len(cases_data), now)
+        if self.suite is not None:
+            self.create_suitecases(cases, now)
+        cv_ids = self.create_caseversions(cases, cases_data, now)
+        self.create_steps(cases, cases_data, cv_ids, now)
+        self.create_environments(cv_ids)
+        self.create_tags(cv_ids)
+
+        return cases
+
+
+    def _audit(self, now):
+        """Return creation audit fields for new objects, created at now."""
+        return {
+            "created_by": self.user,
+            "created_on": now,
+            "modified_by": self.user,
+            "modified_on": now,
+            }
+
+
+    def create_cases(self, count, now):
+        """Bulk-create and return ``count`` cases, created at now."""
+        # ``now`` alone may match cases created in the same second (datetimes
+        # are stored to the second on MySQL), e.g. by a double submit
+        after = Case.everything.aggregate(Max("id"))["id__max"] or 0
+        # Django's bulk insert on SQLite (INSERT ... SELECT ... UNION SELECT)
+        # collapses identical rows, so new cases must be inserted one by one
+        batch_size = 1 if connection.vendor == "sqlite" else self.batch_size
+        Case.objects.bulk_create(
+            [
+                Case(
+                    product=self.product,
+                    idprefix=self.idprefix,
+                    **self._audit(now)
+                    )
+                for i in range(count)
+                ],
+            batch_size=batch_size,
+            )
+        # new cases are identical, so their IDs can be assigned in any order
+        return list(
+            Case.objects.filter(
+                product=self.product,
+                idprefix=self.idprefix,
+                created_by=self.user,
+                created_on=now,
+                id__gt=after,
+                ).order_by("id")
+            )
+
+
+    def create_suitecases(self, cases, now):
+        """Append new cases to the end of the suite, in order."""
+        last = SuiteCase.objects.filter(
+            suite=self.suite).aggregate(Max("order"))["order__max"] or 0
+        SuiteCase.objects.bulk_create(
+            [
+                SuiteCase(
+                    suite=self.suite,
+                    case=case,
+                    order=order,
+                    **self._audit(now)
+                    )
+                for order, case in enumerate(cases, last + 1)
+                ],
+            batch_size=self.batch_size,
+            )
+
+
+    def create_caseversions(self, cases, cases_data, now):
+        """
+        Bulk-create a version of each case in each product version.
+
+        Return dictionary mapping (case ID, productversion ID) to the ID of
+        the new version. Only the version in the latest product version (as
+        ``Case.set_latest_version`` has it) is marked latest.
+
+        """
+        latest = max(self.productversions, key=lambda pv: pv.order)
+        CaseVersion.objects.bulk_create(
+            [
+                CaseVersion(
+                    case=case,
+                    productversion=pv,
+                    name=data["name"],
+                    description=data.get("description", ""),
+                    status=self.status,
+                    latest=(pv is latest),
+                    **self._audit(now)
+                    )
+                for case, data in zip(cases, cases_data)
+                for pv in self.productversions
+                ],
+            batch_size=self.batch_size,
+            )
+        case_ids = set(c.id for c in cases)
+        return dict(
+            ((case_id, pv_id), cv_id)
+            for cv_id, case_id, pv_id in CaseVersion.objects.filter(
+                case__gte=cases[0].id,
+                productversion__in=self.productversions,
+                created_by=self.user,
+                created_on=now,
+                ).values_list("id", "case_id", "productversion_id")
+            if case_id in case_ids
+            )
+
+
+    def create_steps(self, cases, cases_data, cv_ids, now):
+        """Bulk-create steps of each new case version."""
+        CaseStep.objects.bulk_create(
+            [
+                CaseStep(
+                    caseversion_id=cv_ids[(case.id, pv.id)],
+                    number=number,
+                    instruction=step["instruction"],
+                    expected=step.get("expected", ""),
+                    **self._audit(now)
+                    )
+                for case, data in zip(cases, cases_data)
+                for pv in self.productversions
+                for number, step in enumerate(data["steps"], 1)
+                ],
+            batch_size=self.batch_size,
+            )
+
+
+    def create_environments(self, cv_ids):
+        """New case versions inherit the environments of their versions."""
+        envs = {}
+        pv_envs = ProductVersion.environments.through.objects.filter(
+            productversion__in=self.productversions)
+        for pv_id, env_id in pv_envs.values_list(
+                "productversion_id", "environment_id"):
+            envs.setdefault(pv_id, []).append(env_id)
+
+        through = CaseVersion.environments.through
+        through.objects.bulk_create(
+            [
+                through(caseversion_id=cv_id, environment_id=env_id)
+                for (case_id, pv_id), cv_id in cv_ids.items()
+                for env_id in envs.get(pv_id, [])
+                ],
+            batch_size=self.batch_size,
+            )
+        # bulk inserts send no m2m_changed signal; invalidate as it would
+        cache.bump(through, CaseVersion, Environment)
+
+
+    def create_tags(self, cv_ids):
+        """Tag all new case versions."""
+        if not self.tag_ids:
+            return
+        through = CaseVersion.tags.through
+        through.objects.bulk_create(
+            [
+                through(caseversion_id=cv_id, tag_id=tag_id)
+                for cv_id in cv_ids.values()
+                for tag_id in self.tag_ids
+                ],
+            batch_size=self.batch_size,
+            )
+        cache.bump(through, CaseVersion, Tag)
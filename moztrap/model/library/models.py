@@ -6,6 +6,7 @@ from django.core.exceptions import ValidationError
 from django.db import models
 
 from ..attachments.models import Attachment
+from ..membership import OrderedMembership, ORDER_GAP
 from ..mtmodel import MTModel, DraftStatusModel
 from ..core.models import Product, ProductVersion
 from ..environments.models import HasEnvironmentsModel
@@ -86,6 +87,28 @@ class Case(MTModel):
 
 
 
+def set_latest_versions(case_ids):
+    """
+    Mark latest version of each given case, marking all others non-latest.
+
+    Takes the same two updates for any number of cases that
+    ``Case.set_latest_version`` takes for one.
+
+    """
+    latest = {}
+    for cv_id, case_id in CaseVersion.objects.filter(
+            case__in=case_ids).order_by(
+            "-productversion__order").values_list("id", "case_id"):
+        latest.setdefault(case_id, cv_id)
+    if not latest:
+        return
+    CaseVersion.objects.filter(case__in=latest.keys()).exclude(
+        pk__in=latest.values()).update(latest=False, notrack=True)
+    CaseVersion.objects.filter(pk__in=latest.values()).update(
+        latest=True, notrack=True)
+
+
+
 class CaseVersion(MTModel, DraftStatusModel, HasEnvironmentsModel):
     """A version of a test case."""
     DEFAULT_STATUS = DraftStatusModel.STATUS.active
@@ -131,6 +154,23 @@ class CaseVersion(MTModel, DraftStatusModel, HasEnvironmentsModel):
             self.case.set_latest_version()
 
 
+    @classmethod
+    def bulk_delete(cls, queryset, user=None):
+        """
+        Delete all case versions in ``queryset``, updating latest versions.
+
+        As ``delete`` does, cases left without versions are deleted too.
+
+        """
+        case_ids = set(queryset.values_list("case_id", flat=True))
+        queryset.delete(user=user)
+        remaining = set(
+            CaseVersion.objects.filter(case__in=case_ids).values_list(
+                "case_id", flat=True))
+        Case.objects.filter(pk__in=case_ids - remaining).delete(user=user)
+        set_latest_versions(remaining)
+
+
     def undelete(self, *args, **kwargs):
         """Undelete CaseVersion, updating latest version."""
         super(CaseVersion, self).undelete(*args, **kwargs)
@@ -210,12 +250,14 @@ class CaseVersion(MTModel, DraftStatusModel, HasEnvironmentsModel):
 
     def bug_urls(self):
         """Returns set of bug URLs associated with this caseversion."""
-        Result = self.runcaseversions.model.results.related.model
-        StepResult = Result.stepresults.related.model
+        try:
+            return self._prefetched_bug_urls
+        except AttributeError:
+            pass
         return set(
-            StepResult.objects.filter(
-                result__runcaseversion__caseversion=self).exclude(
-                bug_url="").values_list("bug_url", flat=True).distinct()
+            self.bugurls.filter(
+                result__deleted_on__isnull=True).values_list(
+                "url", flat=True).distinct()
             )
 
 
@@ -291,6 +333,16 @@ class Suite(MTModel, DraftStatusModel):
         return super(Suite, self).clone(*args, **kwargs)
 
 
+    def set_cases(self, cases, user=None):
+        """
+        Make ``cases`` (cases or IDs, in order) the cases of this suite.
+
+        Only changed memberships are written; see ``OrderedMembership``.
+
+        """
+        return SUITE_CASES.set(self, cases, user=user)
+
+
     class Meta:
         permissions = [("manage_suites", "Can add/edit/delete test suites.")]
 
@@ -332,3 +384,8 @@ class SuiteCase(MTModel):
                 "'{0}' is already in suite '{1}'".format(
                     self.case, self.suite)
                 )
+
+
+
+# cases of suites, sparsely ordered so moving a case usually updates one row
+SUITE_CASES = OrderedMembership(SuiteCase, "suite", "case", gap=ORDER_GAP)
@@ -0,0 +1,212 @@
+"""
+Ordered memberships (e.g. cases in a suite, suites in a run).
+
+``OrderedMembership.set`` makes an ordered list of objects the members of an
+owner object by diffing it against the existing membership rows: only new
+members are inserted, only removed ones deleted, and only rows whose ``order``
+must change are updated, all with bulk statements::
+
+    SUITE_CASES = OrderedMembership(SuiteCase, "suite", "case")
+    SUITE_CASES.set(suite, [case3, case1, case2], user=user)
+
+Rows that keep their relative order keep their ``order`` value; moved and new
+members get values between those of their new neighbors. With a ``gap``
+greater than one, order values are spread out so that there is usually room
+for this, and moving a single member updates a single row; otherwise (or when
+a gap is used up) all members are renumbered, still updating only the rows
+whose order changed.
+
+"""
+import bisect
+
+from django.db import connection, transaction
+
+from .. import cache
+from . import identity
+from .mtmodel import utcnow
+
+
+
+# order gap between consecutive members when (re)numbering sparsely
+ORDER_GAP = 100
+
+
+
+class OrderedMembership(object):
+    """Ordered membership of ``member_field`` objects in ``owner_field``."""
+    def __init__(self, through, owner_field, member_field, gap=1):
+        """
+        Construct for ``through`` model with given owner and member FKs.
+
+        ``through`` must have an integer ``order`` field.
+
+        """
+        self.through = through
+        self.owner_field = owner_field
+        self.member_attname = through._meta.get_field(member_field).attname
+        self.gap = gap
+
+
+    @transaction.commit_on_success
+    def set(self, owner, members, user=None):
+        """
+        Make ``members`` (objects or IDs, in order) the members of ``owner``.
+
+        Return tuple of numbers of (added, removed, reordered) members.
+
+        """
+        new_ids = []
+        seen = set()
+        for member in members:
+            member_id = getattr(member, "pk", member)
+            if member_id not in seen:
+                seen.add(member_id)
+                new_ids.append(member_id)
+
+        current = {}
+        removed = []
+        for pk, member_id, order in self.through.objects.filter(
+                **{self.owner_field: owner}).order_by(
+                "order", "id").values_list("id", self.member_attname, "order"):
+            if member_id in current or member_id not in seen:
+                removed.append(pk)
+            else:
+                current[member_id] = (pk, order)
+
+        if removed:
+            self.through.objects.filter(pk__in=removed).delete(permanent=True)
+
+        targets = self.orders(
+            new_ids, dict((m, o) for m, (pk, o) in current.items()))
+
+        added = [m for m in new_ids if m not in current]
+        if added:
+            self.through.objects.bulk_create([
+                self.through(
+                    order=targets[m],
+                    created_by=user,
+                    modified_by=user,
+                    **{
+                        self.owner_field: owner,
+                        self.member_attname: m,
+                        }
+                    )
+                for m in added
+                ])
+
+        moved = dict(
+            (pk, targets[m]) for m, (pk, order) in current.items()
+            if targets[m] != order
+            )
+        if moved:
+            self.reorder(moved, user)
+
+        return (len(added), len(removed), len(moved))
+
+
+    def orders(self, new_ids, current):
+        """
+        Return dict mapping each of ``new_ids`` to its new order value.
+
+        ``current`` maps IDs of existing members to their order values; those
+        in the longest run of members still in order keep their values.
+
+        """
+        kept = [m for m in new_ids if m in current]
+        anchors = set(
+            kept[i] for i in longest_increasing([current[m] for m in kept]))
+
+        targets = {}
+        pending = []
+        lower = None
+        for member_id in new_ids + [None]:
+            if member_id is not None and member_id not in anchors:
+                pending.append(member_id)
+                continue
+            upper = None if member_id is None else current[member_id]
+            values = self._between(lower, upper, len(pending))
+            if values is None:
+                # no room between neighbors; renumber everything
+                return dict(
+                    (m, i * self.gap) for i, m in enumerate(new_ids))
+            targets.update(zip(pending, values))
+            pending = []
+            if member_id is not None:
+                targets[member_id] = upper
+                lower = upper
+        return targets
+
+
+    def _between(self, lower, upper, count):
+        """Return ``count`` order values between lower and upper, or None."""
+        if lower is None and upper is None:
+            return [i * self.gap for i in range(count)]
+        if lower is None:
+            return [upper - (count - i) * self.gap for i in range(count)]
+        if upper is None:
+            return [lower + (i + 1) * self.gap for i in range(count)]
+        step = (upper - lower) // (count + 1)
+        if count and step < 1:
+            return None
+        return [lower + (i + 1) * step for i in range(count)]
+
+
+    def reorder(self, orders, user=None):
+        """Set order of rows by pk (``orders`` dict) in a single update."""
+        qn = connection.ops.quote_name
+        opts = self.through._meta
+        order_col = qn(opts.get_field("order").column)
+        pk_col = qn(opts.pk.column)
+        pks = orders.keys()
+        params = []
+        cases = []
+        for pk in pks:
+            cases.append("WHEN %s THEN %s")
+            params.extend([pk, orders[pk]])
+        params.extend([user.pk if user else None, utcnow()] + pks)
+        cursor = connection.cursor()
+        cursor.execute(
+            "UPDATE {table} SET {order} = CASE {pk} {cases} END, "
+            "{cc_version} = {cc_version} + 1, {modified_by} = %s, "
+            "{modified_on} = %s WHERE {pk} IN ({pks})".format(
+                table=qn(opts.db_table),
+                order=order_col,
+                pk=pk_col,
+                cases=" ".join(cases),
+                cc_version=qn(opts.get_field("cc_version").column),
+                modified_by=qn(opts.get_field("modified_by").column),
+                modified_on=qn(opts.get_field("modified_on").column),
+                pks=", ".join(["%s"] * len(pks)),
+                ),
+            params,
+            )
+        transaction.set_dirty()
+        cache.bump(self.through)
+        identity.discard(self.through)
+
+
+
+def longest_increasing(values):
+    """
+    Return indices of a longest strictly increasing subsequence of values.
+
+    """
+    tails = []
+    tail_indices = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        pos = bisect.bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[pos] = value
+            tail_indices[pos] = i
+        previous[i] = tail_indices[pos - 1] if pos else None
+    result = []
+    i = tail_indices[-1] if tail_indices else None
+    while i is not None:
+        result.append(i)
+        i = previous[i]
+    result.reverse()
+    return result
@@ -14,6 +14,8 @@ from django.db.models.signals import class_prepared
 
 from model_utils import Choices
 
+from .. import cache
+from . import identity
 from .core.auth import User
 
 
@@ -46,17 +48,32 @@ class SoftDeleteCollector(Collector):
         super(SoftDeleteCollector, self).collect(objs, *args, **kwargs)
 
 
+    def soft_deletable(self):
+        """
+        Yield (model, instances) pairs of collected soft-deletable models.
+
+        Dependent models without soft-delete (e.g. derived indexes that
+        filter on their parent's ``deleted_on``) are left alone.
+
+        """
+        for model, instances in self.data.iteritems():
+            if "deleted_on" in model._meta.get_all_field_names():
+                yield model, instances
+
+
     def delete(self, user=None):
         """
         Soft-delete all collected instances.
 
         """
         now = utcnow()
-        for model, instances in self.data.iteritems():
+        for model, instances in self.soft_deletable():
             pk_list = [obj.pk for obj in instances]
             model._base_manager.filter(
                 pk__in=pk_list, deleted_on__isnull=True).update(
                 deleted_by=user, deleted_on=now)
+        cache.bump(*self.data.keys())
+        identity.discard(*self.data.keys())
 
 
     def undelete(self, user=None):
@@ -67,15 +84,17 @@ class SoftDeleteCollector(Collector):
         # timestamps on which root obj(s) were deleted; only cascade items also
         # deleted in one of these same cascade batches should be undeleted.
         deletion_times = set([o.deleted_on for o in self.root_objs])
-        for model, instances in self.data.iteritems():
+        for model, instances in self.soft_deletable():
             pk_list = [obj.pk for obj in instances]
             model._base_manager.filter(
                 pk__in=pk_list, deleted_on__in=deletion_times).update(
                 deleted_by=None, deleted_on=None)
+        cache.bump(*self.data.keys())
+        identity.discard(*self.data.keys())
 
 
 
-class MTQuerySet(QuerySet):
+class MTQuerySet(identity.IdentityMapQuerySetMixin, QuerySet):
     """
     Implements modification tracking and soft deletes on bulk update/delete.
 
@@ -100,7 +119,22 @@ class MTQuerySet(QuerySet):
             kwargs["modified_on"] = utcnow()
         # increment the concurrency control version for all updated objects
         kwargs["cc_version"] = models.F("cc_version") + 1
-        return super(MTQuerySet, self).update(*args, **kwargs)
+        rows = super(MTQuerySet, self).update(*args, **kwargs)
+        cache.bump(self.model)
+        identity.discard(self.model)
+        return rows
+
+
+    def bulk_create(self, *args, **kwargs):
+        """
+        Insert given objects in bulk.
+
+        Sends no ``post_save`` signals, so invalidates cached data here.
+
+        """
+        objs = super(MTQuerySet, self).bulk_create(*args, **kwargs)
+        cache.bump(self.model)
+        return objs
 
 
     def delete(self, user=None, permanent=False):
@@ -126,7 +160,7 @@ class MTQuerySet(QuerySet):
 
 
 
-class MTManager(models.Manager):
+class MTManager(identity.IdentityMapMixin, models.Manager):
     """
     Manager using ``MTQuerySet`` and optionally hiding deleted objects.
 
@@ -137,11 +171,17 @@ class MTManager(models.Manager):
     related-object managers (which subclass the default manager class) will
     still hide deleted objects.
 
+    The default manager fetches related objects through the request's
+    identity map, if any (see ``moztrap.model.identity``).
+
     """
     def __init__(self, *args, **kwargs):
         """Instantiate a MTManager, pulling out the ``show_deleted`` arg."""
         self._show_deleted = kwargs.pop("show_deleted", False)
         super(MTManager, self).__init__(*args, **kwargs)
+        # a manager hiding deleted objects would fail to fetch deleted
+        # related objects
+        self.use_for_related_fields = self._show_deleted
 
 
     def get_query_set(self):
@@ -186,6 +226,7 @@ class MTManager(models.Manager):
                 update_fields,
                 values,
                 )
+            cache.bump(self.model)
 
 
 class MTModel(models.Model):
@@ -251,6 +292,9 @@ class MTModel(models.Model):
                     "No row with id {0} and version {1} updated.".format(
                         self.id, previous_version)
                     )
+            # updates bypass Model.save(), so no post_save signal is sent
+            cache.bump(self.__class__)
+            identity.forget(self.__class__, self)
         else:
             return super(MTModel, self).save(*args, **kwargs)
 
@@ -335,6 +379,22 @@ class MTModel(models.Model):
         self._collector.undelete(user)
 
 
+    @classmethod
+    def bulk_delete(cls, queryset, user=None):
+        """
+        (Soft) delete all objects in ``queryset`` in a single cascade.
+
+        Models whose ``delete`` does more than that should override this too;
+        until they do, their objects are deleted one at a time.
+
+        """
+        if cls.delete.im_func is MTModel.delete.im_func:
+            queryset.delete(user=user)
+        else:
+            for obj in queryset:
+                obj.delete(user=user)
+
+
     @property
     def _collector(self):
         """Returns populated delete-cascade collector."""
@@ -399,18 +459,125 @@ class TeamModel(models.Model):
 
     If a ``TeamModel`` does not implement a ``parent`` property that returns
     its "parent" for purposes of team inheritance, it will be considered to be
-    the top of the inheritance chain and won't inherit a team.
+    the top of the inheritance chain and won't inherit a team. Subclasses
+    that do should also set ``parent_field`` to the name of the foreign key
+    to their parent, so the teams of many instances can be resolved in one
+    query (see ``team_owners``).
+
+    The object whose own team is an instance's team (its "team owner") is
+    cached, keyed by the generations of all models in the inheritance chain,
+    so it is resolved again whenever ``has_team`` may have changed.
 
     """
     has_team = models.BooleanField(default=False)
     own_team = models.ManyToManyField(User, blank=True)
 
+    # name of the foreign key to ``parent``, if any
+    parent_field = None
+
 
     @property
     def team(self):
-        if self.has_team or self.parent is None:
+        """The manager of the users in this object's own or inherited team."""
+        model, pk = self.team_owner
+        if model is self.__class__ and pk == self.pk:
             return self.own_team
-        return self.parent.team
+        # the team owner needn't be loaded to query (or change) its team
+        owner = model(pk=pk)
+        owner._state.db = self._state.db
+        owner._state.adding = False
+        return owner.own_team
+
+
+    @property
+    def team_owner(self):
+        """Return (model, pk) of the object whose own team is our team."""
+        owner = getattr(self, "_team_owner", None)
+        if owner is None and self.pk is not None:
+            owner = self.__class__.team_owners([self]).get(self.pk)
+        if owner is None:
+            owner = self._find_team_owner()
+        return owner
+
+
+    def _find_team_owner(self):
+        """Return (model, pk) of team owner, walking the parent objects."""
+        if self.has_team or self.parent is None:
+            return (self.__class__, self.pk)
+        return self.parent.team_owner
+
+
+    @classmethod
+    def team_owners(cls, objs):
+        """
+        Return dict mapping IDs of ``objs`` to (model, pk) of their team owner.
+
+        ``objs`` are instances or IDs. Team owners not cached are resolved in
+        a single query; given instances remember their team owner, so their
+        ``team`` needs no further lookup.
+
+        """
+        chain = cls._team_chain()
+        gens = cache.generations(*[model for prefix, model in chain])
+        label = cache.model_label(cls)
+        ids = [getattr(obj, "pk", obj) for obj in objs]
+        keys = dict(
+            (pk, cache.make_key("team-owner", parts=[label, pk] + gens))
+            for pk in ids
+            )
+
+        found = cache.model_cache().get_many(keys.values())
+        owners = {}
+        missing = []
+        for pk, key in keys.items():
+            if key in found:
+                level, owner_pk = found[key]
+                owners[pk] = (chain[level][1], owner_pk)
+            else:
+                missing.append(pk)
+
+        if missing:
+            fields = []
+            for prefix, model in chain:
+                fields.extend([prefix + "id", prefix + "has_team"])
+            resolved = {}
+            for row in cls._base_manager.filter(
+                    pk__in=missing).values_list(*fields):
+                # index in chain of the first object with its own team
+                level = len(chain) - 1
+                for i in range(len(chain)):
+                    if row[2 * i + 1]:
+                        level = i
+                        break
+                owners[row[0]] = (chain[level][1], row[2 * level])
+                resolved[keys[row[0]]] = (level, row[2 * level])
+            if cache.can_store():
+                cache.model_cache().set_many(
+                    resolved, cache.default_timeout())
+
+        for obj in objs:
+            if getattr(obj, "pk", None) in owners:
+                obj._team_owner = owners[obj.pk]
+        return owners
+
+
+    @classmethod
+    def _team_chain(cls):
+        """
+        Return list of (lookup prefix, model) of team inheritance chain.
+
+        Starts with ``("", cls)``, followed by the model of each ancestor with
+        the prefix of its fields in queries of ``cls``.
+
+        """
+        chain = [("", cls)]
+        prefix, model = "", cls
+        while model.parent_field is not None:
+            field = model._meta.get_field(model.parent_field)
+            prefix += field.name + "__"
+            model = field.rel.to
+            chain.append((prefix, model))
+        return chain
 
 
     def add_to_team(self, *users):
@@ -419,6 +586,7 @@ class TeamModel(models.Model):
         self.__class__.objects.filter(pk=self.pk).update(has_team=True)
         self.has_team = True
         self.cc_version += 1
+        self._team_owner = (self.__class__, self.pk)
 
 
     @property
@@ -464,6 +632,41 @@ class DraftStatusModel(models.Model):
         self.save(force_update=True, user=user)
 
 
+    @classmethod
+    def bulk_activate(cls, queryset, user=None):
+        """Activate all objects in ``queryset``."""
+        cls._bulk_set_status(queryset, "activate", cls.STATUS.active, user)
+
+
+    @classmethod
+    def bulk_draft(cls, queryset, user=None):
+        """Reset all objects in ``queryset`` to draft status."""
+        cls._bulk_set_status(queryset, "draft", cls.STATUS.draft, user)
+
+
+    @classmethod
+    def bulk_deactivate(cls, queryset, user=None):
+        """Deactivate all objects in ``queryset``."""
+        cls._bulk_set_status(queryset, "deactivate", cls.STATUS.disabled, user)
+
+
+    @classmethod
+    def _bulk_set_status(cls, queryset, action, status, user):
+        """
+        Set status of all objects in ``queryset`` with a single update.
+
+        If the model overrides the ``action`` method, it is called for each
+        object instead.
+
+        """
+        method = getattr(cls, action).im_func
+        if method is getattr(DraftStatusModel, action).im_func:
+            queryset.update(status=status, user=user)
+        else:
+            for obj in queryset:
+                getattr(obj, action)(user=user)
+
+
     class Meta:
         abstract = True
 
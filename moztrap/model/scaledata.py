@@ -0,0 +1,470 @@
+"""
+Generator of large, realistic datasets for load and performance testing.
+
+All objects are created with ``bulk_create`` and explicitly assigned primary
+keys, so a dataset of millions of results takes minutes rather than hours.
+Given the same parameters and seed (and an empty database) the generated data
+is identical, including timestamps, so benchmark runs are comparable::
+
+    generator = ScaleDataGenerator(seed=1, products=2, cases=1000)
+    counts = generator.generate()
+
+Each product gets ``versions`` product versions, ``cases`` cases (with a
+version, ``steps`` steps and up to three of ``tags`` tags for each product
+version), and ``suites`` suites sharing its cases. All product versions share
+a profile of environments that is the cartesian product of ``categories``
+categories of ``elements`` elements. Each product version has ``runs`` active
+runs containing all of its cases, and each run has ``results`` results spread
+over ``testers`` testers; a tester may report several results for the same
+case and environment, in which case only the last is latest.
+
+"""
+import datetime
+import itertools
+import random
+
+from django.db import transaction
+from django.db.models import Max
+
+from .core.auth import User
+from .core.models import Product, ProductVersion
+from .environments.models import Profile, Category, Element, Environment
+from .execution.models import (
+    Run, RunSuite, RunCaseVersion, Result, StepResult, index_bug_urls)
+from .library.models import Case, CaseVersion, CaseStep, Suite, SuiteCase
+from .tags.models import Tag
+
+
+
+# all generated timestamps are offsets from this, for reproducibility
+EPOCH = datetime.datetime(2012, 1, 1)
+
+WORDS = (
+    "open close click load save submit cancel search filter sort login "
+    "logout page tab window menu button link form field list item dialog "
+    "upload download profile setting account password email bookmark "
+    "history private sync crash scroll zoom print share offline"
+    ).split()
+
+# weighted statuses of generated results
+STATUSES = (
+    [Result.STATUS.passed] * 80 +
+    [Result.STATUS.failed] * 12 +
+    [Result.STATUS.invalidated] * 3 +
+    [Result.STATUS.started] * 5
+    )
+
+
+
+class IdSequence(object):
+    """Primary keys for new instances of a model, following existing ones."""
+    def __init__(self, model):
+        """Start after the highest existing primary key of ``model``."""
+        current = model._base_manager.aggregate(m=Max("pk"))["m"]
+        self.next_id = (current or 0) + 1
+
+
+    def __call__(self):
+        """Return the next primary key."""
+        next_id = self.next_id
+        self.next_id += 1
+        return next_id
+
+
+
+class ScaleDataGenerator(object):
+    """
+    Generates a large dataset with bulk inserts.
+
+    Instantiate with dataset dimensions and a seed, then call ``generate``,
+    which returns a dictionary of the number of objects created per model.
+
+    """
+    def __init__(self, seed=0, products=1, versions=2, cases=500, steps=4,
+                 tags=20, suites=10, categories=3, elements=3, runs=2,
+                 results=5000, testers=10, batch_size=None):
+        """Set dataset dimensions; see module docstring."""
+        self.seed = seed
+        self.num_products = products
+        self.num_versions = versions
+        self.num_cases = cases
+        self.num_steps = steps
+        self.num_tags = tags
+        self.num_suites = suites
+        self.num_categories = categories
+        self.num_elements = elements
+        self.num_runs = runs
+        self.num_results = results
+        self.num_testers = testers
+        self.batch_size = batch_size
+
+        self.random = random.Random(seed)
+        self.counts = {}
+        self.ids = {}
+
+
+    @transaction.commit_on_success
+    def generate(self):
+        """Generate the dataset; return counts of created objects by model."""
+        self.testers = self.create_testers()
+        self.environments = self.create_environments()
+        for p in range(self.num_products):
+            self.create_product(p)
+        return self.counts
+
+
+    def bulk_create(self, model, objs):
+        """Bulk-insert ``objs`` of ``model`` and count them."""
+        model._base_manager.bulk_create(objs, batch_size=self.batch_size)
+        name = model._meta.object_name
+        self.counts[name] = self.counts.get(name, 0) + len(objs)
+
+
+    def next_id(self, model):
+        """Return next primary key for ``model``."""
+        if model not in self.ids:
+            self.ids[model] = IdSequence(model)
+        return self.ids[model]()
+
+
+    def new(self, model, when, **kwargs):
+        """Return unsaved ``model`` instance with a fixed pk and timestamps."""
+        return model(
+            id=self.next_id(model),
+            created_on=when,
+            modified_on=when,
+            **kwargs)
+
+
+    def sentence(self, words=4):
+        """Return a random sentence of given number of words."""
+        return " ".join(self.random.choice(WORDS) for i in range(words))
+
+
+    def create_testers(self):
+        """Return list of testers, creating any that don't exist yet."""
+        testers = []
+        for i in range(self.num_testers):
+            username = "scale-tester-{0}".format(i)
+            user, created = User.objects.get_or_create(
+                username=username,
+                defaults={"email": "{0}@example.com".format(username)})
+            testers.append(user)
+        return testers
+
+
+    def create_environments(self):
+        """Create profile of cartesian environments; return environment IDs."""
+        profile = self.new(
+            Profile, EPOCH, name="Scale profile {0}".format(self.seed))
+        self.bulk_create(Profile, [profile])
+
+        categories = []
+        elements_by_category = []
+        elements = []
+        for c in range(self.num_categories):
+            category = self.new(
+                Category, EPOCH, name="Scale category {0}".format(c))
+            categories.append(category)
+            category_elements = [
+                self.new(
+                    Element,
+                    EPOCH,
+                    category_id=category.id,
+                    name="Element {0}.{1}".format(c, e),
+                    )
+                for e in range(self.num_elements)
+                ]
+            elements_by_category.append(category_elements)
+            elements.extend(category_elements)
+        self.bulk_create(Category, categories)
+        self.bulk_create(Element, elements)
+
+        environments = []
+        env_elements = []
+        for combination in itertools.product(*elements_by_category):
+            env = self.new(Environment, EPOCH, profile_id=profile.id)
+            environments.append(env)
+            env_elements.extend(
+                Environment.elements.through(
+                    environment_id=env.id, element_id=element.id)
+                for element in combination
+                )
+        self.bulk_create(Environment, environments)
+        self.bulk_create(Environment.elements.through, env_elements)
+
+        return [env.id for env in environments]
+
+
+    def env_links(self, model, obj_ids):
+        """Return through-model instances giving all environments to objs."""
+        through = model.environments.through
+        fk = "{0}_id".format(model._meta.module_name)
+        return [
+            through(**{fk: obj_id, "environment_id": env_id})
+            for obj_id in obj_ids
+            for env_id in self.environments
+            ]
+
+
+    def create_product(self, p):
+        """Create a product with its versions, cases, suites, tags and runs."""
+        when = EPOCH + datetime.timedelta(days=p)
+        product = self.new(
+            Product,
+            when,
+            name="Scale product {0}-{1}".format(self.seed, p),
+            description=self.sentence(10),
+            )
+        self.bulk_create(Product, [product])
+
+        versions = [
+            self.new(
+                ProductVersion,
+                when,
+                product_id=product.id,
+                version="{0}.0".format(v + 1),
+                order=v + 1,
+                latest=(v == self.num_versions - 1),
+                )
+            for v in range(self.num_versions)
+            ]
+        self.bulk_create(ProductVersion, versions)
+        self.bulk_create(
+            ProductVersion.environments.through,
+            self.env_links(ProductVersion, [pv.id for pv in versions]),
+            )
+
+        tags = [
+            self.new(
+                Tag,
+                when,
+                product_id=product.id,
+                name="tag-{0}-{1}".format(p, t),
+                )
+            for t in range(self.num_tags)
+            ]
+        self.bulk_create(Tag, tags)
+
+        cases = [
+            self.new(Case, when, product_id=product.id, idprefix="scale")
+            for c in range(self.num_cases)
+            ]
+        self.bulk_create(Case, cases)
+
+        self.create_suites(product, cases, when)
+
+        for pv in versions:
+            caseversions = self.create_caseversions(pv, cases, tags, when)
+            for r in range(self.num_runs):
+                self.create_run(pv, r, caseversions)
+
+
+    def create_suites(self, product, cases, when):
+        """Create suites of ``product``, each case in one suite."""
+        suites = [
+            self.new(
+                Suite,
+                when,
+                product_id=product.id,
+                name="Suite {0}: {1}".format(s, self.sentence(2)),
+                description=self.sentence(8),
+                status=Suite.STATUS.active,
+                )
+            for s in range(self.num_suites)
+            ]
+        self.bulk_create(Suite, suites)
+        self.suites = suites
+
+        if not suites:
+            return
+        suitecases = []
+        order = {}
+        for case in cases:
+            suite = self.random.choice(suites)
+            order[suite.id] = order.get(suite.id, 0) + 1
+            suitecases.append(
+                self.new(
+                    SuiteCase,
+                    when,
+                    suite_id=suite.id,
+                    case_id=case.id,
+                    order=order[suite.id],
+                    )
+                )
+        self.bulk_create(SuiteCase, suitecases)
+
+
+    def create_caseversions(self, pv, cases, tags, when):
+        """Create a version of each case for ``pv``, with steps and tags."""
+        caseversions = [
+            self.new(
+                CaseVersion,
+                when,
+                productversion_id=pv.id,
+                case_id=case.id,
+                name="Case {0}: {1}".format(case.id, self.sentence()),
+                description=self.sentence(12),
+                status=CaseVersion.STATUS.active,
+                latest=pv.latest,
+                )
+            for case in cases
+            ]
+        self.bulk_create(CaseVersion, caseversions)
+        cv_ids = [cv.id for cv in caseversions]
+        self.bulk_create(
+            CaseVersion.environments.through,
+            self.env_links(CaseVersion, cv_ids),
+            )
+
+        steps = []
+        cv_tags = []
+        for cv_id in cv_ids:
+            for n in range(self.num_steps):
+                steps.append(
+                    self.new(
+                        CaseStep,
+                        when,
+                        caseversion_id=cv_id,
+                        number=n + 1,
+                        instruction=self.sentence(8),
+                        expected=self.sentence(6),
+                        )
+                    )
+            if tags:
+                for tag in self.random.sample(
+                        tags, self.random.randint(0, min(3, len(tags)))):
+                    cv_tags.append(
+                        CaseVersion.tags.through(
+                            caseversion_id=cv_id, tag_id=tag.id))
+        self.bulk_create(CaseStep, steps)
+        self.bulk_create(CaseVersion.tags.through, cv_tags)
+
+        return caseversions
+
+
+    def create_run(self, pv, r, caseversions):
+        """Create an active run of all ``caseversions``, with results."""
+        when = EPOCH + datetime.timedelta(days=30 + r)
+        run = self.new(
+            Run,
+            when,
+            productversion_id=pv.id,
+            name="Scale run {0} {1}".format(pv.version, r),
+            description=self.sentence(8),
+            start=when.date(),
+            status=Run.STATUS.active,
+            )
+        self.bulk_create(Run, [run])
+        self.bulk_create(
+            Run.environments.through, self.env_links(Run, [run.id]))
+        self.bulk_create(
+            RunSuite,
+            [
+                self.new(
+                    RunSuite, when, run_id=run.id, suite_id=suite.id, order=i)
+                for i, suite in enumerate(self.suites)
+                ]
+            )
+
+        rcvs = [
+            self.new(
+                RunCaseVersion,
+                when,
+                run_id=run.id,
+                caseversion_id=cv.id,
+                order=i + 1,
+                )
+            for i, cv in enumerate(caseversions)
+            ]
+        self.bulk_create(RunCaseVersion, rcvs)
+        self.bulk_create(
+            RunCaseVersion.environments.through,
+            self.env_links(RunCaseVersion, [rcv.id for rcv in rcvs]),
+            )
+
+        self.create_results(run, rcvs, when)
+
+
+    def create_results(self, run, rcvs, when):
+        """Create results with history for ``run``; last per key is latest."""
+        if not (rcvs and self.environments and self.testers):
+            return
+
+        # pick (rcv, environment, tester) for each result; reporting the
+        # same key again supersedes the earlier result
+        keys = []
+        for i in range(self.num_results):
+            if keys and self.random.random() < 0.2:
+                keys.append(self.random.choice(keys))
+            else:
+                keys.append((
+                        self.random.choice(rcvs).id,
+                        self.random.choice(self.environments),
+                        self.random.choice(self.testers).id,
+                        ))
+        last = dict((key, i) for i, key in enumerate(keys))
+
+        batch_size = self.batch_size or 5000
+        for start in range(0, len(keys), batch_size):
+            results = []
+            stepresults = []
+            for i in range(start, min(start + batch_size, len(keys))):
+                rcv_id, env_id, tester_id = keys[i]
+                status = self.random.choice(STATUSES)
+                created = when + datetime.timedelta(seconds=i)
+                result = self.new(
+                    Result,
+                    created,
+                    runcaseversion_id=rcv_id,
+                    environment_id=env_id,
+                    tester_id=tester_id,
+                    created_by_id=tester_id,
+                    modified_by_id=tester_id,
+                    status=status,
+                    is_latest=(last[keys[i]] == i),
+                    )
+                if status == Result.STATUS.failed:
+                    result.comment = self.sentence(6)
+                    if self.num_steps and self.random.random() < 0.3:
+                        stepresults.append((
+                                result,
+                                rcv_id,
+                                self.random.randint(1, self.num_steps),
+                                created,
+                                ))
+                results.append(result)
+            self.bulk_create(Result, results)
+            self.create_stepresults(stepresults)
+
+
+    def create_stepresults(self, failed):
+        """Create a failed step result (with bug URL) for failed results."""
+        if not failed:
+            return
+        rcv_cvs = dict(
+            RunCaseVersion._base_manager.filter(
+                pk__in=set(item[1] for item in failed)
+                ).values_list("id", "caseversion_id")
+            )
+        steps = dict(
+            ((cv_id, number), step_id)
+            for cv_id, number, step_id in CaseStep._base_manager.filter(
+                caseversion__in=set(rcv_cvs.values()),
+                ).values_list("caseversion_id", "number", "id")
+            )
+        self.bulk_create(
+            StepResult,
+            [
+                self.new(
+                    StepResult,
+                    created,
+                    result_id=result.id,
+                    step_id=steps[(rcv_cvs[rcv_id], number)],
+                    status=StepResult.STATUS.failed,
+                    bug_url="http://bugs.example.com/{0}".format(result.id),
+                    )
+                for result, rcv_id, number, created in failed
+                ]
+            )
+        index_bug_urls([result.id for result, _, _, _ in failed])
@@ -0,0 +1,139 @@
+"""
+Routing of reads of read-only views to a database replica.
+
+With ``DATABASE_REPLICA`` set to the alias of a replica of the "default"
+(primary) database, ``ReplicaRoutingMiddleware`` tracks each request, and
+reads of requests marked read-only (by the ``read_only`` view decorator, see
+``moztrap.view.utils.routing``, or ``mark_read_only()``) are routed to the
+replica by ``ReplicaRouter``. All writes go to the primary.
+
+Replicas lag behind the primary, so a client that wrote anything reads from
+the primary for ``REPLICA_PIN_SECONDS`` afterwards (tracked with the
+``REPLICA_PIN_COOKIE`` cookie), as does the rest of a request once it wrote;
+clients see their own writes.
+
+Routing state lasts until the response has been sent (``request_finished``),
+so streamed responses read from the same database as their view.
+
+Values computed from replica reads may predate generations already bumped by
+writes to the primary, so they aren't stored in the model cache (see
+``reading_replica`` and ``moztrap.cache.can_store``).
+
+"""
+import threading
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_finished
+# not django.db: routers are loaded while it is being imported
+from django.db.utils import DEFAULT_DB_ALIAS
+
+
+
+_local = threading.local()
+
+
+
+def replica():
+    """Return the alias of the replica database, or None."""
+    return getattr(settings, "DATABASE_REPLICA", None)
+
+
+
+def begin(pinned=False):
+    """Start routing a request; ``pinned`` requests read from the primary."""
+    _local.active = True
+    _local.read_only = False
+    _local.pinned = pinned
+    _local.wrote = False
+
+
+
+def reset(**kwargs):
+    """Stop routing; reads use the primary again."""
+    _local.active = False
+    _local.read_only = False
+    _local.pinned = False
+    _local.wrote = False
+
+
+request_finished.connect(reset)
+
+
+
+def mark_read_only():
+    """Mark the current request (if routed at all) as read-only."""
+    if getattr(_local, "active", False):
+        _local.read_only = True
+
+
+
+def wrote():
+    """Return True if anything was written since routing began."""
+    return getattr(_local, "wrote", False)
+
+
+
+def reading_replica():
+    """Return True if reads of the current request go to the replica."""
+    return bool(
+        getattr(_local, "read_only", False)
+        and replica() is not None
+        and not (_local.pinned or _local.wrote)
+        )
+
+
+
+class ReplicaRouter(object):
+    """Routes reads of read-only requests to the replica, if any."""
+    def db_for_read(self, model, **hints):
+        alias = replica()
+        if alias is None or not getattr(_local, "read_only", False):
+            return None
+        use_replica = reading_replica()
+        from .debug import instrumentation
+        stats = instrumentation.current()
+        if stats is not None:
+            stats.record_read(use_replica)
+        return alias if use_replica else DEFAULT_DB_ALIAS
+
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Objects from the primary and the replica may be related."""
+        dbs = set([DEFAULT_DB_ALIAS, replica()])
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+
+    def allow_syncdb(self, db, model):
+        """Tables are never created in the replica."""
+        if db == replica():
+            return False
+        return None
+
+
+
+class ReplicaRoutingMiddleware(object):
+    """Routes reads of read-only requests to the replica, if enabled."""
+    def __init__(self):
+        if not replica():
+            raise MiddlewareNotUsed
+        self.cookie = settings.REPLICA_PIN_COOKIE
+        self.pin_seconds = settings.REPLICA_PIN_SECONDS
+
+
+    def process_request(self, request):
+        begin(pinned=self.cookie in request.COOKIES)
+
+
+    def process_response(self, request, response):
+        if wrote():
+            response.set_cookie(
+                self.cookie, "1", max_age=self.pin_seconds, httponly=True)
+        return response
@@ -95,6 +95,8 @@ TEMPLATE_CONTEXT_PROCESSORS = [
 ]
 
 MIDDLEWARE_CLASSES = [
+    "moztrap.debug.middleware.InstrumentationMiddleware",
+    "moztrap.debug.middleware.WorkloadRecorderMiddleware",
     "django.middleware.common.CommonMiddleware",
     "djangosecure.middleware.SecurityMiddleware",
     "django.middleware.transaction.TransactionMiddleware",
@@ -103,6 +105,8 @@ MIDDLEWARE_CLASSES = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "session_csrf.CsrfMiddleware",
     "moztrap.view.users.middleware.SetUsernameMiddleware",
+    "moztrap.model.identity.IdentityMapMiddleware",
+    "moztrap.routing.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "moztrap.view.urls"
@@ -152,6 +156,26 @@ CACHES = {
     }
 }
 
+# Cache used for frequently read model data (see moztrap.cache), and its
+# default timeout in seconds. It must be a cache shared by all processes, such
+# as memcached (or, for local testing, moztrap.cache.backends.SQLiteCache), so
+# they see each other's writes; with a process-local cache (like the default
+# LocMemCache) model data is not cached at all, unless
+# MODEL_CACHE_PROCESS_LOCAL is set (only safe with a single process).
+MODEL_CACHE = "default"
+MODEL_CACHE_TIMEOUT = 60 * 60
+MODEL_CACHE_PROCESS_LOCAL = False
+
+# Timeout in seconds of rendered markdown in the model cache; rendered HTML is
+# keyed by its source text, so it never goes stale (see
+# moztrap.view.markup.render).
+MARKDOWN_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# Timeout in seconds of each user's cached permissions (see
+# moztrap.model.core.auth.ModelBackend); short, as a bound on how long a
+# revoked permission may still be granted should an invalidation be missed.
+PERMISSION_CACHE_TIMEOUT = 60
+
 AUTHENTICATION_BACKENDS = [
     "moztrap.model.core.auth.ModelBackend",
     "moztrap.model.core.auth.BrowserIDBackend",
@@ -214,6 +238,50 @@ FORBIDDEN_PASSWORDS = [
 
 ALLOW_ANONYMOUS_ACCESS = False
 
+# Per-request SQL and template instrumentation; see
+# moztrap.debug.middleware.InstrumentationMiddleware.
+INSTRUMENTATION_ENABLED = True
+# requests slower than this are logged
+INSTRUMENTATION_SLOW_REQUEST_MS = 1000
+# fraction of slow requests for which query plans are logged
+INSTRUMENTATION_EXPLAIN_SAMPLE_RATE = 0.0
+# number of slowest statements to EXPLAIN
+INSTRUMENTATION_EXPLAIN_TOP = 3
+# number of most-repeated SQL shapes logged
+INSTRUMENTATION_TOP_DUPLICATES = 5
+
+# Sampled request traces for replay_workload; see
+# moztrap.debug.middleware.WorkloadRecorderMiddleware. Disabled unless a file
+# is given.
+WORKLOAD_RECORD_FILE = None
+# fraction of requests recorded
+WORKLOAD_RECORD_SAMPLE_RATE = 1.0
+
+# Request-scoped identity map, deduplicating foreign-key fetches of the same
+# object; see moztrap.model.identity.
+IDENTITY_MAP_ENABLED = False
+
+# Modules of benchmarks run by the benchmark management command; see
+# moztrap.debug.benchmark. The tests package is not always deployed.
+BENCHMARK_MODULES = [
+    "tests.benchmarks.bench_auth",
+    "tests.benchmarks.bench_core",
+    "tests.benchmarks.bench_environments",
+    "tests.benchmarks.bench_execution",
+    "tests.benchmarks.bench_library",
+    "tests.benchmarks.bench_mtmodel",
+    ]
+
+# Alias (in DATABASES) of a replica of the default database; if given,
+# read-only views (results lists, finder columns, API GETs, exports) read from
+# it, except for clients that wrote within REPLICA_PIN_SECONDS (tracked with
+# the REPLICA_PIN_COOKIE cookie). See moztrap.routing.
+DATABASE_REPLICA = None
+# should exceed the replication lag
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = "replicapin"
+DATABASE_ROUTERS = ["moztrap.routing.ReplicaRouter"]
+
 INSTALLED_APPS += ["icanhaz"]
 ICANHAZ_DIRS = [join(BASE_PATH, "jstemplates")]
 
@@ -25,4 +25,9 @@ LOGGING["loggers"]["moztrap"] = {
     "level": "ERROR",
     "propagate": True,
     }
+LOGGING["loggers"]["moztrap.debug.instrumentation"] = {
+    "handlers": ["null"], # slow-request log; replace in local.py to keep it
+    "level": "WARNING",
+    "propagate": False,
+    }
 
@@ -22,6 +22,22 @@ Copy local.sample.py to local.py and modify as needed.
 #         }
 #     }
 
+# Read-only views can read from a replica of the database (see
+# DATABASE_REPLICA in base.py). To try this locally with two SQLite databases,
+# copy the default database file to the replica's:
+# DATABASES = {
+#     "default": {
+#         "ENGINE": "django.db.backends.sqlite3",
+#         "NAME": "/tmp/moztrap.db",
+#         },
+#     "replica": {
+#         "ENGINE": "django.db.backends.sqlite3",
+#         "NAME": "/tmp/moztrap-replica.db",
+#         "TEST_MIRROR": "default",
+#         },
+#     }
+# DATABASE_REPLICA = "replica"
+
 #DEBUG = False
 #TEMPLATE_DEBUG = False
 
@@ -116,6 +132,15 @@ Copy local.sample.py to local.py and modify as needed.
 #    }
 #}
 
+# Without memcached, multiple local processes (e.g. for load testing) can
+# share a cache in an SQLite file:
+#CACHES = {
+#    "default": {
+#        "BACKEND": "moztrap.cache.backends.SQLiteCache",
+#        "LOCATION": "/tmp/moztrap-cache.sqlite",
+#    }
+#}
+
 # if DEBUG:
     # LOGGING["handlers"]["console"] = {
     #     "level": "DEBUG",
@@ -123,3 +148,22 @@ Copy local.sample.py to local.py and modify as needed.
     #     }
 
     # LOGGING["root"] = {"handlers": ["console"]}
+
+# Requests slower than this many milliseconds are logged, as JSON, to the
+# "moztrap.debug.instrumentation" logger, with their most-repeated SQL. Set
+# the sample rate above zero to also log query plans of the slowest
+# statements for that fraction of slow requests. Every response carries a
+# Server-Timing header with query count, DB time and template time.
+#INSTRUMENTATION_SLOW_REQUEST_MS = 1000
+#INSTRUMENTATION_EXPLAIN_SAMPLE_RATE = 0.1
+
+# Record a sample of requests (method, path, query, POST field names and user
+# role; never POST values) to this JSON Lines file, for replay with
+# "./manage.py replay_workload". The file is appended to by every process.
+#WORKLOAD_RECORD_FILE = "/var/log/moztrap/workload.jsonl"
+#WORKLOAD_RECORD_SAMPLE_RATE = 0.05
+
+# Deduplicate foreign-key fetches of the same object within a request (e.g.
+# the product version of every run in a list). Compare query counts in the
+# Server-Timing header with and without it.
+#IDENTITY_MAP_ENABLED = True
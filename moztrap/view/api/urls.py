@@ -8,6 +8,7 @@ from moztrap.model.execution import api as execution
 from moztrap.model.library import api as library
 from moztrap.model.tags import api as tags
 from moztrap.model import API_VERSION
+from moztrap.view.utils.routing import read_only_urls
 
 
 v1_api = Api(api_name=API_VERSION)
@@ -33,5 +34,8 @@ v1_api.register(tags.TagResource())
 
 urlpatterns = patterns(
     "moztrap.view.api",
-    url(r"", include(v1_api.urls)),
+    url(r"^{0}/run/(?P<run_id>\d+)/junit/$".format(API_VERSION),
+        "views.junit_results",
+        name="api_junit_results"),
+    url(r"", include(read_only_urls(v1_api.urls))),
 )
@@ -0,0 +1,59 @@
+"""
+API views that don't fit a Tastypie resource.
+
+"""
+import json
+
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseForbidden)
+from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from moztrap import model
+from moztrap.model.execution.ingest import IngestError, JUnitIngester
+from moztrap.model.mtapi import MTApiKeyAuthentication
+
+
+
+@csrf_exempt
+@require_POST
+def junit_results(request, run_id):
+    """
+    Ingest JUnit XML results for a run.
+
+    Authenticates like the rest of the API (``username`` and ``api_key``
+    querystring parameters), and requires permission to execute tests. The XML
+    may be the request body or an uploaded ``file``. An ``environment`` ID
+    querystring parameter applies one environment to all results; otherwise
+    each testcase ``classname`` must be an environment label of the run.
+
+    Responds with a JSON summary including throughput in cases per second.
+
+    """
+    authenticated = MTApiKeyAuthentication().is_authenticated(request)
+    if authenticated is not True:
+        return authenticated
+    if not request.user.has_perm("execution.execute"):
+        return HttpResponseForbidden()
+
+    run = get_object_or_404(model.Run, pk=run_id)
+
+    environment = None
+    env_id = request.GET.get("environment")
+    if env_id:
+        try:
+            environment = run.environments.get(pk=env_id)
+        except (model.Environment.DoesNotExist, ValueError):
+            return HttpResponseBadRequest(
+                "Environment {0} is not in run {1}.".format(env_id, run.id))
+
+    source = request.FILES.get("file", request)
+    try:
+        result = JUnitIngester(
+            run, request.user, environment=environment).ingest(source)
+    except IngestError as e:
+        return HttpResponseBadRequest(str(e))
+
+    return HttpResponse(
+        json.dumps(result.as_dict()), content_type="application/json")
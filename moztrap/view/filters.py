@@ -15,7 +15,11 @@ class ProductFilterSet(filters.FilterSet):
     filters = [
         filters.KeywordFilter("name"),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
@@ -27,12 +31,17 @@ class ProductVersionFilterSet(filters.FilterSet):
         filters.KeywordFilter("version"),
         filters.KeywordFilter("codename"),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         ]
 
 
@@ -47,22 +56,30 @@ class RunFilterSet(filters.FilterSet):
             queryset=model.Product.objects.all()),
         filters.ModelFilter(
             "productversion",
-            queryset=model.ProductVersion.objects.all().select_related()),
+            queryset=model.ProductVersion.objects.all().select_related(),
+            depends=[model.Product]),
         filters.KeywordFilter("name"),
         filters.KeywordFilter("description"),
+        filters.CompletionFilter("completion"),
         filters.ModelFilter(
             "suite",
             lookup="suites",
-            queryset=model.Suite.objects.all()),
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         filters.KeywordExactFilter(
             "case id", lookup="suites__cases__id", key="case", coerce=int),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         filters.ChoicesFilter(
             "is Series",
             lookup="is_series",
@@ -73,7 +90,8 @@ class RunFilterSet(filters.FilterSet):
         filters.ModelFilter(
             "members of series",
             lookup="series",
-            queryset=model.Run.objects.filter(is_series=True)
+            queryset=model.Run.objects.filter(is_series=True),
+            lazy=True,
             ),
         filters.KeywordExactFilter("build"),
         ]
@@ -82,6 +100,8 @@ class RunFilterSet(filters.FilterSet):
 
 class RunCaseVersionFilterSet(filters.FilterSet):
     """FilterSet for RunCaseVersions."""
+    facets = ["status", "resultstatus", "tag", "envelement"]
+
     filters = [
         filters.ChoicesFilter(
             "status",
@@ -94,23 +114,27 @@ class RunCaseVersionFilterSet(filters.FilterSet):
             extra_filters={"results__is_latest": True},
             choices=Choices(*model.Result.COMPLETED_STATES),
             ),
+        filters.CompletionFilter("completion"),
         filters.KeywordExactFilter(
             "id", lookup="caseversion__case__id", coerce=int),
         filters.KeywordFilter("name", lookup="caseversion__name"),
         filters.ModelFilter(
             "tag",
             lookup="caseversion__tags",
-            queryset=model.Tag.objects.all()),
+            queryset=model.Tag.objects.all(),
+            lazy=True),
         filters.ModelFilter(
             "product",
             lookup="caseversion__case__product",
             queryset=model.Product.objects.all()),
-        filters.ModelFilter("run", queryset=model.Run.objects.all()),
+        filters.ModelFilter(
+            "run", queryset=model.Run.objects.all(), lazy=True),
         filters.ModelFilter(
             "product version",
             lookup="run__productversion",
             key="productversion",
-            queryset=model.ProductVersion.objects.all()),
+            queryset=model.ProductVersion.objects.all(),
+            depends=[model.Product]),
         filters.KeywordFilter(
             "instruction", lookup="caseversion__steps__instruction"),
         filters.KeywordFilter(
@@ -120,16 +144,20 @@ class RunCaseVersionFilterSet(filters.FilterSet):
         filters.ModelFilter(
             "creator",
             lookup="caseversion__created_by",
-            queryset=model.User.objects.all()),
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         filters.ModelFilter(
             "suite",
             lookup="caseversion__case__suites",
-            queryset=model.Suite.objects.all()),
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         ]
 
 
@@ -143,7 +171,8 @@ class RunTestsRunCaseVersionFilterSet(filters.FilterSet):
         filters.ModelFilter(
             "tag",
             lookup="caseversion__tags",
-            queryset=model.Tag.objects.all()),
+            queryset=model.Tag.objects.all(),
+            lazy=True),
         filters.KeywordFilter(
             "instruction", lookup="caseversion__steps__instruction"),
         filters.KeywordFilter(
@@ -153,11 +182,14 @@ class RunTestsRunCaseVersionFilterSet(filters.FilterSet):
         filters.ModelFilter(
             "creator",
             lookup="caseversion__created_by",
-            queryset=model.User.objects.all()),
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "suite",
             lookup="caseversion__case__suites",
-            queryset=model.Suite.objects.all()),
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         ]
 
 
@@ -166,13 +198,18 @@ class ResultFilterSet(filters.FilterSet):
     """FilterSet for results."""
     filters = [
         filters.ChoicesFilter("status", choices=model.Result.STATUS),
-        filters.ModelFilter("tester", queryset=model.User.objects.all()),
+        filters.ModelFilter(
+            "tester",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.KeywordFilter("comment"),
         filters.ModelFilter(
             "environment element",
             lookup="environment__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         ]
 
 
@@ -187,31 +224,38 @@ class SuiteFilterSet(filters.FilterSet):
             lookup="product__versions",
             key="productversion",
             queryset=model.ProductVersion.objects.all(),
+            depends=[model.Product],
             ),
         filters.ModelFilter(
             "run",
             lookup="runs",
-            queryset=model.Run.objects.all()
+            queryset=model.Run.objects.all(),
+            lazy=True,
             ),
         filters.KeywordFilter("name"),
         filters.KeywordFilter("description"),
         filters.KeywordExactFilter(
             "case id", lookup="cases__id", key="case", coerce=int),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
 
 class CaseVersionFilterSet(filters.FilterSet):
     """FilterSet for CaseVersions."""
+    facets = ["status", "tag", "envelement"]
 
     filters = [
         filters.ChoicesFilter("status", choices=model.CaseVersion.STATUS),
         cases.PrefixIDFilter("id"),
         filters.KeywordFilter("name"),
         filters.ModelFilter(
-            "tag", lookup="tags", queryset=model.Tag.objects.all()),
+            "tag", lookup="tags", queryset=model.Tag.objects.all(), lazy=True),
         filters.ModelFilter(
             "product",
             lookup="case__product",
@@ -220,21 +264,30 @@ class CaseVersionFilterSet(filters.FilterSet):
             "product version",
             lookup="productversion",
             key="productversion",
-            queryset=model.ProductVersion.objects.all().select_related()),
+            queryset=model.ProductVersion.objects.all().select_related(),
+            depends=[model.Product]),
         filters.KeywordFilter("instruction", lookup="steps__instruction"),
         filters.KeywordFilter(
             "expected result",
             lookup="steps__expected",
             key="expected"),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         filters.ModelFilter(
-            "suite", lookup="case__suites", queryset=model.Suite.objects.all()),
+            "suite",
+            lookup="case__suites",
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         ]
 
 
@@ -249,9 +302,14 @@ class TagFilterSet(filters.FilterSet):
             lookup="product__versions",
             key="productversion",
             queryset=model.ProductVersion.objects.all(),
+            depends=[model.Product],
             ),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
@@ -264,9 +322,14 @@ class ProfileFilterSet(filters.FilterSet):
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
@@ -278,5 +341,6 @@ class EnvironmentFilterSet(filters.FilterSet):
             "environment element",
             lookup="elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         ]
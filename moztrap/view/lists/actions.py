@@ -4,6 +4,7 @@ Actions-handling for manage list pages.
 """
 from functools import wraps
 
+from django.contrib import messages
 from django.http import HttpResponseForbidden
 from django.shortcuts import redirect
 
@@ -25,6 +26,14 @@ def actions(model, allowed_actions, permission=None, fall_through=False):
     decorator to be used with views that also do normal non-actions form
     handling.)
 
+    Also handles bulk actions: a POST key "bulk-action" whose value is the
+    method, along with "bulk-id" keys giving the IDs of the objects to act on,
+    or a "bulk-all" key to act on all objects matching the list's current
+    filters (refused if no filters are set, as it would act on every object).
+    Permission is checked once, and the action is taken on all objects at once
+    (see ``bulk_action``); the list is then re-rendered once, as for a single
+    action.
+
     """
     def decorator(view_func):
         @wraps(view_func)
@@ -32,19 +41,36 @@ def actions(model, allowed_actions, permission=None, fall_through=False):
             if request.method == "POST":
                 action_taken = False
                 action_data = get_action(request.POST)
-                if action_data:
-                    action, obj_id = action_data
+                bulk_data = get_bulk_action(request.POST)
+                if action_data or bulk_data:
+                    action, obj_id = action_data or bulk_data
                     if action in allowed_actions:
                         if permission and not request.user.has_perm(permission):
                             return HttpResponseForbidden(
                                 "You do not have permission for this action.")
-                        try:
-                            obj = model._base_manager.get(pk=obj_id)
-                        except model.DoesNotExist:
-                            pass
+                        if bulk_data:
+                            queryset = bulk_queryset(
+                                model, view_func, request, obj_id)
+                            if queryset is None:
+                                messages.error(
+                                    request,
+                                    "Set a filter to act on all matching "
+                                    "items.",
+                                    fail_silently=True,
+                                    )
+                            else:
+                                bulk_action(
+                                    model, queryset, action,
+                                    user=request.user)
+                                action_taken = True
                         else:
-                            getattr(obj, action)(user=request.user)
-                            action_taken = True
+                            try:
+                                obj = model._base_manager.get(pk=obj_id)
+                            except model.DoesNotExist:
+                                pass
+                            else:
+                                getattr(obj, action)(user=request.user)
+                                action_taken = True
                 if action_taken or not fall_through:
                     if request.is_ajax():
                         request.method = "GET"
@@ -75,3 +101,60 @@ def get_action(post_data):
     if actions:
         return actions[0]
     return None
+
+
+
+def get_bulk_action(post_data):
+    """
+    Given a request.POST including e.g. {"bulk-action": "delete", "bulk-id":
+    ["3", "4"]}, return ("delete", ["3", "4"]). If "bulk-all" is set instead
+    of "bulk-id", the IDs are None (all objects matching the list's filters).
+    Returns None if no bulk action found.
+
+    """
+    action = post_data.get("bulk-action")
+    if not action:
+        return None
+    if post_data.get("bulk-all"):
+        return (action, None)
+    return (action, post_data.getlist("bulk-id"))
+
+
+
+def bulk_queryset(model, view_func, request, ids):
+    """
+    Return queryset of ``model`` objects for a bulk action.
+
+    If ``ids`` is None, the queryset has all objects the (``filter``-decorated)
+    ``view_func`` would list with the request's filters; if no filters are
+    set, returns None instead of all objects.
+
+    """
+    if ids is None:
+        filterset = getattr(view_func, "filterset", None)
+        if filterset is None:
+            return model.objects.none()
+        bound = filterset.bind(request.GET, request.COOKIES)
+        if not bound.active:
+            return None
+        return bound.filter(model.objects.all())
+    return model._default_manager.filter(
+        pk__in=[i for i in ids if i.isdigit()])
+
+
+
+def bulk_action(model, queryset, action, user=None):
+    """
+    Take ``action`` on all objects in ``queryset``.
+
+    Uses the model's set-based ``bulk_<action>`` classmethod, if any (e.g.
+    ``MTModel.bulk_delete``, ``DraftStatusModel.bulk_activate``); otherwise
+    calls the method on each object.
+
+    """
+    bulk_method = getattr(model, "bulk_{0}".format(action), None)
+    if bulk_method is not None:
+        bulk_method(queryset, user=user)
+    else:
+        for obj in queryset:
+            getattr(obj, action)(user=user)
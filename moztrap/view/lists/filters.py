@@ -8,8 +8,11 @@ import json
 import urlparse
 
 from django.core.urlresolvers import reverse, resolve
+from django.db.models import Count
+from django.db.models.fields import FieldDoesNotExist
 from django.utils.datastructures import MultiValueDict
 
+from moztrap import cache
 from moztrap.model.core.models import ProductVersion
 
 
@@ -69,6 +72,8 @@ def filter(ctx_name, filters=None, filterset_class=None):
             except AttributeError:
                 return response
             bfs = filterset.bind(request.GET, request.COOKIES)
+            if filterset.facets:
+                bfs.count_facets(ctx[ctx_name])
             ctx[ctx_name] = bfs.filter(ctx[ctx_name])
             ctx["filters"] = bfs
             return response
@@ -110,6 +115,12 @@ class BoundFilterSet(object):
         return len(self.boundfilters)
 
 
+    @property
+    def active(self):
+        """True if any of our filters has a selected value."""
+        return any(boundfilter.values for boundfilter in self.boundfilters)
+
+
     def filter(self, queryset):
         """Return ``queryset`` filtered by current values of our filters."""
         for boundfilter in self.boundfilters:
@@ -117,6 +128,40 @@ class BoundFilterSet(object):
         return queryset
 
 
+    def count_facets(self, queryset):
+        """
+        Set option counts of each facet filter, for unfiltered ``queryset``.
+
+        Each option's count is the number of items in ``queryset`` that match
+        all the other filters and that option, so it is what the list would
+        contain if only that option of the facet were selected (or, for
+        selected options, how many of the listed items it contributes). It
+        takes one grouped query per facet, cached per filter state until any
+        model along the filters' lookups changes.
+
+        """
+        models = set([queryset.model])
+        for boundfilter in self.boundfilters:
+            models.update(_lookup_models(queryset.model, boundfilter.lookup))
+
+        for boundfilter in self.boundfilters:
+            if boundfilter.key not in self.filterset.facets:
+                continue
+            others = queryset
+            for other in self.boundfilters:
+                if other is not boundfilter:
+                    others = other.filter(others)
+            boundfilter.set_counts(
+                cache.cached(
+                    "facet-counts",
+                    models,
+                    lambda: boundfilter.facet_counts(others),
+                    # compiling a query's SQL may alter it; use a clone's
+                    parts=[others.db, others.all().query, boundfilter.key],
+                    )
+                )
+
+
 
 class PinnedFilters(object):
     """An object to manage pinned filters saved as cookies in the session."""
@@ -158,6 +203,10 @@ class FilterSet(object):
     # subclasses can have preset filters
     filters = []
 
+    # keys of filters whose options show counts of matching items (only for
+    # filters that filter on ``lookup``; see ``Filter.facet_counts``)
+    facets = []
+
     bound_class = BoundFilterSet
 
 
@@ -224,7 +273,27 @@ class FilterSet(object):
 
 
 
-FilterOption = namedtuple("FilterOption", ["value", "label", "selected"])
+FilterOption = namedtuple(
+    "FilterOption", ["value", "label", "selected", "count"])
+
+
+
+def _lookup_models(model, lookup):
+    """Return list of models traversed by ``lookup`` from ``model``."""
+    models = []
+    for name in lookup.split("__"):
+        try:
+            field, _, direct, _ = model._meta.get_field_by_name(name)
+        except FieldDoesNotExist:
+            break
+        if not direct:
+            model = field.model
+        elif getattr(field, "rel", None) is not None:
+            model = field.rel.to
+        else:
+            break
+        models.append(model)
+    return models
 
 
 
@@ -235,14 +304,19 @@ class BoundFilter(object):
         self._filter = flt
         self.data = data
 
-        # list of valid selected option values
-        self.values = self._filter.values(self.data)
+        # whether options are fetched on demand (see ModelFilter), list of
+        # valid selected option values, and (value, label) options to display
+        self.lazy, self.values, options = self._filter.bind(self.data)
+
+        # whether options have counts of matching items (see set_counts)
+        self.counted = False
 
         value_set = set(self.values)
         self.options = [
             FilterOption(
-                value=val, label=label, selected=(val in value_set))
-            for val, label in self._filter.options(self.values)]
+                value=val, label=label, selected=(val in value_set),
+                count=None)
+            for val, label in options]
 
 
     def filter(self, queryset):
@@ -250,6 +324,24 @@ class BoundFilter(object):
         return self._filter.filter(queryset, self.values)
 
 
+    def facet_counts(self, queryset):
+        """Pass-through to Filter facet_counts."""
+        return self._filter.facet_counts(queryset)
+
+
+    def set_counts(self, counts):
+        """Set option counts from dict mapping values to counts."""
+        self.counted = True
+        self.options = [
+            o._replace(count=counts.get(o.value, 0)) for o in self.options]
+
+
+    @property
+    def lookup(self):
+        """Pass-through to Filter lookup."""
+        return self._filter.lookup
+
+
     @property
     def cls(self):
         """Pass-through to Filter cls."""
@@ -322,6 +414,31 @@ class Filter(object):
         return []
 
 
+    def bind(self, data):
+        """
+        Given data dict, return (lazy, values, options).
+
+        ``lazy`` is whether options are fetched on demand, ``values`` the
+        selected values and ``options`` the (value, label) options to display.
+
+        """
+        values = self.values(data)
+        return False, values, self.options(values)
+
+
+    def facet_counts(self, queryset):
+        """
+        Return dict mapping values to number of matching items in queryset.
+
+        One grouped query; assumes this filter selects items whose ``lookup``
+        is among the values (as ``filter`` does).
+
+        """
+        rows = queryset.filter(**self.extra_filters).order_by().values(
+            self.lookup).annotate(facet_count=Count("pk", distinct=True))
+        return dict((r[self.lookup], r["facet_count"]) for r in rows)
+
+
     def values(self, data):
         """Given data dict, return list of selected values."""
         return [v for v in map(self.coerce, data.get(self.key, []))]
@@ -392,7 +509,18 @@ class ModelFilter(BaseChoicesFilter):
     By default, assumes the model has a numeric primary key; if not an
     alternative ``coerce`` function should be provided at instantiation.
 
+    Choices are cached (see ``moztrap.cache``) until the model, or any of the
+    ``depends`` models, changes.
+
+    A ``lazy`` filter with more than ``LAZY_THRESHOLD`` choices doesn't list
+    them all: only selected values are resolved (with a single query), and
+    other options are fetched on demand by text search (see ``search``).
+
     """
+    # lazy filters with more choices than this only list selected options
+    LAZY_THRESHOLD = 100
+
+
     def __init__(self, *args, **kwargs):
         """
         Looks for ``queryset`` and ``label`` keyword arguments.
@@ -400,19 +528,148 @@ class ModelFilter(BaseChoicesFilter):
         ``queryset`` should contain the model instances that are the options
         available for this filter; ``label`` is an optional one-argument
         callable that returns the display label for each object, given the
-        object.
+        object. ``depends`` is an optional list of further models labels
+        depend on (e.g. via ``select_related``). If ``lazy`` is True, options
+        are searched by the ``search`` field (default "name") on demand.
 
         """
         self.queryset = kwargs.pop("queryset")
         self.label_func = kwargs.pop("label", lambda o: unicode(o))
+        self.depends = kwargs.pop("depends", [])
+        self.lazy = kwargs.pop("lazy", False)
+        self.search_lookup = kwargs.pop("search", "name")
         kwargs.setdefault("coerce", int)
         super(ModelFilter, self).__init__(*args, **kwargs)
 
 
+    def _cached(self, name, func):
+        """Return value ``name`` cached until the filtered models change."""
+        return cache.cached(
+            name,
+            [self.queryset.model] + list(self.depends),
+            func,
+            # compiling a query's SQL may alter it; use a clone's
+            parts=[self.queryset.all().query, self.key],
+            )
+
+
     def get_choices(self):
         """Get the options for this filter."""
         # always clone to get new data; filter instances are persistent
-        return [(obj.pk, self.label_func(obj)) for obj in self.queryset.all()]
+        return self._cached(
+            "filter-choices",
+            lambda: [
+                (obj.pk, self.label_func(obj)) for obj in self.queryset.all()],
+            )
+
+
+    def count(self):
+        """Return number of choices (cached)."""
+        return self._cached("filter-count", lambda: self.queryset.count())
+
+
+    def is_lazy(self):
+        """Return True if options should be fetched on demand."""
+        return self.lazy and self.count() > self.LAZY_THRESHOLD
+
+
+    def selected_choices(self, values):
+        """Return (value, label) choices for selected ``values`` only."""
+        if not values:
+            return []
+        return [
+            (obj.pk, self.label_func(obj))
+            for obj in self.queryset.filter(pk__in=values)
+            ]
+
+
+    def options(self, values):
+        """Given list of selected values, return options to display."""
+        if self.is_lazy():
+            return self.selected_choices(values)
+        return self.get_choices()
+
+
+    def values(self, data):
+        """Given data dict, return list of selected values."""
+        if not self.is_lazy():
+            return super(ModelFilter, self).values(data)
+        return self._lazy_selected(data)[0]
+
+
+    def bind(self, data):
+        """
+        Given data dict, return (lazy, values, options).
+
+        Checks laziness and fetches choices once, even if they aren't cached;
+        a lazy filter resolves and validates selected values with a single
+        query.
+
+        """
+        if self.is_lazy():
+            values, choices = self._lazy_selected(data)
+            return True, values, choices
+        choices = self.get_choices()
+        valid = set(pk for pk, label in choices)
+        values = [
+            v for v in Filter.values(self, data)
+            if v is not None and v in valid
+            ]
+        return False, values, choices
+
+
+    def _lazy_selected(self, data):
+        """Return (valid selected values, their choices) from data dict."""
+        values = [
+            v for v in Filter.values(self, data) if v is not None]
+        choices = self.selected_choices(values)
+        valid = set(pk for pk, label in choices)
+        return [v for v in values if v in valid], choices
+
+
+    def search(self, text, limit=20):
+        """Return up to ``limit`` (value, label) choices matching ``text``."""
+        qs = self.queryset.filter(
+            **{"{0}__icontains".format(self.search_lookup): text})
+        return [(obj.pk, self.label_func(obj)) for obj in qs[:limit]]
+
+
+
+class CompletionFilter(BaseChoicesFilter):
+    """
+    Filters by ranges of completion.
+
+    For models whose manager has ``completion_sql`` (see
+    ``moztrap.model.execution.models.ResultCountsManager``); selected ranges
+    are ORed in a single WHERE clause of the filtered query.
+
+    """
+    # (value, label, condition on the completion ratio {0})
+    RANGES = [
+        ("notstarted", "not started", "{0} = 0"),
+        ("inprogress", "in progress", "{0} > 0 AND {0} < 1"),
+        ("complete", "complete", "{0} >= 1"),
+        ]
+
+
+    def get_choices(self):
+        """Return the completion ranges."""
+        return [(value, label) for value, label, condition in self.RANGES]
+
+
+    def filter(self, queryset, values):
+        """Given queryset and selected ranges, return filtered queryset."""
+        if not values:
+            return queryset
+        sql, sql_params = queryset.model.objects.completion_sql()
+        conditions = []
+        params = []
+        for value, label, condition in self.RANGES:
+            if value in values:
+                conditions.append(
+                    "({0})".format(condition.format("({0})".format(sql))))
+                params.extend(sql_params * condition.count("{0}"))
+        return queryset.extra(where=[" OR ".join(conditions)], params=params)
 
 
 
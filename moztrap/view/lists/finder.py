@@ -3,11 +3,16 @@ Finder; a multi-column hierarchical object navigator.
 
 """
 from functools import wraps
+import json
 import posixpath
 
 from django.db import models
+from django.db.models.fields import FieldDoesNotExist
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
 
+from ... import cache, routing
 from .filters import filter_url
 
 
@@ -23,6 +28,20 @@ def finder(finder_cls):
 
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
+            if request.GET.get("finder"):
+                routing.mark_read_only()
+            if request.GET.get("finder") == "tree":
+                try:
+                    depth = int(request.GET.get("depth", finder.tree_depth))
+                except ValueError:
+                    depth = finder.tree_depth
+                tree = finder.cached_tree(
+                    request.GET.get("col"), request.GET.get("id"), depth)
+                # a background prefetch shouldn't consume the user's messages
+                return HttpResponse(
+                    json.dumps({"tree": tree, "no_messages": True}),
+                    content_type="application/json",
+                    )
             if request.is_ajax() and request.GET.get("finder"):
                 col_name = request.GET["col"]
                 return render(
@@ -32,7 +51,7 @@ def finder(finder_cls):
                         "colname": col_name,
                         "finder": {
                             "finder": finder,
-                            col_name: finder.objects(
+                            col_name: finder.cached_objects(
                                 col_name, request.GET["id"])
                             },
                         }
@@ -47,7 +66,7 @@ def finder(finder_cls):
             finder_ctx.update(
                 {
                     "finder": finder,
-                    top_col.name: finder.objects(top_col.name)
+                    top_col.name: finder.cached_objects(top_col.name)
                     }
                 )
             return response
@@ -64,6 +83,8 @@ class Finder(object):
     template_base = ""
     # A list of Column instances for this finder.
     columns = []
+    # Maximum (and default) number of columns included in a tree.
+    tree_depth = 3
 
 
     def __init__(self):
@@ -77,6 +98,20 @@ class Finder(object):
             )
         self.columns_by_model = dict((c.model, c) for c in self.columns)
 
+        # lookup from each column's model to its parent column's model (None
+        # if there is no relationship), and all models the columns depend on
+        self.parent_lookups = {}
+        self.models = set()
+        for col in self.columns:
+            self.models.add(col.model)
+            self.models.update(col.models)
+            parent_col = self.parent_columns.get(col.name)
+            if parent_col is not None:
+                lookup, through = _relationship(col.model, parent_col.model)
+                self.parent_lookups[col.name] = lookup
+                if through is not None:
+                    self.models.add(through)
+
 
     def column_template(self, column_name):
         """Returns template name for rendering objects in given column."""
@@ -122,38 +157,134 @@ class Finder(object):
         col = self._get_column_by_name(column_name)
         ret = col.objects()
         if parent is not None:
-            try:
-                parent_col = self.parent_columns[col.name]
-            except KeyError:
-                raise ValueError(
-                    "Column {0} has no parent.".format(column_name))
-
-            opts = col.model._meta
-
-            attr = None
-            for field in [
-                    f for f in opts.fields if isinstance(f, models.ForeignKey)
-                    ] + opts.many_to_many:
-                if field.rel.to is parent_col.model:
-                    attr = field.name
-                    break
-
-            if attr is None:
-                try:
-                    attr = [
-                        r.get_accessor_name()
-                        for r in opts.get_all_related_many_to_many_objects()
-                        if r.model is parent_col.model
-                        ][0]
-                except IndexError:
-                    raise ValueError(
-                        "Cannot find relationship from {0} to {1}".format(
-                            col.model, parent_col.model))
-
-            ret = ret.filter(**{attr: parent})
+            ret = ret.filter(**{self._parent_lookup(col.name): parent})
         return ret
 
 
+    def cached_objects(self, column_name, parent=None):
+        """Return list of objects in given column (see ``objects``), cached."""
+        return cache.cached_list(
+            self.objects(column_name, parent), models=self.models)
+
+
+    def tree(self, column_name=None, parent=None, depth=None):
+        """
+        Return tree of objects as a list of JSON-serializable dicts.
+
+        The top level is the objects of the given column (default the first),
+        filtered by ``parent`` as in ``objects``. The tree includes ``depth``
+        levels (at most, and by default, ``tree_depth``) with two queries per
+        level; each node has its ``id``, ``name`` and ``goto`` URL and, if
+        there is a child column, the ``children_url`` for an ajax query for
+        its children. Nodes above the last level also have their
+        ``children`` and the rendered ``children_html`` of that ajax query.
+
+        """
+        if column_name is None:
+            column_name = self.columns[0].name
+        if depth is None or depth > self.tree_depth:
+            depth = self.tree_depth
+        col = self._get_column_by_name(column_name)
+        nodes = {}
+
+        def level(col, objects, depth):
+            """Return list of nodes for ``objects``, with ``depth`` levels."""
+            child_col = self.child_columns.get(col.name)
+            children = {}
+            if depth > 1 and child_col is not None and objects:
+                children = self._children(child_col.name, objects)
+            ret = []
+            for obj in objects:
+                node = {
+                    "id": obj.id,
+                    "name": unicode(obj),
+                    "goto": self.goto_url(obj),
+                    "children_url": self.child_query_url(obj),
+                    }
+                if depth > 1 and child_col is not None:
+                    child_objects = children.get(obj.id, [])
+                    node["children"] = level(
+                        child_col, child_objects, depth - 1)
+                    node["children_html"] = render_to_string(
+                        self.column_template(child_col.name),
+                        {
+                            "colname": child_col.name,
+                            "finder": {
+                                "finder": self,
+                                child_col.name: child_objects,
+                                },
+                            }
+                        )
+                ret.append(node)
+            return ret
+
+        return level(
+            col, list(self.objects(column_name, parent)), max(depth, 1))
+
+
+    def cached_tree(self, column_name=None, parent=None, depth=None):
+        """Return tree of objects (see ``tree``), cached."""
+        return cache.cached(
+            "finder-tree",
+            self.models,
+            lambda: self.tree(column_name, parent, depth),
+            parts=[
+                self.__class__.__module__,
+                self.__class__.__name__,
+                column_name,
+                parent,
+                depth,
+                ],
+            )
+
+
+    def _children(self, column_name, parents):
+        """
+        Return dict mapping IDs of given parents to lists of child objects.
+
+        Takes two queries, regardless of the number of parents.
+
+        """
+        col = self._get_column_by_name(column_name)
+        lookup = self._parent_lookup(column_name)
+        parent_ids = {}
+        for pk, parent_id in col.objects().filter(
+                **{"{0}__in".format(lookup): [p.id for p in parents]}
+                ).values_list("pk", lookup).order_by():
+            parent_ids.setdefault(pk, []).append(parent_id)
+        # a foreign key to the parent can be set to the already fetched one
+        cache_name = None
+        try:
+            field = col.model._meta.get_field(lookup)
+        except FieldDoesNotExist:
+            pass
+        else:
+            if isinstance(field, models.ForeignKey):
+                cache_name = field.get_cache_name()
+        parents_by_id = dict((p.id, p) for p in parents)
+        children = {}
+        for obj in col.objects().filter(pk__in=parent_ids.keys()):
+            for parent_id in parent_ids[obj.id]:
+                children.setdefault(parent_id, []).append(obj)
+                if cache_name is not None:
+                    setattr(obj, cache_name, parents_by_id[parent_id])
+        return children
+
+
+    def _parent_lookup(self, column_name):
+        """Return lookup from given column's model to its parent's model."""
+        try:
+            lookup = self.parent_lookups[column_name]
+        except KeyError:
+            raise ValueError("Column {0} has no parent.".format(column_name))
+        if lookup is None:
+            col = self.columns_by_name[column_name]
+            raise ValueError(
+                "Cannot find relationship from {0} to {1}".format(
+                    col.model, self.parent_columns[column_name].model))
+        return lookup
+
+
     def _get_column_by_name(self, column_name):
         try:
             return self.columns_by_name[column_name]
@@ -162,14 +293,44 @@ class Finder(object):
 
 
 
+def _relationship(model, parent_model):
+    """
+    Return (lookup, through model) from ``model`` to ``parent_model``.
+
+    The lookup is None if there is no relationship; the through model is
+    None unless it's a many-to-many relationship.
+
+    """
+    opts = model._meta
+
+    for field in [
+            f for f in opts.fields if isinstance(f, models.ForeignKey)
+            ] + opts.many_to_many:
+        if field.rel.to is parent_model:
+            return field.name, getattr(field.rel, "through", None)
+
+    for r in opts.get_all_related_many_to_many_objects():
+        if r.model is parent_model:
+            return r.get_accessor_name(), r.field.rel.through
+
+    return None, None
+
+
+
 
 class Column(object):
-    def __init__(self, name, template_name, queryset, goto=None):
+    def __init__(self, name, template_name, queryset, goto=None, models=()):
+        """
+        ``models`` are any models the queryset depends on besides its own
+        (e.g. via ordering by a related field), for caching.
+
+        """
         self.name = name
         self.template_name = template_name
         self.model = queryset.model
         self.queryset = queryset
         self.goto = goto
+        self.models = models
 
 
     def objects(self):
@@ -0,0 +1,74 @@
+"""
+Template tag for caching rendered list item fragments.
+
+A fragment is rendered once and served from the model cache until one of the
+objects it depends on changes::
+
+    {% load fragments %}
+    {% cachefragment "manage_run" run run.productversion can_manage %}
+      ...
+    {% endcachefragment %}
+
+The fragment is keyed by its name and the values following it: model
+instances by their ``cc_version``, lists of them (e.g.
+``caseversion.tags.all``) by all their versions, and anything else by its
+value. Everything the fragment displays must be covered, including per-user
+values such as the result of a permission check. Fragments that depend on
+many rows of some model (e.g. a results summary) can list the models whose
+generation they depend on::
+
+    {% cachefragment "results_run" run models "execution.result" %}
+
+Fragments must not contain per-session values such as CSRF tokens. Hits and
+misses are counted in the request's instrumentation stats, if any (see
+``moztrap.debug.instrumentation``).
+
+"""
+from django.db.models import get_model
+from django.template import Library
+
+from classytags.core import Tag, Options
+from classytags.arguments import Argument, MultiValueArgument
+
+from .... import cache
+from ....debug import instrumentation
+
+
+
+register = Library()
+
+
+
+class CacheFragment(Tag):
+    """Renders its contents once, then serves them from the model cache."""
+    name = "cachefragment"
+    options = Options(
+        Argument("fragment_name"),
+        MultiValueArgument("deps", required=False),
+        "models",
+        MultiValueArgument("models", required=False),
+        blocks=[("endcachefragment", "nodelist")],
+        )
+
+
+    def render_tag(self, context, fragment_name, deps, models, nodelist):
+        """Return cached rendering of ``nodelist``, rendering it if needed."""
+        key = cache.fragment_key(
+            fragment_name,
+            deps,
+            [get_model(*label.split(".")) for label in models],
+            )
+        stats = instrumentation.current()
+        html = cache.model_cache().get(key)
+        if html is None:
+            html = nodelist.render(context)
+            if cache.can_store():
+                cache.model_cache().set(key, html, cache.default_timeout())
+            if stats is not None:
+                stats.record_fragment(False)
+        elif stats is not None:
+            stats.record_fragment(True)
+        return html
+
+
+register.tag(CacheFragment)
@@ -0,0 +1,51 @@
+"""
+Views supporting list pages.
+
+"""
+import json
+
+from django.core.urlresolvers import resolve, Resolver404
+from django.http import HttpResponse, Http404
+from django.views.decorators.cache import never_cache
+
+from moztrap.view.utils.auth import login_maybe_required
+from moztrap.view.utils.routing import read_only
+
+
+
+@read_only
+@never_cache
+@login_maybe_required
+def filter_options(request):
+    """
+    Return JSON options of a lazy list filter that match typed text.
+
+    Query-string parameters are ``path`` (of the filtered list page), ``key``
+    (of the filter on that page) and ``text``.
+
+    """
+    try:
+        view_func = resolve(request.GET.get("path", "")).func
+    except Resolver404:
+        raise Http404
+    key = request.GET.get("key")
+    for flt in getattr(view_func, "filterset", []):
+        if flt.key == key and hasattr(flt, "search"):
+            break
+    else:
+        raise Http404
+
+    text = request.GET.get("text", "").strip()
+    options = flt.search(text) if text else []
+
+    return HttpResponse(
+        json.dumps(
+            {
+                "options": [
+                    {"value": value, "label": label}
+                    for value, label in options
+                    ]
+                }
+            ),
+        content_type="application/json",
+        )
@@ -234,12 +234,18 @@ class AddBulkCaseForm(BaseAddCaseForm, BaseCaseForm):
 
 
     def clean_cases(self):
-        """Validate the bulk cases text."""
-        data = model.BulkParser().parse(self.cleaned_data["cases"])
-
-        for d in data:
+        """Validate the bulk cases text, reporting all errors by line."""
+        data = []
+        errors = []
+        for d in model.BulkParser().iter_parse(
+                self.cleaned_data["cases"].splitlines()):
             if "error" in d:
-                raise forms.ValidationError(d["error"])
+                errors.append(u"Line {0}: {1}".format(d["line"], d["error"]))
+            else:
+                data.append(d)
+
+        if errors:
+            raise forms.ValidationError(errors)
 
         return data
 
@@ -274,55 +280,17 @@ class AddBulkCaseForm(BaseAddCaseForm, BaseCaseForm):
             productversions.extend(product.versions.filter(
                     order__gt=productversions[0].order))
 
-        suite = self.cleaned_data.get("suite")
-
-        cases = []
-
-        order = 0
-        if suite:
-            order = model.SuiteCase.objects.filter(
-                suite=suite,
-                ).aggregate(Max("order"))["order__max"] or 0
-
-        for case_data in self.cleaned_data["cases"]:
-            case = model.Case.objects.create(
-                product=product,
-                user=self.user,
-                idprefix=idprefix,
-                )
-
-            version_kwargs = case_data.copy()
-            steps_data = version_kwargs.pop("steps")
-
-            version_kwargs["case"] = case
-            version_kwargs["status"] = self.cleaned_data["status"]
-            version_kwargs["user"] = self.user
-
-            if suite:
-                order += 1
-                model.SuiteCase.objects.create(
-                    case=case,
-                    suite=suite,
-                    user=self.user,
-                    order=order,
-                    )
+        creator = model.CaseCreator(
+            product,
+            productversions,
+            user=self.user,
+            status=self.cleaned_data["status"],
+            idprefix=idprefix,
+            suite=self.cleaned_data.get("suite"),
+            tags=self.cleaned_data.get("tags", set()),
+            )
 
-            for productversion in productversions:
-                this_version_kwargs = version_kwargs.copy()
-                this_version_kwargs["productversion"] = productversion
-                caseversion = model.CaseVersion.objects.create(
-                    **this_version_kwargs)
-                for i, step_kwargs in enumerate(steps_data, 1):
-                    model.CaseStep.objects.create(
-                        user=self.user,
-                        caseversion=caseversion,
-                        number=i,
-                        **step_kwargs)
-                self.save_tags(caseversion)
-
-            cases.append(case)
-
-        return cases
+        return creator.create(self.cleaned_data["cases"])
 
 
 
@@ -56,7 +56,7 @@ def category_element_ajax_add_edit(view_func):
                     data["no_replace"] = True
                 else:
                     if "category-id" in request.POST:
-                        cat = model.Category.objects.get(
+                        cat = model.Category.objects.with_deletable().get(
                             pk=request.POST.get("category-id")
                             )
                         cat.name = new_category_name
@@ -69,7 +69,9 @@ def category_element_ajax_add_edit(view_func):
                     # the original widget queryset, but we don't have access to
                     # that here. soon this whole editing-on-the-form thing will
                     # go away anyway.
-                    cat.choice_elements = cat.elements.order_by("name")
+                    cat.choice_elements = (
+                        model.Element.objects.with_deletable().filter(
+                            category=cat).order_by("name"))
                     data["html"] = render_to_string(
                         template_name,
                         {
@@ -93,7 +95,7 @@ def category_element_ajax_add_edit(view_func):
                     data["no_replace"] = True
                 else:
                     if "element-id" in request.POST:
-                        e = model.Element.objects.get(
+                        e = model.Element.objects.with_deletable().get(
                             pk=request.POST.get("element-id"),
                             )
                         e.name = new_element_name
@@ -61,10 +61,7 @@ class SuiteForm(mtforms.NonFieldErrorsClassFormMixin, mtforms.MTModelForm):
         suite = super(SuiteForm, self).save(user=user)
 
         if "cases" in self.changed_data:
-            suite.suitecases.all().delete(permanent=True)
-            for i, case in enumerate(self.cleaned_data["cases"]):
-                model.SuiteCase.objects.create(
-                    suite=suite, case=case, order=i, user=user)
+            suite.set_cases(self.cleaned_data["cases"], user=user)
 
         return suite
 
@@ -0,0 +1,72 @@
+"""
+Render and cache the markdown of all case descriptions and steps.
+
+Rendered HTML is otherwise cached the first time each text is displayed (see
+``moztrap.view.markup.render``); run this after deploying, or after clearing
+or upgrading the cache, so no page pays for rendering::
+
+    ./manage.py cache_markdown --batch-size=2000
+
+"""
+from optparse import make_option
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap import model
+from moztrap.view.markup.render import cache_rendered
+
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the markdown of all case version descriptions and step "
+        "instructions and expected results into the cache.")
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--batch-size",
+            dest="batch_size",
+            type="int",
+            default=1000,
+            help="Number of texts to render and cache at once (default "
+            "1000)."),
+        )
+
+
+    def handle(self, *args, **options):
+        if args:
+            raise CommandError("Takes no arguments; see --help for options.")
+        batch_size = options.get("batch_size")
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        start = time.time()
+        total = rendered = 0
+        batch = []
+        for text in self.texts():
+            batch.append(text)
+            if len(batch) >= batch_size:
+                total += len(batch)
+                rendered += cache_rendered(batch)
+                batch = []
+        if batch:
+            total += len(batch)
+            rendered += cache_rendered(batch)
+
+        self.stdout.write(
+            "Rendered {0} of {1} texts in {2:.1f}s\n".format(
+                rendered, total, time.time() - start))
+
+
+    def texts(self):
+        """Yield all non-empty markdown texts of case versions and steps."""
+        descriptions = model.CaseVersion.objects.exclude(
+            description="").values_list("description", flat=True)
+        for text in descriptions.iterator():
+            yield text
+        steps = model.CaseStep.objects.values_list("instruction", "expected")
+        for instruction, expected in steps.iterator():
+            yield instruction
+            if expected:
+                yield expected
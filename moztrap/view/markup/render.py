@@ -0,0 +1,82 @@
+"""
+Cached rendering of markdown to HTML.
+
+Rendered HTML is cached keyed by a hash of the source text (and the markdown2
+version), so it never goes stale and is never invalidated: edited text simply
+has a different key. It is kept in the shared model cache (see
+``moztrap.cache``) and in a bounded dictionary in each process, so once a
+text has been rendered anywhere, or backfilled with the ``cache_markdown``
+management command, rendering it again is a dictionary lookup.
+
+"""
+from django.conf import settings
+from django.utils.encoding import force_unicode
+
+import markdown2
+
+from ... import cache
+
+
+
+# maximum number of rendered texts kept in each process
+LOCAL_MAX = 10000
+
+_local = {}
+
+
+
+def render(text):
+    """Render markdown ``text`` to HTML, escaping any HTML in it."""
+    return force_unicode(markdown2.markdown(text, safe_mode="escape"))
+
+
+
+def markdown_key(text):
+    """Return cache key for the rendered HTML of ``text``."""
+    return cache.make_key(
+        "markdown", parts=(markdown2.__version__, force_unicode(text)))
+
+
+
+def timeout():
+    """Return timeout (in seconds) of rendered HTML in the shared cache."""
+    return getattr(
+        settings, "MARKDOWN_CACHE_TIMEOUT", cache.GENERATION_TIMEOUT)
+
+
+
+def cached_render(text):
+    """Return rendered HTML of markdown ``text``, from cache if possible."""
+    key = markdown_key(text)
+    html = _local.get(key)
+    if html is None:
+        html = cache.get_or_set(key, lambda: render(text), timeout())
+        _remember(key, html)
+    return html
+
+
+
+def cache_rendered(texts):
+    """
+    Render and cache each of ``texts`` not already cached.
+
+    Return the number of texts rendered.
+
+    """
+    keyed = dict((markdown_key(text), text) for text in texts)
+    found = cache.model_cache().get_many(keyed.keys())
+    rendered = dict(
+        (key, render(text)) for key, text in keyed.items()
+        if key not in found
+        )
+    if rendered:
+        cache.model_cache().set_many(rendered, timeout())
+    return len(rendered)
+
+
+
+def _remember(key, html):
+    """Keep rendered ``html`` in this process, forgetting all if full."""
+    if len(_local) >= LOCAL_MAX:
+        _local.clear()
+    _local[key] = html
@@ -3,10 +3,9 @@ Markup-related template tags and filters.
 
 """
 from django import template
-from django.utils.encoding import force_unicode
 from django.utils.safestring import mark_safe
 
-import markdown2
+from ..render import cached_render
 
 
 
@@ -16,7 +15,5 @@ register = template.Library()
 
 @register.filter
 def markdown(text):
-    return mark_safe(
-        force_unicode(
-            markdown2.markdown(text, safe_mode="escape")))
+    return mark_safe(cached_render(text))
 markdown.is_safe = True
@@ -0,0 +1,73 @@
+"""
+Results views for streaming exports of run results.
+
+"""
+from django.http import HttpResponse, Http404
+from django.shortcuts import get_object_or_404
+
+from moztrap.view.utils.auth import login_maybe_required
+from moztrap.view.utils.routing import read_only
+
+from moztrap import model
+from moztrap.model.execution import export
+
+
+
+def _export_response(results, format, filename):
+    """Return a response streaming ``results`` in ``format``."""
+    if format not in export.FORMATS:
+        raise Http404
+    response = HttpResponse(
+        export.export(results, format),
+        content_type=export.CONTENT_TYPES[format],
+        )
+    response["Content-Disposition"] = "attachment; filename={0}.{1}".format(
+        filename, export.EXTENSIONS[format])
+    return response
+
+
+
+def _latest(request):
+    """Return True if the request asks for latest results only."""
+    return request.GET.get("latest", "") not in ["", "0", "false"]
+
+
+
+@read_only
+@login_maybe_required
+def run_export(request, run_id, format):
+    """Stream all results for a run."""
+    run = get_object_or_404(model.Run, pk=run_id)
+    return _export_response(
+        export.results_for(run=run, latest=_latest(request)),
+        format,
+        "run-{0}-results".format(run.id),
+        )
+
+
+
+@read_only
+@login_maybe_required
+def series_export(request, run_id, format):
+    """Stream all results for the member runs of a series."""
+    series = get_object_or_404(model.Run, pk=run_id, is_series=True)
+    return _export_response(
+        export.results_for(series=series, latest=_latest(request)),
+        format,
+        "series-{0}-results".format(series.id),
+        )
+
+
+
+@read_only
+@login_maybe_required
+def productversion_export(request, productversion_id, format):
+    """Stream all results for all runs of a productversion."""
+    productversion = get_object_or_404(
+        model.ProductVersion, pk=productversion_id)
+    return _export_response(
+        export.results_for(
+            productversion=productversion, latest=_latest(request)),
+        format,
+        "productversion-{0}-results".format(productversion.id),
+        )
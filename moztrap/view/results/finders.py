@@ -46,5 +46,6 @@ class ResultsFinder(finder.Finder):
             "_cases.html",
             model.RunCaseVersion.objects.order_by("caseversion__name"),
             "results_results",
+            models=[model.CaseVersion],
             ),
         ]
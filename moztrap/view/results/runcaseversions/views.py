@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.template.response import TemplateResponse
 
 from moztrap.view.utils.auth import login_maybe_required
+from moztrap.view.utils.routing import read_only
 
 from moztrap import model
 
@@ -17,6 +18,7 @@ from ..finders import ResultsFinder
 
 
 
+@read_only
 @login_maybe_required
 @lists.finder(ResultsFinder)
 @lists.filter("runcaseversions", filterset_class=RunCaseVersionFilterSet)
@@ -24,16 +26,18 @@ from ..finders import ResultsFinder
 @ajax("results/case/list/_cases_list.html")
 def runcaseversions_list(request):
     """List runcaseversions."""
+    runcaseversions = model.RunCaseVersion.objects.with_result_counts()
     return TemplateResponse(
         request,
         "results/case/cases.html",
         {
-            "runcaseversions": model.RunCaseVersion.objects.select_related(),
+            "runcaseversions": runcaseversions.select_related(),
             }
         )
 
 
 
+@read_only
 @login_maybe_required
 def runcaseversion_details(request, rcv_id):
     """Get details snippet for a runcaseversion."""
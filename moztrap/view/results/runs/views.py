@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.template.response import TemplateResponse
 
 from moztrap.view.utils.auth import login_maybe_required
+from moztrap.view.utils.routing import read_only
 
 from moztrap import model
 
@@ -17,6 +18,7 @@ from ..finders import ResultsFinder
 
 
 
+@read_only
 @login_maybe_required
 @lists.finder(ResultsFinder)
 @lists.filter("runs", filterset_class=RunFilterSet)
@@ -28,12 +30,13 @@ def runs_list(request):
         request,
         "results/run/runs.html",
         {
-            "runs": model.Run.objects.select_related(),
+            "runs": model.Run.objects.with_result_counts().select_related(),
             }
         )
 
 
 
+@read_only
 @login_maybe_required
 def run_details(request, run_id):
     """Get details snippet for a run."""
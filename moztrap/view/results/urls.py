@@ -40,5 +40,22 @@ urlpatterns = patterns(
     # list
     url(r"^case/(?P<rcv_id>\d+)/$",
         "results.views.results_list",
-        name="results_results")
+        name="results_results"),
+
+    # export -----------------------------------------------------------------
+
+    # run
+    url(r"^export/run/(?P<run_id>\d+)/(?P<format>\w+)/$",
+        "export.views.run_export",
+        name="results_export_run"),
+
+    # series
+    url(r"^export/series/(?P<run_id>\d+)/(?P<format>\w+)/$",
+        "export.views.series_export",
+        name="results_export_series"),
+
+    # productversion
+    url(r"^export/productversion/(?P<productversion_id>\d+)/(?P<format>\w+)/$",
+        "export.views.productversion_export",
+        name="results_export_productversion"),
 )
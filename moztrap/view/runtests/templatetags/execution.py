@@ -162,3 +162,30 @@ class SuitesFor(Tag):
 
 
 register.tag(SuitesFor)
+
+
+
+class PrefetchBugURLs(Tag):
+    """
+    Fetch bug URLs of all given objects (or their ``attr``) in one query.
+
+    Renders nothing; afterwards the ``bug_urls`` method of each object
+    returns without querying.
+
+    """
+    name = "prefetch_bug_urls"
+    options = Options(
+        Argument("objects"),
+        Argument("attr", required=False, default=None),
+        )
+
+
+    def render_tag(self, context, objects, attr):
+        """Prefetch bug URLs of ``objects`` (or their ``attr``)."""
+        if attr is not None:
+            objects = [getattr(o, attr) for o in objects]
+        model.prefetch_bug_urls(objects)
+        return u""
+
+
+register.tag(PrefetchBugURLs)
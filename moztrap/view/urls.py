@@ -36,6 +36,11 @@ urlpatterns = patterns(
     # results ----------------------------------------------------------------
     url(r"^results/", include("moztrap.view.results.urls")),
 
+    # lists ------------------------------------------------------------------
+    url(r"^lists/_filter_options/$",
+        "moztrap.view.lists.views.filter_options",
+        name="lists_filter_options"),
+
     # admin ------------------------------------------------------------------
     url(r"^admin/", include(admin.site.urls)),
 
@@ -0,0 +1,54 @@
+"""
+View decorators for reading from the database replica.
+
+See ``moztrap.routing``.
+
+"""
+from functools import wraps
+
+from django.core.urlresolvers import RegexURLPattern, RegexURLResolver
+
+from moztrap import routing
+
+
+
+SAFE_METHODS = set(["GET", "HEAD"])
+
+
+
+def read_only(view_func):
+    """GET and HEAD requests to the view read from the replica, if any."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            routing.mark_read_only()
+        return view_func(request, *args, **kwargs)
+
+    return _wrapped_view
+
+
+
+def read_only_urls(urlpatterns):
+    """Return copy of ``urlpatterns`` with all (included) views read-only."""
+    result = []
+    for pattern in urlpatterns:
+        if isinstance(pattern, RegexURLResolver):
+            result.append(
+                RegexURLResolver(
+                    pattern.regex.pattern,
+                    read_only_urls(pattern.url_patterns),
+                    pattern.default_kwargs,
+                    pattern.app_name,
+                    pattern.namespace,
+                    )
+                )
+        else:
+            result.append(
+                RegexURLPattern(
+                    pattern.regex.pattern,
+                    read_only(pattern.callback),
+                    pattern.default_args,
+                    pattern.name,
+                    )
+                )
+    return result
@@ -27,7 +27,8 @@ var MT = (function (MT, $) {
             initialFocus: true,
             inputsNeverRemoved: true,
             prefix: 'filter',
-            debounce: true
+            debounce: true,
+            lazyInputList: '.filter-group.lazy'
         });
         $('#clientfilter').customAutocomplete({
             textbox: '#text-filter',
@@ -96,6 +97,7 @@ var MT = (function (MT, $) {
             headerSelector: '.listordering',
             sectionSelector: '.col',
             sectionContentSelector: '.colcontent',
+            treeUrl: '?finder=tree',
             callback: function () {
                 $('.runsdrill .runenvselect').slideUp('fast');
             },
@@ -117,6 +119,7 @@ var MT = (function (MT, $) {
             headerSelector: '.listordering',
             sectionSelector: '.col',
             sectionContentSelector: '.colcontent',
+            treeUrl: '?finder=tree',
             numberCols: 4
         });
         $('.resultsdrill').html5finder({
@@ -126,6 +129,7 @@ var MT = (function (MT, $) {
             headerSelector: '.listordering',
             sectionSelector: '.col',
             sectionContentSelector: '.colcontent',
+            treeUrl: '?finder=tree',
             numberCols: 4
         });
 
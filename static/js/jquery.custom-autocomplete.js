@@ -105,6 +105,47 @@
                 });
             },
 
+            // Fetch inputs of lazily-loaded lists matching typed text, add them
+            // (unselected) to their lists, then update suggestions again
+            fetchLazyInputs = function (text) {
+                inputList.filter(options.lazyInputList).each(function () {
+                    var group = $(this),
+                        url = group.data('options-url'),
+                        data = {text: text},
+                        cacheKey = url + '&' + $.param(data),
+                        addInputs = function (response) {
+                            $.each(response.options, function (i, option) {
+                                var index;
+                                if (!group.find(options.inputs + '[value="' + option.value + '"]').length) {
+                                    index = group.find(options.inputs).length + 1;
+                                    group.children('ul').append(ich.autocomplete_input({
+                                        typeName: group.data('name'),
+                                        inputName: option.label,
+                                        id: option.value,
+                                        index: index,
+                                        prefix: prefix,
+                                        pinable: options.pinable
+                                    }));
+                                }
+                            });
+                            inputs = inputList.add(newInputList).find(options.inputs);
+                            if (typedText === text) {
+                                updateSuggestions();
+                            }
+                        };
+                    if (cache[cacheKey]) {
+                        addInputs(cache[cacheKey]);
+                    } else {
+                        ajaxCalls = ajaxCalls + 1;
+                        $.get(url, data, function (response) {
+                            ajaxResponses = ajaxResponses + 1;
+                            cache[cacheKey] = response;
+                            addInputs(response);
+                        });
+                    }
+                });
+            },
+
             // Create list of autocomplete suggestions from Ajax response or existing list of inputs
             updateSuggestions = function (data, cached) {
                 var extraDataName, suggestions;
@@ -252,6 +293,9 @@
                                 }
                             } else {
                                 updateSuggestions();
+                                if (options.lazyInputList) {
+                                    fetchLazyInputs(typedText);
+                                }
                             }
                         } else {
                             suggestionList.empty().hide();
@@ -614,7 +658,9 @@
         noInputsNote: false,                            // Set ``true`` to add "none" when no there are no inputs
         extraDataName: null,                            // Additional key to be sent with ajax-request
         extraDataFn: null,                              // Function which returns additional value to be sent with ajax-request
-        pinable: true                                   // Whether the result template supports pinning, as in a pinable filter.
+        pinable: true,                                  // Whether the result template supports pinning, as in a pinable filter.
+        lazyInputList: null                             // Selector for lists (within ``inputList``) whose inputs are fetched
+                                                        //      on demand from their data-options-url
     };
 
 }(jQuery));
\ No newline at end of file
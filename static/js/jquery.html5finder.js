@@ -27,6 +27,18 @@
                 $(this).css('right', scrollbarWidth);
             }),
 
+            // Rendered child items keyed by sub-url, from the optional tree
+            prefetched = {},
+
+            storeTree = function (nodes) {
+                $.each(nodes, function (i, node) {
+                    if (node.children_html !== undefined) {
+                        prefetched[node.children_url] = node.children_html;
+                        storeTree(node.children);
+                    }
+                });
+            },
+
             // We want to be able to treat already-selected items differently
             markSelected = function () {
                 context.find(options.selected).data('selected', true);
@@ -70,21 +82,27 @@
                                 options.lastChildCallback(this);
                             }
                         } else {
-                            // Add a loading screen while waiting for the Ajax call to return data
-                            if (options.loading === true) {
-                                target.loadingOverlay();
-                            }
-                            // Add returned data to the next section
-                            $.get(
-                                ajaxUrl,
-                                function (response) {
-                                    container.next(options.sectionSelector).children(options.sectionContentSelector).html(response.html);
-                                    container.next(options.sectionSelector).loadingOverlay('remove');
+                            if (prefetched[ajaxUrl] === undefined) {
+                                // Add a loading screen while waiting for the Ajax call to return data
+                                if (options.loading === true) {
+                                    target.loadingOverlay();
                                 }
-                            );
+                                // Add returned data to the next section
+                                $.get(
+                                    ajaxUrl,
+                                    function (response) {
+                                        container.next(options.sectionSelector).children(options.sectionContentSelector).html(response.html);
+                                        container.next(options.sectionSelector).loadingOverlay('remove');
+                                    }
+                                );
+                            }
                             container.removeClass('focus').prevAll(options.sectionSelector).removeClass('focus');
                             container.next(options.sectionSelector).addClass('focus').children('ul').empty();
                             container.next(options.sectionSelector).nextAll(options.sectionSelector).removeClass('focus').children('ul').empty();
+                            // Children already in the tree need no Ajax call
+                            if (prefetched[ajaxUrl] !== undefined) {
+                                target.children(options.sectionContentSelector).html(prefetched[ajaxUrl]);
+                            }
                             horzScroll();
                             if (options.callback) {
                                 options.callback();
@@ -98,6 +116,12 @@
         context.find('.finder').data('cols', options.numberCols);
         markSelected();
 
+        if (options.treeUrl) {
+            $.get(options.treeUrl, function (response) {
+                storeTree(response.tree);
+            });
+        }
+
         // Enable headers to engage section focus, and sort column if section already has focus
         // Sorting requires jQuery Element Sorter plugin ( http://plugins.jquery.com/project/ElementSort )
         headers.on('click', options.sortLinkSelector, function (e) {
@@ -152,7 +176,8 @@
         itemSelector: '.finderinput',       // Selector for items in each section
         callback: null,                     // Callback function, currently runs after input in any section (except lastChild) is selected
         lastChildCallback: null,            // Callback function, currently runs after input in last section is selected
-        sortLinkSelector: '.sortlink'       // Selector for link (in header) to sort items in that column
+        sortLinkSelector: '.sortlink',      // Selector for link (in header) to sort items in that column
+        treeUrl: null                       // URL of JSON tree of items; children found in it are shown without an Ajax call
 
     };
 }(jQuery));
\ No newline at end of file
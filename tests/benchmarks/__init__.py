@@ -0,0 +1,7 @@
+"""
+Model-layer benchmarks of MozTrap hot paths.
+
+Run them with ``./manage.py benchmark``; see ``moztrap.debug.benchmark`` for
+the framework, and the ``BENCHMARK_MODULES`` setting for the registry.
+
+"""
@@ -0,0 +1,42 @@
+"""
+Benchmarks of permission checks.
+
+"""
+from moztrap import model
+from moztrap.debug.benchmark import Benchmark
+
+
+
+# permissions checked in turn, as on a typical manage page
+PERMISSIONS = [
+    "library.manage_cases",
+    "library.manage_suites",
+    "execution.manage_runs",
+    "core.manage_products",
+    "execution.execute",
+    ]
+
+
+
+class HasPerm(Benchmark):
+    """Check a user's permissions in a new request (fresh user instance)."""
+    name = "auth.has_perm"
+    params = [10, 100]
+
+
+    def setup(self, checks):
+        role = model.Role.objects.create(name="benchmark")
+        role.permissions.add(*model.Permission.objects.filter(
+                content_type__app_label__in=["library", "execution"]))
+        user = model.User.objects.create(username="benchmark")
+        user.roles.add(role)
+        # an earlier request resolved this user's permissions
+        model.User.objects.get(pk=user.pk).has_perm(PERMISSIONS[0])
+        return (user.pk, checks)
+
+
+    def run(self, state):
+        user_id, checks = state
+        user = model.User.objects.get(pk=user_id)
+        for i in range(checks):
+            user.has_perm(PERMISSIONS[i % len(PERMISSIONS)])
@@ -0,0 +1,39 @@
+"""
+Benchmarks of products and product versions.
+
+"""
+from moztrap.debug.benchmark import Benchmark
+
+from .data import generate
+
+
+
+class ProductVersionClone(Benchmark):
+    """Clone a product version, with its environments."""
+    name = "productversion.clone"
+    params = [8, 64]
+
+
+    def setup(self, environments):
+        # environments are the cartesian product of categories of 2 elements
+        categories = {8: 3, 64: 6}.get(environments, 3)
+        return generate(cases=100, categories=categories, steps=1)
+
+
+    def run(self, productversion):
+        productversion.clone()
+
+
+
+class ReorderVersions(Benchmark):
+    """Reorder versions of a product, updating latest case versions."""
+    name = "product.reorder_versions"
+    params = [5, 20]
+
+
+    def setup(self, versions):
+        return generate(versions=versions, cases=100, steps=1).product
+
+
+    def run(self, product):
+        product.reorder_versions()
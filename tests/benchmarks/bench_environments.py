@@ -0,0 +1,34 @@
+"""
+Benchmarks of environment profiles.
+
+"""
+from moztrap import model
+from moztrap.debug.benchmark import Benchmark
+
+from .data import generate
+
+
+
+class AddEnvs(Benchmark):
+    """Add environments to a product version, cascading to cases and runs."""
+    name = "environments.add_envs"
+    params = [100, 1000]
+
+
+    def setup(self, cases):
+        productversion = generate(cases=cases, runs=2, steps=1)
+        element = model.Element.objects.create(
+            name="New element",
+            category=model.Category.objects.create(name="New category"),
+            )
+        environments = []
+        for i in range(3):
+            env = model.Environment.objects.create()
+            env.elements.add(element)
+            environments.append(env)
+        return productversion, environments
+
+
+    def run(self, state):
+        productversion, environments = state
+        productversion.add_envs(*environments)
@@ -0,0 +1,72 @@
+"""
+Benchmarks of runs: activation, refresh, and result summaries.
+
+"""
+from moztrap import model
+from moztrap.debug.benchmark import Benchmark
+
+from .data import generate, draft_run
+
+
+
+class RunActivate(Benchmark):
+    """Activate a draft run, locking in its case versions."""
+    name = "run.activate"
+    params = [1000, 10000, 50000]
+
+
+    def setup(self, cases):
+        return draft_run(generate(cases=cases, steps=1, tags=0))
+
+
+    def run(self, run):
+        run.activate()
+
+
+
+class RunRefresh(Benchmark):
+    """Refresh an active run whose suites haven't changed."""
+    name = "run.refresh"
+    params = [1000, 10000, 50000]
+
+
+    def setup(self, cases):
+        run = draft_run(generate(cases=cases, steps=1, tags=0))
+        run.activate()
+        return run
+
+
+    def run(self, run):
+        run.refresh()
+
+
+
+class RunResultSummary(Benchmark):
+    """Summarize result states of a run."""
+    name = "run.result_summary"
+    params = [10000, 100000]
+
+
+    def setup(self, results):
+        generate(cases=500, runs=1, results=results, steps=1, tags=0)
+        return model.Run.objects.order_by("-id")[0]
+
+
+    def run(self, run):
+        run.result_summary()
+
+
+
+class RunCompletion(Benchmark):
+    """Compute completion of a run."""
+    name = "run.completion"
+    params = [10000, 100000]
+
+
+    def setup(self, results):
+        generate(cases=500, runs=1, results=results, steps=1, tags=0)
+        return model.Run.objects.order_by("-id")[0]
+
+
+    def run(self, run):
+        run.completion()
@@ -0,0 +1,41 @@
+"""
+Benchmarks of the case library: importing cases.
+
+"""
+from moztrap.debug.benchmark import Benchmark
+from moztrap.model.library.importer import CaseImporter
+
+from .data import generate
+
+
+
+class ImportCases(Benchmark):
+    """Import cases, each with steps, tags and a suite."""
+    name = "library.import_cases"
+    params = [100, 1000]
+
+
+    def setup(self, cases):
+        productversion = generate(cases=0, suites=0, tags=0)
+        case_data = [
+            {
+                "name": "Imported case {0}".format(i),
+                "description": "Imported case description",
+                "tags": ["tag{0}".format(i % 10), "imported"],
+                "suites": ["Imported suite {0}".format(i % 5)],
+                "steps": [
+                    {
+                        "instruction": "Step {0}".format(n),
+                        "expected": "Expected {0}".format(n),
+                        }
+                    for n in range(3)
+                    ],
+                }
+            for i in range(cases)
+            ]
+        return CaseImporter(productversion), case_data
+
+
+    def run(self, state):
+        importer, case_data = state
+        importer.import_cases(case_data)
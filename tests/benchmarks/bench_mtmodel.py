@@ -0,0 +1,39 @@
+"""
+Benchmarks of soft delete and undelete cascades.
+
+"""
+from moztrap.debug.benchmark import Benchmark
+
+from .data import generate
+
+
+
+class SoftDelete(Benchmark):
+    """Soft-delete a product, cascading to everything in it."""
+    name = "mtmodel.delete"
+    params = [100, 1000]
+
+
+    def setup(self, cases):
+        return generate(cases=cases, runs=1, results=cases * 5).product
+
+
+    def run(self, product):
+        product.delete()
+
+
+
+class Undelete(Benchmark):
+    """Undelete a soft-deleted product, cascading to everything in it."""
+    name = "mtmodel.undelete"
+    params = [100, 1000]
+
+
+    def setup(self, cases):
+        product = generate(cases=cases, runs=1, results=cases * 5).product
+        product.delete()
+        return product
+
+
+    def run(self, product):
+        product.undelete()
@@ -0,0 +1,31 @@
+"""
+Shared dataset helpers for benchmarks.
+
+"""
+from moztrap import model
+from moztrap.model.scaledata import ScaleDataGenerator
+
+
+
+def generate(**kwargs):
+    """
+    Generate a dataset with given dimensions; return its last product version.
+
+    Dimensions default to a single product version with no runs.
+
+    """
+    dims = dict(versions=1, runs=0, results=0, categories=2, elements=2)
+    dims.update(kwargs)
+    ScaleDataGenerator(**dims).generate()
+    return model.ProductVersion.objects.order_by("-id")[0]
+
+
+
+def draft_run(productversion):
+    """Return a draft run of all suites of ``productversion``."""
+    run = model.Run.objects.create(
+        productversion=productversion, name="Benchmark run")
+    for suite in model.Suite.objects.filter(
+            product=productversion.product_id):
+        model.RunSuite.objects.create(run=run, suite=suite)
+    return run
@@ -0,0 +1,95 @@
+"""
+Tests for cache backends.
+
+"""
+import os
+import shutil
+from tempfile import mkdtemp
+
+from tests import case
+
+
+
+class SQLiteCacheTest(case.TestCase):
+    def setUp(self):
+        """Create a cache in a temporary directory."""
+        from moztrap.cache.backends import SQLiteCache
+        tmpdir = mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.path = os.path.join(tmpdir, "cache.sqlite")
+        self.cache = SQLiteCache(self.path, {})
+
+
+    def other(self):
+        """Return another cache instance on the same file."""
+        from moztrap.cache.backends import SQLiteCache
+        return SQLiteCache(self.path, {})
+
+
+    def test_set_get(self):
+        """Values are pickled, and shared between cache instances."""
+        self.cache.set("a", {"b": [1, 2]})
+
+        self.assertEqual(self.other().get("a"), {"b": [1, 2]})
+        self.assertEqual(self.cache.get("missing", "default"), "default")
+
+
+    def test_expired(self):
+        """Expired values aren't returned."""
+        self.cache.set("a", 1, -1)
+
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertFalse(self.cache.has_key("a"))
+
+
+    def test_add(self):
+        """Add only sets missing (or expired) keys."""
+        self.assertTrue(self.cache.add("a", 1))
+        self.assertFalse(self.other().add("a", 2))
+        self.cache.set("b", 1, -1)
+        self.assertTrue(self.cache.add("b", 2))
+
+        self.assertEqual(self.cache.get_many(["a", "b"]), {"a": 1, "b": 2})
+
+
+    def test_incr(self):
+        """Incr and decr change stored value; ValueError if missing."""
+        self.cache.set("a", 1)
+
+        self.assertEqual(self.other().incr("a"), 2)
+        self.assertEqual(self.cache.decr("a", 2), 0)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+
+    def test_delete_clear(self):
+        """Delete removes one key, clear all."""
+        self.cache.set_many({"a": 1, "b": 2, "c": 3})
+
+        self.cache.delete("a")
+        self.assertEqual(self.cache.get_many(["a", "b"]), {"b": 2})
+        self.cache.clear()
+        self.assertEqual(self.cache.get("b"), None)
+
+
+    def test_versions(self):
+        """Key versions are distinct keys."""
+        self.cache.set("a", 1, version=1)
+        self.cache.set("a", 2, version=2)
+
+        self.assertEqual(self.cache.get("a", version=1), 1)
+        self.assertEqual(self.cache.get("a", version=2), 2)
+
+
+    def test_cull(self):
+        """Entries beyond max_entries are culled."""
+        from moztrap.cache.backends import SQLiteCache
+        cache = SQLiteCache(
+            self.path, {"OPTIONS": {"MAX_ENTRIES": 5, "CULL_FREQUENCY": 1}})
+
+        for i in range(10):
+            cache.set("k{0}".format(i), i)
+
+        count = cache._connection().execute(
+            "SELECT COUNT(*) FROM cache").fetchone()[0]
+        self.assertLessEqual(count, 6)
@@ -0,0 +1,332 @@
+"""
+Tests for caching of model data with generation-based invalidation.
+
+"""
+import os
+import tempfile
+
+from django.db import transaction
+from django.test.utils import override_settings
+
+from mock import patch
+
+from tests import case
+
+
+
+class CacheTestCase(case.DBTestCase):
+    @property
+    def cache(self):
+        """The module under test."""
+        from moztrap import cache
+        return cache
+
+
+
+class GenerationTest(CacheTestCase):
+    def test_stable(self):
+        """Generation doesn't change without writes."""
+        gen = self.cache.generation(self.model.Product)
+
+        self.assertEqual(self.cache.generation(self.model.Product), gen)
+
+
+    def test_create(self):
+        """Creating an instance bumps its model's generation."""
+        gen = self.cache.generation(self.model.Product)
+
+        self.F.ProductFactory.create()
+
+        self.assertGreater(self.cache.generation(self.model.Product), gen)
+
+
+    def test_update(self):
+        """Saving an existing instance bumps its model's generation."""
+        p = self.F.ProductFactory.create()
+        gen = self.cache.generation(self.model.Product)
+
+        p.name = "Other"
+        p.save()
+
+        self.assertGreater(self.cache.generation(self.model.Product), gen)
+
+
+    def test_queryset_update(self):
+        """Queryset update bumps the model's generation."""
+        self.F.ProductFactory.create()
+        gen = self.cache.generation(self.model.Product)
+
+        self.model.Product.objects.update(name="Other")
+
+        self.assertGreater(self.cache.generation(self.model.Product), gen)
+
+
+    def test_soft_delete(self):
+        """Soft-delete and undelete bump generations, including cascade."""
+        pv = self.F.ProductVersionFactory.create()
+        gens = self.cache.generations(
+            self.model.Product, self.model.ProductVersion)
+
+        pv.product.delete()
+        deleted = self.cache.generations(
+            self.model.Product, self.model.ProductVersion)
+        self.model.Product.everything.get(pk=pv.product.pk).undelete()
+        undeleted = self.cache.generations(
+            self.model.Product, self.model.ProductVersion)
+
+        self.assertTrue(all(d > g for d, g in zip(deleted, gens)))
+        self.assertTrue(all(u > d for u, d in zip(undeleted, deleted)))
+
+
+    def test_m2m(self):
+        """Changing a many-to-many bumps both sides."""
+        env = self.F.EnvironmentFactory.create()
+        el = self.F.ElementFactory.create()
+        gens = self.cache.generations(
+            self.model.Environment, self.model.Element)
+
+        env.elements.add(el)
+
+        new = self.cache.generations(
+            self.model.Environment, self.model.Element)
+        self.assertTrue(all(n > g for n, g in zip(new, gens)))
+
+
+    def test_bulk_create(self):
+        """MozTrap bulk_create bumps the model's generation."""
+        gen = self.cache.generation(self.model.Product)
+
+        self.model.Product.objects.bulk_create(
+            [self.model.Product(name="Foo")])
+
+        self.assertGreater(self.cache.generation(self.model.Product), gen)
+
+
+    def test_evicted(self):
+        """An evicted counter restarts above any previously used value."""
+        gen = self.cache.generation(self.model.Product)
+        self.cache.model_cache().clear()
+
+        with patch("time.time") as mock_time:
+            mock_time.return_value = 1e10
+            self.assertGreater(
+                self.cache.generation(self.model.Product), gen)
+
+
+
+    def test_bumped_again_on_commit(self):
+        """Written models are bumped again when the transaction commits."""
+        self.cache.bump(self.model.Product)
+        gen = self.cache.generation(self.model.Product)
+
+        self.cache.committed()
+
+        self.assertGreater(self.cache.generation(self.model.Product), gen)
+
+
+    def test_not_bumped_again_on_rollback(self):
+        """A rolled-back transaction's writes are not bumped again."""
+        self.cache.bump(self.model.Product)
+        self.cache.rolled_back()
+        gen = self.cache.generation(self.model.Product)
+
+        self.cache.committed()
+
+        self.assertEqual(self.cache.generation(self.model.Product), gen)
+
+
+
+class CommitTest(case.TransactionTestCase):
+    """Tests for bumping generations when transactions commit."""
+    def test_commit(self):
+        """A write's generation is bumped again after its commit."""
+        from moztrap import cache
+        gens = []
+
+        @transaction.commit_on_success
+        def write():
+            self.F.ProductFactory.create()
+            gens.append(cache.generation(self.model.Product))
+
+        write()
+
+        self.assertGreater(cache.generation(self.model.Product), gens[0])
+
+
+
+class ModelCacheTest(case.TestCase):
+    """Tests for the choice of model cache backend."""
+    @property
+    def cache(self):
+        """The module under test."""
+        from moztrap import cache
+        return cache
+
+
+    def assertCaches(self, backend, caches=True):
+        """Assert that ``backend`` does (or doesn't) cache anything."""
+        backend.set("k", 1)
+        self.assertEqual(backend.get("k"), 1 if caches else None)
+
+
+    @override_settings(MODEL_CACHE="model", MODEL_CACHE_PROCESS_LOCAL=False)
+    def test_process_local(self):
+        """A process-local cache isn't used unless explicitly allowed."""
+        self.assertCaches(self.cache.load_model_cache(), False)
+
+
+    @override_settings(MODEL_CACHE="model", MODEL_CACHE_PROCESS_LOCAL=True)
+    def test_process_local_allowed(self):
+        self.assertCaches(self.cache.load_model_cache())
+
+
+    @override_settings(MODEL_CACHE=None)
+    def test_none(self):
+        self.assertCaches(self.cache.load_model_cache(), False)
+
+
+    def test_shared(self):
+        """A cache shared between processes is used."""
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        caches = {
+            "shared": {
+                "BACKEND": "moztrap.cache.backends.SQLiteCache",
+                "LOCATION": path,
+                },
+            }
+
+        with override_settings(CACHES=caches, MODEL_CACHE="shared"):
+            self.assertCaches(self.cache.load_model_cache())
+
+
+
+class CachedTest(CacheTestCase):
+    def test_cached(self):
+        """Computed once, until a dependency changes."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        first = self.cache.cached("n", [self.model.Product], compute)
+        second = self.cache.cached("n", [self.model.Product], compute)
+        self.F.ProductFactory.create()
+        third = self.cache.cached("n", [self.model.Product], compute)
+
+        self.assertEqual((first, second, third), (1, 1, 2))
+
+
+    def test_none(self):
+        """None is cached like any other value."""
+        calls = []
+
+        self.cache.cached("none", [], lambda: calls.append(1))
+        self.cache.cached("none", [], lambda: calls.append(1))
+
+        self.assertEqual(len(calls), 1)
+
+
+    @override_settings(DATABASE_REPLICA="replica")
+    def test_not_stored_from_replica(self):
+        """Values computed while reading from a replica are not stored."""
+        from moztrap import routing
+        calls = []
+        routing.begin()
+        self.addCleanup(routing.reset)
+        routing.mark_read_only()
+
+        self.cache.cached("r", [], lambda: calls.append(1))
+        routing.reset()
+        self.cache.cached("r", [], lambda: calls.append(1))
+        self.cache.cached("r", [], lambda: calls.append(1))
+
+        self.assertEqual(len(calls), 2)
+
+
+    def test_parts(self):
+        """Values with different parts are cached separately."""
+        a = self.cache.cached("p", [], lambda: "a", parts=[1])
+        b = self.cache.cached("p", [], lambda: "b", parts=[2])
+
+        self.assertEqual((a, b), ("a", "b"))
+
+
+    def test_instance_key(self):
+        """Instance keys change when the instance is saved."""
+        p = self.F.ProductFactory.create()
+        key = self.cache.instance_key("x", p)
+
+        p.save()
+
+        self.assertNotEqual(self.cache.instance_key("x", p), key)
+        self.assertEqual(
+            self.cache.instance_key("x", p), self.cache.instance_key("x", p))
+
+
+    def test_fragment_key(self):
+        """Fragment keys change with any of their instances or values."""
+        p = self.F.ProductFactory.create()
+        t = self.F.TagFactory.create()
+        key = self.cache.fragment_key("x", [p, [t], True])
+
+        self.assertEqual(self.cache.fragment_key("x", [p, [t], True]), key)
+        self.assertNotEqual(self.cache.fragment_key("x", [p, [t], False]), key)
+        self.assertNotEqual(self.cache.fragment_key("y", [p, [t], True]), key)
+        t.save()
+        self.assertNotEqual(self.cache.fragment_key("x", [p, [t], True]), key)
+
+
+    def test_fragment_key_models(self):
+        """Fragment keys change with the generations of given models."""
+        key = self.cache.fragment_key("x", [], [self.model.Product])
+
+        self.F.ProductFactory.create()
+
+        self.assertNotEqual(
+            self.cache.fragment_key("x", [], [self.model.Product]), key)
+
+
+    def test_fragment_key_unversioned(self):
+        """Instances without a version are keyed by their model generation."""
+        u = self.F.UserFactory.create()
+        key = self.cache.fragment_key("x", [u])
+
+        self.F.UserFactory.create()
+
+        self.assertNotEqual(self.cache.fragment_key("x", [u]), key)
+
+
+    def test_cached_list(self):
+        """Queryset results are cached until the model changes."""
+        self.F.ProductFactory.create(name="One")
+        qs = self.model.Product.objects.order_by("name")
+
+        self.assertEqual([p.name for p in self.cache.cached_list(qs)], ["One"])
+        with self.assertNumQueries(0):
+            self.cache.cached_list(qs)
+        self.F.ProductFactory.create(name="Two")
+        self.assertEqual(
+            [p.name for p in self.cache.cached_list(qs)], ["One", "Two"])
+
+
+
+class OrderedElementsTest(CacheTestCase):
+    def test_cached(self):
+        """Environment elements are cached until elements change."""
+        env = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux"], "Browser": ["Firefox"]})[0]
+
+        self.assertEqual(
+            [e.name for e in env.ordered_elements()], ["Firefox", "Linux"])
+        with self.assertNumQueries(0):
+            list(env.ordered_elements())
+
+        el = env.elements.get(name="Linux")
+        el.name = "Windows"
+        el.save()
+
+        self.assertEqual(
+            [e.name for e in env.ordered_elements()], ["Firefox", "Windows"])
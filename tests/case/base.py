@@ -25,6 +25,13 @@ class DBMixin(object):
         return factories
 
 
+    def _pre_setup(self):
+        """Clear cached model data; it may refer to rolled-back rows."""
+        super(DBMixin, self)._pre_setup()
+        from moztrap import cache
+        cache.model_cache().clear()
+
+
     def refresh(self, obj):
         """
         Return the given object as it currently exists in the database.
@@ -0,0 +1,303 @@
+"""
+Tests for the benchmark framework, and smoke tests of the benchmarks.
+
+"""
+from cStringIO import StringIO
+import json
+import os
+from tempfile import mkstemp
+
+from django.core.management import call_command
+from django.db import connection
+
+from mock import patch
+
+from tests import case
+
+
+
+class CountProducts(object):
+    """Trivial benchmark for tests; made a Benchmark subclass in tests."""
+    name = "test.count"
+    params = [1, 2]
+
+
+    def setup(self, n):
+        from tests import factories as F
+        for i in range(n):
+            F.ProductFactory.create()
+        return n
+
+
+    def run(self, n):
+        from moztrap import model
+        list(model.Product.objects.all())
+        list(model.Product.objects.all())
+
+
+
+class BenchmarkTestCase(case.DBTestCase):
+    @property
+    def base(self):
+        """The module under test."""
+        from moztrap.debug import benchmark
+        return benchmark
+
+
+    def benchmark(self):
+        """Return an instance of the trivial benchmark."""
+        cls = type("CountProducts", (CountProducts, self.base.Benchmark), {})
+        return cls()
+
+
+
+class MeasureTest(BenchmarkTestCase):
+    def test_measure(self):
+        """Reports timings and query count."""
+        result = self.base.measure(self.benchmark(), 1, repeat=2)
+
+        self.assertEqual(result["queries"], 2)
+        self.assertTrue(result["seconds"] <= result["median"])
+        self.assertTrue(result["db_seconds"] <= result["seconds"])
+
+
+    def test_error(self):
+        """Exceptions are reported as errors."""
+        b = self.benchmark()
+        b.run = lambda state: 1 / 0
+
+        result = self.base.measure(b, 1)
+
+        self.assertEqual(
+            result,
+            {"error": "ZeroDivisionError: integer division or modulo by zero"},
+            )
+
+
+    def test_run_benchmarks(self):
+        """Runs all params (or just the first, if quick) and reports them."""
+        reported = []
+
+        results = self.base.run_benchmarks(
+            [self.benchmark()],
+            repeat=1,
+            report=lambda key, result: reported.append(key),
+            )
+
+        self.assertEqual(sorted(results), ["test.count[1]", "test.count[2]"])
+        self.assertEqual(sorted(reported), sorted(results))
+        self.assertEqual(
+            list(self.base.run_benchmarks([self.benchmark()], quick=True)),
+            ["test.count[1]"],
+            )
+
+
+    def test_key_no_param(self):
+        """Key of a benchmark without params is its name."""
+        self.assertEqual(self.benchmark().key(None), "test.count")
+
+
+
+class CompareTest(BenchmarkTestCase):
+    def result(self, seconds, queries=10):
+        return {"seconds": seconds, "queries": queries}
+
+
+    def test_slower(self):
+        """More than threshold slower is a regression."""
+        self.assertEqual(
+            self.base.compare(
+                {"a": self.result(1.0), "b": self.result(1.0)},
+                {"a": self.result(1.3), "b": self.result(1.1)},
+                threshold=0.2,
+                ),
+            ["a: 1.0000s -> 1.3000s (+30%)"],
+            )
+
+
+    def test_noise(self):
+        """Tiny absolute differences are ignored."""
+        self.assertEqual(
+            self.base.compare(
+                {"a": self.result(0.001)}, {"a": self.result(0.003)}),
+            [],
+            )
+
+
+    def test_queries(self):
+        """Any increase in queries is a regression."""
+        self.assertEqual(
+            self.base.compare(
+                {"a": self.result(1.0, 10)}, {"a": self.result(1.0, 11)}),
+            ["a: 10 -> 11 queries"],
+            )
+
+
+    def test_missing_or_error(self):
+        """Benchmarks missing from baseline, or with errors, are skipped."""
+        self.assertEqual(
+            self.base.compare(
+                {"b": {"error": "oops"}},
+                {"a": self.result(2.0), "b": self.result(2.0)},
+                ),
+            [],
+            )
+
+
+
+class BenchmarksSmokeTest(BenchmarkTestCase):
+    """Run every benchmark once against a tiny dataset."""
+    # small param for each benchmark
+    PARAMS = {
+        "auth.has_perm": 2,
+        "environments.add_envs": 2,
+        "library.import_cases": 2,
+        "mtmodel.delete": 2,
+        "mtmodel.undelete": 2,
+        "product.reorder_versions": 2,
+        "productversion.clone": 8,
+        "run.activate": 2,
+        "run.refresh": 2,
+        "run.completion": 10,
+        "run.result_summary": 10,
+        }
+
+    # these rely on MySQL-specific SQL
+    MYSQL_ONLY = ["run.activate", "run.refresh"]
+
+
+    def test_all_benchmarks_covered(self):
+        """Every benchmark has a smoke-test param."""
+        self.assertEqual(
+            sorted(b.name for b in self.base.load_benchmarks()),
+            sorted(self.PARAMS),
+            )
+
+
+    def test_load_by_prefix(self):
+        """Benchmarks can be selected by name prefix."""
+        self.assertEqual(
+            [b.name for b in self.base.load_benchmarks(["run.a", "mtmodel"])],
+            ["mtmodel.delete", "mtmodel.undelete", "run.activate"],
+            )
+
+
+    def test_benchmarks(self):
+        """No benchmark errors."""
+        for benchmark in self.base.load_benchmarks():
+            if (benchmark.name in self.MYSQL_ONLY and
+                    connection.vendor != "mysql"):
+                continue
+            result = self.base.measure(
+                benchmark, self.PARAMS[benchmark.name], repeat=1)
+            self.assertNotIn("error", result, benchmark.name)
+
+
+
+@patch("django.db.connection.creation.destroy_test_db")
+@patch("django.db.connection.creation.create_test_db")
+class BenchmarkCommandTest(BenchmarkTestCase):
+    """Tests for benchmark management command."""
+    def call_command(self, *args, **kwargs):
+        """Runs the command with trivial benchmark; returns output."""
+        target = ("moztrap.model.core.management.commands.benchmark"
+                  ".load_benchmarks")
+        with patch(target) as load_benchmarks:
+            load_benchmarks.return_value = [self.benchmark()]
+            if kwargs.pop("no_benchmarks", False):
+                load_benchmarks.return_value = []
+            if kwargs.pop("missing", False):
+                load_benchmarks.side_effect = ImportError("No module named x")
+            with patch("sys.stdout", StringIO()) as stdout:
+                with patch("sys.stderr", StringIO()) as stderr:
+                    with patch("sys.exit"):
+                        call_command("benchmark", *args, **kwargs)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return (stdout.read(), stderr.read())
+
+
+    def tempfile(self, contents=None):
+        """Return path of a temporary file, removed after the test."""
+        fd, path = mkstemp(suffix=".json")
+        if contents is not None:
+            os.write(fd, contents)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return path
+
+
+    def test_report(self, create_test_db, destroy_test_db):
+        """Reports each benchmark, in a test database."""
+        stdout, stderr = self.call_command(repeat=1)
+
+        lines = stdout.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("test.count[1]: "))
+        self.assertIn("(2 queries, ", lines[0])
+        self.assertTrue(create_test_db.called)
+        self.assertTrue(destroy_test_db.called)
+
+
+    def test_output(self, create_test_db, destroy_test_db):
+        """Writes JSON results with metadata."""
+        path = self.tempfile()
+
+        self.call_command(repeat=1, quick=True, output=path)
+
+        with open(path) as fh:
+            data = json.load(fh)
+        self.assertEqual(list(data["results"]), ["test.count[1]"])
+        self.assertEqual(data["meta"]["database"], connection.vendor)
+
+
+    def test_compare_ok(self, create_test_db, destroy_test_db):
+        """No regressions against a slower baseline."""
+        path = self.tempfile(json.dumps({"results": {
+                        "test.count[1]": {"seconds": 100, "queries": 2}}}))
+
+        stdout, stderr = self.call_command(repeat=1, quick=True, compare=path)
+
+        self.assertTrue(stdout.endswith("No regressions.\n"))
+        self.assertEqual(stderr, "")
+
+
+    def test_compare_regression(self, create_test_db, destroy_test_db):
+        """Error on regression."""
+        path = self.tempfile(json.dumps({"results": {
+                        "test.count[1]": {"seconds": 100, "queries": 1}}}))
+
+        stdout, stderr = self.call_command(repeat=1, quick=True, compare=path)
+
+        self.assertEqual(
+            stderr, "Error: 1 regressions:\ntest.count[1]: 1 -> 2 queries\n")
+
+
+    def test_compare_bad_file(self, create_test_db, destroy_test_db):
+        """Error if baseline can't be read."""
+        path = self.tempfile("not json")
+
+        stdout, stderr = self.call_command(compare=path)
+
+        self.assertTrue(stderr.startswith("Error: Could not read results"))
+        self.assertFalse(create_test_db.called)
+
+
+    def test_no_benchmarks(self, create_test_db, destroy_test_db):
+        """Error if no benchmarks match."""
+        stdout, stderr = self.call_command("foo", no_benchmarks=True)
+
+        self.assertEqual(stderr, "Error: No benchmarks match foo.\n")
+
+
+
+    def test_missing_modules(self, create_test_db, destroy_test_db):
+        """Error if benchmark modules (e.g. tests) aren't deployed."""
+        stdout, stderr = self.call_command(missing=True)
+
+        self.assertEqual(
+            stderr,
+            "Error: Could not load BENCHMARK_MODULES: No module named x\n",
+            )
+        self.assertFalse(create_test_db.called)
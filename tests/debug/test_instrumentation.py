@@ -0,0 +1,142 @@
+"""
+Tests for request-scoped SQL and template instrumentation.
+
+"""
+from django.template import Template, Context
+
+from tests import case
+
+
+
+class InstrumentationTestCase(case.DBTestCase):
+    @property
+    def instrumentation(self):
+        """The module under test."""
+        from moztrap.debug import instrumentation
+        return instrumentation
+
+
+    def setUp(self):
+        """Install instrumentation wrappers."""
+        super(InstrumentationTestCase, self).setUp()
+        self.instrumentation.install()
+        self.addCleanup(self.instrumentation.stop)
+
+
+
+class NormalizeTest(InstrumentationTestCase):
+    def test_literals(self):
+        """Strings, numbers and placeholders are replaced."""
+        self.assertEqual(
+            self.instrumentation.normalize(
+                "SELECT a FROM t WHERE b = 'it''s' AND c = 12 AND d = %s"),
+            "SELECT a FROM t WHERE b = ? AND c = ? AND d = ?",
+            )
+
+
+    def test_in_list(self):
+        """Lists of placeholders collapse."""
+        self.assertEqual(
+            self.instrumentation.normalize(
+                "SELECT a FROM t WHERE id IN (1, 2,\n 3)"),
+            self.instrumentation.normalize(
+                "SELECT a FROM t WHERE id IN (%s)"),
+            )
+
+
+    def test_identifiers(self):
+        """Digits within identifiers are kept."""
+        self.assertEqual(
+            self.instrumentation.normalize("SELECT T2.id FROM t T2"),
+            "SELECT T2.id FROM t T2",
+            )
+
+
+
+class RequestStatsTest(InstrumentationTestCase):
+    def test_queries(self):
+        """Queries are counted only while collecting."""
+        self.model.Product.objects.count()
+        stats = self.instrumentation.start()
+        self.model.Product.objects.count()
+        self.model.Product.objects.count()
+        self.model.Product.objects.filter(name="x").count()
+        self.instrumentation.stop()
+        self.model.Product.objects.count()
+
+        self.assertEqual(stats.queries, 3)
+        self.assertTrue(stats.db_time > 0)
+        self.assertTrue(stats.total_time >= stats.db_time)
+        dupes = stats.duplicates()
+        self.assertEqual(len(dupes), 1)
+        self.assertEqual(dupes[0]["count"], 2)
+
+
+    def test_slowest(self):
+        """Only the slowest statements are kept, slowest first."""
+        stats = self.instrumentation.RequestStats(keep_slowest=2)
+        for duration in [0.1, 0.3, 0.2]:
+            stats.record_query("default", "SELECT 1", (), duration)
+
+        self.assertEqual(
+            [s[0] for s in stats.slowest_statements()], [0.3, 0.2])
+
+
+    def test_template_time(self):
+        """Outermost template renders are timed."""
+        stats = self.instrumentation.start()
+        Template("{{ a }}").render(Context({"a": 1}))
+        self.instrumentation.stop()
+
+        self.assertTrue(stats.template_time > 0)
+        self.assertFalse(stats.rendering)
+
+
+    def test_fragments(self):
+        """Cached fragment hits and misses are counted and reported."""
+        stats = self.instrumentation.RequestStats()
+        stats.record_fragment(True)
+        stats.record_fragment(True)
+        stats.record_fragment(False)
+
+        self.assertEqual(stats.as_dict()["fragment_hits"], 2)
+        self.assertEqual(stats.as_dict()["fragment_misses"], 1)
+        self.assertIn('desc="2/3 fragments cached"', stats.server_timing())
+
+
+    def test_no_fragments(self):
+        """Without cached fragments, they are not in Server-Timing."""
+        stats = self.instrumentation.RequestStats()
+
+        self.assertNotIn("frag", stats.server_timing())
+
+
+    def test_replica_reads(self):
+        """Reads routed to the replica or primary are counted and reported."""
+        stats = self.instrumentation.RequestStats()
+        stats.record_read(True)
+        stats.record_read(False)
+
+        self.assertEqual(stats.as_dict()["replica_reads"], 1)
+        self.assertEqual(stats.as_dict()["primary_reads"], 1)
+        self.assertIn('desc="1/2 reads from replica"', stats.server_timing())
+
+
+    def test_explain(self):
+        """Query plans are returned for SELECTs only."""
+        self.assertTrue(
+            self.instrumentation.explain(
+                "default", "SELECT id FROM core_product WHERE id = %s", [1]))
+        self.assertIs(
+            self.instrumentation.explain(
+                "default", "UPDATE core_product SET name = %s", ["a"]),
+            None,
+            )
+
+
+    def test_explain_error(self):
+        """Query plan is None if EXPLAIN fails."""
+        self.assertIs(
+            self.instrumentation.explain("default", "SELECT nonsense", []),
+            None,
+            )
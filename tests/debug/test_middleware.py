@@ -1,3 +1,5 @@
+import json
+
 from django.core.exceptions import MiddlewareNotUsed
 
 from django.test.utils import override_settings
@@ -55,3 +57,157 @@ class AjaxTracebackMiddlewareTest(case.TestCase):
         request.is_ajax.return_value = False
 
         self.assertIs(m.process_exception(request), None)
+
+
+
+class InstrumentationMiddlewareTest(case.DBTestCase):
+    """Tests for InstrumentationMiddleware."""
+    @property
+    def middleware(self):
+        from moztrap.debug.middleware import InstrumentationMiddleware
+        return InstrumentationMiddleware
+
+
+    def request(self):
+        """Return a mock GET request."""
+        request = Mock()
+        request.method = "GET"
+        request.path = "/some/path/"
+        return request
+
+
+    def run_request(self, m, queries=2):
+        """Run a request issuing ``queries`` queries through middleware."""
+        from django.http import HttpResponse
+        from moztrap import model
+        request = self.request()
+        m.process_request(request)
+        for i in range(queries):
+            list(model.Product.objects.filter(name="p{0}".format(i)))
+        return m.process_response(request, HttpResponse("ok"))
+
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_not_used_when_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            self.middleware()
+
+
+    def test_server_timing(self):
+        """Response has Server-Timing header with query count."""
+        response = self.run_request(self.middleware(), queries=2)
+
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        self.assertIn('tpl;dur=', response["Server-Timing"])
+        self.assertIn('total;dur=', response["Server-Timing"])
+
+
+    def test_not_started(self):
+        """Response untouched if request wasn't instrumented."""
+        from django.http import HttpResponse
+        response = self.middleware().process_response(
+            self.request(), HttpResponse("ok"))
+
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+    @override_settings(INSTRUMENTATION_SLOW_REQUEST_MS=0)
+    def test_slow_request_logged(self):
+        """Slow requests are logged with duplicate SQL shapes."""
+        with patch("moztrap.debug.instrumentation.logger") as logger:
+            self.run_request(self.middleware(), queries=3)
+
+        msg, data = logger.warning.call_args[0]
+        data = json.loads(data)
+        self.assertEqual(data["queries"], 3)
+        self.assertEqual(data["path"], "/some/path/")
+        self.assertEqual(data["status"], 200)
+        self.assertEqual(data["duplicates"][0]["count"], 3)
+        self.assertNotIn("explain", data)
+
+
+    @override_settings(
+        INSTRUMENTATION_SLOW_REQUEST_MS=0,
+        INSTRUMENTATION_EXPLAIN_SAMPLE_RATE=1.0,
+        INSTRUMENTATION_EXPLAIN_TOP=2,
+        )
+    def test_explain_sampled(self):
+        """Sampled slow requests log plans of slowest statements."""
+        with patch("moztrap.debug.instrumentation.logger") as logger:
+            self.run_request(self.middleware(), queries=3)
+
+        data = json.loads(logger.warning.call_args[0][1])
+        self.assertEqual(len(data["explain"]), 2)
+        self.assertTrue(data["explain"][0]["plan"])
+
+
+    def test_fast_request_not_logged(self):
+        """Requests under the threshold aren't logged."""
+        with patch("moztrap.debug.instrumentation.logger") as logger:
+            self.run_request(self.middleware(), queries=1)
+
+        self.assertFalse(logger.warning.called)
+
+
+
+class WorkloadRecorderMiddlewareTest(case.DBTestCase):
+    """Tests for WorkloadRecorderMiddleware."""
+    @property
+    def middleware(self):
+        from moztrap.debug.middleware import WorkloadRecorderMiddleware
+        return WorkloadRecorderMiddleware
+
+
+    def setUp(self):
+        """Create a temporary trace file."""
+        super(WorkloadRecorderMiddlewareTest, self).setUp()
+        from tempfile import mkstemp
+        import os
+        fd, self.path = mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+
+    def run_request(self, m):
+        """Run a GET request through middleware."""
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        request = RequestFactory().get("/some/path/", {"a": "1"})
+        m.process_request(request)
+        return m.process_response(request, HttpResponse("ok"))
+
+
+    def traces(self):
+        """Return list of recorded traces."""
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+
+    def test_not_used_without_file(self):
+        with override_settings(WORKLOAD_RECORD_FILE=None):
+            with self.assertRaises(MiddlewareNotUsed):
+                self.middleware()
+
+
+    def test_record(self):
+        """Sampled requests are appended to the file."""
+        with override_settings(WORKLOAD_RECORD_FILE=self.path):
+            m = self.middleware()
+        self.run_request(m)
+
+        traces = self.traces()
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0]["path"], "/some/path/")
+        self.assertEqual(traces[0]["query"], [["a", "1"]])
+
+
+    def test_not_sampled(self):
+        """Requests not sampled aren't recorded."""
+        with override_settings(
+                WORKLOAD_RECORD_FILE=self.path,
+                WORKLOAD_RECORD_SAMPLE_RATE=0):
+            m = self.middleware()
+        self.run_request(m)
+
+        self.assertEqual(self.traces(), [])
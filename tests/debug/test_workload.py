@@ -0,0 +1,291 @@
+"""
+Tests for workload recording and replay.
+
+"""
+import json
+import os
+from tempfile import mkstemp
+
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+
+from mock import Mock
+
+from tests import case
+
+
+
+class WorkloadTestCase(case.DBTestCase):
+    @property
+    def workload(self):
+        """The module under test."""
+        from moztrap.debug import workload
+        return workload
+
+
+    def trace(self, **kwargs):
+        """Return a trace dict with given values."""
+        defaults = {
+            "method": "GET",
+            "path": "/manage/products/",
+            "query": [],
+            "post": {},
+            "role": "anonymous",
+            }
+        defaults.update(kwargs)
+        return defaults
+
+
+
+class RoleOfTest(WorkloadTestCase):
+    def test_anonymous(self):
+        """No user, or an anonymous one, is "anonymous"."""
+        from django.contrib.auth.models import AnonymousUser
+        self.assertEqual(self.workload.role_of(None), "anonymous")
+        self.assertEqual(
+            self.workload.role_of(AnonymousUser()), "anonymous")
+
+
+    def test_superuser(self):
+        """Superusers are "superuser" whatever their roles."""
+        u = self.F.UserFactory.create(is_superuser=True)
+        u.groups.add(self.F.RoleFactory.create(name="Tester"))
+
+        self.assertEqual(self.workload.role_of(u), "superuser")
+
+
+    def test_roles(self):
+        """Role names, sorted and comma-separated."""
+        u = self.F.UserFactory.create()
+        u.groups.add(self.F.RoleFactory.create(name="Tester"))
+        u.groups.add(self.F.RoleFactory.create(name="Admin"))
+
+        self.assertEqual(self.workload.role_of(u), "Admin, Tester")
+
+
+    def test_no_roles(self):
+        """A user with no roles is "authenticated"."""
+        u = self.F.UserFactory.create()
+
+        self.assertEqual(self.workload.role_of(u), "authenticated")
+
+
+
+class TraceTest(WorkloadTestCase):
+    def test_get(self):
+        """Records method, path, query, role and status."""
+        request = RequestFactory().get("/runs/", {"filter-name": ["a", "b"]})
+        request.user = self.F.UserFactory.create(is_superuser=True)
+
+        data = self.workload.trace(request, HttpResponse(status=302), 0.25)
+
+        self.assertEqual(data["method"], "GET")
+        self.assertEqual(data["path"], "/runs/")
+        self.assertEqual(
+            data["query"], [["filter-name", "a"], ["filter-name", "b"]])
+        self.assertEqual(data["post"], {})
+        self.assertEqual(data["role"], "superuser")
+        self.assertEqual(data["status"], 302)
+        self.assertEqual(data["ms"], 250.0)
+
+
+    def test_sensitive_query(self):
+        """Values of sensitive query-string parameters are redacted."""
+        request = RequestFactory().get(
+            "/api/v1/run/",
+            {"username": "foo", "api_key": "k3y", "session_token": "t0k",
+             "Password": "pw", "client_secret": "s3c"})
+
+        data = self.workload.trace(request, HttpResponse(), 0.1)
+
+        self.assertEqual(
+            dict(data["query"]),
+            {"username": "foo", "api_key": "[redacted]",
+             "session_token": "[redacted]", "Password": "[redacted]",
+             "client_secret": "[redacted]"},
+            )
+        for value in ["k3y", "t0k", "pw", "s3c"]:
+            self.assertNotIn(value, json.dumps(data))
+
+
+    def test_post_shape(self):
+        """Only POST field names and value counts are recorded."""
+        request = RequestFactory().post(
+            "/users/login/",
+            {"username": "foo", "password": "secret", "tag": ["1", "2"],
+             "csrfmiddlewaretoken": "token"})
+
+        data = self.workload.trace(request, HttpResponse(), 0.1)
+
+        self.assertEqual(
+            data["post"], {"username": 1, "password": 1, "tag": 2})
+        self.assertNotIn("secret", json.dumps(data))
+        self.assertEqual(data["role"], "anonymous")
+
+
+
+class RecorderTest(WorkloadTestCase):
+    def setUp(self):
+        """Create a temporary trace file."""
+        super(RecorderTest, self).setUp()
+        fd, self.path = mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+
+    def test_record(self):
+        """Traces are appended as JSON Lines, and can be read back."""
+        recorder = self.workload.Recorder(self.path)
+        request = RequestFactory().get("/")
+        recorder.record(request, HttpResponse(), 0.1)
+        recorder.record(request, HttpResponse(), 0.2)
+
+        with open(self.path) as f:
+            traces = list(self.workload.read_traces(f))
+
+        self.assertEqual([t["ms"] for t in traces], [100.0, 200.0])
+
+
+    def test_sample(self):
+        """Sample rate of zero never samples, one always does."""
+        self.assertFalse(self.workload.Recorder(self.path, 0).sample())
+        self.assertTrue(self.workload.Recorder(self.path, 1.0).sample())
+
+
+    def test_bad_line(self):
+        """Invalid lines raise WorkloadError with the line number."""
+        lines = ['{"method": "GET", "path": "/"}', "", "not json"]
+
+        with self.assertRaises(self.workload.WorkloadError) as cm:
+            list(self.workload.read_traces(lines))
+
+        self.assertEqual(str(cm.exception), "Line 3 is not a valid trace.")
+
+
+
+class HelpersTest(WorkloadTestCase):
+    def test_percentile(self):
+        """Nearest-rank percentiles of sorted values."""
+        values = range(1, 101)
+
+        self.assertEqual(self.workload.percentile(values, 50), 50)
+        self.assertEqual(self.workload.percentile(values, 99), 99)
+        self.assertEqual(self.workload.percentile([3], 90), 3)
+        self.assertEqual(self.workload.percentile([], 50), None)
+
+
+    def test_endpoint_of(self):
+        """Paths resolve to URL names; API paths include the resource."""
+        self.assertEqual(
+            self.workload.endpoint_of("/manage/products/"), "manage_products")
+        self.assertEqual(
+            self.workload.endpoint_of("/api/v1/run/"),
+            "api_dispatch_list:run")
+        self.assertEqual(
+            self.workload.endpoint_of("/no/such/url/"), "/no/such/url/")
+
+
+    def test_queries_of(self):
+        """Query count is read from a Server-Timing header."""
+        self.assertEqual(
+            self.workload.queries_of(
+                'db;dur=1.0;desc="7 queries", tpl;dur=2.0;desc="templates"'),
+            7)
+        self.assertEqual(self.workload.queries_of(None), None)
+
+
+    def test_url_of(self):
+        """Query string is rebuilt from recorded pairs."""
+        self.assertEqual(
+            self.workload.url_of(
+                self.trace(path="/runs/", query=[["a", "1"], ["a", "2"]])),
+            "/runs/?a=1&a=2")
+
+
+    def test_post_data(self):
+        """Each recorded POST value is sent empty."""
+        self.assertEqual(
+            self.workload.post_data(self.trace(post={"b": 2, "a": 1})),
+            [("a", ""), ("b", ""), ("b", "")])
+
+
+
+class SessionsForTest(WorkloadTestCase):
+    def test_roles(self):
+        """Each role is replayed as the first active user with that role."""
+        self.F.UserFactory.create(is_superuser=True, is_active=False)
+        su = self.F.UserFactory.create(is_superuser=True)
+        tester = self.F.UserFactory.create()
+        tester.groups.add(self.F.RoleFactory.create(name="Tester"))
+
+        sessions = self.workload.sessions_for(
+            [self.trace(role="superuser"), self.trace(role="Tester"),
+             self.trace()])
+
+        self.assertIsNone(sessions["anonymous"].key)
+        self.assertEqual(self.session_user(sessions["superuser"]), su.id)
+        self.assertEqual(self.session_user(sessions["Tester"]), tester.id)
+        self.assertTrue(sessions["Tester"].csrf_token)
+
+
+    def session_user(self, session):
+        """Return ID of the user logged in to ``session``."""
+        from django.contrib.sessions.backends.cached_db import SessionStore
+        return SessionStore(session.key)["_auth_user_id"]
+
+
+    def test_username(self):
+        """Roles can be replayed as a given user."""
+        u = self.F.UserFactory.create(username="someone")
+
+        sessions = self.workload.sessions_for(
+            [self.trace(role="Tester")], {"Tester": "someone"})
+
+        self.assertEqual(self.session_user(sessions["Tester"]), u.id)
+
+
+    def test_no_user(self):
+        """WorkloadError if no user has a role."""
+        with self.assertRaises(self.workload.WorkloadError):
+            self.workload.sessions_for([self.trace(role="Tester")])
+
+
+
+class ReplayTest(WorkloadTestCase):
+    def test_replay(self):
+        """Replays with the test client and summarizes per endpoint."""
+        self.F.UserFactory.create(is_superuser=True)
+        traces = [
+            self.trace(role="superuser"),
+            self.trace(role="superuser", query=[["sortfield", "name"]]),
+            self.trace(path="/users/login/"),
+            ]
+        sessions = self.workload.sessions_for(traces)
+
+        result = self.workload.replay(
+            traces, self.workload.ClientTarget(), sessions)
+
+        self.assertEqual(result.num_requests, 3)
+        self.assertEqual(result.errors, 0)
+        endpoints = result.endpoints()
+        self.assertEqual(
+            [(e["endpoint"], e["count"]) for e in endpoints],
+            [("manage_products", 2), ("auth_login", 1)])
+        self.assertTrue(endpoints[0]["queries"] > 0)
+        self.assertTrue(endpoints[0]["p50_ms"] > 0)
+        self.assertEqual(
+            set(result.as_dict()),
+            set(["requests", "errors", "elapsed", "requests_per_second",
+                 "endpoints"]))
+
+
+    def test_errors(self):
+        """Failed requests are counted as errors."""
+        target = Mock()
+        target.request.side_effect = IOError()
+
+        result = self.workload.replay(
+            [self.trace()], target, {"anonymous": self.workload.Session()})
+
+        self.assertEqual(result.errors, 1)
+        self.assertEqual(result.endpoints()[0]["queries"], None)
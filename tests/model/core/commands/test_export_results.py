@@ -0,0 +1,133 @@
+"""
+Tests for management command to export results.
+
+"""
+from cStringIO import StringIO
+import os
+from tempfile import mkstemp
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class ExportResultsTest(case.DBTestCase):
+    """Tests for export_results management command."""
+    def call_command(self, *args, **kwargs):
+        """
+        Runs the management command and returns (stdout, stderr) output.
+
+        Also patch ``sys.exit`` so a ``CommandError`` doesn't cause an exit.
+
+        """
+        with patch("sys.stdout", StringIO()) as stdout:
+            with patch("sys.stderr", StringIO()) as stderr:
+                with patch("sys.exit"):
+                    call_command("export_results", *args, **kwargs)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return (stdout.read(), stderr.read())
+
+
+    def test_no_args(self):
+        """Command shows usage."""
+        output = self.call_command()
+
+        self.assertEqual(
+            output,
+            ("", "Error: Usage: <run|series|productversion> <id>\n"))
+
+
+    def test_bad_run(self):
+        """Error if given non-existent run."""
+        output = self.call_command("run", "9999")
+
+        self.assertEqual(output, ("", 'Error: Run "9999" does not exist.\n'))
+
+
+    def test_not_series(self):
+        """Error if given run is not a series."""
+        r = self.F.RunFactory.create(is_series=False)
+
+        output = self.call_command("series", str(r.id))
+
+        self.assertEqual(
+            output, ("", 'Error: Series "{0}" does not exist.\n'.format(r.id)))
+
+
+    def test_bad_productversion(self):
+        """Error if given non-existent productversion."""
+        output = self.call_command("productversion", "9999")
+
+        self.assertEqual(
+            output, ("", 'Error: Product version "9999" does not exist.\n'))
+
+
+    def test_bad_kind(self):
+        """Error if given unknown kind of object."""
+        output = self.call_command("suite", "1")
+
+        self.assertEqual(
+            output,
+            ("", "Error: Usage: <run|series|productversion> <id>\n"))
+
+
+    def test_bad_format(self):
+        """Error if given unknown format."""
+        r = self.F.RunFactory.create()
+
+        output = self.call_command("run", str(r.id), format="xls")
+
+        self.assertEqual(output, ("", 'Error: Unknown format "xls".\n'))
+
+
+    def test_run_csv(self):
+        """Exports run results as CSV to stdout."""
+        result = self.F.ResultFactory.create()
+
+        stdout, stderr = self.call_command(
+            "run", str(result.runcaseversion.run.id))
+
+        lines = stdout.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("{0},".format(result.id)))
+
+
+    def test_series(self):
+        """Exports results of member runs of a series."""
+        result = self.F.ResultFactory.create()
+        series = self.F.RunFactory.create(is_series=True)
+        run = result.runcaseversion.run
+        run.series = series
+        run.save()
+
+        stdout, stderr = self.call_command("series", str(series.id))
+
+        lines = stdout.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("{0},".format(result.id)))
+
+
+    def test_productversion_to_file(self):
+        """Exports to a given output file."""
+        result = self.F.ResultFactory.create()
+        fd, path = mkstemp()
+        os.close(fd)
+
+        try:
+            self.call_command(
+                "productversion",
+                str(result.runcaseversion.run.productversion.id),
+                format="jsonl",
+                output=path,
+                )
+            with open(path) as fh:
+                contents = fh.read()
+        finally:
+            os.remove(path)
+
+        self.assertEqual(len(contents.splitlines()), 1)
@@ -0,0 +1,112 @@
+"""
+Tests for management command to ingest JUnit XML results.
+
+"""
+from cStringIO import StringIO
+import os
+from tempfile import mkstemp
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class ImportJUnitTest(case.DBTestCase):
+    """Tests for import_junit management command."""
+    def call_command(self, *args, **kwargs):
+        """
+        Runs the management command and returns (stdout, stderr) output.
+
+        Also patch ``sys.exit`` so a ``CommandError`` doesn't cause an exit.
+
+        """
+        with patch("sys.stdout", StringIO()) as stdout:
+            with patch("sys.stderr", StringIO()) as stderr:
+                with patch("sys.exit"):
+                    call_command("import_junit", *args, **kwargs)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return (stdout.read(), stderr.read())
+
+
+    def write_xml(self, contents):
+        """Write contents to a temporary file and return its path."""
+        fd, path = mkstemp(suffix=".xml")
+        os.write(fd, contents)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return path
+
+
+    def test_no_args(self):
+        """Command shows usage."""
+        output = self.call_command()
+
+        self.assertEqual(output, ("", "Error: Usage: <run_id> <filename>\n"))
+
+
+    def test_bad_run(self):
+        """Error if given non-existent run."""
+        output = self.call_command("9999", "results.xml")
+
+        self.assertEqual(output, ("", 'Error: Run "9999" does not exist.\n'))
+
+
+    def test_bad_user(self):
+        """Error if given non-existent user."""
+        r = self.F.RunFactory.create()
+
+        output = self.call_command(str(r.id), "results.xml", user="nobody")
+
+        self.assertEqual(
+            output, ("", 'Error: User "nobody" does not exist.\n'))
+
+
+    def test_bad_environment(self):
+        """Error if given environment not in the run."""
+        r = self.F.RunFactory.create()
+        u = self.F.UserFactory.create(username="auto")
+
+        output = self.call_command(
+            str(r.id), "results.xml", user="auto", environment="9999")
+
+        self.assertEqual(
+            output,
+            ("", 'Error: Environment "9999" is not in run "{0}".\n'.format(
+                    r.id))
+            )
+
+
+    def test_bad_xml(self):
+        """Error if the XML is malformed."""
+        r = self.F.RunFactory.create()
+        self.F.UserFactory.create(username="auto")
+        path = self.write_xml("<testsuite><testcase")
+
+        stdout, stderr = self.call_command(str(r.id), path, user="auto")
+
+        self.assertTrue(stderr.startswith("Error: {0}: Could not parse XML".format(path)))
+
+
+    def test_ingest(self):
+        """Ingests results and reports throughput."""
+        env = self.F.EnvironmentFactory.create()
+        rcv = self.F.RunCaseVersionFactory.create(
+            caseversion__name="Open URL", environments=[env])
+        rcv.run.environments.add(env)
+        self.F.UserFactory.create(username="auto")
+        path = self.write_xml(
+            '<testsuite><testcase name="Open URL" /></testsuite>')
+
+        stdout, stderr = self.call_command(
+            str(rcv.run.id), path, user="auto", environment=str(env.id))
+
+        lines = stdout.splitlines()
+        self.assertEqual(
+            lines[0], "Recorded 1 results from 1 testcases (0 skipped)")
+        self.assertIn("cases/sec", lines[1])
+        self.assertEqual(rcv.results.get().status, "passed")
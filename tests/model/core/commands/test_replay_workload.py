@@ -0,0 +1,137 @@
+"""
+Tests for management command to replay recorded request traces.
+
+"""
+from cStringIO import StringIO
+import json
+import os
+from tempfile import mkstemp
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class ReplayWorkloadTest(case.DBTestCase):
+    """Tests for replay_workload management command."""
+    def call_command(self, *args, **kwargs):
+        """
+        Runs the management command and returns (stdout, stderr) output.
+
+        Also patch ``sys.exit`` so a ``CommandError`` doesn't cause an exit.
+
+        """
+        with patch("sys.stdout", StringIO()) as stdout:
+            with patch("sys.stderr", StringIO()) as stderr:
+                with patch("sys.exit"):
+                    call_command("replay_workload", *args, **kwargs)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return (stdout.read(), stderr.read())
+
+
+    def tempfile(self, contents=""):
+        """Write contents to a temporary file and return its path."""
+        fd, path = mkstemp(suffix=".jsonl")
+        os.write(fd, contents)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return path
+
+
+    def write_traces(self, *traces):
+        """Write traces to a temporary file and return its path."""
+        return self.tempfile("".join(json.dumps(t) + "\n" for t in traces))
+
+
+    def trace(self, method="GET", path="/manage/products/", role="superuser"):
+        """Return a trace dict."""
+        return {
+            "method": method,
+            "path": path,
+            "query": [],
+            "post": {"name": 1},
+            "role": role,
+            }
+
+
+    def test_no_args(self):
+        """Command shows usage."""
+        output = self.call_command()
+
+        self.assertEqual(output, ("", "Error: Usage: <filename>\n"))
+
+
+    def test_bad_file(self):
+        """Error if file can't be opened."""
+        output = self.call_command("/no/such/file.jsonl")
+
+        self.assertEqual(
+            output,
+            ("", 'Error: Could not open "/no/such/file.jsonl": '
+             'No such file or directory\n'))
+
+
+    def test_bad_user_option(self):
+        """Error if --as isn't ROLE=USERNAME."""
+        path = self.write_traces(self.trace())
+
+        output = self.call_command(path, users=["someone"])
+
+        self.assertEqual(
+            output, ("", 'Error: Expected ROLE=USERNAME, not "someone".\n'))
+
+
+    def test_no_user_for_role(self):
+        """Error if no user can replay a role."""
+        path = self.write_traces(self.trace(role="Tester"))
+
+        output = self.call_command(path)
+
+        self.assertEqual(
+            output, ("", 'Error: No active user with role "Tester".\n'))
+
+
+    def test_replay(self):
+        """Replays GET traces and reports per endpoint."""
+        self.F.UserFactory.create(is_superuser=True)
+        path = self.write_traces(
+            self.trace(),
+            self.trace(),
+            self.trace(method="POST"),
+            )
+        out_path = self.tempfile()
+
+        stdout, stderr = self.call_command(
+            path, concurrency=1, output=out_path)
+
+        self.assertEqual(stderr, "")
+        lines = stdout.splitlines()
+        self.assertTrue(lines[0].startswith("Replayed 2 requests in "))
+        self.assertTrue(lines[0].endswith(" 0 errors"))
+        self.assertTrue(lines[3].startswith("manage_products "))
+        with open(out_path) as f:
+            report = json.load(f)
+        self.assertEqual(report["requests"], 2)
+        self.assertEqual(report["endpoints"][0]["count"], 2)
+
+
+    def test_methods_and_limit(self):
+        """Only given methods are replayed, up to the limit."""
+        self.F.UserFactory.create(username="someone")
+        path = self.write_traces(
+            self.trace(method="POST", role="Tester"),
+            self.trace(method="POST", role="Tester"),
+            self.trace(),
+            )
+
+        stdout, stderr = self.call_command(
+            path, concurrency=1, methods="post", limit=1,
+            users=["Tester=someone"])
+
+        self.assertEqual(stderr, "")
+        self.assertTrue(stdout.startswith("Replayed 1 requests in "))
@@ -149,6 +149,23 @@ class ProductVersionTest(case.DBTestCase):
             )
 
 
+    def test_bulk_deleting_versions_reorders(self):
+        """Bulk-deleting product versions reorders the versions."""
+        p = self.F.ProductFactory.create()
+        self.F.ProductVersionFactory.create(version="2.10", product=p)
+        self.F.ProductVersionFactory.create(version="2.9", product=p)
+        self.F.ProductVersionFactory.create(version="2.11", product=p)
+
+        self.model.ProductVersion.bulk_delete(
+            self.model.ProductVersion.objects.filter(
+                version__in=["2.10", "2.11"]))
+
+        self.assertEqual(
+            [(v.version, v.order, v.latest) for v in p.versions.all()],
+            [("2.9", 1, True)]
+            )
+
+
     def test_undeleting_a_version_reorders(self):
         """Undeleting a product version reorders the versions."""
         p = self.F.ProductFactory.create()
@@ -8,4 +8,22 @@ from tests import case
 
 class UserTest(case.DBTestCase):
     """Tests for User proxy model."""
+    def test_bulk_deactivate(self):
+        """bulk_deactivate deactivates all given users."""
+        u1 = self.F.UserFactory.create()
+        u2 = self.F.UserFactory.create()
 
+        self.model.User.bulk_deactivate(
+            self.model.User.objects.filter(pk__in=[u1.pk, u2.pk]))
+
+        self.assertFalse(self.refresh(u1).is_active)
+        self.assertFalse(self.refresh(u2).is_active)
+
+
+    def test_bulk_activate(self):
+        """bulk_activate activates all given users."""
+        u = self.F.UserFactory.create(is_active=False)
+
+        self.model.User.bulk_activate(self.model.User.objects.all())
+
+        self.assertTrue(self.refresh(u).is_active)
@@ -2,6 +2,11 @@
 Tests for auth proxy models.
 
 """
+import os
+import tempfile
+
+from mock import patch
+
 from tests import case
 
 
@@ -108,6 +113,116 @@ class ModelBackendTest(case.DBTestCase):
         self.assertIsNone(res)
 
 
+    def perm(self, name):
+        """Return Permission with given "app_label.codename" name."""
+        app_label, codename = name.split(".")
+        return self.model.Permission.objects.get(
+            content_type__app_label=app_label, codename=codename)
+
+
+    def fresh(self, user):
+        """Return a new instance of user, as loaded in a new request."""
+        return self.model.User.objects.get(pk=user.pk)
+
+
+    def test_permissions_cached(self):
+        """A user's permissions are cached across requests."""
+        u = self.F.UserFactory.create(permissions=["library.manage_cases"])
+        self.backend.get_all_permissions(self.fresh(u))
+        u = self.fresh(u)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.backend.has_perm(u, "library.manage_cases"))
+            self.assertFalse(self.backend.has_perm(u, "library.manage_suites"))
+
+
+    def test_role_membership_changed(self):
+        """Permissions are resolved again when a user's roles change."""
+        r = self.F.RoleFactory.create()
+        r.permissions.add(self.perm("library.manage_cases"))
+        u = self.F.UserFactory.create()
+        self.assertFalse(
+            self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+        u.roles.add(r)
+
+        self.assertTrue(
+            self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+
+    def test_role_permissions_changed(self):
+        """Permissions are resolved again when a role's permissions change."""
+        r = self.F.RoleFactory.create()
+        u = self.F.UserFactory.create()
+        u.roles.add(r)
+        self.assertFalse(
+            self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+        r.permissions.add(self.perm("library.manage_cases"))
+
+        self.assertTrue(
+            self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+
+    def test_user_permissions_changed(self):
+        """Permissions are resolved again when a user's permissions change."""
+        u = self.F.UserFactory.create(permissions=["library.manage_cases"])
+        self.assertTrue(
+            self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+        u.user_permissions.clear()
+
+        self.assertFalse(
+            self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+
+    def test_role_revoked_in_other_process(self):
+        """A role revoked in one process is seen by the others."""
+        from moztrap.cache.backends import SQLiteCache
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        r = self.F.RoleFactory.create()
+        r.permissions.add(self.perm("library.manage_cases"))
+        u = self.F.UserFactory.create()
+        u.roles.add(r)
+        with patch("moztrap.cache._cache", SQLiteCache(path, {})):
+            self.assertTrue(
+                self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+            u.roles.remove(r)
+
+        # another process has its own instance of the shared cache
+        with patch("moztrap.cache._cache", SQLiteCache(path, {})):
+            self.assertFalse(
+                self.backend.has_perm(self.fresh(u), "library.manage_cases"))
+
+
+    def test_timeout(self):
+        """Permissions are cached for PERMISSION_CACHE_TIMEOUT seconds."""
+        u = self.F.UserFactory.create()
+
+        with patch("moztrap.model.core.auth.cache.get_or_set") as get_or_set:
+            with self.settings(PERMISSION_CACHE_TIMEOUT=5):
+                self.backend.get_all_permissions(self.fresh(u))
+
+        self.assertEqual(get_or_set.call_args[0][2], 5)
+
+
+    def test_superuser_changed(self):
+        """Superusers have all permissions, as soon as they become one."""
+        u = self.F.UserFactory.create()
+        self.backend.get_all_permissions(self.fresh(u))
+
+        u.is_superuser = True
+        u.save()
+
+        self.assertIn(
+            "library.manage_cases",
+            self.backend.get_all_permissions(self.fresh(u)),
+            )
+
+
 
 class BrowserIDBackendTest(case.DBTestCase):
     """Tests for our custom BrowserIDBackend."""
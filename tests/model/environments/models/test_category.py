@@ -56,3 +56,41 @@ class CategoryTest(case.DBTestCase):
         env.delete()
 
         self.assertTrue(el.category.deletable)
+
+
+    def test_with_deletable(self):
+        """with_deletable annotates deletable without further queries."""
+        used = self.F.ElementFactory.create(name="Debian").category
+        self.F.EnvironmentFactory.create().elements.add(*used.elements.all())
+        deleted = self.F.ElementFactory.create(name="Mint").category
+        env = self.F.EnvironmentFactory.create()
+        env.elements.add(*deleted.elements.all())
+        env.delete()
+        unused = self.F.CategoryFactory.create()
+
+        with self.assertNumQueries(1):
+            deletable = dict(
+                (c.id, c.deletable)
+                for c in self.model.Category.objects.with_deletable()
+                )
+
+        self.assertEqual(
+            deletable, {used.id: False, deleted.id: True, unused.id: True})
+
+
+
+    def test_with_deletable_matches_deletable(self):
+        """Annotated deletable matches the query, also for deleted envs."""
+        live = self.F.ElementFactory.create(name="Debian").category
+        self.F.EnvironmentFactory.create().elements.add(*live.elements.all())
+        deleted = self.F.ElementFactory.create(name="Mint").category
+        env = self.F.EnvironmentFactory.create()
+        env.elements.add(*deleted.elements.all())
+        env.delete()
+        unused = self.F.CategoryFactory.create()
+
+        for cat in [live, deleted, unused]:
+            annotated = self.model.Category.objects.with_deletable().get(
+                pk=cat.pk)
+            self.assertEqual(
+                annotated.deletable, self.refresh(cat).deletable, cat.name)
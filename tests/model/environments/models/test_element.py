@@ -56,3 +56,45 @@ class ElementTest(case.DBTestCase):
         env.delete()
 
         self.assertTrue(el.deletable)
+
+
+    def test_with_deletable(self):
+        """with_deletable annotates deletable without further queries."""
+        used = self.F.ElementFactory.create(name="Debian")
+        deleted = self.F.ElementFactory.create(name="Mint")
+        unused = self.F.ElementFactory.create(name="Arch")
+        self.F.EnvironmentFactory.create().elements.add(used)
+        self.F.EnvironmentFactory.create().elements.add(used)
+        env = self.F.EnvironmentFactory.create()
+        env.elements.add(used, deleted)
+        env.delete()
+
+        with self.assertNumQueries(1):
+            deletable = dict(
+                (e.id, e.deletable)
+                for e in self.model.Element.objects.with_deletable().filter(
+                    id__in=[deleted.id, unused.id])
+                )
+
+        self.assertEqual(deletable, {deleted.id: True, unused.id: True})
+        self.assertFalse(
+            self.model.Element.objects.with_deletable().get(
+                pk=used.pk).deletable)
+
+
+
+    def test_with_deletable_matches_deletable(self):
+        """Annotated deletable matches the query, also for deleted envs."""
+        live = self.F.ElementFactory.create(name="Debian")
+        deleted = self.F.ElementFactory.create(name="Mint")
+        unused = self.F.ElementFactory.create(name="Arch")
+        self.F.EnvironmentFactory.create().elements.add(live)
+        env = self.F.EnvironmentFactory.create()
+        env.elements.add(live, deleted)
+        env.delete()
+
+        for el in [live, deleted, unused]:
+            annotated = self.model.Element.objects.with_deletable().get(
+                pk=el.pk)
+            self.assertEqual(
+                annotated.deletable, self.refresh(el).deletable, el.name)
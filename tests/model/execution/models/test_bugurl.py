@@ -0,0 +1,211 @@
+"""
+Tests for BugURL index and bug URL prefetching.
+
+"""
+from tests import case
+
+
+
+class BugURLTest(case.DBTestCase):
+    def urls(self, **kwargs):
+        """Return set of indexed URLs matching given filters."""
+        return set(
+            self.model.BugURL.objects.filter(**kwargs).values_list(
+                "url", flat=True))
+
+
+    def test_unicode(self):
+        sr = self.F.StepResultFactory.create(
+            bug_url="http://www.example.com/bug1")
+
+        self.assertEqual(
+            unicode(sr.result.bugurls.get()), u"http://www.example.com/bug1")
+
+
+    def test_indexed_on_save(self):
+        """Saving a step result indexes its bug URL."""
+        sr = self.F.StepResultFactory.create(
+            bug_url="http://www.example.com/bug1")
+
+        bugurl = self.model.BugURL.objects.get()
+        self.assertEqual(bugurl.url, "http://www.example.com/bug1")
+        self.assertEqual(bugurl.result, sr.result)
+        self.assertEqual(bugurl.runcaseversion, sr.result.runcaseversion)
+        self.assertEqual(bugurl.run, sr.result.runcaseversion.run)
+        self.assertEqual(
+            bugurl.caseversion, sr.result.runcaseversion.caseversion)
+
+
+    def test_empty_not_indexed(self):
+        """Step results without bug URL aren't indexed."""
+        self.F.StepResultFactory.create()
+
+        self.assertEqual(self.model.BugURL.objects.count(), 0)
+
+
+    def test_reindexed_on_change(self):
+        """Changing a step result's bug URL updates the index."""
+        sr = self.F.StepResultFactory.create(
+            bug_url="http://www.example.com/bug1")
+
+        sr.bug_url = "http://www.example.com/bug2"
+        sr.save()
+
+        self.assertEqual(self.urls(), set(["http://www.example.com/bug2"]))
+
+
+    def test_duplicates(self):
+        """A URL reported in several steps of a result is indexed once."""
+        r = self.F.ResultFactory.create()
+        self.F.StepResultFactory.create(
+            result=r, bug_url="http://www.example.com/bug1")
+        self.F.StepResultFactory.create(
+            result=r, bug_url="http://www.example.com/bug1")
+
+        self.assertEqual(self.model.BugURL.objects.count(), 1)
+
+
+    def test_delete_undelete(self):
+        """Deleting a step result unindexes its URL; undeleting restores."""
+        sr = self.F.StepResultFactory.create(
+            bug_url="http://www.example.com/bug1")
+
+        sr.delete()
+
+        self.assertEqual(self.urls(), set())
+
+        sr = self.model.StepResult.everything.get(pk=sr.pk)
+        sr.undelete()
+
+        self.assertEqual(self.urls(), set(["http://www.example.com/bug1"]))
+
+
+    def test_deleted_result(self):
+        """Entries of deleted results are not live."""
+        sr = self.F.StepResultFactory.create(
+            bug_url="http://www.example.com/bug1")
+
+        sr.result.delete()
+
+        self.assertEqual(self.model.BugURL.objects.live().count(), 0)
+
+
+    def test_index_bug_urls(self):
+        """index_bug_urls indexes step results created in bulk."""
+        r1 = self.F.ResultFactory.create()
+        r2 = self.F.ResultFactory.create()
+        self.model.StepResult.objects.bulk_create([
+                self.model.StepResult(
+                    result=r1,
+                    step=self.F.CaseStepFactory.create(),
+                    bug_url="http://www.example.com/bug1",
+                    ),
+                self.model.StepResult(
+                    result=r2,
+                    step=self.F.CaseStepFactory.create(),
+                    bug_url="http://www.example.com/bug2",
+                    ),
+                ])
+
+        self.model.index_bug_urls([r1.id, r2.id], chunk_size=1)
+
+        self.assertEqual(
+            self.urls(),
+            set(["http://www.example.com/bug1", "http://www.example.com/bug2"])
+            )
+
+
+    def test_runs_by_url(self):
+        """The index finds the runs in which a bug was reported."""
+        sr = self.F.StepResultFactory.create(
+            bug_url="http://www.example.com/bug1")
+        self.F.StepResultFactory.create(
+            bug_url="http://www.example.com/bug2")
+
+        runs = self.model.Run.objects.filter(
+            bugurls__in=self.model.BugURL.objects.live().filter(
+                url="http://www.example.com/bug1")).distinct()
+
+        self.assertEqual(list(runs), [sr.result.runcaseversion.run])
+
+
+
+class PrefetchBugURLsTest(case.DBTestCase):
+    def setUp(self):
+        """Two rcvs of one run, the first with two results with bugs."""
+        self.rcv1 = self.F.RunCaseVersionFactory.create()
+        self.rcv2 = self.F.RunCaseVersionFactory.create(run=self.rcv1.run)
+        self.r1 = self.F.ResultFactory.create(runcaseversion=self.rcv1)
+        self.r2 = self.F.ResultFactory.create(runcaseversion=self.rcv1)
+        self.F.StepResultFactory.create(
+            result=self.r1, bug_url="http://www.example.com/bug1")
+        self.F.StepResultFactory.create(
+            result=self.r2, bug_url="http://www.example.com/bug1")
+        self.F.StepResultFactory.create(
+            result=self.r2, bug_url="http://www.example.com/bug2")
+
+
+    def test_runcaseversions(self):
+        """Prefetches bug URLs of runcaseversions."""
+        with self.assertNumQueries(1):
+            self.model.prefetch_bug_urls([self.rcv1, self.rcv2])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.rcv1.bug_urls(),
+                set([
+                        "http://www.example.com/bug1",
+                        "http://www.example.com/bug2",
+                        ])
+                )
+            self.assertEqual(self.rcv2.bug_urls(), set())
+
+
+    def test_caseversions(self):
+        """Prefetches bug URLs of caseversions."""
+        cv = self.rcv1.caseversion
+
+        with self.assertNumQueries(1):
+            self.model.prefetch_bug_urls([cv])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                cv.bug_urls(),
+                set([
+                        "http://www.example.com/bug1",
+                        "http://www.example.com/bug2",
+                        ])
+                )
+
+
+    def test_results(self):
+        """Prefetches bug URLs of results."""
+        with self.assertNumQueries(1):
+            self.model.prefetch_bug_urls([self.r1, self.r2])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.r1.bug_urls(), set(["http://www.example.com/bug1"]))
+            self.assertEqual(
+                self.r2.bug_urls(),
+                set([
+                        "http://www.example.com/bug1",
+                        "http://www.example.com/bug2",
+                        ])
+                )
+
+
+    def test_deleted_result(self):
+        """Bug URLs of deleted results are not prefetched."""
+        self.r2.delete()
+
+        self.model.prefetch_bug_urls([self.rcv1])
+
+        self.assertEqual(
+            self.rcv1.bug_urls(), set(["http://www.example.com/bug1"]))
+
+
+    def test_empty(self):
+        """Prefetching no objects doesn't query."""
+        with self.assertNumQueries(0):
+            self.model.prefetch_bug_urls([])
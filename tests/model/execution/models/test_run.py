@@ -273,6 +273,92 @@ class RunTest(case.DBTestCase):
         self.assertEqual(run.completion(), 0)
 
 
+    def test_with_result_counts(self):
+        """Annotated counts and completion, used by the methods."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Windows", "Linux"]})
+        pv = self.F.ProductVersionFactory(environments=envs)
+        run = self.F.RunFactory(productversion=pv)
+        rcv1 = self.F.RunCaseVersionFactory(
+            run=run, caseversion__productversion=pv)
+        rcv2 = self.F.RunCaseVersionFactory(
+            run=run, caseversion__productversion=pv)
+        self.F.ResultFactory(
+            runcaseversion=rcv1, environment=envs[0], status="passed")
+        self.F.ResultFactory(
+            runcaseversion=rcv1, environment=envs[0], status="failed")
+        self.F.ResultFactory(
+            runcaseversion=rcv2, environment=envs[1], status="started")
+        self.F.ResultFactory(
+            runcaseversion=rcv2, environment=envs[1], status="passed")
+        self.F.ResultFactory(
+            runcaseversion=self.F.RunCaseVersionFactory(), status="failed")
+
+        with self.assertNumQueries(1):
+            r = self.model.Run.objects.with_result_counts().get(pk=run.pk)
+            summary = r.result_summary()
+            completion = r.completion()
+
+        self.assertEqual(
+            summary, {"passed": 2, "failed": 1, "invalidated": 0})
+        self.assertEqual(completion, 0.5)
+
+
+    def test_sort_by_completion(self):
+        """Runs can be sorted by annotated completion."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Windows", "Linux"]})
+        pv = self.F.ProductVersionFactory(environments=envs)
+        runs = [self.F.RunFactory(productversion=pv) for i in range(3)]
+        for run, statuses in zip(runs, [["passed"], [], ["passed"] * 2]):
+            rcv = self.F.RunCaseVersionFactory(
+                run=run, caseversion__productversion=pv)
+            for env, status in zip(envs, statuses):
+                self.F.ResultFactory(
+                    runcaseversion=rcv, environment=env, status=status)
+
+        qs = self.model.Run.objects.with_result_counts().order_by(
+            "-completion_ratio")
+
+        self.assertEqual(list(qs), [runs[2], runs[0], runs[1]])
+        self.assertEqual([r.completion() for r in qs], [1, 0.5, 0])
+
+
+    def test_filter_by_completion(self):
+        """Runs can be filtered by completion, with completion_sql."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Windows", "Linux"]})
+        pv = self.F.ProductVersionFactory(environments=envs)
+        runs = [self.F.RunFactory(productversion=pv) for i in range(3)]
+        for run, statuses in zip(runs, [["passed"], [], ["passed"] * 2]):
+            rcv = self.F.RunCaseVersionFactory(
+                run=run, caseversion__productversion=pv)
+            for env, status in zip(envs, statuses):
+                self.F.ResultFactory(
+                    runcaseversion=rcv, environment=env, status=status)
+        sql, params = self.model.Run.objects.completion_sql()
+
+        qs = self.model.Run.objects.extra(
+            where=["({0}) >= 0.5".format(sql)], params=params)
+
+        self.assertEqual(set(qs), set([runs[0], runs[2]]))
+
+
+
+    def test_bulk_activate(self):
+        """Draft runs are activated one at a time, others in one update."""
+        r1 = self.F.RunFactory.create(status="draft")
+        r2 = self.F.RunFactory.create(status="disabled")
+        r3 = self.F.RunFactory.create(status="disabled")
+
+        with patch.object(Run, "update_case_versions") as mock_update:
+            Run.bulk_activate(Run.objects.all())
+
+        self.assertEqual(mock_update.call_count, 1)
+        self.assertEqual(
+            [self.refresh(r).status for r in [r1, r2, r3]],
+            ["active", "active", "active"],
+            )
 
 
 
@@ -198,6 +198,54 @@ class RunCaseVersionTest(case.DBTestCase):
         self.assertEqual(rcv.completion(), 0)
 
 
+    def test_with_result_counts(self):
+        """Annotated counts and completion, used by the methods."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Windows", "Linux"]})
+        rcv = self.F.RunCaseVersionFactory.create(environments=envs)
+        self.F.ResultFactory(
+            runcaseversion=rcv, environment=envs[0], status="passed")
+        self.F.ResultFactory(
+            runcaseversion=rcv, environment=envs[0], status="invalidated")
+        self.F.ResultFactory(
+            runcaseversion=rcv, environment=envs[1], status="started")
+        r = self.F.ResultFactory(
+            runcaseversion=rcv, environment=envs[1], status="failed")
+        r.delete()
+
+        with self.assertNumQueries(1):
+            annotated = self.model.RunCaseVersion.objects.with_result_counts(
+                ).get(pk=rcv.pk)
+            summary = annotated.result_summary()
+            completion = annotated.completion()
+
+        self.assertEqual(
+            summary, {"passed": 1, "failed": 0, "invalidated": 1})
+        self.assertEqual(completion, 0.5)
+
+
+    def test_with_result_counts_latest(self):
+        """Only a tester's latest result in an environment is counted."""
+        rcv = self.F.RunCaseVersionFactory.create()
+        env = self.F.EnvironmentFactory.create()
+        rcv.environments.add(env)
+        tester = self.F.UserFactory.create()
+        self.F.ResultFactory(
+            runcaseversion=rcv, environment=env, tester=tester,
+            status="failed")
+        self.F.ResultFactory(
+            runcaseversion=rcv, environment=env, tester=tester,
+            status="passed")
+
+        annotated = self.model.RunCaseVersion.objects.with_result_counts(
+            ).get(pk=rcv.pk)
+
+        self.assertEqual(
+            annotated.result_summary(),
+            {"passed": 1, "failed": 0, "invalidated": 0},
+            )
+
+
     def test_testers(self):
         """Testers method returns list of distinct testers of this rcv."""
         t1 = self.F.UserFactory.create()
@@ -210,6 +258,26 @@ class RunCaseVersionTest(case.DBTestCase):
         self.assertEqual(set(rcv.testers()), set([t1, t2]))
 
 
+    def test_prefetch_testers(self):
+        """prefetch_testers fetches testers of all rcvs at once."""
+        t1 = self.F.UserFactory.create()
+        t2 = self.F.UserFactory.create()
+        rcv1 = self.F.RunCaseVersionFactory.create()
+        rcv2 = self.F.RunCaseVersionFactory.create()
+        rcv3 = self.F.RunCaseVersionFactory.create()
+        self.F.ResultFactory.create(tester=t1, runcaseversion=rcv1)
+        self.F.ResultFactory.create(tester=t2, runcaseversion=rcv1)
+        self.F.ResultFactory.create(tester=t2, runcaseversion=rcv2)
+
+        with self.assertNumQueries(2):
+            self.model.prefetch_testers([rcv1, rcv2, rcv3])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(rcv1.testers(), [t1, t2])
+            self.assertEqual(rcv2.testers(), [t2])
+            self.assertEqual(rcv3.testers(), [])
+
+
     def test_start(self):
         """Start method creates a result with status started."""
         envs = self.F.EnvironmentFactory.create_full_set(
@@ -0,0 +1,183 @@
+"""
+Tests for streaming results export.
+
+"""
+import json
+
+from BeautifulSoup import BeautifulStoneSoup
+
+from tests import case
+
+
+
+class ExportTestMixin(object):
+    """Create a run with a couple of results."""
+    def setUp(self):
+        """Set up a run with one passed and one failed result."""
+        super(ExportTestMixin, self).setUp()
+        self.envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux"], "Language": ["English"]})
+        self.run = self.F.RunFactory.create(
+            name="FF10", environments=self.envs)
+        self.rcv = self.F.RunCaseVersionFactory.create(
+            run=self.run,
+            caseversion__name="Open URL",
+            caseversion__case__idprefix="pre",
+            )
+        self.tester = self.F.UserFactory.create(username="tester")
+        self.rcv.result_pass(self.envs[0], user=self.tester)
+        self.step = self.F.CaseStepFactory.create(
+            caseversion=self.rcv.caseversion)
+        self.rcv.result_fail(
+            self.envs[0],
+            comment="broken",
+            stepnumber=1,
+            bug="http://example.com/bug/1",
+            user=self.tester,
+            )
+
+
+    @property
+    def export(self):
+        """The module under test."""
+        from moztrap.model.execution import export
+        return export
+
+
+    def results(self, **kwargs):
+        """Return results for the run."""
+        kwargs.setdefault("run", self.run)
+        return self.export.results_for(**kwargs)
+
+
+
+class ResultsForTest(ExportTestMixin, case.DBTestCase):
+    """Tests for results_for."""
+    def test_run(self):
+        """Returns all results for the run."""
+        self.assertEqual(self.results().count(), 2)
+
+
+    def test_latest(self):
+        """Can limit to latest results."""
+        self.assertEqual(self.results(latest=True).count(), 1)
+
+
+    def test_series(self):
+        """Returns results of all member runs of a series."""
+        series = self.F.RunFactory.create(is_series=True)
+        self.run.series = series
+        self.run.save()
+
+        self.assertEqual(self.export.results_for(series=series).count(), 2)
+
+
+    def test_productversion(self):
+        """Returns results of all runs of a productversion."""
+        self.F.ResultFactory.create()
+
+        self.assertEqual(
+            self.export.results_for(
+                productversion=self.run.productversion).count(),
+            2)
+
+
+    def test_nothing(self):
+        """Must give something to export."""
+        with self.assertRaises(ValueError):
+            self.export.results_for()
+
+
+
+class IterRowsTest(ExportTestMixin, case.DBTestCase):
+    """Tests for iter_rows and iter_chunks."""
+    def test_rows(self):
+        """Rows include result, case, environment and bug data."""
+        rows = list(self.export.iter_rows(self.results()))
+
+        self.assertEqual(len(rows), 2)
+        row = rows[1]
+        self.assertEqual(row["run"], "FF10")
+        self.assertEqual(row["name"], "Open URL")
+        self.assertEqual(row["idprefix"], "pre")
+        self.assertEqual(row["tester"], "tester")
+        self.assertEqual(row["status"], "failed")
+        self.assertEqual(row["environment"], "English, Linux")
+        self.assertEqual(row["bug_urls"], ["http://example.com/bug/1"])
+        self.assertTrue(row["is_latest"])
+        self.assertFalse(rows[0]["is_latest"])
+
+
+    def test_chunks(self):
+        """Results are fetched in pk-ranged chunks of given size."""
+        chunks = list(self.export.iter_chunks(self.results(), chunk_size=1))
+
+        self.assertEqual([len(c) for c in chunks], [1, 1])
+        self.assertTrue(chunks[0][0]["id"] < chunks[1][0]["id"])
+
+
+    def test_constant_queries_per_chunk(self):
+        """Each chunk costs one query for results and one for bug URLs."""
+        results = self.results()
+        with self.assertNumQueries(6):
+            list(self.export.iter_rows(results, chunk_size=1))
+
+
+
+class WritersTest(ExportTestMixin, case.DBTestCase):
+    """Tests for export formats."""
+    def output(self, format, **kwargs):
+        """Return full export output for the run in given format."""
+        return "".join(self.export.export(self.results(**kwargs), format))
+
+
+    def test_csv(self):
+        """CSV has header row and one row per result."""
+        lines = self.output("csv").splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0].split(","), self.export.COLUMNS)
+        self.assertIn("English, Linux", lines[2])
+        self.assertIn("http://example.com/bug/1", lines[2])
+
+
+    def test_csv_empty(self):
+        """CSV of no results is just a header."""
+        self.run.runcaseversions.all().delete()
+
+        self.assertEqual(
+            self.output("csv").splitlines(), [",".join(self.export.COLUMNS)])
+
+
+    def test_jsonl(self):
+        """JSON Lines has one JSON document per result."""
+        docs = [json.loads(l) for l in self.output("jsonl").splitlines()]
+
+        self.assertEqual([d["status"] for d in docs], ["passed", "failed"])
+        self.assertEqual(docs[0]["case_id"], self.rcv.caseversion.case.id)
+
+
+    def test_junit(self):
+        """JUnit has a testsuite per run, with latest results only."""
+        soup = BeautifulStoneSoup(
+            self.output("junit"), selfClosingTags=["skipped"])
+
+        suite = soup.find("testsuite")
+        self.assertEqual(suite["name"], "FF10")
+        self.assertEqual(suite["tests"], "1")
+        self.assertEqual(suite["failures"], "1")
+        testcases = suite.findAll("testcase")
+        self.assertEqual(len(testcases), 1)
+        self.assertEqual(
+            testcases[0]["name"],
+            "pre-{0} Open URL".format(self.rcv.caseversion.case.id))
+        self.assertEqual(testcases[0]["classname"], "English, Linux")
+        self.assertEqual(
+            testcases[0].find("failure")["message"],
+            "broken http://example.com/bug/1")
+
+
+    def test_bad_format(self):
+        """Unknown format is a ValueError."""
+        with self.assertRaises(ValueError):
+            self.output("xls")
@@ -0,0 +1,303 @@
+"""
+Tests for bulk JUnit XML result ingestion.
+
+"""
+from cStringIO import StringIO
+
+from mock import patch
+
+from tests import case
+
+
+
+class IngestTestMixin(object):
+    """Shortcuts for ingestion tests."""
+    @property
+    def ingest(self):
+        """The module under test."""
+        from moztrap.model.execution import ingest
+        return ingest
+
+
+    def xml(self, *testcases):
+        """Return file-like JUnit XML with given testcase elements."""
+        return StringIO(
+            '<?xml version="1.0"?><testsuites><testsuite name="s">'
+            + "".join(testcases) +
+            "</testsuite></testsuites>"
+            )
+
+
+
+class IngestRunTestMixin(IngestTestMixin):
+    """Create a run with two cases in two environments."""
+    def setUp(self):
+        """Set up run, cases and tester."""
+        super(IngestRunTestMixin, self).setUp()
+        self.envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux", "OS X"]})
+        self.run = self.F.RunFactory.create(environments=self.envs)
+        self.rcv1 = self.F.RunCaseVersionFactory.create(
+            run=self.run,
+            caseversion__name="Open URL",
+            caseversion__case__idprefix="pre",
+            environments=self.envs,
+            )
+        self.rcv2 = self.F.RunCaseVersionFactory.create(
+            run=self.run,
+            caseversion__name="Close tab",
+            caseversion__productversion=self.run.productversion,
+            environments=[self.envs[0]],
+            )
+        self.case1 = self.rcv1.caseversion.case
+        self.case2 = self.rcv2.caseversion.case
+        self.tester = self.F.UserFactory.create()
+
+
+    def ingester(self, **kwargs):
+        """Return an ingester for the run."""
+        kwargs.setdefault("environment", self.envs[0])
+        return self.ingest.JUnitIngester(self.run, self.tester, **kwargs)
+
+
+
+class IterTestCasesTest(IngestTestMixin, case.TestCase):
+    """Tests for iter_testcases."""
+    def test_statuses(self):
+        """Outcome elements map to result statuses."""
+        testcases = list(self.ingest.iter_testcases(self.xml(
+                    '<testcase name="a" classname="c" />',
+                    '<testcase name="b"><failure message="m">t</failure>'
+                    '</testcase>',
+                    '<testcase name="c"><error>trace</error></testcase>',
+                    '<testcase name="d"><skipped /></testcase>',
+                    )))
+
+        self.assertEqual(
+            [(t.name, t.status, t.message) for t in testcases],
+            [
+                ("a", "passed", ""),
+                ("b", "failed", "m"),
+                ("c", "invalidated", "trace"),
+                ("d", None, ""),
+                ]
+            )
+        self.assertEqual(testcases[0].classname, "c")
+
+
+    def test_properties(self):
+        """Step number and bug are read from testcase properties."""
+        testcases = list(self.ingest.iter_testcases(self.xml(
+                    '<testcase name="a"><properties>'
+                    '<property name="stepnumber" value="2" />'
+                    '<property name="bug" value="http://example.com/1" />'
+                    '</properties><failure /></testcase>',
+                    )))
+
+        self.assertEqual(testcases[0].stepnumber, 2)
+        self.assertEqual(testcases[0].bug, "http://example.com/1")
+
+
+    def test_bad_xml(self):
+        """Malformed XML raises IngestError."""
+        with self.assertRaises(self.ingest.IngestError):
+            list(self.ingest.iter_testcases(StringIO("<testsuite><testcase")))
+
+
+
+class RunCaseVersionMapTest(IngestRunTestMixin, case.DBTestCase):
+    """Tests for RunCaseVersionMap."""
+    def test_single_query(self):
+        """All runcaseversions and environment labels cost two queries."""
+        with self.assertNumQueries(2):
+            self.ingest.RunCaseVersionMap(self.run)
+
+
+    def test_case_id(self):
+        """Testcase names match by prefixed ID, bare ID or case name."""
+        rcvs = self.ingest.RunCaseVersionMap(self.run)
+
+        self.assertEqual(
+            rcvs.case_id("pre-{0} Open URL".format(self.case1.id)),
+            self.case1.id)
+        self.assertEqual(rcvs.case_id(str(self.case2.id)), self.case2.id)
+        self.assertEqual(rcvs.case_id("Close tab"), self.case2.id)
+        self.assertEqual(rcvs.case_id("bad-{0}".format(self.case1.id)), None)
+        self.assertEqual(rcvs.case_id("Unknown"), None)
+
+
+    def test_environment_id(self):
+        """Classnames match environment labels."""
+        rcvs = self.ingest.RunCaseVersionMap(self.run)
+
+        self.assertEqual(rcvs.environment_id("OS X"), self.envs[1].id)
+        self.assertEqual(rcvs.environment_id("Windows"), None)
+
+
+    def test_get(self):
+        """Returns rcv and caseversion IDs for case in environment."""
+        rcvs = self.ingest.RunCaseVersionMap(self.run)
+
+        self.assertEqual(
+            rcvs.get(self.case2.id, self.envs[0].id),
+            (self.rcv2.id, self.rcv2.caseversion.id))
+        self.assertEqual(rcvs.get(self.case2.id, self.envs[1].id), None)
+
+
+
+class JUnitIngesterTest(IngestRunTestMixin, case.DBTestCase):
+    """Tests for JUnitIngester."""
+    @property
+    def model(self):
+        """The model module."""
+        from moztrap import model
+        return model
+
+
+    def test_results(self):
+        """Creates a result per matched testcase."""
+        result = self.ingester().ingest(self.xml(
+                '<testcase name="Open URL" />',
+                '<testcase name="Close tab"><failure message="oops" />'
+                '</testcase>',
+                ))
+
+        self.assertEqual(result.num_cases, 2)
+        self.assertEqual(result.num_results, 2)
+        self.assertEqual(
+            dict(
+                (r.runcaseversion, (r.status, r.comment, r.tester))
+                for r in self.model.Result.objects.filter(
+                    environment=self.envs[0])
+                ),
+            {
+                self.rcv1: ("passed", "", self.tester),
+                self.rcv2: ("failed", "oops", self.tester),
+                }
+            )
+
+
+    def test_classname_environment(self):
+        """Without environment, classname is matched to environment label."""
+        self.ingester(environment=None).ingest(self.xml(
+                '<testcase name="Open URL" classname="OS X" />'))
+
+        self.assertEqual(
+            self.model.Result.objects.get().environment, self.envs[1])
+
+
+    def test_warnings(self):
+        """Unmatched testcases are skipped with warnings."""
+        result = self.ingester(environment=None).ingest(self.xml(
+                '<testcase name="Unknown" classname="Linux" />',
+                '<testcase name="Open URL" classname="Windows" />',
+                '<testcase name="Close tab" classname="OS X" />',
+                '<testcase name="Open URL"><skipped /></testcase>',
+                ))
+
+        self.assertEqual(result.num_results, 0)
+        self.assertEqual(result.num_skipped, 1)
+        self.assertEqual(
+            [w["reason"] for w in result.warnings],
+            [
+                result.SKIP_NO_CASE,
+                result.SKIP_NO_ENVIRONMENT,
+                result.SKIP_NOT_IN_ENVIRONMENT,
+                ]
+            )
+        self.assertEqual(self.model.Result.objects.count(), 0)
+
+
+    def test_latest(self):
+        """Only the newest result per rcv/environment/tester is latest."""
+        old = self.F.ResultFactory.create(
+            runcaseversion=self.rcv1,
+            environment=self.envs[0],
+            tester=self.tester,
+            )
+        other = self.F.ResultFactory.create(
+            runcaseversion=self.rcv1, environment=self.envs[0])
+
+        self.ingester(batch_size=1).ingest(self.xml(
+                '<testcase name="Open URL"><failure /></testcase>',
+                '<testcase name="Open URL" />',
+                ))
+
+        latest = self.model.Result.objects.filter(is_latest=True)
+        self.assertEqual(
+            set((r.tester, r.status) for r in latest),
+            set([(other.tester, "assigned"), (self.tester, "passed")]))
+        self.assertFalse(self.refresh(old).is_latest)
+
+
+    def test_latest_in_batch(self):
+        """Within one batch, the last result for a key is latest."""
+        self.ingester().ingest(self.xml(
+                '<testcase name="Open URL"><failure /></testcase>',
+                '<testcase name="Open URL" />',
+                ))
+
+        self.assertEqual(
+            self.model.Result.objects.get(is_latest=True).status, "passed")
+
+
+    def test_stepresult(self):
+        """Failed testcase with step number records a failed step result."""
+        self.F.CaseStepFactory.create(
+            caseversion=self.rcv1.caseversion, number=1)
+        step = self.F.CaseStepFactory.create(
+            caseversion=self.rcv1.caseversion, number=2)
+
+        self.ingester().ingest(self.xml(
+                '<testcase name="Close tab" />',
+                '<testcase name="Open URL"><properties>'
+                '<property name="stepnumber" value="2" />'
+                '<property name="bug" value="http://example.com/1" />'
+                '</properties><failure /></testcase>',
+                ))
+
+        sr = self.model.StepResult.objects.get()
+        self.assertEqual(sr.step, step)
+        self.assertEqual(sr.status, "failed")
+        self.assertEqual(sr.bug_url, "http://example.com/1")
+        self.assertEqual(sr.result.runcaseversion, self.rcv1)
+
+
+    def test_stepresult_same_second(self):
+        """Step results attach to this import's results, not earlier ones."""
+        from datetime import datetime
+        self.F.CaseStepFactory.create(
+            caseversion=self.rcv1.caseversion, number=1)
+        failure = '<testcase name="Open URL">{0}<failure /></testcase>'
+        step = (
+            '<properties><property name="stepnumber" value="1" />'
+            '</properties>'
+            )
+
+        with patch("moztrap.model.execution.ingest.utcnow") as utcnow:
+            utcnow.return_value = datetime(2012, 1, 1)
+            self.ingester().ingest(self.xml(failure.format("")))
+            self.ingester().ingest(self.xml(failure.format(step)))
+
+        sr = self.model.StepResult.objects.get()
+        self.assertEqual(
+            sr.result, self.model.Result.objects.order_by("-id")[0])
+
+
+    def test_constant_queries(self):
+        """Query count per batch doesn't depend on number of testcases."""
+        ingester = self.ingester()
+        xml = self.xml(*['<testcase name="Open URL" />'] * 20)
+
+        # one query for stale latest results, one for the insert
+        with self.assertNumQueries(2):
+            ingester.ingest(xml)
+
+
+    def test_cases_per_second(self):
+        """Throughput is reported."""
+        result = self.ingester().ingest(self.xml('<testcase name="Open URL" />'))
+
+        self.assertTrue(result.cases_per_second > 0)
+        self.assertEqual(
+            result.get_as_list()[0], "Recorded 1 results from 1 testcases (0 skipped)")
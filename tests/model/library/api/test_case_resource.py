@@ -227,3 +227,36 @@ class CaseSelectionResourceTest(case.api.ApiTestCase):
             self.included_param,
             exp_objects=exp_objects,
             )
+
+
+    def test_included_in_suite_order(self):
+        """Included cases are listed in the order of the suite."""
+
+        data = self._setup_two_included()
+        data["sc1"].order = 2
+        data["sc1"].save()
+
+        exp_objects = [self.get_exp_obj(cv, order=sc.order) for cv, sc in [
+            (data["cv2"], data["sc2"]),
+            (data["cv1"], data["sc1"]),
+            ]]
+
+        self._do_test(
+            data["s"].id,
+            self.included_param,
+            exp_objects=exp_objects,
+            )
+
+
+    def test_included_queries(self):
+        """Included cases, their order and tags take a fixed few queries."""
+
+        data = self._setup_two_included()
+        t = self.F.TagFactory.create(
+            product=data["cv1"].productversion.product)
+        data["cv1"].tags.add(t)
+        data["cv2"].tags.add(t)
+
+        # count, caseversions, tags, tag products
+        with self.assertNumQueries(4):
+            self.get_list(params={self.included_param: data["s"].id})
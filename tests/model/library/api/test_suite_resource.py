@@ -268,3 +268,47 @@ class SuiteSelectionResourceTest(case.api.ApiTestCase):
             self.included_param,
             exp_objects=exp_objects,
             )
+
+
+    def test_included_in_run_order(self):
+        """Included suites are listed in the order of the run."""
+
+        data = self._setup_two_included()
+        data["runsuite1"].order = 2
+        data["runsuite1"].save()
+        run_uri = unicode(self.get_detail_url("run", data["run"].id))
+
+        exp_objects = [self.get_exp_obj(s, [run_uri], rs.order) for s, rs in [
+            (data["s2"], data["runsuite2"]),
+            (data["s1"], data["runsuite1"]),
+            ]]
+
+        self._do_test(
+            data["run"].id,
+            self.included_param,
+            exp_objects=exp_objects,
+            )
+
+
+    def test_case_count(self):
+        """Case count counts only cases not deleted."""
+
+        s = self.factory.create()
+        self.F.SuiteCaseFactory.create(suite=s)
+        self.F.SuiteCaseFactory.create(suite=s).case.delete()
+
+        res = self.get_list(params={self.available_param: -1})
+
+        self.assertEqual(res.json["objects"][0]["case_count"], 1)
+
+
+    def test_included_queries(self):
+        """Included suites, their case counts and order take fixed queries."""
+
+        data = self._setup_two_included()
+        self.F.SuiteCaseFactory.create(suite=data["s1"])
+        self.F.SuiteCaseFactory.create(suite=data["s2"])
+
+        # count, suites, runs
+        with self.assertNumQueries(3):
+            self.get_list(params={self.included_param: data["run"].id})
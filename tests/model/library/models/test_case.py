@@ -242,6 +242,24 @@ class CaseVersionTest(case.DBTestCase):
             )
 
 
+    def test_bulk_deleting_versions(self):
+        """Bulk deletion updates latest versions and deletes empty cases."""
+        c1 = self.F.CaseFactory.create()
+        p = c1.product
+        pv1 = self.F.ProductVersionFactory.create(product=p, version="1")
+        pv2 = self.F.ProductVersionFactory.create(product=p, version="2")
+        self.F.CaseVersionFactory.create(productversion=pv1, case=c1)
+        self.F.CaseVersionFactory.create(productversion=pv2, case=c1)
+        c2 = self.F.CaseFactory.create(product=p)
+        self.F.CaseVersionFactory.create(productversion=pv2, case=c2)
+
+        self.model.CaseVersion.bulk_delete(
+            self.model.CaseVersion.objects.filter(productversion=pv2))
+
+        self.assertEqual([v.latest for v in c1.versions.all()], [True])
+        self.assertEqual(list(self.model.Case.objects.all()), [c1])
+
+
     def test_undeleting_version_sets_latest(self):
         """Undeleting a case version updates latest version."""
         c = self.F.CaseFactory.create()
@@ -275,3 +275,100 @@ class ParseBulkTest(case.TestCase):
                     },
                 ]
             )
+
+
+
+class IterParseBulkTest(case.TestCase):
+    """Tests for BulkParser.iter_parse."""
+    @property
+    def parser(self):
+        from moztrap.model.library.bulk import BulkParser
+        return BulkParser
+
+
+    def test_line_numbers(self):
+        """Each test case carries the number of the line it starts on."""
+        lines = textwrap.dedent("""
+            Test that one
+            When I do it
+            Then it works
+
+            Test that two
+            When I do it
+            Then it works
+            """).splitlines()
+
+        self.assertEqual(
+            [(d["name"], d["line"]) for d in self.parser().iter_parse(lines)],
+            [("Test that one", 2), ("Test that two", 6)],
+            )
+
+
+    def test_incremental(self):
+        """A test case is yielded as soon as the next one starts."""
+        def lines():
+            yield "Test that one"
+            yield "When I do it"
+            yield "Then it works"
+            yield "Test that two"
+            raise AssertionError("read too far")
+
+        self.assertEqual(
+            next(self.parser().iter_parse(lines())),
+            {
+                "name": "Test that one",
+                "description": "",
+                "steps": [
+                    {
+                        "instruction": "When I do it",
+                        "expected": "Then it works",
+                        },
+                    ],
+                "line": 1,
+                },
+            )
+
+
+    def test_all_errors(self):
+        """Parsing continues after an error, at the next test case."""
+        data = list(
+            self.parser().iter_parse(
+                textwrap.dedent("""
+                Junk
+                More junk
+                Test that one
+                When I do it
+                Then it works
+                Test that two
+                """).splitlines()
+                )
+            )
+
+        self.assertEqual(
+            [(d.get("name"), d["line"], d.get("error")) for d in data],
+            [
+                (None, 2, "Expected 'Test that ...', not 'Junk'"),
+                ("Test that one", 4, None),
+                (
+                    "Test that two",
+                    7,
+                    "Unexpected end of input, looking for 'When ' or "
+                    "'And When '",
+                    ),
+                ],
+            )
+
+
+    def test_empty(self):
+        """Empty input is an error."""
+        self.assertEqual(
+            list(self.parser().iter_parse([])),
+            [
+                {
+                    "line": 1,
+                    "error": (
+                        "Unexpected end of input, looking for 'Test That '"
+                        ),
+                    },
+                ]
+            )
@@ -0,0 +1,206 @@
+"""
+Tests for bulk case creation.
+
+"""
+from django.db import connection
+
+from mock import patch
+
+from tests import case
+
+
+
+class CaseCreatorTest(case.DBTestCase):
+    """Tests for CaseCreator."""
+    def setUp(self):
+        """Set up a product with two versions and a user."""
+        super(CaseCreatorTest, self).setUp()
+        self.pv1 = self.F.ProductVersionFactory.create(version="1.0")
+        self.pv2 = self.F.ProductVersionFactory.create(
+            product=self.pv1.product, version="2.0")
+        self.user = self.F.UserFactory.create()
+
+
+    def creator(self, productversions=None, **kwargs):
+        """Return a CaseCreator for the product versions."""
+        from moztrap.model import CaseCreator
+        kwargs.setdefault("user", self.user)
+        kwargs.setdefault("status", "active")
+        return CaseCreator(
+            self.pv1.product,
+            productversions or [self.pv1, self.pv2],
+            **kwargs
+            )
+
+
+    def data(self, *names):
+        """Return case data with a two-step case for each name."""
+        return [
+            {
+                "name": name,
+                "description": "about " + name,
+                "steps": [
+                    {"instruction": "do " + name, "expected": "see it"},
+                    {"instruction": "undo " + name},
+                    ],
+                }
+            for name in names
+            ]
+
+
+    def test_cases(self):
+        """Creates and returns a case for each case data."""
+        cases = self.creator(idprefix="pre").create(self.data("a", "b"))
+
+        self.assertEqual(len(cases), 2)
+        self.assertEqual(
+            set(self.model.Case.objects.all()), set(cases))
+        for c in cases:
+            self.assertEqual(c.product, self.pv1.product)
+            self.assertEqual(c.idprefix, "pre")
+            self.assertEqual(c.created_by, self.user)
+            self.assertEqual(c.modified_by, self.user)
+
+
+    def test_batches(self):
+        """Cases are read from any iterable and created in batches."""
+        cases = self.creator(batch_size=2).create(
+            iter(self.data("a", "b", "c")))
+
+        self.assertEqual(
+            [[cv.name for cv in c.versions.all()] for c in cases],
+            [["a", "a"], ["b", "b"], ["c", "c"]],
+            )
+        self.assertEqual(self.model.Case.objects.count(), 3)
+
+
+    def test_same_second(self):
+        """Cases created at the same time by an earlier add aren't returned."""
+        from datetime import datetime
+        with patch("moztrap.model.library.bulkcreate.utcnow") as utcnow:
+            utcnow.return_value = datetime(2012, 1, 1)
+            first = self.creator().create(self.data("a"))
+            second = self.creator().create(self.data("b"))
+
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first, second)
+        self.assertEqual(
+            [cv.name for cv in second[0].versions.all()], ["b", "b"])
+
+
+    def test_no_cases(self):
+        """Creating no cases takes no queries."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.creator().create([]), [])
+
+
+    def test_versions(self):
+        """Each case has a version in each product version."""
+        cases = self.creator().create(self.data("a", "b"))
+
+        for c, name in zip(cases, ["a", "b"]):
+            versions = list(c.versions.all())
+            self.assertEqual(
+                [cv.productversion for cv in versions], [self.pv1, self.pv2])
+            for cv in versions:
+                self.assertEqual(cv.name, name)
+                self.assertEqual(cv.description, "about " + name)
+                self.assertEqual(cv.status, "active")
+                self.assertEqual(cv.created_by, self.user)
+
+
+    def test_latest(self):
+        """Only the version in the latest product version is latest."""
+        cases = self.creator([self.pv2, self.pv1]).create(self.data("a"))
+
+        self.assertEqual(
+            [(cv.productversion, cv.latest) for cv in cases[0].versions.all()],
+            [(self.pv1, False), (self.pv2, True)],
+            )
+
+
+    def test_steps(self):
+        """Each version gets the steps of its case, numbered in order."""
+        cases = self.creator().create(self.data("a"))
+
+        for cv in cases[0].versions.all():
+            self.assertEqual(
+                [(s.number, s.instruction, s.expected)
+                 for s in cv.steps.order_by("number")],
+                [(1, "do a", "see it"), (2, "undo a", "")],
+                )
+
+
+    def test_environments(self):
+        """Versions inherit the environments of their product version."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux", "OS X"]})
+        self.pv1.environments.add(*envs)
+        self.pv2.environments.add(envs[0])
+
+        cases = self.creator().create(self.data("a"))
+
+        cv1, cv2 = cases[0].versions.all()
+        self.assertEqual(set(cv1.environments.all()), set(envs))
+        self.assertEqual(set(cv2.environments.all()), set([envs[0]]))
+        self.assertFalse(cv1.envs_narrowed)
+
+
+    def test_tags(self):
+        """All new versions are tagged with given tags."""
+        t1 = self.F.TagFactory.create()
+        t2 = self.F.TagFactory.create()
+
+        cases = self.creator(tags=[t1.id, t2.id]).create(self.data("a", "b"))
+
+        for c in cases:
+            for cv in c.versions.all():
+                self.assertEqual(set(cv.tags.all()), set([t1, t2]))
+
+
+    def test_suite(self):
+        """New cases are appended to the suite in order."""
+        suite = self.F.SuiteFactory.create(product=self.pv1.product)
+        existing = self.F.SuiteCaseFactory.create(suite=suite, order=3)
+
+        cases = self.creator(suite=suite).create(self.data("a", "b"))
+
+        self.assertEqual(
+            [(sc.case, sc.order) for sc in
+             self.model.SuiteCase.objects.filter(suite=suite).order_by(
+                    "order")],
+            [(existing.case, 3), (cases[0], 4), (cases[1], 5)],
+            )
+
+
+    def test_invalidates_cache(self):
+        """Cached data of tagged and environment-filtered versions is stale."""
+        from moztrap import cache
+        from moztrap.model import CaseVersion, Tag
+        t = self.F.TagFactory.create()
+        before = cache.generations(
+            CaseVersion.tags.through, CaseVersion.environments.through, Tag)
+
+        self.creator(tags=[t.id]).create(self.data("a"))
+
+        after = cache.generations(
+            CaseVersion.tags.through, CaseVersion.environments.through, Tag)
+        for b, a in zip(before, after):
+            self.assertGreater(a, b)
+
+
+    def test_queries(self):
+        """Number of queries does not depend on versions or steps."""
+        self.pv1.environments.add(self.F.EnvironmentFactory.create())
+        self.pv2.environments.add(self.F.EnvironmentFactory.create())
+        t = self.F.TagFactory.create()
+        suite = self.F.SuiteFactory.create(product=self.pv1.product)
+        creator = self.creator(tags=[t.id], suite=suite)
+        # on SQLite, cases are inserted one by one (see CaseCreator)
+        case_inserts = 3 if connection.vendor == "sqlite" else 1
+
+        # max case ID, select cases, suite order, suitecases, caseversions,
+        # select caseversions, steps, inherited environments, environments,
+        # tags
+        with self.assertNumQueries(10 + case_inserts):
+            creator.create(self.data("a", "b", "c"))
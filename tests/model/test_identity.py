@@ -0,0 +1,226 @@
+"""
+Tests for request-scoped identity map.
+
+"""
+from django.core.exceptions import MiddlewareNotUsed
+from django.test.utils import override_settings
+
+from mock import Mock
+
+from tests import case
+
+
+
+class IdentityMapTest(case.DBTestCase):
+    """Tests for fetching related objects through the identity map."""
+    @property
+    def identity(self):
+        from moztrap.model import identity
+        return identity
+
+
+    def test_inactive(self):
+        """Without an active map, each foreign-key fetch queries."""
+        pv = self.F.ProductVersionFactory.create()
+        r1 = self.F.RunFactory.create(productversion=pv)
+        r2 = self.F.RunFactory.create(productversion=pv)
+        runs = list(self.model.Run.objects.filter(pk__in=[r1.pk, r2.pk]))
+
+        with self.assertNumQueries(2):
+            for run in runs:
+                run.productversion
+
+
+    def test_dedupes_foreign_keys(self):
+        """Same foreign-key target of different objects is fetched once."""
+        pv = self.F.ProductVersionFactory.create()
+        r1 = self.F.RunFactory.create(productversion=pv)
+        r2 = self.F.RunFactory.create(productversion=pv)
+        runs = list(self.model.Run.objects.filter(pk__in=[r1.pk, r2.pk]))
+
+        with self.identity.active_identity_map():
+            with self.assertNumQueries(1):
+                self.assertIs(
+                    runs[0].productversion, runs[1].productversion)
+
+
+    def test_dedupes_users(self):
+        """Users (e.g. created_by) are fetched once, too."""
+        u = self.F.UserFactory.create()
+        p1 = self.F.ProductFactory.create(user=u)
+        p2 = self.F.ProductFactory.create(user=u)
+        products = list(
+            self.model.Product.objects.filter(pk__in=[p1.pk, p2.pk]))
+
+        with self.identity.active_identity_map():
+            with self.assertNumQueries(1):
+                self.assertEqual(products[0].created_by, u)
+                self.assertIs(products[1].created_by, products[0].created_by)
+
+
+    def test_deleted_target(self):
+        """A deleted foreign-key target is still fetched."""
+        r = self.F.RunFactory.create()
+        r.productversion.delete()
+        run = self.model.Run.everything.get(pk=r.pk)
+
+        with self.identity.active_identity_map():
+            self.assertEqual(run.productversion.pk, r.productversion.pk)
+
+
+    def test_filtered_get_not_served(self):
+        """A get() on a filtered queryset always queries."""
+        pv = self.F.ProductVersionFactory.create()
+
+        with self.identity.active_identity_map():
+            self.model.ProductVersion.everything.get(pk=pv.pk)
+            pv.delete()
+
+            with self.assertRaises(self.model.ProductVersion.DoesNotExist):
+                self.model.ProductVersion.objects.get(pk=pv.pk)
+
+
+    def test_forgets_saved(self):
+        """A saved instance is fetched again."""
+        pv = self.F.ProductVersionFactory.create()
+        run = self.F.RunFactory.create(productversion=pv)
+        run = self.model.Run.objects.get(pk=run.pk)
+
+        with self.identity.active_identity_map():
+            self.model.ProductVersion.everything.get(pk=pv.pk)
+            pv.codename = "new"
+            pv.save()
+
+            self.assertEqual(run.productversion.codename, "new")
+
+
+    def test_forgets_bulk_updated(self):
+        """Instances of a model updated in bulk are fetched again."""
+        pv = self.F.ProductVersionFactory.create()
+        run = self.F.RunFactory.create(productversion=pv)
+        run = self.model.Run.objects.get(pk=run.pk)
+
+        with self.identity.active_identity_map():
+            self.model.ProductVersion.everything.get(pk=pv.pk)
+            self.model.ProductVersion.objects.filter(pk=pv.pk).update(
+                codename="new")
+
+            self.assertEqual(run.productversion.codename, "new")
+
+
+    def test_forgets_soft_deleted(self):
+        """Soft-deleted instances are fetched again."""
+        pv = self.F.ProductVersionFactory.create()
+        run = self.F.RunFactory.create(productversion=pv)
+        run = self.model.Run.everything.get(pk=run.pk)
+
+        with self.identity.active_identity_map():
+            self.model.ProductVersion.everything.get(pk=pv.pk)
+            pv.delete()
+
+            self.assertIsNotNone(run.productversion.deleted_on)
+
+
+    def test_prime(self):
+        """Primed instances are served without querying."""
+        pv = self.F.ProductVersionFactory.create()
+        run = self.F.RunFactory.create(productversion=pv)
+        run = self.model.Run.objects.get(pk=run.pk)
+
+        with self.identity.active_identity_map():
+            self.identity.prime([pv])
+
+            with self.assertNumQueries(0):
+                self.assertIs(run.productversion, pv)
+
+
+    def test_prime_related(self):
+        """prime_related fetches all targets of a foreign key at once."""
+        pv1 = self.F.ProductVersionFactory.create()
+        pv2 = self.F.ProductVersionFactory.create()
+        runs = [
+            self.F.RunFactory.create(productversion=pv1),
+            self.F.RunFactory.create(productversion=pv1),
+            self.F.RunFactory.create(productversion=pv2),
+            ]
+        runs = list(self.model.Run.objects.filter(
+                pk__in=[r.pk for r in runs]).order_by("id"))
+
+        with self.identity.active_identity_map():
+            with self.assertNumQueries(1):
+                self.identity.prime_related(runs, "productversion")
+
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    [r.productversion for r in runs], [pv1, pv1, pv2])
+                self.model.ProductVersion.everything.get(pk=pv2.pk)
+
+
+    def test_in_bulk(self):
+        """in_bulk only fetches instances not already in the map."""
+        pv1 = self.F.ProductVersionFactory.create()
+        pv2 = self.F.ProductVersionFactory.create()
+
+        with self.identity.active_identity_map():
+            self.identity.prime([pv1])
+
+            with self.assertNumQueries(1):
+                found = self.model.ProductVersion.everything.in_bulk(
+                    [pv1.pk, pv2.pk])
+
+        self.assertIs(found[pv1.pk], pv1)
+        self.assertEqual(found[pv2.pk], pv2)
+
+
+    def test_base_manager_plain(self):
+        """Models' base managers (for saving and deleting) stay plain."""
+        from django.db.models import Manager
+
+        self.assertIs(self.model.Run._base_manager.__class__, Manager)
+        self.assertIs(self.model.User._base_manager.__class__, Manager)
+
+
+
+class IdentityMapMiddlewareTest(case.TestCase):
+    """Tests for IdentityMapMiddleware."""
+    @property
+    def middleware(self):
+        from moztrap.model.identity import IdentityMapMiddleware
+        return IdentityMapMiddleware
+
+
+    @property
+    def identity(self):
+        from moztrap.model import identity
+        return identity
+
+
+    @override_settings(IDENTITY_MAP_ENABLED=False)
+    def test_not_used_when_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            self.middleware()
+
+
+    @override_settings(IDENTITY_MAP_ENABLED=True)
+    def test_request_scoped(self):
+        """Map is active from request until response."""
+        m = self.middleware()
+        response = Mock()
+
+        m.process_request(Mock())
+
+        self.assertEqual(self.identity.active_map(), {})
+
+        self.assertIs(m.process_response(Mock(), response), response)
+        self.assertIsNone(self.identity.active_map())
+
+
+    @override_settings(IDENTITY_MAP_ENABLED=True)
+    def test_exception(self):
+        """Map is discarded on exception."""
+        m = self.middleware()
+
+        m.process_request(Mock())
+        m.process_exception(Mock(), Exception())
+
+        self.assertIsNone(self.identity.active_map())
@@ -0,0 +1,147 @@
+"""
+Tests for ordered memberships.
+
+"""
+from tests import case
+
+
+
+class OrderedMembershipTest(case.DBTestCase):
+    """Tests for OrderedMembership, using cases in suites."""
+    def setUp(self):
+        """Set up a suite and four cases of its product."""
+        super(OrderedMembershipTest, self).setUp()
+        self.suite = self.F.SuiteFactory.create()
+        self.cases = [
+            self.F.CaseFactory.create(product=self.suite.product)
+            for i in range(4)
+            ]
+
+
+    def membership(self, gap=100):
+        """Return OrderedMembership of cases in suites with given gap."""
+        from moztrap.model.membership import OrderedMembership
+        return OrderedMembership(
+            self.model.SuiteCase, "suite", "case", gap=gap)
+
+
+    def members(self):
+        """Return list of (case index, order) of the suite's members."""
+        return [
+            (self.cases.index(sc.case), sc.order)
+            for sc in self.model.SuiteCase.objects.filter(suite=self.suite)
+            ]
+
+
+    def set(self, indices, gap=100):
+        """Set members of the suite to cases at indices; return counts."""
+        return self.membership(gap).set(
+            self.suite, [self.cases[i] for i in indices])
+
+
+    def test_add(self):
+        """New members are inserted in order, spaced by the gap."""
+        self.assertEqual(self.set([2, 0, 1]), (3, 0, 0))
+
+        self.assertEqual(self.members(), [(2, 0), (0, 100), (1, 200)])
+
+
+    def test_ids(self):
+        """Members can be given by ID."""
+        self.membership().set(self.suite, [c.id for c in self.cases[:2]])
+
+        self.assertEqual(self.members(), [(0, 0), (1, 100)])
+
+
+    def test_unchanged(self):
+        """Setting the same members writes nothing."""
+        self.set([0, 1, 2])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.set([0, 1, 2]), (0, 0, 0))
+
+
+    def test_remove(self):
+        """Removed members are deleted; the others keep their order."""
+        self.set([0, 1, 2])
+
+        self.assertEqual(self.set([0, 2]), (0, 1, 0))
+
+        self.assertEqual(self.members(), [(0, 0), (2, 200)])
+        self.assertEqual(self.model.SuiteCase.everything.count(), 2)
+
+
+    def test_insert_between(self):
+        """A new member goes between its neighbors, without moving them."""
+        self.set([0, 1, 2])
+
+        self.assertEqual(self.set([0, 3, 1, 2]), (1, 0, 0))
+
+        self.assertEqual(
+            self.members(), [(0, 0), (3, 50), (1, 100), (2, 200)])
+
+
+    def test_move_one(self):
+        """Moving a single member updates a single row, in one query."""
+        self.set([0, 1, 2, 3])
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.set([3, 0, 1, 2]), (0, 0, 1))
+
+        self.assertEqual(
+            self.members(), [(3, -100), (0, 0), (1, 100), (2, 200)])
+
+
+    def test_move_to_middle(self):
+        """A member moved between two others gets an order between them."""
+        self.set([0, 1, 2, 3])
+
+        self.set([0, 3, 1, 2])
+
+        self.assertEqual(
+            self.members(), [(0, 0), (3, 50), (1, 100), (2, 200)])
+
+
+    def test_no_room_renumbers(self):
+        """With no room between neighbors, only changed rows are updated."""
+        self.set([0, 1, 2, 3], gap=1)
+
+        self.assertEqual(self.set([0, 2, 1, 3], gap=1), (0, 0, 2))
+
+        self.assertEqual(self.members(), [(0, 0), (2, 1), (1, 2), (3, 3)])
+
+
+    def test_reorder_tracks(self):
+        """Reordered rows get modified_by and a new cc_version."""
+        u = self.F.UserFactory.create()
+        self.set([0, 1])
+
+        self.membership().set(self.suite, [self.cases[1], self.cases[0]], u)
+
+        sc = self.model.SuiteCase.objects.get(case=self.cases[1])
+        self.assertEqual(sc.modified_by, u)
+        self.assertEqual(sc.cc_version, 1)
+
+
+
+class LongestIncreasingTest(case.TestCase):
+    """Tests for longest_increasing."""
+    def longest(self, values):
+        from moztrap.model.membership import longest_increasing
+        return longest_increasing(values)
+
+
+    def test_empty(self):
+        self.assertEqual(self.longest([]), [])
+
+
+    def test_sorted(self):
+        self.assertEqual(self.longest([1, 2, 3]), [0, 1, 2])
+
+
+    def test_one_moved(self):
+        self.assertEqual(self.longest([4, 1, 2, 3]), [1, 2, 3])
+
+
+    def test_strict(self):
+        self.assertEqual(len(self.longest([1, 1, 1])), 1)
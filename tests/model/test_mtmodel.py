@@ -622,6 +622,87 @@ class TeamModelTest(case.DBTestCase):
         self.assertIsNone(t.parent)
 
 
+    def test_team_owners(self):
+        """Team owners of many runs are resolved in one query."""
+        pv = self.F.ProductVersionFactory.create()
+        pv.product.add_to_team(self.F.UserFactory.create())
+        r1 = self.F.RunFactory.create(productversion=pv)
+        r2 = self.F.RunFactory.create(has_team=True)
+        r3 = self.F.RunFactory.create()
+
+        with self.assertNumQueries(1):
+            owners = self.model.Run.team_owners([r1, r2.id, r3])
+
+        self.assertEqual(
+            owners,
+            {
+                r1.id: (self.model.Product, pv.product.id),
+                r2.id: (self.model.Run, r2.id),
+                r3.id: (self.model.Product, r3.productversion.product.id),
+                },
+            )
+
+
+    def test_team_owners_cached(self):
+        """Resolved team owners are cached."""
+        r = self.F.RunFactory.create()
+        self.model.Run.team_owners([r])
+
+        with self.assertNumQueries(0):
+            self.model.Run.team_owners([r])
+
+
+    def test_team_owners_primed(self):
+        """Given instances remember their team owner."""
+        u = self.F.UserFactory.create()
+        r = self.F.RunFactory.create()
+        r.productversion.add_to_team(u)
+        r = self.model.Run.objects.get(pk=r.pk)
+        self.model.Run.team_owners([r])
+
+        # only the team itself is queried
+        with self.assertNumQueries(1):
+            self.assertEqual(list(r.team.all()), [u])
+
+
+    def test_ancestor_has_team_changed(self):
+        """Team owners are resolved again when an ancestor's team changes."""
+        r = self.F.RunFactory.create()
+        self.model.Run.team_owners([r])
+
+        r.productversion.has_team = True
+        r.productversion.save()
+
+        self.assertEqual(
+            self.model.Run.team_owners([r.id]),
+            {r.id: (self.model.ProductVersion, r.productversion.id)},
+            )
+
+
+    def test_add_to_team(self):
+        """Adding to an instance's team makes it its own team owner."""
+        u = self.F.UserFactory.create()
+        r = self.F.RunFactory.create()
+        r.team_owner
+
+        r.add_to_team(u)
+
+        self.assertEqual(r.team_owner, (self.model.Run, r.id))
+        self.assertEqual(
+            self.model.Run.team_owners([r.id]),
+            {r.id: (self.model.Run, r.id)},
+            )
+
+
+    def test_unsaved(self):
+        """The team of an unsaved instance is its parent's."""
+        pv = self.F.ProductVersionFactory.create(has_team=True)
+
+        r = self.model.Run(productversion=pv)
+
+        self.assertEqual(r.team_owner, (self.model.ProductVersion, pv.id))
+
+
 
 class DraftStatusModelTest(case.DBTestCase):
     """
@@ -688,6 +769,62 @@ class DraftStatusModelTest(case.DBTestCase):
         self.assertEqual(self.refresh(r).modified_by, u)
 
 
+    def test_bulk_deactivate(self):
+        """bulk_deactivate deactivates all given objects in one update."""
+        s1 = self.F.SuiteFactory.create(status="active")
+        s2 = self.F.SuiteFactory.create(status="draft")
+        u = self.F.UserFactory.create()
+
+        with self.assertNumQueries(1):
+            self.model.Suite.bulk_deactivate(
+                self.model.Suite.objects.all(), user=u)
+
+        for s in [s1, s2]:
+            s = self.refresh(s)
+            self.assertEqual(s.status, "disabled")
+            self.assertEqual(s.modified_by, u)
+            self.assertEqual(s.cc_version, 1)
+
+
+    def test_bulk_draft_overridden(self):
+        """If the model overrides the action method, it's called per object."""
+        r = self.F.RunFactory.create(status="active")
+
+        with patch.object(self.model.Run, "draft") as mock_draft:
+            self.model.Run.bulk_draft(self.model.Run.objects.all())
+
+        mock_draft.assert_called_once_with(user=None)
+        self.assertEqual(self.refresh(r).status, "active")
+
+
+
+class BulkDeleteTest(MTModelTestCase):
+    """Tests for MTModel.bulk_delete."""
+    def test_cascade(self):
+        """Deletes all given objects, cascading, in a single pass."""
+        p1 = self.F.ProductFactory.create()
+        p2 = self.F.ProductFactory.create()
+        self.F.SuiteFactory.create(product=p1)
+        u = self.F.UserFactory.create()
+
+        self.model.Product.bulk_delete(
+            self.model.Product.objects.all(), user=u)
+
+        self.assertEqual(self.model.Product.objects.count(), 0)
+        self.assertEqual(self.model.Suite.objects.count(), 0)
+        self.assertEqual(self.refresh(p2).deleted_by, u)
+
+
+    def test_overridden(self):
+        """If the model overrides delete, it's called for each object."""
+        self.F.CategoryFactory.create()
+
+        with patch.object(self.model.Category, "delete") as mock_delete:
+            self.model.Category.bulk_delete(self.model.Category.objects.all())
+
+        mock_delete.assert_called_once_with(user=None)
+
+
 
 class NotDeletedCountTest(case.DBTestCase):
     """Tests for NotDeletedCount aggregate."""
@@ -0,0 +1,145 @@
+"""
+Tests for scale dataset generator.
+
+"""
+from django.db.models import Count
+
+from tests import case
+
+
+
+class ScaleDataGeneratorTest(case.DBTestCase):
+    """Tests for ScaleDataGenerator."""
+    def generate(self, **kwargs):
+        """Generate a small dataset; return counts."""
+        from moztrap.model.scaledata import ScaleDataGenerator
+        dims = dict(
+            products=2, versions=2, cases=5, steps=2, tags=3, suites=2,
+            categories=2, elements=2, runs=2, results=40, testers=3)
+        dims.update(kwargs)
+        return ScaleDataGenerator(**dims).generate()
+
+
+    def test_counts(self):
+        """Creates the requested number of objects."""
+        counts = self.generate()
+
+        self.assertEqual(counts["Product"], 2)
+        self.assertEqual(counts["ProductVersion"], 4)
+        self.assertEqual(counts["Environment"], 4)
+        self.assertEqual(counts["Case"], 10)
+        self.assertEqual(counts["CaseVersion"], 20)
+        self.assertEqual(counts["CaseStep"], 40)
+        self.assertEqual(counts["SuiteCase"], 10)
+        self.assertEqual(counts["Run"], 8)
+        self.assertEqual(counts["RunCaseVersion"], 40)
+        self.assertEqual(counts["RunCaseVersion_environments"], 160)
+        self.assertEqual(counts["Result"], 320)
+        self.assertEqual(self.model.Result.objects.count(), 320)
+        self.assertEqual(self.model.User.objects.count(), 3)
+
+
+    def test_usable(self):
+        """Generated runs work with the models' own methods."""
+        self.generate()
+
+        run = self.model.Run.objects.all()[0]
+        self.assertEqual(run.status, "active")
+        self.assertEqual(run.runcaseversions.count(), 5)
+        self.assertEqual(run.environments.count(), 4)
+        self.assertEqual(
+            sum(run.result_summary().values()),
+            self.model.Result.objects.filter(
+                runcaseversion__run=run, is_latest=True).count(),
+            )
+        cv = self.model.CaseVersion.objects.filter(latest=True)[0]
+        self.assertEqual(cv.productversion.latest, True)
+        self.assertEqual([s.number for s in cv.steps.all()], [1, 2])
+
+
+    def test_latest(self):
+        """Exactly one latest result per tester, case and environment."""
+        self.generate(results=200)
+
+        results = self.model.Result.objects.values(
+            "tester", "runcaseversion", "environment")
+        keys = results.annotate(n=Count("id")).count()
+        self.assertEqual(keys, results.filter(is_latest=True).count())
+        self.assertTrue(keys < self.model.Result.objects.count())
+        self.assertFalse(
+            results.filter(is_latest=True).annotate(
+                n=Count("id")).filter(n__gt=1).exists())
+
+
+    def test_stepresults(self):
+        """Some failed results have failed step results with bug URLs."""
+        self.generate(results=500)
+
+        srs = self.model.StepResult.objects.all()
+        self.assertTrue(srs.exists())
+        for sr in srs:
+            self.assertEqual(sr.result.status, "failed")
+            self.assertEqual(
+                sr.step.caseversion, sr.result.runcaseversion.caseversion)
+            self.assertTrue(sr.bug_url)
+
+
+    def test_deterministic(self):
+        """Same seed gives the same data."""
+        def data():
+            return [
+                (r.status, r.is_latest, r.created_on, r.tester.username)
+                for r in self.model.Result.objects.order_by("-id")[:320]
+                ]
+
+        self.generate(seed=3)
+        first = data()
+        self.generate(seed=3)
+
+        self.assertEqual(data(), first)
+        self.generate(seed=4)
+        self.assertNotEqual(data(), first)
+
+
+
+class GenerateScaleDataCommandTest(case.DBTestCase):
+    """Tests for generate_scale_data management command."""
+    def call_command(self, *args, **kwargs):
+        """Runs the management command and returns (stdout, stderr) output."""
+        from cStringIO import StringIO
+        from django.core.management import call_command
+        from mock import patch
+
+        with patch("sys.stdout", StringIO()) as stdout:
+            with patch("sys.stderr", StringIO()) as stderr:
+                with patch("sys.exit"):
+                    call_command("generate_scale_data", *args, **kwargs)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return (stdout.read(), stderr.read())
+
+
+    def test_generate(self):
+        """Reports counts of generated objects."""
+        stdout, stderr = self.call_command(
+            cases=2, results=10, runs=1, versions=1)
+
+        self.assertIn("Case: 2\n", stdout)
+        self.assertIn("Result: 10\n", stdout)
+        self.assertIn("Generated ", stdout)
+
+
+    def test_negative(self):
+        """Dimensions must not be negative."""
+        stdout, stderr = self.call_command(cases=-1)
+
+        self.assertEqual(stderr, "Error: --cases must not be negative.\n")
+
+
+    def test_args(self):
+        """Takes no positional arguments."""
+        stdout, stderr = self.call_command("foo")
+
+        self.assertEqual(
+            stderr, "Error: Takes no arguments; see --help for options.\n")
@@ -10,3 +10,13 @@ SITE_URL = "http://localhost:80"
 USE_BROWSERID = True
 
 PASSWORD_HASHERS = ['django.contrib.auth.hashers.UnsaltedMD5PasswordHasher']
+
+# separate from the default cache, so tests can clear it without losing
+# compressed assets
+CACHES["model"] = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "model",
+    }
+MODEL_CACHE = "model"
+# tests run in a single process
+MODEL_CACHE_PROCESS_LOCAL = True
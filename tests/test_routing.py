@@ -0,0 +1,183 @@
+"""
+Tests for routing reads of read-only requests to a database replica.
+
+"""
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from tests import case
+
+
+
+class ReplicaRouterTest(case.TestCase):
+    """Tests for ReplicaRouter."""
+    @property
+    def routing(self):
+        from moztrap import routing
+        return routing
+
+
+    def setUp(self):
+        """Configure a replica; begin routing an unpinned request."""
+        replica = override_settings(DATABASE_REPLICA="replica")
+        replica.enable()
+        self.addCleanup(replica.disable)
+        self.router = self.routing.ReplicaRouter()
+        self.routing.begin()
+        self.addCleanup(self.routing.reset)
+
+
+    def test_not_read_only(self):
+        """Reads of requests not marked read-only are not routed."""
+        self.assertIsNone(self.router.db_for_read(None))
+
+
+    def test_read_only(self):
+        """Reads of read-only requests go to the replica."""
+        self.routing.mark_read_only()
+
+        self.assertEqual(self.router.db_for_read(None), "replica")
+
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_no_replica(self):
+        """Without a replica, reads are not routed."""
+        self.routing.mark_read_only()
+
+        self.assertIsNone(self.router.db_for_read(None))
+
+
+    def test_not_routing(self):
+        """Outside a routed request, marking read-only does nothing."""
+        self.routing.reset()
+        self.routing.mark_read_only()
+
+        self.assertIsNone(self.router.db_for_read(None))
+
+
+    def test_pinned(self):
+        """Pinned requests read from the primary."""
+        self.routing.begin(pinned=True)
+        self.routing.mark_read_only()
+
+        self.assertEqual(self.router.db_for_read(None), "default")
+
+
+    def test_read_your_writes(self):
+        """After a write, the request reads from the primary."""
+        self.routing.mark_read_only()
+
+        self.assertEqual(self.router.db_for_write(None), "default")
+
+        self.assertTrue(self.routing.wrote())
+        self.assertEqual(self.router.db_for_read(None), "default")
+
+
+    def test_reading_replica(self):
+        """Whether the current request reads from the replica is known."""
+        self.assertFalse(self.routing.reading_replica())
+        self.routing.mark_read_only()
+        self.assertTrue(self.routing.reading_replica())
+        self.router.db_for_write(None)
+        self.assertFalse(self.routing.reading_replica())
+
+
+    def test_syncdb(self):
+        """Tables are only created in the primary."""
+        self.assertFalse(self.router.allow_syncdb("replica", None))
+        self.assertIsNone(self.router.allow_syncdb("default", None))
+
+
+    def test_metrics(self):
+        """Routed reads are counted in the request's instrumentation."""
+        from moztrap.debug import instrumentation
+        self.routing.mark_read_only()
+        stats = instrumentation.start()
+        self.addCleanup(instrumentation.stop)
+
+        self.router.db_for_read(None)
+        self.router.db_for_write(None)
+        self.router.db_for_read(None)
+
+        self.assertEqual(stats.replica_reads, 1)
+        self.assertEqual(stats.primary_reads, 1)
+
+
+
+class ReplicaRoutingMiddlewareTest(case.TestCase):
+    """Tests for ReplicaRoutingMiddleware."""
+    @property
+    def routing(self):
+        from moztrap import routing
+        return routing
+
+
+    def setUp(self):
+        self.addCleanup(self.routing.reset)
+
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_not_used_without_replica(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            self.routing.ReplicaRoutingMiddleware()
+
+
+    def request(self, cookies=None):
+        """Process a request, with given cookies, that reads; return db."""
+        m = self.routing.ReplicaRoutingMiddleware()
+        request = RequestFactory().get("/")
+        request.COOKIES.update(cookies or {})
+        m.process_request(request)
+        self.routing.mark_read_only()
+        return self.routing.ReplicaRouter().db_for_read(None)
+
+
+    @override_settings(DATABASE_REPLICA="replica")
+    def test_routes(self):
+        """Read-only requests read from the replica."""
+        self.assertEqual(self.request(), "replica")
+
+
+    @override_settings(DATABASE_REPLICA="replica")
+    def test_pin_cookie(self):
+        """Requests with the pin cookie read from the primary."""
+        self.assertEqual(self.request({"replicapin": "1"}), "default")
+
+
+    @override_settings(DATABASE_REPLICA="replica", REPLICA_PIN_SECONDS=5)
+    def test_pins_after_write(self):
+        """Responses to requests that wrote set the pin cookie."""
+        m = self.routing.ReplicaRoutingMiddleware()
+        request = RequestFactory().post("/")
+        m.process_request(request)
+        self.routing.ReplicaRouter().db_for_write(None)
+
+        response = m.process_response(request, HttpResponse())
+
+        self.assertEqual(response.cookies["replicapin"]["max-age"], 5)
+
+
+    @override_settings(DATABASE_REPLICA="replica")
+    def test_no_pin_without_write(self):
+        """Responses to requests that didn't write set no cookie."""
+        m = self.routing.ReplicaRoutingMiddleware()
+        request = RequestFactory().get("/")
+        m.process_request(request)
+
+        response = m.process_response(request, HttpResponse())
+
+        self.assertNotIn("replicapin", response.cookies)
+
+
+    @override_settings(DATABASE_REPLICA="replica")
+    def test_reset_when_finished(self):
+        """Routing ends when the request is finished."""
+        from django.core.signals import request_finished
+        self.request()
+
+        request_finished.send(sender=None)
+
+        self.routing.mark_read_only()
+        self.assertIsNone(self.routing.ReplicaRouter().db_for_read(None))
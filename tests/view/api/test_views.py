@@ -0,0 +1,95 @@
+"""
+Tests for JUnit results ingestion API view.
+
+"""
+import json
+
+from django.core.urlresolvers import reverse
+
+from tests import case
+
+
+
+class JUnitResultsTest(case.api.ApiTestCase):
+    """Tests for junit_results view."""
+    def setUp(self):
+        """Create a run with a case, and a tester with an API key."""
+        super(JUnitResultsTest, self).setUp()
+        self.env = self.F.EnvironmentFactory.create()
+        self.rcv = self.F.RunCaseVersionFactory.create(
+            caseversion__name="Open URL", environments=[self.env])
+        self.run = self.rcv.run
+        self.run.environments.add(self.env)
+        self.user = self.F.UserFactory.create(
+            username="auto", permissions=["execution.execute"])
+        self.apikey = self.F.ApiKeyFactory.create(owner=self.user)
+
+
+    @property
+    def url(self):
+        """Shortcut for ingestion url."""
+        return reverse("api_junit_results", kwargs={"run_id": self.run.id})
+
+
+    def post_xml(self, body, status=200, **params):
+        """POST given XML body with API key credentials."""
+        params.setdefault("username", self.user.username)
+        params.setdefault("api_key", self.apikey.key)
+        return self.app.post(
+            self.url + "?" + "&".join(
+                "{0}={1}".format(k, v) for k, v in params.items()),
+            body,
+            headers={"content-type": "application/xml"},
+            status=status,
+            )
+
+
+    def test_ingest(self):
+        """Records results and returns JSON summary."""
+        res = self.post_xml(
+            '<testsuite><testcase name="Open URL" classname="{0}" />'
+            '</testsuite>'.format(self.env))
+
+        data = json.loads(res.body)
+        self.assertEqual(data["cases"], 1)
+        self.assertEqual(data["results"], 1)
+        self.assertIn("cases_per_second", data)
+        result = self.rcv.results.get()
+        self.assertEqual(result.tester, self.user)
+        self.assertEqual(result.environment, self.env)
+
+
+    def test_environment(self):
+        """Can give one environment for all results."""
+        self.post_xml(
+            '<testsuite><testcase name="Open URL" /></testsuite>',
+            environment=self.env.id)
+
+        self.assertEqual(self.rcv.results.get().environment, self.env)
+
+
+    def test_bad_environment(self):
+        """400 for an environment not in the run."""
+        self.post_xml("<testsuite />", status=400, environment=9999)
+
+
+    def test_bad_xml(self):
+        """400 for malformed XML."""
+        self.post_xml("<testsuite><testcase", status=400)
+
+
+    def test_no_api_key(self):
+        """401 without valid API key."""
+        self.post_xml("<testsuite />", status=401, api_key="wrong")
+
+
+    def test_no_permission(self):
+        """403 without permission to execute tests."""
+        self.user.user_permissions.clear()
+
+        self.post_xml("<testsuite />", status=403)
+
+
+    def test_get(self):
+        """GET not allowed."""
+        self.app.get(self.url, status=405)
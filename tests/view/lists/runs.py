@@ -19,6 +19,24 @@ class RunsListTests(object):
         self.assertNotInList(res, "Foo 2")
 
 
+    def test_filter_by_completion(self):
+        """Can filter by completion range."""
+        envs = self.F.EnvironmentFactory.create_full_set({"OS": ["Linux"]})
+        pv = self.F.ProductVersionFactory.create(environments=envs)
+        for name, status in [("Foo 1", "passed"), ("Foo 2", None)]:
+            run = self.factory.create(name=name, productversion=pv)
+            rcv = self.F.RunCaseVersionFactory.create(
+                run=run, caseversion__productversion=pv)
+            if status is not None:
+                self.F.ResultFactory.create(
+                    runcaseversion=rcv, environment=envs[0], status=status)
+
+        res = self.get(params={"filter-completion": "complete"})
+
+        self.assertInList(res, "Foo 1")
+        self.assertNotInList(res, "Foo 2")
+
+
     def test_filter_by_product(self):
         """Can filter by product."""
         one = self.factory.create(name="Foo 1")
@@ -0,0 +1,109 @@
+"""
+Tests for fragment cache template tag.
+
+"""
+from django.template import Template, Context
+from django.test.utils import override_settings
+
+from tests import case
+
+
+
+class CacheFragmentTest(case.DBTestCase):
+    """Tests for cachefragment template tag."""
+    def render(self, template, **context):
+        """Render template string (loading the tag library) with context."""
+        return Template("{% load fragments %}" + template).render(
+            Context(context))
+
+
+    def test_cached(self):
+        """A fragment is rendered once while its dependencies don't change."""
+        p = self.F.ProductFactory.create(name="One")
+        t = '{% cachefragment "p" p %}{{ p.name }}{% endcachefragment %}'
+
+        self.assertEqual(self.render(t, p=p), "One")
+        p.name = "Two"
+        self.assertEqual(self.render(t, p=p), "One")
+
+
+    def test_instance_changed(self):
+        """A fragment is rendered again when an instance changes."""
+        p = self.F.ProductFactory.create(name="One")
+        t = '{% cachefragment "p" p %}{{ p.name }}{% endcachefragment %}'
+        self.render(t, p=p)
+
+        p.name = "Two"
+        p.save()
+
+        self.assertEqual(self.render(t, p=p), "Two")
+
+
+    def test_value_changed(self):
+        """Fragments are cached separately for different values."""
+        p = self.F.ProductFactory.create(name="One")
+        t = (
+            '{% cachefragment "p" p flag %}{{ p.name }}{{ flag }}'
+            '{% endcachefragment %}'
+            )
+
+        self.assertEqual(self.render(t, p=p, flag=True), "OneTrue")
+        self.assertEqual(self.render(t, p=p, flag=False), "OneFalse")
+
+
+    def test_models(self):
+        """A fragment is rendered again when a model it depends on changes."""
+        t = (
+            '{% cachefragment "count" models "core.product" %}'
+            '{{ products.count }}{% endcachefragment %}'
+            )
+        products = self.model.Product.objects.all()
+        self.render(t, products=products)
+
+        self.F.ProductFactory.create()
+
+        self.assertEqual(self.render(t, products=products), "1")
+
+
+    @override_settings(DATABASE_REPLICA="replica")
+    def test_not_stored_from_replica(self):
+        """Fragments rendered from replica reads are not cached."""
+        from moztrap import routing
+        p = self.F.ProductFactory.create(name="One")
+        t = '{% cachefragment "p" p %}{{ p.name }}{% endcachefragment %}'
+        routing.begin()
+        self.addCleanup(routing.reset)
+        routing.mark_read_only()
+
+        self.render(t, p=p)
+        p.name = "Two"
+
+        self.assertEqual(self.render(t, p=p), "Two")
+
+
+    def test_instrumented(self):
+        """Hits and misses are counted in instrumentation stats."""
+        from moztrap.debug import instrumentation
+        p = self.F.ProductFactory.create()
+        t = '{% cachefragment "p" p %}{{ p.name }}{% endcachefragment %}'
+        stats = instrumentation.start()
+        self.addCleanup(instrumentation.stop)
+
+        self.render(t, p=p)
+        self.render(t, p=p)
+
+        self.assertEqual((stats.fragment_hits, stats.fragment_misses), (1, 1))
+
+
+    def test_product_renamed(self):
+        """List items showing a product version change with its product."""
+        from django.template.loader import render_to_string
+        run = self.F.RunFactory.create(productversion__product__name="One")
+        template = "results/run/list/_run_list_item.html"
+        self.assertIn("One", render_to_string(template, {"run": run}))
+
+        product = run.productversion.product
+        product.name = "Two"
+        product.save()
+
+        self.assertIn("Two", render_to_string(template, {"run": run}))
@@ -222,3 +222,113 @@ class ActionsTest(case.TestCase):
 
         self.assertEqual(res.status_code, 302)
         req.user.has_perm.assert_called_with("do_things")
+
+
+
+class BulkActionsTest(case.DBTestCase):
+    """Tests for bulk actions of the list-actions decorator."""
+    @property
+    def actions(self):
+        """The decorator under test."""
+        from moztrap.view.lists.actions import actions
+        return actions
+
+
+    def view(self, request, permission=None):
+        """Pass request to a decorated, filtered list view of suites."""
+        from moztrap.view.filters import SuiteFilterSet
+        from moztrap.view.lists.filters import filter as list_filter
+
+        @self.actions(
+            self.model.Suite, ["delete", "activate"], permission=permission)
+        @list_filter("suites", filterset_class=SuiteFilterSet)
+        def view(req):
+            response = HttpResponse()
+            response.context_data = {"suites": self.model.Suite.objects.all()}
+            return response
+
+        return view(request)
+
+
+    def req(self, path, data):
+        """Return POST request with a user."""
+        req = RequestFactory().post(path, data=data)
+        req.user = self.F.UserFactory.create()
+        return req
+
+
+    def test_ids(self):
+        """Action is taken on all objects with given IDs, then redirects."""
+        s1 = self.F.SuiteFactory.create(status="draft")
+        s2 = self.F.SuiteFactory.create(status="draft")
+        s3 = self.F.SuiteFactory.create(status="draft")
+        req = self.req(
+            "/the/url", {"bulk-action": "activate", "bulk-id": [s1.id, s2.id]})
+
+        res = self.view(req)
+
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(res["Location"], "/the/url")
+        self.assertEqual(
+            [self.refresh(s).status for s in [s1, s2, s3]],
+            ["active", "active", "draft"],
+            )
+        self.assertEqual(self.refresh(s1).modified_by, req.user)
+
+
+    def test_all_matching(self):
+        """With bulk-all, acts on all objects matching the list filters."""
+        s1 = self.F.SuiteFactory.create()
+        s2 = self.F.SuiteFactory.create(product=s1.product)
+        s3 = self.F.SuiteFactory.create()
+        req = self.req(
+            "/the/url?filter-product={0}".format(s1.product.id),
+            {"bulk-action": "delete", "bulk-all": "1"},
+            )
+
+        self.view(req)
+
+        self.assertEqual(list(self.model.Suite.objects.all()), [s3])
+        self.assertEqual(self.refresh(s2).deleted_by, req.user)
+
+
+    def test_all_without_filters(self):
+        """Bulk-all is refused when no filters are set."""
+        s = self.F.SuiteFactory.create()
+        req = self.req("/the/url", {"bulk-action": "delete", "bulk-all": "1"})
+
+        self.view(req)
+
+        self.assertEqual(list(self.model.Suite.objects.all()), [s])
+
+
+    def test_not_allowed(self):
+        """A bulk action not in allowed actions is not taken."""
+        s = self.F.SuiteFactory.create(status="active")
+
+        self.view(
+            self.req("/the/url", {"bulk-action": "draft", "bulk-id": [s.id]}))
+
+        self.assertEqual(self.refresh(s).status, "active")
+
+
+    def test_no_permission(self):
+        """Permission is checked for bulk actions."""
+        s = self.F.SuiteFactory.create()
+        req = self.req("/the/url", {"bulk-action": "delete", "bulk-id": [s.id]})
+
+        res = self.view(req, permission="library.manage_suites")
+
+        self.assertEqual(res.status_code, 403)
+        self.assertEqual(list(self.model.Suite.objects.all()), [s])
+
+
+    def test_fallback(self):
+        """Actions without a bulk method are called on each object."""
+        from moztrap.view.lists.actions import bulk_action
+        model = Mock(spec=["doit"])
+        obj = Mock()
+
+        bulk_action(model, [obj], "doit", user="user")
+
+        obj.doit.assert_called_once_with(user="user")
@@ -3,7 +3,7 @@ Tests for queryset-filtering.
 
 """
 from django.http import QueryDict
-from mock import Mock
+from mock import Mock, patch
 
 from django.template.response import TemplateResponse
 from django.test import RequestFactory
@@ -165,6 +165,26 @@ class FilterDecoratorTest(FiltersTestCase):
         self.assertTrue(qs.filtered)
 
 
+    def test_counts_facets(self):
+        """Counts facets of unfiltered queryset, if filterset has facets."""
+        class MyBoundFilterSet(self.filters.BoundFilterSet):
+            def count_facets(self, queryset):
+                self.counted_qs = queryset
+
+        class MyFilterSet(self.filters.FilterSet):
+            bound_class = MyBoundFilterSet
+            facets = ["name"]
+            filters = [self.filters.Filter("name")]
+
+        qs = Mock()
+        response = self.on_template_response(
+            {"ctx_name": qs},
+            decorator=self.filter("ctx_name", filterset_class=MyFilterSet),
+            )
+
+        self.assertIs(response.context_data["filters"].counted_qs, qs)
+
+
 
 class FilterSetTest(FiltersTestCase):
     """Tests for FilterSet."""
@@ -681,3 +701,283 @@ class PinnedFilterTest(FiltersTestCase):
             newfilters,
             {"foo": ["5"], "one": ["bub"]},
             )
+
+
+
+class CachedModelFilterTest(case.DBTestCase):
+    """Tests for ModelFilter choice caching and lazy mode."""
+    @property
+    def filters(self):
+        """The module under test."""
+        from moztrap.view.lists import filters
+        return filters
+
+
+    def filter(self, **kwargs):
+        """Return a ModelFilter of tags."""
+        kwargs.setdefault("queryset", self.model.Tag.objects.order_by("name"))
+        return self.filters.ModelFilter("tag", **kwargs)
+
+
+    def test_choices_cached(self):
+        """Choices are queried once, until the model changes."""
+        t = self.F.TagFactory.create(name="one")
+        f = self.filter()
+
+        self.assertEqual(f.get_choices(), [(t.id, "one")])
+        with self.assertNumQueries(0):
+            f.get_choices()
+        t2 = self.F.TagFactory.create(name="two")
+        self.assertEqual(f.get_choices(), [(t.id, "one"), (t2.id, "two")])
+
+
+    def test_depends(self):
+        """Choices are also invalidated by changes to ``depends`` models."""
+        pv = self.F.ProductVersionFactory.create(
+            version="1.0", product__name="Foo")
+        f = self.filters.ModelFilter(
+            "productversion",
+            queryset=self.model.ProductVersion.objects.all(),
+            depends=[self.model.Product],
+            )
+        self.assertEqual(f.get_choices(), [(pv.id, "Foo 1.0")])
+
+        pv.product.name = "Bar"
+        pv.product.save()
+
+        self.assertEqual(f.get_choices(), [(pv.id, "Bar 1.0")])
+
+
+    def test_not_lazy_below_threshold(self):
+        """A lazy filter with few choices lists all of them."""
+        t = self.F.TagFactory.create(name="one")
+        f = self.filter(lazy=True)
+
+        self.assertFalse(f.is_lazy())
+        self.assertEqual(f.options([]), [(t.id, "one")])
+
+
+    def lazy_filter(self):
+        """Return a lazy filter over the threshold, and its tags."""
+        tags = [
+            self.F.TagFactory.create(name="tag {0}".format(i))
+            for i in range(3)
+            ]
+        f = self.filter(lazy=True)
+        f.LAZY_THRESHOLD = 2
+        return f, tags
+
+
+    def test_lazy_options(self):
+        """Over the threshold, only selected options are listed."""
+        f, tags = self.lazy_filter()
+
+        self.assertTrue(f.is_lazy())
+        self.assertEqual(f.options([]), [])
+        self.assertEqual(f.options([tags[1].id]), [(tags[1].id, "tag 1")])
+
+
+    def test_lazy_values(self):
+        """Over the threshold, selected values are validated in one query."""
+        f, tags = self.lazy_filter()
+        f.count()
+
+        with self.assertNumQueries(1):
+            values = f.values({"tag": [str(tags[0].id), "9999", "foo"]})
+
+        self.assertEqual(values, [tags[0].id])
+
+
+    def test_search(self):
+        """Search returns choices matching text."""
+        f, tags = self.lazy_filter()
+        self.F.TagFactory.create(name="other")
+
+        self.assertEqual(
+            f.search("TAG", limit=2),
+            [(tags[0].id, "tag 0"), (tags[1].id, "tag 1")],
+            )
+
+
+    def test_bound_lazy(self):
+        """BoundFilter knows if its filter is lazy."""
+        f, tags = self.lazy_filter()
+
+        self.assertTrue(self.filters.BoundFilter(f, {}).lazy)
+        self.assertFalse(self.filters.BoundFilter(self.filter(), {}).lazy)
+        self.assertFalse(
+            self.filters.BoundFilter(
+                self.filters.KeywordFilter("name"), {}).lazy)
+
+
+
+    def test_bind_queries(self):
+        """Binding checks laziness and resolves values once, uncached."""
+        from django.core.cache.backends.dummy import DummyCache
+        f, tags = self.lazy_filter()
+        data = {"tag": [str(tags[0].id), "9999"]}
+
+        with patch("moztrap.cache._cache", DummyCache("", {})):
+            with self.assertNumQueries(2):
+                bound = self.filters.BoundFilter(f, data)
+            f.LAZY_THRESHOLD = 100
+            with self.assertNumQueries(2):
+                unbound = self.filters.BoundFilter(f, data)
+
+        self.assertTrue(bound.lazy)
+        self.assertEqual(bound.values, [tags[0].id])
+        self.assertEqual(
+            [(o.value, o.label) for o in bound], [(tags[0].id, "tag 0")])
+        self.assertFalse(unbound.lazy)
+        self.assertEqual(unbound.values, [tags[0].id])
+        self.assertEqual(len(unbound), 3)
+
+
+
+class CompletionFilterTest(case.DBTestCase):
+    """Tests for CompletionFilter."""
+    @property
+    def filters(self):
+        """The module under test."""
+        from moztrap.view.lists import filters
+        return filters
+
+
+    def test_ranges_ored(self):
+        """Selected completion ranges are ORed."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Windows", "Linux"]})
+        pv = self.F.ProductVersionFactory.create(environments=envs)
+        runs = [
+            self.F.RunFactory.create(productversion=pv) for i in range(3)]
+        for run, statuses in zip(runs, [["passed"], [], ["passed"] * 2]):
+            rcv = self.F.RunCaseVersionFactory.create(
+                run=run, caseversion__productversion=pv)
+            for env, status in zip(envs, statuses):
+                self.F.ResultFactory.create(
+                    runcaseversion=rcv, environment=env, status=status)
+        f = self.filters.CompletionFilter("completion")
+
+        qs = f.filter(
+            self.model.Run.objects.all(), f.values(
+                {"completion": ["notstarted", "complete", "bogus"]}))
+
+        self.assertEqual(set(qs), set([runs[1], runs[2]]))
+        self.assertEqual(
+            list(f.filter(self.model.Run.objects.all(), [])), runs)
+
+
+
+class FacetTest(case.DBTestCase):
+    """Tests for faceted option counts."""
+    @property
+    def filters(self):
+        """The module under test."""
+        from moztrap.view.lists import filters
+        return filters
+
+
+    def filterset(self):
+        """Return a FilterSet of caseversions with status and tag facets."""
+        f = self.filters
+
+        class CaseVersionFilterSet(f.FilterSet):
+            facets = ["status", "tag"]
+            filters = [
+                f.ChoicesFilter(
+                    "status", choices=self.model.CaseVersion.STATUS),
+                f.ModelFilter(
+                    "tag",
+                    lookup="tags",
+                    queryset=self.model.Tag.objects.all()),
+                f.KeywordFilter("name"),
+                ]
+
+        return CaseVersionFilterSet()
+
+
+    def counts(self, data=None):
+        """Return dict of filter key to list of (value, count) options."""
+        bfs = self.filterset().bind(MultiValueDict(data or {}))
+        bfs.count_facets(self.model.CaseVersion.objects.all())
+        return dict(
+            (bf.key, sorted((o.value, o.count) for o in bf))
+            for bf in bfs if bf.counted
+            )
+
+
+    def setUp(self):
+        """Two tags and three caseversions."""
+        super(FacetTest, self).setUp()
+        self.t1 = self.F.TagFactory.create(name="one")
+        self.t2 = self.F.TagFactory.create(name="two")
+        cv = self.F.CaseVersionFactory.create(name="foo", status="active")
+        cv.tags.add(self.t1, self.t2)
+        cv = self.F.CaseVersionFactory.create(name="bar", status="active")
+        cv.tags.add(self.t1)
+        self.F.CaseVersionFactory.create(name="baz", status="draft")
+
+
+    def test_unfiltered(self):
+        """Counts of each option in unfiltered queryset."""
+        self.assertEqual(
+            self.counts(),
+            {
+                "status": [("active", 2), ("disabled", 0), ("draft", 1)],
+                "tag": [(self.t1.id, 2), (self.t2.id, 1)],
+                },
+            )
+
+
+    def test_other_filters(self):
+        """Counts reflect the other filters, not the facet's own."""
+        counts = self.counts(
+            {"filter-tag": [str(self.t2.id)], "filter-name": ["ba"]})
+
+        self.assertEqual(
+            counts["tag"], [(self.t1.id, 1), (self.t2.id, 0)])
+        self.assertEqual(
+            counts["status"], [("active", 0), ("disabled", 0), ("draft", 0)])
+
+
+    def test_one_query_per_facet(self):
+        """One grouped query per facet, none once cached."""
+        # cache tag choices
+        self.filterset().bind()
+
+        with self.assertNumQueries(2):
+            self.counts()
+        with self.assertNumQueries(0):
+            self.counts()
+
+
+    def test_invalidated(self):
+        """Cached counts are invalidated by changes to models in lookups."""
+        self.counts()
+        cv = self.model.CaseVersion.objects.get(name="baz")
+        cv.tags.add(self.t2)
+
+        self.assertEqual(
+            self.counts()["tag"], [(self.t1.id, 2), (self.t2.id, 2)])
+
+
+    def test_not_counted(self):
+        """Options are not counted unless facets are counted."""
+        bfs = self.filterset().bind()
+        bfs.filter(self.model.CaseVersion.objects.all())
+
+        self.assertEqual([bf.counted for bf in bfs], [False, False, False])
+
+
+    def test_lookup_models(self):
+        """Models along a lookup, forward and reverse."""
+        self.assertEqual(
+            self.filters._lookup_models(
+                self.model.RunCaseVersion, "caseversion__case__suites"),
+            [self.model.CaseVersion, self.model.Case, self.model.Suite],
+            )
+        self.assertEqual(
+            self.filters._lookup_models(
+                self.model.RunCaseVersion, "results__status"),
+            [self.model.Result],
+            )
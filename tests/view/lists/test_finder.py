@@ -2,6 +2,8 @@
 Tests for finder.
 
 """
+import json
+
 from django.template.response import TemplateResponse
 from django.test import RequestFactory
 
@@ -79,7 +81,7 @@ class FinderDecoratorTest(case.DBTestCase):
         MockFinder = Mock()
         f = MockFinder.return_value
         f.column_template.return_value = "some/finder/_column.html"
-        f.objects.return_value = ["some", "objects"]
+        f.cached_objects.return_value = ["some", "objects"]
 
         req = RequestFactory().get(
             "/some/url",
@@ -105,7 +107,7 @@ class FinderDecoratorTest(case.DBTestCase):
             )
 
         f.column_template.assert_called_with("things")
-        f.objects.assert_called_with("things", "2")
+        f.cached_objects.assert_called_with("things", "2")
 
 
     def test_no_ajax(self):
@@ -115,7 +117,7 @@ class FinderDecoratorTest(case.DBTestCase):
         top_col = Mock()
         top_col.name = "top"
         f.columns = [top_col]
-        f.objects.return_value = ["some", "objects"]
+        f.cached_objects.return_value = ["some", "objects"]
 
         res = self.on_template_response({}, decorator=self.finder(MockFinder))
 
@@ -125,7 +127,43 @@ class FinderDecoratorTest(case.DBTestCase):
             ["some", "objects"]
             )
 
-        f.objects.assert_called_with("top")
+        f.cached_objects.assert_called_with("top")
+
+
+    def test_tree(self):
+        """Tree query returns JSON tree from given column, parent and depth."""
+        MockFinder = Mock()
+        f = MockFinder.return_value
+        f.tree_depth = 3
+        f.cached_tree.return_value = [{"id": 1}]
+
+        req = RequestFactory().get(
+            "/some/url", {"finder": "tree", "col": "things", "id": "2"})
+        res = self.on_template_response(
+            {}, request=req, decorator=self.finder(MockFinder))
+
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(
+            json.loads(res.content),
+            {"tree": [{"id": 1}], "no_messages": True}
+            )
+        f.cached_tree.assert_called_with("things", "2", 3)
+
+
+    def test_tree_depth(self):
+        """Tree query passes on requested depth; ignores a bad one."""
+        MockFinder = Mock()
+        f = MockFinder.return_value
+        f.tree_depth = 3
+        f.cached_tree.return_value = []
+
+        for depth, expected in [("2", 2), ("foo", 3)]:
+            req = RequestFactory().get(
+                "/some/url", {"finder": "tree", "depth": depth})
+            self.on_template_response(
+                {}, request=req, decorator=self.finder(MockFinder))
+
+            f.cached_tree.assert_called_with(None, None, expected)
 
 
 
@@ -352,6 +390,126 @@ class FinderTest(case.DBTestCase):
             f.objects("doesnotexist")
 
 
+    def test_parent_lookups(self):
+        """Lookups to parent columns are found at construction."""
+        f = self.ManageFinder()
+
+        self.assertEqual(
+            f.parent_lookups,
+            {
+                "productversions": "product",
+                "runs": "productversion",
+                "suites": "runs",
+                }
+            )
+
+
+    def test_models(self):
+        """Finder depends on its column models and m2m through models."""
+        f = self.ManageFinder()
+
+        self.assertEqual(
+            f.models,
+            set([
+                    self.model.Product,
+                    self.model.ProductVersion,
+                    self.model.Run,
+                    self.model.Suite,
+                    self.model.RunSuite,
+                    ])
+            )
+
+
+    def test_cached_objects(self):
+        """Cached objects are only queried again after a relevant write."""
+        f = self.ManageFinder()
+        rs = self.F.RunSuiteFactory.create()
+
+        self.assertEqual(f.cached_objects("suites", rs.run.pk), [rs.suite])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                f.cached_objects("suites", rs.run.pk), [rs.suite])
+
+        rs2 = self.F.RunSuiteFactory.create(run=rs.run)
+
+        self.assertEqual(
+            f.cached_objects("suites", rs.run.pk), [rs.suite, rs2.suite])
+
+
+    def test_tree(self):
+        """Tree has nested nodes down to tree depth; deeper is lazy."""
+        f = self.ManageFinder()
+        pv = self.F.ProductVersionFactory.create(
+            product__name="Firefox", version="10")
+        self.F.ProductVersionFactory.create(product=pv.product, version="9")
+        run = self.F.RunFactory.create(productversion=pv, name="Smoke")
+
+        # one query per level for the first column, two for the others
+        with self.assertNumQueries(5):
+            tree = f.tree()
+
+        self.assertEqual(len(tree), 1)
+        product = tree[0]
+        self.assertEqual(product["id"], pv.product.id)
+        self.assertEqual(product["name"], "Firefox")
+        self.assertEqual(
+            product["children_url"],
+            "?finder=1&col=productversions&id={0}".format(pv.product.id))
+        self.assertEqual(
+            [v["name"] for v in product["children"]],
+            ["Firefox 9", "Firefox 10"])
+        self.assertIn('value="{0}"'.format(pv.id), product["children_html"])
+        version = product["children"][1]
+        self.assertEqual([r["id"] for r in version["children"]], [run.id])
+        run_node = version["children"][0]
+        self.assertEqual(
+            run_node["children_url"],
+            "?finder=1&col=suites&id={0}".format(run.id))
+        self.assertNotIn("children", run_node)
+        self.assertEqual(product["children"][0]["children"], [])
+
+
+    def test_tree_of_parent(self):
+        """Tree can start at the children of a given parent."""
+        f = self.ManageFinder()
+        rs = self.F.RunSuiteFactory.create()
+        self.F.SuiteFactory.create()
+
+        tree = f.tree("suites", rs.run.pk)
+
+        self.assertEqual([n["id"] for n in tree], [rs.suite.id])
+        self.assertEqual(tree[0]["children_url"], None)
+
+
+    def test_tree_depth(self):
+        """Tree depth is bounded by tree_depth."""
+        f = self.ManageFinder()
+        rs = self.F.RunSuiteFactory.create()
+
+        shallow = f.tree(depth=1)
+        deep = f.tree(depth=10)
+
+        self.assertNotIn("children", shallow[0])
+        run_node = deep[0]["children"][0]["children"][0]
+        self.assertEqual(run_node["id"], rs.run.id)
+        self.assertNotIn("children", run_node)
+
+
+    def test_cached_tree(self):
+        """Cached tree is only rebuilt after a relevant write."""
+        f = self.ManageFinder()
+        p = self.F.ProductFactory.create(name="Firefox")
+
+        self.assertEqual([n["name"] for n in f.cached_tree()], ["Firefox"])
+        with self.assertNumQueries(0):
+            f.cached_tree()
+
+        p.name = "Fennec"
+        p.save()
+
+        self.assertEqual([n["name"] for n in f.cached_tree()], ["Fennec"])
+
+
 
 class ColumnTest(case.DBTestCase):
     """Tests for finder Column."""
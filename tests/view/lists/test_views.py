@@ -0,0 +1,58 @@
+"""
+Tests for list-support views.
+
+"""
+from django.core.urlresolvers import reverse
+
+from tests import case
+
+
+
+class FilterOptionsTest(case.view.AuthenticatedViewTestCase,
+                        case.view.NoCacheTest,
+                        ):
+    """Tests for lazy filter options view."""
+    @property
+    def url(self):
+        """Shortcut for filter-options url."""
+        return reverse("lists_filter_options")
+
+
+    def get(self, **params):
+        """Get filter options with given query params."""
+        params.setdefault("path", reverse("manage_cases"))
+        params.setdefault("key", "creator")
+        return self.app.get(
+            self.url, params=params, user=self.user, status="*")
+
+
+    def test_options(self):
+        """Returns matching options of the filter on the given list page."""
+        self.F.UserFactory.create(username="someone")
+        u = self.F.UserFactory.create(username="other")
+
+        res = self.get(text="othe")
+
+        self.assertEqual(
+            res.json, {"options": [{"value": u.id, "label": "other"}]})
+
+
+    def test_no_text(self):
+        """No options without text."""
+        res = self.get()
+
+        self.assertEqual(res.json, {"options": []})
+
+
+    def test_bad_path(self):
+        """404 if path doesn't resolve."""
+        res = self.get(path="/no/such/page/", text="a")
+
+        self.assertEqual(res.status_int, 404)
+
+
+    def test_bad_key(self):
+        """404 if the page has no such searchable filter."""
+        res = self.get(key="name", text="a")
+
+        self.assertEqual(res.status_int, 404)
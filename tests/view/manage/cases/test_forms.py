@@ -336,7 +336,34 @@ class AddBulkCasesFormTest(case.DBTestCase):
 
         self.assertFalse(form.is_valid())
         self.assertEqual(
-            form.errors["cases"], [u"Expected 'Test that ...', not 'Foo'"])
+            form.errors["cases"],
+            [u"Line 1: Expected 'Test that ...', not 'Foo'"],
+            )
+
+
+    def test_parse_errors(self):
+        """All errors in bulk case text are reported, with line numbers."""
+        data = self.get_form_data()
+        data["cases"] = (
+            "Foo\n"
+            "Bar\n"
+            "Test that I can register\n"
+            "when I fill in form and submit\n"
+            "then I get a welcome email\n"
+            "Test that I can log in\n"
+            )
+
+        form = self.form(data=data)
+
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors["cases"],
+            [
+                u"Line 1: Expected 'Test that ...', not 'Foo'",
+                u"Line 6: Unexpected end of input, "
+                u"looking for 'When ' or 'And When '",
+                ],
+            )
 
 
     def test_created_by(self):
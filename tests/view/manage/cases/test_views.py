@@ -112,6 +112,28 @@ class CasesTest(case.view.manage.ListViewTestCase,
         self.assertNotInList(res, "Case 2")
 
 
+    def test_lazy_tag_filter(self):
+        """With many tags, the tag filter fetches its options on demand."""
+        from moztrap.view.lists.filters import ModelFilter
+        tags = [
+            self.F.TagFactory.create(name="tag {0}".format(i))
+            for i in range(ModelFilter.LAZY_THRESHOLD + 1)
+            ]
+        cv = self.F.CaseVersionFactory.create(name="Case 1")
+        cv.tags.add(tags[0])
+        self.F.CaseVersionFactory.create(name="Case 2")
+
+        res = self.get(params={"filter-tag": tags[0].id})
+
+        group = res.html.find("section", attrs={"data-name": "tag"})
+        self.assertIn("lazy", group["class"])
+        self.assertTrue(
+            group["data-options-url"].startswith(
+                reverse("lists_filter_options") + "?"))
+        self.assertInList(res, "Case 1")
+        self.assertNotInList(res, "Case 2")
+
+
     def test_filter_by_product(self):
         """Can filter by product."""
         cv = self.F.CaseVersionFactory.create(name="Case 1")
@@ -0,0 +1,74 @@
+"""
+Tests for management command to backfill rendered markdown.
+
+"""
+from cStringIO import StringIO
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class CacheMarkdownTest(case.DBTestCase):
+    """Tests for cache_markdown management command."""
+    def setUp(self):
+        """Start with an empty shared cache."""
+        super(CacheMarkdownTest, self).setUp()
+        from moztrap import cache
+        cache.model_cache().clear()
+
+
+    def call_command(self, *args, **kwargs):
+        """
+        Runs the management command and returns (stdout, stderr) output.
+
+        Also patch ``sys.exit`` so a ``CommandError`` doesn't cause an exit.
+
+        """
+        with patch("sys.stdout", StringIO()) as stdout:
+            with patch("sys.stderr", StringIO()) as stderr:
+                with patch("sys.exit"):
+                    call_command("cache_markdown", *args, **kwargs)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return (stdout.read(), stderr.read())
+
+
+    def test_backfills(self):
+        """Descriptions and step texts are rendered into the cache."""
+        from moztrap.view.markup import render
+        cv = self.F.CaseVersionFactory.create(description="_desc_")
+        self.F.CaseStepFactory.create(
+            caseversion=cv, instruction="_do_", expected="_see_")
+        self.F.CaseStepFactory.create(
+            caseversion=cv, number=2, instruction="_do_", expected="")
+
+        out, err = self.call_command(batch_size=2)
+
+        self.assertTrue(out.startswith("Rendered 3 of 4 texts"), out)
+        render._local.clear()
+        with patch("moztrap.view.markup.render.render") as r:
+            for text in ["_desc_", "_do_", "_see_"]:
+                render.cached_render(text)
+        self.assertFalse(r.called)
+
+
+    def test_already_cached(self):
+        """Texts already cached are not rendered again."""
+        self.F.CaseVersionFactory.create(description="_desc_")
+        self.call_command()
+
+        out, err = self.call_command()
+
+        self.assertTrue(out.startswith("Rendered 0 of 1 texts"), out)
+
+
+    def test_bad_batch_size(self):
+        """A batch size must be positive."""
+        out, err = self.call_command(batch_size=0)
+
+        self.assertIn("--batch-size must be positive", err)
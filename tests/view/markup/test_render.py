@@ -0,0 +1,90 @@
+"""
+Tests for cached markdown rendering.
+
+"""
+from mock import patch
+
+from tests import case
+
+
+
+class CachedRenderTest(case.TestCase):
+    """Tests for cached_render and cache_rendered."""
+    def setUp(self):
+        """Start with empty process-local and shared caches."""
+        from moztrap import cache
+        cache.model_cache().clear()
+        self.render._local.clear()
+
+
+    @property
+    def render(self):
+        """The module under test."""
+        from moztrap.view.markup import render
+        return render
+
+
+    def test_renders(self):
+        """Renders markdown to HTML, escaping HTML."""
+        self.assertEqual(
+            self.render.cached_render("_<b>_"),
+            "<p><em>&lt;b&gt;</em></p>\n",
+            )
+
+
+    def test_renders_once(self):
+        """The same text is rendered only once."""
+        with patch("moztrap.view.markup.render.markdown2") as md2:
+            md2.markdown.return_value = u"<p>x</p>"
+            md2.__version__ = "1"
+            self.render.cached_render("x")
+            self.render.cached_render("x")
+
+        self.assertEqual(md2.markdown.call_count, 1)
+
+
+    def test_shared(self):
+        """Text rendered by another process is found in the shared cache."""
+        self.render.cached_render("_x_")
+        self.render._local.clear()
+
+        with patch("moztrap.view.markup.render.render") as render:
+            html = self.render.cached_render("_x_")
+
+        self.assertEqual(html, "<p><em>x</em></p>\n")
+        self.assertFalse(render.called)
+
+
+    def test_changed_text(self):
+        """Changed text is rendered anew."""
+        self.render.cached_render("_x_")
+
+        self.assertEqual(
+            self.render.cached_render("_y_"), "<p><em>y</em></p>\n")
+
+
+    def test_unicode(self):
+        """Non-ASCII text is rendered and cached."""
+        self.assertEqual(
+            self.render.cached_render(u"\xe9"), u"<p>\xe9</p>\n")
+
+
+    def test_local_bounded(self):
+        """The process-local dictionary is cleared when full."""
+        with patch("moztrap.view.markup.render.LOCAL_MAX", 2):
+            for text in ["a", "b", "c"]:
+                self.render.cached_render(text)
+
+        self.assertEqual(len(self.render._local), 1)
+
+
+    def test_cache_rendered(self):
+        """cache_rendered renders only texts not yet cached."""
+        self.render.cached_render("_x_")
+
+        self.assertEqual(self.render.cache_rendered(["_x_", "_y_", "_y_"]), 1)
+
+        with patch("moztrap.view.markup.render.render") as render:
+            self.render.cached_render("_y_")
+
+        self.assertFalse(render.called)
@@ -0,0 +1,122 @@
+"""
+Tests for results export views.
+
+"""
+import json
+
+from django.core.urlresolvers import reverse
+
+from tests import case
+
+
+
+class RunExportTest(case.view.AuthenticatedViewTestCase):
+    """Tests for run export view."""
+    def setUp(self):
+        """Create a run with a result."""
+        super(RunExportTest, self).setUp()
+        self.result = self.F.ResultFactory.create(status="passed")
+        self.run = self.result.runcaseversion.run
+        self.format = "jsonl"
+
+
+    @property
+    def url(self):
+        """Shortcut for run export url."""
+        return reverse(
+            "results_export_run",
+            kwargs={"run_id": self.run.id, "format": self.format})
+
+
+    def test_jsonl(self):
+        """Streams results as JSON Lines."""
+        res = self.get()
+
+        self.assertEqual(
+            res.headers["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertEqual(
+            res.headers["Content-Disposition"],
+            "attachment; filename=run-{0}-results.jsonl".format(self.run.id))
+        self.assertEqual(json.loads(res.body)["id"], self.result.id)
+
+
+    def test_latest(self):
+        """Can request latest results only."""
+        self.result.is_latest = False
+        self.result.save()
+
+        res = self.app.get(
+            self.url + "?latest=1", user=self.user)
+
+        self.assertEqual(res.body, "")
+
+
+    def test_bad_format(self):
+        """Unknown format is a 404."""
+        self.format = "xls"
+
+        self.get(status=404)
+
+
+
+class SeriesExportTest(case.view.AuthenticatedViewTestCase):
+    """Tests for series export view."""
+    def setUp(self):
+        """Create a series with a member run with a result."""
+        super(SeriesExportTest, self).setUp()
+        self.series = self.F.RunFactory.create(is_series=True)
+        self.F.ResultFactory.create(
+            runcaseversion__run__series=self.series,
+            runcaseversion__run__productversion=self.series.productversion,
+            )
+
+
+    @property
+    def url(self):
+        """Shortcut for series export url."""
+        return reverse(
+            "results_export_series",
+            kwargs={"run_id": self.series.id, "format": "csv"})
+
+
+    def test_csv(self):
+        """Streams member-run results as CSV."""
+        res = self.get()
+
+        self.assertEqual(res.headers["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(len(res.body.splitlines()), 2)
+
+
+    def test_not_series(self):
+        """404 for a run that isn't a series."""
+        self.series.is_series = False
+        self.series.save()
+
+        self.get(status=404)
+
+
+
+class ProductVersionExportTest(case.view.AuthenticatedViewTestCase):
+    """Tests for productversion export view."""
+    def setUp(self):
+        """Create a result."""
+        super(ProductVersionExportTest, self).setUp()
+        self.result = self.F.ResultFactory.create()
+        self.pv = self.result.runcaseversion.run.productversion
+
+
+    @property
+    def url(self):
+        """Shortcut for productversion export url."""
+        return reverse(
+            "results_export_productversion",
+            kwargs={"productversion_id": self.pv.id, "format": "junit"})
+
+
+    def test_junit(self):
+        """Streams results as JUnit XML."""
+        res = self.get()
+
+        self.assertEqual(
+            res.headers["Content-Type"], "application/xml; charset=utf-8")
+        res.mustcontain("<testsuites>", "<testsuite ", "<skipped ")
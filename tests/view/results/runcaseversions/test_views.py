@@ -40,6 +40,24 @@ class RunCaseVersionResultsViewTest(case.view.ListViewTestCase,
         self.assertNotInList(res, "Case 2")
 
 
+    def test_filter_by_completion(self):
+        """Can filter by completion range."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux", "Windows"]})
+        run = self.F.RunFactory.create(environments=envs)
+        done = self.F.RunCaseVersionFactory.create(
+            run=run, caseversion__name="Case 1", environments=envs)
+        self.F.RunCaseVersionFactory.create(
+            run=run, caseversion__name="Case 2", environments=envs)
+        self.F.ResultFactory.create(
+            runcaseversion=done, environment=envs[0], status="passed")
+
+        res = self.get(params={"filter-completion": "inprogress"})
+
+        self.assertInList(res, "Case 1")
+        self.assertNotInList(res, "Case 2")
+
+
     def test_filter_by_id(self):
         """Can filter by id."""
         rcv1 = self.F.RunCaseVersionFactory.create(caseversion__name="Case 1")
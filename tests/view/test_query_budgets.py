@@ -0,0 +1,282 @@
+"""
+Query-count and wall-time budgets for list and detail views.
+
+Every URL is rendered, with a cold model cache, against a generated mid-size
+dataset, and must not exceed its query budget: the queries it issued when the
+budget was last set, plus ``QUERY_HEADROOM``. A change that introduces an N+1
+query pattern (e.g. a related lookup per list item in a template) fails here
+with the URL, its query count, and its most-repeated SQL.
+
+To find current counts after an intentional change, run this module with
+``BUDGETS_REPORT=1`` in the environment; the counts are written to stderr.
+
+"""
+import os
+import re
+import sys
+import time
+
+from django.core.urlresolvers import reverse
+
+from mock import patch
+
+from moztrap import cache
+from moztrap.debug import instrumentation
+from moztrap.model.scaledata import ScaleDataGenerator
+
+from tests import case
+
+
+
+# generous wall-time budget per request, in seconds; query budgets are the
+# reliable check, this catches only pathological slowness
+TIME_BUDGET = 3.0
+
+# Queries allowed per URL over its count below. A harmless added lookup per
+# request (a setting or permission check) fits; every list in the dataset has
+# at least two items, so a query per item still exceeds it.
+QUERY_HEADROOM = 1
+
+# queries per URL label when budgets were last set, with a cold model cache;
+# see ``QueryBudgetTest.budget_urls``
+QUERY_COUNTS = {
+    "manage_products": 14,
+    "manage_product_details": 7,
+    "manage_productversions": 9,
+    "manage_productversion_details": 10,
+    "manage_runs": 14,
+    "manage_run_details": 12,
+    "manage_run_edit": 5,
+    "manage_suites": 14,
+    "manage_suite_details": 2,
+    "manage_cases": 18,
+    "manage_case_details": 12,
+    "manage_caseversion_edit": 13,
+    "manage_tags": 22,
+    "manage_profiles": 8,
+    "manage_profile_details": 7,
+    "manage_profile_add": 3,
+    "manage_productversion_environments": 12,
+    "results_runs": 14,
+    "results_run_details": 6,
+    "results_runcaseversions": 24,
+    "results_runcaseversion_details": 13,
+    "results_results": 22,
+    "runtests": 2,
+    "runtests_run": 237,
+    "api_product": 9,
+    "api_productversion": 7,
+    "api_run": 35,
+    "api_runcaseversion": 449,
+    "api_suite": 9,
+    "api_case": 43,
+    "api_caseversion": 407,
+    "api_casestep": 3,
+    "api_environment": 15,
+    "api_element": 7,
+    "api_category": 3,
+    "api_tag": 13,
+    "api_user": 3,
+    "api_suiteselection": 4,
+    "api_caseselection": 5,
+    "api_caseversionselection": 48,
+    }
+
+API_RESOURCES = [
+    "product",
+    "productversion",
+    "run",
+    "runcaseversion",
+    "suite",
+    "case",
+    "caseversion",
+    "casestep",
+    "environment",
+    "element",
+    "category",
+    "tag",
+    "user",
+    "suiteselection",
+    "caseselection",
+    "caseversionselection",
+    ]
+
+# list URLs measured with and without the identity map
+IDENTITY_MAP_LABELS = [
+    "manage_products",
+    "manage_productversions",
+    "manage_runs",
+    "manage_suites",
+    "manage_cases",
+    "manage_tags",
+    "manage_profiles",
+    "results_runs",
+    "results_runcaseversions",
+    "results_results",
+    ]
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+
+def write_report(lines):
+    """Write report lines to stderr, if ``BUDGETS_REPORT`` is set."""
+    if os.environ.get("BUDGETS_REPORT"):
+        sys.stderr.write("\n" + "\n".join(lines) + "\n")
+
+
+
+class QueryBudgetTest(case.view.ViewTestCase):
+    """Render every list and detail view within its budgets."""
+    def setUp(self):
+        """Generate a mid-size dataset and a user with all permissions."""
+        super(QueryBudgetTest, self).setUp()
+        ScaleDataGenerator(
+            seed=1,
+            products=2,
+            versions=2,
+            cases=30,
+            steps=3,
+            tags=5,
+            suites=3,
+            categories=2,
+            elements=2,
+            runs=2,
+            results=300,
+            testers=3,
+            ).generate()
+        self.user = self.F.UserFactory.create(
+            username="budget", is_superuser=True)
+
+
+    def budget_urls(self):
+        """Return list of (label, url) to check."""
+        M = self.model
+        run = M.Run.objects.order_by("id")[0]
+        rcv = M.RunCaseVersion.objects.filter(run=run).order_by("id")[0]
+        cv = rcv.caseversion
+        pv = run.productversion
+        env = run.environments.order_by("id")[0]
+
+        def url(name, **kwargs):
+            return reverse(name, kwargs=kwargs)
+
+        urls = [
+            ("manage_products", url("manage_products")),
+            ("manage_product_details", url(
+                    "manage_product_details", product_id=pv.product_id)),
+            ("manage_productversions", url("manage_productversions")),
+            ("manage_productversion_details", url(
+                    "manage_productversion_details",
+                    productversion_id=pv.id)),
+            ("manage_runs", url("manage_runs")),
+            ("manage_run_details", url("manage_run_details", run_id=run.id)),
+            ("manage_run_edit", url("manage_run_edit", run_id=run.id)),
+            ("manage_suites", url("manage_suites")),
+            ("manage_suite_details", url(
+                    "manage_suite_details",
+                    suite_id=M.Suite.objects.order_by("id")[0].id)),
+            ("manage_cases", url("manage_cases")),
+            ("manage_case_details", url(
+                    "manage_case_details", caseversion_id=cv.id)),
+            ("manage_caseversion_edit", url(
+                    "manage_caseversion_edit", caseversion_id=cv.id)),
+            ("manage_tags", url("manage_tags")),
+            ("manage_profiles", url("manage_profiles")),
+            ("manage_profile_details", url(
+                    "manage_profile_details",
+                    profile_id=M.Profile.objects.order_by("id")[0].id)),
+            ("manage_profile_add", url("manage_profile_add")),
+            ("manage_productversion_environments", url(
+                    "manage_productversion_environments",
+                    productversion_id=pv.id)),
+            ("results_runs", url("results_runs")),
+            ("results_run_details", url(
+                    "results_run_details", run_id=run.id)),
+            ("results_runcaseversions", url("results_runcaseversions")),
+            ("results_runcaseversion_details", url(
+                    "results_runcaseversion_details", rcv_id=rcv.id)),
+            ("results_results", url("results_results", rcv_id=rcv.id)),
+            ("runtests", url("runtests")),
+            ("runtests_run", url(
+                    "runtests_run", run_id=run.id, env_id=env.id)),
+            ]
+        for resource in API_RESOURCES:
+            urls.append((
+                    "api_{0}".format(resource),
+                    reverse(
+                        "api_dispatch_list",
+                        kwargs={"api_name": "v1", "resource_name": resource})
+                    + "?format=json&limit=20",
+                    ))
+        return urls
+
+
+    def measure(self, url):
+        """Return (queries, seconds, duplicate SQL shapes) to render url."""
+        # request stats are read back from the instrumentation middleware
+        stats = []
+        stop = instrumentation.stop
+
+        def capture():
+            result = stop()
+            stats.append(result)
+            return result
+
+        start = time.time()
+        with patch("moztrap.debug.instrumentation.stop", capture):
+            res = self.app.get(url, user=self.user)
+        elapsed = time.time() - start
+
+        self.assertEqual(res.status_int, 200, url)
+        queries = int(QUERIES_RE.search(res.headers["Server-Timing"]).group(1))
+        return queries, elapsed, stats[-1].duplicates(3)
+
+
+    def test_budgets(self):
+        """No URL exceeds its query or time budget."""
+        failures = []
+        report = []
+        for label, url in self.budget_urls():
+            # measured with a cold model cache, independent of URL order
+            cache.model_cache().clear()
+            queries, elapsed, duplicates = self.measure(url)
+            report.append("{0}: {1} queries, {2:.3f}s".format(
+                    label, queries, elapsed))
+            count = QUERY_COUNTS.get(label)
+            if count is None:
+                failures.append("{0}: no query budget ({1} queries)".format(
+                        label, queries))
+            elif queries > count + QUERY_HEADROOM:
+                failures.append(
+                    "{0}: {1} queries, budget {2}; most repeated: {3}".format(
+                        label, queries, count + QUERY_HEADROOM, duplicates))
+            if elapsed > TIME_BUDGET:
+                failures.append("{0}: {1:.2f}s, budget {2:.2f}s".format(
+                        label, elapsed, TIME_BUDGET))
+
+        write_report(report)
+        self.assertFalse(failures, "\n".join(failures))
+
+
+    def test_identity_map(self):
+        """The identity map never adds queries to list views."""
+        urls = dict(self.budget_urls())
+        failures = []
+        report = []
+        for label in IDENTITY_MAP_LABELS:
+            counts = []
+            for enabled in [False, True]:
+                with self.settings(IDENTITY_MAP_ENABLED=enabled):
+                    # middleware is loaded on the first request of a new app;
+                    # both are measured with a cold model cache
+                    self.renew_app()
+                    cache.model_cache().clear()
+                    counts.append(self.measure(urls[label])[0])
+            report.append("{0}: {1} queries, {2} with identity map".format(
+                    label, *counts))
+            if counts[1] > counts[0]:
+                failures.append(report[-1])
+
+        write_report(report)
+        self.assertFalse(failures, "\n".join(failures))
@@ -0,0 +1,67 @@
+"""
+Tests for replica routing view utilities.
+
+"""
+from django.conf.urls.defaults import patterns, url, include
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from tests import case
+
+
+
+def view(request):
+    """Return the database reads are routed to."""
+    from moztrap.routing import ReplicaRouter
+    return HttpResponse(ReplicaRouter().db_for_read(None) or "")
+
+
+
+class ReadOnlyTest(case.TestCase):
+    """Tests for read_only view decorator."""
+    @property
+    def routing(self):
+        from moztrap.view.utils import routing
+        return routing
+
+
+    def setUp(self):
+        """Configure a replica and begin routing a request."""
+        from moztrap import routing
+        replica = override_settings(DATABASE_REPLICA="replica")
+        replica.enable()
+        self.addCleanup(replica.disable)
+        routing.begin()
+        self.addCleanup(routing.reset)
+
+
+    def test_get(self):
+        """GET requests read from the replica."""
+        response = self.routing.read_only(view)(RequestFactory().get("/"))
+
+        self.assertEqual(response.content, "replica")
+
+
+    def test_post(self):
+        """Other requests are not read-only."""
+        response = self.routing.read_only(view)(RequestFactory().post("/"))
+
+        self.assertEqual(response.content, "")
+
+
+    def test_read_only_urls(self):
+        """Views of (included) url patterns are made read-only."""
+        urlpatterns = self.routing.read_only_urls(
+            patterns(
+                "",
+                url(r"^a/$", view, name="a"),
+                url(r"^b/", include(patterns("", url(r"^c/$", view)))),
+                )
+            )
+
+        self.assertEqual(urlpatterns[0].name, "a")
+        response = urlpatterns[1].resolve("b/c/").func(
+            RequestFactory().get("/b/c/"))
+
+        self.assertEqual(response.content, "replica")